@@ -166,7 +166,8 @@ export async function rebootAllPhones(): Promise<void> {
         });
 
         if (response.ok) {
-            showNotification('Reboot command sent to all phones', 'success');
+            const data = await response.json() as { message?: string };
+            showNotification(data.message ?? 'Reboot command sent to all phones', 'success');
         } else {
             showNotification('Failed to reboot phones', 'error');
         }
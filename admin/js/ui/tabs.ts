@@ -1,10 +1,151 @@
+import { fetchWithTimeout, getApiBaseUrl, getAuthHeaders } from '../api/client.ts';
 import { store } from '../state/store.ts';
 
 const AUTO_REFRESH_INTERVAL_MS = 10000; // 10 seconds
+// A busy PBX pushes events continuously; reload a live tab at most this
+// often, so it never costs more than the polling it replaces
+const LIVE_REFRESH_MIN_INTERVAL_MS = AUTO_REFRESH_INTERVAL_MS;
+// Matches the retry delay the event stream suggests to EventSource
+const LIVE_RECONNECT_DELAY_MS = 3000;
 
 // Track the auto-refresh interval handle locally
 let autoRefreshInterval: ReturnType<typeof setInterval> | null = null;
 
+// Live event stream shared by tabs that reload on state changes
+let liveEventSource: EventSource | null = null;
+let liveRefreshTimer: ReturnType<typeof setTimeout> | null = null;
+let lastLiveRefresh = 0;
+// Bumped whenever live updates stop, so a ticket request that completes
+// after the user has moved on doesn't open a stream
+let liveGeneration = 0;
+
+/** Live event types that make each tab stale */
+const LIVE_TAB_EVENTS: Record<string, string[]> = {
+    'dashboard': ['call.started', 'call.ended', 'extension.registered', 'extension.unregistered'],
+    'calls': ['call.started', 'call.ended'],
+    'extensions': ['extension.registered', 'extension.unregistered'],
+    'phones': ['extension.registered', 'extension.unregistered'],
+    'qos': ['call.ended', 'qos.alert'],
+};
+
+function stopLiveUpdates(): void {
+    liveGeneration++;
+    if (liveRefreshTimer) {
+        clearTimeout(liveRefreshTimer);
+        liveRefreshTimer = null;
+    }
+    if (liveEventSource) {
+        liveEventSource.close();
+        liveEventSource = null;
+    }
+}
+
+/**
+ * Exchange the session token for a one-time stream ticket. EventSource
+ * can't send an Authorization header, and the token itself must not end
+ * up in a URL.
+ */
+async function fetchStreamTicket(): Promise<string | null> {
+    try {
+        const response = await fetchWithTimeout(`${getApiBaseUrl()}/api/events/ticket`, {
+            method: 'POST',
+            headers: getAuthHeaders()
+        });
+        if (!response.ok) return null;
+        const data = await response.json() as { ticket?: string };
+        return data.ticket ?? null;
+    } catch {
+        return null;
+    }
+}
+
+/**
+ * Reload the tab when the server pushes a relevant state change.
+ * The first change after a quiet spell reloads straight away; changes
+ * after that are folded into one reload per LIVE_REFRESH_MIN_INTERVAL_MS.
+ * Returns false when the browser or session can't use the live stream,
+ * so the caller falls back to polling; onFailure runs if the stream
+ * can't be opened after all.
+ */
+function startLiveUpdates(eventTypes: string[], refresh: () => void, onFailure: () => void): boolean {
+    if (typeof EventSource === 'undefined' || !localStorage.getItem('pbx_token')) {
+        return false;
+    }
+
+    const generation = ++liveGeneration;
+    // showTab() has just loaded the tab
+    lastLiveRefresh = Date.now();
+    let synchronized = false;
+    let lastEventId = '';
+    const scheduleRefresh = (): void => {
+        if (liveRefreshTimer) return;
+        const wait = Math.max(0, lastLiveRefresh + LIVE_REFRESH_MIN_INTERVAL_MS - Date.now());
+        liveRefreshTimer = setTimeout(() => {
+            liveRefreshTimer = null;
+            lastLiveRefresh = Date.now();
+            refresh();
+        }, wait);
+    };
+    const fail = (): void => {
+        debugWarn('Live event stream unavailable - falling back to polling');
+        stopLiveUpdates();
+        onFailure();
+    };
+
+    const connect = async (): Promise<void> => {
+        const ticket = await fetchStreamTicket();
+        if (generation !== liveGeneration) return;
+        if (!ticket) {
+            fail();
+            return;
+        }
+
+        let url = `${getApiBaseUrl()}/api/events/stream?ticket=${encodeURIComponent(ticket)}`;
+        if (lastEventId) {
+            url += `&last_event_id=${encodeURIComponent(lastEventId)}`;
+        }
+        const source = new EventSource(url);
+        let opened = false;
+        source.onopen = () => {
+            opened = true;
+        };
+
+        // A later snapshot means the stream resynchronized after a gap, so
+        // anything may have changed; the first one matches what was just loaded
+        source.addEventListener('snapshot', (event) => {
+            lastEventId = (event as MessageEvent).lastEventId;
+            if (synchronized) scheduleRefresh();
+            synchronized = true;
+        });
+        for (const eventType of eventTypes) {
+            source.addEventListener(eventType, (event) => {
+                lastEventId = (event as MessageEvent).lastEventId;
+                scheduleRefresh();
+            });
+        }
+        source.onerror = () => {
+            if (source.readyState !== EventSource.CLOSED) return;
+            // A ticket opens one stream, so EventSource's own reconnect is
+            // refused; once a stream has worked, reconnect with a new ticket
+            // and resume after the last event seen
+            source.close();
+            if (generation !== liveGeneration) return;
+            if (opened) {
+                setTimeout(() => {
+                    if (generation === liveGeneration) void connect();
+                }, LIVE_RECONNECT_DELAY_MS);
+            } else {
+                fail();
+            }
+        };
+
+        liveEventSource = source;
+    };
+
+    void connect();
+    return true;
+}
+
 // Auto-refresh wrapper functions - defined once to avoid recreation on tab switch
 
 /** Wrapper for emergency tab: refresh both contacts and history */
@@ -31,11 +172,12 @@ function refreshCallbackQueueTab(): void {
  * Setup auto-refresh for tabs that need periodic data updates.
  */
 function setupAutoRefresh(tabName: string): void {
-    // Clear any existing auto-refresh interval
+    // Clear any existing auto-refresh interval or live stream
     if (autoRefreshInterval) {
         clearInterval(autoRefreshInterval);
         autoRefreshInterval = null;
     }
+    stopLiveUpdates();
 
     // Define which tabs should auto-refresh and their refresh functions
     const autoRefreshTabs: Record<string, () => void> = {
@@ -65,6 +207,24 @@ function setupAutoRefresh(tabName: string): void {
         'sbc-management': () => window.loadSBCData?.()
     };
 
+    // Tabs backed by live state reload on pushed events instead of polling
+    const liveEvents = LIVE_TAB_EVENTS[tabName];
+    const liveRefresh = autoRefreshTabs[tabName];
+    if (liveEvents && liveRefresh) {
+        const fallback = (): void => startPolling(tabName, autoRefreshTabs);
+        if (startLiveUpdates(liveEvents, liveRefresh, fallback)) {
+            store.set('autoRefreshInterval', null);
+            return;
+        }
+    }
+
+    startPolling(tabName, autoRefreshTabs);
+}
+
+/**
+ * Poll the tab's refresh function on a fixed interval.
+ */
+function startPolling(tabName: string, autoRefreshTabs: Record<string, () => void>): void {
     // If the current tab supports auto-refresh, set it up
     if (autoRefreshTabs[tabName]) {
         autoRefreshInterval = setInterval(() => {
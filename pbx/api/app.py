@@ -1,5 +1,7 @@
 """Flask application factory for PBX API."""
 
+import gzip
+import time
 from pathlib import Path
 
 from flask import Flask, Response, request
@@ -25,6 +27,36 @@ def create_app(pbx_core: object | None = None) -> Flask:
     app.config["PBX_CORE"] = pbx_core
     app.config["ADMIN_DIR"] = ADMIN_DIR
 
+    # Registered first so it runs after the other after_request hooks
+    @app.after_request
+    def compress_json_response(response: Response) -> Response:
+        if (
+            "gzip" not in request.headers.get("Accept-Encoding", "")
+            or response.mimetype != "application/json"
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        min_size = 1024
+        if pbx_core:
+            config = getattr(pbx_core, "config", None)
+            if config:
+                min_size = int(config.get("api.server.gzip_min_size", min_size))
+
+        # 0 turns compression off
+        if min_size <= 0:
+            return response
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        response.set_data(gzip.compress(data, compresslevel=5))
+        response.headers["Content-Encoding"] = "gzip"
+        response.vary.add("Accept-Encoding")
+        return response
+
     @app.after_request
     def add_security_headers(response: Response) -> Response:
         # CORS: restrict to configured origins (default: same-origin only)
@@ -93,8 +125,47 @@ def _record_request_metrics(resp: Response) -> Response:
             )
         return resp
 
+    # Per-client API rate limiting (opt-in via api.rate_limit.enabled)
+    config = getattr(pbx_core, "config", None) if pbx_core else None
+    if config and config.get("api.rate_limit.enabled", False):
+        from pbx.utils.security_middleware import configure_rate_limiter, get_rate_limiter
+
+        def _configure_rate_limiter(*_args: object) -> None:
+            configure_rate_limiter(
+                requests_per_minute=config.get("api.rate_limit.requests_per_minute", 600),
+                burst_size=config.get("api.rate_limit.burst_size", 60),
+                route_costs=config.get("api.rate_limit.route_costs"),
+            )
+
+        _configure_rate_limiter()
+        # New limits apply after a config reload; turning limiting on or off needs a restart
+        if hasattr(config, "subscribe"):
+            config.subscribe(_configure_rate_limiter, prefix="api.rate_limit")
+
+        @app.before_request
+        def _enforce_rate_limit() -> Response | None:
+            endpoint = request.url_rule.rule if request.url_rule else request.path
+            allowed, retry_after = get_rate_limiter().is_allowed(
+                request.remote_addr or "unknown", endpoint
+            )
+            if allowed:
+                return None
+            response = app.response_class(
+                response='{"error": "Rate limit exceeded"}',
+                status=429,
+                mimetype="application/json",
+            )
+            response.headers["Retry-After"] = str(max(1, retry_after or 0))
+            return response
+
     register_error_handlers(app)
+    # Flask won't take new blueprints once requests are served, so routes
+    # can't be registered lazily; their cost goes in the startup profile
+    started = time.perf_counter()
     _register_blueprints(app)
+    registry = getattr(pbx_core, "feature_registry", None) if pbx_core else None
+    if registry:
+        registry.record("api_routes", time.perf_counter() - started)
 
     return app
 
@@ -107,6 +178,7 @@ def _register_blueprints(app: Flask) -> None:
     from pbx.api.routes.config import config_bp
     from pbx.api.routes.docs import docs_bp
     from pbx.api.routes.emergency import emergency_bp
+    from pbx.api.routes.events import events_bp
     from pbx.api.routes.extensions import extensions_bp
     from pbx.api.routes.features import features_bp
     from pbx.api.routes.framework import framework_bp
@@ -141,6 +213,7 @@ def _register_blueprints(app: Flask) -> None:
         emergency_bp,
         security_bp,
         qos_bp,
+        events_bp,
         features_bp,
         framework_bp,
         static_bp,
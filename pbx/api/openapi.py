@@ -106,6 +106,40 @@ def get_openapi_spec() -> dict[str, Any]:
                     },
                 }
             },
+            "/api/health/startup": {
+                "get": {
+                    "tags": ["Health"],
+                    "summary": "Startup profile",
+                    "description": "Per-feature startup timings, slowest first.",
+                    "operationId": "startupProfile",
+                    "responses": {
+                        "200": {
+                            "description": "Startup timings",
+                            "content": {
+                                "application/json": {
+                                    "schema": {
+                                        "type": "object",
+                                        "properties": {
+                                            "workers": {"type": "integer"},
+                                            "initialize_seconds": {"type": "number"},
+                                            "features": {
+                                                "type": "array",
+                                                "items": {
+                                                    "type": "object",
+                                                    "additionalProperties": True,
+                                                },
+                                            },
+                                        },
+                                    }
+                                }
+                            },
+                        },
+                        "404": {
+                            "description": "Startup profile not available",
+                        },
+                    },
+                }
+            },
             "/api/status": {
                 "get": {
                     "tags": ["Health"],
@@ -0,0 +1,172 @@
+"""Live event stream Blueprint routes.
+
+Pushes PBX state changes (calls, registrations, queues, QoS alerts) to the
+admin dashboard over Server-Sent Events instead of having it poll.
+"""
+
+import json
+import secrets
+import threading
+import time
+from collections.abc import Iterator
+from typing import Any
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from pbx.api.utils import (
+    DateTimeEncoder,
+    get_pbx_core,
+    require_admin,
+    send_json,
+    verify_authentication,
+)
+from pbx.utils.logger import get_logger
+
+logger = get_logger()
+
+events_bp = Blueprint("events", __name__)
+
+# Seconds between keepalive comments on an idle stream
+HEARTBEAT_INTERVAL = 15.0
+# Reconnect delay suggested to EventSource clients, in milliseconds
+RETRY_MS = 3000
+# Seconds a stream ticket can be redeemed after it is issued
+TICKET_TTL = 30.0
+
+
+class _StreamTickets:
+    """One-time tickets for opening the stream from a browser.
+
+    EventSource cannot set request headers, and a session token in the URL
+    would end up in proxy and access logs. The dashboard instead exchanges
+    its token for a ticket that opens one stream and expires quickly.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._tickets: dict[str, tuple[float, dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def issue(self, payload: dict[str, Any]) -> str:
+        ticket = secrets.token_urlsafe(32)
+        now = time.monotonic()
+        with self._lock:
+            # Unredeemed tickets are dropped once they expire
+            self._tickets = {t: e for t, e in self._tickets.items() if e[0] > now}
+            self._tickets[ticket] = (now + self.ttl, payload)
+        return ticket
+
+    def redeem(self, ticket: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._tickets.pop(ticket, None)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+
+_tickets = _StreamTickets(TICKET_TTL)
+
+
+def _verify_stream_auth() -> tuple[bool, dict[str, Any] | None]:
+    """Verify an admin session from the Authorization header or ?ticket=."""
+    ticket = request.args.get("ticket")
+    if ticket and not request.headers.get("Authorization"):
+        payload = _tickets.redeem(ticket)
+        return payload is not None, payload
+    return verify_authentication()
+
+
+def _get_event_bus() -> Any:
+    pbx_core = get_pbx_core()
+    return getattr(pbx_core, "event_bus", None) if pbx_core else None
+
+
+def _parse_last_event_id() -> int | None:
+    """Get the resume position sent by a reconnecting client, if any."""
+    raw = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    if raw is None:
+        return None
+    try:
+        return max(int(raw), 0)
+    except ValueError:
+        return None
+
+
+def _encode_snapshot(snapshot: dict) -> str:
+    payload = json.dumps(snapshot, cls=DateTimeEncoder, default=str)
+    return f"id: {snapshot['seq']}\nevent: snapshot\ndata: {payload}\n\n"
+
+
+def _stream(bus: Any, last_seq: int | None) -> Iterator[str]:
+    """Generate the SSE stream: snapshot or backlog first, then live deltas."""
+    bus.add_subscriber()
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+
+        backlog = bus.events_since(last_seq) if last_seq is not None else None
+        if backlog is None:
+            snapshot = bus.snapshot()
+            last_seq = snapshot["seq"]
+            yield _encode_snapshot(snapshot)
+        else:
+            for event in backlog:
+                last_seq = event.seq
+                yield event.encode()
+
+        while not bus.closed:
+            events = bus.wait_for_events(last_seq, HEARTBEAT_INTERVAL)
+            if events is None:
+                # Fell behind the retained history; resynchronize
+                snapshot = bus.snapshot()
+                last_seq = snapshot["seq"]
+                yield _encode_snapshot(snapshot)
+            elif events:
+                for event in events:
+                    last_seq = event.seq
+                    yield event.encode()
+            elif not bus.closed:
+                yield ": keepalive\n\n"
+    finally:
+        bus.remove_subscriber()
+
+
+@events_bp.route("/api/events/stream", methods=["GET"])
+def handle_event_stream() -> Response:
+    """Stream live PBX state changes as Server-Sent Events."""
+    is_authenticated, payload = _verify_stream_auth()
+    if not is_authenticated:
+        return jsonify({"error": "Authentication required"}), 401
+    if not payload or not payload.get("is_admin", False):
+        return jsonify({"error": "Admin privileges required"}), 403
+
+    bus = _get_event_bus()
+    if bus is None:
+        return send_json({"error": "Live events not available"}, 503), 503
+
+    response = Response(
+        stream_with_context(_stream(bus, _parse_last_event_id())),
+        mimetype="text/event-stream",
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    # Keep reverse proxies (nginx) from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@events_bp.route("/api/events/ticket", methods=["POST"])
+@require_admin
+def handle_event_ticket() -> Response:
+    """Issue a one-time ticket for opening the event stream with EventSource."""
+    ticket = _tickets.issue(request.auth_payload)
+    return send_json({"ticket": ticket, "expires_in": TICKET_TTL}), 200
+
+
+@events_bp.route("/api/events/snapshot", methods=["GET"])
+@require_admin
+def handle_event_snapshot() -> Response:
+    """Get the current live state and the sequence number it reflects."""
+    bus = _get_event_bus()
+    if bus is None:
+        return send_json({"error": "Live events not available"}, 503), 503
+
+    return send_json(bus.snapshot()), 200
@@ -1261,6 +1261,37 @@ def get_time_routing_statistics() -> tuple[Response, int]:
         return send_json({"error": "Time-based routing not initialized"}, 500), 500
 
 
+@features_bp.route("/api/time-routing/preview", methods=["GET"])
+@require_auth
+def preview_time_routing() -> tuple[Response, int]:
+    """Preview how a destination is routed over a date range."""
+    pbx_core = get_pbx_core()
+    if pbx_core and hasattr(pbx_core, "time_based_routing"):
+        from datetime import date
+
+        destination = request.args.get("destination")
+        if not destination:
+            return send_json({"error": "destination is required"}, 400), 400
+        try:
+            start_date = date.fromisoformat(request.args.get("start", ""))
+            end_date = date.fromisoformat(request.args.get("end", request.args.get("start", "")))
+            periods = pbx_core.time_based_routing.preview_routing(destination, start_date, end_date)
+        except ValueError as e:
+            return send_json({"error": f"Invalid date range: {e!s}"}, 400), 400
+        except (KeyError, TypeError) as e:
+            logger.error(f"Error previewing time routing: {e}")
+            return send_json({"error": f"Error previewing time routing: {e!s}"}, 500), 500
+        return send_json(
+            {
+                "destination": destination,
+                "timezone": str(pbx_core.time_based_routing.timezone),
+                "periods": periods,
+                "count": len(periods),
+            }
+        ), 200
+    return send_json({"error": "Time-based routing not initialized"}, 500), 500
+
+
 @features_bp.route("/api/time-routing/rule", methods=["POST"])
 @require_auth
 def add_time_routing_rule() -> tuple[Response, int]:
@@ -1496,9 +1527,7 @@ def get_fraud_statistics() -> tuple[Response, int]:
             # Transform to match frontend expectations
             result = {
                 "total_alerts": stats.get("total_alerts", 0),
-                "high_risk_alerts": sum(
-                    1 for a in pbx_core.fraud_detection.alerts if a.get("fraud_score", 0) > 0.7
-                ),
+                "high_risk_alerts": stats.get("high_risk_alerts", 0),
                 "blocked_patterns_count": stats.get("blocked_patterns", 0),
                 "extensions_flagged": stats.get("total_extensions_tracked", 0),
                 "alerts_24h": stats.get("alerts_24h", 0),
@@ -1583,7 +1612,7 @@ def delete_blocked_pattern(pattern_id: str) -> tuple[Response, int]:
             try:
                 index = int(pattern_id)
                 if 0 <= index < len(pbx_core.fraud_detection.blocked_patterns):
-                    del pbx_core.fraud_detection.blocked_patterns[index]
+                    pbx_core.fraud_detection.remove_blocked_pattern(index)
                     return send_json({"success": True, "message": "Blocked pattern deleted"}), 200
                 return send_json({"error": "Pattern not found"}, 404), 404
             except (ValueError, IndexError):
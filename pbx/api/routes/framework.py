@@ -1130,6 +1130,89 @@ def export_bi_dataset() -> tuple[Response, int]:
         return send_json({"error": str(e)}, 500), 500
 
 
+@framework_bp.route("/bi-integration/export-jobs", methods=["POST"])
+@require_auth
+def start_bi_export_job() -> tuple[Response, int]:
+    """Start a background streaming export of a BI dataset."""
+    try:
+        pbx_core = get_pbx_core()
+        body = get_request_body()
+        dataset_name = body.get("dataset")
+
+        if not dataset_name:
+            return send_json({"error": "Dataset name required"}, 400), 400
+
+        from pbx.features.bi_integration import ExportFormat, get_bi_integration
+
+        try:
+            format_enum = ExportFormat(body.get("format", "csv").lower())
+            start_date = (
+                datetime.fromisoformat(body["start_date"]) if body.get("start_date") else None
+            )
+            end_date = datetime.fromisoformat(body["end_date"]) if body.get("end_date") else None
+        except ValueError as e:
+            return send_json({"error": f"Invalid export parameters: {e}"}, 400), 400
+
+        bi = get_bi_integration(pbx_core.config if pbx_core else None)
+        result = bi.start_export_job(dataset_name, format_enum, start_date, end_date)
+        if not result.get("success"):
+            return send_json(result, 404), 404
+        return send_json(result), 202
+    except (KeyError, TypeError, ValueError) as e:
+        logger.error(f"Error starting export job: {e}")
+        return send_json({"error": str(e)}, 500), 500
+
+
+@framework_bp.route("/bi-integration/export-jobs", methods=["GET"])
+@require_auth
+def list_bi_export_jobs() -> tuple[Response, int]:
+    """List background BI export jobs."""
+    try:
+        pbx_core = get_pbx_core()
+        from pbx.features.bi_integration import get_bi_integration
+
+        bi = get_bi_integration(pbx_core.config if pbx_core else None)
+        return send_json({"jobs": bi.list_export_jobs()}), 200
+    except (KeyError, TypeError, ValueError) as e:
+        logger.error(f"Error listing export jobs: {e}")
+        return send_json({"error": str(e)}, 500), 500
+
+
+@framework_bp.route("/bi-integration/export-jobs/<job_id>", methods=["GET"])
+@require_auth
+def get_bi_export_job(job_id: str) -> tuple[Response, int]:
+    """Get progress of a background BI export job."""
+    try:
+        pbx_core = get_pbx_core()
+        from pbx.features.bi_integration import get_bi_integration
+
+        bi = get_bi_integration(pbx_core.config if pbx_core else None)
+        job = bi.get_export_job(job_id)
+        if job:
+            return send_json(job), 200
+        return send_json({"error": "Export job not found"}, 404), 404
+    except (KeyError, TypeError, ValueError) as e:
+        logger.error(f"Error getting export job: {e}")
+        return send_json({"error": str(e)}, 500), 500
+
+
+@framework_bp.route("/bi-integration/export-jobs/<job_id>", methods=["DELETE"])
+@require_auth
+def cancel_bi_export_job(job_id: str) -> tuple[Response, int]:
+    """Cancel a queued or running BI export job."""
+    try:
+        pbx_core = get_pbx_core()
+        from pbx.features.bi_integration import get_bi_integration
+
+        bi = get_bi_integration(pbx_core.config if pbx_core else None)
+        if bi.cancel_export_job(job_id):
+            return send_json({"success": True}), 200
+        return send_json({"error": "Export job not found or already finished"}, 404), 404
+    except (KeyError, TypeError, ValueError) as e:
+        logger.error(f"Error cancelling export job: {e}")
+        return send_json({"error": str(e)}, 500), 500
+
+
 @framework_bp.route("/bi-integration/dataset", methods=["POST"])
 @require_admin
 def create_bi_dataset() -> tuple[Response, int]:
@@ -111,6 +111,20 @@ def handle_detailed_health() -> Response:
         return send_json({"status": "error", "error": str(e)}, 500)
 
 
+@health_bp.route("/api/health/startup")
+def handle_startup_profile() -> Response:
+    """Per-feature startup timings, slowest first."""
+    try:
+        checker = _get_health_checker()
+        profile = checker.get_startup_profile()
+        if profile is None:
+            return send_json({"error": "Startup profile not available"}, 404)
+        return send_json(profile)
+    except (KeyError, TypeError, ValueError) as e:
+        logger.error(f"Startup profile error: {e}")
+        return send_json({"status": "error", "error": str(e)}, 500)
+
+
 @health_bp.route("/metrics")
 def handle_prometheus_metrics() -> Response:
     """Prometheus metrics endpoint."""
@@ -10,6 +10,7 @@
 
 from pbx.api.utils import (
     get_pbx_core,
+    get_request_body,
     require_admin,
     require_auth,
     send_json,
@@ -112,13 +113,17 @@ def handle_ad_sync() -> Response:
         return send_json({"error": "PBX not initialized"}, 500)
 
     try:
-        result = pbx_core.sync_ad_users()
+        body = get_request_body()
+        # {"full": true} resyncs every user instead of only recent changes
+        full = isinstance(body, dict) and bool(body.get("full"))
+        result = pbx_core.sync_ad_users(full=full)
         if result["success"]:
             return send_json(
                 {
                     "success": True,
                     "message": f"Successfully synchronized {result['synced_count']} users from Active Directory",
                     "synced_count": result["synced_count"],
+                    "summary": result.get("summary"),
                 }
             )
         return send_json({"success": False, "error": result["error"]}, 400)
@@ -127,6 +127,28 @@ def handle_delete_phone_book_entry(extension: str) -> Response:
         return send_json({"error": str(e)}, 500)
 
 
+def _export_response(phone_book: Any, export_format: str, mimetype: str) -> Response:
+    """Serve a cached directory export with ETag revalidation and gzip."""
+    export = phone_book.get_export(export_format)
+    use_gzip = "gzip" in request.headers.get("Accept-Encoding", "")
+
+    response = Response(export["gzip"] if use_gzip else export["content"], mimetype=mimetype)
+    if use_gzip:
+        response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    # Each encoding is a different representation, so it gets its own tag
+    response.set_etag(f"{export['etag']}-gz" if use_gzip else export["etag"])
+    response.headers["X-Directory-Version"] = str(export["version"])
+    return response.make_conditional(request)
+
+
+def _page_args() -> tuple[int, int]:
+    """Parse offset/limit query parameters for paged results."""
+    offset = request.args.get("offset", 0, type=int)
+    limit = min(request.args.get("limit", 50, type=int), 500)
+    return max(offset, 0), max(limit, 0)
+
+
 def _generate_xml_from_extensions(pbx_core: Any) -> str:
     """Generate phone book XML from extension registry (fallback)."""
     if not pbx_core or not hasattr(pbx_core, "extension_registry"):
@@ -175,7 +197,11 @@ def _generate_cisco_xml_from_extensions(pbx_core: Any) -> str:
 @phone_book_bp.route("/export/xml", methods=["GET"])
 @require_auth
 def handle_export_phone_book_xml() -> Response:
-    """Export phone book as XML (Yealink format)."""
+    """Export phone book as XML (Yealink format).
+
+    With ?q= only matching entries are returned (paged with ?offset= and
+    ?limit=), for phones' remote phonebook search.
+    """
     try:
         pbx_core = get_pbx_core()
         if (
@@ -184,7 +210,13 @@ def handle_export_phone_book_xml() -> Response:
             and pbx_core.phone_book
             and pbx_core.phone_book.enabled
         ):
-            xml_content = pbx_core.phone_book.export_xml()
+            query = request.args.get("q")
+            if query is None:
+                return _export_response(pbx_core.phone_book, "xml", "application/xml")
+            # Remote phonebook lookups from the phone's search box
+            offset, limit = _page_args()
+            page = pbx_core.phone_book.search_page(query, offset, limit)
+            xml_content = pbx_core.phone_book.render_xml(page["entries"])
         else:
             xml_content = _generate_xml_from_extensions(pbx_core)
 
@@ -206,7 +238,12 @@ def handle_export_phone_book_cisco_xml() -> Response:
             and pbx_core.phone_book
             and pbx_core.phone_book.enabled
         ):
-            xml_content = pbx_core.phone_book.export_cisco_xml()
+            query = request.args.get("q")
+            if query is None:
+                return _export_response(pbx_core.phone_book, "cisco-xml", "application/xml")
+            offset, limit = _page_args()
+            page = pbx_core.phone_book.search_page(query, offset, limit)
+            xml_content = pbx_core.phone_book.render_cisco_xml(page["entries"])
         else:
             xml_content = _generate_cisco_xml_from_extensions(pbx_core)
 
@@ -225,8 +262,7 @@ def handle_export_phone_book_json() -> Response:
         return error
 
     try:
-        json_content = phone_book.export_json()
-        return Response(json_content, status=200, mimetype="application/json")
+        return _export_response(phone_book, "json", "application/json")
     except Exception as e:
         return send_json({"error": str(e)}, 500)
 
@@ -234,7 +270,11 @@ def handle_export_phone_book_json() -> Response:
 @phone_book_bp.route("/search", methods=["GET"])
 @require_auth
 def handle_search_phone_book() -> Response:
-    """Search phone book entries."""
+    """Search phone book entries.
+
+    Results are paged with ?offset= and ?limit=; the total number of matches
+    is returned in the X-Total-Count header.
+    """
     phone_book, error = _get_phone_book()
     if error:
         return error
@@ -245,7 +285,10 @@ def handle_search_phone_book() -> Response:
         if not query:
             return send_json({"error": 'Query parameter "q" is required'}, 400)
 
-        results = phone_book.search(query)
-        return send_json(results)
+        offset, limit = _page_args()
+        page = phone_book.search_page(query, offset, limit)
+        response = send_json(page["entries"])
+        response.headers["X-Total-Count"] = str(page["total"])
+        return response
     except (KeyError, TypeError, ValueError) as e:
         return send_json({"error": str(e)}, 500)
@@ -9,6 +9,7 @@
 
 from pbx.api.utils import (
     get_pbx_core,
+    get_request_body,
     require_admin,
     require_auth,
     send_json,
@@ -137,12 +138,31 @@ def handle_phone_lookup(identifier: str) -> Response:
 @phones_bp.route("/api/phones/reboot", methods=["POST"])
 @require_admin
 def handle_reboot_phones() -> Response:
-    """Reboot all registered phones."""
+    """Reboot all registered phones.
+
+    Phones are rebooted in paced waves by default; pass {"immediate": true}
+    to send every reboot NOTIFY at once.
+    """
     pbx_core = get_pbx_core()
     if not pbx_core or not hasattr(pbx_core, "phone_provisioning"):
         return send_json({"error": "Phone provisioning not enabled"}, 500)
 
+    data = get_request_body()
+
     try:
+        if not data.get("immediate", False):
+            rollout = pbx_core.phone_provisioning.schedule_reboots(
+                pbx_core.sip_server, data.get("extensions"), reason="manual"
+            )
+            return send_json(
+                {
+                    "success": True,
+                    "message": f"Staggered reboot scheduled for {rollout['total']} phones",
+                    "rollout": rollout,
+                },
+                202,
+            )
+
         # Send SIP NOTIFY to all registered phones
         results = pbx_core.phone_provisioning.reboot_all_phones(pbx_core.sip_server)
 
@@ -160,6 +180,41 @@ def handle_reboot_phones() -> Response:
         return send_json({"error": str(e)}, 500)
 
 
+@phones_bp.route("/api/phones/reboot/rollout", methods=["GET"])
+@require_admin
+def handle_get_reboot_rollout() -> Response:
+    """Get progress of the current or most recent staggered reboot."""
+    pbx_core = get_pbx_core()
+    if not pbx_core or not getattr(pbx_core, "phone_provisioning", None):
+        return send_json({"error": "Phone provisioning not enabled"}, 500)
+
+    progress = pbx_core.phone_provisioning.get_reboot_rollout().get_progress()
+    if progress is None:
+        return send_json({"error": "No reboot rollout has been started"}, 404)
+    return send_json(progress)
+
+
+@phones_bp.route("/api/phones/reboot/rollout/<action>", methods=["POST"])
+@require_admin
+def handle_control_reboot_rollout(action: str) -> Response:
+    """Resume a paused staggered reboot, or cancel it."""
+    pbx_core = get_pbx_core()
+    if not pbx_core or not getattr(pbx_core, "phone_provisioning", None):
+        return send_json({"error": "Phone provisioning not enabled"}, 500)
+
+    rollout = pbx_core.phone_provisioning.get_reboot_rollout()
+    if action == "resume":
+        changed = rollout.resume()
+    elif action == "cancel":
+        changed = rollout.cancel()
+    else:
+        return send_json({"error": f"Unknown rollout action: {action}"}, 400)
+
+    if not changed:
+        return send_json({"error": f"No reboot rollout to {action}"}, 409)
+    return send_json({"success": True, "rollout": rollout.get_progress()})
+
+
 @phones_bp.route("/api/phones/<extension>/reboot", methods=["POST"])
 @require_admin
 def handle_reboot_phone(extension: str) -> Response:
@@ -649,7 +649,9 @@ def handle_provisioning_request(path: str) -> Response:
                 status=200,
                 mimetype=content_type,
             )
-            return response
+            # Phones re-polling an unchanged config get 304 Not Modified
+            response.add_etag()
+            return response.make_conditional(request)
         logger.warning(f"Provisioning failed for MAC {mac} from IP {request_info['ip']}")
         logger.warning("  Reason: Device not registered or template not found")
         logger.warning("  See detailed error messages above for troubleshooting guidance")
@@ -864,6 +866,8 @@ def handle_update_provisioning_settings() -> Response:
         pbx_core.config.set(
             "provisioning.custom_templates_dir", body.get("custom_templates_dir", "")
         )
+        if getattr(pbx_core, "phone_provisioning", None):
+            pbx_core.phone_provisioning.invalidate_config_cache()
         return send_json({"success": True, "message": "Provisioning settings saved"})
     except (KeyError, TypeError, ValueError) as e:
         return send_json({"error": str(e)}, 500)
@@ -928,6 +932,8 @@ def handle_update_phonebook_settings() -> Response:
             "provisioning.remote_phonebook.refresh_interval",
             body.get("remote_refresh_interval", 60),
         )
+        if getattr(pbx_core, "phone_provisioning", None):
+            pbx_core.phone_provisioning.invalidate_config_cache()
         return send_json({"success": True, "message": "Phonebook settings saved"})
     except (KeyError, TypeError, ValueError) as e:
         return send_json({"error": str(e)}, 500)
@@ -396,9 +396,11 @@ def handle_webrtc_dtmf() -> Response:
                     logger.error(f"[VERBOSE] Failed to send DTMF '{digit}'")
                 return send_json({"error": f'Failed to send DTMF tone "{digit}"'}, 500)
 
-        # --- Fallback: push to dtmf_info_queue (auto attendant / IVR) ---
+        # --- Fallback: hand to the call's IVR session (auto attendant / voicemail) ---
         if hasattr(call, "dtmf_info_queue"):
-            call.dtmf_info_queue.append(digit)
+            ivr_runtime = getattr(pbx_core, "ivr_runtime", None)
+            if not (ivr_runtime and ivr_runtime.deliver_digit(session.call_id, digit)):
+                call.dtmf_info_queue.append(digit)
             if verbose_logging:
                 logger.info(f"[VERBOSE] DTMF '{digit}' queued via dtmf_info_queue")
             return send_json(
@@ -40,6 +40,12 @@ def __init__(
         self.ssl_enabled = False
         self.ssl_context: ssl.SSLContext | None = None
 
+        # "production" serves through pooled listeners instead of Werkzeug's
+        # thread-per-request development server
+        self.server_config: dict[str, Any] = pbx_core.config.get("api.server", {}) or {}
+        self.mode = self.server_config.get("mode", "development")
+        self.listeners: list[Any] = []
+
         # Create Flask app
         from pbx.api.app import create_app
 
@@ -162,6 +168,14 @@ def start(self) -> bool:
 
     def _run(self) -> None:
         """Run Flask server in thread."""
+        if self.mode == "production":
+            try:
+                self._run_production()
+            except (OSError, TypeError, ValueError, ssl.SSLError) as e:
+                if self.running:
+                    logger.error(f"API server error: {e}")
+            return
+
         try:
             ssl_ctx = self.ssl_context if self.ssl_enabled else None
             debug = os.environ.get("FLASK_DEBUG", "0") == "1"
@@ -177,10 +191,73 @@ def _run(self) -> None:
             if self.running:
                 logger.error(f"Flask server error: {e}")
 
+    def _run_production(self) -> None:
+        """Serve through pooled listeners, optionally splitting off provisioning."""
+        from pbx.api.wsgi_server import PooledWSGIServer, restrict_paths
+
+        keepalive_timeout = float(self.server_config.get("keepalive_timeout", 5))
+
+        # Phones fetching configs after a power event get their own listener
+        # and pool, so they queue behind each other rather than admin traffic
+        provisioning_config = self.server_config.get("provisioning", {}) or {}
+        provisioning_port = provisioning_config.get("port")
+        if provisioning_port:
+            # Phones that can't validate the certificate fetch over plain
+            # HTTP, so HTTPS here is opt-in and reuses the API's context
+            provisioning_ssl = None
+            if provisioning_config.get("ssl", False):
+                if self.ssl_enabled:
+                    provisioning_ssl = self.ssl_context
+                else:
+                    logger.warning("api.server.provisioning.ssl needs api.ssl enabled; using HTTP")
+            provisioning = PooledWSGIServer(
+                self.host,
+                int(provisioning_port),
+                restrict_paths(self.app, ("/provision/",)),
+                ssl_context=provisioning_ssl,
+                workers=int(provisioning_config.get("workers", 8)),
+                max_queue=int(provisioning_config.get("max_queue", 256)),
+                keepalive_timeout=keepalive_timeout,
+                name="provisioning",
+            )
+            self.listeners.append(provisioning)
+            threading.Thread(
+                target=provisioning.serve_forever, name="provisioning-http", daemon=True
+            ).start()
+
+        api = PooledWSGIServer(
+            self.host,
+            self.port,
+            self.app,
+            ssl_context=self.ssl_context if self.ssl_enabled else None,
+            workers=int(self.server_config.get("workers", 16)),
+            max_queue=int(self.server_config.get("max_queue", 64)),
+            keepalive_timeout=keepalive_timeout,
+            name="api",
+            max_streams=(
+                int(self.server_config["max_streams"])
+                if self.server_config.get("max_streams") is not None
+                else None
+            ),
+        )
+        self.listeners.append(api)
+        api.serve_forever()
+
+    def get_statistics(self) -> dict[str, Any]:
+        """Get serving mode and per-listener connection counters."""
+        return {
+            "mode": self.mode,
+            "listeners": [listener.get_statistics() for listener in self.listeners],
+        }
+
     def stop(self) -> None:
         """Stop API server."""
         self.running = False
 
+        for listener in self.listeners:
+            listener.close()
+        self.listeners = []
+
         if self.server_thread and self.server_thread.is_alive():
             self.server_thread.join(timeout=2.0)
             if self.server_thread.is_alive():
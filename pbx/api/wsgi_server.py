@@ -0,0 +1,465 @@
+"""Pooled WSGI server for production API serving.
+
+Werkzeug's development server starts a thread per connection and performs
+TLS handshakes on the accepting thread. This server accepts on one thread and
+hands connections to a fixed pool of workers through a bounded queue, so
+bursts are absorbed up to a limit and then shed with 503 instead of piling
+up threads next to the SIP and RTP workers. A keep-alive connection waiting
+for its next request is parked in a selector rather than blocking a worker,
+and goes back on the queue once the client sends again. Server-Sent Event
+streams hold their worker for as long as the client stays connected, so only
+a few workers may serve them at once; further streams are refused with 503.
+"""
+
+import contextlib
+import io
+import queue
+import selectors
+import socket
+import ssl
+import threading
+import time
+from collections.abc import Iterable
+from http.server import HTTPServer
+from importlib.metadata import version
+from typing import Any
+
+from werkzeug.exceptions import NotFound
+from werkzeug.serving import WSGIRequestHandler, select_address_family
+
+from pbx.utils.logger import get_logger
+
+logger = get_logger()
+
+_BUSY_BODY = b'{"error": "Server busy, retry shortly"}'
+_BUSY_RESPONSE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Retry-After: 1\r\n"
+    b"Connection: close\r\n"
+    b"Content-Length: " + str(len(_BUSY_BODY)).encode() + b"\r\n\r\n" + _BUSY_BODY
+)
+
+
+class _PooledRequestHandler(WSGIRequestHandler):
+    """WSGI handler that keeps HTTP/1.1 connections alive where it is safe.
+
+    Werkzeug's handler closes every connection because http.server can't
+    drain an unread request body before the next request line. Bodies up to
+    max_buffered_body are read ahead here, so the connection can be reused;
+    chunked, 100-continue and larger uploads still close afterwards.
+    """
+
+    protocol_version = "HTTP/1.1"
+    max_buffered_body = 1024 * 1024
+    _reusable = False
+    # Set when the connection stays open for another request; the server
+    # then parks it instead of closing it
+    idle = False
+
+    def setup(self) -> None:
+        # StreamRequestHandler applies self.timeout to the connection, which
+        # bounds each read once a request has started arriving
+        self.timeout = self.server.keepalive_timeout
+        super().setup()
+
+    def handle(self) -> None:
+        self.close_connection = True
+        self._serve()
+
+    def resume(self) -> None:
+        """Serve the next request on a parked connection."""
+        try:
+            self._serve()
+        finally:
+            self.finish()
+
+    def finish(self) -> None:
+        # A parked connection keeps its buffered files for the next request
+        if not self.idle:
+            super().finish()
+
+    def _serve(self) -> None:
+        # Pipelined requests already read into rfile are served straight
+        # away, since the selector can't see them
+        self.idle = False
+        try:
+            self.handle_one_request()
+            while not self.close_connection and self._request_buffered():
+                self.handle_one_request()
+        except (ConnectionError, TimeoutError) as e:
+            self.connection_dropped(e)
+            self.close_connection = True
+        self.idle = not self.close_connection
+
+    def _request_buffered(self) -> bool:
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            # Nothing to read yet (SSLWantReadError under TLS)
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def _buffer_body(self) -> bool:
+        # Werkzeug drains whatever is left on rfile after each response; a
+        # buffered body also keeps that from eating the next request line
+        if self.headers.get("Transfer-Encoding") or self.headers.get("Expect"):
+            return False
+        try:
+            size = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            return False
+        if not 0 <= size <= self.max_buffered_body:
+            return False
+        self.rfile = io.BytesIO(self.rfile.read(size) if size else b"")
+        return True
+
+    def run_wsgi(self) -> None:
+        # EventSource always asks for text/event-stream
+        stream = "text/event-stream" in self.headers.get("Accept", "")
+        if stream and not self.server.acquire_stream():
+            self.close_connection = True
+            self.wfile.write(_BUSY_RESPONSE)
+            return
+
+        connection_rfile = self.rfile
+        self._reusable = self._buffer_body()
+        try:
+            super().run_wsgi()
+        finally:
+            self.rfile = connection_rfile
+            self._reusable = False
+            if stream:
+                self.server.release_stream()
+
+    def send_header(self, keyword: str, value: str) -> None:
+        if (
+            self._reusable
+            and not self.close_connection
+            and keyword.lower() == "connection"
+            and value.lower() == "close"
+        ):
+            return
+        super().send_header(keyword, value)
+
+    def log(self, type: str, message: str, *args: Any) -> None:  # noqa: A002 - Werkzeug signature
+        if type == "error":
+            # Idle keep-alive connections timing out are expected
+            if not message.startswith("Request timed out"):
+                logger.warning(f"{self.address_string()} - {message % args if args else message}")
+        else:
+            logger.debug(f"{self.address_string()} - {message % args if args else message}")
+
+
+class PooledWSGIServer(HTTPServer):
+    """HTTP(S) server dispatching connections to a bounded worker pool."""
+
+    multithread = True
+    multiprocess = False
+    passthrough_errors = False
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        app: Any,
+        ssl_context: ssl.SSLContext | None = None,
+        workers: int = 16,
+        max_queue: int = 64,
+        keepalive_timeout: float = 5.0,
+        handshake_timeout: float = 10.0,
+        name: str = "api",
+        max_streams: int | None = None,
+    ) -> None:
+        """Bind the listener and start the worker pool.
+
+        Args:
+            host: Host to bind to
+            port: Port to bind to
+            app: WSGI application
+            ssl_context: Server TLS context, or None for plain HTTP
+            workers: Number of worker threads serving connections
+            max_queue: Accepted connections allowed to wait for a worker
+            keepalive_timeout: Seconds an idle keep-alive connection is kept,
+                and the read timeout while a request is arriving
+            handshake_timeout: Seconds allowed for the TLS handshake
+            name: Listener name used in logs and thread names
+            max_streams: Event streams served at once (default: a quarter
+                of the workers); always leaves at least one worker free
+        """
+        self.address_family = select_address_family(host, port)
+        super().__init__((host, port), _PooledRequestHandler)
+
+        if ssl_context is not None:
+            # Returning clients resume their session (tickets under TLS 1.3,
+            # the context's session cache under 1.2) and skip the full
+            # handshake; listeners sharing a context share its sessions
+            ssl_context.options &= ~ssl.OP_NO_TICKET
+
+        self.app = app
+        self.host = host
+        self.port = self.server_address[1]
+        self.name = name
+        # Read by the handler to pick the URL scheme; the listening socket
+        # itself stays plain so handshakes happen on the workers
+        self.ssl_context = ssl_context
+        self.keepalive_timeout = keepalive_timeout
+        self.handshake_timeout = handshake_timeout
+        self._server_version = f"Werkzeug/{version('werkzeug')}"
+
+        self._pending: queue.Queue = queue.Queue(maxsize=max(max_queue, 1))
+        self._stats_lock = threading.Lock()
+        self._serving = False
+        self.accepted = 0
+        self.rejected = 0
+        self.active = 0
+        workers = max(workers, 1)
+        if max_streams is None:
+            max_streams = workers // 4
+        self.max_streams = max(0, min(max_streams, workers - 1))
+        self.streams = 0
+        self.streams_rejected = 0
+
+        # Idle keep-alive connections wait here, not on a worker
+        self.idle = 0
+        self._closing = False
+        self._to_park: queue.SimpleQueue = queue.SimpleQueue()
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+        self._idle_thread = threading.Thread(
+            target=self._idle_loop, name=f"{name}-http-idle", daemon=True
+        )
+        self._idle_thread.start()
+
+        self._workers = [
+            threading.Thread(target=self._worker_loop, name=f"{name}-http-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def serve_forever(self, poll_interval: float = 0.5) -> None:
+        self._serving = True
+        logger.info(
+            f"{self.name} listener serving on {'https' if self.ssl_context else 'http'}://"
+            f"{self.host}:{self.port} with {len(self._workers)} workers"
+        )
+        super().serve_forever(poll_interval)
+
+    def process_request(self, request: socket.socket, client_address: Any) -> None:
+        """Queue an accepted connection for the pool, or shed it if full."""
+        try:
+            self._pending.put_nowait((request, client_address))
+        except queue.Full:
+            with self._stats_lock:
+                self.rejected += 1
+            self._reject(request)
+            return
+        with self._stats_lock:
+            self.accepted += 1
+
+    def acquire_stream(self) -> bool:
+        """Reserve a worker for a long-lived event stream, if one may be spared."""
+        with self._stats_lock:
+            if self.streams >= self.max_streams:
+                self.streams_rejected += 1
+                return False
+            self.streams += 1
+            return True
+
+    def release_stream(self) -> None:
+        with self._stats_lock:
+            self.streams -= 1
+
+    def _reject(self, request: socket.socket) -> None:
+        # A TLS client can't read a plaintext 503 before its handshake, and
+        # handshaking here would stall the accept loop, so just close
+        if self.ssl_context is None:
+            try:
+                request.settimeout(1.0)
+                request.sendall(_BUSY_RESPONSE)
+            except OSError:
+                pass
+        self.shutdown_request(request)
+
+    def finish_request(self, request: socket.socket, client_address: Any) -> Any:
+        return self.RequestHandlerClass(request, client_address, self)
+
+    def _worker_loop(self) -> None:
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            handler = None
+            if isinstance(item, _PooledRequestHandler):
+                request, client_address = item.request, item.client_address
+            else:
+                request, client_address = item
+            with self._stats_lock:
+                self.active += 1
+            try:
+                if isinstance(item, _PooledRequestHandler):
+                    handler = item
+                    handler.resume()
+                else:
+                    if self.ssl_context is not None:
+                        request.settimeout(self.handshake_timeout)
+                        request = self.ssl_context.wrap_socket(request, server_side=True)
+                    handler = self.finish_request(request, client_address)
+            except (OSError, ssl.SSLError):
+                # Handshake failures and client disconnects are routine
+                pass
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                if handler is not None and handler.idle:
+                    self._park(handler)
+                else:
+                    self.shutdown_request(request)
+                with self._stats_lock:
+                    self.active -= 1
+
+    def _park(self, handler: _PooledRequestHandler) -> None:
+        """Hand an idle keep-alive connection to the idle selector."""
+        if self._closing:
+            self._close_idle(handler)
+            return
+        self._to_park.put(handler)
+        self._wake()
+
+    def _wake(self) -> None:
+        # A full buffer means a wakeup is already pending
+        with contextlib.suppress(OSError):
+            self._wakeup_w.send(b"\0")
+
+    def _close_idle(self, handler: _PooledRequestHandler) -> None:
+        handler.idle = False
+        with contextlib.suppress(OSError):
+            handler.finish()
+        self.shutdown_request(handler.request)
+
+    def _dispatch_idle(self, handler: _PooledRequestHandler) -> None:
+        """Queue a parked connection whose client has sent its next request."""
+        try:
+            self._pending.put_nowait(handler)
+        except queue.Full:
+            with self._stats_lock:
+                self.rejected += 1
+            # The connection is already set up (TLS included), so the 503
+            # can go out on it
+            try:
+                handler.connection.settimeout(1.0)
+                handler.wfile.write(_BUSY_RESPONSE)
+            except OSError:
+                pass
+            self._close_idle(handler)
+
+    def _idle_loop(self) -> None:
+        # Deadlines share one timeout, so insertion order is expiry order
+        parked: dict[_PooledRequestHandler, float] = {}
+        while not self._closing:
+            timeout = None
+            if parked:
+                timeout = max(0.0, next(iter(parked.values())) - time.monotonic())
+            for key, _ in self._selector.select(timeout):
+                if key.fileobj is self._wakeup_r:
+                    try:
+                        while self._wakeup_r.recv(512):
+                            pass
+                    except OSError:
+                        pass
+                    continue
+                handler = key.data
+                self._selector.unregister(key.fileobj)
+                del parked[handler]
+                self._dispatch_idle(handler)
+
+            while True:
+                try:
+                    handler = self._to_park.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    self._selector.register(handler.connection, selectors.EVENT_READ, handler)
+                except (OSError, ValueError):
+                    self._close_idle(handler)
+                    continue
+                parked[handler] = time.monotonic() + self.keepalive_timeout
+
+            now = time.monotonic()
+            while parked:
+                handler, deadline = next(iter(parked.items()))
+                if deadline > now:
+                    break
+                del parked[handler]
+                self._selector.unregister(handler.connection)
+                self.idle = len(parked)
+                self._close_idle(handler)
+            self.idle = len(parked)
+
+        for handler in parked:
+            self._close_idle(handler)
+        self.idle = 0
+
+    def close(self) -> None:
+        """Stop accepting, drain the workers and close the listener."""
+        if self._serving:
+            self.shutdown()
+            self._serving = False
+        self._closing = True
+        self._wake()
+        self._idle_thread.join(timeout=2.0)
+        for _ in self._workers:
+            self._pending.put(None)
+        self.server_close()
+        self._selector.close()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+
+    def get_statistics(self) -> dict:
+        """Get connection counters for this listener."""
+        stats = {
+            "name": self.name,
+            "port": self.port,
+            "workers": len(self._workers),
+            "active": self.active,
+            "idle": self.idle,
+            "queued": self._pending.qsize(),
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "streams": self.streams,
+            "max_streams": self.max_streams,
+            "streams_rejected": self.streams_rejected,
+        }
+        if self.ssl_context is not None:
+            session_stats = self.ssl_context.session_stats()
+            stats["tls_sessions_reused"] = session_stats.get("hits", 0)
+        return stats
+
+
+def restrict_paths(app: Any, prefixes: Iterable[str]) -> Any:
+    """Wrap a WSGI app so only paths under the given prefixes are served.
+
+    Args:
+        app: WSGI application
+        prefixes: Allowed path prefixes (e.g. "/provision/")
+
+    Returns:
+        WSGI application answering 404 for every other path
+    """
+    allowed = tuple(prefixes)
+    not_found = NotFound()
+
+    def dispatch(environ: dict, start_response: Any) -> Iterable[bytes]:
+        if environ.get("PATH_INFO", "").startswith(allowed):
+            return app(environ, start_response)
+        return not_found(environ, start_response)
+
+    return dispatch
@@ -3,13 +3,23 @@
 
 Extracts auto-attendant logic from PBXCore into a dedicated class,
 including session management, DTMF input handling, and menu navigation.
+Menu sessions run as event-driven state machines on the shared IVR runtime.
 """
 
-import contextlib
+import functools
 import time
+import traceback
 from pathlib import Path
 from typing import Any
 
+from pbx.core.ivr_runtime import IVRSession
+
+# Pauses in the menu flow (seconds)
+RTP_SETTLE_DELAY = 0.5
+MENU_PAUSE = 0.5
+TRANSFER_PAUSE = 0.5
+HANGUP_DELAY = 1.0
+
 
 class AutoAttendantHandler:
     """Handles auto-attendant call sessions with menu and DTMF input"""
@@ -44,8 +54,6 @@ def handle_auto_attendant(
         Returns:
             True if call was handled
         """
-        import threading
-
         from pbx.sip.message import SIPMessageBuilder
         from pbx.sip.sdp import SDPBuilder, SDPSession
 
@@ -80,13 +88,11 @@ def handle_auto_attendant(
         # Allocate RTP port for audio communication
         # For auto attendant, we don't need a relay (which forwards between two endpoints).
         # Instead, we directly play audio to the caller and listen for DTMF.
-        # Find an available port from the RTP port pool.
-        with pbx.rtp_relay._pool_lock:
-            try:
-                rtp_port: int = pbx.rtp_relay.port_pool.pop(0)
-            except IndexError:
-                pbx.logger.error(f"No available RTP ports for auto attendant {call_id}")
-                return False
+        # Take an available port from the RTP port pool.
+        rtp_port: int | None = pbx.rtp_relay.acquire_port(call_id)
+        if rtp_port is None:
+            pbx.logger.error(f"No available RTP ports for auto attendant {call_id}")
+            return False
 
         rtcp_port: int = rtp_port + 1
         call.rtp_ports = (rtp_port, rtcp_port)
@@ -184,275 +190,316 @@ def handle_auto_attendant(
             session = pbx.auto_attendant.start_session(call_id, from_ext)
             call.aa_session = session
 
-            # Start auto attendant interaction thread
-            aa_thread = threading.Thread(
-                target=self._auto_attendant_session, args=(call_id, call, session)
-            )
-            aa_thread.daemon = True
-            aa_thread.start()
+            # Run the menu on the shared IVR runtime
+            self._auto_attendant_session(call_id, call, session)
 
             return True
 
         except Exception as e:
             pbx.logger.error(f"Auto attendant setup failed for {call_id}: {e}")
             # Return port to pool on setup failure
-            with pbx.rtp_relay._pool_lock:
-                pbx.rtp_relay.port_pool.append(rtp_port)
-                pbx.rtp_relay.port_pool.sort()
+            pbx.rtp_relay.release_port(rtp_port)
             return False
 
-    def _auto_attendant_session(self, call_id: str, call: Any, session: dict[str, Any]) -> None:
+    def _auto_attendant_session(
+        self, call_id: str, call: Any, session: dict[str, Any]
+    ) -> "AutoAttendantSession":
         """
-        Handle auto attendant session with menu and DTMF input
+        Start the auto attendant menu for a call on the shared IVR runtime
+
+        Returns immediately; the menu runs as events on the runtime's
+        scheduler thread.
 
         Args:
             call_id: Call identifier
             call: Call object
             session: Auto attendant session
+
+        Returns:
+            The running session
         """
-        import tempfile
+        aa_session = AutoAttendantSession(self.pbx_core, call_id, call, session)
+        self.pbx_core.ivr_runtime.add(aa_session)
+        return aa_session
 
-        from pbx.rtp.handler import RTPDTMFListener, RTPPlayer
-        from pbx.utils.audio import get_prompt_audio
 
-        pbx = self.pbx_core
+class AutoAttendantSession(IVRSession):
+    """
+    Auto attendant menu for one call
 
-        try:
-            # Wait for RTP to stabilize
-            time.sleep(0.5)
+    Welcome greeting, main menu, digit handling and the no-input timeout as a
+    state machine on the IVR runtime. Digits barge in on any prompt. Opening
+    RTP, loading prompts, transfers and hangups run on the runtime's worker
+    pool.
+    """
 
-            if not call.caller_rtp:
-                pbx.logger.warning(f"No caller RTP info for auto attendant {call_id}")
-                return
-
-            # ============================================================
-            # RTP SETUP FOR AUTO ATTENDANT - BIDIRECTIONAL AUDIO
-            # ============================================================
-            # This section sets up RTP for interactive auto attendant:
-            # 1. RTPPlayer: Sends audio prompts/menus to the caller (server -> client)
-            # 2. RTPDTMFListener: Receives audio and detects DTMF tones (client -> server)
-            # Both use the same local port (call.rtp_ports[0]) allocated by RTP relay.
-            # This creates a full-duplex audio channel for the auto attendant system.
-            # ============================================================
-
-            # Create RTP player for sending audio prompts to the caller
-            player = RTPPlayer(
-                local_port=call.rtp_ports[0],
-                remote_host=call.caller_rtp["address"],
-                remote_port=call.caller_rtp["port"],
-                call_id=call_id,
-            )
+    def __init__(self, pbx_core: Any, call_id: str, call: Any, session: dict[str, Any]) -> None:
+        """
+        Initialize auto attendant session
 
-            if not player.start():
-                pbx.logger.error(f"Failed to start RTP player for auto attendant {call_id}")
-                return
-
-            # Create DTMF listener for receiving and detecting user input
-            dtmf_listener = RTPDTMFListener(call.rtp_ports[0])
-            if not dtmf_listener.start():
-                pbx.logger.error(f"Failed to start DTMF listener for auto attendant {call_id}")
-                player.stop()
-                return
-            pbx.logger.info(
-                "Auto attendant RTP setup complete - bidirectional audio channel established"
-            )
+        Args:
+            pbx_core: The PBXCore instance
+            call_id: Call identifier
+            call: Call object
+            session: Auto attendant session from AutoAttendant.start_session()
+        """
+        super().__init__(call_id, call)
+        self.pbx_core: Any = pbx_core
+        self.session: dict[str, Any] = session
+        self.player: Any = None
+        self.dtmf_listener: Any = None
+        self.destination: str | None = None
+        self.transferred: bool = False
+        self._port_returned: bool = False
+
+    def on_start(self) -> None:
+        """Give RTP a moment to stabilize before sending audio"""
+        self.set_timer("rtp_settle", RTP_SETTLE_DELAY)
+
+    def on_timer(self, name: str) -> None:
+        """Advance the menu when one of its waits expires"""
+        if name == "rtp_settle":
+            self._start_media()
+        elif name == "menu_pause":
+            self._play_prompt("main_menu")
+        elif name == "input_timeout":
+            self._handle_timeout()
+        elif name == "transfer":
+            self._transfer()
+        elif name == "hangup":
+            self._end_call()
+            self.finish()
+
+    def on_prompt_done(self, name: str, played: bool) -> None:
+        """Move to the next step once a prompt has played"""
+        logger = self.pbx_core.logger
+        label = {"welcome": "Welcome", "main_menu": "Menu"}.get(name)
+        if label:
+            if played:
+                logger.info(f"[Auto Attendant] ✓ {label} audio played successfully")
+            else:
+                logger.error(f"[Auto Attendant] ✗ Failed to play {label.lower()} audio")
+
+        if name == "welcome":
+            self.set_timer("menu_pause", MENU_PAUSE)
+        elif name == "transferring":
+            self.set_timer("transfer", TRANSFER_PAUSE)
+        elif self.destination is None:
+            # Menu (or another prompt) finished; wait for input
+            self.set_timer("input_timeout", self.pbx_core.auto_attendant.timeout)
+
+    def on_digit(self, digit: str) -> None:
+        """Handle a menu selection, interrupting any prompt"""
+        pbx = self.pbx_core
+        if self.destination is not None or self.player is None:
+            return
+
+        pbx.logger.info(f"Auto attendant received DTMF: {digit}")
+        self.stop_prompts()
+        self.cancel_timer("menu_pause")
+
+        result: dict[str, Any] = pbx.auto_attendant.handle_dtmf(self.session["session"], digit)
+        if "session" in result:
+            self.session["session"] = result["session"]
+
+        action = result.get("action")
+        if action == "transfer":
+            self.cancel_timer("input_timeout")
+            self.destination = result.get("destination")
+            pbx.logger.info(f"Auto attendant transferring to {self.destination}")
+            self._play_prompt("transferring")
+        elif action == "play":
+            audio_file: str | None = result.get("file")
+            if audio_file and Path(audio_file).exists():
+                self.play_later("play", self.player, audio_file)
+            # Reset timeout
+            self.set_timer("input_timeout", pbx.auto_attendant.timeout)
+
+    def on_error(self, error: Exception) -> None:
+        """Log the failure and end the call unless it was already transferred"""
+        self.pbx_core.logger.error(f"Error in auto attendant session: {error}")
+        self.pbx_core.logger.error(traceback.format_exc())
+        self._release_media()
+        if not self.transferred:
+            self._end_call()
+
+    def on_finish(self) -> None:
+        """Release the RTP player, DTMF listener and port"""
+        self._release_media()
+
+    def on_work_done(self, name: str, result: Any, error: Exception | None) -> None:
+        """Continue the menu with the outcome of work run on the worker pool"""
+        if error is not None:
+            raise error
+        if name == "open_media":
+            self._media_opened(result)
+        elif name == "transfer":
+            self._transferred(result)
+
+    def on_work_discarded(self, name: str, result: Any, error: Exception | None) -> None:
+        """Close media opened for a session that ended while it was opening"""
+        if name == "open_media" and result:
+            for channel in result:
+                channel.stop()
+        elif error is not None:
+            self.pbx_core.logger.error(f"Auto attendant {name} failed for {self.call_id}: {error}")
+
+    def _start_media(self) -> None:
+        """Open the bidirectional audio channel on the worker pool"""
+        if not self.call.caller_rtp:
+            self.pbx_core.logger.warning(f"No caller RTP info for auto attendant {self.call_id}")
+            self._end()
+            return
+        self.run_in_worker("open_media", self._open_media)
+
+    def _open_media(self) -> tuple[Any, Any] | None:
+        """
+        Start the RTP player and DTMF listener (worker pool)
 
-            # Play welcome greeting
-            action = session.get("session")
-            audio_file: str | None = session.get("file")
+        Returns:
+            (player, dtmf_listener), or None if either failed to start
+        """
+        from pbx.rtp.handler import RTPDTMFListener, RTPPlayer
 
-            pbx.logger.info(f"[Auto Attendant] Starting audio playback for call {call_id}")
-            audio_played: bool = False
-            transferred: bool = False
+        pbx = self.pbx_core
+        call = self.call
+
+        # ============================================================
+        # RTP SETUP FOR AUTO ATTENDANT - BIDIRECTIONAL AUDIO
+        # ============================================================
+        # 1. RTPPlayer: Sends audio prompts/menus to the caller (server -> client)
+        # 2. RTPDTMFListener: Receives audio and detects DTMF tones (client -> server)
+        # Both use the same local port (call.rtp_ports[0]). The listener hands
+        # in-band digits straight to the runtime, like SIP INFO digits.
+        # ============================================================
+        player = RTPPlayer(
+            local_port=call.rtp_ports[0],
+            remote_host=call.caller_rtp["address"],
+            remote_port=call.caller_rtp["port"],
+            call_id=self.call_id,
+        )
+        if not player.start():
+            pbx.logger.error(f"Failed to start RTP player for auto attendant {self.call_id}")
+            return None
+
+        dtmf_listener = RTPDTMFListener(
+            call.rtp_ports[0],
+            call_id=self.call_id,
+            on_digit=functools.partial(self.runtime.deliver_digit, self.call_id),
+        )
+        if not dtmf_listener.start():
+            pbx.logger.error(f"Failed to start DTMF listener for auto attendant {self.call_id}")
+            player.stop()
+            return None
+        return player, dtmf_listener
 
-            if audio_file and Path(audio_file).exists():
-                pbx.logger.info(f"[Auto Attendant] Playing welcome file: {audio_file}")
-                audio_played = player.play_file(audio_file)
-                if audio_played:
-                    pbx.logger.info("[Auto Attendant] ✓ Welcome audio played successfully")
-                else:
-                    pbx.logger.error("[Auto Attendant] ✗ Failed to play welcome audio")
-            else:
-                # Try to load from auto_attendant/welcome.wav, fallback to tone
-                # generation
-                pbx.logger.info("[Auto Attendant] Generating welcome prompt audio")
-                prompt_data = get_prompt_audio("welcome", prompt_dir="auto_attendant")
-                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                    temp_file.write(prompt_data)
-                    temp_file_path = temp_file.name
-                try:
-                    audio_played = player.play_file(temp_file_path)
-                    if audio_played:
-                        pbx.logger.info(
-                            "[Auto Attendant] ✓ Generated welcome audio played successfully"
-                        )
-                    else:
-                        pbx.logger.error(
-                            "[Auto Attendant] ✗ Failed to play generated welcome audio"
-                        )
-                finally:
-                    with contextlib.suppress(OSError):
-                        Path(temp_file_path).unlink()
+    def _media_opened(self, media: tuple[Any, Any] | None) -> None:
+        """Play the welcome greeting once the audio channel is open"""
+        pbx = self.pbx_core
+        if media is None:
+            self._end()
+            return
+        self.player, self.dtmf_listener = media
+        pbx.logger.info(
+            "Auto attendant RTP setup complete - bidirectional audio channel established"
+        )
 
-            time.sleep(0.5)
+        pbx.logger.info(f"[Auto Attendant] Starting audio playback for call {self.call_id}")
+        self.accept_digits()
+        audio_file: str | None = self.session.get("file")
+        if audio_file and Path(audio_file).exists():
+            pbx.logger.info(f"[Auto Attendant] Playing welcome file: {audio_file}")
+            self.play_later("welcome", self.player, audio_file)
+        else:
+            self._play_prompt("welcome")
+
+    def _play_prompt(self, prompt_type: str) -> None:
+        """Play an auto attendant prompt, falling back to generated audio"""
+        from pbx.utils.audio import get_prompt_audio
 
-            # Play main menu
-            pbx.logger.info(f"[Auto Attendant] Playing main menu for call {call_id}")
-            menu_audio: str | None = pbx.auto_attendant._get_audio_file("main_menu")
-            if menu_audio and Path(menu_audio).exists():
-                pbx.logger.info(f"[Auto Attendant] Playing menu file: {menu_audio}")
-                audio_played = player.play_file(menu_audio)
-                if audio_played:
-                    pbx.logger.info("[Auto Attendant] ✓ Menu audio played successfully")
-                else:
-                    pbx.logger.error("[Auto Attendant] ✗ Failed to play menu audio")
-            else:
-                # Try to load from auto_attendant/main_menu.wav, fallback to
-                # tone generation
-                pbx.logger.info("[Auto Attendant] Generating menu prompt audio")
-                prompt_data = get_prompt_audio("main_menu", prompt_dir="auto_attendant")
-                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                    temp_file.write(prompt_data)
-                    temp_file_path = temp_file.name
-                try:
-                    audio_played = player.play_file(temp_file_path)
-                    if audio_played:
-                        pbx.logger.info(
-                            "[Auto Attendant] ✓ Generated menu audio played successfully"
-                        )
-                    else:
-                        pbx.logger.error("[Auto Attendant] ✗ Failed to play generated menu audio")
-                finally:
-                    with contextlib.suppress(OSError):
-                        Path(temp_file_path).unlink()
-
-            # Main loop - wait for DTMF input
-            session_active: bool = True
-            timeout: int = pbx.auto_attendant.timeout
-            start_time: float = time.time()
-
-            while session_active and (time.time() - start_time) < timeout:
-                # Check for DTMF input from SIP INFO or in-band
-                digit: str | None = None
-
-                # Priority 1: Check SIP INFO queue
-                if hasattr(call, "dtmf_info_queue") and call.dtmf_info_queue:
-                    digit = call.dtmf_info_queue.pop(0)
-                    pbx.logger.info(f"Auto attendant received DTMF from SIP INFO: {digit}")
-                else:
-                    # Priority 2: Check in-band DTMF
-                    digit = dtmf_listener.get_digit(timeout=1.0)
-                    if digit:
-                        pbx.logger.info(f"Auto attendant received DTMF from in-band audio: {digit}")
-
-                if digit:
-                    pbx.logger.info(f"Auto attendant received DTMF: {digit}")
-
-                    # Handle the input
-                    result: dict[str, Any] = pbx.auto_attendant.handle_dtmf(
-                        session["session"], digit
-                    )
-                    action = result.get("action")
-
-                    if action == "transfer":
-                        destination: str | None = result.get("destination")
-                        pbx.logger.info(f"Auto attendant transferring to {destination}")
-
-                        # Play transfer message
-                        transfer_audio: str | None = pbx.auto_attendant._get_audio_file(
-                            "transferring"
-                        )
-                        if transfer_audio and Path(transfer_audio).exists():
-                            player.play_file(transfer_audio)
-                        else:
-                            # Try to load from auto_attendant/transferring.wav,
-                            # fallback to tone generation
-                            prompt_data = get_prompt_audio(
-                                "transferring", prompt_dir="auto_attendant"
-                            )
-                            with tempfile.NamedTemporaryFile(
-                                suffix=".wav", delete=False
-                            ) as temp_file:
-                                temp_file.write(prompt_data)
-                                temp_file_path = temp_file.name
-                            try:
-                                player.play_file(temp_file_path)
-                            finally:
-                                with contextlib.suppress(OSError):
-                                    Path(temp_file_path).unlink()
-
-                        time.sleep(0.5)
-
-                        # Transfer the call using existing transfer_call method
-                        if call_id and destination:
-                            success = pbx.transfer_call(call_id, destination)
-                            if success:
-                                transferred = True
-                            else:
-                                pbx.logger.warning(
-                                    f"Failed to transfer call {call_id} to {destination}"
-                                )
-                        else:
-                            pbx.logger.warning("Cannot transfer call: no call_id available")
-                        session_active = False
-
-                    elif action == "play":
-                        # Play the requested audio
-                        audio_file = result.get("file")
-                        if audio_file and Path(audio_file).exists():
-                            player.play_file(audio_file)
-
-                        # Reset timeout
-                        start_time = time.time()
-
-                    # Update session
-                    if "session" in result:
-                        session["session"] = result["session"]
-
-            # Timeout - handle it
-            if time.time() - start_time >= timeout:
-                result = pbx.auto_attendant.handle_timeout(session["session"])
-                action = result.get("action")
-
-                if action == "transfer":
-                    destination = result.get("destination")
-                    pbx.logger.info(f"Auto attendant timeout, transferring to {destination}")
-                    if call_id and destination:
-                        success = pbx.transfer_call(call_id, destination)
-                        if success:
-                            transferred = True
-                        else:
-                            pbx.logger.warning(
-                                f"Failed to transfer call {call_id} to {destination} on timeout"
-                            )
-
-            # Clean up
-            player.stop()
-            dtmf_listener.stop()
-
-            # Return port to pool (thread-safe)
-            if hasattr(call, "aa_rtp_port"):
-                with pbx.rtp_relay._pool_lock:
-                    pbx.rtp_relay.port_pool.append(call.aa_rtp_port)
-                    pbx.rtp_relay.port_pool.sort()
-                pbx.logger.info(f"Returned RTP port {call.aa_rtp_port} to pool")
-
-        except (KeyError, OSError, TypeError, ValueError) as e:
-            pbx.logger.error(f"Error in auto attendant session: {e}")
-            import traceback
-
-            pbx.logger.error(traceback.format_exc())
-
-            # Ensure port is returned even on error (thread-safe)
-            if hasattr(call, "aa_rtp_port"):
-                try:
-                    with pbx.rtp_relay._pool_lock:
-                        pbx.rtp_relay.port_pool.append(call.aa_rtp_port)
-                        pbx.rtp_relay.port_pool.sort()
-                except Exception as exc:
-                    pbx.logger.error(f"Failed to return RTP port {call.aa_rtp_port}: {exc}")
-        finally:
-            # Only end the call if it was not successfully transferred
-            if not transferred:
-                time.sleep(1)
-                pbx.end_call(call_id)
+        pbx = self.pbx_core
+        pbx.logger.info(f"[Auto Attendant] Playing {prompt_type} for call {self.call_id}")
+        audio_file: str | None = pbx.auto_attendant._get_audio_file(prompt_type)
+        if audio_file and Path(audio_file).exists():
+            pbx.logger.info(f"[Auto Attendant] Playing {prompt_type} file: {audio_file}")
+            self.play_later(prompt_type, self.player, audio_file)
+        else:
+            # Try auto_attendant/<prompt>.wav, fallback to tone generation
+            pbx.logger.info(f"[Auto Attendant] Generating {prompt_type} prompt audio")
+            self.play_later(
+                prompt_type,
+                self.player,
+                functools.partial(get_prompt_audio, prompt_type, prompt_dir="auto_attendant"),
+            )
+
+    def _handle_timeout(self) -> None:
+        """No input within the timeout: retry the menu or transfer"""
+        pbx = self.pbx_core
+        result = pbx.auto_attendant.handle_timeout(self.session["session"])
+        if "session" in result:
+            self.session["session"] = result["session"]
+
+        action = result.get("action")
+        if action == "transfer":
+            self.destination = result.get("destination")
+            pbx.logger.info(f"Auto attendant timeout, transferring to {self.destination}")
+            self._transfer()
+        elif action == "play":
+            audio_file: str | None = result.get("file")
+            if audio_file and Path(audio_file).exists():
+                self.play_later("timeout", self.player, audio_file)
+            self._play_prompt("main_menu")
+        else:
+            self._end()
+
+    def _transfer(self) -> None:
+        """Transfer the call to the selected destination on the worker pool"""
+        if self.call_id and self.destination:
+            self.run_in_worker(
+                "transfer", self.pbx_core.transfer_call, self.call_id, self.destination
+            )
+        else:
+            self.pbx_core.logger.warning("Cannot transfer call: no call_id available")
+            self._end()
+
+    def _transferred(self, ok: bool) -> None:
+        """Finish up once the transfer went through, or hang up if it failed"""
+        if ok:
+            self.transferred = True
+        else:
+            self.pbx_core.logger.warning(
+                f"Failed to transfer call {self.call_id} to {self.destination}"
+            )
+        self._end()
+
+    def _end_call(self) -> None:
+        """End the call on the worker pool (sends BYE, writes the CDR)"""
+        self.run_in_worker("end_call", self.pbx_core.end_call, self.call_id)
+
+    def _end(self) -> None:
+        """Release media, then hang up unless the call was transferred"""
+        self._release_media()
+        if self.transferred:
+            self.finish()
+        else:
+            self.set_timer("hangup", HANGUP_DELAY)
+
+    def _release_media(self) -> None:
+        """Stop the player and listener and return the RTP port to the pool"""
+        pbx = self.pbx_core
+        self.stop_prompts()
+        if self.player:
+            self.player.stop()
+            self.player = None
+        if self.dtmf_listener:
+            self.dtmf_listener.stop()
+            self.dtmf_listener = None
+
+        if self._port_returned or not hasattr(self.call, "aa_rtp_port"):
+            return
+        self._port_returned = True
+        try:
+            pbx.rtp_relay.release_port(self.call.aa_rtp_port)
+            pbx.logger.info(f"Returned RTP port {self.call.aa_rtp_port} to pool")
+        except Exception as e:
+            pbx.logger.error(f"Failed to return RTP port {self.call.aa_rtp_port}: {e}")
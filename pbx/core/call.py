@@ -61,6 +61,10 @@ def __init__(self, call_id: str, from_extension: str, to_extension: str) -> None
         self.auto_attendant_active: bool = False  # Flag indicating auto attendant call
         self.aa_session: dict[str, Any] | None = None  # Auto attendant session data
 
+        # Conference attributes
+        self.conference_room: str | None = None  # Room joined through the built-in mixer
+        self.conference_tap: Any | None = None  # RTP relay tap feeding the room's mixer
+
         # DTMF handling attributes
         # Queue for out-of-band DTMF digits (SIP INFO)
         self.dtmf_info_queue: list[str] = []
@@ -114,10 +118,16 @@ class CallManager:
 
     MAX_HISTORY_SIZE = 10000
 
-    def __init__(self) -> None:
-        """Initialize call manager"""
+    def __init__(self, event_bus: Any | None = None) -> None:
+        """
+        Initialize call manager
+
+        Args:
+            event_bus: Optional LiveEventBus notified when calls start and end
+        """
         self.active_calls: dict[str, Call] = {}
         self.call_history: list[Call] = []
+        self.event_bus = event_bus
 
     def create_call(self, call_id: str, from_extension: str, to_extension: str) -> Call:
         """
@@ -133,6 +143,8 @@ def create_call(self, call_id: str, from_extension: str, to_extension: str) -> C
         """
         call = Call(call_id, from_extension, to_extension)
         self.active_calls[call_id] = call
+        if self.event_bus:
+            self.event_bus.publish("call.started", self.summarize_call(call))
         return call
 
     def get_call(self, call_id: str) -> Call | None:
@@ -165,6 +177,10 @@ def end_call(self, call_id: str) -> bool:
             if len(self.call_history) > self.MAX_HISTORY_SIZE:
                 self.call_history = self.call_history[-self.MAX_HISTORY_SIZE :]
             del self.active_calls[call_id]
+            if self.event_bus:
+                self.event_bus.publish(
+                    "call.ended", {"call_id": call_id, "duration": call.get_duration()}
+                )
             return True
         return False
 
@@ -172,6 +188,25 @@ def get_active_calls(self) -> list[Call]:
         """Get all active calls"""
         return list(self.active_calls.values())
 
+    @staticmethod
+    def summarize_call(call: Call) -> dict:
+        """
+        Get the live-dashboard view of a call
+
+        Args:
+            call: Call object
+
+        Returns:
+            dict with call ID, parties, state and start time
+        """
+        return {
+            "call_id": call.call_id,
+            "from_extension": call.from_extension,
+            "to_extension": call.to_extension,
+            "state": call.state.value,
+            "start_time": call.start_time.isoformat() if call.start_time else None,
+        }
+
     def get_extension_calls(self, extension: str) -> list[Call]:
         """
         Get calls for an extension
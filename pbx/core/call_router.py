@@ -8,9 +8,7 @@
 
 import re
 import threading
-import time
 import uuid
-from pathlib import Path
 from typing import Any
 
 from pbx.features.webhooks import WebhookEvent
@@ -98,6 +96,15 @@ def route_call(
         if pbx.paging_system and pbx.paging_system.is_paging_extension(to_ext):
             return pbx._paging_handler.handle_paging(from_ext, to_ext, call_id, message, from_addr)
 
+        # Check if this is a call into a conference room mixed by the PBX itself
+        if pbx.conference_system and pbx.conference_system.mixing_enabled:
+            dialplan: dict[str, str] = pbx.config.get("dialplan", {})
+            conference_pattern: str = dialplan.get("conference_pattern", "^2[0-9]{3}$")
+            if re.match(conference_pattern, to_ext):
+                return pbx._conference_handler.handle_conference(
+                    from_ext, to_ext, call_id, message, from_addr
+                )
+
         # Check if destination extension is registered and not expired.
         # First check the in-memory registry.  If the extension is missing or
         # not registered in memory, fall back to the database — the phone may
@@ -620,8 +627,6 @@ def _handle_no_answer(self, call_id: str) -> None:
             call_id: Call identifier
         """
         from pbx.core.call import CallState
-        from pbx.rtp.handler import RTPPlayer, RTPRecorder
-        from pbx.utils.audio import get_prompt_audio
 
         pbx = self.pbx_core
 
@@ -674,105 +679,12 @@ def _handle_no_answer(self, call_id: str) -> None:
             relay_info["handler"].stop()
             pbx.logger.info(f"Stopped RTP relay handler for voicemail on call {call_id}")
 
-        # Play voicemail greeting and beep tone to caller
+        # Play the greeting and beep, then record the message on the shared
+        # IVR runtime; # (SIP INFO or in-band), the maximum duration or a
+        # hangup ends the recording
         if call.caller_rtp:
-            try:
-                import tempfile
-
-                # Create RTP player to send audio to caller
-                player = RTPPlayer(
-                    local_port=call.rtp_ports[0],
-                    remote_host=call.caller_rtp["address"],
-                    remote_port=call.caller_rtp["port"],
-                    call_id=call_id,
-                )
-                if player.start():
-                    # Check for custom greeting first
-                    mailbox = pbx.voicemail_system.get_mailbox(call.to_extension)
-                    custom_greeting_path = mailbox.get_greeting_path()
-                    greeting_file: str | None = None
-                    temp_file_created: bool = False
-
-                    if custom_greeting_path:
-                        # Use custom greeting
-                        greeting_file = custom_greeting_path
-                        pbx.logger.info(
-                            f"Using custom greeting for extension {call.to_extension}: {custom_greeting_path}"
-                        )
-                        # Verify file exists and is readable
-                        if Path(custom_greeting_path).exists():
-                            file_size = Path(custom_greeting_path).stat().st_size
-                            pbx.logger.info(f"Custom greeting file exists ({file_size} bytes)")
-                        else:
-                            pbx.logger.warning(
-                                f"Custom greeting file not found at {custom_greeting_path}, using default"
-                            )
-                            custom_greeting_path = None  # Fall back to default
-
-                    if not custom_greeting_path:
-                        # Use default prompt: "Please leave a message after the tone"
-                        # Try to load from voicemail_prompts/leave_message.wav, fallback to tone generation
-                        greeting_prompt = get_prompt_audio("leave_message")
-                        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                            temp_file.write(greeting_prompt)
-                            greeting_file = temp_file.name
-                            temp_file_created = True
-                        pbx.logger.info(f"Using default greeting for extension {call.to_extension}")
-
-                    try:
-                        player.play_file(greeting_file)
-                        time.sleep(0.3)  # Brief pause before beep
-                    finally:
-                        # Clean up temp file only if we created one
-                        if temp_file_created:
-                            try:
-                                Path(greeting_file).unlink()
-                            except (OSError, FileNotFoundError) as e:
-                                pbx.logger.debug(f"Could not delete temp greeting file: {e}")
-
-                    # Play beep tone (1000 Hz, 500ms)
-                    player.play_beep(frequency=1000, duration_ms=500)
-                    player.stop()
-                    pbx.logger.info(f"Played voicemail greeting and beep for call {call_id}")
-                else:
-                    pbx.logger.warning(f"Failed to start RTP player for greeting on call {call_id}")
-            except OSError as e:
-                pbx.logger.error(f"Error playing voicemail greeting: {e}")
-
-            # Start RTP recorder on the allocated port with the configured
-            # DTMF payload type so telephone-event packets are properly filtered
-            dtmf_pt = pbx._get_dtmf_payload_type()
-            recorder = RTPRecorder(call.rtp_ports[0], call_id, dtmf_payload_type=dtmf_pt)
-            if recorder.start():
-                # Store recorder in call object for later retrieval
-                call.voicemail_recorder = recorder
-
-                # set recording timeout (max voicemail duration)
-                max_duration: int = pbx.config.get("voicemail.max_message_duration", 180)
-
-                # Schedule voicemail completion after max duration
-                voicemail_timer = threading.Timer(
-                    max_duration,
-                    pbx._voicemail_handler.complete_voicemail_recording,
-                    args=(call_id,),
-                )
-                voicemail_timer.start()
-                call.voicemail_timer = voicemail_timer
-
-                # Start DTMF monitoring thread to detect # key press
-                dtmf_monitor_thread = threading.Thread(
-                    target=pbx._voicemail_handler.monitor_voicemail_dtmf,
-                    args=(call_id, call, recorder),
-                )
-                dtmf_monitor_thread.daemon = True
-                dtmf_monitor_thread.start()
-
-                pbx.logger.info(
-                    f"Started voicemail recording for call {call_id}, max duration: {max_duration}s"
-                )
-            else:
-                pbx.logger.error(f"Failed to start voicemail recorder for call {call_id}")
-                pbx.end_call(call_id)
+            max_duration: int = pbx.config.get("voicemail.max_message_duration", 180)
+            pbx._voicemail_handler._voicemail_recording_session(call_id, call, max_duration)
         else:
             pbx.logger.error(
                 f"Cannot route call {call_id} to voicemail - missing required information"
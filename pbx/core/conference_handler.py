@@ -0,0 +1,145 @@
+"""
+Conference handler for PBX Core
+
+Answers calls to conference rooms and connects each caller's RTP relay to
+the room's built-in audio mixer: relayed packets from the caller are fed to
+the mixer, and the mix for that caller is sent back out of the relay port.
+"""
+
+from typing import Any
+
+# Codecs the mixer can decode and encode, by RTP payload type
+MIXER_CODECS: dict[str, str] = {"0": "PCMU", "8": "PCMA"}
+
+
+class ConferenceHandler:
+    """Handles calls into mixed conference rooms"""
+
+    def __init__(self, pbx_core: Any) -> None:
+        """
+        Initialize ConferenceHandler with reference to PBXCore.
+
+        Args:
+            pbx_core: The PBXCore instance
+        """
+        self.pbx_core: Any = pbx_core
+
+    def handle_conference(
+        self,
+        from_ext: str,
+        to_ext: str,
+        call_id: str,
+        message: Any,
+        from_addr: tuple[str, int],
+    ) -> bool:
+        """
+        Answer a call to a conference room and join it to the room's mixer
+
+        Args:
+            from_ext: Calling extension
+            to_ext: Conference room number
+            call_id: Call ID
+            message: SIP INVITE message
+            from_addr: Caller address
+
+        Returns:
+            True if call was handled
+        """
+        from pbx.sip.message import SIPMessageBuilder
+        from pbx.sip.sdp import SDPBuilder, SDPSession
+
+        pbx = self.pbx_core
+
+        pbx.logger.info(f"Conference call: {from_ext} -> room {to_ext}")
+
+        caller_sdp: dict[str, Any] | None = None
+        caller_codecs: list[str] | None = None
+        if message.body:
+            caller_sdp_obj = SDPSession()
+            caller_sdp_obj.parse(message.body)
+            caller_sdp = caller_sdp_obj.get_audio_info()
+            if caller_sdp:
+                caller_codecs = caller_sdp.get("formats", None)
+
+        # The mixer only speaks G.711, so only G.711 is offered back
+        codecs = [pt for pt in caller_codecs or ["0", "8"] if pt in MIXER_CODECS]
+        if not caller_sdp or not codecs:
+            pbx.logger.warning(f"Conference call {call_id} offers no G.711 audio, rejecting")
+            return False
+
+        call = pbx.call_manager.create_call(call_id, from_ext, to_ext)
+        call.start()
+        call.original_invite = message
+        call.caller_addr = from_addr
+        call.caller_rtp = caller_sdp
+
+        pbx.cdr_system.start_record(call_id, from_ext, to_ext)
+
+        rtp_ports = pbx.rtp_relay.allocate_relay(call_id)
+        if not rtp_ports:
+            pbx.logger.error(f"Failed to allocate RTP relay for conference call {call_id}")
+            pbx.cdr_system.end_record(call_id, hangup_cause="resource_unavailable")
+            pbx.call_manager.end_call(call_id)
+            return False
+        call.rtp_ports = rtp_ports
+
+        # Only the caller's side of the relay is used; the mixer is the far end
+        pbx.rtp_relay.set_endpoints(call_id, (caller_sdp["address"], caller_sdp["port"]), None)
+
+        def send_mix(packet: bytes) -> None:
+            pbx.rtp_relay.send_to_leg(call_id, "a", packet)
+
+        def feed_mixer(leg: str, packet: bytes) -> None:
+            if leg == "a":
+                pbx.conference_system.push_audio(to_ext, call_id, packet)
+
+        if not pbx.conference_system.join_conference(
+            to_ext, from_ext, call_id, MIXER_CODECS[codecs[0]], send_mix
+        ):
+            pbx.logger.warning(f"Could not join {from_ext} to conference room {to_ext}")
+            pbx.cdr_system.end_record(call_id, hangup_cause="resource_unavailable")
+            pbx.call_manager.end_call(call_id)
+            pbx.rtp_relay.release_relay(call_id)
+            return False
+
+        call.conference_room = to_ext
+        call.conference_tap = feed_mixer
+        pbx.rtp_relay.add_audio_tap(call_id, feed_mixer)
+
+        server_ip: str = pbx._get_server_ip()
+        caller_phone_model = pbx._detect_phone_model(pbx._get_phone_user_agent(from_ext))
+        conference_sdp = SDPBuilder.build_audio_sdp(
+            server_ip,
+            call.rtp_ports[0],
+            session_id=call_id,
+            codecs=codecs,
+            dtmf_payload_type=pbx._get_dtmf_payload_type(),
+            skip_static_rtpmap=pbx._should_skip_static_rtpmap(caller_phone_model),
+        )
+
+        ok_response = SIPMessageBuilder.build_response(
+            200, "OK", call.original_invite, body=conference_sdp
+        )
+        ok_response.set_header("Content-type", "application/sdp")
+        sip_port: int = pbx.config.get("server.sip_port", 5060)
+        ok_response.set_header("Contact", f"<sip:{to_ext}@{server_ip}:{sip_port}>")
+        pbx.sip_server._send_message(ok_response.build(), call.caller_addr)
+
+        call.connect()
+        pbx.logger.info(f"Answered conference call {call_id} into room {to_ext}")
+        return True
+
+    def leave_conference(self, call: Any) -> None:
+        """
+        Take a call out of its conference room when it ends
+
+        Args:
+            call: Call object
+        """
+        pbx = self.pbx_core
+        if call.conference_tap:
+            pbx.rtp_relay.remove_audio_tap(call.call_id, call.conference_tap)
+            call.conference_tap = None
+        pbx.conference_system.leave_conference(call.conference_room, call.from_extension)
+        pbx.logger.info(f"{call.from_extension} left conference room {call.conference_room}")
+        call.conference_room = None
@@ -0,0 +1,194 @@
+"""
+Live event bus
+In-process publish/subscribe of PBX state changes for live dashboards
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from itertools import islice
+from typing import Any
+
+from pbx.utils.logger import get_logger
+
+
+class LiveEvent:
+    """A single state change with its position in the event sequence"""
+
+    __slots__ = ("_encoded", "data", "event_type", "seq", "timestamp")
+
+    def __init__(self, seq: int, event_type: str, data: dict) -> None:
+        self.seq = seq
+        self.event_type = event_type
+        self.data = data
+        self.timestamp = time.time()
+        self._encoded: str | None = None
+
+    def to_dict(self) -> dict:
+        """Get the event as a plain dictionary"""
+        return {
+            "seq": self.seq,
+            "type": self.event_type,
+            "data": self.data,
+            "timestamp": self.timestamp,
+        }
+
+    def encode(self) -> str:
+        """
+        Get the event as a Server-Sent Events message
+
+        The encoding is cached, so every stream watching the bus shares one
+        serialization per event.
+        """
+        if self._encoded is None:
+            payload = json.dumps(self.to_dict(), default=str)
+            self._encoded = f"id: {self.seq}\nevent: {self.event_type}\ndata: {payload}\n\n"
+        return self._encoded
+
+
+class LiveEventBus:
+    """
+    Sequenced event bus with bounded replay history
+
+    Publishers append events in O(1) and wake waiting readers; readers track
+    the last sequence number they have seen, so a reconnecting client can
+    resume from where it left off as long as the events are still retained.
+    Clients that fall further behind start again from a snapshot.
+    """
+
+    def __init__(self, history_size: int = 1000) -> None:
+        """
+        Initialize event bus
+
+        Args:
+            history_size: Number of recent events kept for resuming streams
+        """
+        self.logger = get_logger()
+        self._events: deque[LiveEvent] = deque(maxlen=history_size)
+        self._seq = 0
+        self._condition = threading.Condition()
+        self._snapshot_providers: dict[str, Callable[[], Any]] = {}
+        self._closed = False
+        self.subscribers = 0
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the most recent event"""
+        return self._seq
+
+    @property
+    def closed(self) -> bool:
+        """Whether the bus has been shut down"""
+        return self._closed
+
+    def add_subscriber(self) -> None:
+        """Count a stream that started reading from the bus"""
+        with self._condition:
+            self.subscribers += 1
+
+    def remove_subscriber(self) -> None:
+        """Stop counting a stream that disconnected"""
+        with self._condition:
+            self.subscribers -= 1
+
+    def publish(self, event_type: str, data: dict) -> int:
+        """
+        Publish a state change
+
+        Args:
+            event_type: Event type (e.g. "call.started")
+            data: Event payload
+
+        Returns:
+            Sequence number assigned to the event
+        """
+        with self._condition:
+            self._seq += 1
+            self._events.append(LiveEvent(self._seq, event_type, data))
+            self._condition.notify_all()
+            return self._seq
+
+    def _events_since_locked(self, seq: int) -> list[LiveEvent] | None:
+        if seq >= self._seq:
+            return []
+        oldest = self._events[0].seq if self._events else self._seq + 1
+        if seq + 1 < oldest:
+            return None
+        # Retained events are contiguous, so the offset is direct
+        return list(islice(self._events, seq + 1 - oldest, None))
+
+    def events_since(self, seq: int) -> list[LiveEvent] | None:
+        """
+        Get events published after a sequence number
+
+        Args:
+            seq: Last sequence number the caller has seen
+
+        Returns:
+            Events after seq, or None if some of them are no longer retained
+        """
+        with self._condition:
+            return self._events_since_locked(seq)
+
+    def wait_for_events(self, seq: int, timeout: float) -> list[LiveEvent] | None:
+        """
+        Block until events after seq are published or the timeout passes
+
+        Args:
+            seq: Last sequence number the caller has seen
+            timeout: Maximum seconds to wait
+
+        Returns:
+            New events (empty on timeout or shutdown), or None if the caller
+            fell behind the retained history
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq > seq or self._closed, timeout)
+            return self._events_since_locked(seq)
+
+    def register_snapshot_provider(self, name: str, provider: Callable[[], Any]) -> None:
+        """
+        Register a callable contributing current state to snapshots
+
+        Args:
+            name: Snapshot section name (e.g. "calls")
+            provider: Returns JSON-serializable state for the section
+        """
+        self._snapshot_providers[name] = provider
+
+    def snapshot(self) -> dict:
+        """
+        Build a full-state snapshot
+
+        The sequence number is read before the state is gathered, so events
+        racing with the snapshot are replayed afterwards rather than lost;
+        applying call/registration deltas twice is harmless.
+
+        Returns:
+            dict with "seq" and "state" keys
+        """
+        seq = self._seq
+        state = {}
+        for name, provider in list(self._snapshot_providers.items()):
+            try:
+                state[name] = provider()
+            except Exception as e:
+                self.logger.error(f"Live snapshot provider '{name}' failed: {e}")
+                state[name] = None
+        return {"seq": seq, "state": state}
+
+    def close(self) -> None:
+        """Shut the bus down and release all waiting streams"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def get_statistics(self) -> dict:
+        """Get event bus statistics"""
+        return {
+            "last_seq": self._seq,
+            "retained_events": len(self._events),
+            "subscribers": self.subscribers,
+        }
@@ -5,9 +5,12 @@
 into a dedicated class for better modularity and maintainability.
 """
 
+import functools
 import logging
+from collections.abc import Callable
 from typing import Any
 
+from pbx.core.feature_registry import FeatureRegistry
 from pbx.features.call_parking import CallParkingSystem
 from pbx.features.call_queue import QueueSystem
 from pbx.features.call_recording import CallRecordingSystem
@@ -36,51 +39,185 @@ def initialize(pbx_core: Any) -> None:
         recording, queues, presence, parking, CDR, music-on-hold, trunks,
         integrations, security, and more) on the given PBXCore instance.
 
+        Features are registered on a FeatureRegistry (``pbx_core.feature_registry``)
+        and built on ``server.startup.workers`` threads in dependency order.
+        Features named in ``server.startup.lazy_features`` are built on first
+        use instead.
+
         Args:
             pbx_core: The PBXCore instance to initialize features on
         """
         config = pbx_core.config
-        logger = pbx_core.logger
-        database = pbx_core.database
+        registry = FeatureRegistry(workers=config.get("server.startup.workers", 4))
+        pbx_core.feature_registry = registry
+
+        lazy = set(config.get("server.startup.lazy_features", []) or [])
+        for name, init, provides, requires in FeatureInitializer._features():
+            registry.register(
+                name,
+                functools.partial(init, pbx_core, config),
+                provides=provides,
+                requires=requires,
+                lazy=name in lazy,
+            )
+        unknown = lazy.difference(name for name, *_ in FeatureInitializer._features())
+        if unknown:
+            pbx_core.logger.warning(
+                f"Unknown features in server.startup.lazy_features: {', '.join(sorted(unknown))}"
+            )
+
+        registry.initialize()
 
-        # Initialize advanced features
+    @staticmethod
+    def _features() -> tuple[tuple[str, Callable[[Any, Any], None], tuple, tuple], ...]:
+        """Every feature as (name, initializer, attributes it sets, features it needs)"""
+        fi = FeatureInitializer
+        return (
+            ("voicemail", fi._init_voicemail, ("voicemail_system",), ()),
+            ("conference", fi._init_conference, ("conference_system",), ()),
+            ("recording", fi._init_recording, ("recording_system",), ()),
+            ("queues", fi._init_queues, ("queue_system",), ()),
+            ("presence", fi._init_presence, ("presence_system",), ()),
+            ("parking", fi._init_parking, ("parking_system",), ()),
+            ("cdr", fi._init_cdr, ("cdr_system",), ()),
+            ("music_on_hold", fi._init_music_on_hold, ("moh_system",), ()),
+            ("trunks", fi._init_trunks, ("trunk_system",), ()),
+            ("statistics", fi._init_statistics, ("statistics_engine",), ("cdr",)),
+            ("auto_attendant", fi._init_auto_attendant, ("auto_attendant",), ()),
+            ("provisioning", fi._init_provisioning, ("phone_provisioning",), ()),
+            ("active_directory", fi._init_ad_feature, ("ad_integration",), ()),
+            (
+                "integrations",
+                fi._init_integrations_feature,
+                (
+                    "jitsi_integration",
+                    "matrix_integration",
+                    "espocrm_integration",
+                    "zoom_integration",
+                ),
+                (),
+            ),
+            ("phone_book", fi._init_phone_book, ("phone_book",), ()),
+            (
+                "emergency_notification",
+                fi._init_emergency_notification,
+                ("emergency_notification",),
+                (),
+            ),
+            ("paging", fi._init_paging, ("paging_system",), ()),
+            ("e911", fi._init_e911, ("e911_location",), ()),
+            (
+                "karis_law",
+                fi._init_karis_law,
+                ("karis_law",),
+                ("e911", "emergency_notification", "trunks"),
+            ),
+            ("webhooks", fi._init_webhooks, ("webhook_system",), ()),
+            ("webrtc", fi._init_webrtc, ("webrtc_signaling", "webrtc_gateway"), ()),
+            (
+                "crm_integration",
+                fi._init_crm_integration,
+                ("crm_integration",),
+                ("phone_book", "active_directory"),
+            ),
+            ("hot_desking", fi._init_hot_desking, ("hot_desking",), ()),
+            ("find_me_follow_me", fi._init_find_me_follow_me, ("find_me_follow_me",), ()),
+            ("time_based_routing", fi._init_time_based_routing, ("time_based_routing",), ()),
+            ("recording_retention", fi._init_recording_retention, ("recording_retention",), ()),
+            ("fraud_detection", fi._init_fraud_detection, ("fraud_detection",), ()),
+            ("callback_queue", fi._init_callback_queue, ("callback_queue",), ()),
+            ("mobile_push", fi._init_mobile_push, ("mobile_push",), ()),
+            (
+                "recording_announcements",
+                fi._init_recording_announcements,
+                ("recording_announcements",),
+                (),
+            ),
+            ("mfa", fi._init_mfa, ("mfa_manager",), ()),
+            ("threat_detection", fi._init_threat_detection, ("threat_detector",), ()),
+            ("security_monitor", fi._init_security_monitor, ("security_monitor",), ("webhooks",)),
+            (
+                "dnd_scheduling",
+                fi._init_dnd_scheduling,
+                ("dnd_scheduler",),
+                ("presence", "integrations"),
+            ),
+            ("sbc", fi._init_sbc, ("sbc",), ()),
+            ("speech_analytics", fi._init_speech_analytics, ("speech_analytics",), ()),
+            ("skills_routing", fi._init_skills_routing, ("skills_router",), ()),
+        )
+
+    @staticmethod
+    def _init_voicemail(pbx_core: Any, config: Any) -> None:
+        database = pbx_core.database
         voicemail_path: str = config.get("voicemail.storage_path", "voicemail")
         pbx_core.voicemail_system = VoicemailSystem(
             storage_path=voicemail_path,
             config=config,
             database=database if hasattr(pbx_core, "database") and database.enabled else None,
         )
-        pbx_core.conference_system = ConferenceSystem()
+
+    @staticmethod
+    def _init_conference(pbx_core: Any, config: Any) -> None:
+        pbx_core.conference_system = ConferenceSystem(config=config)
+
+    @staticmethod
+    def _init_recording(pbx_core: Any, config: Any) -> None:
         pbx_core.recording_system = CallRecordingSystem(
             auto_record=config.get("features.call_recording", False)
         )
+
+    @staticmethod
+    def _init_queues(pbx_core: Any, _config: Any) -> None:
         pbx_core.queue_system = QueueSystem()
+
+    @staticmethod
+    def _init_presence(pbx_core: Any, _config: Any) -> None:
         pbx_core.presence_system = PresenceSystem()
+
+    @staticmethod
+    def _init_parking(pbx_core: Any, _config: Any) -> None:
         pbx_core.parking_system = CallParkingSystem()
+
+    @staticmethod
+    def _init_cdr(pbx_core: Any, _config: Any) -> None:
         pbx_core.cdr_system = CDRSystem()
+
+    @staticmethod
+    def _init_music_on_hold(pbx_core: Any, _config: Any) -> None:
         pbx_core.moh_system = MusicOnHold()
+
+    @staticmethod
+    def _init_trunks(pbx_core: Any, config: Any) -> None:
         pbx_core.trunk_system = SIPTrunkSystem(config=config)
 
-        # Initialize statistics engine for analytics
+    @staticmethod
+    def _init_statistics(pbx_core: Any, _config: Any) -> None:
+        """Initialize statistics engine for analytics"""
         from pbx.features.statistics import StatisticsEngine
 
         pbx_core.statistics_engine = StatisticsEngine(pbx_core.cdr_system)
         pbx_core._log_startup("Statistics and analytics engine initialized")
-        logger.info("QoS monitoring system initialized and integrated with RTP relay")
+        pbx_core.logger.info("QoS monitoring system initialized and integrated with RTP relay")
 
-        # Initialize auto attendant if enabled
+    @staticmethod
+    def _init_auto_attendant(pbx_core: Any, config: Any) -> None:
+        """Initialize auto attendant if enabled"""
         if config.get("features.auto_attendant", False):
             from pbx.features.auto_attendant import AutoAttendant
 
             pbx_core.auto_attendant = AutoAttendant(config, pbx_core)
-            logger.info(
+            pbx_core.logger.info(
                 f"Auto Attendant initialized on extension {pbx_core.auto_attendant.get_extension()}"
             )
         else:
             pbx_core.auto_attendant = None
 
-        # Initialize phone provisioning if enabled
+    @staticmethod
+    def _init_provisioning(pbx_core: Any, config: Any) -> None:
+        """Initialize phone provisioning if enabled"""
         if config.get("provisioning.enabled", False):
+            database = pbx_core.database
             pbx_core.phone_provisioning = PhoneProvisioning(
                 config, database=database if database.enabled else None
             )
@@ -88,39 +225,51 @@ def initialize(pbx_core: Any) -> None:
         else:
             pbx_core.phone_provisioning = None
 
-        # Initialize Active Directory integration
+    @staticmethod
+    def _init_ad_feature(pbx_core: Any, config: Any) -> None:
+        """Initialize Active Directory integration if enabled"""
         if config.get("integrations.active_directory.enabled", False):
             FeatureInitializer._init_active_directory(pbx_core, config)
         else:
             pbx_core.ad_integration = None
 
-        # Initialize open-source integrations
-        FeatureInitializer._init_open_source_integrations(pbx_core, config, logger)
+    @staticmethod
+    def _init_integrations_feature(pbx_core: Any, config: Any) -> None:
+        FeatureInitializer._init_open_source_integrations(pbx_core, config, pbx_core.logger)
 
-        # Initialize phone book if enabled
+    @staticmethod
+    def _init_phone_book(pbx_core: Any, config: Any) -> None:
+        """Initialize phone book if enabled"""
         if config.get("features.phone_book.enabled", False):
             from pbx.features.phone_book import PhoneBook
 
+            database = pbx_core.database
             pbx_core.phone_book = PhoneBook(config, database=database if database.enabled else None)
-            logger.info("Phone book feature initialized")
+            pbx_core.logger.info("Phone book feature initialized")
         else:
             pbx_core.phone_book = None
 
-        # Initialize emergency notification system if enabled
+    @staticmethod
+    def _init_emergency_notification(pbx_core: Any, config: Any) -> None:
+        """Initialize emergency notification system if enabled"""
         if config.get("features.emergency_notification.enabled", True):
             from pbx.features.emergency_notification import EmergencyNotificationSystem
 
+            database = pbx_core.database
             pbx_core.emergency_notification = EmergencyNotificationSystem(
                 pbx_core, config=config, database=database if database.enabled else None
             )
-            logger.info("Emergency notification system initialized")
+            pbx_core.logger.info("Emergency notification system initialized")
         else:
             pbx_core.emergency_notification = None
 
-        # Initialize paging system if enabled
+    @staticmethod
+    def _init_paging(pbx_core: Any, config: Any) -> None:
+        """Initialize paging system if enabled"""
         if config.get("features.paging.enabled", False):
             from pbx.features.paging import PagingSystem
 
+            database = pbx_core.database
             pbx_core.paging_system = PagingSystem(
                 config, database=database if database.enabled else None
             )
@@ -129,136 +278,169 @@ def initialize(pbx_core: Any) -> None:
         else:
             pbx_core.paging_system = None
 
-        # Initialize E911 location service if enabled
+    @staticmethod
+    def _init_e911(pbx_core: Any, config: Any) -> None:
+        """Initialize E911 location service if enabled"""
         if config.get("features.e911.enabled", False):
             from pbx.features.e911_location import E911LocationService
 
             pbx_core.e911_location = E911LocationService(config=config)
-            logger.info("E911 location service initialized")
+            pbx_core.logger.info("E911 location service initialized")
         else:
             pbx_core.e911_location = None
 
-        # Initialize Kari's Law compliance (federal requirement for direct 911 dialing)
+    @staticmethod
+    def _init_karis_law(pbx_core: Any, config: Any) -> None:
+        """Initialize Kari's Law compliance (federal requirement for direct 911 dialing)"""
         if config.get("features.karis_law.enabled", True):
             from pbx.features.karis_law import KarisLawCompliance
 
             pbx_core.karis_law = KarisLawCompliance(pbx_core, config=config)
-            logger.info("Kari's Law compliance initialized (direct 911 dialing enabled)")
+            pbx_core.logger.info("Kari's Law compliance initialized (direct 911 dialing enabled)")
         else:
             pbx_core.karis_law = None
-            logger.warning("Kari's Law compliance DISABLED - not recommended for production")
+            pbx_core.logger.warning(
+                "Kari's Law compliance DISABLED - not recommended for production"
+            )
 
-        # Initialize webhook system
+    @staticmethod
+    def _init_webhooks(pbx_core: Any, config: Any) -> None:
         from pbx.features.webhooks import WebhookSystem
 
         pbx_core.webhook_system = WebhookSystem(config)
 
-        # Initialize WebRTC if enabled
+    @staticmethod
+    def _init_webrtc(pbx_core: Any, config: Any) -> None:
+        """Initialize WebRTC if enabled"""
         if config.get("features.webrtc.enabled", False):
             from pbx.features.webrtc import WebRTCGateway, WebRTCSignalingServer
 
             pbx_core.webrtc_signaling = WebRTCSignalingServer(config, pbx_core)
             pbx_core.webrtc_gateway = WebRTCGateway(pbx_core)
-            logger.info("WebRTC browser calling initialized")
+            pbx_core.logger.info("WebRTC browser calling initialized")
         else:
             pbx_core.webrtc_signaling = None
             pbx_core.webrtc_gateway = None
 
-        # Initialize CRM integration if enabled
+    @staticmethod
+    def _init_crm_integration(pbx_core: Any, config: Any) -> None:
+        """Initialize CRM integration if enabled"""
         if config.get("features.crm_integration.enabled", False):
             from pbx.features.crm_integration import CRMIntegration
 
             pbx_core.crm_integration = CRMIntegration(config, pbx_core)
-            logger.info("CRM integration and screen pop initialized")
+            pbx_core.logger.info("CRM integration and screen pop initialized")
         else:
             pbx_core.crm_integration = None
 
-        # Initialize hot-desking if enabled
+    @staticmethod
+    def _init_hot_desking(pbx_core: Any, config: Any) -> None:
+        """Initialize hot-desking if enabled"""
         if config.get("features.hot_desking.enabled", False):
             from pbx.features.hot_desking import HotDeskingSystem
 
             pbx_core.hot_desking = HotDeskingSystem(config, pbx_core)
-            logger.info("Hot-desking system initialized")
+            pbx_core.logger.info("Hot-desking system initialized")
         else:
             pbx_core.hot_desking = None
 
-        # Initialize Find Me/Follow Me
+    @staticmethod
+    def _init_find_me_follow_me(pbx_core: Any, config: Any) -> None:
+        database = pbx_core.database
         pbx_core.find_me_follow_me = FindMeFollowMe(
             config=config, database=database if database.enabled else None
         )
         if pbx_core.find_me_follow_me.enabled:
-            logger.info("Find Me/Follow Me initialized")
+            pbx_core.logger.info("Find Me/Follow Me initialized")
 
-        # Initialize Time-Based Routing
+    @staticmethod
+    def _init_time_based_routing(pbx_core: Any, config: Any) -> None:
         pbx_core.time_based_routing = TimeBasedRouting(config=config)
         if pbx_core.time_based_routing.enabled:
-            logger.info("Time-based routing initialized")
+            pbx_core.logger.info("Time-based routing initialized")
 
-        # Initialize Recording Retention Manager
+    @staticmethod
+    def _init_recording_retention(pbx_core: Any, config: Any) -> None:
         pbx_core.recording_retention = RecordingRetentionManager(config=config)
         if pbx_core.recording_retention.enabled:
-            logger.info("Recording retention manager initialized")
+            pbx_core.logger.info("Recording retention manager initialized")
 
-        # Initialize Fraud Detection System
+    @staticmethod
+    def _init_fraud_detection(pbx_core: Any, config: Any) -> None:
         pbx_core.fraud_detection = FraudDetectionSystem(config=config)
         if pbx_core.fraud_detection.enabled:
-            logger.info("Fraud detection system initialized")
+            pbx_core.logger.info("Fraud detection system initialized")
 
-        # Initialize Callback Queue
+    @staticmethod
+    def _init_callback_queue(pbx_core: Any, config: Any) -> None:
         from pbx.features.callback_queue import CallbackQueue
 
-        pbx_core.callback_queue = CallbackQueue(config=config, database=database)
+        pbx_core.callback_queue = CallbackQueue(config=config, database=pbx_core.database)
         if pbx_core.callback_queue.enabled:
-            logger.info("Callback queue system initialized")
+            pbx_core.logger.info("Callback queue system initialized")
 
-        # Initialize Mobile Push Notifications
+    @staticmethod
+    def _init_mobile_push(pbx_core: Any, config: Any) -> None:
         from pbx.features.mobile_push import MobilePushNotifications
 
-        pbx_core.mobile_push = MobilePushNotifications(config=config, database=database)
+        pbx_core.mobile_push = MobilePushNotifications(config=config, database=pbx_core.database)
         if pbx_core.mobile_push.enabled:
-            logger.info("Mobile push notifications initialized")
+            pbx_core.logger.info("Mobile push notifications initialized")
 
-        # Initialize Recording Announcements
+    @staticmethod
+    def _init_recording_announcements(pbx_core: Any, config: Any) -> None:
         from pbx.features.recording_announcements import RecordingAnnouncements
 
-        pbx_core.recording_announcements = RecordingAnnouncements(config=config, database=database)
+        pbx_core.recording_announcements = RecordingAnnouncements(
+            config=config, database=pbx_core.database
+        )
         if pbx_core.recording_announcements.enabled:
-            logger.info("Recording announcements initialized")
+            pbx_core.logger.info("Recording announcements initialized")
 
-        # Initialize MFA if enabled
+    @staticmethod
+    def _init_mfa(pbx_core: Any, config: Any) -> None:
+        """Initialize MFA if enabled"""
         if config.get("security.mfa.enabled", False):
             from pbx.features.mfa import MFAManager
 
+            database = pbx_core.database
             pbx_core.mfa_manager = MFAManager(
                 database=(database if hasattr(pbx_core, "database") and database.enabled else None),
                 config=config,
             )
-            logger.info("Multi-Factor Authentication (MFA) initialized")
+            pbx_core.logger.info("Multi-Factor Authentication (MFA) initialized")
         else:
             pbx_core.mfa_manager = None
 
-        # Initialize enhanced threat detection if enabled
+    @staticmethod
+    def _init_threat_detection(pbx_core: Any, config: Any) -> None:
+        """Initialize enhanced threat detection if enabled"""
         if config.get("security.threat_detection.enabled", True):
             from pbx.utils.security import get_threat_detector
 
+            database = pbx_core.database
             pbx_core.threat_detector = get_threat_detector(
                 database=(database if hasattr(pbx_core, "database") and database.enabled else None),
                 config=config,
             )
-            logger.info("Enhanced threat detection initialized")
+            pbx_core.threat_detector.start_blocklist_sync()
+            pbx_core.logger.info("Enhanced threat detection initialized")
         else:
             pbx_core.threat_detector = None
 
-        # Initialize security runtime monitor (always enabled for FIPS compliance)
-        # Note: webhook_system is initialized earlier, so it's always available
+    @staticmethod
+    def _init_security_monitor(pbx_core: Any, config: Any) -> None:
+        """Initialize security runtime monitor (always enabled for FIPS compliance)"""
         from pbx.utils.security_monitor import get_security_monitor
 
         pbx_core.security_monitor = get_security_monitor(
             config=config, webhook_system=pbx_core.webhook_system
         )
-        logger.info("Security runtime monitor initialized")
+        pbx_core.logger.info("Security runtime monitor initialized")
 
-        # Initialize DND scheduler if enabled
+    @staticmethod
+    def _init_dnd_scheduling(pbx_core: Any, config: Any) -> None:
+        """Initialize DND scheduler if enabled"""
         if config.get("features.dnd_scheduling.enabled", False):
             from pbx.features.dnd_scheduling import get_dnd_scheduler
 
@@ -278,28 +460,46 @@ def initialize(pbx_core: Any) -> None:
         else:
             pbx_core.dnd_scheduler = None
 
-        # Initialize Warden SBC (Session Border Controller)
+    @staticmethod
+    def _init_sbc(pbx_core: Any, config: Any) -> None:
+        """Initialize Warden SBC (Session Border Controller)"""
         if config.get("features.sbc.enabled", False):
             from pbx.features.session_border_controller import SessionBorderController
 
             pbx_core.sbc = SessionBorderController(config=config)
             if pbx_core.sbc.enabled:
-                logger.info("Warden SBC (Session Border Controller) initialized")
+                pbx_core.logger.info("Warden SBC (Session Border Controller) initialized")
         else:
             pbx_core.sbc = None
 
-        # Initialize skills-based routing if enabled
+    @staticmethod
+    def _init_skills_routing(pbx_core: Any, config: Any) -> None:
+        """Initialize skills-based routing if enabled"""
         if config.get("features.skills_routing.enabled", False):
             from pbx.features.skills_routing import get_skills_router
 
+            database = pbx_core.database
             pbx_core.skills_router = get_skills_router(
                 database=(database if hasattr(pbx_core, "database") and database.enabled else None),
                 config=config,
             )
-            logger.info("Skills-Based Routing initialized")
+            pbx_core.logger.info("Skills-Based Routing initialized")
         else:
             pbx_core.skills_router = None
 
+    @staticmethod
+    def _init_speech_analytics(pbx_core: Any, config: Any) -> None:
+        """Initialize live call speech analytics if enabled"""
+        if config.get("speech_analytics.enabled", False):
+            from pbx.features.speech_analytics import SpeechAnalyticsEngine
+
+            database = pbx_core.database
+            pbx_core.speech_analytics = SpeechAnalyticsEngine(
+                database if database.enabled else None, config
+            )
+        else:
+            pbx_core.speech_analytics = None
+
     @staticmethod
     def _init_active_directory(pbx_core: Any, config: Any) -> None:
         """Initialize Active Directory integration"""
@@ -335,6 +535,18 @@ def _init_active_directory(pbx_core: Any, config: Any) -> None:
             "integrations.active_directory.deactivate_removed_users": config.get(
                 "integrations.active_directory.deactivate_removed_users", True
             ),
+            "integrations.active_directory.sync_mode": config.get(
+                "integrations.active_directory.sync_mode", "incremental"
+            ),
+            "integrations.active_directory.page_size": config.get(
+                "integrations.active_directory.page_size", 500
+            ),
+            "integrations.active_directory.full_sync_interval_hours": config.get(
+                "integrations.active_directory.full_sync_interval_hours", 24
+            ),
+            "integrations.active_directory.sync_state_file": config.get(
+                "integrations.active_directory.sync_state_file", "data/ad_sync_state.json"
+            ),
             "config_file": config_file,
         }
         pbx_core.ad_integration = ActiveDirectoryIntegration(ad_config)
@@ -342,52 +554,78 @@ def _init_active_directory(pbx_core: Any, config: Any) -> None:
             pbx_core._log_startup("Active Directory integration initialized")
 
             # Auto-sync users from AD at startup if auto_provision is
-            # enabled
+            # enabled. By default the sync waits until the SIP server is
+            # taking calls and then runs in the background, so a large
+            # directory doesn't hold up startup; later syncs are incremental.
             if pbx_core.ad_integration.auto_provision:
-                pbx_core.logger.info(
-                    "Auto-provisioning enabled - syncing users from Active Directory..."
+                interval = float(
+                    config.get("integrations.active_directory.sync_interval_minutes", 0) or 0
                 )
-                try:
-                    sync_result = pbx_core.ad_integration.sync_users(
-                        extension_registry=pbx_core.extension_registry,
-                        extension_db=pbx_core.extension_db,
-                        phone_provisioning=None,  # Will be set after provisioning init
-                    )
-
-                    # Handle both int and dict return types
-                    synced_count: int = (
-                        sync_result
-                        if isinstance(sync_result, int)
-                        else sync_result.get("synced_count", 0)
+                startup_sync = config.get(
+                    "integrations.active_directory.startup_sync", "background"
+                )
+                if startup_sync == "blocking":
+                    FeatureInitializer._startup_ad_sync(pbx_core)
+                    initial_sync = None
+                else:
+                    pbx_core.logger.info(
+                        "Auto-provisioning enabled - syncing users from Active Directory in the background"
                     )
-
-                    if synced_count > 0:
-                        pbx_core.logger.info(
-                            f"Auto-synced {synced_count} extension(s) from Active Directory at startup"
-                        )
-                        # Reload extension registry to ensure all synced extensions are loaded
-                        pbx_core.logger.info("Reloading extension registry from database...")
-                        pbx_core.extension_registry.reload()
-                        pbx_core.logger.info(
-                            f"Extension registry reloaded: {len(pbx_core.extension_registry.extensions)} total extensions"
-                        )
-                    else:
-                        pbx_core.logger.warning(
-                            "AD auto-sync completed but no extensions were synced"
-                        )
-                except (KeyError, TypeError, ValueError) as e:
-                    pbx_core.logger.error(
-                        f"Failed to auto-sync users from Active Directory at startup: {e}"
+                    initial_sync = functools.partial(FeatureInitializer._startup_ad_sync, pbx_core)
+                if initial_sync or interval > 0:
+                    pbx_core.feature_registry.defer(
+                        "active_directory_sync",
+                        functools.partial(
+                            pbx_core.ad_integration.start_background_sync,
+                            pbx_core.sync_ad_users,
+                            interval * 60,
+                            initial_sync=initial_sync,
+                        ),
                     )
-                    import traceback
-
-                    pbx_core.logger.debug(traceback.format_exc())
         else:
             pbx_core.logger.warning(
                 "Active Directory integration enabled in config but failed to initialize"
             )
             pbx_core.ad_integration = None
 
+    @staticmethod
+    def _startup_ad_sync(pbx_core: Any) -> None:
+        """Sync users from Active Directory at startup and reload the registry"""
+        pbx_core.logger.info("Auto-provisioning enabled - syncing users from Active Directory...")
+        try:
+            sync_result = pbx_core.ad_integration.sync_users(
+                extension_registry=pbx_core.extension_registry,
+                extension_db=pbx_core.extension_db,
+                phone_provisioning=None,  # Phones fetch fresh config as they boot
+            )
+
+            # Handle both int and dict return types
+            synced_count: int = (
+                sync_result if isinstance(sync_result, int) else sync_result.get("synced_count", 0)
+            )
+
+            if synced_count > 0:
+                pbx_core.logger.info(
+                    f"Auto-synced {synced_count} extension(s) from Active Directory at startup"
+                )
+                # Reload extension registry to ensure all synced extensions are loaded
+                pbx_core.logger.info("Reloading extension registry from database...")
+                pbx_core.extension_registry.reload()
+                pbx_core.logger.info(
+                    f"Extension registry reloaded: {len(pbx_core.extension_registry.extensions)} total extensions"
+                )
+            elif isinstance(sync_result, dict) and sync_result.get("summary"):
+                pbx_core.logger.info("AD auto-sync completed: extensions already up to date")
+            else:
+                pbx_core.logger.warning("AD auto-sync completed but no extensions were synced")
+        except (KeyError, TypeError, ValueError) as e:
+            pbx_core.logger.error(
+                f"Failed to auto-sync users from Active Directory at startup: {e}"
+            )
+            import traceback
+
+            pbx_core.logger.debug(traceback.format_exc())
+
     @staticmethod
     def _init_open_source_integrations(pbx_core: Any, config: Any, _logger: logging.Logger) -> None:
         """Initialize open-source and third-party integrations"""
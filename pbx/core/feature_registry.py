@@ -0,0 +1,349 @@
+"""
+Feature registry for PBX startup
+Builds feature subsystems in dependency order on a small worker pool, leaves
+features marked lazy until something first asks for them, holds back
+non-critical work until the PBX is taking calls, and times every step
+"""
+
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from pbx.utils.logger import get_logger
+
+MODE_EAGER = "eager"
+MODE_LAZY = "lazy"
+MODE_DEFERRED = "deferred"
+MODE_PHASE = "phase"
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
+
+class _Feature:
+    """One registered feature and its startup timing"""
+
+    __slots__ = (
+        "done",
+        "error",
+        "init",
+        "mode",
+        "name",
+        "owner",
+        "provides",
+        "requires",
+        "seconds",
+        "started",
+        "status",
+        "thread",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        init: Callable[[], None],
+        provides: tuple[str, ...],
+        requires: tuple[str, ...],
+        mode: str,
+    ) -> None:
+        self.name = name
+        self.init = init
+        self.provides = provides
+        self.requires = requires
+        self.mode = mode
+        self.status = STATUS_PENDING
+        self.done = threading.Event()
+        self.error: BaseException | None = None
+        self.seconds: float | None = None
+        self.started: float | None = None
+        self.thread: str | None = None
+        self.owner: int | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "mode": self.mode,
+            "status": self.status,
+            "seconds": round(self.seconds, 4) if self.seconds is not None else None,
+            "started": round(self.started, 4) if self.started is not None else None,
+            "thread": self.thread,
+            "error": str(self.error) if self.error else None,
+        }
+
+
+class FeatureRegistry:
+    """
+    Dependency-aware feature registry
+
+    Each feature is an initializer that sets one or more attributes on
+    PBXCore. initialize() builds every eager feature, running up to
+    ``workers`` initializers at once, and returns when all of them are done;
+    a feature's requirements are always built first. Lazy features are built
+    the first time one of their attributes is looked up (see
+    PBXCore.__getattr__). Deferred tasks wait for run_deferred(), which
+    PBXCore calls once the SIP server is accepting traffic.
+    """
+
+    def __init__(self, workers: int = 4, clock: Callable[[], float] | None = None) -> None:
+        """
+        Initialize feature registry
+
+        Args:
+            workers: Initializers run at once; 1 builds features serially
+                in registration order
+            clock: Monotonic time source (for tests)
+        """
+        self.logger = get_logger()
+        self.workers = max(1, int(workers))
+        self.clock = clock or time.perf_counter
+        self.origin = self.clock()
+
+        self._lock = threading.Lock()
+        self._features: dict[str, _Feature] = {}
+        self._providers: dict[str, str] = {}
+        self._deferred: list[_Feature] = []
+        self._deferred_started = False
+        self._executor: ThreadPoolExecutor | None = None
+        self._closed = False
+        self._phases: list[dict[str, Any]] = []
+        self.initialize_seconds: float | None = None
+
+    def register(
+        self,
+        name: str,
+        init: Callable[[], None],
+        provides: Iterable[str] = (),
+        requires: Iterable[str] = (),
+        lazy: bool = False,
+    ) -> None:
+        """
+        Register a feature
+
+        Args:
+            name: Feature name, as used in ``requires`` and startup.lazy_features
+            init: Builds the feature and sets its attributes
+            provides: Attributes init sets; looking one up builds a lazy feature
+            requires: Features that must be built before this one
+            lazy: Build on first use instead of during initialize()
+        """
+        if name in self._features:
+            raise ValueError(f"Feature {name!r} is already registered")
+        feature = _Feature(
+            name, init, tuple(provides), tuple(requires), MODE_LAZY if lazy else MODE_EAGER
+        )
+        self._features[name] = feature
+        for attribute in feature.provides:
+            self._providers[attribute] = name
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._features
+
+    def initialize(self) -> None:
+        """
+        Build every eager feature and the features they require
+
+        Raises:
+            ValueError: If a requirement is unknown or the requirements loop
+            Exception: The first initializer failure, in registration order,
+                once every other initializer has finished
+        """
+        self._check_requirements()
+        start = self.clock()
+        eager = [f.name for f in self._features.values() if f.mode == MODE_EAGER]
+
+        if self.workers == 1 or len(eager) < 2:
+            for name in eager:
+                self.ensure(name)
+        else:
+            with ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="feature-init"
+            ) as executor:
+                futures = [executor.submit(self.ensure, name) for name in eager]
+            for future in futures:
+                error = future.exception()
+                if error is not None:
+                    raise error
+
+        self.initialize_seconds = self.clock() - start
+        self.logger.info(
+            f"Initialized {len(eager)} features in {self.initialize_seconds:.2f}s "
+            f"({self.workers} worker{'s' if self.workers != 1 else ''})"
+        )
+
+    def ensure(self, name: str) -> None:
+        """
+        Build a feature, and its requirements, unless that already happened
+
+        Safe to call from several threads at once: one caller builds the
+        feature and the others wait for it. Raises the initializer's error,
+        to every caller, if it failed.
+        """
+        feature = self._features[name]
+        with self._lock:
+            build = feature.status == STATUS_PENDING
+            if build:
+                feature.status = STATUS_RUNNING
+                feature.owner = threading.get_ident()
+        if not build:
+            feature.done.wait()
+            if feature.error is not None:
+                raise feature.error
+            return
+
+        try:
+            for requirement in feature.requires:
+                self.ensure(requirement)
+            self._run(feature)
+        except BaseException as e:
+            feature.error = e
+            feature.status = STATUS_FAILED
+            raise
+        finally:
+            feature.done.set()
+
+    def resolve(self, attribute: str) -> bool:
+        """
+        Build the feature that provides an attribute, if it is not built yet
+
+        Returns:
+            True if a registered feature provides the attribute, False if
+            none does or this thread is still building it
+        """
+        name = self._providers.get(attribute)
+        if name is None:
+            return False
+        feature = self._features[name]
+        if feature.status == STATUS_RUNNING and feature.owner == threading.get_ident():
+            return False
+        self.ensure(name)
+        return True
+
+    def defer(self, name: str, task: Callable[[], None]) -> None:
+        """
+        Hold back non-critical work until run_deferred()
+
+        Tasks deferred after run_deferred() has been called start at once.
+        """
+        entry = _Feature(name, task, (), (), MODE_DEFERRED)
+        with self._lock:
+            self._deferred.append(entry)
+            started = self._deferred_started
+        if started:
+            self._submit_deferred(entry)
+
+    def run_deferred(self) -> None:
+        """Start deferred tasks on the background pool"""
+        with self._lock:
+            if self._deferred_started:
+                return
+            self._deferred_started = True
+            pending = list(self._deferred)
+        if pending:
+            self.logger.info(f"Starting {len(pending)} deferred startup task(s)")
+        for entry in pending:
+            self._submit_deferred(entry)
+
+    def record(self, name: str, seconds: float) -> None:
+        """Add a startup phase timed elsewhere (database, API routes) to the report"""
+        with self._lock:
+            self._phases.append(
+                {"name": name, "mode": MODE_PHASE, "status": STATUS_READY, "seconds": seconds}
+            )
+
+    def shutdown(self) -> None:
+        """Drop deferred tasks that have not started yet"""
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_profile(self) -> dict[str, Any]:
+        """Per-feature startup timings, slowest first"""
+        with self._lock:
+            entries = [f.to_dict() for f in (*self._features.values(), *self._deferred)]
+            phases = [{**phase, "seconds": round(phase["seconds"], 4)} for phase in self._phases]
+        timed = sorted(
+            (entry for entry in entries if entry["seconds"] is not None),
+            key=lambda entry: entry["seconds"],
+            reverse=True,
+        )
+        return {
+            "workers": self.workers,
+            "initialize_seconds": (
+                round(self.initialize_seconds, 4) if self.initialize_seconds is not None else None
+            ),
+            "features": timed + [entry for entry in entries if entry["seconds"] is None],
+            "phases": phases,
+            "lazy_pending": [
+                entry["name"]
+                for entry in entries
+                if entry["mode"] == MODE_LAZY and entry["status"] == STATUS_PENDING
+            ],
+            "deferred_pending": sum(
+                1
+                for entry in entries
+                if entry["mode"] == MODE_DEFERRED
+                and entry["status"] in (STATUS_PENDING, STATUS_RUNNING)
+            ),
+            "failed": [entry["name"] for entry in entries if entry["status"] == STATUS_FAILED],
+        }
+
+    def _run(self, feature: _Feature) -> None:
+        """Run an initializer and time it"""
+        started = self.clock()
+        feature.started = started - self.origin
+        feature.thread = threading.current_thread().name
+        try:
+            feature.init()
+        finally:
+            feature.seconds = self.clock() - started
+        feature.status = STATUS_READY
+        if feature.mode == MODE_LAZY:
+            self.logger.debug(f"Lazy feature {feature.name} built in {feature.seconds:.3f}s")
+
+    def _submit_deferred(self, entry: _Feature) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="feature-deferred"
+                )
+            self._executor.submit(self._run_deferred_task, entry)
+
+    def _run_deferred_task(self, entry: _Feature) -> None:
+        entry.status = STATUS_RUNNING
+        try:
+            self._run(entry)
+        except Exception as e:
+            entry.error = e
+            entry.status = STATUS_FAILED
+            self.logger.error(f"Deferred startup task {entry.name} failed: {e}")
+        finally:
+            entry.done.set()
+
+    def _check_requirements(self) -> None:
+        """Reject unknown requirements and requirement loops"""
+        visiting: set[str] = set()
+        checked: set[str] = set()
+
+        def visit(name: str, path: tuple[str, ...]) -> None:
+            if name in checked:
+                return
+            if name in visiting:
+                raise ValueError(f"Feature requirements loop: {' -> '.join((*path, name))}")
+            visiting.add(name)
+            for requirement in self._features[name].requires:
+                if requirement not in self._features:
+                    raise ValueError(f"Feature {name!r} requires unknown feature {requirement!r}")
+                visit(requirement, (*path, name))
+            visiting.discard(name)
+            checked.add(name)
+
+        for name in self._features:
+            visit(name, ())
@@ -0,0 +1,604 @@
+"""
+IVR session runtime
+Drives interactive voice sessions (voicemail menus, auto attendant) as
+event-driven state machines on a single scheduler thread, with a small
+worker pool for the blocking and CPU-heavy steps
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from pbx.utils.logger import get_logger
+
+# Fall this many frames behind the media clock and it resyncs instead of
+# sending a burst to catch up
+MAX_MEDIA_LAG_FRAMES = 5
+
+# Threads for session work that must stay off the scheduler thread
+DEFAULT_WORKERS = 4
+
+EVENT_START = "start"
+EVENT_DIGIT = "digit"
+EVENT_HANGUP = "hangup"
+EVENT_PROMPT_FAILED = "prompt_failed"
+EVENT_PROMPT_LOADED = "prompt_loaded"
+EVENT_WORK_DONE = "work_done"
+
+
+class _Timer:
+    """A named session timer in the runtime's heap"""
+
+    __slots__ = ("cancelled", "deadline", "name", "session")
+
+    def __init__(self, session: "IVRSession", name: str, deadline: float) -> None:
+        self.session = session
+        self.name = name
+        self.deadline = deadline
+        self.cancelled = False
+
+
+class _Prompt:
+    """
+    Audio queued for a session, sent one frame per media tick
+
+    ``frames`` is None while play_later() is still loading the audio.
+    """
+
+    __slots__ = ("frames", "index", "name", "payload_type", "player", "samples_per_packet")
+
+    def __init__(
+        self,
+        name: str,
+        player: Any,
+        frames: list[bytes] | None,
+        payload_type: int,
+        samples_per_packet: int,
+    ) -> None:
+        self.name = name
+        self.player = player
+        self.frames = frames
+        self.payload_type = payload_type
+        self.samples_per_packet = samples_per_packet
+        self.index = 0
+
+
+class IVRSession:
+    """
+    Base class for a call's IVR state machine
+
+    Subclasses override the ``on_*`` hooks. Hooks run on the runtime's
+    scheduler thread one at a time, so session state needs no locking, but a
+    hook must never block: waits are expressed with set_timer(), audio with
+    play() or play_later(), and blocking or CPU-heavy calls with
+    run_in_worker(); the outcome arrives later as another hook call.
+    """
+
+    def __init__(self, call_id: str, call: Any = None) -> None:
+        """
+        Initialize IVR session
+
+        Args:
+            call_id: Call identifier, used to route digits and hangups
+            call: Call object
+        """
+        self.call_id: str = call_id
+        self.call: Any = call
+        self.runtime: IVRRuntime | None = None
+        self.accepting_digits: bool = False
+        self.finished: bool = False
+        self._done = threading.Event()
+        self._timers: dict[str, _Timer] = {}
+        self._prompts: deque[_Prompt] = deque()
+        self._held_digits: list[str] = []
+
+    # ------------------------------------------------------------------
+    # Hooks
+    # ------------------------------------------------------------------
+
+    def on_start(self) -> None:
+        """Called once when the runtime picks up the session"""
+
+    def on_digit(self, digit: str) -> None:
+        """Called for each DTMF digit once the session accepts digits"""
+
+    def on_timer(self, name: str) -> None:
+        """Called when a timer set with set_timer() expires"""
+
+    def on_prompt_done(self, name: str, played: bool) -> None:
+        """Called when a queued prompt finished playing, or failed to"""
+
+    def on_work_done(self, name: str, result: Any, error: Exception | None) -> None:
+        """Called with the outcome of run_in_worker(); result is None if it raised"""
+
+    def on_work_discarded(self, name: str, result: Any, error: Exception | None) -> None:
+        """
+        Called instead of on_work_done() if the session finished meanwhile
+
+        Release anything the work opened. The default logs a failure.
+        """
+        if error is not None:
+            self.runtime.logger.error(f"IVR session {self.call_id} work {name} failed: {error}")
+
+    def on_hangup(self) -> None:
+        """Called when the call was ended elsewhere (e.g. BYE)"""
+        self.finish()
+
+    def on_error(self, error: Exception) -> None:
+        """Called when a hook raised; the session is finished afterwards"""
+
+    def on_finish(self) -> None:
+        """Called once when the session finishes, to release its resources"""
+
+    # ------------------------------------------------------------------
+    # Actions
+    # ------------------------------------------------------------------
+
+    def accept_digits(self) -> None:
+        """
+        Start delivering digits to on_digit()
+
+        Digits that arrived earlier, either while the session was setting up
+        or before it was registered (left on ``call.dtmf_info_queue``), are
+        delivered first, in arrival order.
+        """
+        if self.accepting_digits:
+            return
+        self.accepting_digits = True
+        pending: list[str] = []
+        queue = getattr(self.call, "dtmf_info_queue", None)
+        if isinstance(queue, list) and queue:
+            pending.extend(queue)
+            queue.clear()
+        pending.extend(self._held_digits)
+        self._held_digits.clear()
+        for digit in pending:
+            self.runtime.post(self, EVENT_DIGIT, digit)
+
+    def set_timer(self, name: str, delay: float) -> None:
+        """
+        Start (or restart) a named timer
+
+        Args:
+            name: Timer name passed back to on_timer()
+            delay: Seconds from now
+        """
+        self.cancel_timer(name)
+        timer = _Timer(self, name, self.runtime.clock() + delay)
+        self._timers[name] = timer
+        self.runtime._schedule(timer)
+
+    def cancel_timer(self, name: str) -> None:
+        """Cancel a named timer if it is pending"""
+        timer = self._timers.pop(name, None)
+        if timer:
+            timer.cancelled = True
+
+    def has_timer(self, name: str) -> bool:
+        """Check whether a named timer is pending"""
+        return name in self._timers
+
+    def play(self, name: str, player: Any, audio: str | Path | bytes) -> bool:
+        """
+        Queue a prompt behind any already playing
+
+        Args:
+            name: Prompt name passed back to on_prompt_done()
+            player: RTPPlayer to send the audio through
+            audio: WAV file path or WAV file contents
+
+        Returns:
+            True if the audio was loaded; if not, on_prompt_done() is still
+            called with played=False so the flow can continue
+        """
+        loaded = player.load_prompt(audio)
+        if loaded is None:
+            self.runtime.post(self, EVENT_PROMPT_FAILED, name)
+            return False
+        frames, payload_type, samples_per_packet = loaded
+        self._prompts.append(_Prompt(name, player, frames, payload_type, samples_per_packet))
+        self.runtime._start_media(self)
+        return True
+
+    def play_later(self, name: str, player: Any, audio: Any) -> None:
+        """
+        Queue a prompt whose audio is read and decoded on the worker pool
+
+        The prompt keeps its place in the queue while it loads. If the audio
+        can't be decoded, on_prompt_done() is called with played=False; if
+        loading raises, the session fails as if the calling hook had raised.
+
+        Args:
+            name: Prompt name passed back to on_prompt_done()
+            player: RTPPlayer to send the audio through
+            audio: WAV file path or contents, or a callable producing one
+                (also run on the worker)
+        """
+        prompt = _Prompt(name, player, None, 0, 0)
+        self._prompts.append(prompt)
+
+        def load() -> Any:
+            return player.load_prompt(audio() if callable(audio) else audio)
+
+        self.runtime._submit(self, EVENT_PROMPT_LOADED, prompt, load)
+
+    def run_in_worker(self, name: str, func: Callable[..., Any], *args: Any) -> None:
+        """
+        Run a blocking or CPU-heavy call on the worker pool
+
+        ``func`` must not touch session state; its return value (or
+        exception) comes back through on_work_done() on the scheduler thread.
+
+        Args:
+            name: Work name passed back to on_work_done()
+            func: Callable to run
+            *args: Arguments for func
+        """
+        self.runtime._submit(self, EVENT_WORK_DONE, name, func, *args)
+
+    @property
+    def playing(self) -> str | None:
+        """Name of the prompt currently playing"""
+        return self._prompts[0].name if self._prompts else None
+
+    def stop_prompts(self) -> None:
+        """Stop the current prompt and drop queued ones (barge-in)"""
+        self._prompts.clear()
+
+    def finish(self) -> None:
+        """End the session: cancel its timers and prompts and release resources"""
+        if self.finished:
+            return
+        self.finished = True
+        for timer in self._timers.values():
+            timer.cancelled = True
+        self._timers.clear()
+        self._prompts.clear()
+        try:
+            if self.runtime:
+                self.runtime._remove(self)
+            self.on_finish()
+        finally:
+            self._done.set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Block until the session finishes (for callers outside the runtime)
+
+        Returns:
+            True if the session finished within the timeout
+        """
+        return self._done.wait(timeout)
+
+
+class IVRRuntime:
+    """
+    Single-threaded scheduler for IVR sessions
+
+    Every session shares one thread. Digits wake their session as soon as
+    they are delivered, timers sit in one heap, and a shared media clock
+    sends the next frame of every playing prompt each tick. An idle session
+    costs a dictionary entry, not a thread. Work that would hold up the
+    clock (opening sockets, decoding audio, tone detection, ending calls)
+    runs on a small worker pool and comes back as an event.
+    """
+
+    def __init__(
+        self,
+        frame_ms: int = 20,
+        clock: Callable[[], float] | None = None,
+        threaded: bool = True,
+        workers: int = DEFAULT_WORKERS,
+    ) -> None:
+        """
+        Initialize IVR runtime
+
+        Args:
+            frame_ms: Media clock interval, one RTP packet per prompt per tick
+            clock: Monotonic time source (injectable for tests)
+            threaded: Run the scheduler on its own thread; when False the
+                owner drives it by calling run_pending(), and worker calls
+                run inline so the owner sees their results in order
+            workers: Worker pool size for run_in_worker() and play_later()
+        """
+        self.logger = get_logger()
+        self.frame_interval: float = frame_ms / 1000.0
+        self.clock: Callable[[], float] = clock or time.monotonic
+        self.threaded: bool = threaded
+        self.workers: int = max(1, workers)
+        self.sessions: dict[str, IVRSession] = {}
+        self.running: bool = False
+        self.events_processed: int = 0
+        self.frames_sent: int = 0
+        self._lock = threading.Condition()
+        self._events: deque[tuple[IVRSession, str, Any]] = deque()
+        self._timers: list[tuple[float, int, _Timer]] = []
+        self._timer_seq = itertools.count()
+        self._playing: dict[IVRSession, None] = {}
+        self._next_tick: float | None = None
+        self._thread: threading.Thread | None = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    def start(self) -> None:
+        """Start the scheduler thread if it is not running"""
+        with self._lock:
+            if self.running:
+                return
+            self.running = True
+        if self.threaded:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="ivr-runtime")
+            self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Stop the scheduler and finish any sessions still running"""
+        with self._lock:
+            self.running = False
+            self._lock.notify()
+            executor, self._executor = self._executor, None
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        for session in list(self.sessions.values()):
+            self._dispatch(session, session.finish)
+
+    def add(self, session: IVRSession) -> IVRSession:
+        """
+        Register a session and schedule its on_start()
+
+        Safe to call from any thread. Digits and hangups for the session's
+        call are routed to it from this point on.
+        """
+        session.runtime = self
+        with self._lock:
+            self.sessions[session.call_id] = session
+        self.post(session, EVENT_START)
+        self.start()
+        return session
+
+    def get_session(self, call_id: str) -> IVRSession | None:
+        """Get the running session for a call"""
+        return self.sessions.get(call_id)
+
+    def post(self, session: IVRSession, kind: str, data: Any = None) -> None:
+        """Queue an event for a session and wake the scheduler (thread-safe)"""
+        with self._lock:
+            self._events.append((session, kind, data))
+            self._lock.notify()
+
+    def deliver_digit(self, call_id: str, digit: str) -> bool:
+        """
+        Route a DTMF digit to the call's session (thread-safe)
+
+        Returns:
+            True if a session took the digit, False if the call has none
+        """
+        session = self.sessions.get(call_id)
+        if session is None or session.finished:
+            return False
+        self.post(session, EVENT_DIGIT, digit)
+        return True
+
+    def hangup(self, call_id: str) -> bool:
+        """
+        Tell the call's session that the call has ended (thread-safe)
+
+        Returns:
+            True if the call had a session
+        """
+        session = self.sessions.get(call_id)
+        if session is None or session.finished:
+            return False
+        self.post(session, EVENT_HANGUP)
+        return True
+
+    def next_deadline(self) -> float | None:
+        """Clock time of the next timer or media tick, or None if there is none"""
+        while self._timers and self._timers[0][2].cancelled:
+            heapq.heappop(self._timers)
+        deadlines = [self._timers[0][0]] if self._timers else []
+        if self._next_tick is not None:
+            deadlines.append(self._next_tick)
+        return min(deadlines) if deadlines else None
+
+    def run_pending(self) -> int:
+        """
+        Process queued events, expired timers and due media ticks
+
+        Returns:
+            Number of session hooks run
+        """
+        handled = 0
+        while True:
+            now = self.clock()
+            with self._lock:
+                events, self._events = self._events, deque()
+            for session, kind, data in events:
+                handled += self._deliver(session, kind, data)
+
+            while self._timers and self._timers[0][0] <= now:
+                _, _, timer = heapq.heappop(self._timers)
+                if timer.cancelled:
+                    continue
+                session = timer.session
+                if session._timers.get(timer.name) is timer:
+                    del session._timers[timer.name]
+                handled += self._dispatch(session, session.on_timer, timer.name)
+
+            if self._next_tick is not None and self._next_tick <= now:
+                handled += self._media_tick(now)
+
+            with self._lock:
+                if not self._events:
+                    self.events_processed += handled
+                    return handled
+
+    def get_statistics(self) -> dict[str, Any]:
+        """Get runtime statistics"""
+        return {
+            "active_sessions": len(self.sessions),
+            "playing_prompts": len(self._playing),
+            "pending_timers": sum(1 for _, _, timer in self._timers if not timer.cancelled),
+            "events_processed": self.events_processed,
+            "frames_sent": self.frames_sent,
+        }
+
+    def _run(self) -> None:
+        """Scheduler loop: sleep until the next event, timer or media tick"""
+        while True:
+            with self._lock:
+                if not self.running:
+                    return
+                if not self._events:
+                    deadline = self.next_deadline()
+                    if deadline is None:
+                        self._lock.wait()
+                    else:
+                        delay = deadline - self.clock()
+                        if delay > 0:
+                            self._lock.wait(delay)
+            self.run_pending()
+
+    def _deliver(self, session: IVRSession, kind: str, data: Any) -> int:
+        """Hand a queued event to its session"""
+        if session.finished:
+            if kind == EVENT_WORK_DONE:
+                return self._dispatch(session, session.on_work_discarded, *data)
+            return 0
+        if kind == EVENT_DIGIT:
+            if not session.accepting_digits:
+                session._held_digits.append(data)
+                return 0
+            return self._dispatch(session, session.on_digit, data)
+        if kind == EVENT_START:
+            return self._dispatch(session, session.on_start)
+        if kind == EVENT_HANGUP:
+            return self._dispatch(session, session.on_hangup)
+        if kind == EVENT_PROMPT_FAILED:
+            return self._dispatch(session, session.on_prompt_done, data, False)
+        if kind == EVENT_PROMPT_LOADED:
+            return self._prompt_loaded(session, *data)
+        if kind == EVENT_WORK_DONE:
+            return self._dispatch(session, session.on_work_done, *data)
+        return 0
+
+    def _dispatch(self, session: IVRSession, hook: Callable[..., Any], *args: Any) -> int:
+        """Run a session hook; a failing hook finishes its session, not the runtime"""
+        try:
+            hook(*args)
+        except Exception as e:
+            self.logger.error(f"IVR session {session.call_id} failed in {hook.__name__}: {e}")
+            if not session.finished:
+                try:
+                    session.on_error(e)
+                except Exception as exc:
+                    self.logger.error(f"IVR session {session.call_id} error handler failed: {exc}")
+                try:
+                    session.finish()
+                except Exception as exc:
+                    self.logger.error(f"IVR session {session.call_id} cleanup failed: {exc}")
+        return 1
+
+    def _schedule(self, timer: _Timer) -> None:
+        """Add a timer to the heap (scheduler thread only)"""
+        heapq.heappush(self._timers, (timer.deadline, next(self._timer_seq), timer))
+
+    def _submit(
+        self, session: IVRSession, kind: str, key: Any, func: Callable[..., Any], *args: Any
+    ) -> None:
+        """Run func off the scheduler thread and post (key, result, error) back"""
+
+        def work() -> None:
+            try:
+                result, error = func(*args), None
+            except Exception as e:
+                result, error = None, e
+            self.post(session, kind, (key, result, error))
+
+        if not self.threaded:
+            work()
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="ivr-worker"
+                )
+            executor = self._executor
+        executor.submit(work)
+
+    def _prompt_loaded(
+        self, session: IVRSession, prompt: _Prompt, loaded: Any, error: Exception | None
+    ) -> int:
+        """Fill in a prompt queued by play_later(), or drop it if it failed to load"""
+        if not any(queued is prompt for queued in session._prompts):
+            return 0  # Stopped while loading
+        if loaded is None:
+            session._prompts.remove(prompt)
+            if session._prompts and session._prompts[0].frames is not None:
+                self._start_media(session)
+            if error is not None:
+                # Fails the session like an exception in the hook that queued it
+                def play_later() -> None:
+                    raise error
+
+                return self._dispatch(session, play_later)
+            return self._dispatch(session, session.on_prompt_done, prompt.name, False)
+        prompt.frames, prompt.payload_type, prompt.samples_per_packet = loaded
+        if session._prompts[0] is prompt:
+            self._start_media(session)
+        return 0
+
+    def _start_media(self, session: IVRSession) -> None:
+        """Put a session on the media clock"""
+        self._playing[session] = None
+        if self._next_tick is None:
+            self._next_tick = self.clock()
+
+    def _remove(self, session: IVRSession) -> None:
+        """Unregister a finished session"""
+        with self._lock:
+            if self.sessions.get(session.call_id) is session:
+                del self.sessions[session.call_id]
+        self._playing.pop(session, None)
+
+    def _media_tick(self, now: float) -> int:
+        """Send the next frame of every playing prompt"""
+        handled = 0
+        while self._next_tick is not None and self._next_tick <= now:
+            for session in list(self._playing):
+                handled += self._send_frame(session)
+            if not self._playing:
+                self._next_tick = None
+            elif now - self._next_tick > MAX_MEDIA_LAG_FRAMES * self.frame_interval:
+                self._next_tick = now + self.frame_interval
+            else:
+                self._next_tick += self.frame_interval
+        return handled
+
+    def _send_frame(self, session: IVRSession) -> int:
+        """Send one frame of a session's current prompt"""
+        if session.finished or not session._prompts or session._prompts[0].frames is None:
+            # Nothing to send until the next prompt has loaded
+            self._playing.pop(session, None)
+            return 0
+        prompt = session._prompts[0]
+        played = True
+        if prompt.index < len(prompt.frames):
+            played = prompt.player.send_frame(
+                prompt.frames[prompt.index], prompt.payload_type, prompt.samples_per_packet
+            )
+            prompt.index += 1
+            self.frames_sent += 1
+            if played and prompt.index < len(prompt.frames):
+                return 0
+        session._prompts.popleft()
+        if not session._prompts or session._prompts[0].frames is None:
+            self._playing.pop(session, None)
+        return self._dispatch(session, session.on_prompt_done, prompt.name, played)
@@ -14,16 +14,21 @@
 from pbx.core.auto_attendant_handler import AutoAttendantHandler
 from pbx.core.call import CallManager
 from pbx.core.call_router import CallRouter
+from pbx.core.conference_handler import ConferenceHandler
 from pbx.core.emergency_handler import EmergencyHandler
+from pbx.core.event_bus import LiveEventBus
 from pbx.core.feature_initializer import FeatureInitializer
+from pbx.core.ivr_runtime import IVRRuntime
 from pbx.core.paging_handler import PagingHandler
 from pbx.core.voicemail_handler import VoicemailHandler
 from pbx.features.extensions import ExtensionRegistry
 from pbx.features.webhooks import WebhookEvent
 from pbx.rtp.handler import RTPRelay
+from pbx.sip.flood_shield import SIPFloodShield
 from pbx.sip.server import SIPServer
 from pbx.utils.config import Config
 from pbx.utils.database import DatabaseBackend, RegisteredPhonesDB
+from pbx.utils.dns_resolver import get_dns_resolver
 from pbx.utils.logger import PBXLogger, get_logger
 
 
@@ -46,6 +51,8 @@ def __init__(self, config_file: str = "config.yml") -> None:
             log_level=log_config.get("level", "INFO"),
             log_file=log_config.get("file", "logs/pbx.log"),
             console=log_config.get("console", True),
+            async_logging=log_config.get("async", True),
+            queue_size=log_config.get("queue_size", 10000),
         )
         self.logger = get_logger()
 
@@ -94,7 +101,11 @@ def __init__(self, config_file: str = "config.yml") -> None:
         self.extension_registry = ExtensionRegistry(
             self.config, database=self.database if self.database.enabled else None
         )
-        self.call_manager = CallManager()
+
+        # Live state changes for the admin dashboard event stream
+        self.event_bus = LiveEventBus(self.config.get("api.live_events.history_size", 1000))
+        self.extension_registry.event_bus = self.event_bus
+        self.call_manager = CallManager(event_bus=self.event_bus)
 
         # Initialize QoS monitoring system first (needed by RTP relay)
         from pbx.features.qos_monitoring import QoSMonitor
@@ -105,17 +116,47 @@ def __init__(self, config_file: str = "config.yml") -> None:
             self.config.get("server.rtp_port_range_start", 10000),
             self.config.get("server.rtp_port_range_end", 20000),
             qos_monitor=self.qos_monitor,
+            call_manager=self.call_manager,
+            prebind=self.config.get("rtp.port_pool.prebind", 16),
+            quarantine_seconds=self.config.get("rtp.port_pool.quarantine_seconds", 2.0),
+            leak_check_interval=self.config.get("rtp.port_pool.leak_check_interval", 60),
         )
 
         # Initialize SIP server
+        flood_shield = None
+        if self.config.get("sip.flood_shield.enabled", True):
+            flood_shield = SIPFloodShield(self.config.get("sip.flood_shield", {}))
         self.sip_server = SIPServer(
             host=self.config.get("server.sip_host", "0.0.0.0"),  # nosec B104 - SIP server needs to bind to all interfaces
             port=self.config.get("server.sip_port", 5060),
             pbx_core=self,
+            flood_shield=flood_shield,
         )
 
         # Initialize all feature subsystems via FeatureInitializer
         FeatureInitializer.initialize(self)
+        if flood_shield:
+            # Blocks from failed auth and the API are enforced before parsing
+            flood_shield.threat_detector = getattr(self, "threat_detector", None)
+            # Trunks and SBC peers are trusted at whatever address they resolve to
+            flood_shield.peer_hosts = self._flood_shield_peer_hosts
+            flood_shield.resolver = get_dns_resolver(self.config)
+            self.config.subscribe(
+                lambda _changed, snapshot: flood_shield.configure(
+                    snapshot.get_dict("sip.flood_shield")
+                ),
+                prefix="sip.flood_shield",
+            )
+            self.config.subscribe(
+                lambda _changed, _snapshot: flood_shield.refresh_peers(),
+                prefix="integrations.teams",
+            )
+        if getattr(self, "threat_detector", None):
+            self.config.subscribe(
+                lambda _changed, _snapshot: self.threat_detector.reload_settings(),
+                prefix="security.threat_detection",
+            )
+        self._register_live_state()
 
         # Initialize Prometheus metrics exporter
         self.metrics_exporter = None
@@ -138,17 +179,29 @@ def __init__(self, config_file: str = "config.yml") -> None:
 
         self.api_server = PBXFlaskServer(self, api_host, api_port)
 
+        # Voicemail and auto attendant menus share one event-driven scheduler
+        self.ivr_runtime = IVRRuntime()
+
         # Initialize handler classes for delegated functionality
         self._call_router = CallRouter(self)
         self._voicemail_handler = VoicemailHandler(self)
         self._auto_attendant_handler = AutoAttendantHandler(self)
         self._emergency_handler = EmergencyHandler(self)
         self._paging_handler = PagingHandler(self)
+        self._conference_handler = ConferenceHandler(self)
 
         self.running = False
 
         self.logger.info("PBX Core initialized with all features")
 
+    def __getattr__(self, name: str) -> Any:
+        """Build a lazily initialized feature the first time it is used"""
+        # Only called for attributes that aren't set yet
+        registry = self.__dict__.get("feature_registry")
+        if registry is not None and registry.resolve(name) and name in self.__dict__:
+            return self.__dict__[name]
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
     def _log_startup(self, message: str, level: str = "info") -> None:
         """
         Log a startup message, respecting quiet_startup setting
@@ -339,6 +392,7 @@ def _metrics_collection_loop(self) -> None:
                     self.extension_registry.get_registered_count()
                 )
                 self.metrics_exporter.active_calls.set(len(self.call_manager.get_active_calls()))
+                self.metrics_exporter.update_logging_metrics(PBXLogger().get_stats())
 
                 if hasattr(self, "conference_system") and self.conference_system:
                     self.metrics_exporter.conferences_active.set(
@@ -373,6 +427,47 @@ def _load_provisioning_devices(self) -> None:
                 except Exception as e:
                     self.logger.error(f"Failed to load provisioning device {mac}: {e}")
 
+    def _flood_shield_peer_hosts(self) -> list[str]:
+        """Hosts of configured SIP trunks and SBC peers, for the flood shield"""
+        hosts = []
+        trunk_system = getattr(self, "trunk_system", None)
+        if trunk_system:
+            hosts.extend(trunk.host for trunk in list(trunk_system.trunks.values()))
+        sbc_fqdn = self.config.get("integrations.teams.sbc_fqdn")
+        if sbc_fqdn:
+            hosts.append(sbc_fqdn)
+        return hosts
+
+    def _register_live_state(self) -> None:
+        """Wire feature subsystems into the live event bus and its snapshots"""
+        if hasattr(self, "queue_system"):
+            self.queue_system.event_bus = self.event_bus
+
+        self.event_bus.register_snapshot_provider(
+            "calls",
+            lambda: [
+                CallManager.summarize_call(call) for call in self.call_manager.get_active_calls()
+            ],
+        )
+        self.event_bus.register_snapshot_provider(
+            "registrations",
+            lambda: [
+                {
+                    "extension": ext.number,
+                    "name": ext.name,
+                    "address": list(ext.address) if ext.address else None,
+                }
+                for ext in self.extension_registry.get_registered()
+            ],
+        )
+        self.event_bus.register_snapshot_provider(
+            "queues",
+            lambda: self.queue_system.get_all_status() if hasattr(self, "queue_system") else [],
+        )
+        self.event_bus.register_snapshot_provider(
+            "qos_alerts", lambda: self.qos_monitor.get_alerts(limit=50)
+        )
+
     def start(self) -> bool:
         """Start PBX system"""
         self.logger.info("Starting PBX system...")
@@ -385,6 +480,9 @@ def start(self) -> bool:
                 return False
             self.logger.info("✓ Security requirements verified")
 
+        # Pre-bind RTP sockets and watch for leaked ports
+        self.rtp_relay.start()
+
         # Start SIP server
         if not self.sip_server.start():
             self.logger.error("Failed to start SIP server")
@@ -414,6 +512,14 @@ def start(self) -> bool:
         # Start registration expiry sweep
         self._start_registration_expiry_timer()
 
+        # Pick up config.yml edits (routing, codecs, security) without a restart
+        if self.config.get("server.config_hot_reload", True):
+            self.config.watch(self.config.get("server.config_reload_interval", 2.0))
+
+        # Directory sync and other non-critical startup work waited for SIP
+        if getattr(self, "feature_registry", None):
+            self.feature_registry.run_deferred()
+
         self.logger.info("PBX system started successfully")
         return True
 
@@ -443,10 +549,16 @@ def stop(self) -> None:
         self.logger.info("Stopping PBX system...")
         self.running = False
 
+        # Release dashboards waiting on the live event stream
+        if hasattr(self, "event_bus"):
+            self.event_bus.close()
+
         # Stop registration expiry timer
         if hasattr(self, "_reg_expiry_timer") and self._reg_expiry_timer:
             self._reg_expiry_timer.cancel()
 
+        self.config.stop_watching()
+
         # Stop Prometheus metrics collector
         self._stop_metrics_collector()
 
@@ -454,20 +566,47 @@ def stop(self) -> None:
         if hasattr(self, "security_monitor"):
             self.security_monitor.stop()
 
+        # Stop blocklist sync
+        if getattr(self, "threat_detector", None):
+            self.threat_detector.stop_blocklist_sync()
+
         # Stop DND scheduler
         if self.dnd_scheduler:
             self.dnd_scheduler.stop()
 
+        # Write QoS metrics still waiting for the batch writer
+        if getattr(self, "qos_monitor", None):
+            self.qos_monitor.stop()
+
+        # Keep fraud detection counters across the restart
+        if getattr(self, "fraud_detection", None):
+            self.fraud_detection.stop()
+
+        # Drop deferred startup work that hasn't run yet
+        if getattr(self, "feature_registry", None):
+            self.feature_registry.shutdown()
+
+        # Stop scheduled Active Directory syncs
+        if getattr(self, "ad_integration", None):
+            self.ad_integration.stop_background_sync()
+
         # Stop API server
         self.api_server.stop()
 
         # Stop SIP server
         self.sip_server.stop()
 
+        # Stop IVR sessions and release their media
+        if getattr(self, "ivr_runtime", None):
+            self.ivr_runtime.stop()
+
         # End all active calls with full cleanup (CDR, voicemail, timers, RTP)
         for call in self.call_manager.get_active_calls():
             self.end_call(call.call_id)
 
+        # Close pre-bound RTP sockets
+        self.rtp_relay.stop()
+
         self.logger.info("PBX system stopped")
 
     def _extract_contact_address(
@@ -518,6 +657,7 @@ def register_extension(
         user_agent: str | None = None,
         contact: str | None = None,
         expires: int = 3600,
+        call_id: str | None = None,
     ) -> bool:
         """
         Register extension and store phone information
@@ -528,6 +668,7 @@ def register_extension(
             user_agent: User-Agent header from SIP REGISTER
             contact: Contact header from SIP REGISTER
             expires: Registration lifetime in seconds (from SIP Expires header)
+            call_id: Call-ID header from SIP REGISTER
 
         Returns:
             True if registration successful
@@ -581,7 +722,7 @@ def register_extension(
                     # This is more reliable than UDP source address
                     registered_addr = self._extract_contact_address(contact, addr)
                     self.extension_registry.register(
-                        extension_number, registered_addr, expires=expires
+                        extension_number, registered_addr, expires=expires, call_id=call_id
                     )
                     self.logger.info(
                         f"Extension {extension_number} registered from {registered_addr}"
@@ -1059,6 +1200,29 @@ def _get_server_ip(self) -> str:
         except OSError:
             return "127.0.0.1"  # Last resort fallback
 
+    def _start_live_transcription(self, call: Any) -> None:
+        """
+        Feed a connected call's relayed audio to speech analytics
+
+        Only calls where the caller or callee extension has transcription
+        enabled are tapped. end_call() flushes the transcript.
+
+        Args:
+            call: Call whose RTP relay is now connected
+        """
+        speech_analytics = getattr(self, "speech_analytics", None)
+        if not speech_analytics or not speech_analytics.wants_transcription(
+            call.from_extension, call.to_extension
+        ):
+            return
+        tap = speech_analytics.tap_call(call.call_id)
+        if tap is None:
+            return
+        if self.rtp_relay.add_audio_tap(call.call_id, tap):
+            self.logger.info(f"Live transcription started for call {call.call_id}")
+        else:
+            speech_analytics.end_call(call.call_id)
+
     def handle_callee_answer(
         self, call_id: str, response_message: Any, callee_addr: tuple[str, int]
     ) -> None:
@@ -1155,6 +1319,7 @@ def handle_callee_answer(
             # relay
             self.rtp_relay.set_endpoints(call_id, caller_endpoint, callee_endpoint)
             self.logger.info(f"RTP relay connected for call {call_id}")
+            self._start_live_transcription(call)
 
         # Mark call as connected
         call.connect()
@@ -1311,9 +1476,28 @@ def end_call(self, call_id: str) -> None:
                     direction=getattr(call, "direction", "inbound"),
                 )
 
+            # Leave a mixed conference before the relay feeding it goes away
+            if call.conference_room:
+                self._conference_handler.leave_conference(call)
+
             self.call_manager.end_call(call_id)
             self.rtp_relay.release_relay(call_id)
 
+            # Let a voicemail or auto attendant menu on this call wind down
+            if getattr(self, "ivr_runtime", None):
+                self.ivr_runtime.hangup(call_id)
+
+            # Flush live transcription and free the call's recognizer. Flushing
+            # waits for queued audio, so it runs off the signaling thread.
+            speech_analytics = getattr(self, "speech_analytics", None)
+            if speech_analytics and speech_analytics.has_call(call_id):
+                threading.Thread(
+                    target=speech_analytics.end_call,
+                    args=(call_id,),
+                    name="speech-end-call",
+                    daemon=True,
+                ).start()
+
             # End CDR record for analytics
             self.cdr_system.end_record(call_id, hangup_cause="normal_clearing")
 
@@ -1329,9 +1513,10 @@ def handle_dtmf_info(self, call_id: str, dtmf_digit: str) -> None:
             dtmf_digit: DTMF digit ('0'-'9', '*', '#', 'A'-'D')
 
         Note:
-            IVR loops (voicemail_handler, auto_attendant_handler) check
-            call.dtmf_info_queue for queued SIP INFO digits and fall back
-            to in-band DTMF detection when the queue is empty.
+            Digits for a call with a running IVR session (voicemail,
+            auto-attendant) wake that session immediately. Otherwise they
+            are queued on call.dtmf_info_queue, which a session drains when
+            it starts accepting input.
         """
         call = self.call_manager.get_call(call_id)
         if not call:
@@ -1340,6 +1525,13 @@ def handle_dtmf_info(self, call_id: str, dtmf_digit: str) -> None:
             self.logger.debug(f"Received DTMF INFO for ended/unknown call {call_id} - ignoring")
             return
 
+        ivr_runtime = getattr(self, "ivr_runtime", None)
+        if ivr_runtime and ivr_runtime.deliver_digit(call_id, dtmf_digit):
+            self.logger.info(
+                f"Delivered DTMF '{dtmf_digit}' from SIP INFO to IVR session on call {call_id}"
+            )
+            return
+
         # Create DTMF queue if it doesn't exist
         if not hasattr(call, "dtmf_info_queue"):
             call.dtmf_info_queue = []
@@ -1514,9 +1706,7 @@ def blind_transfer(self, call_id: str, destination: str) -> bool:
 
         # Transfer RTP relay ownership from old call to new call before ending
         # the old call (end_call releases the relay, which would kill audio)
-        relay_info = self.rtp_relay.active_relays.pop(call_id, None)
-        if relay_info:
-            self.rtp_relay.active_relays[new_call_id] = relay_info
+        self.rtp_relay.transfer_relay(call_id, new_call_id)
 
         # Send BYE to the transferring party (the party that initiated transfer)
         if call.callee_addr:
@@ -1792,10 +1982,6 @@ def _handle_no_answer(self, call_id: str) -> None:
         """Handle no-answer timeout - route call to voicemail"""
         return self._call_router._handle_no_answer(call_id)
 
-    def _monitor_voicemail_dtmf(self, call_id: str, call: Any, recorder: Any) -> None:
-        """Monitor for DTMF # key press during voicemail recording"""
-        return self._voicemail_handler.monitor_voicemail_dtmf(call_id, call, recorder)
-
     def _complete_voicemail_recording(self, call_id: str) -> None:
         """Complete voicemail recording and save the message"""
         return self._voicemail_handler.complete_voicemail_recording(call_id)
@@ -1808,8 +1994,8 @@ def _handle_auto_attendant(
             from_ext, to_ext, call_id, message, from_addr
         )
 
-    def _auto_attendant_session(self, call_id: str, call: Any, session: Any) -> None:
-        """Handle auto attendant session with menu and DTMF input"""
+    def _auto_attendant_session(self, call_id: str, call: Any, session: Any) -> Any:
+        """Start the auto attendant menu for a call on the IVR runtime"""
         return self._auto_attendant_handler._auto_attendant_session(call_id, call, session)
 
     def _handle_voicemail_access(
@@ -1834,14 +2020,14 @@ def _paging_session(
 
     def _playback_voicemails(
         self, call_id: str, call: Any, mailbox: Any, messages: list[dict[str, Any]]
-    ) -> None:
-        """Play voicemail messages to caller"""
+    ) -> Any:
+        """Play voicemail messages to caller on the IVR runtime"""
         return self._voicemail_handler._playback_voicemails(call_id, call, mailbox, messages)
 
     def _voicemail_ivr_session(
         self, call_id: str, call: Any, mailbox: Any, voicemail_ivr: Any
-    ) -> None:
-        """Interactive voicemail management session with IVR menu"""
+    ) -> Any:
+        """Start the interactive voicemail menu for a call on the IVR runtime"""
         return self._voicemail_handler._voicemail_ivr_session(call_id, call, mailbox, voicemail_ivr)
 
     def _handle_emergency_call(
@@ -1941,7 +2127,13 @@ def get_status(self) -> dict[str, Any]:
             "active_recordings": len(self.recording_system.active_recordings),
             "active_conferences": len(self.conference_system.get_active_rooms()),
             "parked_calls": len(self.parking_system.get_parked_calls()),
-            "queued_calls": sum(len(q.queue) for q in self.queue_system.queues.values()),
+            "queued_calls": sum(q.calls_waiting for q in self.queue_system.queues.values()),
+            "rtp_ports": self.rtp_relay.port_pool.get_statistics(),
+            "sip_flood_shield": (
+                self.sip_server.flood_shield.get_statistics()
+                if self.sip_server.flood_shield
+                else None
+            ),
         }
 
     def get_ad_integration_status(self) -> dict[str, Any]:
@@ -1984,13 +2176,18 @@ def get_ad_integration_status(self) -> dict[str, Any]:
             "connected": connected,
             "auto_provision": self.ad_integration.auto_provision,
             "server": self.ad_integration.ldap_server,
+            "last_sync": getattr(self.ad_integration, "last_sync_summary", None),
             "synced_users": synced_count,
             "error": error,
         }
 
-    def sync_ad_users(self) -> dict[str, Any]:
+    def sync_ad_users(self, full: bool = False) -> dict[str, Any]:
         """
-        Manually trigger Active Directory user synchronization
+        Trigger Active Directory user synchronization
+
+        Args:
+            full: Resync every user instead of only those changed since the
+                last sync
 
         Returns:
             dict: Sync results with count and status
@@ -2010,26 +2207,30 @@ def sync_ad_users(self) -> dict[str, Any]:
             }
 
         try:
-            self.logger.info("Manual AD user sync triggered")
+            self.logger.info(f"AD user sync triggered{' (full resync)' if full else ''}")
             sync_result = self.ad_integration.sync_users(
                 extension_registry=self.extension_registry,
                 extension_db=self.extension_db,
                 phone_provisioning=(
                     self.phone_provisioning if hasattr(self, "phone_provisioning") else None
                 ),
+                full=full,
             )
 
             # Handle both old (int) and new (dict) return types for backward
             # compatibility
+            summary = None
             if isinstance(sync_result, int):
                 synced_count = sync_result
                 extensions_to_reboot = []
             else:
                 synced_count = sync_result.get("synced_count", 0)
                 extensions_to_reboot = sync_result.get("extensions_to_reboot", [])
+                summary = sync_result.get("summary")
 
-            # Reload extensions after sync
-            self.extension_registry.reload()
+            # Reload extensions after sync, unless it found nothing to change
+            if not summary or synced_count or summary.get("deactivated"):
+                self.extension_registry.reload()
 
             # Automatically sync phone book from AD if enabled
             phone_book_synced = 0
@@ -2047,35 +2248,39 @@ def sync_ad_users(self) -> dict[str, Any]:
                     f"Phone book synced {phone_book_synced} entries from Active Directory"
                 )
 
-            # Automatically trigger phone reboots for updated extensions
+            # Reboot phones of updated extensions in paced waves, so a large
+            # sync doesn't have every phone re-provision at once. The rollout
+            # runs in the background: rebooted_count is what it has confirmed
+            # re-registered so far, reboot_scheduled_count what was queued.
             rebooted_count = 0
+            reboot_scheduled_count = 0
+            reboot_rollout_id = None
             if (
                 extensions_to_reboot
                 and hasattr(self, "phone_provisioning")
                 and self.phone_provisioning
             ):
                 self.logger.info(
-                    f"Auto-provisioning: Automatically rebooting {len(extensions_to_reboot)} phones after AD sync"
+                    f"Auto-provisioning: Scheduling staggered reboot of {len(extensions_to_reboot)} phones after AD sync"
                 )
-                for extension_number in extensions_to_reboot:
-                    try:
-                        if self.phone_provisioning.reboot_phone(extension_number, self.sip_server):
-                            rebooted_count += 1
-                    except Exception as reboot_error:
-                        self.logger.warning(
-                            f"Could not reboot phone for extension {extension_number}: {reboot_error}"
-                        )
-
-                if rebooted_count > 0:
-                    self.logger.info(
-                        f"Auto-provisioning: Successfully triggered reboot for {rebooted_count} phones"
+                try:
+                    rollout = self.phone_provisioning.schedule_reboots(
+                        self.sip_server, extensions_to_reboot, reason="ad_sync"
                     )
+                    rebooted_count = rollout.get("counts", {}).get("reregistered", 0)
+                    reboot_scheduled_count = len(extensions_to_reboot)
+                    reboot_rollout_id = rollout["rollout_id"]
+                except Exception as reboot_error:
+                    self.logger.warning(f"Could not schedule phone reboots: {reboot_error}")
 
             return {
                 "success": True,
                 "synced_count": synced_count,
                 "rebooted_count": rebooted_count,
+                "reboot_scheduled_count": reboot_scheduled_count,
+                "reboot_rollout_id": reboot_rollout_id,
                 "phone_book_synced": phone_book_synced,
+                "summary": summary,
                 "error": None,
             }
         except Exception as e:
@@ -2088,5 +2293,6 @@ def sync_ad_users(self) -> dict[str, Any]:
                 "error": str(e),
                 "synced_count": 0,
                 "rebooted_count": 0,
+                "reboot_scheduled_count": 0,
                 "phone_book_synced": 0,
             }
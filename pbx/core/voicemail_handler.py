@@ -4,16 +4,55 @@
 Extracts voicemail IVR logic from PBXCore into a dedicated class,
 including voicemail access, message playback, IVR session management,
 DTMF monitoring during recording, and voicemail recording completion.
+IVR sessions run as event-driven state machines on the shared IVR runtime.
 """
 
-import contextlib
+import functools
 import struct
-import threading
-import time
 import traceback
 from pathlib import Path
 from typing import Any
 
+from pbx.core.call import CallState
+from pbx.core.ivr_runtime import IVRSession
+
+# Pauses in the menu flow (seconds)
+RTP_SETTLE_DELAY = 0.5
+POST_PROMPT_PAUSE = 0.5
+RECORD_START_PAUSE = 0.2
+REVIEW_PAUSE = 0.5
+GOODBYE_PAUSE = 1.0
+FAILED_SETUP_HANGUP_DELAY = 2.0
+INACTIVITY_TIMEOUT = 60
+MAX_GREETING_SECONDS = 120
+
+# Message playback pauses (seconds)
+NO_MESSAGES_PAUSE = 2.0
+BETWEEN_MESSAGES_PAUSE = 1.0
+MESSAGE_BEEP_PAUSE = 0.5
+
+# Pause between the mailbox greeting and the record beep (seconds)
+GREETING_BEEP_PAUSE = 0.3
+
+# In-band DTMF detection over the caller's recent audio
+INBAND_SCAN_INTERVAL = 0.1
+DTMF_DETECTION_PACKETS = 40  # 40 packets * 20ms = 0.8s of audio
+MIN_AUDIO_BYTES_FOR_DTMF = 1600
+DTMF_DEBOUNCE_SECONDS = 0.5  # Ignore same digit within 500ms
+
+# IVR actions that need a live call
+MEDIA_ACTIONS = frozenset(
+    {"play_message", "play_prompt", "hangup", "start_recording", "play_greeting"}
+)
+
+
+def _tone_wav(frequency: int, duration_ms: int) -> bytes:
+    """Build a WAV file holding a single tone, for playback as a prompt"""
+    from pbx.utils.audio import build_wav_header, generate_beep_tone
+
+    pcm_data = generate_beep_tone(frequency, duration_ms, sample_rate=8000)
+    return build_wav_header(len(pcm_data), sample_rate=8000) + pcm_data
+
 
 class VoicemailHandler:
     """Handles voicemail access, IVR sessions, message playback, and recording"""
@@ -226,15 +265,10 @@ def handle_voicemail_access(
             f"[VM Access] ✓ Mailbox status: {len(unread)} unread, {len(messages)} total messages"
         )
 
-        # Start IVR-based voicemail management
-        # This runs in a separate thread so it doesn't block
-        pbx.logger.info("[VM Access] Step 11: Starting IVR session thread")
-        playback_thread = threading.Thread(
-            target=self._voicemail_ivr_session, args=(call_id, call, mailbox, voicemail_ivr)
-        )
-        playback_thread.daemon = True
-        playback_thread.start()
-        pbx.logger.info("[VM Access] ✓ IVR session thread started (daemon)")
+        # Start IVR-based voicemail management on the shared IVR runtime
+        pbx.logger.info("[VM Access] Step 11: Starting IVR session")
+        self._voicemail_ivr_session(call_id, call, mailbox, voicemail_ivr)
+        pbx.logger.info("[VM Access] ✓ IVR session started")
 
         pbx.logger.info("=" * 70)
         pbx.logger.info("VOICEMAIL ACCESS SETUP COMPLETE")
@@ -252,777 +286,70 @@ def _playback_voicemails(
         call: Any,
         mailbox: Any,
         messages: list[dict[str, Any]],
-    ) -> None:
+    ) -> "VoicemailPlaybackSession":
         """
-        Play voicemail messages to caller
+        Play voicemail messages to caller on the shared IVR runtime
+
+        Returns immediately; the messages play as events on the runtime's
+        scheduler thread and the call is ended after the last one.
 
         Args:
             call_id: Call identifier
             call: Call object
             mailbox: VoicemailBox object
             messages: list of message dictionaries
-        """
-        from pbx.rtp.handler import RTPPlayer
-
-        pbx = self.pbx_core
-
-        try:
-            # Wait a moment for RTP to stabilize
-            time.sleep(0.5)
-
-            # Create RTP player to send audio to caller
-            if not call.caller_rtp:
-                pbx.logger.warning(f"No caller RTP info for voicemail playback {call_id}")
-                # End call after short delay
-                time.sleep(2)
-                pbx.end_call(call_id)
-                return
 
-            # Stop the RTP relay handler so its socket is released and the
-            # voicemail player can bind to the same port.  allocate_relay()
-            # starts a relay handler, but voicemail playback is a direct
-            # PBX-to-phone interaction that doesn't need relaying.
-            relay_info = pbx.rtp_relay.active_relays.get(call_id)
-            if relay_info:
-                relay_info["handler"].stop()
-                pbx.logger.info(
-                    f"Stopped RTP relay handler for voicemail playback on call {call_id}"
-                )
-
-            # Use the same port as allocated for the call for proper RTP
-            # communication
-            player = RTPPlayer(
-                local_port=call.rtp_ports[0],
-                remote_host=call.caller_rtp["address"],
-                remote_port=call.caller_rtp["port"],
-                call_id=call_id,
-            )
-
-            if not player.start():
-                pbx.logger.error(f"Failed to start RTP player for voicemail playback {call_id}")
-                time.sleep(2)
-                pbx.end_call(call_id)
-                return
-
-            try:
-                # Play each voicemail message
-                if not messages:
-                    # No messages - play short beep and hang up
-                    pbx.logger.info(f"No voicemail messages for {call.voicemail_extension}")
-                    player.play_beep(frequency=400, duration_ms=500)
-                    time.sleep(2)
-                else:
-                    # Play messages
-                    pbx.logger.info(
-                        f"Playing {len(messages)} voicemail messages for {call.voicemail_extension}"
-                    )
-
-                    for idx, message in enumerate(messages):
-                        # Play a beep between messages
-                        if idx > 0:
-                            time.sleep(0.5)
-                            player.play_beep(frequency=800, duration_ms=300)
-                            time.sleep(0.5)
-
-                        # Play the voicemail message
-                        file_path: str = message["file_path"]
-                        pbx.logger.info(f"Playing voicemail {idx + 1}/{len(messages)}: {file_path}")
-
-                        if player.play_file(file_path):
-                            # Mark message as listened
-                            mailbox.mark_listened(message["id"])
-                            pbx.logger.info(f"Marked voicemail {message['id']} as listened")
-                        else:
-                            pbx.logger.warning(f"Failed to play voicemail: {file_path}")
-
-                        # Pause between messages
-                        time.sleep(1)
-
-                    pbx.logger.info(
-                        f"Finished playing all voicemails for {call.voicemail_extension}"
-                    )
-                    time.sleep(1)
-
-            finally:
-                player.stop()
-
-            # End the call after playback
-            pbx.end_call(call_id)
-
-        except (KeyError, TypeError, ValueError) as e:
-            pbx.logger.error(f"Error in voicemail playback: {e}")
-            traceback.print_exc()
-            # Ensure call is ended even if there's an error
-            try:
-                pbx.end_call(call_id)
-            except Exception as e:
-                pbx.logger.error(f"Error ending call during cleanup: {e}")
+        Returns:
+            The running session
+        """
+        session = VoicemailPlaybackSession(self.pbx_core, call_id, call, mailbox, messages)
+        self.pbx_core.ivr_runtime.add(session)
+        return session
 
     def _voicemail_ivr_session(
         self, call_id: str, call: Any, mailbox: Any, voicemail_ivr: Any
-    ) -> None:
+    ) -> "VoicemailIVRSession":
         """
-        Interactive voicemail management session with IVR menu
+        Start the interactive voicemail menu for a call on the shared IVR runtime
+
+        Returns immediately; the menu runs as events on the runtime's
+        scheduler thread.
 
         Args:
             call_id: Call identifier
             call: Call object
             mailbox: VoicemailBox object
             voicemail_ivr: VoicemailIVR object
-        """
-        import tempfile
-
-        from pbx.core.call import CallState
-        from pbx.rtp.handler import RTPPlayer, RTPRecorder
-        from pbx.utils.audio import get_prompt_audio
-        from pbx.utils.dtmf import DTMFDetector
-
-        pbx = self.pbx_core
 
-        pbx.logger.info("")
-        pbx.logger.info(f"{'=' * 70}")
-        pbx.logger.info("VOICEMAIL IVR SESSION STARTING")
-        pbx.logger.info(f"  Call ID: {call_id}")
-        pbx.logger.info(f"  Extension: {call.voicemail_extension}")
-        pbx.logger.info(f"  Call State: {call.state}")
-        pbx.logger.info(f"{'=' * 70}")
-
-        try:
-            # Wait a moment for RTP to stabilize
-            pbx.logger.info("[VM IVR] Waiting 0.5s for RTP to stabilize...")
-            time.sleep(0.5)
-
-            # Check if call was terminated during RTP stabilization
-            if call.state == CallState.ENDED:
-                pbx.logger.info("")
-                pbx.logger.info("[VM IVR] ✗ call ended before IVR could start")
-                pbx.logger.info(f"[VM IVR] Extension: {call.voicemail_extension}")
-                pbx.logger.info(f"[VM IVR] State: {call.state}")
-                pbx.logger.info("[VM IVR] Exiting IVR session")
-                pbx.logger.info("")
-                return
-
-            pbx.logger.info("[VM IVR] Checking caller RTP information...")
-            if not call.caller_rtp:
-                pbx.logger.warning("[VM IVR] ✗ No caller RTP info available - cannot proceed")
-                time.sleep(2)
-                pbx.end_call(call_id)
-                return
-            pbx.logger.info(
-                f"[VM IVR] ✓ Caller RTP: {call.caller_rtp['address']}:{call.caller_rtp['port']}"
-            )
-
-            # ============================================================
-            # RTP SETUP FOR VOICEMAIL IVR - BIDIRECTIONAL AUDIO
-            # ============================================================
-            # This section sets up RTP for interactive voicemail access:
-            # 1. RTPPlayer: Sends audio prompts to the caller (server -> client)
-            # 2. RTPRecorder: Receives audio from caller for DTMF detection (client -> server)
-            # Both use the same local port (call.rtp_ports[0]) allocated by RTP relay.
-            # This creates a full-duplex audio channel for the IVR system.
-            # ============================================================
-
-            # Stop the RTP relay handler so its socket is released and the
-            # IVR player can bind to the same port.  allocate_relay() starts a
-            # relay handler, but voicemail IVR is a direct PBX-to-phone
-            # interaction that doesn't need relaying.
-            relay_info = pbx.rtp_relay.active_relays.get(call_id)
-            if relay_info:
-                relay_info["handler"].stop()
-                pbx.logger.info(
-                    f"[VM IVR] Stopped RTP relay handler for IVR on call {call_id}"
-                )
-
-            # Create RTP player for sending audio prompts to the caller
-            # This sends voicemail prompts, menus, and messages to the user
-            pbx.logger.info("[VM IVR] Creating RTP player for audio prompts...")
-            pbx.logger.info(f"[VM IVR]   Local port: {call.rtp_ports[0]}")
-            pbx.logger.info(
-                f"[VM IVR]   Remote: {call.caller_rtp['address']}:{call.caller_rtp['port']}"
-            )
-            player = RTPPlayer(
-                local_port=call.rtp_ports[0],
-                remote_host=call.caller_rtp["address"],
-                remote_port=call.caller_rtp["port"],
-                call_id=call_id,
-            )
-
-            if not player.start():
-                pbx.logger.error("[VM IVR] ✗ Failed to start RTP player")
-                time.sleep(2)
-                pbx.end_call(call_id)
-                return
-            pbx.logger.info("[VM IVR] ✓ RTP player started successfully")
-
-            # Create DTMF detector for processing user input (menu selections,
-            # PIN, etc.)
-            pbx.logger.info("[VM IVR] Creating DTMF detector (sample_rate=8000Hz)...")
-            dtmf_detector = DTMFDetector(sample_rate=8000)
-            pbx.logger.info("[VM IVR] ✓ DTMF detector created")
-
-            # Create RTP recorder to receive audio from caller for DTMF detection
-            # This listens on the same port, captures incoming RTP packets, and
-            # extracts audio
-            pbx.logger.info(
-                f"[VM IVR] Creating RTP recorder for DTMF detection (port {call.rtp_ports[0]})..."
-            )
-            recorder = RTPRecorder(call.rtp_ports[0], call_id)
-            if not recorder.start():
-                pbx.logger.error("[VM IVR] ✗ Failed to start RTP recorder")
-                player.stop()
-                time.sleep(2)
-                pbx.end_call(call_id)
-                return
-            pbx.logger.info("[VM IVR] ✓ RTP recorder started successfully")
-            pbx.logger.info(
-                "[VM IVR] ✓ RTP setup complete - bidirectional audio channel established"
-            )
-
-            try:
-                # Start the IVR flow - transition from WELCOME to PIN_ENTRY state
-                # Use '*' which won't be collected as part of PIN (only 0-9 are
-                # collected)
-                pbx.logger.info("[VM IVR] Initializing IVR state machine...")
-                initial_action: dict[str, Any] = voicemail_ivr.handle_dtmf("*")
-
-                # Play the PIN entry prompt that the IVR returned
-                if not isinstance(initial_action, dict):
-                    pbx.logger.error(
-                        f"[VM IVR] ✗ IVR handle_dtmf returned unexpected type: {type(initial_action)}"
-                    )
-                    initial_action = {"action": "play_prompt", "prompt": "enter_pin"}
-
-                pbx.logger.info(
-                    f"[VM IVR] ✓ IVR initialized - Action: {initial_action.get('action')}, Prompt: {initial_action.get('prompt')}"
-                )
-
-                prompt_type: str = initial_action.get("prompt", "enter_pin")
-                # Try to load from voicemail_prompts/ directory, fallback to
-                # tone generation
-                pbx.logger.info(f"[VM IVR] Loading audio prompt: {prompt_type}")
-                pin_prompt: bytes = get_prompt_audio(prompt_type)
-                pbx.logger.info(f"[VM IVR] ✓ Prompt audio loaded ({len(pin_prompt)} bytes)")
-
-                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                    temp_file.write(pin_prompt)
-                    prompt_file: str = temp_file.name
-
-                try:
-                    pbx.logger.info(
-                        f"[VM IVR] Playing PIN entry prompt (call state: {call.state})..."
-                    )
-                    player.play_file(prompt_file)
-                    pbx.logger.info(
-                        f"[VM IVR] ✓ Finished playing PIN entry prompt (call state: {call.state})"
-                    )
-                finally:
-                    with contextlib.suppress(OSError):
-                        Path(prompt_file).unlink()
-
-                time.sleep(0.5)
-                pbx.logger.info("[VM IVR] Post-prompt pause complete, checking call state...")
-
-                # Check if call was terminated early (e.g., immediate BYE after answering)
-                # Log the actual call state for debugging
-                pbx.logger.info(
-                    f"[VM IVR] Call state check: call_id={call_id}, state={call.state}, state.value={call.state.value if hasattr(call.state, 'value') else 'N/A'}"
-                )
+        Returns:
+            The running session
+        """
+        session = VoicemailIVRSession(self.pbx_core, call_id, call, mailbox, voicemail_ivr)
+        self.pbx_core.ivr_runtime.add(session)
+        return session
 
-                if call.state == CallState.ENDED:
-                    pbx.logger.info("")
-                    pbx.logger.info("[VM IVR] ✗ call ended before IVR could start")
-                    pbx.logger.info(f"[VM IVR] Extension: {call.voicemail_extension}")
-                    pbx.logger.info(f"[VM IVR] State: {call.state}")
-                    pbx.logger.info("[VM IVR] Exiting IVR session")
-                    pbx.logger.info("")
-                    return
-
-                pbx.logger.info("")
-                pbx.logger.info("[VM IVR] ✓ IVR fully started and ready for user input")
-                pbx.logger.info(f"[VM IVR] Extension: {call.voicemail_extension}")
-                pbx.logger.info(f"[VM IVR] State: {call.state}")
-                pbx.logger.info("[VM IVR] Waiting for PIN entry...")
-                pbx.logger.info("")
-
-                # Main IVR loop - listen for DTMF input
-                ivr_active: bool = True
-                last_audio_check: float = time.time()
-
-                # DTMF debouncing: track last detected digit and time to
-                # prevent duplicates
-                last_detected_digit: str | None = None
-                last_detection_time: float = 0.0
-                dtmf_debounce_seconds: float = 0.5  # Ignore same digit within 500ms
-
-                # Constants for DTMF detection
-                # ~0.5s of audio at 160 bytes per 20ms RTP packet
-                dtmf_detection_packets: int = 40  # 40 packets * 20ms = 0.8s of audio
-                # Minimum audio data needed for reliable DTMF detection
-                min_audio_bytes_for_dtmf: int = 1600
-
-                while ivr_active:
-                    # Check if call is still active
-                    if call.state == CallState.ENDED:
-                        pbx.logger.info(f"[VM IVR] Call {call_id} ended - exiting IVR loop")
-                        break
-
-                    # Detect DTMF from either SIP INFO (out-of-band) or in-band
-                    # audio
-                    digit: str | None = None
-
-                    # Priority 1: Check for DTMF from SIP INFO messages (most
-                    # reliable)
-                    if hasattr(call, "dtmf_info_queue") and call.dtmf_info_queue:
-                        digit = call.dtmf_info_queue.pop(0)
-                        pbx.logger.info(f"[VM IVR] >>> DTMF RECEIVED (SIP INFO): '{digit}' <<<")
-                    else:
-                        # Priority 2: Fall back to in-band DTMF detection from
-                        # audio
-                        time.sleep(0.1)
-
-                        # Check for recorded audio (DTMF tones from user)
-                        if (
-                            hasattr(recorder, "recorded_data")
-                            and recorder.recorded_data
-                            and len(recorder.recorded_data) > 0
-                        ):
-                            # Collect last portion of audio for DTMF
-                            # detection
-                            recent_audio = b"".join(
-                                recorder.recorded_data[-dtmf_detection_packets:]
-                            )
-
-                            if (
-                                len(recent_audio) > min_audio_bytes_for_dtmf
-                            ):  # Need sufficient audio for DTMF
-                                try:
-                                    # Detect DTMF in audio with error
-                                    # handling
-                                    digit = dtmf_detector.detect(recent_audio)
-                                except Exception as e:
-                                    pbx.logger.error(f"Error detecting DTMF: {e}")
-                                    digit = None
-
-                                if digit:
-                                    # Debounce: ignore duplicate detections
-                                    # of same digit within debounce period
-                                    current_time: float = time.time()
-                                    if (
-                                        digit == last_detected_digit
-                                        and (current_time - last_detection_time)
-                                        < dtmf_debounce_seconds
-                                    ):
-                                        # Same digit detected too soon,
-                                        # likely echo or lingering tone
-                                        pbx.logger.debug(
-                                            f"[VM IVR] DTMF '{digit}' debounced (duplicate within {dtmf_debounce_seconds}s)"
-                                        )
-                                        continue
-
-                                    # Update debounce tracking
-                                    last_detected_digit = digit
-                                    last_detection_time = current_time
-                                    pbx.logger.info(
-                                        f"[VM IVR] >>> DTMF RECEIVED (In-band audio): '{digit}' <<<"
-                                    )
-
-                    # Process detected DTMF digit (from either SIP INFO or
-                    # in-band)
-                    if digit:
-                        # Reset inactivity timer on any DTMF input
-                        last_audio_check = time.time()
-                        # Handle DTMF input through IVR
-                        pbx.logger.info(
-                            f"[VM IVR] Processing DTMF '{digit}' through IVR state machine..."
-                        )
-                        pbx.logger.info(f"[VM IVR] Current IVR state: {voicemail_ivr.state}")
-                        action: dict[str, Any] = voicemail_ivr.handle_dtmf(digit)
-                        pbx.logger.info(f"[VM IVR] IVR returned action: {action.get('action')}")
-                        pbx.logger.info(f"[VM IVR] New IVR state: {voicemail_ivr.state}")
-
-                        # Process IVR action
-                        if action["action"] == "play_message":
-                            # Check if call is still active before playing
-                            if call.state == CallState.ENDED:
-                                pbx.logger.info(
-                                    f"[VM IVR] Call {call_id} ended, skipping message playback"
-                                )
-                                break
-                            # Play the voicemail message
-                            file_path: str | None = action.get("file_path")
-                            message_id: str | None = action.get("message_id")
-                            caller_id: str | None = action.get("caller_id")
-                            pbx.logger.info(
-                                f"[VM IVR] Playing voicemail message: {message_id} from {caller_id}"
-                            )
-                            if file_path and Path(file_path).exists():
-                                player.play_file(file_path)
-                                if message_id:
-                                    mailbox.mark_listened(message_id)
-                                pbx.logger.info(
-                                    f"[VM IVR] ✓ Voicemail {message_id} played and marked as listened"
-                                )
-                            else:
-                                pbx.logger.warning(
-                                    f"[VM IVR] ✗ Voicemail file not found: {file_path}"
-                                )
-                            time.sleep(0.5)
-
-                        elif action["action"] == "play_prompt":
-                            # Check if call is still active before playing
-                            if call.state == CallState.ENDED:
-                                pbx.logger.info(
-                                    f"[VM IVR] Call {call_id} ended, skipping prompt playback"
-                                )
-                                break
-                            # Play a prompt
-                            prompt_type = action.get("prompt", "main_menu")
-                            pbx.logger.info(f"[VM IVR] Playing prompt: {prompt_type}")
-                            # Try to load from voicemail_prompts/ directory,
-                            # fallback to tone generation
-                            prompt_audio: bytes = get_prompt_audio(prompt_type)
-
-                            with tempfile.NamedTemporaryFile(
-                                suffix=".wav", delete=False
-                            ) as temp_file:
-                                temp_file.write(prompt_audio)
-                                prompt_file = temp_file.name
-
-                            try:
-                                player.play_file(prompt_file)
-                                pbx.logger.info(f"[VM IVR] ✓ Prompt '{prompt_type}' played")
-                            finally:
-                                with contextlib.suppress(OSError):
-                                    Path(prompt_file).unlink()
-
-                            time.sleep(0.3)
-
-                        elif action["action"] == "hangup":
-                            # Check if call is still active before playing
-                            # goodbye
-                            if call.state == CallState.ENDED:
-                                pbx.logger.info(
-                                    f"[VM IVR] Call {call_id} already ended, skipping goodbye prompt"
-                                )
-                                ivr_active = False
-                                break
-                            pbx.logger.info(
-                                "[VM IVR] User requested hangup - playing goodbye and ending call"
-                            )
-                            # Play goodbye and end call
-                            # Try to load from voicemail_prompts/ directory,
-                            # fallback to tone generation
-                            goodbye_prompt: bytes = get_prompt_audio("goodbye")
-                            with tempfile.NamedTemporaryFile(
-                                suffix=".wav", delete=False
-                            ) as temp_file:
-                                temp_file.write(goodbye_prompt)
-                                prompt_file = temp_file.name
-
-                            try:
-                                player.play_file(prompt_file)
-                            finally:
-                                with contextlib.suppress(OSError):
-                                    Path(prompt_file).unlink()
-
-                            time.sleep(1)
-                            ivr_active = False
-
-                        elif action["action"] == "start_recording":
-                            # Start recording greeting
-                            if call.state == CallState.ENDED:
-                                pbx.logger.info(f"Call {call_id} ended, cannot start recording")
-                                break
-
-                            pbx.logger.info(
-                                f"Starting greeting recording for extension {call.voicemail_extension}"
-                            )
-
-                            # Play beep tone
-                            beep_prompt: bytes = get_prompt_audio("beep")
-                            with tempfile.NamedTemporaryFile(
-                                suffix=".wav", delete=False
-                            ) as temp_file:
-                                temp_file.write(beep_prompt)
-                                beep_file: str = temp_file.name
-
-                            try:
-                                player.play_file(beep_file)
-                            finally:
-                                with contextlib.suppress(OSError):
-                                    Path(beep_file).unlink()
-
-                            time.sleep(0.2)
-
-                            # Start recording
-                            recorder.recorded_data = []  # Clear previous recording
-                            recording_start_time: float = time.time()
-                            max_recording_time: int = 120  # 2 minutes max
-
-                            # Wait for # to stop recording or timeout
-                            recording: bool = True
-                            while recording and ivr_active:
-                                if call.state == CallState.ENDED:
-                                    pbx.logger.info(f"Call {call_id} ended during recording")
-                                    recording = False
-                                    break
-
-                                # Check for timeout
-                                if time.time() - recording_start_time > max_recording_time:
-                                    pbx.logger.info(
-                                        f"Recording timed out after {max_recording_time}s"
-                                    )
-                                    recording = False
-                                    break
-
-                                time.sleep(0.1)
-
-                                # Check for DTMF # to stop recording (SIP INFO
-                                # or in-band)
-                                stop_digit: str | None = None
-
-                                # Priority 1: Check SIP INFO queue
-                                if hasattr(call, "dtmf_info_queue") and call.dtmf_info_queue:
-                                    stop_digit = call.dtmf_info_queue.pop(0)
-                                    pbx.logger.info(
-                                        f"Received DTMF from SIP INFO during recording: {stop_digit}"
-                                    )
-                                # Priority 2: Check in-band audio
-                                elif hasattr(recorder, "recorded_data") and recorder.recorded_data:
-                                    recent_audio = b"".join(
-                                        recorder.recorded_data[-dtmf_detection_packets:]
-                                    )
-                                    if len(recent_audio) > min_audio_bytes_for_dtmf:
-                                        try:
-                                            stop_digit = dtmf_detector.detect(recent_audio)
-                                            if stop_digit:
-                                                pbx.logger.info(
-                                                    f"Received DTMF from in-band audio during recording: {stop_digit}"
-                                                )
-                                        except Exception as e:
-                                            pbx.logger.error(
-                                                f"Error detecting DTMF during recording: {e}"
-                                            )
-                                            stop_digit = None
-
-                                if stop_digit == "#":
-                                    pbx.logger.info("Recording stopped by user (#)")
-                                    recording = False
-                                    # Process through IVR to transition state
-                                    action = voicemail_ivr.handle_dtmf("#")
-                                    # Save recorded audio - convert to WAV format
-                                    if (
-                                        hasattr(recorder, "recorded_data")
-                                        and recorder.recorded_data
-                                    ):
-                                        greeting_audio_raw: bytes = b"".join(recorder.recorded_data)
-                                        # Convert raw audio to WAV using detected codec
-                                        codec_pt: int = getattr(recorder, "detected_codec", 0) or 0
-                                        greeting_audio_wav: bytes = pbx._build_wav_file(
-                                            greeting_audio_raw, codec_payload_type=codec_pt
-                                        )
-                                        voicemail_ivr.save_recorded_greeting(greeting_audio_wav)
-                                        pbx.logger.info(
-                                            f"Saved recorded greeting as WAV ({len(greeting_audio_wav)} bytes, {len(greeting_audio_raw)} bytes raw audio)"
-                                        )
-                                    # Handle the returned action
-                                    if action.get("action") == "play_prompt":
-                                        # Play greeting review menu prompt
-                                        prompt_type = action.get("prompt", "greeting_review_menu")
-                                        prompt_audio = get_prompt_audio(prompt_type)
-                                        with tempfile.NamedTemporaryFile(
-                                            suffix=".wav", delete=False
-                                        ) as temp_file:
-                                            temp_file.write(prompt_audio)
-                                            prompt_file = temp_file.name
-                                        try:
-                                            player.play_file(prompt_file)
-                                        finally:
-                                            with contextlib.suppress(OSError):
-                                                Path(prompt_file).unlink()
-                                    elif action.get("action") == "stop_recording":
-                                        # Also valid, just log it
-                                        pbx.logger.info(
-                                            "IVR returned stop_recording action, continuing"
-                                        )
-                                    else:
-                                        # Unexpected action type
-                                        pbx.logger.warning(
-                                            f"Unexpected action from IVR after #: {action.get('action')}"
-                                        )
-                                    # Clear recorder after saving
-                                    recorder.recorded_data = []
-                                    break
-
-                        elif action["action"] == "play_greeting":
-                            # Play back the recorded greeting for review
-                            if call.state == CallState.ENDED:
-                                pbx.logger.info(f"Call {call_id} ended, cannot play greeting")
-                                break
-
-                            greeting_data: bytes | None = voicemail_ivr.get_recorded_greeting()
-                            if greeting_data:
-                                pbx.logger.info(
-                                    f"Playing recorded greeting for review ({len(greeting_data)} bytes)"
-                                )
-
-                                # Greeting is already in WAV format (converted when recorded)
-                                with tempfile.NamedTemporaryFile(
-                                    suffix=".wav", delete=False
-                                ) as temp_file:
-                                    temp_file.write(greeting_data)
-                                    greeting_file: str = temp_file.name
-
-                                try:
-                                    player.play_file(greeting_file)
-                                finally:
-                                    with contextlib.suppress(OSError):
-                                        Path(greeting_file).unlink()
-
-                                time.sleep(0.5)
-
-                                # Play review menu again
-                                review_prompt: bytes = get_prompt_audio("greeting_review_menu")
-                                with tempfile.NamedTemporaryFile(
-                                    suffix=".wav", delete=False
-                                ) as temp_file:
-                                    temp_file.write(review_prompt)
-                                    prompt_file = temp_file.name
-
-                                try:
-                                    player.play_file(prompt_file)
-                                finally:
-                                    with contextlib.suppress(OSError):
-                                        Path(prompt_file).unlink()
-                            else:
-                                pbx.logger.warning(
-                                    "No recorded greeting data available for playback"
-                                )
-
-                        elif action["action"] == "collect_digit":
-                            # Digit is being collected (e.g., PIN entry)
-                            # No additional action needed - digit is already stored in IVR state
-                            # Just continue the loop to wait for more digits
-                            pbx.logger.debug("[VM IVR] Collecting digit, waiting for more input...")
-
-                        else:
-                            # Unknown action type
-                            pbx.logger.warning(
-                                f"[VM IVR] Unknown action type: {action.get('action')} - continuing"
-                            )
-
-                        # Clear audio buffer after processing DTMF
-                        # Note: Directly modifying internal state - consider
-                        # adding clear() method to RTPRecorder
-                        if hasattr(recorder, "recorded_data"):
-                            recorder.recorded_data = []
-
-                    # Timeout after 60 seconds of no activity
-                    if time.time() - last_audio_check > 60:
-                        pbx.logger.info(f"Voicemail IVR timeout for {call.voicemail_extension}")
-                        ivr_active = False
-
-                pbx.logger.info("")
-                pbx.logger.info(f"{'=' * 70}")
-                pbx.logger.info("VOICEMAIL IVR SESSION COMPLETED")
-                pbx.logger.info(f"  Call ID: {call_id}")
-                pbx.logger.info(f"  Extension: {call.voicemail_extension}")
-                pbx.logger.info(f"  Final State: {call.state}")
-                pbx.logger.info(f"{'=' * 70}")
-
-            finally:
-                pbx.logger.info("[VM IVR] Cleaning up RTP player and recorder...")
-                player.stop()
-                recorder.stop()
-                pbx.logger.info("[VM IVR] ✓ RTP resources released")
-
-            # End the call
-            pbx.logger.info(f"[VM IVR] Ending call {call_id}...")
-            pbx.end_call(call_id)
-            pbx.logger.info("[VM IVR] ✓ Call ended")
-
-        except (KeyError, OSError, TypeError, ValueError) as e:
-            pbx.logger.error("")
-            pbx.logger.error(f"{'=' * 70}")
-            pbx.logger.error("ERROR IN VOICEMAIL IVR SESSION")
-            pbx.logger.error(f"  Call ID: {call_id}")
-            pbx.logger.error(f"  Error: {e}")
-            pbx.logger.error(f"{'=' * 70}")
-            traceback.print_exc()
-            try:
-                pbx.end_call(call_id)
-            except Exception as e:
-                pbx.logger.error(f"[VM IVR] Error ending call during cleanup: {e}")
-
-    def monitor_voicemail_dtmf(self, call_id: str, call: Any, recorder: Any) -> None:
+    def _voicemail_recording_session(
+        self, call_id: str, call: Any, max_duration: float
+    ) -> "VoicemailRecordingSession":
         """
-        Monitor for DTMF # key press during voicemail recording
-        When # is detected, complete the voicemail recording early
+        Play the greeting and record a message for an unanswered call on the
+        shared IVR runtime
+
+        Returns immediately. The recording is completed when the caller
+        presses # or the maximum duration is reached, or saved by end_call()
+        if the caller hangs up.
 
         Args:
             call_id: Call identifier
             call: Call object
-            recorder: RTPRecorder instance
-        """
-        from pbx.utils.dtmf import DTMFDetector
+            max_duration: Maximum message length in seconds
 
-        pbx = self.pbx_core
-
-        try:
-            # Create DTMF detector
-            dtmf_detector = DTMFDetector(sample_rate=8000)
-
-            # Constants for DTMF detection
-            dtmf_detection_packets: int = 40  # 40 packets * 20ms = 0.8s of audio
-            # Minimum audio data needed for reliable DTMF detection
-            min_audio_bytes_for_dtmf: int = 1600
-
-            pbx.logger.info(f"Started DTMF monitoring for voicemail recording on call {call_id}")
-
-            # Monitor for # key press
-            while recorder.running and call.state.value != "ended":
-                time.sleep(0.1)
-
-                # Check for recorded audio (DTMF tones from caller)
-                if (
-                    hasattr(recorder, "recorded_data")
-                    and recorder.recorded_data
-                    and len(recorder.recorded_data) > 0
-                ):
-                    # Collect last portion of audio for DTMF detection
-                    recent_audio = b"".join(recorder.recorded_data[-dtmf_detection_packets:])
-
-                    if len(recent_audio) > min_audio_bytes_for_dtmf:
-                        # Convert bytes to audio samples for DTMF detection
-                        # G.711 u-law is 8-bit samples, one byte per sample
-                        # Use struct.unpack for efficient batch conversion
-                        samples: list[float] = []
-                        # Process in chunks for efficiency
-                        chunk_size: int = min(len(recent_audio), 8192)  # Process up to 8KB at once
-                        for i in range(0, len(recent_audio), chunk_size):
-                            chunk = recent_audio[i : i + chunk_size]
-                            # Unpack bytes and convert to float samples
-                            unpacked = struct.unpack(f"{len(chunk)}B", chunk)
-                            # Convert unsigned byte to signed float (-1.0
-                            # to 1.0)
-                            samples.extend([(b - 128) / 128.0 for b in unpacked])
-
-                        # Detect DTMF
-                        digit: str | None = dtmf_detector.detect_tone(samples)
-
-                        if digit == "#":
-                            pbx.logger.info(
-                                f"Detected # key press during voicemail recording on call {call_id}"
-                            )
-                            # Complete the voicemail recording
-                            self.complete_voicemail_recording(call_id)
-                            return
-
-            pbx.logger.debug(f"DTMF monitoring ended for voicemail recording on call {call_id}")
-
-        except (KeyError, TypeError, ValueError, struct.error) as e:
-            pbx.logger.error(f"Error in voicemail DTMF monitoring: {e}")
-            pbx.logger.error(traceback.format_exc())
+        Returns:
+            The running session
+        """
+        session = VoicemailRecordingSession(self.pbx_core, call_id, call, max_duration)
+        self.pbx_core.ivr_runtime.add(session)
+        return session
 
     def complete_voicemail_recording(self, call_id: str) -> None:
         """
@@ -1076,3 +403,911 @@ def complete_voicemail_recording(self, call_id: str) -> None:
 
         # End the call
         pbx.end_call(call_id)
+
+
+class VoicemailIVRSession(IVRSession):
+    """
+    Interactive voicemail menu for one call
+
+    PIN entry, message playback and greeting recording as a state machine on
+    the IVR runtime. SIP INFO digits arrive as events; in-band digits are
+    found by a periodic scan of the caller's audio on the runtime's timer
+    heap. Digits barge in on any prompt. Opening RTP, loading prompts, tone
+    detection, WAV encoding and ending the call run on the runtime's worker
+    pool, so they never hold up the media clock.
+    """
+
+    def __init__(
+        self, pbx_core: Any, call_id: str, call: Any, mailbox: Any, voicemail_ivr: Any
+    ) -> None:
+        """
+        Initialize voicemail IVR session
+
+        Args:
+            pbx_core: The PBXCore instance
+            call_id: Call identifier
+            call: Call object
+            mailbox: VoicemailBox object
+            voicemail_ivr: VoicemailIVR object
+        """
+        super().__init__(call_id, call)
+        self.pbx_core: Any = pbx_core
+        self.mailbox: Any = mailbox
+        self.voicemail_ivr: Any = voicemail_ivr
+        self.player: Any = None
+        self.recorder: Any = None
+        self.dtmf_detector: Any = None
+        self.ready: bool = False
+        self.recording: bool = False
+        self._scanning: bool = False
+        self._greeting_action: dict[str, Any] | None = None
+        # DTMF debouncing: ignore the same in-band digit within the window
+        self._last_detected_digit: str | None = None
+        self._last_detection_time: float = 0.0
+
+    def on_start(self) -> None:
+        """Give RTP a moment to stabilize before sending audio"""
+        logger = self.pbx_core.logger
+        logger.info("")
+        logger.info(f"{'=' * 70}")
+        logger.info("VOICEMAIL IVR SESSION STARTING")
+        logger.info(f"  Call ID: {self.call_id}")
+        logger.info(f"  Extension: {self.call.voicemail_extension}")
+        logger.info(f"  Call State: {self.call.state}")
+        logger.info(f"{'=' * 70}")
+        logger.info(f"[VM IVR] Waiting {RTP_SETTLE_DELAY}s for RTP to stabilize...")
+        self.set_timer("rtp_settle", RTP_SETTLE_DELAY)
+
+    def on_timer(self, name: str) -> None:
+        """Advance the menu when one of its waits expires"""
+        if name == "rtp_settle":
+            self._start_media()
+        elif name == "post_prompt":
+            self._begin_input()
+        elif name == "inband_scan":
+            self._scan_inband()
+        elif name == "inactivity":
+            self.pbx_core.logger.info(f"Voicemail IVR timeout for {self.call.voicemail_extension}")
+            self._close()
+        elif name == "record_start":
+            # Start recording
+            self.recorder.recorded_data = []  # Clear previous recording
+            self.recording = True
+            self.set_timer("greeting_limit", MAX_GREETING_SECONDS)
+        elif name == "greeting_limit":
+            self.pbx_core.logger.info(f"Recording timed out after {MAX_GREETING_SECONDS}s")
+            self.recording = False
+            self.recorder.recorded_data = []
+        elif name == "review_pause":
+            self._play_prompt("review", "greeting_review_menu")
+        elif name == "goodbye_pause":
+            self._close()
+        elif name == "hangup":
+            self._end_call()
+            self.finish()
+
+    def on_prompt_done(self, name: str, played: bool) -> None:
+        """Move to the next step once a prompt has played"""
+        if name == "pin_prompt":
+            self.pbx_core.logger.info(
+                f"[VM IVR] ✓ Finished playing PIN entry prompt (call state: {self.call.state})"
+            )
+            self.set_timer("post_prompt", POST_PROMPT_PAUSE)
+        elif name == "beep":
+            self.set_timer("record_start", RECORD_START_PAUSE)
+        elif name == "greeting":
+            self.set_timer("review_pause", REVIEW_PAUSE)
+        elif name == "goodbye":
+            self.set_timer("goodbye_pause", GOODBYE_PAUSE)
+
+    def on_digit(self, digit: str) -> None:
+        """Run a digit through the voicemail IVR state machine"""
+        pbx = self.pbx_core
+        if self.player is None:
+            return
+        self._begin_input()
+        if self.finished:
+            return
+
+        # Reset inactivity timer on any DTMF input
+        self.set_timer("inactivity", INACTIVITY_TIMEOUT)
+
+        if self.recording:
+            # Only # means anything while the greeting is being recorded
+            if digit == "#":
+                self._finish_greeting()
+            return
+
+        self.stop_prompts()
+        self.cancel_timer("review_pause")
+
+        pbx.logger.info(f"[VM IVR] Processing DTMF '{digit}' through IVR state machine...")
+        pbx.logger.info(f"[VM IVR] Current IVR state: {self.voicemail_ivr.state}")
+        action: dict[str, Any] = self.voicemail_ivr.handle_dtmf(digit)
+        action_type = action.get("action")
+        pbx.logger.info(f"[VM IVR] IVR returned action: {action_type}")
+        pbx.logger.info(f"[VM IVR] New IVR state: {self.voicemail_ivr.state}")
+
+        if action_type in MEDIA_ACTIONS and self.call.state == CallState.ENDED:
+            pbx.logger.info(f"[VM IVR] Call {self.call_id} ended, skipping {action_type}")
+            self._close()
+            return
+
+        if action_type == "play_message":
+            # Play the voicemail message
+            file_path: str | None = action.get("file_path")
+            message_id: str | None = action.get("message_id")
+            caller_id: str | None = action.get("caller_id")
+            pbx.logger.info(f"[VM IVR] Playing voicemail message: {message_id} from {caller_id}")
+            if file_path and Path(file_path).exists():
+                self.play_later("message", self.player, file_path)
+                if message_id:
+                    self.mailbox.mark_listened(message_id)
+                pbx.logger.info(f"[VM IVR] ✓ Voicemail {message_id} queued and marked as listened")
+            else:
+                pbx.logger.warning(f"[VM IVR] ✗ Voicemail file not found: {file_path}")
+
+        elif action_type == "play_prompt":
+            prompt_type = action.get("prompt", "main_menu")
+            pbx.logger.info(f"[VM IVR] Playing prompt: {prompt_type}")
+            self._play_prompt("prompt", prompt_type)
+
+        elif action_type == "hangup":
+            pbx.logger.info("[VM IVR] User requested hangup - playing goodbye and ending call")
+            self._play_prompt("goodbye", "goodbye")
+
+        elif action_type == "start_recording":
+            pbx.logger.info(
+                f"Starting greeting recording for extension {self.call.voicemail_extension}"
+            )
+            self._play_prompt("beep", "beep")
+
+        elif action_type == "play_greeting":
+            # Play back the recorded greeting for review
+            greeting_data: bytes | None = self.voicemail_ivr.get_recorded_greeting()
+            if greeting_data:
+                pbx.logger.info(
+                    f"Playing recorded greeting for review ({len(greeting_data)} bytes)"
+                )
+                # Greeting is already in WAV format (converted when recorded)
+                self.play_later("greeting", self.player, greeting_data)
+            else:
+                pbx.logger.warning("No recorded greeting data available for playback")
+
+        elif action_type == "collect_digit":
+            # Digit is already stored in IVR state (e.g., PIN entry)
+            pbx.logger.debug("[VM IVR] Collecting digit, waiting for more input...")
+
+        else:
+            pbx.logger.warning(f"[VM IVR] Unknown action type: {action_type} - continuing")
+
+        # Clear audio buffer after processing DTMF
+        if hasattr(self.recorder, "recorded_data"):
+            self.recorder.recorded_data = []
+
+    def on_hangup(self) -> None:
+        """Caller hung up; release media without ending the call again"""
+        self.pbx_core.logger.info(f"[VM IVR] Call {self.call_id} ended - exiting IVR session")
+        self.finish()
+
+    def on_error(self, error: Exception) -> None:
+        """Log the failure and end the call"""
+        logger = self.pbx_core.logger
+        logger.error("")
+        logger.error(f"{'=' * 70}")
+        logger.error("ERROR IN VOICEMAIL IVR SESSION")
+        logger.error(f"  Call ID: {self.call_id}")
+        logger.error(f"  Error: {error}")
+        logger.error(f"{'=' * 70}")
+        logger.error(traceback.format_exc())
+        self._release_media()
+        self._end_call()
+
+    def on_finish(self) -> None:
+        """Release the RTP player and recorder"""
+        self._release_media()
+
+    def on_work_done(self, name: str, result: Any, error: Exception | None) -> None:
+        """Continue the menu with the outcome of work run on the worker pool"""
+        if name == "inband_scan":
+            self._scanning = False
+            if error is not None:
+                self.pbx_core.logger.error(f"Error detecting DTMF: {error}")
+            elif result:
+                self._inband_digit(result)
+            return
+        if error is not None:
+            raise error
+        if name == "open_media":
+            self._media_opened(result)
+        elif name == "greeting_wav":
+            self._greeting_saved(result)
+
+    def on_work_discarded(self, name: str, result: Any, error: Exception | None) -> None:
+        """Close media opened for a session that ended while it was opening"""
+        if name == "open_media" and result:
+            for channel in result[:2]:
+                channel.stop()
+        elif name == "end_call" and error is not None:
+            self.pbx_core.logger.error(f"[VM IVR] Error ending call during cleanup: {error}")
+
+    def _start_media(self) -> None:
+        """Open the bidirectional audio channel on the worker pool"""
+        pbx = self.pbx_core
+        call = self.call
+
+        # Check if call was terminated during RTP stabilization
+        if call.state == CallState.ENDED:
+            self._log_ended_early()
+            self.finish()
+            return
+
+        pbx.logger.info("[VM IVR] Checking caller RTP information...")
+        if not call.caller_rtp:
+            pbx.logger.warning("[VM IVR] ✗ No caller RTP info available - cannot proceed")
+            self.set_timer("hangup", FAILED_SETUP_HANGUP_DELAY)
+            return
+        pbx.logger.info(
+            f"[VM IVR] ✓ Caller RTP: {call.caller_rtp['address']}:{call.caller_rtp['port']}"
+        )
+        self.run_in_worker("open_media", self._open_media)
+
+    def _open_media(self) -> tuple[Any, Any, Any] | None:
+        """
+        Start the RTP player and recorder (worker pool)
+
+        Returns:
+            (player, recorder, dtmf_detector), or None if either failed to start
+        """
+        from pbx.rtp.handler import RTPPlayer, RTPRecorder
+        from pbx.utils.dtmf import DTMFDetector
+
+        pbx = self.pbx_core
+        call = self.call
+
+        # ============================================================
+        # RTP SETUP FOR VOICEMAIL IVR - BIDIRECTIONAL AUDIO
+        # ============================================================
+        # 1. RTPPlayer: Sends audio prompts to the caller (server -> client)
+        # 2. RTPRecorder: Receives audio from caller for DTMF detection (client -> server)
+        # Both use the same local port (call.rtp_ports[0]) allocated by RTP relay.
+        # ============================================================
+
+        # Stop the RTP relay handler so its socket is released and the
+        # IVR player can bind to the same port.  allocate_relay() starts a
+        # relay handler, but voicemail IVR is a direct PBX-to-phone
+        # interaction that doesn't need relaying.
+        relay_info = pbx.rtp_relay.active_relays.get(self.call_id)
+        if relay_info:
+            relay_info["handler"].stop()
+            pbx.logger.info(f"[VM IVR] Stopped RTP relay handler for IVR on call {self.call_id}")
+
+        pbx.logger.info("[VM IVR] Creating RTP player for audio prompts...")
+        pbx.logger.info(f"[VM IVR]   Local port: {call.rtp_ports[0]}")
+        pbx.logger.info(
+            f"[VM IVR]   Remote: {call.caller_rtp['address']}:{call.caller_rtp['port']}"
+        )
+        player = RTPPlayer(
+            local_port=call.rtp_ports[0],
+            remote_host=call.caller_rtp["address"],
+            remote_port=call.caller_rtp["port"],
+            call_id=self.call_id,
+        )
+        if not player.start():
+            pbx.logger.error("[VM IVR] ✗ Failed to start RTP player")
+            return None
+        pbx.logger.info("[VM IVR] ✓ RTP player started successfully")
+
+        # Create RTP recorder to receive audio from caller for DTMF detection
+        pbx.logger.info(
+            f"[VM IVR] Creating RTP recorder for DTMF detection (port {call.rtp_ports[0]})..."
+        )
+        recorder = RTPRecorder(call.rtp_ports[0], self.call_id)
+        if not recorder.start():
+            pbx.logger.error("[VM IVR] ✗ Failed to start RTP recorder")
+            player.stop()
+            return None
+        pbx.logger.info("[VM IVR] ✓ RTP recorder started successfully")
+
+        # Create DTMF detector for processing user input (menu selections, PIN, etc.)
+        return player, recorder, DTMFDetector(sample_rate=8000)
+
+    def _media_opened(self, media: tuple[Any, Any, Any] | None) -> None:
+        """Start the IVR flow once the audio channel is open"""
+        pbx = self.pbx_core
+        if media is None:
+            self.set_timer("hangup", FAILED_SETUP_HANGUP_DELAY)
+            return
+        self.player, self.recorder, self.dtmf_detector = media
+        pbx.logger.info("[VM IVR] ✓ RTP setup complete - bidirectional audio channel established")
+
+        # Start the IVR flow - transition from WELCOME to PIN_ENTRY state
+        # Use '*' which won't be collected as part of PIN (only 0-9 are collected)
+        pbx.logger.info("[VM IVR] Initializing IVR state machine...")
+        initial_action: dict[str, Any] = self.voicemail_ivr.handle_dtmf("*")
+        if not isinstance(initial_action, dict):
+            pbx.logger.error(
+                f"[VM IVR] ✗ IVR handle_dtmf returned unexpected type: {type(initial_action)}"
+            )
+            initial_action = {"action": "play_prompt", "prompt": "enter_pin"}
+        pbx.logger.info(
+            f"[VM IVR] ✓ IVR initialized - Action: {initial_action.get('action')}, "
+            f"Prompt: {initial_action.get('prompt')}"
+        )
+
+        pbx.logger.info(f"[VM IVR] Playing PIN entry prompt (call state: {self.call.state})...")
+        self._play_prompt("pin_prompt", initial_action.get("prompt", "enter_pin"))
+        self.accept_digits()
+
+    def _begin_input(self) -> None:
+        """Start listening for input once the PIN prompt is over or interrupted"""
+        if self.ready:
+            return
+        self.ready = True
+        self.cancel_timer("post_prompt")
+        pbx = self.pbx_core
+
+        # Check if call was terminated early (e.g., immediate BYE after answering)
+        pbx.logger.info(
+            f"[VM IVR] Call state check: call_id={self.call_id}, state={self.call.state}"
+        )
+        if self.call.state == CallState.ENDED:
+            self._log_ended_early()
+            self.finish()
+            return
+
+        pbx.logger.info("")
+        pbx.logger.info("[VM IVR] ✓ IVR fully started and ready for user input")
+        pbx.logger.info(f"[VM IVR] Extension: {self.call.voicemail_extension}")
+        pbx.logger.info(f"[VM IVR] State: {self.call.state}")
+        pbx.logger.info("[VM IVR] Waiting for PIN entry...")
+        pbx.logger.info("")
+
+        self.set_timer("inactivity", INACTIVITY_TIMEOUT)
+        self.set_timer("inband_scan", INBAND_SCAN_INTERVAL)
+
+    def _scan_inband(self) -> None:
+        """Hand the most recent caller audio to the worker pool for DTMF detection"""
+        pbx = self.pbx_core
+        if self.call.state == CallState.ENDED:
+            pbx.logger.info(f"[VM IVR] Call {self.call_id} ended - exiting IVR loop")
+            self._close()
+            return
+        self.set_timer("inband_scan", INBAND_SCAN_INTERVAL)
+        if self._scanning:
+            return  # Previous scan still running
+
+        recorded_data = getattr(self.recorder, "recorded_data", None)
+        if not recorded_data:
+            return
+        recent_audio = b"".join(recorded_data[-DTMF_DETECTION_PACKETS:])
+        if len(recent_audio) <= MIN_AUDIO_BYTES_FOR_DTMF:
+            return
+        self._scanning = True
+        self.run_in_worker("inband_scan", self.dtmf_detector.detect, recent_audio)
+
+    def _inband_digit(self, digit: str) -> None:
+        """Act on a digit found in the caller's audio, ignoring lingering tones"""
+        pbx = self.pbx_core
+        if not self.recording:
+            now = self.runtime.clock()
+            if (
+                digit == self._last_detected_digit
+                and now - self._last_detection_time < DTMF_DEBOUNCE_SECONDS
+            ):
+                # Same digit detected too soon, likely echo or lingering tone
+                pbx.logger.debug(
+                    f"[VM IVR] DTMF '{digit}' debounced (duplicate within {DTMF_DEBOUNCE_SECONDS}s)"
+                )
+                return
+            self._last_detected_digit = digit
+            self._last_detection_time = now
+        pbx.logger.info(f"[VM IVR] >>> DTMF RECEIVED (In-band audio): '{digit}' <<<")
+        self.on_digit(digit)
+
+    def _finish_greeting(self) -> None:
+        """Encode the recorded greeting on the worker pool, then review it"""
+        pbx = self.pbx_core
+        pbx.logger.info("Recording stopped by user (#)")
+        self.recording = False
+        self.cancel_timer("greeting_limit")
+
+        # Process through IVR to transition state
+        self._greeting_action = self.voicemail_ivr.handle_dtmf("#")
+        recorded_data = getattr(self.recorder, "recorded_data", None)
+        self.recorder.recorded_data = []
+        if not recorded_data:
+            self._greeting_saved(None)
+            return
+        greeting_audio_raw: bytes = b"".join(recorded_data)
+        # Convert raw audio to WAV using detected codec
+        codec_pt: int = getattr(self.recorder, "detected_codec", 0) or 0
+        self.run_in_worker(
+            "greeting_wav",
+            functools.partial(pbx._build_wav_file, codec_payload_type=codec_pt),
+            greeting_audio_raw,
+        )
+
+    def _greeting_saved(self, greeting_audio_wav: bytes | None) -> None:
+        """Keep the encoded greeting and move on to the review menu"""
+        pbx = self.pbx_core
+        if greeting_audio_wav is not None:
+            self.voicemail_ivr.save_recorded_greeting(greeting_audio_wav)
+            pbx.logger.info(f"Saved recorded greeting as WAV ({len(greeting_audio_wav)} bytes)")
+
+        action, self._greeting_action = self._greeting_action or {}, None
+        if action.get("action") == "play_prompt":
+            self._play_prompt("review", action.get("prompt", "greeting_review_menu"))
+        elif action.get("action") == "stop_recording":
+            pbx.logger.info("IVR returned stop_recording action, continuing")
+        else:
+            pbx.logger.warning(f"Unexpected action from IVR after #: {action.get('action')}")
+
+    def _play_prompt(self, name: str, prompt_type: str) -> None:
+        """Play a voicemail prompt from voicemail_prompts/, falling back to generated audio"""
+        from pbx.utils.audio import get_prompt_audio
+
+        self.play_later(name, self.player, functools.partial(get_prompt_audio, prompt_type))
+
+    def _end_call(self) -> None:
+        """End the call on the worker pool (sends BYE, writes the CDR)"""
+        self.run_in_worker("end_call", self.pbx_core.end_call, self.call_id)
+
+    def _log_ended_early(self) -> None:
+        """Log a call that ended before the menu could start"""
+        logger = self.pbx_core.logger
+        logger.info("")
+        logger.info("[VM IVR] ✗ call ended before IVR could start")
+        logger.info(f"[VM IVR] Extension: {self.call.voicemail_extension}")
+        logger.info(f"[VM IVR] State: {self.call.state}")
+        logger.info("[VM IVR] Exiting IVR session")
+        logger.info("")
+
+    def _close(self) -> None:
+        """Release media, end the call and finish the session"""
+        pbx = self.pbx_core
+        pbx.logger.info("")
+        pbx.logger.info(f"{'=' * 70}")
+        pbx.logger.info("VOICEMAIL IVR SESSION COMPLETED")
+        pbx.logger.info(f"  Call ID: {self.call_id}")
+        pbx.logger.info(f"  Extension: {self.call.voicemail_extension}")
+        pbx.logger.info(f"  Final State: {self.call.state}")
+        pbx.logger.info(f"{'=' * 70}")
+        self._release_media()
+
+        pbx.logger.info(f"[VM IVR] Ending call {self.call_id}...")
+        self._end_call()
+        self.finish()
+
+    def _release_media(self) -> None:
+        """Stop the RTP player and recorder"""
+        self.stop_prompts()
+        if self.player is None and self.recorder is None:
+            return
+        self.pbx_core.logger.info("[VM IVR] Cleaning up RTP player and recorder...")
+        if self.player:
+            self.player.stop()
+            self.player = None
+        if self.recorder:
+            self.recorder.stop()
+            self.recorder = None
+        self.pbx_core.logger.info("[VM IVR] ✓ RTP resources released")
+
+
+class VoicemailPlaybackSession(IVRSession):
+    """
+    Plays a mailbox's messages back to back, then ends the call
+
+    Each message is read and decoded on the runtime's worker pool and paced by
+    its media clock; the pauses and beeps between messages are timers and
+    queued prompts, so the session holds no thread while it waits.
+    """
+
+    def __init__(
+        self,
+        pbx_core: Any,
+        call_id: str,
+        call: Any,
+        mailbox: Any,
+        messages: list[dict[str, Any]],
+    ) -> None:
+        """
+        Initialize voicemail playback session
+
+        Args:
+            pbx_core: The PBXCore instance
+            call_id: Call identifier
+            call: Call object
+            mailbox: VoicemailBox object
+            messages: list of message dictionaries
+        """
+        super().__init__(call_id, call)
+        self.pbx_core: Any = pbx_core
+        self.mailbox: Any = mailbox
+        self.messages: list[dict[str, Any]] = messages
+        self.player: Any = None
+        self.index: int = 0
+
+    def on_start(self) -> None:
+        """Give RTP a moment to stabilize before sending audio"""
+        self.set_timer("rtp_settle", RTP_SETTLE_DELAY)
+
+    def on_timer(self, name: str) -> None:
+        """Advance playback when one of its pauses is over"""
+        if name == "rtp_settle":
+            if not self.call.caller_rtp:
+                self.pbx_core.logger.warning(
+                    f"No caller RTP info for voicemail playback {self.call_id}"
+                )
+                self.set_timer("hangup", FAILED_SETUP_HANGUP_DELAY)
+                return
+            self.run_in_worker("open_player", self._open_player)
+        elif name == "message_beep":
+            self.play_later("beep", self.player, functools.partial(_tone_wav, 800, 300))
+        elif name == "next_message":
+            self._play_message()
+        elif name == "hangup":
+            self._end_call()
+            self.finish()
+
+    def on_work_done(self, name: str, result: Any, error: Exception | None) -> None:
+        """Start playing once the RTP player is open"""
+        if error is not None:
+            raise error
+        if name != "open_player":
+            return
+        pbx = self.pbx_core
+        if result is None:
+            self.set_timer("hangup", FAILED_SETUP_HANGUP_DELAY)
+            return
+        self.player = result
+        if not self.messages:
+            # No messages - play short beep and hang up
+            pbx.logger.info(f"No voicemail messages for {self.call.voicemail_extension}")
+            self.play_later("no_messages", self.player, functools.partial(_tone_wav, 400, 500))
+            return
+        pbx.logger.info(
+            f"Playing {len(self.messages)} voicemail messages for {self.call.voicemail_extension}"
+        )
+        self._play_message()
+
+    def on_prompt_done(self, name: str, played: bool) -> None:
+        """Mark a played message and move on to the next one"""
+        pbx = self.pbx_core
+        if name == "no_messages":
+            self.set_timer("hangup", NO_MESSAGES_PAUSE)
+        elif name == "beep":
+            self.set_timer("next_message", MESSAGE_BEEP_PAUSE)
+        elif name == "message":
+            message = self.messages[self.index]
+            if played:
+                self.mailbox.mark_listened(message["id"])
+                pbx.logger.info(f"Marked voicemail {message['id']} as listened")
+            else:
+                pbx.logger.warning(f"Failed to play voicemail: {message['file_path']}")
+            self.index += 1
+            if self.index < len(self.messages):
+                self.set_timer("message_beep", BETWEEN_MESSAGES_PAUSE + MESSAGE_BEEP_PAUSE)
+            else:
+                pbx.logger.info(
+                    f"Finished playing all voicemails for {self.call.voicemail_extension}"
+                )
+                self.set_timer("hangup", BETWEEN_MESSAGES_PAUSE + GOODBYE_PAUSE)
+
+    def on_error(self, error: Exception) -> None:
+        """Log the failure and make sure the call is ended"""
+        self.pbx_core.logger.error(f"Error in voicemail playback: {error}")
+        self._end_call()
+
+    def on_finish(self) -> None:
+        """Release the RTP player"""
+        if self.player:
+            self.player.stop()
+            self.player = None
+
+    def on_work_discarded(self, name: str, result: Any, error: Exception | None) -> None:
+        """Close a player opened for a session that ended while it was opening"""
+        if name == "open_player" and result:
+            result.stop()
+        elif name == "end_call" and error is not None:
+            self.pbx_core.logger.error(f"Error ending call during cleanup: {error}")
+
+    def _open_player(self) -> Any:
+        """
+        Start the RTP player (worker pool)
+
+        Returns:
+            The started RTPPlayer, or None if it failed to start
+        """
+        from pbx.rtp.handler import RTPPlayer
+
+        pbx = self.pbx_core
+        call = self.call
+
+        # Stop the RTP relay handler so its socket is released and the
+        # voicemail player can bind to the same port.  allocate_relay()
+        # starts a relay handler, but voicemail playback is a direct
+        # PBX-to-phone interaction that doesn't need relaying.
+        relay_info = pbx.rtp_relay.active_relays.get(self.call_id)
+        if relay_info:
+            relay_info["handler"].stop()
+            pbx.logger.info(
+                f"Stopped RTP relay handler for voicemail playback on call {self.call_id}"
+            )
+
+        # Use the same port as allocated for the call for proper RTP
+        # communication
+        player = RTPPlayer(
+            local_port=call.rtp_ports[0],
+            remote_host=call.caller_rtp["address"],
+            remote_port=call.caller_rtp["port"],
+            call_id=self.call_id,
+        )
+        if not player.start():
+            pbx.logger.error(f"Failed to start RTP player for voicemail playback {self.call_id}")
+            return None
+        return player
+
+    def _play_message(self) -> None:
+        """Queue the current message; its file is decoded on the worker pool"""
+        file_path: str = self.messages[self.index]["file_path"]
+        self.pbx_core.logger.info(
+            f"Playing voicemail {self.index + 1}/{len(self.messages)}: {file_path}"
+        )
+        self.play_later("message", self.player, file_path)
+
+    def _end_call(self) -> None:
+        """End the call on the worker pool (sends BYE, writes the CDR)"""
+        self.run_in_worker("end_call", self.pbx_core.end_call, self.call_id)
+
+
+class VoicemailRecordingSession(IVRSession):
+    """
+    Records a message for a call that went unanswered
+
+    Plays the mailbox greeting and the record beep, then records the caller
+    until they press # (SIP INFO or in-band), the maximum message length is
+    reached, or they hang up. On # or timeout the message is saved by
+    complete_voicemail_recording(); on hangup PBXCore.end_call() saves it.
+    The in-band # is found by the same periodic scan of the caller's audio as
+    the voicemail menu uses, with detection run on the worker pool.
+    """
+
+    def __init__(self, pbx_core: Any, call_id: str, call: Any, max_duration: float) -> None:
+        """
+        Initialize voicemail recording session
+
+        Args:
+            pbx_core: The PBXCore instance
+            call_id: Call identifier
+            call: Call object
+            max_duration: Maximum message length in seconds
+        """
+        super().__init__(call_id, call)
+        self.pbx_core: Any = pbx_core
+        self.max_duration: float = max_duration
+        self.player: Any = None
+        self.recorder: Any = None
+        self.dtmf_detector: Any = None
+        self._scanning: bool = False
+
+    def on_start(self) -> None:
+        """Open the RTP player for the greeting"""
+        # Digits before the beep mean nothing; only # while recording does
+        self.accept_digits()
+        self.run_in_worker("open_player", self._open_player)
+
+    def on_timer(self, name: str) -> None:
+        """Play the beep, scan for in-band #, or stop at the maximum length"""
+        if name == "beep":
+            from pbx.utils.audio import generate_voicemail_beep
+
+            self.play_later("beep", self.player, generate_voicemail_beep)
+        elif name == "inband_scan":
+            self._scan_inband()
+        elif name == "max_duration":
+            self._complete()
+
+    def on_prompt_done(self, name: str, played: bool) -> None:
+        """Beep after the greeting, then start recording"""
+        if name == "greeting":
+            self.set_timer("beep", GREETING_BEEP_PAUSE)
+        elif name == "beep":
+            self.pbx_core.logger.info(f"Played voicemail greeting and beep for call {self.call_id}")
+            self._start_recorder()
+
+    def on_digit(self, digit: str) -> None:
+        """# ends the message early"""
+        if self.recorder is None or digit != "#":
+            return
+        self.pbx_core.logger.info(
+            f"Detected # key press during voicemail recording on call {self.call_id}"
+        )
+        self._complete()
+
+    def on_work_done(self, name: str, result: Any, error: Exception | None) -> None:
+        """Continue with the outcome of work run on the worker pool"""
+        pbx = self.pbx_core
+        if name == "inband_scan":
+            self._scanning = False
+            if error is not None:
+                pbx.logger.error(f"Error in voicemail DTMF monitoring: {error}")
+            elif result:
+                self.on_digit(result)
+            return
+        if name == "open_player":
+            if isinstance(error, OSError):
+                pbx.logger.error(f"Error playing voicemail greeting: {error}")
+                self._start_recorder()
+                return
+            if error is not None:
+                raise error
+            if result is None:
+                pbx.logger.warning(
+                    f"Failed to start RTP player for greeting on call {self.call_id}"
+                )
+                self._start_recorder()
+                return
+            self.player = result
+            self.play_later("greeting", self.player, self._greeting_audio)
+        elif name == "open_recorder":
+            if error is not None:
+                raise error
+            if result is None:
+                pbx.logger.error(f"Failed to start voicemail recorder for call {self.call_id}")
+                self._end_call()
+                self.finish()
+                return
+            self._recording_started(*result)
+
+    def on_error(self, error: Exception) -> None:
+        """Log the failure and end the call, which saves what was recorded"""
+        self.pbx_core.logger.error(f"Error in voicemail recording on call {self.call_id}: {error}")
+        self._end_call()
+
+    def on_finish(self) -> None:
+        """Release the greeting player; the recorder belongs to the call"""
+        if self.player:
+            self.player.stop()
+            self.player = None
+
+    def on_work_discarded(self, name: str, result: Any, error: Exception | None) -> None:
+        """Close media opened for a call that ended while it was opening"""
+        if name == "open_player" and result:
+            result.stop()
+        elif name == "open_recorder" and result:
+            result[0].stop()
+        else:
+            super().on_work_discarded(name, result, error)
+
+    def _open_player(self) -> Any:
+        """
+        Start the RTP player for the greeting (worker pool)
+
+        Returns:
+            The started RTPPlayer, or None if it failed to start
+        """
+        from pbx.rtp.handler import RTPPlayer
+
+        call = self.call
+        player = RTPPlayer(
+            local_port=call.rtp_ports[0],
+            remote_host=call.caller_rtp["address"],
+            remote_port=call.caller_rtp["port"],
+            call_id=self.call_id,
+        )
+        return player if player.start() else None
+
+    def _greeting_audio(self) -> str | bytes:
+        """
+        Pick the mailbox's custom greeting or the default prompt (worker pool)
+
+        Returns:
+            Path of the custom greeting, or the default greeting's WAV data
+        """
+        from pbx.utils.audio import get_prompt_audio
+
+        pbx = self.pbx_core
+        extension = self.call.to_extension
+        mailbox = pbx.voicemail_system.get_mailbox(extension)
+        custom_greeting_path = mailbox.get_greeting_path()
+        if custom_greeting_path:
+            if Path(custom_greeting_path).exists():
+                file_size = Path(custom_greeting_path).stat().st_size
+                pbx.logger.info(
+                    f"Using custom greeting for extension {extension}: "
+                    f"{custom_greeting_path} ({file_size} bytes)"
+                )
+                return custom_greeting_path
+            pbx.logger.warning(
+                f"Custom greeting file not found at {custom_greeting_path}, using default"
+            )
+
+        # Default prompt: "Please leave a message after the tone" from
+        # voicemail_prompts/leave_message.wav, or a generated tone
+        pbx.logger.info(f"Using default greeting for extension {extension}")
+        return get_prompt_audio("leave_message")
+
+    def _start_recorder(self) -> None:
+        """Hand the port from the greeting player to the recorder on the worker pool"""
+        player, self.player = self.player, None
+        self.run_in_worker("open_recorder", self._open_recorder, player)
+
+    def _open_recorder(self, player: Any) -> tuple[Any, Any] | None:
+        """
+        Stop the greeting player and start the RTP recorder (worker pool)
+
+        Returns:
+            (recorder, dtmf_detector), or None if the recorder failed to start
+        """
+        from pbx.rtp.handler import RTPRecorder
+        from pbx.rtp.jitter_buffer import STAGE_RECORDING, create_stage_buffer
+        from pbx.utils.dtmf import DTMFDetector
+
+        pbx = self.pbx_core
+        if player:
+            player.stop()
+
+        # Start RTP recorder on the allocated port with the configured
+        # DTMF payload type so telephone-event packets are properly filtered
+        recorder = RTPRecorder(
+            self.call.rtp_ports[0],
+            self.call_id,
+            dtmf_payload_type=pbx._get_dtmf_payload_type(),
+            jitter_buffer=create_stage_buffer(
+                pbx.config.get("rtp.jitter_buffer", {}), STAGE_RECORDING
+            ),
+        )
+        if not recorder.start():
+            return None
+        return recorder, DTMFDetector(sample_rate=8000)
+
+    def _recording_started(self, recorder: Any, dtmf_detector: Any) -> None:
+        """Record until #, the maximum length or hangup"""
+        self.recorder = recorder
+        self.dtmf_detector = dtmf_detector
+        # Stored on the call so end_call() can save the message on hangup
+        self.call.voicemail_recorder = recorder
+        self.set_timer("max_duration", self.max_duration)
+        self.set_timer("inband_scan", INBAND_SCAN_INTERVAL)
+        self.pbx_core.logger.info(
+            f"Started voicemail recording for call {self.call_id}, "
+            f"max duration: {self.max_duration}s"
+        )
+
+    def _scan_inband(self) -> None:
+        """Hand the most recent caller audio to the worker pool for # detection"""
+        if self.call.state == CallState.ENDED or not self.recorder.running:
+            self.pbx_core.logger.debug(
+                f"DTMF monitoring ended for voicemail recording on call {self.call_id}"
+            )
+            self.finish()
+            return
+        self.set_timer("inband_scan", INBAND_SCAN_INTERVAL)
+        if self._scanning:
+            return  # Previous scan still running
+
+        recorded_data = getattr(self.recorder, "recorded_data", None)
+        if not recorded_data:
+            return
+        recent_audio = b"".join(recorded_data[-DTMF_DETECTION_PACKETS:])
+        if len(recent_audio) <= MIN_AUDIO_BYTES_FOR_DTMF:
+            return
+        self._scanning = True
+        self.run_in_worker("inband_scan", self._detect_inband, recent_audio)
+
+    def _detect_inband(self, recent_audio: bytes) -> str | None:
+        """Look for a DTMF tone in recorded G.711 audio (worker pool)"""
+        # G.711 u-law is 8-bit samples, one byte per sample; convert unsigned
+        # bytes to signed float (-1.0 to 1.0)
+        samples = [(b - 128) / 128.0 for b in struct.unpack(f"{len(recent_audio)}B", recent_audio)]
+        return self.dtmf_detector.detect_tone(samples)
+
+    def _complete(self) -> None:
+        """Save the message and end the call on the worker pool"""
+        self.run_in_worker("complete", self.pbx_core._complete_voicemail_recording, self.call_id)
+        self.finish()
+
+    def _end_call(self) -> None:
+        """End the call on the worker pool (sends BYE, writes the CDR)"""
+        self.run_in_worker("end_call", self.pbx_core.end_call, self.call_id)
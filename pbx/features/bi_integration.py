@@ -5,7 +5,11 @@
 
 import csv
 import json
+import re
 import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
 from datetime import UTC, datetime, timedelta
 from enum import Enum
 from pathlib import Path
@@ -32,6 +36,7 @@ class ExportFormat(Enum):
 
     CSV = "csv"
     JSON = "json"
+    JSON_LINES = "jsonl"
     PARQUET = "parquet"
     EXCEL = "excel"
     SQL = "sql"
@@ -49,6 +54,183 @@ def __init__(self, name: str, query: str) -> None:
         self.export_count = 0
 
 
+# Dataset queries use :start_date / :end_date placeholders; "::" casts are left alone
+_QUERY_PARAM_PATTERN = re.compile(r"(?<![:\w]):(start_date|end_date)\b")
+
+
+def _bind_query(query: str, start_date: datetime, end_date: datetime) -> tuple[str, dict]:
+    """
+    Convert dataset placeholders to driver-bound parameters
+
+    Args:
+        query: SQL with :start_date / :end_date placeholders
+        start_date: Start date parameter
+        end_date: End date parameter
+
+    Returns:
+        tuple: (query in pyformat paramstyle, parameter dict)
+    """
+    # Literal % (e.g. LIKE '%x') must be escaped once parameters are bound
+    bound = _QUERY_PARAM_PATTERN.sub(r"%(\1)s", query.replace("%", "%%"))
+    return bound, {"start_date": start_date, "end_date": end_date}
+
+
+def _json_default(obj: Any) -> str:
+    """Serialize datetimes, decimals and other non-JSON values as strings"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+
+class _CSVStreamWriter:
+    """Write rows to CSV one batch at a time"""
+
+    extension = "csv"
+
+    def __init__(self, filename: str) -> None:
+        self._file = Path(filename).open("w", newline="")  # noqa: SIM115 - closed in close()
+        self._writer: csv.DictWriter | None = None
+
+    def write_batch(self, rows: list[dict]) -> None:
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._file, fieldnames=list(rows[0]))
+            self._writer.writeheader()
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _JSONStreamWriter:
+    """Write rows as one JSON array, emitting each batch as it arrives"""
+
+    extension = "json"
+
+    def __init__(self, filename: str) -> None:
+        self._file = Path(filename).open("w")  # noqa: SIM115 - closed in close()
+        self._file.write("[")
+        self._first = True
+
+    def write_batch(self, rows: list[dict]) -> None:
+        for row in rows:
+            self._file.write("\n" if self._first else ",\n")
+            self._file.write(json.dumps(row, default=_json_default))
+            self._first = False
+
+    def close(self) -> None:
+        self._file.write("]\n" if self._first else "\n]\n")
+        self._file.close()
+
+
+class _JSONLinesStreamWriter:
+    """Write one JSON object per line, so the file never has to be held in memory"""
+
+    extension = "jsonl"
+
+    def __init__(self, filename: str) -> None:
+        self._file = Path(filename).open("w")  # noqa: SIM115 - closed in close()
+
+    def write_batch(self, rows: list[dict]) -> None:
+        self._file.writelines(json.dumps(row, default=_json_default) + "\n" for row in rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ParquetStreamWriter:
+    """Write each batch as one Parquet row group (requires pyarrow)"""
+
+    extension = "parquet"
+
+    def __init__(self, filename: str) -> None:
+        import pyarrow.parquet as pq
+
+        self._pq = pq
+        self._filename = filename
+        self._writer = None
+
+    def write_batch(self, rows: list[dict]) -> None:
+        import pyarrow as pa
+
+        if self._writer is None:
+            table = pa.Table.from_pylist(rows)
+            self._writer = self._pq.ParquetWriter(self._filename, table.schema)
+        else:
+            # Later batches are coerced to the schema inferred from the first
+            table = pa.Table.from_pylist(rows, schema=self._writer.schema)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is None:
+            import pyarrow as pa
+
+            self._pq.write_table(pa.table({}), self._filename)
+        else:
+            self._writer.close()
+
+
+class _ExcelStreamWriter:
+    """Write rows through openpyxl's write-only (streaming) workbook"""
+
+    extension = "xlsx"
+
+    def __init__(self, filename: str, sheet_name: str) -> None:
+        from openpyxl import Workbook
+
+        self._filename = filename
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet(sheet_name[:31])  # Excel sheet name limit
+        self._headers: list[str] | None = None
+
+    def write_batch(self, rows: list[dict]) -> None:
+        if self._headers is None:
+            self._headers = list(rows[0])
+            self._sheet.append(self._headers)
+        for row in rows:
+            self._sheet.append([row.get(col) for col in self._headers])
+
+    def close(self) -> None:
+        self._workbook.save(self._filename)
+
+
+class _SQLStreamWriter:
+    """Write rows as SQL INSERT statements one batch at a time"""
+
+    extension = "sql"
+
+    def __init__(self, filename: str, table_name: str) -> None:
+        self._file = Path(filename).open("w")  # noqa: SIM115 - closed in close()
+        self._table = table_name
+        self._columns: list[str] | None = None
+
+    def write_batch(self, rows: list[dict]) -> None:
+        if self._columns is None:
+            self._columns = list(rows[0])
+            col_defs = ", ".join(f'"{col}" TEXT' for col in self._columns)
+            self._file.write(f'CREATE TABLE IF NOT EXISTS "{self._table}" ({col_defs});\n\n')
+
+        col_names = ", ".join(f'"{col}"' for col in self._columns)
+        for row in rows:
+            values = []
+            for col in self._columns:
+                val = row.get(col)
+                if val is None:
+                    values.append("NULL")
+                elif isinstance(val, (int, float)):
+                    values.append(str(val))
+                else:
+                    escaped = str(val).replace("'", "''")
+                    values.append(f"'{escaped}'")
+            self._file.write(
+                f'INSERT INTO "{self._table}" ({col_names}) VALUES ({", ".join(values)});\n'
+            )
+
+    def close(self) -> None:
+        if self._columns is None:
+            self._file.write(f"-- No data for {self._table}\n")
+        self._file.close()
+
+
 class BIIntegration:
     """
     Business Intelligence Integration
@@ -74,6 +256,10 @@ def __init__(self, config: Any | None = None) -> None:
         self.export_path = bi_config.get("export_path", "/var/pbx/bi_exports")
         self.auto_export_enabled = bi_config.get("auto_export", False)
         self.export_schedule = bi_config.get("export_schedule", "daily")  # daily, weekly, monthly
+        self.export_batch_size = bi_config.get("export_batch_size", 5000)
+        self.max_concurrent_exports = bi_config.get("max_concurrent_exports", 2)
+        self.max_finished_jobs = bi_config.get("max_finished_jobs", 100)
+        self.job_retention_hours = bi_config.get("job_retention_hours", 24)
 
         # Datasets
         self.datasets: dict[str, DataSet] = {}
@@ -84,6 +270,12 @@ def __init__(self, config: Any | None = None) -> None:
         self._scheduled_timers: dict[str, threading.Timer] = {}
         self._timer_lock = threading.Lock()
 
+        # Background export jobs
+        self.export_jobs: dict[str, dict] = {}
+        self._export_cancel_events: dict[str, threading.Event] = {}
+        self._export_slots = threading.Semaphore(self.max_concurrent_exports)
+        self._jobs_lock = threading.Lock()
+
         # Statistics
         self.total_exports = 0
         self.failed_exports = 0
@@ -123,7 +315,10 @@ def _initialize_default_datasets(self) -> None:
 
     def _execute_query(self, query: str, start_date: datetime, end_date: datetime) -> list[dict]:
         """
-        Execute query and fetch data from database
+        Execute query and fetch all rows from the shared connection
+
+        Intended for small result sets (schema samples, short ranges); full
+        dataset exports go through _iter_query instead.
 
         Args:
             query: SQL query
@@ -142,15 +337,13 @@ def _execute_query(self, query: str, start_date: datetime, end_date: datetime) -
                 self.logger.warning("Database not available for BI export")
                 return []
 
-            # Replace query parameters
-            query = query.replace(":start_date", f"'{start_date.isoformat()}'")
-            query = query.replace(":end_date", f"'{end_date.isoformat()}'")
+            query, params = _bind_query(query, start_date, end_date)
 
             # Execute query
             from psycopg2.extras import RealDictCursor
 
             cursor = db.connection.cursor(cursor_factory=RealDictCursor)
-            cursor.execute(query)
+            cursor.execute(query, params)
             results = cursor.fetchall()
             cursor.close()
             # Convert RealDictRow to regular dict
@@ -159,6 +352,331 @@ def _execute_query(self, query: str, start_date: datetime, end_date: datetime) -
             self.logger.error(f"Query execution failed: {e}")
             return []
 
+    def _iter_query(
+        self,
+        query: str,
+        start_date: datetime,
+        end_date: datetime,
+        batch_size: int | None = None,
+    ) -> Iterator[list[dict]]:
+        """
+        Stream query results in batches from a server-side cursor
+
+        Runs on a dedicated read-only connection so a long export never holds
+        the shared connection, and only one batch of rows is in memory at a time.
+
+        Args:
+            query: SQL query
+            start_date: Start date parameter
+            end_date: End date parameter
+            batch_size: Rows fetched per round trip
+
+        Yields:
+            list[dict]: Batches of rows
+        """
+        from pbx.utils.database import get_database
+
+        db = get_database()
+        if not db or not db.enabled:
+            raise RuntimeError("Database not available for BI export")
+
+        connection = db.open_dedicated_connection()
+        if connection is None:
+            raise RuntimeError("Could not open a database connection for BI export")
+
+        batch_size = batch_size or self.export_batch_size
+        query, params = _bind_query(query, start_date, end_date)
+        try:
+            from psycopg2.extras import RealDictCursor
+
+            connection.set_session(readonly=True)
+            # Named cursor = server-side cursor: PostgreSQL keeps the result set
+            cursor = connection.cursor(
+                name=f"bi_export_{uuid.uuid4().hex[:12]}", cursor_factory=RealDictCursor
+            )
+            cursor.itersize = batch_size
+            try:
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield [dict(row) for row in rows]
+            finally:
+                cursor.close()
+        finally:
+            try:
+                connection.rollback()
+            finally:
+                connection.close()
+
+    def _open_stream_writer(
+        self, export_format: ExportFormat, dataset_name: str, timestamp: str
+    ) -> tuple[Any, str]:
+        """
+        Create a chunked writer for a streaming export
+
+        Args:
+            export_format: Export format
+            dataset_name: Dataset name
+            timestamp: Timestamp used in the file name
+
+        Returns:
+            tuple: (writer, file path)
+        """
+        base = f"{self.export_path}/{dataset_name}_{timestamp}"
+
+        if export_format == ExportFormat.PARQUET:
+            try:
+                return _ParquetStreamWriter(f"{base}.parquet"), f"{base}.parquet"
+            except ImportError:
+                self.logger.warning("pyarrow not installed, falling back to CSV")
+        elif export_format == ExportFormat.EXCEL:
+            try:
+                return _ExcelStreamWriter(f"{base}.xlsx", dataset_name), f"{base}.xlsx"
+            except ImportError:
+                self.logger.warning("openpyxl not installed, falling back to CSV")
+        elif export_format == ExportFormat.JSON:
+            return _JSONStreamWriter(f"{base}.json"), f"{base}.json"
+        elif export_format == ExportFormat.JSON_LINES:
+            return _JSONLinesStreamWriter(f"{base}.jsonl"), f"{base}.jsonl"
+        elif export_format == ExportFormat.SQL:
+            return _SQLStreamWriter(f"{base}.sql", dataset_name), f"{base}.sql"
+
+        return _CSVStreamWriter(f"{base}.csv"), f"{base}.csv"
+
+    def export_dataset_streaming(
+        self,
+        dataset_name: str,
+        export_format: ExportFormat = ExportFormat.CSV,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+        batch_size: int | None = None,
+        progress_callback: Callable[[int], None] | None = None,
+        cancel_event: threading.Event | None = None,
+    ) -> dict:
+        """
+        Export a dataset without materializing it in memory
+
+        Rows are read from a server-side cursor in batches and each batch is
+        written straight to the output file. The export fails if the database
+        is unavailable rather than producing an empty file.
+
+        Args:
+            dataset_name: Name of dataset to export
+            export_format: Export format
+            start_date: Start date for data
+            end_date: End date for data
+            batch_size: Rows per batch (defaults to export_batch_size)
+            progress_callback: Called with the running row count after each batch
+            cancel_event: Set to stop the export after the current batch
+
+        Returns:
+            dict: Export result
+        """
+        if dataset_name not in self.datasets:
+            return {"success": False, "error": f"Dataset {dataset_name} not found"}
+
+        dataset = self.datasets[dataset_name]
+        start_date = start_date or datetime.now(UTC) - timedelta(days=30)
+        end_date = end_date or datetime.now(UTC)
+
+        self.logger.info(f"Streaming export of '{dataset_name}' to {export_format.value}")
+        self.logger.info(f"  Date range: {start_date} to {end_date}")
+
+        Path(self.export_path).mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now(UTC).strftime("%Y%m%d_%H%M%S")
+        writer, export_file = self._open_stream_writer(export_format, dataset_name, timestamp)
+
+        record_count = 0
+        cancelled = False
+        try:
+            for rows in self._iter_query(dataset.query, start_date, end_date, batch_size):
+                writer.write_batch(rows)
+                record_count += len(rows)
+                if progress_callback:
+                    progress_callback(record_count)
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelled = True
+                    break
+        except Exception as e:
+            writer.close()
+            Path(export_file).unlink(missing_ok=True)
+            self.logger.error(f"Streaming export of {dataset_name} failed: {e}")
+            return {"success": False, "dataset": dataset_name, "error": str(e)}
+        writer.close()
+
+        if cancelled:
+            Path(export_file).unlink(missing_ok=True)
+            self.logger.info(f"Streaming export of {dataset_name} cancelled")
+            return {"success": False, "dataset": dataset_name, "error": "Export cancelled"}
+
+        dataset.last_exported = datetime.now(UTC)
+        dataset.export_count += 1
+        self.total_exports += 1
+        self.last_export_time = datetime.now(UTC)
+        self.logger.info(f"Exported {record_count} rows to {export_file}")
+
+        return {
+            "success": True,
+            "dataset": dataset_name,
+            "format": export_format.value,
+            "file_path": export_file,
+            "record_count": record_count,
+            "exported_at": datetime.now(UTC).isoformat(),
+        }
+
+    def start_export_job(
+        self,
+        dataset_name: str,
+        export_format: ExportFormat = ExportFormat.CSV,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+    ) -> dict:
+        """
+        Run a streaming export in the background
+
+        At most max_concurrent_exports jobs run at once; the rest wait queued.
+
+        Args:
+            dataset_name: Name of dataset to export
+            export_format: Export format
+            start_date: Start date for data
+            end_date: End date for data
+
+        Returns:
+            dict: The new job's status (see get_export_job)
+        """
+        if dataset_name not in self.datasets:
+            return {"success": False, "error": f"Dataset {dataset_name} not found"}
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "dataset": dataset_name,
+            "format": export_format.value,
+            "status": "queued",
+            "rows_exported": 0,
+            "created_at": datetime.now(UTC).isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "file_path": None,
+            "error": None,
+        }
+        cancel_event = threading.Event()
+        with self._jobs_lock:
+            self._prune_export_jobs()
+            self.export_jobs[job_id] = job
+            self._export_cancel_events[job_id] = cancel_event
+
+        thread = threading.Thread(
+            target=self._run_export_job,
+            args=(job, export_format, start_date, end_date, cancel_event),
+            daemon=True,
+            name=f"bi_export_job_{job_id[:8]}",
+        )
+        thread.start()
+        return {"success": True, **job}
+
+    def _run_export_job(
+        self,
+        job: dict,
+        export_format: ExportFormat,
+        start_date: datetime | None,
+        end_date: datetime | None,
+        cancel_event: threading.Event,
+    ) -> None:
+        """Worker thread body for a background export job"""
+        with self._export_slots:
+            if cancel_event.is_set():
+                job["status"] = "cancelled"
+                job["finished_at"] = datetime.now(UTC).isoformat()
+                return
+
+            job["status"] = "running"
+            job["started_at"] = datetime.now(UTC).isoformat()
+            started = time.monotonic()
+
+            def on_progress(rows: int) -> None:
+                job["rows_exported"] = rows
+                elapsed = time.monotonic() - started
+                job["rows_per_second"] = round(rows / elapsed, 1) if elapsed > 0 else 0.0
+
+            result = self.export_dataset_streaming(
+                job["dataset"],
+                export_format,
+                start_date,
+                end_date,
+                progress_callback=on_progress,
+                cancel_event=cancel_event,
+            )
+
+        if result.get("success"):
+            job["status"] = "completed"
+            job["file_path"] = result["file_path"]
+            job["rows_exported"] = result["record_count"]
+        elif cancel_event.is_set():
+            job["status"] = "cancelled"
+        else:
+            self.failed_exports += 1
+            job["status"] = "failed"
+            job["error"] = result.get("error")
+        job["finished_at"] = datetime.now(UTC).isoformat()
+
+        with self._jobs_lock:
+            self._export_cancel_events.pop(job["job_id"], None)
+
+    def _prune_export_jobs(self) -> None:
+        """Drop finished jobs past the retention age or count (caller holds _jobs_lock)"""
+        cutoff = (datetime.now(UTC) - timedelta(hours=self.job_retention_hours)).isoformat()
+        finished = sorted(
+            (job for job in self.export_jobs.values() if job["finished_at"] is not None),
+            key=lambda job: job["finished_at"],
+            reverse=True,
+        )
+        for index, job in enumerate(finished):
+            if index >= self.max_finished_jobs or job["finished_at"] < cutoff:
+                del self.export_jobs[job["job_id"]]
+
+    def get_export_job(self, job_id: str) -> dict | None:
+        """
+        Get a background export job's status and progress
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            dict | None: Job status or None if unknown
+        """
+        job = self.export_jobs.get(job_id)
+        return dict(job) if job else None
+
+    def list_export_jobs(self) -> list[dict]:
+        """List background export jobs, newest first"""
+        return sorted(
+            (dict(job) for job in self.export_jobs.values()),
+            key=lambda job: job["created_at"],
+            reverse=True,
+        )
+
+    def cancel_export_job(self, job_id: str) -> bool:
+        """
+        Cancel a queued or running export job
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            bool: True if the job was still active and has been signalled
+        """
+        with self._jobs_lock:
+            cancel_event = self._export_cancel_events.get(job_id)
+        if cancel_event is None:
+            return False
+        cancel_event.set()
+        self.logger.info(f"Cancelling BI export job {job_id}")
+        return True
+
     def _format_data(self, data: list[dict], export_format: ExportFormat, dataset_name: str) -> str:
         """
         Convert data to requested format
@@ -180,6 +698,8 @@ def _format_data(self, data: list[dict], export_format: ExportFormat, dataset_na
             return self._export_csv(data, dataset_name, timestamp)
         if export_format == ExportFormat.JSON:
             return self._export_json(data, dataset_name, timestamp)
+        if export_format == ExportFormat.JSON_LINES:
+            return self._export_json_lines(data, dataset_name, timestamp)
         if export_format == ExportFormat.EXCEL:
             return self._export_excel(data, dataset_name, timestamp)
         if export_format == ExportFormat.PARQUET:
@@ -224,6 +744,19 @@ def serialize_datetime(obj: Any) -> str:
         self.logger.info(f"Exported {len(data)} rows to {filename}")
         return filename
 
+    def _export_json_lines(self, data: list[dict], dataset_name: str, timestamp: str) -> str:
+        """Export data to JSON Lines (one object per line)"""
+        filename = f"{self.export_path}/{dataset_name}_{timestamp}.jsonl"
+
+        writer = _JSONLinesStreamWriter(filename)
+        try:
+            writer.write_batch(data)
+        finally:
+            writer.close()
+
+        self.logger.info(f"Exported {len(data)} rows to {filename}")
+        return filename
+
     def _export_excel(self, data: list[dict], dataset_name: str, timestamp: str) -> str:
         """Export data to Excel (requires openpyxl)"""
         filename = f"{self.export_path}/{dataset_name}_{timestamp}.xlsx"
@@ -713,7 +1246,8 @@ def _run_scheduled_export(
         self.logger.info(f"Running scheduled export for {dataset_name}")
 
         try:
-            result = self.export_dataset(dataset_name, export_format=export_format)
+            # Scheduled exports cover whole periods, so stream rather than fetch all rows
+            result = self.export_dataset_streaming(dataset_name, export_format=export_format)
 
             if result.get("success"):
                 self.logger.info(
@@ -874,6 +1408,9 @@ def get_statistics(self) -> dict:
                 self.last_export_time.isoformat() if self.last_export_time else None
             ),
             "auto_export_enabled": self.auto_export_enabled,
+            "active_export_jobs": sum(
+                1 for job in self.export_jobs.values() if job["status"] in ("queued", "running")
+            ),
         }
 
 
@@ -3,7 +3,11 @@
 Manages incoming calls and distributes them to available agents
 """
 
+import bisect
+import heapq
+import itertools
 import random
+from collections import OrderedDict, deque
 from datetime import UTC, datetime
 from enum import Enum
 from typing import Any
@@ -33,7 +37,9 @@ class AgentStatus(Enum):
 class QueuedCall:
     """Represents a call in queue"""
 
-    def __init__(self, call_id: str, caller_extension: str, queue_number: str) -> None:
+    def __init__(
+        self, call_id: str, caller_extension: str, queue_number: str, priority: int = 0
+    ) -> None:
         """
         Initialize queued call
 
@@ -41,12 +47,29 @@ def __init__(self, call_id: str, caller_extension: str, queue_number: str) -> No
             call_id: Call identifier
             caller_extension: Caller's extension
             queue_number: Queue number called
+            priority: Calls with higher priority are answered first
         """
         self.call_id = call_id
         self.caller_extension = caller_extension
         self.queue_number = queue_number
+        self.priority = priority
         self.enqueue_time = datetime.now(UTC)
-        self.position = 0
+        self._enqueued_at = self.enqueue_time.timestamp()
+        self._position = 0
+        # Set while the call waits in a queue
+        self._queue: CallQueue | None = None
+        self._seq = 0
+
+    @property
+    def position(self) -> int:
+        """1-based position in queue, computed from sequence numbers"""
+        if self._queue is not None:
+            return self._queue.position_of(self)
+        return self._position
+
+    @position.setter
+    def position(self, value: int) -> None:
+        self._position = value
 
     def get_wait_time(self) -> float:
         """Get time spent in queue (seconds)"""
@@ -70,23 +93,33 @@ def __init__(self, extension: str, name: str = "") -> None:
         self.calls_taken = 0
         self.last_call_time = None
         self.current_call_id = None
+        # Queues whose availability index tracks this agent
+        self._queues: list[CallQueue] = []
+
+    def _notify(self) -> None:
+        for queue in self._queues:
+            queue.available.update(self)
 
     def set_available(self) -> None:
         """set agent as available"""
         self.status = AgentStatus.AVAILABLE
+        self._notify()
 
     def set_busy(self, call_id: str | None = None) -> None:
         """set agent as busy"""
         self.status = AgentStatus.BUSY
         self.current_call_id = call_id
+        self._notify()
 
     def set_break(self) -> None:
         """set agent on break"""
         self.status = AgentStatus.ON_BREAK
+        self._notify()
 
     def set_offline(self) -> None:
         """set agent offline"""
         self.status = AgentStatus.OFFLINE
+        self._notify()
 
     def complete_call(self) -> None:
         """Mark call as completed"""
@@ -94,14 +127,119 @@ def complete_call(self) -> None:
         self.last_call_time = datetime.now(UTC)
         self.current_call_id = None
         self.status = AgentStatus.AVAILABLE
+        self._notify()
 
     def is_available(self) -> bool:
         """Check if agent is available"""
         return self.status == AgentStatus.AVAILABLE
 
 
+class AgentIndex:
+    """
+    Available agents of a queue, indexed for each distribution strategy
+
+    Round robin rotates an ordered dict; random picks from a swap-remove
+    array; least-recent and fewest-calls read the top of a heap whose
+    stale entries are skipped lazily. Agents report their own status
+    changes, so nothing is rescanned when calls are distributed.
+    """
+
+    def __init__(self) -> None:
+        """Initialize agent index"""
+        self._rotation: OrderedDict[str, Agent] = OrderedDict()
+        self._slots: list[Agent] = []
+        self._slot_of: dict[str, int] = {}
+        self._by_recent: list[tuple[float, int, str]] = []
+        self._by_calls: list[tuple[int, int, str]] = []
+        # Heap entries are valid only while they carry the agent's current stamp
+        self._stamps: dict[str, int] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._rotation)
+
+    def __contains__(self, extension: object) -> bool:
+        return extension in self._rotation
+
+    def agents(self) -> list[Agent]:
+        """Available agents in round robin order"""
+        return list(self._rotation.values())
+
+    def update(self, agent: Agent) -> None:
+        """Re-index an agent after its status or call counters changed"""
+        self.discard(agent.extension)
+        if agent.is_available():
+            self._add(agent)
+
+    def discard(self, extension: str) -> None:
+        """Drop an agent from the index"""
+        if self._rotation.pop(extension, None) is None:
+            return
+        del self._stamps[extension]
+        index = self._slot_of.pop(extension)
+        last = self._slots.pop()
+        if last.extension != extension:
+            self._slots[index] = last
+            self._slot_of[last.extension] = index
+
+    def _add(self, agent: Agent) -> None:
+        extension = agent.extension
+        stamp = next(self._counter)
+        self._rotation[extension] = agent
+        self._slot_of[extension] = len(self._slots)
+        self._slots.append(agent)
+        self._stamps[extension] = stamp
+        last_call = agent.last_call_time.timestamp() if agent.last_call_time else float("-inf")
+        heapq.heappush(self._by_recent, (last_call, stamp, extension))
+        heapq.heappush(self._by_calls, (agent.calls_taken, stamp, extension))
+        if len(self._by_recent) > 2 * len(self._rotation) + 64:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rebuild the heaps without stale entries"""
+        self._by_recent = [e for e in self._by_recent if self._stamps.get(e[2]) == e[1]]
+        self._by_calls = [e for e in self._by_calls if self._stamps.get(e[2]) == e[1]]
+        heapq.heapify(self._by_recent)
+        heapq.heapify(self._by_calls)
+
+    def _top(self, heap: list) -> Agent | None:
+        while heap:
+            _, stamp, extension = heap[0]
+            if self._stamps.get(extension) == stamp:
+                return self._rotation[extension]
+            heapq.heappop(heap)
+        return None
+
+    def next_round_robin(self) -> Agent | None:
+        """Agent at the front of the rotation, moved to the back"""
+        if not self._rotation:
+            return None
+        extension, agent = next(iter(self._rotation.items()))
+        self._rotation.move_to_end(extension)
+        return agent
+
+    def least_recent(self) -> Agent | None:
+        """Agent whose last call ended longest ago (never-called agents first)"""
+        return self._top(self._by_recent)
+
+    def fewest_calls(self) -> Agent | None:
+        """Agent with the fewest calls taken"""
+        return self._top(self._by_calls)
+
+    def random(self) -> Agent | None:
+        """Randomly chosen available agent"""
+        return random.choice(self._slots) if self._slots else None
+
+
 class CallQueue:
-    """Manages a call queue"""
+    """
+    Manages a call queue
+
+    Waiting calls sit in one FIFO deque per priority, so enqueue and
+    dequeue are O(1). A call's position is derived from its sequence
+    number and the sequence number at the head of its lane rather than
+    stored, so nothing is renumbered when the head is answered.
+    """
 
     def __init__(
         self,
@@ -126,10 +264,40 @@ def __init__(
         self.strategy = strategy
         self.max_wait_time = max_wait_time
         self.max_queue_size = max_queue_size
-        self.queue = []
         self.agents = {}
+        self.available = AgentIndex()
         self.logger = get_logger()
-        self.round_robin_index = 0
+
+        # priority -> waiting calls, oldest first
+        self._lanes: dict[int, deque[QueuedCall]] = {}
+        self._priorities: list[int] = []  # Priorities with waiting calls, ascending
+        self._next_seq = 0
+        self._size = 0
+        self._enqueue_time_sum = 0.0
+
+    @property
+    def calls_waiting(self) -> int:
+        """Number of calls waiting"""
+        return self._size
+
+    @property
+    def queue(self) -> list[QueuedCall]:
+        """Waiting calls in answer order"""
+        return [call for priority in reversed(self._priorities) for call in self._lanes[priority]]
+
+    def position_of(self, call: QueuedCall) -> int:
+        """
+        Position of a waiting call
+
+        Calls of higher priority are ahead of it; within its own lane the
+        offset from the head's sequence number gives its place.
+        """
+        lane = self._lanes[call.priority]
+        ahead = sum(
+            len(self._lanes[p])
+            for p in self._priorities[bisect.bisect_right(self._priorities, call.priority) :]
+        )
+        return ahead + call._seq - lane[0]._seq + 1
 
     def add_agent(self, agent: Any) -> None:
         """
@@ -138,32 +306,51 @@ def add_agent(self, agent: Any) -> None:
         Args:
             agent: Agent object
         """
+        previous = self.agents.get(agent.extension)
+        if previous is not None and previous is not agent:
+            self.remove_agent(agent.extension)
         self.agents[agent.extension] = agent
+        if self not in agent._queues:
+            agent._queues.append(self)
+        self.available.update(agent)
         self.logger.info(f"Added agent {agent.extension} to queue {self.queue_number}")
 
     def remove_agent(self, extension: str) -> None:
         """Remove agent from queue"""
-        if extension in self.agents:
-            del self.agents[extension]
+        agent = self.agents.pop(extension, None)
+        if agent is not None:
+            self.available.discard(extension)
+            if self in agent._queues:
+                agent._queues.remove(self)
 
-    def enqueue(self, call_id: str, caller_extension: str) -> QueuedCall | None:
+    def enqueue(self, call_id: str, caller_extension: str, priority: int = 0) -> QueuedCall | None:
         """
         Add call to queue
 
         Args:
             call_id: Call identifier
             caller_extension: Caller's extension
+            priority: Calls with higher priority are answered first
 
         Returns:
             QueuedCall object or None if queue is full
         """
-        if len(self.queue) >= self.max_queue_size:
+        if self._size >= self.max_queue_size:
             self.logger.warning(f"Queue {self.queue_number} is full")
             return None
 
-        queued_call = QueuedCall(call_id, caller_extension, self.queue_number)
-        queued_call.position = len(self.queue) + 1
-        self.queue.append(queued_call)
+        queued_call = QueuedCall(call_id, caller_extension, self.queue_number, priority)
+        queued_call._queue = self
+        queued_call._seq = self._next_seq
+        self._next_seq += 1
+
+        lane = self._lanes.get(priority)
+        if lane is None:
+            lane = self._lanes[priority] = deque()
+            bisect.insort(self._priorities, priority)
+        lane.append(queued_call)
+        self._size += 1
+        self._enqueue_time_sum += queued_call._enqueued_at
 
         self.logger.info(
             f"Call {call_id} added to queue {self.queue_number}, position {queued_call.position}"
@@ -177,56 +364,52 @@ def dequeue(self) -> Any | None:
         Returns:
             QueuedCall object or None
         """
-        if self.queue:
-            call = self.queue.pop(0)
-            self._update_positions()
-            return call
-        return None
-
-    def _update_positions(self) -> None:
-        """Update position numbers for queued calls"""
-        for i, call in enumerate(self.queue):
-            call.position = i + 1
+        if not self._priorities:
+            return None
+        return self._pop_head(self._priorities[-1])
+
+    def _pop_head(self, priority: int) -> QueuedCall:
+        """Remove the oldest call of a priority lane"""
+        lane = self._lanes[priority]
+        call = lane[0]
+        call.position = self.position_of(call)
+        call._queue = None
+        lane.popleft()
+        if not lane:
+            del self._lanes[priority]
+            self._priorities.remove(priority)
+        self._size -= 1
+        self._enqueue_time_sum -= call._enqueued_at
+        if not self._size:
+            self._enqueue_time_sum = 0.0
+        return call
 
     def get_next_agent(self) -> Any | None:
         """
         Get next available agent based on strategy
 
         Returns:
-            Agent object or None
+            Agent object (a list of agents for RING_ALL) or None
         """
-        available_agents = [a for a in self.agents.values() if a.is_available()]
-
-        if not available_agents:
+        if not self.available:
             return None
 
         if self.strategy == QueueStrategy.RING_ALL:
             # Return all available agents
-            return available_agents
+            return self.available.agents()
 
         if self.strategy == QueueStrategy.RANDOM:
-            return random.choice(available_agents)
+            return self.available.random()
 
-        if self.strategy == QueueStrategy.ROUND_ROBIN:
-            # Round robin distribution
-            if available_agents:
-                agent = available_agents[self.round_robin_index % len(available_agents)]
-                self.round_robin_index += 1
-                return agent
-
-        elif self.strategy == QueueStrategy.LEAST_RECENT:
+        if self.strategy == QueueStrategy.LEAST_RECENT:
             # Agent who hasn't taken a call longest
-            agent = min(
-                available_agents, key=lambda a: a.last_call_time or datetime.min.replace(tzinfo=UTC)
-            )
-            return agent
+            return self.available.least_recent()
 
-        elif self.strategy == QueueStrategy.FEWEST_CALLS:
+        if self.strategy == QueueStrategy.FEWEST_CALLS:
             # Agent with fewest calls
-            agent = min(available_agents, key=lambda a: a.calls_taken)
-            return agent
+            return self.available.fewest_calls()
 
-        return available_agents[0] if available_agents else None
+        return self.available.next_round_robin()
 
     def process_queue(self) -> list:
         """
@@ -237,51 +420,49 @@ def process_queue(self) -> list:
         """
         assignments = []
 
-        # Check for expired calls
-        expired = [c for c in self.queue if c.get_wait_time() > self.max_wait_time]
-        for call in expired:
-            self.queue.remove(call)
-            self.logger.warning(f"Call {call.call_id} expired in queue")
+        # Expire calls; each lane is oldest first, so only heads need checking
+        for priority in list(self._priorities):
+            lane = self._lanes[priority]
+            while lane and lane[0].get_wait_time() > self.max_wait_time:
+                call = self._pop_head(priority)
+                self.logger.warning(f"Call {call.call_id} expired in queue")
 
         # Assign calls to available agents
-        while self.queue:
+        while self._size:
             result = self.get_next_agent()
             if not result:
                 break
 
             call = self.dequeue()
-            if call:
-                # RING_ALL returns a list of agents; other strategies return a single agent
-                if isinstance(result, list):
-                    for agent in result:
-                        agent.set_busy(call.call_id)
-                    assignments.append((call, result))
-                    self.logger.info(f"Assigned call {call.call_id} to {len(result)} agents (ring all)")
-                else:
-                    result.set_busy(call.call_id)
-                    assignments.append((call, result))
-                    self.logger.info(f"Assigned call {call.call_id} to agent {result.extension}")
+            # RING_ALL returns a list of agents; other strategies return a single agent
+            if isinstance(result, list):
+                for agent in result:
+                    agent.set_busy(call.call_id)
+                assignments.append((call, result))
+                self.logger.info(f"Assigned call {call.call_id} to {len(result)} agents (ring all)")
+            else:
+                result.set_busy(call.call_id)
+                assignments.append((call, result))
+                self.logger.info(f"Assigned call {call.call_id} to agent {result.extension}")
 
         return assignments
 
     def get_queue_status(self) -> dict:
         """Get queue status information"""
-        available_agents = sum(1 for a in self.agents.values() if a.is_available())
-
         return {
             "queue_number": self.queue_number,
             "name": self.name,
-            "calls_waiting": len(self.queue),
+            "calls_waiting": self._size,
             "total_agents": len(self.agents),
-            "available_agents": available_agents,
+            "available_agents": len(self.available),
             "average_wait_time": self._get_average_wait_time(),
         }
 
     def _get_average_wait_time(self) -> float:
         """Calculate average wait time for calls in queue"""
-        if not self.queue:
+        if not self._size:
             return 0
-        return sum(c.get_wait_time() for c in self.queue) / len(self.queue)
+        return datetime.now(UTC).timestamp() - self._enqueue_time_sum / self._size
 
 
 class QueueSystem:
@@ -291,6 +472,13 @@ def __init__(self) -> None:
         """Initialize queue system"""
         self.queues = {}
         self.logger = get_logger()
+        # Optional LiveEventBus notified of queue changes (set by PBXCore)
+        self.event_bus = None
+
+    def _publish_status(self, queue: CallQueue) -> None:
+        """Publish a queue's current status to the live event bus"""
+        if self.event_bus:
+            self.event_bus.publish("queue.updated", queue.get_queue_status())
 
     def create_queue(
         self, queue_number: str, name: str, strategy: QueueStrategy = QueueStrategy.ROUND_ROBIN
@@ -329,15 +517,21 @@ def enqueue_call(self, queue_number: str, call_id: str, caller_extension: str) -
         """
         queue = self.get_queue(queue_number)
         if queue:
-            return queue.enqueue(call_id, caller_extension) is not None
+            if queue.enqueue(call_id, caller_extension) is None:
+                return False
+            self._publish_status(queue)
+            return True
         return False
 
     def process_all_queues(self) -> list:
         """Process all queues and return assignments"""
         all_assignments = []
         for queue in self.queues.values():
+            waiting = queue.calls_waiting
             assignments = queue.process_queue()
             all_assignments.extend(assignments)
+            if queue.calls_waiting != waiting:
+                self._publish_status(queue)
         return all_assignments
 
     def get_all_status(self) -> list[dict]:
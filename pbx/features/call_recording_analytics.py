@@ -8,6 +8,7 @@
 from pathlib import Path
 from typing import Any
 
+from pbx.utils.keyword_matcher import get_keyword_matcher
 from pbx.utils.logger import get_logger
 
 # Import Vosk for FREE offline transcription (already integrated)
@@ -27,6 +28,20 @@
     SPACY_AVAILABLE = False
 
 
+class _PCMReader:
+    """Minimal wave-like reader over in-memory 16-bit mono PCM"""
+
+    def __init__(self, pcm: bytes) -> None:
+        self.pcm = pcm
+        self.offset = 0
+
+    def readframes(self, n: int) -> bytes:
+        """Return the next n frames"""
+        chunk = self.pcm[self.offset : self.offset + n * 2]
+        self.offset += len(chunk)
+        return chunk
+
+
 class AnalysisType(Enum):
     """Analysis type enumeration"""
 
@@ -86,6 +101,7 @@ def __init__(self, config: Any | None = None) -> None:
         # Initialize NLP models
         self.vosk_model = None
         self.spacy_nlp = None
+        self._vosk_load_attempted = False
         self._initialize_models()
 
         self.logger.info("Call recording analytics initialized")
@@ -144,20 +160,28 @@ def analyze_recording(
             "analyses": {},
         }
 
+        # Decode and transcribe once, then feed every analyzer from memory
+        context = self._prepare_analysis_context(audio_path, analysis_types)
+        transcript = context["transcript_result"].get("transcript", "")
+        if "error" in context:
+            results["error"] = context["error"]
+
         # Perform each type of analysis
         for analysis_type in analysis_types:
             if analysis_type == "transcript":
-                results["analyses"]["transcript"] = self._transcribe(audio_path)
+                results["analyses"]["transcript"] = context["transcript_result"]
             elif analysis_type == "sentiment":
-                results["analyses"]["sentiment"] = self._analyze_sentiment(audio_path)
+                results["analyses"]["sentiment"] = self._analyze_sentiment_text(transcript)
             elif analysis_type == "keywords":
-                results["analyses"]["keywords"] = self._detect_keywords(audio_path)
+                results["analyses"]["keywords"] = self._detect_keywords_text(transcript)
             elif analysis_type == "compliance":
-                results["analyses"]["compliance"] = self._check_compliance(audio_path)
+                results["analyses"]["compliance"] = self._check_compliance_text(transcript)
             elif analysis_type == "quality":
-                results["analyses"]["quality"] = self._score_quality(audio_path)
+                results["analyses"]["quality"] = self._score_quality_text(
+                    transcript, context["audio"]
+                )
             elif analysis_type == "summary":
-                results["analyses"]["summary"] = self._summarize(audio_path)
+                results["analyses"]["summary"] = self._summarize_text(transcript)
 
             # Track statistics
             self.analyses_by_type[analysis_type] = self.analyses_by_type.get(analysis_type, 0) + 1
@@ -170,6 +194,131 @@ def analyze_recording(
 
         return results
 
+    def _prepare_analysis_context(self, audio_path: str, analysis_types: list[str]) -> dict:
+        """
+        Decode a recording once and transcribe it once for all analyzers
+
+        Args:
+            audio_path: Path to audio file
+            analysis_types: Requested analysis types
+
+        Returns:
+            dict: Decoded audio and transcription result shared by the analyzers,
+                plus error if the recording could not be decoded
+        """
+        known_types = {"transcript", "sentiment", "keywords", "compliance", "quality", "summary"}
+        if not known_types.intersection(analysis_types):
+            return {"audio": None, "transcript_result": {"transcript": ""}}
+
+        audio = self._decode_audio(audio_path)
+        if "error" in audio:
+            transcript_result = {
+                "transcript": "",
+                "confidence": 0.0,
+                "duration": 0,
+                "words": [],
+                "error": audio["error"],
+            }
+            return {"audio": None, "transcript_result": transcript_result, "error": audio["error"]}
+
+        return {
+            "audio": audio,
+            "transcript_result": self._transcribe_pcm(audio["pcm"], audio["sample_rate"]),
+        }
+
+    def _decode_audio(self, audio_path: str) -> dict:
+        """
+        Decode a WAV recording to mono 16-bit PCM in memory
+
+        Args:
+            audio_path: Path to audio file
+
+        Returns:
+            dict: pcm, sample_rate and duration, or error
+        """
+        import wave
+
+        try:
+            with wave.open(audio_path, "rb") as wf:
+                sample_rate = wf.getframerate()
+                channels = wf.getnchannels()
+                sample_width = wf.getsampwidth()
+                pcm = wf.readframes(wf.getnframes())
+        except (OSError, EOFError, wave.Error) as e:
+            self.logger.error(f"Could not decode recording {audio_path}: {e}")
+            return {"error": str(e) or type(e).__name__}
+
+        if sample_width != 2:
+            return {"error": f"Unsupported sample width: {sample_width * 8}-bit"}
+
+        if channels > 1:
+            import numpy as np
+
+            # Keep the first channel of the interleaved frames
+            usable = len(pcm) - len(pcm) % (channels * 2)
+            pcm = np.frombuffer(pcm[:usable], dtype="<i2")[::channels].tobytes()
+
+        frames = len(pcm) // 2
+        return {
+            "pcm": pcm,
+            "sample_rate": sample_rate,
+            "duration": frames / sample_rate if sample_rate > 0 else 0,
+        }
+
+    def _get_vosk_model(self) -> Any:
+        """Get the Vosk model, loading it at most once per instance"""
+        if self.vosk_model is None and not self._vosk_load_attempted:
+            self._vosk_load_attempted = True
+            self.vosk_model = self._load_vosk_model()
+        return self.vosk_model
+
+    def _transcribe_pcm(self, pcm: bytes, sample_rate: int) -> dict:
+        """
+        Transcribe already-decoded PCM audio using Vosk
+
+        Args:
+            pcm: Mono 16-bit PCM audio
+            sample_rate: Sample rate of the PCM audio
+
+        Returns:
+            dict: Transcription results with transcript, confidence, duration, words
+        """
+        duration = len(pcm) / 2 / sample_rate if sample_rate > 0 else 0
+        try:
+            from vosk import KaldiRecognizer
+        except ImportError:
+            return {
+                "transcript": "",
+                "confidence": 0.0,
+                "duration": duration,
+                "words": [],
+                "error": "Vosk not installed",
+            }
+
+        vosk_model = self._get_vosk_model()
+        if not vosk_model:
+            return {
+                "transcript": "",
+                "confidence": 0.0,
+                "duration": duration,
+                "words": [],
+                "error": "Vosk model not available",
+            }
+
+        rec = KaldiRecognizer(vosk_model, sample_rate)
+        rec.SetWords(True)
+        full_transcript, all_words, total_confidence, confidence_count = self._process_vosk_audio(
+            rec, _PCMReader(pcm)
+        )
+        avg_confidence = total_confidence / confidence_count if confidence_count > 0 else 0.0
+
+        return {
+            "transcript": " ".join(full_transcript),
+            "confidence": avg_confidence,
+            "duration": duration,
+            "words": all_words,
+        }
+
     def _load_vosk_model(self) -> None:
         """Load Vosk speech recognition model"""
         from vosk import Model
@@ -323,6 +472,18 @@ def _analyze_sentiment(self, audio_path: str) -> dict:
             transcript_result = self._transcribe(audio_path)
             transcript = transcript_result.get("transcript", "")
 
+        return self._analyze_sentiment_text(transcript)
+
+    def _analyze_sentiment_text(self, transcript: str) -> dict:
+        """
+        Analyze sentiment of an existing transcript
+
+        Args:
+            transcript: Call transcript
+
+        Returns:
+            dict: Sentiment analysis results
+        """
         # Sentiment keywords for fallback
         positive_words = {
             "thank",
@@ -399,11 +560,12 @@ def _analyze_sentiment(self, audio_path: str) -> dict:
 
         # Fallback to basic keyword analysis if spaCy not available
         elif transcript:
-            transcript_lower = transcript.lower()
-
-            # Count sentiment indicators
-            positive_count = sum(1 for word in positive_words if word in transcript_lower)
-            negative_count = sum(1 for word in negative_words if word in transcript_lower)
+            # Count sentiment indicators in one pass over the transcript
+            found = set(
+                get_keyword_matcher(sorted(positive_words | negative_words)).find_unique(transcript)
+            )
+            positive_count = len(found & positive_words)
+            negative_count = len(found & negative_words)
 
             # Calculate sentiment score (-1.0 to 1.0)
             total_indicators = positive_count + negative_count
@@ -444,6 +606,19 @@ def _detect_keywords(self, audio_path: str) -> dict:
         transcript_result = self._transcribe(audio_path)
         transcript = transcript_result.get("transcript", "")
 
+        return self._detect_keywords_text(transcript)
+
+    def _detect_keywords_text(self, transcript: str) -> dict:
+        """
+        Detect keywords and topics in an existing transcript
+
+        Args:
+            transcript: Call transcript
+
+        Returns:
+            dict: Detected keywords and topics
+        """
+
         # Keyword categories
         competitor_keywords = ["competitor", "alternative", "other company", "switch"]
         product_keywords = ["product", "service", "feature", "plan", "package"]
@@ -457,34 +632,35 @@ def _detect_keywords(self, audio_path: str) -> dict:
         issue_keywords_found = []
 
         if transcript:
-            transcript_lower = transcript.lower()
+            # One pass over the transcript finds every category's keywords
+            all_keyword_sets = [
+                sales_keywords,
+                support_keywords,
+                issue_keywords,
+                product_keywords,
+                competitor_keywords,
+            ]
+            found = set(
+                get_keyword_matcher(
+                    keyword for keyword_set in all_keyword_sets for keyword in keyword_set
+                ).find_unique(transcript)
+            )
 
             # Detect competitor mentions
             competitor_mentions.extend(
-                keyword for keyword in competitor_keywords if keyword in transcript_lower
+                keyword for keyword in competitor_keywords if keyword in found
             )
 
             # Detect product mentions
-            product_mentions.extend(
-                keyword for keyword in product_keywords if keyword in transcript_lower
-            )
+            product_mentions.extend(keyword for keyword in product_keywords if keyword in found)
 
             # Detect issue keywords
-            issue_keywords_found.extend(
-                keyword for keyword in issue_keywords if keyword in transcript_lower
-            )
+            issue_keywords_found.extend(keyword for keyword in issue_keywords if keyword in found)
 
             # Combine all for general keywords
-            all_keyword_sets = [
-                sales_keywords,
-                support_keywords,
-                issue_keywords,
-                product_keywords,
-                competitor_keywords,
-            ]
             for keyword_set in all_keyword_sets:
                 for keyword in keyword_set:
-                    if keyword in transcript_lower and keyword not in keywords:
+                    if keyword in found and keyword not in keywords:
                         keywords.append(keyword)
 
         return {
@@ -513,6 +689,19 @@ def _check_compliance(self, audio_path: str) -> dict:
         transcript_result = self._transcribe(audio_path)
         transcript = transcript_result.get("transcript", "")
 
+        return self._check_compliance_text(transcript)
+
+    def _check_compliance_text(self, transcript: str) -> dict:
+        """
+        Check compliance phrases in an existing transcript
+
+        Args:
+            transcript: Call transcript
+
+        Returns:
+            dict: Compliance check results
+        """
+
         # Compliance requirements
         required_phrases = [
             "this call may be recorded",
@@ -534,16 +723,16 @@ def _check_compliance(self, audio_path: str) -> dict:
         prohibited_found = []
 
         if transcript:
-            transcript_lower = transcript.lower()
+            found = set(
+                get_keyword_matcher(required_phrases + prohibited_phrases).find_unique(transcript)
+            )
 
             # Check for required phrases
-            required_found.extend(
-                phrase for phrase in required_phrases if phrase in transcript_lower
-            )
+            required_found.extend(phrase for phrase in required_phrases if phrase in found)
 
             # Check for prohibited phrases
             for phrase in prohibited_phrases:
-                if phrase in transcript_lower:
+                if phrase in found:
                     prohibited_found.append(phrase)
                     violations.append(f"Prohibited phrase detected: '{phrase}'")
 
@@ -581,6 +770,20 @@ def _score_quality(self, audio_path: str) -> dict:
         transcript_result = self._transcribe(audio_path)
         transcript = transcript_result.get("transcript", "")
 
+        return self._score_quality_text(transcript)
+
+    def _score_quality_text(self, transcript: str, audio: dict | None = None) -> dict:
+        """
+        Score call quality from an existing transcript and decoded audio
+
+        Args:
+            transcript: Call transcript
+            audio: Optional decoded audio (pcm, sample_rate) for signal metrics
+
+        Returns:
+            dict: Quality scores
+        """
+
         # Quality indicators
         positive_indicators = [
             "thank you",
@@ -663,13 +866,48 @@ def _score_quality(self, audio_path: str) -> dict:
                 + professionalism * 0.15
             )
 
-        return {
+        result = {
             "overall_score": round(overall_score, 2),  # 0-100
             "agent_performance": round(agent_performance, 2),
             "customer_satisfaction": round(customer_satisfaction, 2),
             "resolution_quality": round(resolution_quality, 2),
             "professionalism": round(professionalism, 2),
         }
+        if audio and audio.get("pcm"):
+            result["audio_metrics"] = self._audio_metrics(audio["pcm"], audio["sample_rate"])
+        return result
+
+    def _audio_metrics(self, pcm: bytes, sample_rate: int) -> dict:
+        """
+        Compute signal-level metrics from decoded PCM frames
+
+        Args:
+            pcm: Mono 16-bit PCM audio
+            sample_rate: Sample rate of the PCM audio
+
+        Returns:
+            dict: Silence ratio, clipping ratio and RMS level
+        """
+        import numpy as np
+
+        samples = np.frombuffer(pcm[: len(pcm) - len(pcm) % 2], dtype="<i2").astype(np.int32)
+        if not len(samples):
+            return {"silence_ratio": 0.0, "clipping_ratio": 0.0, "rms_level": 0.0}
+
+        # 20ms frames; a frame is silent when its mean amplitude is below threshold
+        frame_len = max(sample_rate // 50, 1)
+        usable = len(samples) - len(samples) % frame_len
+        frames = np.abs(samples[:usable]).reshape(-1, frame_len) if usable else None
+        total_frames = len(frames) if frames is not None else 0
+        silent_frames = int((frames.mean(axis=1) < 100).sum()) if total_frames else 0
+        clipped = int(((samples >= 32767) | (samples <= -32768)).sum())
+        rms = float(np.sqrt(np.mean(samples.astype(np.float64) ** 2)))
+
+        return {
+            "silence_ratio": round(silent_frames / total_frames, 3) if total_frames else 0.0,
+            "clipping_ratio": round(clipped / len(samples), 5),
+            "rms_level": round(rms, 1),
+        }
 
     def _summarize(self, audio_path: str) -> dict:
         """
@@ -690,6 +928,19 @@ def _summarize(self, audio_path: str) -> dict:
         transcript_result = self._transcribe(audio_path)
         transcript = transcript_result.get("transcript", "")
 
+        return self._summarize_text(transcript)
+
+    def _summarize_text(self, transcript: str) -> dict:
+        """
+        Summarize an existing transcript
+
+        Args:
+            transcript: Call transcript
+
+        Returns:
+            dict: Call summary with key points and action items
+        """
+
         summary = ""
         key_points = []
         action_items = []
@@ -7,6 +7,7 @@
 from enum import Enum
 from typing import Any
 
+from pbx.utils.keyword_matcher import KeywordMatcher
 from pbx.utils.logger import get_logger
 
 # ML libraries for improved classification
@@ -95,6 +96,8 @@ def __init__(self, config: Any | None = None) -> None:
 
         # Tagging rules
         self.tagging_rules: list[dict] = []
+        self._rules_matcher: KeywordMatcher | None = None
+        self._rules_matcher_size = 0
         self._initialize_default_rules()
 
         # Statistics
@@ -389,19 +392,26 @@ def auto_tag_call(
 
         return tags_added
 
+    def _get_rules_matcher(self) -> KeywordMatcher:
+        """Get one compiled matcher over every rule's keywords, rebuilt when rules change"""
+        if self._rules_matcher is None or self._rules_matcher_size != len(self.tagging_rules):
+            self._rules_matcher = KeywordMatcher(
+                keyword for rule in self.tagging_rules for keyword in rule.get("keywords", [])
+            )
+            self._rules_matcher_size = len(self.tagging_rules)
+        return self._rules_matcher
+
     def _apply_rules(self, call_id: str, transcript: str) -> list[str]:
         """Apply rule-based tagging"""
         tags_added = []
-        transcript_lower = transcript.lower()
+        found = {keyword.lower() for keyword in self._get_rules_matcher().find_unique(transcript)}
 
         for rule in self.tagging_rules:
             # Check if any keyword matches
-            for keyword in rule["keywords"]:
-                if keyword in transcript_lower:
-                    tag = rule["tag"]
-                    if self.tag_call(call_id, tag, TagSource.RULE, 0.95):
-                        tags_added.append(tag)
-                    break
+            if any(keyword.lower() in found for keyword in rule.get("keywords", [])):
+                tag = rule["tag"]
+                if self.tag_call(call_id, tag, TagSource.RULE, 0.95):
+                    tags_added.append(tag)
 
         return tags_added
 
@@ -805,6 +815,7 @@ def add_tagging_rule(
 
         rule = {"name": name, "keywords": keywords, "tag": tag, "category": category}
         self.tagging_rules.append(rule)
+        self._rules_matcher = None
 
         self.logger.info(f"Added tagging rule: {name}")
         return True
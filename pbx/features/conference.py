@@ -10,26 +10,36 @@
 class ConferenceRoom:
     """Represents a conference room"""
 
-    def __init__(self, room_number: str, max_participants: int = 10) -> None:
+    def __init__(self, room_number: str, max_participants: int = 10, mixer: Any = None) -> None:
         """
         Initialize conference room
 
         Args:
             room_number: Room identifier
             max_participants: Maximum number of participants
+            mixer: Optional ConferenceMixer that mixes participant audio
         """
         self.room_number = room_number
         self.max_participants = max_participants
         self.participants = []
+        self.mixer = mixer
         self.logger = get_logger()
 
-    def add_participant(self, extension: str, call_id: str) -> bool:
+    def add_participant(
+        self,
+        extension: str,
+        call_id: str,
+        codec: str = "PCMU",
+        send_callback: Any = None,
+    ) -> bool:
         """
         Add participant to conference
 
         Args:
             extension: Extension number
             call_id: Call ID
+            codec: Negotiated audio codec (used when the room mixes audio)
+            send_callback: Callable that transmits mixed RTP packets to this leg
 
         Returns:
             True if added successfully
@@ -40,6 +50,9 @@ def add_participant(self, extension: str, call_id: str) -> bool:
 
         participant = {"extension": extension, "call_id": call_id, "muted": False}
 
+        if self.mixer and not self.mixer.add_participant(call_id, codec, send_callback):
+            return False
+
         self.participants.append(participant)
         self.logger.info(f"Added {extension} to conference {self.room_number}")
         return True
@@ -57,6 +70,8 @@ def remove_participant(self, extension: str) -> bool:
         for i, participant in enumerate(self.participants):
             if participant["extension"] == extension:
                 self.participants.pop(i)
+                if self.mixer:
+                    self.mixer.remove_participant(participant["call_id"])
                 self.logger.info(f"Removed {extension} from conference {self.room_number}")
                 return True
         return False
@@ -66,6 +81,8 @@ def mute_participant(self, extension: str) -> bool:
         for participant in self.participants:
             if participant["extension"] == extension:
                 participant["muted"] = True
+                if self.mixer:
+                    self.mixer.set_muted(participant["call_id"], True)
                 return True
         return False
 
@@ -74,6 +91,8 @@ def unmute_participant(self, extension: str) -> bool:
         for participant in self.participants:
             if participant["extension"] == extension:
                 participant["muted"] = False
+                if self.mixer:
+                    self.mixer.set_muted(participant["call_id"], False)
                 return True
         return False
 
@@ -89,11 +108,53 @@ def is_empty(self) -> bool:
 class ConferenceSystem:
     """Manages conference rooms"""
 
-    def __init__(self) -> None:
-        """Initialize conference system"""
+    def __init__(self, config: Any | None = None) -> None:
+        """
+        Initialize conference system
+
+        Args:
+            config: Optional config object; ``conference.mixing`` enables the
+                built-in audio mixer instead of relying on an external bridge
+        """
         self.rooms = {}
         self.logger = get_logger()
 
+        mixing_config = (config.get("conference.mixing", {}) if config else None) or {}
+        self.mixing_enabled = bool(mixing_config.get("enabled", False))
+        self.mixing_config = mixing_config
+        self.jitter_buffer_config = (config.get("rtp.jitter_buffer", {}) if config else None) or {}
+        self.mixer_scheduler = None
+
+        if self.mixing_enabled:
+            from pbx.features.conference_mixer import NUMPY_AVAILABLE, ConferenceMixerScheduler
+
+            if NUMPY_AVAILABLE:
+                self.mixer_scheduler = ConferenceMixerScheduler(
+                    ptime_ms=mixing_config.get("ptime_ms", 20)
+                )
+            else:
+                self.logger.warning("Conference mixing requires NumPy; using external bridge")
+                self.mixing_enabled = False
+
+    def _create_mixer(self, room_number: str) -> Any:
+        """Create and register a mixer for a room when mixing is enabled"""
+        if not self.mixer_scheduler:
+            return None
+
+        from pbx.features.conference_mixer import ConferenceMixer
+
+        mixer = ConferenceMixer(
+            room_number,
+            ptime_ms=self.mixing_config.get("ptime_ms", 20),
+            max_active_speakers=self.mixing_config.get("max_active_speakers", 3),
+            speech_threshold=self.mixing_config.get("speech_threshold", 200.0),
+            agc_enabled=self.mixing_config.get("agc", True),
+            jitter_buffer_config=self.jitter_buffer_config,
+        )
+        self.mixer_scheduler.register(mixer)
+        self.mixer_scheduler.start()
+        return mixer
+
     def create_room(self, room_number: str, max_participants: int = 10) -> Any:
         """
         Create conference room
@@ -106,7 +167,9 @@ def create_room(self, room_number: str, max_participants: int = 10) -> Any:
             ConferenceRoom object
         """
         if room_number not in self.rooms:
-            self.rooms[room_number] = ConferenceRoom(room_number, max_participants)
+            self.rooms[room_number] = ConferenceRoom(
+                room_number, max_participants, mixer=self._create_mixer(room_number)
+            )
             self.logger.info(f"Created conference room {room_number}")
         return self.rooms[room_number]
 
@@ -122,7 +185,14 @@ def get_room(self, room_number: str) -> Any | None:
         """
         return self.rooms.get(room_number)
 
-    def join_conference(self, room_number: str, extension: str, call_id: str) -> bool:
+    def join_conference(
+        self,
+        room_number: str,
+        extension: str,
+        call_id: str,
+        codec: str = "PCMU",
+        send_callback: Any = None,
+    ) -> bool:
         """
         Join conference
 
@@ -130,6 +200,8 @@ def join_conference(self, room_number: str, extension: str, call_id: str) -> boo
             room_number: Room identifier
             extension: Extension number
             call_id: Call ID
+            codec: Negotiated audio codec (used when mixing is enabled)
+            send_callback: Callable that transmits mixed RTP packets to this leg
 
         Returns:
             True if joined successfully
@@ -138,7 +210,24 @@ def join_conference(self, room_number: str, extension: str, call_id: str) -> boo
         if not room:
             room = self.create_room(room_number)
 
-        return room.add_participant(extension, call_id)
+        return room.add_participant(extension, call_id, codec, send_callback)
+
+    def push_audio(self, room_number: str, call_id: str, packet: bytes) -> bool:
+        """
+        Feed an inbound RTP packet from a participant into the room's mixer
+
+        Args:
+            room_number: Room identifier
+            call_id: Call ID of the sending participant
+            packet: Raw RTP packet
+
+        Returns:
+            True if the packet was queued for mixing
+        """
+        room = self.get_room(room_number)
+        if not room or not room.mixer:
+            return False
+        return room.mixer.push_rtp_packet(call_id, packet)
 
     def leave_conference(self, room_number: str, extension: str) -> bool:
         """
@@ -158,6 +247,8 @@ def leave_conference(self, room_number: str, extension: str) -> bool:
             # Clean up empty rooms
             if room.is_empty():
                 del self.rooms[room_number]
+                if self.mixer_scheduler:
+                    self.mixer_scheduler.unregister(room_number)
                 self.logger.info(f"Removed empty conference room {room_number}")
 
             return result
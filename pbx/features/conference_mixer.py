@@ -0,0 +1,571 @@
+"""
+Conference audio mixing engine
+N-party PCM mixer with active-speaker selection for conference rooms
+"""
+
+import random
+import struct
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from pbx.rtp.jitter_buffer import STAGE_CONFERENCE, JitterBuffer, create_stage_buffer
+from pbx.utils.logger import get_logger
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+# Codecs the mixer can decode/encode itself (stateless G.711 only, so one
+# encoded mix can safely be shared by every listener on the same codec)
+PAYLOAD_TYPE_CODECS = {0: "PCMU", 8: "PCMA"}
+CODEC_PAYLOAD_TYPES = {codec: pt for pt, codec in PAYLOAD_TYPE_CODECS.items()}
+
+SAMPLE_RATE = 8000
+DEFAULT_PTIME_MS = 20
+
+_RTP_HEADER = struct.Struct("!BBHII")
+
+# Lazily built NumPy lookup tables
+_DECODE_TABLES: dict[str, Any] = {}
+_ENCODE_TABLES: dict[str, Any] = {}
+_MAGNITUDE_TABLES: dict[str, Any] = {}
+
+
+def _build_tables() -> None:
+    """Build vectorized G.711 decode (256 entries) and encode (65536 entries) tables."""
+    if _DECODE_TABLES:
+        return
+
+    codes = np.arange(256, dtype=np.int32)
+
+    # μ-law decode
+    val = ~codes & 0xFF
+    exponent = (val >> 4) & 0x07
+    mantissa = val & 0x0F
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    ulaw_decode = np.where(val & 0x80, -magnitude, magnitude).astype(np.int16)
+
+    # A-law decode
+    val = codes ^ 0x55
+    exponent = (val >> 4) & 0x07
+    mantissa = val & 0x0F
+    magnitude = np.where(
+        exponent == 0,
+        (mantissa << 4) + 8,
+        ((mantissa << 4) + 0x108) << np.maximum(exponent - 1, 0),
+    )
+    alaw_decode = np.where(val & 0x80, -magnitude, magnitude).astype(np.int16)
+
+    samples = np.arange(-32768, 32768, dtype=np.int32)
+    sign = np.where(samples < 0, 0x80, 0x00)
+    magnitude = np.abs(samples)
+
+    # μ-law encode
+    biased = np.minimum(magnitude, 32635) + 0x84
+    exponent = np.clip(np.floor(np.log2(biased)).astype(np.int32) - 7, 0, 7)
+    mantissa = (biased >> (exponent + 3)) & 0x0F
+    ulaw_encode = (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8)
+
+    # A-law encode
+    clipped = np.minimum(magnitude, 32767)
+    exponent = np.clip(np.floor(np.log2(np.maximum(clipped, 1))).astype(np.int32) - 7, 0, 7)
+    mantissa = np.where(exponent == 0, clipped >> 4, clipped >> (exponent + 3)) & 0x0F
+    alaw_encode = (((sign | (exponent << 4) | mantissa) ^ 0x55) & 0xFF).astype(np.uint8)
+
+    _DECODE_TABLES.update({"PCMU": ulaw_decode, "PCMA": alaw_decode})
+    _MAGNITUDE_TABLES.update(
+        {
+            "PCMU": np.abs(ulaw_decode.astype(np.int32)),
+            "PCMA": np.abs(alaw_decode.astype(np.int32)),
+        }
+    )
+    _ENCODE_TABLES.update({"PCMU": ulaw_encode, "PCMA": alaw_encode})
+
+
+def decode_frame(payload: bytes, codec: str) -> Any:
+    """
+    Decode a G.711 payload to 16-bit PCM samples
+
+    Args:
+        payload: Encoded RTP payload
+        codec: Codec name ("PCMU" or "PCMA")
+
+    Returns:
+        NumPy int16 array of samples
+    """
+    _build_tables()
+    return _DECODE_TABLES[codec][np.frombuffer(payload, dtype=np.uint8)]
+
+
+def encode_frame(samples: Any, codec: str) -> bytes:
+    """
+    Encode 16-bit PCM samples to a G.711 payload
+
+    Args:
+        samples: NumPy int16 array of samples
+        codec: Codec name ("PCMU" or "PCMA")
+
+    Returns:
+        Encoded payload bytes
+    """
+    _build_tables()
+    index = samples.astype(np.int32)
+    index += 32768
+    return _ENCODE_TABLES[codec][index].tobytes()
+
+
+def split_rtp_packet(packet: bytes) -> tuple[int, bytes] | None:
+    """
+    Split an RTP packet into its payload type and payload
+
+    Skips CSRCs and a header extension and strips padding.
+
+    Args:
+        packet: Raw RTP packet
+
+    Returns:
+        (payload_type, payload), or None if the packet is too short
+    """
+    if len(packet) < 12:
+        return None
+
+    first = packet[0]
+    offset = 12 + (first & 0x0F) * 4
+    if first & 0x10 and len(packet) >= offset + 4:
+        ext_words = struct.unpack("!H", packet[offset + 2 : offset + 4])[0]
+        offset += 4 + ext_words * 4
+    payload = packet[offset:]
+    if first & 0x20 and payload:
+        payload = payload[: -payload[-1]]
+    return packet[1] & 0x7F, payload
+
+
+class MixerParticipant:
+    """Per-leg mixer state"""
+
+    def __init__(
+        self,
+        participant_id: str,
+        codec: str = "PCMU",
+        send_callback: Callable[[bytes], None] | None = None,
+        jitter_buffer: JitterBuffer | None = None,
+    ) -> None:
+        """
+        Initialize mixer participant
+
+        Args:
+            participant_id: Participant identifier (usually the call ID)
+            codec: Negotiated codec name ("PCMU" or "PCMA")
+            send_callback: Callable that transmits an outbound RTP packet
+            jitter_buffer: Optional jitter buffer the mixer pulls one frame from per tick
+        """
+        self.participant_id = participant_id
+        self.codec = codec
+        self.send_callback = send_callback
+        self.jitter_buffer = jitter_buffer
+        self.muted = False
+
+        # Latest undelivered inbound frame (int16 samples) and its energy
+        self.frame = None
+        self.energy = 0.0
+        self.speaking = False
+
+        # Outbound RTP state
+        self.ssrc = random.randint(0, 0xFFFFFFFF)  # Random SSRC per RFC 3550
+        self.sequence = 0
+        self.timestamp = 0
+
+        self.frames_received = 0
+        self.frames_sent = 0
+
+    def build_rtp_packet(self, payload: bytes, samples: int) -> bytes:
+        """Wrap an encoded payload in an RTP header and advance sequence/timestamp"""
+        header = _RTP_HEADER.pack(
+            0x80,
+            CODEC_PAYLOAD_TYPES[self.codec] & 0x7F,
+            self.sequence,
+            self.timestamp,
+            self.ssrc,
+        )
+        self.sequence = (self.sequence + 1) & 0xFFFF
+        self.timestamp = (self.timestamp + samples) & 0xFFFFFFFF
+        return header + payload
+
+
+class ConferenceMixer:
+    """
+    N-party audio mixer for a single conference room
+
+    Each tick mixes the loudest ``max_active_speakers`` legs. Listeners all
+    hear the same mix, so it is encoded once per codec; each active speaker
+    receives the mix minus their own audio.
+    """
+
+    def __init__(
+        self,
+        room_number: str,
+        ptime_ms: int = DEFAULT_PTIME_MS,
+        max_active_speakers: int = 3,
+        speech_threshold: float = 200.0,
+        agc_enabled: bool = True,
+        agc_target_peak: int = 29000,
+        jitter_buffer_config: dict[str, Any] | None = None,
+    ) -> None:
+        """
+        Initialize conference mixer
+
+        Args:
+            room_number: Conference room identifier
+            ptime_ms: Packetization time per mix tick in milliseconds
+            max_active_speakers: Maximum number of legs mixed per tick
+            speech_threshold: Mean absolute amplitude above which a leg counts as speaking
+            agc_enabled: Apply automatic gain control to avoid clipping
+            agc_target_peak: Peak amplitude the AGC limits the mix to
+            jitter_buffer_config: ``rtp.jitter_buffer`` section; gives each leg a
+                jitter buffer when it enables the conference stage
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy is required for conference mixing")
+
+        self.logger = get_logger()
+        self.room_number = room_number
+        self.ptime_ms = ptime_ms
+        self.samples_per_frame = SAMPLE_RATE * ptime_ms // 1000
+        self.max_active_speakers = max_active_speakers
+        self.speech_threshold = speech_threshold
+        self.agc_enabled = agc_enabled
+        self.agc_target_peak = agc_target_peak
+        self.jitter_buffer_config = jitter_buffer_config
+
+        self.participants: dict[str, MixerParticipant] = {}
+        self.lock = threading.Lock()
+        self.gain = 1.0
+
+        self._silence = np.zeros(self.samples_per_frame, dtype=np.int16)
+        self._silence_payloads = {
+            codec: encode_frame(self._silence, codec) for codec in CODEC_PAYLOAD_TYPES
+        }
+
+        # Statistics
+        self.ticks = 0
+        self.encodes = 0
+        self.frames_dropped = 0
+
+    def add_participant(
+        self,
+        participant_id: str,
+        codec: str = "PCMU",
+        send_callback: Callable[[bytes], None] | None = None,
+    ) -> bool:
+        """
+        Add a leg to the mix
+
+        Args:
+            participant_id: Participant identifier (usually the call ID)
+            codec: Negotiated codec name ("PCMU" or "PCMA")
+            send_callback: Callable that transmits an outbound RTP packet
+
+        Returns:
+            True if added
+        """
+        if codec not in CODEC_PAYLOAD_TYPES:
+            self.logger.warning(
+                f"Conference {self.room_number}: unsupported mixer codec {codec} "
+                f"for {participant_id}"
+            )
+            return False
+
+        with self.lock:
+            self.participants[participant_id] = MixerParticipant(
+                participant_id,
+                codec,
+                send_callback,
+                create_stage_buffer(self.jitter_buffer_config, STAGE_CONFERENCE, codec),
+            )
+        return True
+
+    def remove_participant(self, participant_id: str) -> bool:
+        """Remove a leg from the mix"""
+        with self.lock:
+            return self.participants.pop(participant_id, None) is not None
+
+    def set_muted(self, participant_id: str, muted: bool) -> bool:
+        """Mute or unmute a leg's contribution to the mix"""
+        participant = self.participants.get(participant_id)
+        if not participant:
+            return False
+        participant.muted = muted
+        return True
+
+    def push_frame(self, participant_id: str, payload: bytes) -> bool:
+        """
+        Queue one inbound encoded frame for the next tick
+
+        Args:
+            participant_id: Participant identifier
+            payload: Encoded audio payload in the participant's codec
+
+        Returns:
+            True if the frame was accepted
+        """
+        participant = self.participants.get(participant_id)
+        if not participant:
+            return False
+        self._load_frame(participant, payload)
+        return True
+
+    def _load_frame(self, participant: MixerParticipant, payload: bytes) -> None:
+        """Decode a frame into the participant's slot for the next mix"""
+        codes = np.frombuffer(payload, dtype=np.uint8)
+        samples = _DECODE_TABLES[participant.codec][codes]
+        if len(samples) != self.samples_per_frame:
+            # Pad or trim so every frame lines up with the mix tick
+            fitted = np.zeros(self.samples_per_frame, dtype=np.int16)
+            n = min(len(samples), self.samples_per_frame)
+            fitted[:n] = samples[:n]
+            samples = fitted
+
+        if participant.frame is not None:
+            self.frames_dropped += 1
+        participant.frame = samples
+        # Mean absolute amplitude via a lookup table avoids a pass over the PCM
+        participant.energy = float(_MAGNITUDE_TABLES[participant.codec][codes].sum()) / max(
+            len(codes), 1
+        )
+        participant.frames_received += 1
+
+    def push_rtp_packet(self, participant_id: str, packet: bytes) -> bool:
+        """
+        Queue an inbound RTP packet, stripping the header
+
+        Args:
+            participant_id: Participant identifier
+            packet: Raw RTP packet
+
+        Returns:
+            True if the packet carried a mixable payload
+        """
+        split = split_rtp_packet(packet)
+        if split is None or split[0] not in PAYLOAD_TYPE_CODECS:
+            # DTMF events, comfort noise, etc. are not mixed
+            return False
+        payload_type, payload = split
+
+        participant = self.participants.get(participant_id)
+        if participant and participant.jitter_buffer:
+            # Reordered and paced by the buffer, one frame per mix tick
+            _, _, sequence, timestamp, _ = _RTP_HEADER.unpack_from(packet)
+            participant.jitter_buffer.put(payload, sequence, timestamp, payload_type)
+            return True
+
+        return self.push_frame(participant_id, payload)
+
+    def _select_speakers(self, participants: list[MixerParticipant]) -> list[MixerParticipant]:
+        """Pick the loudest unmuted legs that are above the speech threshold"""
+        candidates = []
+        for participant in participants:
+            participant.speaking = False
+            if participant.frame is None or participant.muted:
+                participant.energy = 0.0
+                continue
+            if participant.energy >= self.speech_threshold:
+                candidates.append(participant)
+
+        candidates.sort(key=lambda p: p.energy, reverse=True)
+        speakers = candidates[: self.max_active_speakers]
+        for participant in speakers:
+            participant.speaking = True
+        return speakers
+
+    def _apply_gain(self, mix: Any) -> float:
+        """Update the AGC gain from the current mix peak and return it"""
+        if not self.agc_enabled:
+            return 1.0
+
+        peak = int(np.abs(mix).max()) if len(mix) else 0
+        if peak * self.gain > self.agc_target_peak:
+            # Attack immediately so the mix never clips
+            self.gain = self.agc_target_peak / peak
+        else:
+            # Release slowly back towards unity
+            self.gain = min(1.0, self.gain * 1.05)
+        return self.gain
+
+    def _finish(self, mix: Any, gain: float) -> Any:
+        """Scale and clip a 32-bit mix into the 16-bit range"""
+        if gain != 1.0:
+            mix = (mix * gain).astype(np.int32)
+        # Plain ufuncs are much cheaper than np.clip on 160-sample frames
+        mix = np.minimum(mix, 32767)
+        np.maximum(mix, -32768, out=mix)
+        return mix
+
+    def mix(self) -> dict[str, bytes]:
+        """
+        Run one mix tick
+
+        Returns:
+            Dictionary of participant ID to encoded payload for this tick
+        """
+        with self.lock:
+            participants = list(self.participants.values())
+
+        for participant in participants:
+            if participant.jitter_buffer:
+                payload = participant.jitter_buffer.get()
+                if payload is not None:
+                    self._load_frame(participant, payload)
+
+        self.ticks += 1
+        speakers = self._select_speakers(participants)
+
+        outputs: dict[str, bytes] = {}
+        if not speakers:
+            for participant in participants:
+                participant.frame = None
+                outputs[participant.participant_id] = self._silence_payloads[participant.codec]
+            return outputs
+
+        total = np.zeros(self.samples_per_frame, dtype=np.int32)
+        for speaker in speakers:
+            total += speaker.frame
+        gain = self._apply_gain(total)
+
+        # One shared encode per codec for everybody who is not speaking
+        shared: dict[str, bytes] = {}
+        shared_samples = None
+        for participant in participants:
+            if participant.speaking:
+                own = self._finish(total - participant.frame, gain)
+                outputs[participant.participant_id] = encode_frame(own, participant.codec)
+                self.encodes += 1
+            else:
+                payload = shared.get(participant.codec)
+                if payload is None:
+                    if shared_samples is None:
+                        shared_samples = self._finish(total, gain)
+                    payload = encode_frame(shared_samples, participant.codec)
+                    shared[participant.codec] = payload
+                    self.encodes += 1
+                outputs[participant.participant_id] = payload
+
+        for participant in participants:
+            participant.frame = None
+        return outputs
+
+    def tick(self) -> int:
+        """
+        Mix one frame and transmit it to every leg with a send callback
+
+        Returns:
+            Number of packets sent
+        """
+        outputs = self.mix()
+        sent = 0
+        for participant_id, payload in outputs.items():
+            participant = self.participants.get(participant_id)
+            if not participant or not participant.send_callback:
+                continue
+            packet = participant.build_rtp_packet(payload, self.samples_per_frame)
+            try:
+                participant.send_callback(packet)
+                participant.frames_sent += 1
+                sent += 1
+            except OSError as e:
+                self.logger.debug(
+                    f"Conference {self.room_number}: send to {participant_id} failed: {e}"
+                )
+        return sent
+
+    def get_active_speakers(self) -> list[str]:
+        """Get participant IDs selected as speakers in the last tick"""
+        return [p.participant_id for p in self.participants.values() if p.speaking]
+
+    def get_statistics(self) -> dict[str, Any]:
+        """Get mixer statistics"""
+        return {
+            "room_number": self.room_number,
+            "participants": len(self.participants),
+            "active_speakers": self.get_active_speakers(),
+            "ticks": self.ticks,
+            "encodes": self.encodes,
+            "frames_dropped": self.frames_dropped,
+            "gain": round(self.gain, 3),
+        }
+
+
+class ConferenceMixerScheduler:
+    """Drives every room's mixer from a single paced thread"""
+
+    def __init__(self, ptime_ms: int = DEFAULT_PTIME_MS) -> None:
+        """
+        Initialize mixer scheduler
+
+        Args:
+            ptime_ms: Tick interval in milliseconds
+        """
+        self.logger = get_logger()
+        self.ptime_ms = ptime_ms
+        self.mixers: dict[str, ConferenceMixer] = {}
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread: threading.Thread | None = None
+        self.late_ticks = 0
+
+    def register(self, mixer: ConferenceMixer) -> None:
+        """Start driving a room's mixer"""
+        with self.lock:
+            self.mixers[mixer.room_number] = mixer
+
+    def unregister(self, room_number: str) -> None:
+        """Stop driving a room's mixer"""
+        with self.lock:
+            self.mixers.pop(room_number, None)
+
+    def tick_all(self) -> int:
+        """Tick every registered mixer once and return packets sent"""
+        with self.lock:
+            mixers = list(self.mixers.values())
+        return sum(mixer.tick() for mixer in mixers)
+
+    def start(self) -> None:
+        """Start the mixing thread"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True, name="conference-mixer")
+        self.thread.start()
+        self.logger.info(f"Conference mixer started ({self.ptime_ms}ms ticks)")
+
+    def stop(self) -> None:
+        """Stop the mixing thread"""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    def _run(self) -> None:
+        """Tick loop paced against a monotonic deadline to avoid drift"""
+        interval = self.ptime_ms / 1000.0
+        deadline = time.monotonic()
+        while self.running:
+            try:
+                self.tick_all()
+            except (ValueError, KeyError, TypeError) as e:
+                self.logger.error(f"Conference mixer tick failed: {e}")
+
+            deadline += interval
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                self.late_ticks += 1
+                if delay < -interval * 5:
+                    # Too far behind; resynchronize instead of bursting
+                    deadline = time.monotonic()
@@ -5,8 +5,11 @@
 
 import random
 import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
+from pbx.utils.dns_resolver import DNSResolver, get_dns_resolver
 from pbx.utils.logger import get_logger
 
 
@@ -35,12 +38,24 @@ class DNSSRVFailover:
     - Weight-based load balancing
     - Automatic failover on server failure
     - Health monitoring
+
+    Lookups go through a TTL-aware DNSResolver: answers are refreshed in the
+    background as they near expiry, so once a name has been resolved
+    select_server() never waits on DNS. Records added to srv_cache by hand
+    are kept as-is.
     """
 
-    def __init__(self, config: Any | None = None) -> None:
-        """Initialize DNS SRV failover"""
+    def __init__(self, config: Any | None = None, resolver: DNSResolver | None = None) -> None:
+        """
+        Initialize DNS SRV failover
+
+        Args:
+            config: Configuration dict
+            resolver: Shared DNS resolver (a private one is created if omitted)
+        """
         self.logger = get_logger()
         self.config = config or {}
+        self.resolver = resolver or DNSResolver(self.config)
 
         # Configuration
         srv_config = self.config.get("features", {}).get("dns_srv_failover", {})
@@ -50,6 +65,12 @@ def __init__(self, config: Any | None = None) -> None:
 
         # SRV records cache
         self.srv_cache: dict[str, list[SRVRecord]] = {}
+        # Names whose cached records come from (and are refreshed by) DNS
+        self._resolved_names: set[str] = set()
+
+        # Background health monitoring
+        self._monitor_thread: threading.Thread | None = None
+        self._monitor_stop = threading.Event()
 
         # Statistics
         self.total_lookups = 0
@@ -83,23 +104,41 @@ def lookup_srv(
         # Check cache first
         if srv_name in self.srv_cache:
             self.cache_hits += 1
-            records = self.srv_cache[srv_name]
             self.logger.debug(f"SRV cache hit for {srv_name}")
+            if srv_name in self._resolved_names:
+                # Answered from the resolver cache without waiting; an answer
+                # close to expiry is refreshed in the background
+                records = self._perform_srv_lookup(srv_name, wait=0.0)
+                if records:
+                    self._store_records(srv_name, records)
         else:
             # Perform actual DNS SRV lookup
-            records = self._perform_srv_lookup(srv_name)
+            records = self._perform_srv_lookup(srv_name, wait=self.resolver.timeout)
             # Cache the results
             if records:
-                self.srv_cache[srv_name] = records
+                self._store_records(srv_name, records)
 
-        return self._format_srv_records(records)
+        return self._format_srv_records(self.srv_cache.get(srv_name, []))
 
-    def _perform_srv_lookup(self, srv_name: str) -> list[SRVRecord]:
+    def _store_records(self, srv_name: str, records: list[SRVRecord]) -> None:
+        """Cache looked-up records, keeping the health state of known servers"""
+        known = {(r.target, r.port): r for r in self.srv_cache.get(srv_name, [])}
+        for record in records:
+            previous = known.get((record.target, record.port))
+            if previous:
+                record.available = previous.available
+                record.last_check = previous.last_check
+                record.failure_count = previous.failure_count
+        self.srv_cache[srv_name] = records
+        self._resolved_names.add(srv_name)
+
+    def _perform_srv_lookup(self, srv_name: str, wait: float = 0.0) -> list[SRVRecord]:
         """
         Perform actual DNS SRV lookup
 
         Args:
             srv_name: SRV record name to lookup
+            wait: Seconds to wait for DNS if the answer isn't cached
 
         Returns:
             list[SRVRecord]: Found SRV records
@@ -107,18 +146,14 @@ def _perform_srv_lookup(self, srv_name: str) -> list[SRVRecord]:
         records = []
 
         try:
-            # Try to use dnspython if available
-            import dns.resolver
-
-            self.logger.info(f"Performing DNS SRV lookup for {srv_name}")
-            answers = dns.resolver.resolve(srv_name, "SRV")
+            answers = self.resolver.lookup(srv_name, "SRV", wait=wait)
 
-            for rdata in answers:
+            for answer in answers:
                 record = SRVRecord(
-                    priority=rdata.priority,
-                    weight=rdata.weight,
-                    port=rdata.port,
-                    target=str(rdata.target).rstrip("."),
+                    priority=answer["priority"],
+                    weight=answer["weight"],
+                    port=answer["port"],
+                    target=answer["target"],
                 )
                 records.append(record)
                 self.logger.debug(
@@ -127,27 +162,18 @@ def _perform_srv_lookup(self, srv_name: str) -> list[SRVRecord]:
                     f"target={record.target}"
                 )
 
-            # Sort by priority (lower is better), then by weight
-            records.sort(key=lambda r: (r.priority, -r.weight))
-
-        except ImportError:
-            self.logger.warning("dnspython not installed. Install with: pip install dnspython")
-            self.logger.warning("Falling back to basic DNS resolution")
-
-            # Fallback: try basic hostname resolution
-            try:
-                # Extract service name from SRV query
+            if not records:
+                # No SRV records (or no dnspython): fall back to the domain's
+                # addresses on the default SIP port
                 parts = srv_name.split(".")
                 if len(parts) >= 3:
                     hostname = ".".join(parts[2:])
-                    # Try to resolve hostname
-                    ip = socket.gethostbyname(hostname)
-                    # Create a single SRV record with default values
-                    record = SRVRecord(priority=0, weight=0, port=5060, target=ip)
-                    records.append(record)
-                    self.logger.info(f"Fallback resolution: {hostname} -> {ip}")
-            except socket.gaierror:
-                self.logger.error(f"Failed to resolve {srv_name}")
+                    records = [
+                        SRVRecord(priority=0, weight=0, port=5060, target=ip)
+                        for ip in self.resolver.resolve_host(hostname, wait=wait)
+                    ]
+                    if records:
+                        self.logger.info(f"Fallback resolution: {hostname} -> {records[0].target}")
 
         except Exception as e:
             self.logger.error(f"SRV lookup failed for {srv_name}: {e}")
@@ -183,7 +209,7 @@ def select_server(
         """
         srv_name = f"_{service}._{protocol}.{domain}"
 
-        if srv_name not in self.srv_cache:
+        if srv_name not in self.srv_cache or srv_name in self._resolved_names:
             records = self.lookup_srv(service, protocol, domain)
             if not records:
                 return None
@@ -351,10 +377,14 @@ def clear_cache(
         """Clear SRV cache"""
         if service and protocol and domain:
             srv_name = f"_{service}._{protocol}.{domain}"
+            self.resolver.invalidate(srv_name)
+            self._resolved_names.discard(srv_name)
             if srv_name in self.srv_cache:
                 del self.srv_cache[srv_name]
                 self.logger.info(f"Cleared cache for {srv_name}")
         else:
+            self.resolver.invalidate()
+            self._resolved_names.clear()
             self.srv_cache.clear()
             self.logger.info("Cleared entire SRV cache")
 
@@ -369,7 +399,71 @@ def get_statistics(self) -> dict:
             "cache_hit_rate": cache_hit_rate,
             "total_failovers": self.total_failovers,
             "cached_services": len(self.srv_cache),
+            "resolver": self.resolver.get_statistics(),
+        }
+
+    def check_all_servers(self) -> dict[str, bool]:
+        """
+        Health check every cached server in parallel
+
+        Servers that fail max_failures checks in a row are marked unavailable;
+        a passing check marks them available again.
+
+        Returns:
+            dict: Health by "target:port"
+        """
+        servers = {
+            (srv_name, record.target, record.port)
+            for srv_name, records in list(self.srv_cache.items())
+            for record in records
         }
+        if not servers:
+            return {}
+
+        targets = sorted({(target, port) for _, target, port in servers})
+        with ThreadPoolExecutor(
+            max_workers=min(len(targets), 16), thread_name_prefix="srv-health"
+        ) as executor:
+            healthy = dict(
+                zip(
+                    targets,
+                    executor.map(lambda server: self.check_server_health(*server), targets),
+                    strict=True,
+                )
+            )
+
+        for srv_name, target, port in servers:
+            service, protocol, domain = srv_name.split(".", 2)
+            args = (service.lstrip("_"), protocol.lstrip("_"), domain, target, port)
+            if healthy[(target, port)]:
+                self.mark_server_recovered(*args)
+            else:
+                self.mark_server_failed(*args)
+        return {f"{target}:{port}": ok for (target, port), ok in healthy.items()}
+
+    def start_health_monitor(self) -> None:
+        """Run check_all_servers() every check_interval seconds in the background"""
+        if self._monitor_thread and self._monitor_thread.is_alive():
+            return
+        self._monitor_stop.clear()
+        self._monitor_thread = threading.Thread(
+            target=self._health_monitor_loop, name="srv-health-monitor", daemon=True
+        )
+        self._monitor_thread.start()
+
+    def stop_health_monitor(self) -> None:
+        """Stop background health monitoring"""
+        self._monitor_stop.set()
+        if self._monitor_thread:
+            self._monitor_thread.join(timeout=5)
+            self._monitor_thread = None
+
+    def _health_monitor_loop(self) -> None:
+        while not self._monitor_stop.wait(self.check_interval):
+            try:
+                self.check_all_servers()
+            except Exception as e:
+                self.logger.error(f"SRV health monitoring error: {e}")
 
 
 # Global instance
@@ -380,5 +474,7 @@ def get_dns_srv_failover(config: Any | None = None) -> DNSSRVFailover:
     """Get or create DNS SRV failover instance"""
     global _dns_srv_failover
     if _dns_srv_failover is None:
-        _dns_srv_failover = DNSSRVFailover(config)
+        _dns_srv_failover = DNSSRVFailover(config, resolver=get_dns_resolver(config))
+        if _dns_srv_failover.enabled:
+            _dns_srv_failover.start_health_monitor()
     return _dns_srv_failover
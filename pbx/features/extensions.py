@@ -28,18 +28,28 @@ def __init__(self, number: str, name: str, config: str) -> None:
         self.address = None
         self.registration_time = None
         self.expires_at: datetime | None = None
+        self.call_id: str | None = None
+        self.binding_time: datetime | None = None
 
-    def register(self, address: tuple, expires: int = 3600) -> None:
+    def register(self, address: tuple, expires: int = 3600, call_id: str | None = None) -> None:
         """
         Register extension
 
         Args:
             address: Network address (host, port)
             expires: Registration lifetime in seconds (from SIP Expires header)
+            call_id: Call-ID of the REGISTER; a phone keeps it for a boot cycle
         """
+        now = datetime.now(UTC)
+        # A refresh re-REGISTER keeps the binding; a new Call-ID, a new
+        # contact address or a fresh registration starts a new one
+        if not self.registered or self.address != address or (call_id and call_id != self.call_id):
+            self.binding_time = now
         self.registered = True
         self.address = address
-        self.registration_time = datetime.now(UTC)
+        if call_id:
+            self.call_id = call_id
+        self.registration_time = now
         self.expires_at = datetime.now(UTC) + timedelta(seconds=expires)
 
     def is_expired(self) -> bool:
@@ -54,6 +64,8 @@ def unregister(self) -> None:
         self.address = None
         self.registration_time = None
         self.expires_at = None
+        self.call_id = None
+        self.binding_time = None
 
     def __str__(self) -> str:
         status = "registered" if self.registered else "unregistered"
@@ -75,6 +87,8 @@ def __init__(self, config: Any, database: Any | None = None) -> None:
         self.database = database
         self.logger = get_logger()
         self.extensions = {}
+        # Optional LiveEventBus notified of registration changes (set by PBXCore)
+        self.event_bus = None
 
         # Initialize encryption for FIPS-compliant password handling
         fips_mode = config.get("security.fips_mode", False)
@@ -195,7 +209,9 @@ def get_extension(self, number: str) -> Any | None:
         """
         return self.get(number)
 
-    def register(self, number: str, address: tuple, expires: int = 3600) -> bool:
+    def register(
+        self, number: str, address: tuple, expires: int = 3600, call_id: str | None = None
+    ) -> bool:
         """
         Register extension
 
@@ -203,13 +219,21 @@ def register(self, number: str, address: tuple, expires: int = 3600) -> bool:
             number: Extension number
             address: Network address
             expires: Registration lifetime in seconds
+            call_id: Call-ID of the REGISTER request
 
         Returns:
             True if registered successfully
         """
         extension = self.get(number)
         if extension:
-            extension.register(address, expires=expires)
+            # Periodic re-REGISTERs refresh the expiry but are not state changes
+            changed = not extension.registered or extension.address != address
+            extension.register(address, expires=expires, call_id=call_id)
+            if changed and self.event_bus:
+                self.event_bus.publish(
+                    "extension.registered",
+                    {"extension": number, "name": extension.name, "address": list(address)},
+                )
             # Logging is handled by the caller (pbx.py) to avoid duplicate logs
             return True
         return False
@@ -226,8 +250,11 @@ def unregister(self, number: str) -> bool:
         """
         extension = self.get(number)
         if extension:
+            was_registered = extension.registered
             extension.unregister()
             self.logger.info(f"Extension {number} unregistered")
+            if was_registered and self.event_bus:
+                self.event_bus.publish("extension.unregistered", {"extension": number})
             return True
         return False
 
@@ -3,12 +3,190 @@
 Pattern analysis for unusual call behavior using custom algorithms
 """
 
-from collections import defaultdict
+import json
+import threading
+import time
+from collections import deque
 from datetime import UTC, datetime, timedelta
+from pathlib import Path
 from typing import Any
 
 from pbx.utils.logger import get_logger
 
+STATE_VERSION = 1
+
+# Sliding window fields
+_CALLS = 0
+_INTERNATIONAL = 1
+_COST = 2
+
+
+def _is_international(destination: str | None) -> bool:
+    """International numbers typically start with + or 011"""
+    return bool(destination) and destination.startswith(("+", "011"))
+
+
+class _SlidingWindow:
+    """
+    Time-bucketed ring buffer of running totals
+
+    The span is split into fixed buckets. Adding a value touches one bucket,
+    and moving the window forward subtracts only the buckets that fell out,
+    so both adding and reading the totals are O(1) amortized. Totals cover
+    the current bucket plus the previous ``buckets - 1``, i.e. the span
+    rounded up to the bucket size.
+    """
+
+    __slots__ = ("bucket_seconds", "epochs", "head", "totals", "values")
+
+    def __init__(self, span: float, buckets: int, width: int) -> None:
+        self.bucket_seconds = span / buckets
+        self.epochs = [-1] * buckets
+        self.values = [[0.0] * buckets for _ in range(width)]
+        self.totals = [0.0] * width
+        self.head = -1  # newest bucket epoch the window has advanced to
+
+    def _epoch(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds)
+
+    def _advance(self, epoch: int) -> None:
+        if epoch <= self.head:
+            return
+        size = len(self.epochs)
+        if self.head < 0 or epoch - self.head >= size:
+            for field in self.values:
+                field[:] = [0.0] * size
+            self.totals = [0.0] * len(self.totals)
+            self.epochs = [0] * size
+            for e in range(epoch - size + 1, epoch + 1):
+                self.epochs[e % size] = e
+        else:
+            for e in range(self.head + 1, epoch + 1):
+                slot = e % size
+                for field, values in enumerate(self.values):
+                    self.totals[field] -= values[slot]
+                    values[slot] = 0.0
+                self.epochs[slot] = e
+        self.head = epoch
+
+    def add(self, timestamp: float, *amounts: float) -> None:
+        """Add amounts (one per field) at timestamp; too-old values are dropped"""
+        epoch = self._epoch(timestamp)
+        self._advance(epoch)
+        slot = epoch % len(self.epochs)
+        if self.epochs[slot] != epoch:
+            return
+        for field, amount in enumerate(amounts):
+            self.values[field][slot] += amount
+            self.totals[field] += amount
+
+    def total(self, now: float, field: int = _CALLS) -> float:
+        """Sum of a field over the window ending at now"""
+        self._advance(self._epoch(now))
+        # Guard against float drift from repeated subtraction
+        return max(self.totals[field], 0.0)
+
+    def is_empty(self, now: float) -> bool:
+        self._advance(self._epoch(now))
+        return not any(self.totals)
+
+    def to_dict(self) -> dict:
+        return {"head": self.head, "epochs": self.epochs, "values": self.values}
+
+    def load(self, data: dict) -> None:
+        if len(data["epochs"]) != len(self.epochs) or len(data["values"]) != len(self.values):
+            # Bucket layout changed since the state was saved
+            return
+        self.head = int(data["head"])
+        self.epochs = [int(e) for e in data["epochs"]]
+        self.values = [[float(v) for v in field] for field in data["values"]]
+        self.totals = [sum(field) for field in self.values]
+
+
+class _ExtensionActivity:
+    """Sliding-window counters and lifetime totals for one extension"""
+
+    __slots__ = (
+        "daily",
+        "hourly",
+        "international_calls",
+        "last_seen",
+        "total_calls",
+        "total_cost",
+        "total_duration",
+    )
+
+    def __init__(self) -> None:
+        # Calls in the last hour, one-minute buckets
+        self.hourly = _SlidingWindow(3600, 60, 1)
+        # Calls, international calls and cost in the last day, 15-minute buckets
+        self.daily = _SlidingWindow(86400, 96, 3)
+        self.total_calls = 0
+        self.total_duration = 0
+        self.total_cost = 0.0
+        self.international_calls = 0
+        self.last_seen = 0.0
+
+    def record(self, timestamp: float, duration: int, cost: float, international: bool) -> None:
+        self.hourly.add(timestamp, 1)
+        self.daily.add(timestamp, 1, 1 if international else 0, cost)
+        self.total_calls += 1
+        self.total_duration += duration
+        self.total_cost += cost
+        self.international_calls += 1 if international else 0
+        self.last_seen = max(self.last_seen, timestamp)
+
+    def to_dict(self) -> dict:
+        return {
+            "hourly": self.hourly.to_dict(),
+            "daily": self.daily.to_dict(),
+            "total_calls": self.total_calls,
+            "total_duration": self.total_duration,
+            "total_cost": self.total_cost,
+            "international_calls": self.international_calls,
+            "last_seen": self.last_seen,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "_ExtensionActivity":
+        activity = cls()
+        activity.hourly.load(data["hourly"])
+        activity.daily.load(data["daily"])
+        activity.total_calls = int(data.get("total_calls", 0))
+        activity.total_duration = data.get("total_duration", 0)
+        activity.total_cost = float(data.get("total_cost", 0.0))
+        activity.international_calls = int(data.get("international_calls", 0))
+        activity.last_seen = float(data.get("last_seen", 0.0))
+        return activity
+
+
+class _PrefixTrie:
+    """Blocked number prefixes, matched in one walk over the dialed number"""
+
+    _END = ""  # key holding (index, reason) of the pattern ending at a node
+
+    def __init__(self, patterns: list[dict]) -> None:
+        self.root: dict = {}
+        for index, pattern in enumerate(patterns):
+            node = self.root
+            for char in pattern["pattern"]:
+                node = node.setdefault(char, {})
+            # The earliest added pattern wins, as with a linear scan
+            node.setdefault(self._END, (index, pattern["reason"]))
+
+    def match(self, number: str) -> tuple[int, str] | None:
+        """(index, reason) of the earliest added pattern that prefixes number"""
+        node = self.root
+        best = node.get(self._END)
+        for char in number:
+            node = node.get(char)
+            if node is None:
+                break
+            found = node.get(self._END)
+            if found is not None and (best is None or found[0] < best[0]):
+                best = found
+        return best
+
 
 class FraudDetectionSystem:
     """System for detecting and alerting on unusual call patterns"""
@@ -30,12 +208,30 @@ def __init__(self, config: Any | None = None) -> None:
         self.unusual_hour_start = fraud_config.get("unusual_hour_start", 23)  # 11 PM
         self.unusual_hour_end = fraud_config.get("unusual_hour_end", 6)  # 6 AM
 
+        # Retention and bounds
+        self.retention_days = fraud_config.get("retention_days", 30)
+        self.max_history_per_extension = fraud_config.get("max_history_per_extension", 100)
+        self.max_alerts = fraud_config.get("max_alerts", 10000)
+        # Compact and persist from a background thread, never on the call path
+        self.compaction_interval = fraud_config.get("compaction_interval", 300)  # seconds
+        self.state_file = fraud_config.get("state_file", "data/fraud_detection_state.json")
+
         # Tracking data
-        self.call_history = defaultdict(list)  # extension -> calls
-        self.alerts = []  # list of fraud alerts
+        self.lock = threading.RLock()
+        self.call_history: dict[str, deque] = {}  # extension -> most recent calls
+        self._activity: dict[str, _ExtensionActivity] = {}  # extension -> counters
+        self.alerts: deque = deque(maxlen=self.max_alerts)  # fraud alerts, oldest first
         self.blocked_patterns = []  # Blocked number patterns
+        self._blocked_trie = _PrefixTrie([])
+        self._stop_event = threading.Event()
+        self._maintenance_thread: threading.Thread | None = None
 
         if self.enabled:
+            self.load_state()
+            self._maintenance_thread = threading.Thread(
+                target=self._maintenance_loop, name="fraud-maintenance", daemon=True
+            )
+            self._maintenance_thread.start()
             self.logger.info("Fraud detection system initialized")
             self.logger.info(f"  Max calls/hour: {self.max_calls_per_hour}")
             self.logger.info(
@@ -60,16 +256,27 @@ def analyze_call(self, call_data: dict) -> dict:
         destination = call_data.get("to")
         duration = call_data.get("duration", 0)
         timestamp = call_data.get("timestamp", datetime.now(UTC))
+        cost = call_data.get("cost", 0.0)
 
         # Track call
-        self.call_history[extension].append(
-            {
-                "destination": destination,
-                "duration": duration,
-                "timestamp": timestamp,
-                "cost": call_data.get("cost", 0.0),
-            }
-        )
+        with self.lock:
+            history = self.call_history.get(extension)
+            if history is None:
+                history = self.call_history[extension] = deque(
+                    maxlen=self.max_history_per_extension
+                )
+            history.append(
+                {
+                    "destination": destination,
+                    "duration": duration,
+                    "timestamp": timestamp,
+                    "cost": cost,
+                }
+            )
+            activity = self._activity.get(extension)
+            if activity is None:
+                activity = self._activity[extension] = _ExtensionActivity()
+            activity.record(timestamp.timestamp(), duration, cost, _is_international(destination))
 
         # Analyze patterns
         fraud_score = 0.0
@@ -103,17 +310,18 @@ def analyze_call(self, call_data: dict) -> dict:
         # Store alerts if fraud detected
         if fraud_score > 0.5:
             # Store only essential info, not full call_data (avoid exposing sensitive info)
-            self.alerts.append(
-                {
-                    "extension": extension,
-                    "destination": destination,
-                    "fraud_score": fraud_score,
-                    "alerts": alerts,
-                    "timestamp": timestamp,
-                    "call_duration": call_data.get("duration", 0),
-                    "call_cost": call_data.get("cost", 0.0),
-                }
-            )
+            with self.lock:
+                self.alerts.append(
+                    {
+                        "extension": extension,
+                        "destination": destination,
+                        "fraud_score": fraud_score,
+                        "alerts": alerts,
+                        "timestamp": timestamp,
+                        "call_duration": call_data.get("duration", 0),
+                        "call_cost": call_data.get("cost", 0.0),
+                    }
+                )
 
             self.logger.warning(
                 f"Fraud detected for extension {extension}: score={fraud_score:.2f}"
@@ -134,16 +342,17 @@ def _check_call_frequency(self, extension: str) -> tuple:
         score = 0.0
         alerts = []
 
-        if extension not in self.call_history:
+        activity = self._activity.get(extension)
+        if activity is None:
             return score, alerts
 
         # Count calls in last hour
-        cutoff = datetime.now(UTC) - timedelta(hours=1)
-        recent_calls = [c for c in self.call_history[extension] if c["timestamp"] > cutoff]
+        with self.lock:
+            recent_calls = int(activity.hourly.total(time.time()))
 
-        if len(recent_calls) > self.max_calls_per_hour:
+        if recent_calls > self.max_calls_per_hour:
             score = 0.3
-            alerts.append(f"High call frequency: {len(recent_calls)} calls in last hour")
+            alerts.append(f"High call frequency: {recent_calls} calls in last hour")
 
         return score, alerts
 
@@ -152,24 +361,17 @@ def _check_international_calls(self, extension: str, destination: str) -> tuple:
         score = 0.0
         alerts = []
 
-        # Simple check: international numbers typically start with + or 011
-        is_international = destination.startswith(("+", "011"))
-
-        if not is_international:
+        activity = self._activity.get(extension)
+        if not _is_international(destination) or activity is None:
             return score, alerts
 
         # Count international calls today
-        cutoff = datetime.now(UTC) - timedelta(days=1)
-        intl_calls = [
-            c
-            for c in self.call_history.get(extension, [])
-            if c["timestamp"] > cutoff
-            and (c["destination"].startswith("+") or c["destination"].startswith("011"))
-        ]
-
-        if len(intl_calls) > self.max_international_calls_per_day:
+        with self.lock:
+            intl_calls = int(activity.daily.total(time.time(), _INTERNATIONAL))
+
+        if intl_calls > self.max_international_calls_per_day:
             score = 0.4
-            alerts.append(f"Excessive international calls: {len(intl_calls)} in last 24 hours")
+            alerts.append(f"Excessive international calls: {intl_calls} in last 24 hours")
 
         return score, alerts
 
@@ -209,12 +411,13 @@ def _check_cost_patterns(self, extension: str) -> tuple:
         score = 0.0
         alerts = []
 
-        if extension not in self.call_history:
+        activity = self._activity.get(extension)
+        if activity is None:
             return score, alerts
 
         # Calculate total cost today
-        cutoff = datetime.now(UTC) - timedelta(days=1)
-        daily_cost = sum(c["cost"] for c in self.call_history[extension] if c["timestamp"] > cutoff)
+        with self.lock:
+            daily_cost = activity.daily.total(time.time(), _COST)
 
         if daily_cost > self.max_cost_per_day:
             score = 0.3
@@ -224,24 +427,43 @@ def _check_cost_patterns(self, extension: str) -> tuple:
 
     def add_blocked_pattern(self, pattern: str, reason: str) -> bool:
         """Add a number pattern to block list"""
-        self.blocked_patterns.append(
-            {"pattern": pattern, "reason": reason, "added_at": datetime.now(UTC)}
-        )
+        with self.lock:
+            self.blocked_patterns.append(
+                {"pattern": pattern, "reason": reason, "added_at": datetime.now(UTC)}
+            )
+            self._rebuild_blocked_trie()
         self.logger.info(f"Added blocked pattern: {pattern} ({reason})")
+        self.save_state()
+        return True
+
+    def remove_blocked_pattern(self, index: int) -> bool:
+        """Remove the blocked pattern at index"""
+        with self.lock:
+            if not 0 <= index < len(self.blocked_patterns):
+                return False
+            pattern = self.blocked_patterns.pop(index)
+            self._rebuild_blocked_trie()
+        self.logger.info(f"Removed blocked pattern: {pattern['pattern']}")
+        self.save_state()
         return True
 
+    def _rebuild_blocked_trie(self) -> None:
+        self._blocked_trie = _PrefixTrie(self.blocked_patterns)
+
     def is_number_blocked(self, number: str) -> tuple:
         """Check if a number matches any blocked patterns"""
-        for pattern in self.blocked_patterns:
-            if number.startswith(pattern["pattern"]):
-                return True, pattern["reason"]
-        return False, None
+        found = self._blocked_trie.match(number)
+        if found is None:
+            return False, None
+        return True, found[1]
 
     def get_alerts(self, extension: str | None = None, hours: int = 24) -> list[dict]:
         """Get recent fraud alerts"""
         cutoff = datetime.now(UTC) - timedelta(hours=hours)
 
-        alerts = [a for a in self.alerts if a["timestamp"] > cutoff]
+        with self.lock:
+            alerts = list(self.alerts)
+        alerts = [a for a in alerts if a["timestamp"] > cutoff]
 
         if extension:
             alerts = [a for a in alerts if a["extension"] == extension]
@@ -250,44 +472,135 @@ def get_alerts(self, extension: str | None = None, hours: int = 24) -> list[dict
 
     def get_extension_statistics(self, extension: str) -> dict:
         """Get call statistics for an extension"""
-        if extension not in self.call_history:
+        activity = self._activity.get(extension)
+        if activity is None:
             return {"total_calls": 0}
 
-        calls = self.call_history[extension]
-        cutoff_24h = datetime.now(UTC) - timedelta(days=1)
-        recent_calls = [c for c in calls if c["timestamp"] > cutoff_24h]
+        with self.lock:
+            return {
+                "total_calls": activity.total_calls,
+                "calls_24h": int(activity.daily.total(time.time())),
+                "total_duration": activity.total_duration,
+                "total_cost": activity.total_cost,
+                "international_calls": activity.international_calls,
+            }
 
-        return {
-            "total_calls": len(calls),
-            "calls_24h": len(recent_calls),
-            "total_duration": sum(c["duration"] for c in calls),
-            "total_cost": sum(c["cost"] for c in calls),
-            "international_calls": sum(
-                1
-                for c in calls
-                if c["destination"].startswith("+") or c["destination"].startswith("011")
-            ),
-        }
+    def compact(self, days: int | None = None) -> None:
+        """
+        Drop data older than the retention period
 
-    def cleanup_old_data(self, days: int = 30) -> None:
-        """Clean up old call history"""
+        Recent-call lists and alerts are kept in arrival order, so only the
+        expired entries at their heads are touched. Extensions with no
+        calls within the retention period are forgotten entirely.
+        """
+        days = self.retention_days if days is None else days
         cutoff = datetime.now(UTC) - timedelta(days=days)
+        cutoff_ts = cutoff.timestamp()
 
-        for extension in self.call_history:
-            self.call_history[extension] = [
-                c for c in self.call_history[extension] if c["timestamp"] > cutoff
-            ]
+        with self.lock:
+            for extension in list(self._activity):
+                history = self.call_history.get(extension)
+                while history and history[0]["timestamp"] <= cutoff:
+                    history.popleft()
+                if self._activity[extension].last_seen <= cutoff_ts:
+                    del self._activity[extension]
+                    self.call_history.pop(extension, None)
 
-        self.alerts = [a for a in self.alerts if a["timestamp"] > cutoff]
+            while self.alerts and self.alerts[0]["timestamp"] <= cutoff:
+                self.alerts.popleft()
 
+    def cleanup_old_data(self, days: int = 30) -> None:
+        """Clean up old call history"""
+        self.compact(days)
+        self.save_state()
         self.logger.info(f"Cleaned up fraud detection data older than {days} days")
 
+    def stop(self) -> None:
+        """Stop background maintenance and save the current state"""
+        self._stop_event.set()
+        if self._maintenance_thread and self._maintenance_thread.is_alive():
+            self._maintenance_thread.join(timeout=2.0)
+        self._maintenance_thread = None
+        self.save_state()
+
+    def _maintenance_loop(self) -> None:
+        """Compact and persist state every compaction_interval seconds"""
+        while not self._stop_event.wait(self.compaction_interval):
+            try:
+                self.compact()
+                self.save_state()
+            except Exception as e:
+                self.logger.error(f"Fraud detection maintenance failed: {e}")
+
+    def load_state(self) -> None:
+        """Restore counters, alerts and blocked patterns saved by save_state"""
+        if not self.state_file:
+            return
+        try:
+            with open(self.state_file, encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("version") != STATE_VERSION:
+                return
+            activity = {
+                ext: _ExtensionActivity.from_dict(data)
+                for ext, data in state.get("extensions", {}).items()
+            }
+            alerts = [
+                {**a, "timestamp": datetime.fromisoformat(a["timestamp"])}
+                for a in state.get("alerts", [])
+            ]
+            patterns = [
+                {**p, "added_at": datetime.fromisoformat(p["added_at"])}
+                for p in state.get("blocked_patterns", [])
+            ]
+        except FileNotFoundError:
+            return
+        except (OSError, KeyError, TypeError, ValueError) as e:
+            self.logger.warning(f"Could not load fraud detection state: {e}")
+            return
+
+        with self.lock:
+            self._activity = activity
+            self.alerts.extend(alerts)
+            self.blocked_patterns = patterns
+            self._rebuild_blocked_trie()
+        self.logger.info(
+            f"Restored fraud detection state for {len(activity)} extensions, "
+            f"{len(patterns)} blocked patterns"
+        )
+
+    def save_state(self) -> None:
+        """Persist counters, alerts and blocked patterns across restarts"""
+        if not self.enabled or not self.state_file:
+            return
+        with self.lock:
+            state = {
+                "version": STATE_VERSION,
+                "extensions": {ext: a.to_dict() for ext, a in self._activity.items()},
+                "alerts": [{**a, "timestamp": a["timestamp"].isoformat()} for a in self.alerts],
+                "blocked_patterns": [
+                    {**p, "added_at": p["added_at"].isoformat()} for p in self.blocked_patterns
+                ],
+            }
+        try:
+            path = Path(self.state_file)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            tmp_path.replace(path)
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.warning(f"Could not save fraud detection state: {e}")
+
     def get_statistics(self) -> dict:
         """Get fraud detection statistics"""
+        with self.lock:
+            high_risk = sum(1 for a in self.alerts if a["fraud_score"] > 0.7)
         return {
             "enabled": self.enabled,
-            "total_extensions_tracked": len(self.call_history),
+            "total_extensions_tracked": len(self._activity),
             "total_alerts": len(self.alerts),
+            "high_risk_alerts": high_risk,
             "blocked_patterns": len(self.blocked_patterns),
             "alerts_24h": len(self.get_alerts(hours=24)),
         }
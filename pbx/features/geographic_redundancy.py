@@ -9,6 +9,7 @@
 from enum import Enum
 from typing import Any
 
+from pbx.utils.dns_resolver import DNSResolver, get_dns_resolver
 from pbx.utils.logger import get_logger
 
 
@@ -159,12 +160,24 @@ def _check_network_latency(self, target_host: str | None = None) -> float:
             # Use a public DNS server as default
             target_host = "8.8.8.8"
 
+        address = target_host
+        if not DNSResolver.is_ip_address(target_host):
+            # Resolve through the cache so a slow DNS server doesn't count
+            # against (or stall) the latency check
+            resolver = get_dns_resolver(self.config)
+            addresses = resolver.resolve_host(target_host, wait=resolver.timeout)
+            if not addresses:
+                self.logger.warning(f"Network latency check failed: cannot resolve {target_host}")
+                return 9999.0
+            address = addresses[0]
+
         try:
             # Simple TCP connection test
+            family = socket.AF_INET6 if ":" in address else socket.AF_INET
             start_time = time.time()
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock = socket.socket(family, socket.SOCK_STREAM)
             sock.settimeout(2.0)  # 2 second timeout
-            result = sock.connect_ex((target_host, 53))  # DNS port
+            result = sock.connect_ex((address, 53))  # DNS port
             sock.close()
             end_time = time.time()
 
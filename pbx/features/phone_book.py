@@ -4,7 +4,10 @@
 and can be pushed to IP phones
 """
 
+import gzip
+import hashlib
 import json
+import threading
 from datetime import UTC, datetime
 from typing import Any
 
@@ -19,6 +22,155 @@
     EXTENSION_DB_AVAILABLE = False
 
 
+# Fields covered by directory search
+SEARCH_FIELDS = ("name", "extension", "department")
+# Longest n-gram kept in the index; longer queries intersect these
+MAX_GRAM = 3
+# Longest word prefix indexed for ranking
+MAX_PREFIX = 8
+
+
+class DirectoryIndex:
+    """
+    Prefix and n-gram index over phone book names, extensions and departments
+
+    Every 1- to 3-character substring of each searchable field maps to the
+    extensions containing it. Short queries are a single lookup; longer ones
+    intersect the postings of their trigrams and confirm the candidates, so a
+    search touches only entries that can match instead of the whole directory.
+    A second index of word prefixes ranks "starts with" matches first without
+    rescanning the candidates. Entries are added and removed incrementally.
+    """
+
+    def __init__(self) -> None:
+        self.postings: dict[str, set[str]] = {}
+        self.prefixes: dict[str, set[str]] = {}
+        self.fields: dict[str, tuple[str, ...]] = {}
+        self._lowered: dict[str, str] = {}
+        # Extension -> position in name order, rebuilt after changes
+        self._order: dict[str, int] | None = None
+
+    @staticmethod
+    def _grams(fields: tuple[str, ...]) -> set[str]:
+        return {
+            text[i : i + n]
+            for text in fields
+            for n in range(1, MAX_GRAM + 1)
+            for i in range(len(text) - n + 1)
+        }
+
+    @staticmethod
+    def _word_prefixes(fields: tuple[str, ...]) -> set[str]:
+        return {
+            word[:n]
+            for text in fields
+            for word in text.split()
+            for n in range(1, min(len(word), MAX_PREFIX) + 1)
+        }
+
+    @staticmethod
+    def _post(index: dict[str, set[str]], keys: set[str], extension: str) -> None:
+        for key in keys:
+            index.setdefault(key, set()).add(extension)
+
+    @staticmethod
+    def _unpost(index: dict[str, set[str]], keys: set[str], extension: str) -> None:
+        for key in keys:
+            posting = index.get(key)
+            if posting is not None:
+                posting.discard(extension)
+                if not posting:
+                    del index[key]
+
+    def add(self, entry: dict) -> None:
+        """Index an entry, replacing any previous version of it"""
+        extension = entry["extension"]
+        self.remove(extension)
+        fields = tuple((entry.get(field) or "").lower() for field in SEARCH_FIELDS)
+        self.fields[extension] = fields
+        self._lowered[fields[1]] = extension
+        self._post(self.postings, self._grams(fields), extension)
+        self._post(self.prefixes, self._word_prefixes(fields), extension)
+        self._order = None
+
+    def remove(self, extension: str) -> None:
+        """Drop an entry from the index"""
+        fields = self.fields.pop(extension, None)
+        if fields is None:
+            return
+        self._lowered.pop(fields[1], None)
+        self._unpost(self.postings, self._grams(fields), extension)
+        self._unpost(self.prefixes, self._word_prefixes(fields), extension)
+        self._order = None
+
+    def clear(self) -> None:
+        """Remove every entry"""
+        self.postings.clear()
+        self.prefixes.clear()
+        self.fields.clear()
+        self._lowered.clear()
+        self._order = None
+
+    def _candidates(self, query: str) -> set[str]:
+        if len(query) <= MAX_GRAM:
+            return self.postings.get(query, set())
+        postings = sorted(
+            (
+                self.postings.get(query[i : i + MAX_GRAM], set())
+                for i in range(len(query) - MAX_GRAM + 1)
+            ),
+            key=len,
+        )
+        candidates = postings[0].intersection(*postings[1:])
+        return {ext for ext in candidates if any(query in text for text in self.fields[ext])}
+
+    def search(self, query: str, offset: int = 0, limit: int | None = None) -> tuple[int, list]:
+        """
+        Find entries with the query in any searchable field
+
+        Matches are ordered best first: exact extension, then a name or
+        department word starting with the query, then any other substring
+        match; equally good matches are in name order.
+
+        Args:
+            query: Case-insensitive substring to look for
+            offset: Number of matches to skip
+            limit: Maximum number of extensions to return (None for all)
+
+        Returns:
+            tuple: (total number of matches, extensions on the page)
+        """
+        query = query.lower()
+        if not query:
+            return 0, []
+        candidates = self._candidates(query)
+        if not candidates:
+            return 0, []
+
+        exact = {self._lowered[query]} & candidates if query in self._lowered else set()
+        if len(query) <= MAX_PREFIX and " " not in query:
+            prefixed = self.prefixes.get(query, set()) & candidates
+        else:
+            prefixed = {
+                ext
+                for ext in candidates
+                if any(text.startswith(query) or f" {query}" in text for text in self.fields[ext])
+            }
+        prefixed -= exact
+
+        if self._order is None:
+            by_name = sorted(self.fields, key=lambda ext: (self.fields[ext][0], ext))
+            self._order = {ext: position for position, ext in enumerate(by_name)}
+
+        end = None if limit is None else offset + limit
+        ranked: list[str] = []
+        for bucket in (exact, prefixed, candidates - exact - prefixed):
+            if end is not None and len(ranked) >= end:
+                break
+            ranked.extend(sorted(bucket, key=self._order.__getitem__))
+        return len(candidates), ranked[offset:end]
+
+
 class PhoneBook:
     """
     Centralized phone directory system
@@ -46,6 +198,12 @@ def __init__(self, config: dict, database: Any | None = None) -> None:
 
         # In-memory cache for quick access
         self.entries = {}  # {extension: entry}
+        self.index = DirectoryIndex()
+        # Bumped on every change; exports are rendered once per version
+        self.version = 0
+        self._exports: dict[str, dict] = {}
+        self._sorted: tuple[int, list[dict]] | None = None
+        self.lock = threading.RLock()
 
         if self.enabled:
             self.logger.info("Phone book feature enabled")
@@ -109,9 +267,13 @@ def _load_from_database(self) -> None:
             query = "SELECT id, extension, name, department, email, mobile, office_location, ad_synced, created_at, updated_at FROM phone_book ORDER BY name"
             entries = self.database.fetch_all(query)
 
-            self.entries = {}
-            for entry in entries:
-                self.entries[entry["extension"]] = entry
+            with self.lock:
+                self.entries = {}
+                self.index.clear()
+                for entry in entries:
+                    self.entries[entry["extension"]] = entry
+                    self.index.add(entry)
+                self._changed()
 
             self.logger.info(f"Loaded {len(self.entries)} phone book entries from database")
         except (KeyError, TypeError, ValueError) as e:
@@ -156,8 +318,18 @@ def add_entry(
             "updated_at": datetime.now(UTC),
         }
 
-        # Update in-memory cache
-        self.entries[extension] = entry
+        # Update in-memory cache; an AD sync re-adding an unchanged entry
+        # keeps the directory version, so phones keep their cached copy
+        with self.lock:
+            previous = self.entries.get(extension)
+            if previous is None or any(
+                previous.get(field) != value
+                for field, value in entry.items()
+                if field != "updated_at"
+            ):
+                self.entries[extension] = entry
+                self.index.add(entry)
+                self._changed()
 
         # Update database if available
         if self.database and self.database.enabled:
@@ -211,8 +383,11 @@ def remove_entry(self, extension: str) -> bool:
             return False
 
         # Remove from cache
-        if extension in self.entries:
-            del self.entries[extension]
+        with self.lock:
+            if extension in self.entries:
+                del self.entries[extension]
+                self.index.remove(extension)
+                self._changed()
 
         # Remove from database
         if self.database and self.database.enabled:
@@ -246,36 +421,59 @@ def get_all_entries(self) -> list[dict]:
         if not self.enabled:
             return []
 
-        return sorted(self.entries.values(), key=lambda x: x["name"])
+        return list(self._sorted_entries())
+
+    def _changed(self) -> None:
+        """Start a new directory version, dropping cached exports"""
+        self.version += 1
+        self._exports.clear()
+        self._sorted = None
+
+    def _sorted_entries(self) -> list[dict]:
+        """Entries in name order, cached per directory version"""
+        with self.lock:
+            if self._sorted is None or self._sorted[0] != self.version:
+                self._sorted = (
+                    self.version,
+                    sorted(self.entries.values(), key=lambda x: x["name"]),
+                )
+            return self._sorted[1]
 
-    def search(self, query: str, max_results: int = 50) -> list[dict]:
+    def search(self, query: str, max_results: int = 50, offset: int = 0) -> list[dict]:
         """
         Search phone book entries
 
         Args:
             query: Search query (name, extension, department)
             max_results: Maximum number of results
+            offset: Number of matches to skip (for paging)
 
         Returns:
-            list: Matching entries
+            list: Matching entries, best matches first
         """
-        if not self.enabled:
-            return []
+        return self.search_page(query, offset, max_results)["entries"]
 
-        query_lower = query.lower()
-        results = []
+    def search_page(self, query: str, offset: int = 0, limit: int = 50) -> dict:
+        """
+        Search phone book entries one page at a time
 
-        for entry in self.entries.values():
-            if (
-                query_lower in entry["name"].lower()
-                or query_lower in entry["extension"]
-                or (entry.get("department") and query_lower in entry["department"].lower())
-            ):
-                results.append(entry)
-                if len(results) >= max_results:
-                    break
+        Args:
+            query: Search query (name, extension, department)
+            offset: Number of matches to skip
+            limit: Maximum number of entries to return
+
+        Returns:
+            dict: total match count, offset, limit and the page of entries
+        """
+        offset = max(offset, 0)
+        limit = max(limit, 0)
+        if not self.enabled:
+            return {"total": 0, "offset": offset, "limit": limit, "entries": []}
 
-        return results
+        with self.lock:
+            total, extensions = self.index.search(query, offset, limit)
+            page = [self.entries[ext] for ext in extensions]
+        return {"total": total, "offset": offset, "limit": limit, "entries": page}
 
     def sync_from_ad(self, ad_integration: Any, extension_registry: str) -> int:
         """
@@ -356,6 +554,42 @@ def sync_from_ad(self, ad_integration: Any, extension_registry: str) -> int:
         )
         return synced_count
 
+    def get_export(self, export_format: str) -> dict:
+        """
+        Get a rendered directory export, cached until the directory changes
+
+        Args:
+            export_format: "xml" (Yealink), "cisco-xml" or "json"
+
+        Returns:
+            dict: version, content, gzip-compressed content and an ETag
+            derived from the content
+        """
+        renderers = {
+            "xml": self.render_xml,
+            "cisco-xml": self.render_cisco_xml,
+            "json": self._render_json,
+        }
+        with self.lock:
+            cached = self._exports.get(export_format)
+            if cached is not None:
+                return cached
+
+            content = renderers[export_format](self._sorted_entries())
+            data = content.encode("utf-8")
+            export = {
+                "version": self.version,
+                "content": content,
+                "gzip": gzip.compress(data, compresslevel=6),
+                "etag": hashlib.sha1(data, usedforsecurity=False).hexdigest(),
+            }
+            self._exports[export_format] = export
+            self.logger.debug(
+                f"Rendered phone book {export_format} export (version {self.version}, "
+                f"{len(data)} bytes)"
+            )
+            return export
+
     def export_xml(self) -> str:
         """
         Export phone book as XML (Yealink format)
@@ -366,11 +600,47 @@ def export_xml(self) -> str:
         if not self.enabled:
             return ""
 
+        return self.get_export("xml")["content"]
+
+    def export_cisco_xml(self) -> str:
+        """
+        Export phone book as Cisco XML format
+
+        Returns:
+            str: XML formatted phone book for Cisco phones
+        """
+        if not self.enabled:
+            return ""
+
+        return self.get_export("cisco-xml")["content"]
+
+    def export_json(self) -> str:
+        """
+        Export phone book as JSON
+
+        Returns:
+            str: JSON formatted phone book
+        """
+        if not self.enabled:
+            return "[]"
+
+        return self.get_export("json")["content"]
+
+    def render_xml(self, entries: list[dict]) -> str:
+        """
+        Render entries as a Yealink XML directory
+
+        Args:
+            entries: Entries to include, in display order
+
+        Returns:
+            str: XML formatted phone book
+        """
         xml_lines = ['<?xml version="1.0" encoding="UTF-8"?>']
         xml_lines.append("<YealinkIPPhoneDirectory>")
         xml_lines.append("  <Title>Company Directory</Title>")
 
-        for entry in sorted(self.entries.values(), key=lambda x: x["name"]):
+        for entry in entries:
             xml_lines.append("  <DirectoryEntry>")
             xml_lines.append(f"    <Name>{self._xml_escape(entry['name'])}</Name>")
             xml_lines.append(f"    <Telephone>{self._xml_escape(entry['extension'])}</Telephone>")
@@ -379,22 +649,22 @@ def export_xml(self) -> str:
         xml_lines.append("</YealinkIPPhoneDirectory>")
         return "\n".join(xml_lines)
 
-    def export_cisco_xml(self) -> str:
+    def render_cisco_xml(self, entries: list[dict]) -> str:
         """
-        Export phone book as Cisco XML format
+        Render entries as a Cisco XML directory
+
+        Args:
+            entries: Entries to include, in display order
 
         Returns:
             str: XML formatted phone book for Cisco phones
         """
-        if not self.enabled:
-            return ""
-
         xml_lines = ['<?xml version="1.0" encoding="UTF-8"?>']
         xml_lines.append("<CiscoIPPhoneDirectory>")
         xml_lines.append("  <Title>Company Directory</Title>")
         xml_lines.append("  <Prompt>Select a contact</Prompt>")
 
-        for entry in sorted(self.entries.values(), key=lambda x: x["name"]):
+        for entry in entries:
             xml_lines.append("  <DirectoryEntry>")
             xml_lines.append(f"    <Name>{self._xml_escape(entry['name'])}</Name>")
             xml_lines.append(f"    <Telephone>{self._xml_escape(entry['extension'])}</Telephone>")
@@ -403,17 +673,7 @@ def export_cisco_xml(self) -> str:
         xml_lines.append("</CiscoIPPhoneDirectory>")
         return "\n".join(xml_lines)
 
-    def export_json(self) -> str:
-        """
-        Export phone book as JSON
-
-        Returns:
-            str: JSON formatted phone book
-        """
-        if not self.enabled:
-            return "[]"
-
-        entries = sorted(self.entries.values(), key=lambda x: x["name"])
+    def _render_json(self, entries: list[dict]) -> str:
         return json.dumps(entries, indent=2, default=str)
 
     def _xml_escape(self, text: str) -> str:
@@ -12,6 +12,8 @@
 - API: POST /api/phones/reboot or POST /api/phones/{extension}/reboot
 """
 
+import itertools
+import re
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
@@ -19,6 +21,24 @@
 from pbx.utils.device_types import detect_device_type
 from pbx.utils.logger import get_logger
 
+# Template placeholders look like {{EXTENSION_NUMBER}}
+_PLACEHOLDER_PATTERN = re.compile(r"\{\{([A-Z0-9_]+)\}\}")
+
+# Each template object gets a new version, so rendered-config cache entries
+# built from a replaced template are never reused
+_template_versions = itertools.count(1)
+
+# Configuration the shared server settings are built from; a reload that
+# changes any of it drops every cached config
+_SERVER_CONFIG_PREFIXES = (
+    "server",
+    "provisioning",
+    "features.dtmf",
+    "api.port",
+    "api.server",
+    "integrations.active_directory",
+)
+
 
 class PhoneTemplate:
     """Represents a phone configuration template"""
@@ -36,6 +56,80 @@ def __init__(self, vendor: str, model: str, template_content: str) -> None:
         self.model = model.lower()
         self.template_content = template_content
 
+    @property
+    def template_content(self) -> str:
+        """Template source text"""
+        return self._template_content
+
+    @template_content.setter
+    def template_content(self, content: str) -> None:
+        self._template_content = content
+        self.version = next(_template_versions)
+        # Compile into alternating literal text and placeholder names so a
+        # config renders in one pass instead of one replace() per placeholder
+        parts = _PLACEHOLDER_PATTERN.split(content)
+        self._literals = parts[0::2]
+        self._placeholders = parts[1::2]
+
+    @staticmethod
+    def _placeholder_values(
+        extension_config: dict,
+        server_config: dict,
+        extension_config_2: dict | None,
+    ) -> dict[str, str]:
+        """Map placeholder names to their values for one phone"""
+        ldap_config = server_config.get("ldap_phonebook", {})
+        remote_phonebook = server_config.get("remote_phonebook", {})
+        dtmf_config = server_config.get("dtmf", {})
+
+        values = {
+            # Extension information (Line 1)
+            "EXTENSION_NUMBER": str(extension_config.get("number", "")),
+            "EXTENSION_NAME": str(extension_config.get("name", "")),
+            "EXTENSION_PASSWORD": str(extension_config.get("password", "")),
+            # Server information
+            "SIP_SERVER": str(server_config.get("sip_host", "")),
+            "SIP_PORT": str(server_config.get("sip_port", "5060")),
+            "SERVER_NAME": str(server_config.get("server_name", "PBX")),
+            # LDAP/LDAPS Phone Book Configuration
+            "LDAP_ENABLE": str(ldap_config.get("enable", "0")),
+            "LDAP_SERVER": str(ldap_config.get("server", "")),
+            "LDAP_PORT": str(ldap_config.get("port", "636")),
+            "LDAP_BASE": str(ldap_config.get("base", "")),
+            "LDAP_USER": str(ldap_config.get("user", "")),
+            "LDAP_PASSWORD": str(ldap_config.get("password", "")),
+            "LDAP_VERSION": str(ldap_config.get("version", "3")),
+            "LDAP_TLS_MODE": str(ldap_config.get("tls_mode", "1")),
+            "LDAP_NAME_FILTER": str(ldap_config.get("name_filter", "(|(cn=%)(sn=%))")),
+            "LDAP_NUMBER_FILTER": str(
+                ldap_config.get("number_filter", "(|(telephoneNumber=%)(mobile=%))")
+            ),
+            "LDAP_NAME_ATTR": str(ldap_config.get("name_attr", "cn")),
+            "LDAP_NUMBER_ATTR": str(ldap_config.get("number_attr", "telephoneNumber")),
+            "LDAP_DISPLAY_NAME": str(ldap_config.get("display_name", "Company Directory")),
+            # Remote Phone Book URL (fallback method)
+            "REMOTE_PHONEBOOK_URL": str(remote_phonebook.get("url", "")),
+            "REMOTE_PHONEBOOK_REFRESH": str(remote_phonebook.get("refresh_interval", "60")),
+            # DTMF Configuration
+            "DTMF_PAYLOAD_TYPE": str(dtmf_config.get("payload_type", "101")),
+            # Provisioning resource URL (for wallpaper, branding assets, etc.)
+            "PROVISION_RESOURCE_URL": str(server_config.get("provision_resource_url", "")),
+        }
+
+        # Extension information (Line 2 — for dual-port ATAs)
+        if extension_config_2 and extension_config_2.get("number"):
+            values["LINE_2_ENABLE"] = "Yes"
+            values["EXTENSION_NUMBER_2"] = str(extension_config_2.get("number", ""))
+            values["EXTENSION_NAME_2"] = str(extension_config_2.get("name", ""))
+            values["EXTENSION_PASSWORD_2"] = str(extension_config_2.get("password", ""))
+        else:
+            values["LINE_2_ENABLE"] = "No"
+            values["EXTENSION_NUMBER_2"] = ""
+            values["EXTENSION_NAME_2"] = ""
+            values["EXTENSION_PASSWORD_2"] = ""
+
+        return values
+
     def generate_config(
         self,
         extension_config: dict,
@@ -53,80 +147,15 @@ def generate_config(
         Returns:
             Generated configuration string
         """
-        # Replace placeholders in template
-        config = self.template_content
-
-        # Extension information (Line 1)
-        config = config.replace("{{EXTENSION_NUMBER}}", str(extension_config.get("number", "")))
-        config = config.replace("{{EXTENSION_NAME}}", str(extension_config.get("name", "")))
-        config = config.replace("{{EXTENSION_PASSWORD}}", str(extension_config.get("password", "")))
-
-        # Extension information (Line 2 — for dual-port ATAs)
-        if extension_config_2 and extension_config_2.get("number"):
-            config = config.replace("{{LINE_2_ENABLE}}", "Yes")
-            config = config.replace(
-                "{{EXTENSION_NUMBER_2}}", str(extension_config_2.get("number", ""))
-            )
-            config = config.replace("{{EXTENSION_NAME_2}}", str(extension_config_2.get("name", "")))
-            config = config.replace(
-                "{{EXTENSION_PASSWORD_2}}", str(extension_config_2.get("password", ""))
-            )
-        else:
-            config = config.replace("{{LINE_2_ENABLE}}", "No")
-            config = config.replace("{{EXTENSION_NUMBER_2}}", "")
-            config = config.replace("{{EXTENSION_NAME_2}}", "")
-            config = config.replace("{{EXTENSION_PASSWORD_2}}", "")
-
-        # Server information
-        config = config.replace("{{SIP_SERVER}}", str(server_config.get("sip_host", "")))
-        config = config.replace("{{SIP_PORT}}", str(server_config.get("sip_port", "5060")))
-        config = config.replace("{{SERVER_NAME}}", str(server_config.get("server_name", "PBX")))
-
-        # LDAP/LDAPS Phone Book Configuration
-        ldap_config = server_config.get("ldap_phonebook", {})
-        config = config.replace("{{LDAP_ENABLE}}", str(ldap_config.get("enable", "0")))
-        config = config.replace("{{LDAP_SERVER}}", str(ldap_config.get("server", "")))
-        config = config.replace("{{LDAP_PORT}}", str(ldap_config.get("port", "636")))
-        config = config.replace("{{LDAP_BASE}}", str(ldap_config.get("base", "")))
-        config = config.replace("{{LDAP_USER}}", str(ldap_config.get("user", "")))
-        config = config.replace("{{LDAP_PASSWORD}}", str(ldap_config.get("password", "")))
-        config = config.replace("{{LDAP_VERSION}}", str(ldap_config.get("version", "3")))
-        config = config.replace("{{LDAP_TLS_MODE}}", str(ldap_config.get("tls_mode", "1")))
-        config = config.replace(
-            "{{LDAP_NAME_FILTER}}", str(ldap_config.get("name_filter", "(|(cn=%)(sn=%))"))
-        )
-        config = config.replace(
-            "{{LDAP_NUMBER_FILTER}}",
-            str(ldap_config.get("number_filter", "(|(telephoneNumber=%)(mobile=%))")),
-        )
-        config = config.replace("{{LDAP_NAME_ATTR}}", str(ldap_config.get("name_attr", "cn")))
-        config = config.replace(
-            "{{LDAP_NUMBER_ATTR}}", str(ldap_config.get("number_attr", "telephoneNumber"))
-        )
-        config = config.replace(
-            "{{LDAP_DISPLAY_NAME}}", str(ldap_config.get("display_name", "Company Directory"))
-        )
-
-        # Remote Phone Book URL (fallback method)
-        remote_phonebook = server_config.get("remote_phonebook", {})
-        config = config.replace("{{REMOTE_PHONEBOOK_URL}}", str(remote_phonebook.get("url", "")))
-        config = config.replace(
-            "{{REMOTE_PHONEBOOK_REFRESH}}", str(remote_phonebook.get("refresh_interval", "60"))
-        )
-
-        # DTMF Configuration
-        dtmf_config = server_config.get("dtmf", {})
-        config = config.replace(
-            "{{DTMF_PAYLOAD_TYPE}}", str(dtmf_config.get("payload_type", "101"))
-        )
-
-        # Provisioning resource URL (for wallpaper, branding assets, etc.)
-        config = config.replace(
-            "{{PROVISION_RESOURCE_URL}}",
-            str(server_config.get("provision_resource_url", "")),
-        )
+        values = self._placeholder_values(extension_config, server_config, extension_config_2)
 
-        return config
+        # Unknown placeholders are left in place
+        pieces = [self._literals[0]]
+        for name, literal in zip(self._placeholders, self._literals[1:], strict=True):
+            value = values.get(name)
+            pieces.append(f"{{{{{name}}}}}" if value is None else value)
+            pieces.append(literal)
+        return "".join(pieces)
 
 
 def normalize_mac_address(mac: str) -> str:
@@ -243,6 +272,13 @@ def __init__(self, config: Any, database: Any | None = None) -> None:
         self.max_request_history = 100  # Keep last 100 requests
         self.database = database
         self.devices_db = None
+        # MAC address -> (cache key, rendered config, content type)
+        self._rendered_configs: dict[str, tuple] = {}
+        self._server_config: dict | None = None
+        self._reboot_rollout = None
+        # Phones pick up reloaded server settings on their next poll
+        if hasattr(config, "subscribe"):
+            config.subscribe(self._on_config_reload)
 
         # Initialize database access if available
         if database and database.enabled:
@@ -2428,6 +2464,7 @@ def unregister_device(self, mac_address: str) -> bool:
         found = normalized_mac in self.devices
         if found:
             del self.devices[normalized_mac]
+            self._rendered_configs.pop(normalized_mac, None)
 
             # Remove from database if available
             if self.devices_db:
@@ -2726,27 +2763,6 @@ def generate_config(
             "password": sip_password,
         }
 
-        # Build server config dict
-        server_ip = self.config.get("server.external_ip", "127.0.0.1")
-        api_port = self.config.get("api.port", 9000)
-        server_config = {
-            "sip_host": server_ip,
-            "sip_port": self.config.get("server.sip_port", 5060),
-            "server_name": self.config.get("server.server_name", "PBX"),
-            "provision_resource_url": f"http://{server_ip}:{api_port}/provision/resources",
-        }
-
-        # Add LDAP phonebook configuration
-        server_config["dtmf"] = {
-            "payload_type": self.config.get("features.dtmf.payload_type", 101),
-        }
-        server_config["ldap_phonebook"] = self._build_ldap_phonebook_config()
-        server_config["remote_phonebook"] = self.config.get("provisioning.remote_phonebook", {})
-
-        self.logger.info(
-            f"  Server config: SIP={server_config['sip_host']}:{server_config['sip_port']}"
-        )
-
         # Build Line 2 extension config if a second extension is assigned (dual-port ATAs)
         extension_config_2 = None
         if device.extension_number_2:
@@ -2773,17 +2789,32 @@ def generate_config(
                     f"Line 2 will be disabled"
                 )
 
-        # Generate configuration
-        config_content = template.generate_config(
-            extension_config, server_config, extension_config_2
+        # Phones poll their config and it rarely changes, so reuse the last
+        # render while the template and extension details are unchanged
+        cache_key = (
+            template.version,
+            tuple(extension_config.items()),
+            tuple(extension_config_2.items()) if extension_config_2 else None,
         )
+        cached = self._rendered_configs.get(device.mac_address)
+        if cached and cached[0] == cache_key:
+            _, config_content, content_type = cached
+            self.logger.info("  Serving cached config (unchanged since last render)")
+        else:
+            server_config = self._get_server_config()
 
-        # Determine content type based on vendor
-        # Mapping of vendors to their content types
-        vendor_content_types = {
-            "polycom": "application/xml",
-        }
-        content_type = vendor_content_types.get(device.vendor, "text/plain")
+            # Generate configuration
+            config_content = template.generate_config(
+                extension_config, server_config, extension_config_2
+            )
+
+            # Determine content type based on vendor
+            # Mapping of vendors to their content types
+            vendor_content_types = {
+                "polycom": "application/xml",
+            }
+            content_type = vendor_content_types.get(device.vendor, "text/plain")
+            self._rendered_configs[device.mac_address] = (cache_key, config_content, content_type)
 
         # Mark device as provisioned
         device.mark_provisioned()
@@ -2809,6 +2840,69 @@ def generate_config(
 
         return config_content, content_type
 
+    def _get_server_config(self) -> dict:
+        """
+        Get the server settings shared by every phone's config
+
+        Built once and reused until invalidate_config_cache() is called, or
+        a config reload changes the settings, so the LDAP phonebook settings
+        aren't rebuilt on every request.
+
+        Returns:
+            Server configuration dict for PhoneTemplate.generate_config
+        """
+        if self._server_config is not None:
+            return self._server_config
+
+        server_ip = self.config.get("server.external_ip", "127.0.0.1")
+        provisioning_port = self._get_provisioning_port()
+        server_config = {
+            "sip_host": server_ip,
+            "sip_port": self.config.get("server.sip_port", 5060),
+            "server_name": self.config.get("server.server_name", "PBX"),
+            "provision_resource_url": f"http://{server_ip}:{provisioning_port}/provision/resources",
+        }
+
+        # Add LDAP phonebook configuration
+        server_config["dtmf"] = {
+            "payload_type": self.config.get("features.dtmf.payload_type", 101),
+        }
+        server_config["ldap_phonebook"] = self._build_ldap_phonebook_config()
+        server_config["remote_phonebook"] = self.config.get("provisioning.remote_phonebook", {})
+
+        self.logger.info(
+            f"Provisioning server config: SIP={server_config['sip_host']}:{server_config['sip_port']}"
+        )
+        self._server_config = server_config
+        return server_config
+
+    def invalidate_config_cache(self, mac_address: str | None = None) -> None:
+        """
+        Drop cached rendered configs so they are rebuilt on the next request
+
+        Template edits and extension changes are picked up automatically;
+        call this after changing server-wide provisioning settings.
+
+        Args:
+            mac_address: Only drop this device's config (default: all devices
+                and the shared server settings)
+        """
+        if mac_address is None:
+            self._server_config = None
+            self._rendered_configs.clear()
+        else:
+            self._rendered_configs.pop(normalize_mac_address(mac_address), None)
+
+    def _on_config_reload(self, changed: set[str], _snapshot: Any) -> None:
+        """Drop cached configs when a reload changes the server settings"""
+        if any(
+            key == prefix or key.startswith(prefix + ".")
+            for key in changed
+            for prefix in _SERVER_CONFIG_PREFIXES
+        ):
+            self.logger.info("Provisioning server settings changed; rebuilding phone configs")
+            self.invalidate_config_cache()
+
     def _add_request_log(self, request_log: dict) -> None:
         """Add request to history, keeping only recent requests"""
         self.provision_requests.append(request_log)
@@ -2860,10 +2954,23 @@ def _generate_config_url(self, mac_address: str) -> str:
         config_url = config_url.replace(
             "{{SERVER_IP}}", self.config.get("server.external_ip", "127.0.0.1")
         )
-        config_url = config_url.replace("{{PORT}}", str(self.config.get("api.port", 9000)))
+        config_url = config_url.replace("{{PORT}}", str(self._get_provisioning_port()))
 
         return config_url
 
+    def _get_provisioning_port(self) -> int:
+        """
+        Get the port phones fetch configs from
+
+        This is the dedicated provisioning listener when the production API
+        server runs one, otherwise the main API port.
+        """
+        if self.config.get("api.server.mode", "development") == "production":
+            provisioning_port = self.config.get("api.server.provisioning.port")
+            if provisioning_port:
+                return int(provisioning_port)
+        return self.config.get("api.port", 9000)
+
     def get_supported_vendors(self) -> list:
         """
         Get list of supported vendors
@@ -2984,6 +3091,41 @@ def reboot_all_phones(self, sip_server: Any) -> dict:
         )
         return results
 
+    def get_reboot_rollout(self) -> Any:
+        """
+        Get the staggered reboot scheduler, creating it on first use
+
+        Returns:
+            RebootRollout instance
+        """
+        if self._reboot_rollout is None:
+            from pbx.features.reboot_rollout import RebootRollout
+
+            self._reboot_rollout = RebootRollout(self, self.config)
+        return self._reboot_rollout
+
+    def schedule_reboots(
+        self, sip_server: Any, extensions: list[str] | None = None, reason: str = "manual"
+    ) -> dict:
+        """
+        Reboot phones in paced waves instead of all at once
+
+        Args:
+            sip_server: SIPServer instance to send NOTIFY
+            extensions: Extension numbers to reboot (default: all registered)
+            reason: Why the reboot was requested
+
+        Returns:
+            dict: Rollout progress
+        """
+        if extensions is None:
+            extensions = [
+                extension.number
+                for extension in sip_server.pbx_core.extension_registry.get_all()
+                if extension.registered
+            ]
+        return self.get_reboot_rollout().schedule(extensions, sip_server, reason)
+
     def list_all_templates(self) -> list:
         """
         list all available templates (both built-in and custom)
@@ -3044,8 +3186,6 @@ def export_template_to_file(self, vendor: str, model: str) -> tuple:
             tuple: (success, message, filepath)
         """
         # Validate vendor and model to prevent path traversal
-        import re
-
         if not re.match(r"^[a-z0-9_-]+$", vendor.lower()) or not re.match(
             r"^[a-z0-9_-]+$", model.lower()
         ):
@@ -3097,8 +3237,6 @@ def update_template(self, vendor: str, model: str, content: str) -> tuple:
             tuple: (success, message)
         """
         # Validate vendor and model to prevent path traversal
-        import re
-
         if not re.match(r"^[a-z0-9_-]+$", vendor.lower()) or not re.match(
             r"^[a-z0-9_-]+$", model.lower()
         ):
@@ -3196,8 +3334,9 @@ def reload_templates(self) -> tuple:
             tuple: (success, message, stats)
         """
         try:
-            # Clear existing templates
+            # Clear existing templates and everything rendered from them
             self.templates.clear()
+            self.invalidate_config_cache()
 
             # Reload built-in templates
             self._load_builtin_templates()
@@ -3,6 +3,7 @@
 Tracks call quality metrics including jitter, packet loss, latency, and MOS scores
 """
 
+import itertools
 import threading
 import time
 from collections import deque
@@ -11,18 +12,44 @@
 
 from pbx.utils.logger import get_logger
 
+# Completed-call rows are written to the database in batches
+METRICS_BATCH_SIZE = 100
+METRICS_FLUSH_INTERVAL = 5.0  # seconds
+# Rows from failed batches are retried on the next flush; past this many
+# waiting rows the oldest are dropped
+METRICS_MAX_PENDING = 5000
+
+MAX_ALERTS = 1000
+
+INSERT_QOS_METRICS = """
+    INSERT INTO qos_metrics
+    (call_id, start_time, end_time, duration_seconds,
+     packets_sent, packets_received, packets_lost, packet_loss_percentage,
+     jitter_avg_ms, jitter_max_ms, latency_avg_ms, latency_max_ms,
+     mos_score, quality_rating)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
 
 class QoSMetrics:
-    """Container for QoS metrics for a single call"""
+    """
+    Container for QoS metrics for a single call
+
+    Every per-packet update is O(1): jitter is the RFC 3550 running
+    estimate, latency keeps a running sum over its sample window, and the
+    MOS score is only recomputed when read after something changed.
+    """
 
-    def __init__(self, call_id: str) -> None:
+    def __init__(self, call_id: str, clock_rate: int = 8000) -> None:
         """
         Initialize QoS metrics for a call
 
         Args:
             call_id: Unique identifier for the call
+            clock_rate: RTP timestamp clock rate in Hz (8000 for G.711)
         """
         self.call_id = call_id
+        self.clock_rate_khz = clock_rate / 1000
         self.start_time = datetime.now(UTC)
         self.end_time = None
 
@@ -33,13 +60,12 @@ def __init__(self, call_id: str) -> None:
         self.packets_out_of_order = 0
 
         # Timing statistics (in milliseconds)
-        # Use deque for efficient O(1) append/pop operations (instead of list
-        # pop(0) which is O(n))
-        self.jitter_samples = deque(maxlen=100)  # Recent jitter measurements
+        self.jitter_samples = deque(maxlen=100)  # Recent transit time differences
         self.latency_samples = deque(maxlen=100)  # Recent latency measurements
+        self._latency_sum = 0.0  # Sum of latency_samples
         self.max_jitter = 0.0
         self.max_latency = 0.0
-        self.avg_jitter = 0.0
+        self.avg_jitter = 0.0  # RFC 3550 interarrival jitter estimate
         self.avg_latency = 0.0
 
         # Sequence tracking for packet loss detection
@@ -50,12 +76,26 @@ def __init__(self, call_id: str) -> None:
         self.last_packet_timestamp = None
         self.last_arrival_time = None
 
-        # MOS score (Mean Opinion Score: 1.0-5.0, where 5.0 is best)
-        self.mos_score = 0.0
+        # MOS score (Mean Opinion Score: 1.0-5.0, where 5.0 is best),
+        # recalculated on read once the inputs have changed
+        self._mos_score = 0.0
+        self._mos_stale = False
 
         # Lock for thread safety
         self.lock = threading.Lock()
 
+    @property
+    def mos_score(self) -> float:
+        """Current MOS score"""
+        if self._mos_stale:
+            self._calculate_mos()
+        return self._mos_score
+
+    @mos_score.setter
+    def mos_score(self, value: float) -> None:
+        self._mos_score = value
+        self._mos_stale = False
+
     def update_packet_received(
         self, sequence_number: int, timestamp: int, payload_size: int
     ) -> None:
@@ -89,31 +129,21 @@ def update_packet_received(
                     # Out of order packet
                     self.packets_out_of_order += 1
 
-            # Calculate jitter (RFC 3550)
-            # Jitter = variation in packet arrival times
+            # Calculate jitter (RFC 3550 section 6.4.1)
             if self.last_arrival_time is not None and self.last_packet_timestamp is not None:
                 # Time difference between packet arrivals (in ms)
                 arrival_delta = (current_time - self.last_arrival_time) * 1000
 
-                # Timestamp difference
-                # Note: RTP timestamp units depend on codec sample rate (typically 8kHz for G.711)
-                # For accurate jitter, the clock rate should be provided per-codec
-                # Using 8kHz as default for telephony codecs (G.711)
-                clock_rate = 8.0  # kHz (could be made configurable per codec)
-                timestamp_delta = (timestamp - self.last_packet_timestamp) / clock_rate
-
-                # Jitter is the absolute difference
-                jitter = abs(arrival_delta - timestamp_delta)
-
-                # Store jitter sample (deque automatically maintains
-                # maxlen=100)
-                self.jitter_samples.append(jitter)
+                # Timestamp difference, converted to ms at the codec clock rate
+                timestamp_delta = (timestamp - self.last_packet_timestamp) / self.clock_rate_khz
 
-                # Update max jitter
-                self.max_jitter = max(self.max_jitter, jitter)
+                # Difference in relative transit time, D(i-1, i)
+                transit_delta = abs(arrival_delta - timestamp_delta)
+                self.jitter_samples.append(transit_delta)
+                self.max_jitter = max(self.max_jitter, transit_delta)
 
-                # Calculate average jitter
-                self.avg_jitter = sum(self.jitter_samples) / len(self.jitter_samples)
+                # J(i) = J(i-1) + (|D(i-1, i)| - J(i-1)) / 16
+                self.avg_jitter += (transit_delta - self.avg_jitter) / 16
 
             # Update tracking variables
             self.last_sequence_number = sequence_number
@@ -121,8 +151,7 @@ def update_packet_received(
             self.last_packet_timestamp = timestamp
             self.last_arrival_time = current_time
 
-            # Recalculate MOS score
-            self._calculate_mos()
+            self._mos_stale = True
 
     def update_packet_sent(self) -> None:
         """Update metrics when a packet is sent"""
@@ -137,15 +166,17 @@ def add_latency_sample(self, latency_ms: float) -> None:
             latency_ms: Round-trip latency in milliseconds
         """
         with self.lock:
-            # Deque automatically maintains maxlen=100
+            # Keep the window's sum current instead of re-adding it
+            if len(self.latency_samples) == self.latency_samples.maxlen:
+                self._latency_sum -= self.latency_samples[0]
             self.latency_samples.append(latency_ms)
+            self._latency_sum += latency_ms
 
             self.max_latency = max(self.max_latency, latency_ms)
 
-            self.avg_latency = sum(self.latency_samples) / len(self.latency_samples)
+            self.avg_latency = self._latency_sum / len(self.latency_samples)
 
-            # Recalculate MOS score
-            self._calculate_mos()
+            self._mos_stale = True
 
     def _calculate_mos(self) -> None:
         """
@@ -154,6 +185,8 @@ def _calculate_mos(self) -> None:
 
         Uses E-Model (ITU-T G.107) simplified calculation
         """
+        self._mos_stale = False
+
         # If no packets were received and no latency data, we can't calculate a meaningful MOS
         # In this case, keep MOS at 0.0 to indicate "no data"
         if self.packets_received == 0 and not self.latency_samples:
@@ -184,16 +217,16 @@ def _calculate_mos(self) -> None:
         # Convert R-factor to MOS
         # MOS = 1 + 0.035*R + 7E-6*R*(R-60)*(100-R)
         if r_factor < 0:
-            self.mos_score = 1.0
+            self._mos_score = 1.0
         elif r_factor > 100:
-            self.mos_score = 4.5
+            self._mos_score = 4.5
         else:
-            self.mos_score = (
+            self._mos_score = (
                 1 + 0.035 * r_factor + 0.000007 * r_factor * (r_factor - 60) * (100 - r_factor)
             )
 
             # Clamp to valid range
-            self.mos_score = max(1.0, min(5.0, self.mos_score))
+            self._mos_score = max(1.0, min(5.0, self._mos_score))
 
     def end_call(self) -> None:
         """Mark the call as ended"""
@@ -273,19 +306,56 @@ def __init__(self, pbx: Any) -> None:
         self.pbx = pbx
         self.logger = get_logger()
         self.active_calls = {}  # call_id -> QoSMetrics
-        self.historical_data = []  # list of completed call metrics
+        self._max_historical_records = 10000  # Keep last 10k calls
+        self.historical_data = []  # completed call metrics, oldest first
         self.alert_thresholds = {
             "mos_min": 3.5,  # Alert if MOS drops below this
             "packet_loss_max": 2.0,  # Alert if packet loss exceeds this percentage
             "jitter_max": 50.0,  # Alert if jitter exceeds this (ms)
             "latency_max": 300.0,  # Alert if latency exceeds this (ms)
         }
-        self.alerts = []  # list of quality alerts
-        self.max_historical_records = 10000  # Keep last 10k calls
+        self.alerts = []  # quality alerts, oldest first
         self.lock = threading.Lock()
 
+        # Rows waiting for the background database writer
+        self._pending_rows: list[tuple] = []
+        self._pending_lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._writer_stop = threading.Event()
+        self._writer_thread: threading.Thread | None = None
+        self.metrics_dropped = 0
+
         self.logger.info("QoS monitoring system initialized")
 
+    @property
+    def historical_data(self) -> deque:
+        """Completed call summaries, bounded to max_historical_records"""
+        return self._historical_data
+
+    @historical_data.setter
+    def historical_data(self, records: list[dict]) -> None:
+        self._historical_data = deque(records, maxlen=self._max_historical_records)
+
+    @property
+    def max_historical_records(self) -> int:
+        """Number of completed calls kept in memory"""
+        return self._max_historical_records
+
+    @max_historical_records.setter
+    def max_historical_records(self, value: int) -> None:
+        with self.lock:
+            self._max_historical_records = value
+            self.historical_data = self._historical_data
+
+    @property
+    def alerts(self) -> deque:
+        """Recent quality alerts, bounded to MAX_ALERTS"""
+        return self._alerts
+
+    @alerts.setter
+    def alerts(self, alerts: list[dict]) -> None:
+        self._alerts = deque(alerts, maxlen=MAX_ALERTS)
+
     def start_monitoring(self, call_id: str) -> QoSMetrics:
         """
         Start monitoring QoS for a call
@@ -325,10 +395,8 @@ def stop_monitoring(self, call_id: str) -> dict | None:
             metrics.end_call()
             summary = metrics.get_summary()
 
-            # Move to historical data
+            # Move to historical data (the oldest call drops off when full)
             self.historical_data.append(summary)
-            if len(self.historical_data) > self.max_historical_records:
-                self.historical_data.pop(0)
 
             # Check for quality issues and generate alerts
             self._check_quality_alerts(summary)
@@ -383,7 +451,8 @@ def get_historical_metrics(self, limit: int = 100, min_mos: float | None = None)
             list of historical QoS metric dictionaries
         """
         with self.lock:
-            data = self.historical_data[-limit:]
+            data = list(itertools.islice(reversed(self.historical_data), limit))
+            data.reverse()
 
             if min_mos is not None:
                 data = [d for d in data if d["mos_score"] >= min_mos]
@@ -401,7 +470,9 @@ def get_alerts(self, limit: int = 50) -> list[dict]:
             list of alert dictionaries
         """
         with self.lock:
-            return self.alerts[-limit:]
+            alerts = list(itertools.islice(reversed(self.alerts), limit))
+            alerts.reverse()
+            return alerts
 
     def clear_alerts(self) -> int:
         """
@@ -412,7 +483,7 @@ def clear_alerts(self) -> int:
         """
         with self.lock:
             count = len(self.alerts)
-            self.alerts = []
+            self.alerts.clear()
             self.logger.info(f"Cleared {count} QoS alerts")
             return count
 
@@ -506,54 +577,109 @@ def _check_quality_alerts(self, summary: dict) -> None:
             )
 
         # Add alerts to list
+        event_bus = getattr(self.pbx, "event_bus", None)
         for alert in alerts_generated:
             self.alerts.append(alert)
             self.logger.warning(f"QoS Alert: {alert['message']}")
-
-        # Keep alerts list from growing too large
-        if len(self.alerts) > 1000:
-            self.alerts = self.alerts[-1000:]
+            if event_bus:
+                event_bus.publish("qos.alert", alert)
 
     def _store_metrics(self, summary: dict) -> None:
         """
-        Store QoS metrics in database if available
+        Queue QoS metrics for the database if available
+
+        Rows are written in batches by a background thread, every
+        METRICS_FLUSH_INTERVAL seconds or once METRICS_BATCH_SIZE are waiting.
 
         Args:
             summary: QoS metrics summary
         """
         try:
-            if hasattr(self.pbx, "db") and self.pbx.db and self.pbx.db.enabled:
-                # Store in database
-                query = """
-                    INSERT INTO qos_metrics
-                    (call_id, start_time, end_time, duration_seconds,
-                     packets_sent, packets_received, packets_lost, packet_loss_percentage,
-                     jitter_avg_ms, jitter_max_ms, latency_avg_ms, latency_max_ms,
-                     mos_score, quality_rating)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """
-
-                params = (
-                    summary["call_id"],
-                    summary["start_time"],
-                    summary["end_time"],
-                    summary["duration_seconds"],
-                    summary["packets_sent"],
-                    summary["packets_received"],
-                    summary["packets_lost"],
-                    summary["packet_loss_percentage"],
-                    summary["jitter_avg_ms"],
-                    summary["jitter_max_ms"],
-                    summary["latency_avg_ms"],
-                    summary["latency_max_ms"],
-                    summary["mos_score"],
-                    summary["quality_rating"],
-                )
+            if not (hasattr(self.pbx, "db") and self.pbx.db and self.pbx.db.enabled):
+                return
 
-                self.pbx.db.execute(query, params)
-                self.logger.debug(f"Stored QoS metrics for call {summary['call_id']} in database")
+            row = (
+                summary["call_id"],
+                summary["start_time"],
+                summary["end_time"],
+                summary["duration_seconds"],
+                summary["packets_sent"],
+                summary["packets_received"],
+                summary["packets_lost"],
+                summary["packet_loss_percentage"],
+                summary["jitter_avg_ms"],
+                summary["jitter_max_ms"],
+                summary["latency_avg_ms"],
+                summary["latency_max_ms"],
+                summary["mos_score"],
+                summary["quality_rating"],
+            )
         except (KeyError, TypeError, ValueError) as e:
             self.logger.error(f"Failed to store QoS metrics in database: {e}")
+            return
+
+        with self._pending_lock:
+            self._pending_rows.append(row)
+            pending = len(self._pending_rows)
+            if self._writer_thread is None:
+                self._writer_stop.clear()
+                self._writer_thread = threading.Thread(
+                    target=self._writer_loop, name="qos-metrics-writer", daemon=True
+                )
+                self._writer_thread.start()
+        # Wake the writer once per full batch; while failed rows are waiting
+        # to be retried it keeps to its own interval instead
+        if pending == METRICS_BATCH_SIZE:
+            self._flush_event.set()
+
+    def _writer_loop(self) -> None:
+        while not self._writer_stop.is_set():
+            self._flush_event.wait(METRICS_FLUSH_INTERVAL)
+            self._flush_event.clear()
+            self.flush_metrics()
+
+    def flush_metrics(self) -> int:
+        """
+        Write queued QoS metrics rows to the database now
+
+        Returns:
+            Number of rows written
+        """
+        with self._pending_lock:
+            rows, self._pending_rows = self._pending_rows, []
+        if not rows:
+            return 0
+
+        try:
+            if self.pbx.db.execute_many(INSERT_QOS_METRICS, rows, "QoS metrics batch insert"):
+                self.logger.debug(f"Stored QoS metrics for {len(rows)} calls in database")
+                return len(rows)
+            self.logger.error(f"Failed to store QoS metrics for {len(rows)} calls in database")
+        except Exception as e:
+            self.logger.error(f"Failed to store QoS metrics in database: {e}")
+
+        # Put the batch back ahead of rows queued since, for the next flush
+        with self._pending_lock:
+            self._pending_rows[:0] = rows
+            overflow = len(self._pending_rows) - METRICS_MAX_PENDING
+            if overflow > 0:
+                del self._pending_rows[:overflow]
+                self.metrics_dropped += overflow
+        if overflow > 0:
+            self.logger.warning(
+                f"Dropped {overflow} queued QoS metrics rows while the database is unavailable"
+            )
+        return 0
+
+    def stop(self) -> None:
+        """Write any queued metrics and stop the background writer"""
+        with self._pending_lock:
+            thread, self._writer_thread = self._writer_thread, None
+        if thread is not None:
+            self._writer_stop.set()
+            self._flush_event.set()
+            thread.join(timeout=5)
+        self.flush_metrics()
 
     def update_alert_thresholds(self, thresholds: dict) -> None:
         """
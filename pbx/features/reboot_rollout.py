@@ -0,0 +1,379 @@
+"""
+Staggered phone reboot rollout
+Reboots phones in paced waves so a fleet-wide config change doesn't send every
+phone back to the provisioning server and registrar at the same moment
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import UTC, datetime
+from typing import Any
+
+from pbx.utils.logger import get_logger
+
+# Rollout states
+PENDING = "pending"
+RUNNING = "running"
+PAUSED = "paused"
+COMPLETED = "completed"
+CANCELLED = "cancelled"
+
+# Per-phone states
+QUEUED = "queued"
+DEFERRED = "deferred"
+REBOOTING = "rebooting"
+REREGISTERED = "reregistered"
+TIMED_OUT = "timed_out"
+FAILED = "failed"
+SKIPPED_BUSY = "skipped_busy"
+
+
+class RebootRollout:
+    """
+    Wave-based reboot scheduler for provisioned phones
+
+    Each wave sends at most wave_size reboot NOTIFYs, then waits for those
+    phones to REGISTER again before the next wave starts. Phones on an active
+    call are pushed back to a later wave. If too few phones in a wave come
+    back, the rollout pauses until an administrator resumes or cancels it.
+    Only one rollout runs at a time; scheduling more phones while one is in
+    progress adds them to its queue.
+    """
+
+    def __init__(self, provisioning: Any, config: Any | None = None) -> None:
+        """
+        Initialize reboot rollout scheduler
+
+        Args:
+            provisioning: PhoneProvisioning instance used to send reboots
+            config: Config object (reads provisioning.reboot_rollout.*)
+        """
+        self.logger = get_logger()
+        self.provisioning = provisioning
+
+        def setting(key: str, default: Any) -> Any:
+            if config is None:
+                return default
+            value = config.get(f"provisioning.reboot_rollout.{key}", default)
+            return default if value is None else value
+
+        self.wave_size = max(int(setting("wave_size", 25)), 1)
+        self.wave_interval = float(setting("wave_interval", 10))
+        self.registration_timeout = float(setting("registration_timeout", 120))
+        self.min_reregistered = float(setting("min_reregistered", 0.8))
+        self.max_deferrals = int(setting("max_deferrals", 30))
+        self.poll_interval = float(setting("poll_interval", 1.0))
+
+        self.lock = threading.Lock()
+        self.rollout: dict | None = None
+        self._queue: deque[str] = deque()
+        self._sip_server: Any = None
+        self._thread: threading.Thread | None = None
+        self._cancel = threading.Event()
+        self._resume = threading.Event()
+
+    @property
+    def active(self) -> bool:
+        """Whether a rollout is currently running or paused"""
+        return self.rollout is not None and self.rollout["status"] in (PENDING, RUNNING, PAUSED)
+
+    def schedule(self, extensions: list[str], sip_server: Any, reason: str = "manual") -> dict:
+        """
+        Schedule phones for a staggered reboot
+
+        Args:
+            extensions: Extension numbers whose phones should reboot
+            sip_server: SIPServer instance used to send NOTIFYs
+            reason: Why the reboot was requested (shown in progress)
+
+        Returns:
+            dict: Progress of the rollout the phones were added to
+        """
+        with self.lock:
+            if self.active:
+                phones = self.rollout["phones"]
+                added = [ext for ext in dict.fromkeys(extensions) if ext not in phones]
+                for ext in added:
+                    phones[ext] = self._new_phone()
+                    self._queue.append(ext)
+                self.rollout["total"] = len(phones)
+                self.logger.info(
+                    f"Added {len(added)} phones to reboot rollout {self.rollout['rollout_id']}"
+                )
+                return self._progress_locked()
+
+            unique = list(dict.fromkeys(extensions))
+            self.rollout = {
+                "rollout_id": f"rollout-{int(time.time() * 1000)}",
+                "reason": reason,
+                "status": PENDING,
+                "paused_reason": None,
+                "created_at": datetime.now(UTC).isoformat(),
+                "finished_at": None,
+                "wave_size": self.wave_size,
+                "total": len(unique),
+                "phones": {ext: self._new_phone() for ext in unique},
+                "waves": [],
+            }
+            self._queue = deque(unique)
+            self._sip_server = sip_server
+            self._cancel.clear()
+            self._resume.clear()
+            self._thread = threading.Thread(target=self._run, name="reboot-rollout", daemon=True)
+            self._thread.start()
+
+            self.logger.info(
+                f"Started reboot rollout {self.rollout['rollout_id']} for {len(unique)} phones "
+                f"({self.wave_size} per wave, reason: {reason})"
+            )
+            return self._progress_locked()
+
+    @staticmethod
+    def _new_phone() -> dict:
+        return {"status": QUEUED, "deferrals": 0, "sent_at": None, "reregistered_at": None}
+
+    def resume(self) -> bool:
+        """
+        Resume a paused rollout
+
+        Returns:
+            bool: True if a paused rollout was resumed
+        """
+        with self.lock:
+            if not self.rollout or self.rollout["status"] != PAUSED:
+                return False
+        self._resume.set()
+        return True
+
+    def cancel(self) -> bool:
+        """
+        Cancel the active rollout; phones already rebooting are unaffected
+
+        Returns:
+            bool: True if a rollout was cancelled
+        """
+        with self.lock:
+            if not self.active:
+                return False
+        self._cancel.set()
+        self._resume.set()
+        return True
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Wait for the rollout worker to finish
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            bool: True if no rollout is running anymore
+        """
+        thread = self._thread
+        if thread:
+            thread.join(timeout)
+        return not (thread and thread.is_alive())
+
+    def get_progress(self) -> dict | None:
+        """
+        Get progress of the current or most recent rollout
+
+        Returns:
+            dict with status, per-state counts, waves and problem phones, or
+            None if no rollout has run
+        """
+        with self.lock:
+            return self._progress_locked() if self.rollout else None
+
+    def _progress_locked(self) -> dict:
+        rollout = self.rollout
+        counts: dict[str, int] = {}
+        problems: dict[str, list[str]] = {TIMED_OUT: [], FAILED: [], SKIPPED_BUSY: []}
+        for ext, phone in rollout["phones"].items():
+            counts[phone["status"]] = counts.get(phone["status"], 0) + 1
+            if phone["status"] in problems:
+                problems[phone["status"]].append(ext)
+
+        done = sum(counts.get(s, 0) for s in (REREGISTERED, TIMED_OUT, FAILED, SKIPPED_BUSY))
+        return {
+            "rollout_id": rollout["rollout_id"],
+            "reason": rollout["reason"],
+            "status": rollout["status"],
+            "paused_reason": rollout["paused_reason"],
+            "created_at": rollout["created_at"],
+            "finished_at": rollout["finished_at"],
+            "wave_size": rollout["wave_size"],
+            "total": rollout["total"],
+            "completed": done,
+            "percent_complete": round(100 * done / rollout["total"], 1)
+            if rollout["total"]
+            else 100,
+            "counts": counts,
+            "waves": [dict(wave) for wave in rollout["waves"]],
+            "timed_out": problems[TIMED_OUT],
+            "failed": problems[FAILED],
+            "skipped_busy": problems[SKIPPED_BUSY],
+        }
+
+    def _set_status(self, status: str, paused_reason: str | None = None) -> None:
+        with self.lock:
+            self.rollout["status"] = status
+            self.rollout["paused_reason"] = paused_reason
+
+    def _finish_locked(self, status: str) -> None:
+        self.rollout["status"] = status
+        self.rollout["paused_reason"] = None
+        self.rollout["finished_at"] = datetime.now(UTC).isoformat()
+
+    def _is_busy(self, extension_number: str) -> bool:
+        call_manager = getattr(self._sip_server.pbx_core, "call_manager", None)
+        return bool(call_manager and call_manager.get_extension_calls(extension_number))
+
+    def _next_wave(self) -> list[str]:
+        """Take up to wave_size idle phones off the queue, deferring busy ones"""
+        wave = []
+        with self.lock:
+            phones = self.rollout["phones"]
+            # Each queued phone is looked at no more than once per wave
+            for _ in range(len(self._queue)):
+                if len(wave) >= self.wave_size:
+                    break
+                ext = self._queue.popleft()
+                phone = phones[ext]
+                if self._is_busy(ext):
+                    phone["deferrals"] += 1
+                    if phone["deferrals"] > self.max_deferrals:
+                        phone["status"] = SKIPPED_BUSY
+                        self.logger.warning(
+                            f"Reboot rollout: skipping extension {ext}, still on a call"
+                        )
+                    else:
+                        phone["status"] = DEFERRED
+                        self._queue.append(ext)
+                    continue
+                wave.append(ext)
+        return wave
+
+    def _send_wave(self, wave: list[str]) -> dict[str, datetime]:
+        """Send reboot NOTIFYs for a wave; returns send times of the phones reached"""
+        sent = {}
+        for ext in wave:
+            sent_at = datetime.now(UTC)
+            try:
+                ok = self.provisioning.reboot_phone(ext, self._sip_server)
+            except Exception as e:
+                self.logger.warning(f"Reboot rollout: could not reboot extension {ext}: {e}")
+                ok = False
+            with self.lock:
+                phone = self.rollout["phones"][ext]
+                if ok:
+                    phone["status"] = REBOOTING
+                    phone["sent_at"] = sent_at.isoformat()
+                    sent[ext] = sent_at
+                else:
+                    phone["status"] = FAILED
+        return sent
+
+    def _await_registrations(self, sent: dict[str, datetime]) -> list[str]:
+        """Wait until the rebooted phones REGISTER again or the timeout passes
+
+        Only a new registration binding counts: a rebooted phone registers
+        with a new Call-ID (or comes back after being unregistered), while
+        the periodic refresh REGISTERs of a phone that ignored the NOTIFY
+        keep the old binding.
+        """
+        registry = self._sip_server.pbx_core.extension_registry
+        waiting = dict(sent)
+        back = []
+        deadline = time.monotonic() + self.registration_timeout
+        while waiting:
+            for ext, sent_at in list(waiting.items()):
+                extension = registry.get(ext)
+                bound_at = getattr(extension, "binding_time", None)
+                if extension and extension.registered and bound_at and bound_at >= sent_at:
+                    del waiting[ext]
+                    back.append(ext)
+                    with self.lock:
+                        phone = self.rollout["phones"][ext]
+                        phone["status"] = REREGISTERED
+                        phone["reregistered_at"] = bound_at.isoformat()
+            if not waiting or time.monotonic() >= deadline:
+                break
+            if self._cancel.wait(self.poll_interval):
+                break
+
+        with self.lock:
+            for ext in waiting:
+                self.rollout["phones"][ext]["status"] = TIMED_OUT
+        return back
+
+    def _run(self) -> None:
+        """Rollout worker: send waves until the queue drains or it is cancelled"""
+        self._set_status(RUNNING)
+        wave_number = 0
+        try:
+            while not self._cancel.is_set():
+                with self.lock:
+                    if not self._queue:
+                        # Completed under the lock so schedule() can't add
+                        # phones to a rollout that is about to finish
+                        self._finish_locked(COMPLETED)
+                        break
+                wave = self._next_wave()
+                if wave:
+                    wave_number += 1
+                    started = time.monotonic()
+                    sent = self._send_wave(wave)
+                    back = self._await_registrations(sent) if sent else []
+                    with self.lock:
+                        self.rollout["waves"].append(
+                            {
+                                "wave": wave_number,
+                                "size": len(wave),
+                                "sent": len(sent),
+                                "reregistered": len(back),
+                                "duration": round(time.monotonic() - started, 2),
+                            }
+                        )
+                    self.logger.info(
+                        f"Reboot rollout wave {wave_number}: {len(sent)}/{len(wave)} sent, "
+                        f"{len(back)} re-registered"
+                    )
+
+                    if sent and len(back) / len(sent) < self.min_reregistered:
+                        if not self._pause(
+                            f"Only {len(back)} of {len(sent)} phones in wave {wave_number} "
+                            f"re-registered within {self.registration_timeout:g}s"
+                        ):
+                            break
+                        continue
+
+                with self.lock:
+                    more = bool(self._queue)
+                if more:
+                    # Also paces retries when every remaining phone is busy
+                    self._cancel.wait(self.wave_interval)
+        except Exception as e:
+            self.logger.error(f"Reboot rollout failed: {e}")
+
+        with self.lock:
+            if self.active:
+                self._finish_locked(CANCELLED if self._cancel.is_set() else COMPLETED)
+        progress = self.get_progress()
+        self.logger.info(
+            f"Reboot rollout {progress['rollout_id']} {progress['status']}: "
+            f"{progress['counts'].get(REREGISTERED, 0)}/{progress['total']} phones re-registered"
+        )
+
+    def _pause(self, reason: str) -> bool:
+        """Hold the rollout until resumed; returns False if it was cancelled"""
+        self.logger.warning(f"Reboot rollout paused: {reason}")
+        self._set_status(PAUSED, reason)
+        self._resume.wait()
+        self._resume.clear()
+        if self._cancel.is_set():
+            return False
+        self.logger.info("Reboot rollout resumed")
+        self._set_status(RUNNING)
+        return True
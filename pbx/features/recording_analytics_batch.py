@@ -0,0 +1,344 @@
+"""
+Batch Call Recording Analytics
+Process-pool analysis of recording backlogs with a persisted, resumable job queue
+"""
+
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from pbx.utils.logger import get_logger
+
+# Per-process analytics instance, created once by the pool initializer so the
+# Vosk/spaCy models are loaded once per worker rather than once per recording
+_worker_analytics = None
+
+
+def _init_worker(config: dict | None) -> None:
+    """Process pool initializer: build one RecordingAnalytics per worker"""
+    global _worker_analytics
+    from pbx.features.call_recording_analytics import RecordingAnalytics
+
+    _worker_analytics = RecordingAnalytics(config)
+
+
+def _analyze_job(job: dict) -> dict:
+    """Analyze one recording inside a worker process"""
+    started = time.monotonic()
+    result = _worker_analytics.analyze_recording(
+        job["recording_id"], job["audio_path"], job.get("analysis_types")
+    )
+    return {"result": result, "elapsed": time.monotonic() - started}
+
+
+class RecordingAnalyticsBatch:
+    """
+    Overnight batch analysis of call recordings
+
+    Jobs are journaled to an append-only JSONL file (one event per line), so
+    a batch interrupted by a restart resumes with only the unfinished
+    recordings. Each worker process decodes and transcribes a recording once
+    and runs every requested analyzer on the result.
+    """
+
+    def __init__(
+        self,
+        config: Any | None = None,
+        journal_path: str = "recordings/analytics_jobs.jsonl",
+        analytics: Any | None = None,
+    ) -> None:
+        """
+        Initialize batch analytics
+
+        Args:
+            config: Configuration passed to each worker's RecordingAnalytics
+            journal_path: Path of the persisted job journal
+            analytics: Optional RecordingAnalytics that receives completed results
+        """
+        self.logger = get_logger()
+        self.config = getattr(config, "config", config)
+        self.journal_path = Path(journal_path)
+        self.analytics = analytics
+
+        batch_config = (self.config or {}).get("features", {}).get("recording_analytics", {})
+        self.max_workers = batch_config.get("batch_workers", os.cpu_count() or 1)
+        self.max_attempts = batch_config.get("batch_max_attempts", 3)
+
+        self.jobs: dict[str, dict] = {}
+        self.lock = threading.Lock()
+        self.last_run: dict = {}
+
+        self._load_journal()
+
+    def _load_journal(self) -> None:
+        """Replay the job journal to rebuild queue state"""
+        if not self.journal_path.exists():
+            return
+
+        replayed = 0
+        with self.journal_path.open() as f:
+            for raw_line in f:
+                line = raw_line.strip()
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write is skipped
+                    self.logger.warning("Skipping corrupt analytics job journal entry")
+                    continue
+                self._apply_event(event)
+                replayed += 1
+
+        # Anything that was running when the process died goes back to pending
+        for job in self.jobs.values():
+            if job["status"] == "running":
+                job["status"] = "pending"
+
+        pending = sum(1 for job in self.jobs.values() if job["status"] == "pending")
+        self.logger.info(
+            f"Recording analytics batch journal replayed: {replayed} events, {pending} pending"
+        )
+
+    def _apply_event(self, event: dict) -> None:
+        """Apply one journal event to in-memory job state"""
+        job_id = event.get("job_id")
+        kind = event.get("event")
+        if kind == "queued":
+            self.jobs[job_id] = {
+                "job_id": job_id,
+                "recording_id": event["recording_id"],
+                "audio_path": event["audio_path"],
+                "analysis_types": event.get("analysis_types"),
+                "status": "pending",
+                "attempts": 0,
+                "error": None,
+                "result": None,
+            }
+            return
+
+        job = self.jobs.get(job_id)
+        if not job:
+            return
+        if kind == "started":
+            job["status"] = "running"
+            job["attempts"] += 1
+        elif kind == "done":
+            job["status"] = "done"
+            job["result"] = event.get("result")
+        elif kind == "failed":
+            job["error"] = event.get("error")
+            final = event.get("final") or job["attempts"] >= self.max_attempts
+            job["status"] = "failed" if final else "pending"
+
+    def _record(self, event: dict) -> None:
+        """Append an event to the journal and apply it"""
+        event["at"] = datetime.now(UTC).isoformat()
+        with self.lock:
+            self._apply_event(event)
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.journal_path.open("a") as f:
+                f.write(json.dumps(event) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def enqueue(
+        self, recording_id: str, audio_path: str, analysis_types: list[str] | None = None
+    ) -> bool:
+        """
+        Add a recording to the persisted queue
+
+        Args:
+            recording_id: Recording identifier (also the job ID)
+            audio_path: Path to audio file
+            analysis_types: Types of analysis to perform
+
+        Returns:
+            bool: True if queued, False if the recording is already queued or done
+        """
+        existing = self.jobs.get(recording_id)
+        if existing and existing["status"] != "failed":
+            return False
+
+        self._record(
+            {
+                "event": "queued",
+                "job_id": recording_id,
+                "recording_id": recording_id,
+                "audio_path": str(audio_path),
+                "analysis_types": analysis_types,
+            }
+        )
+        return True
+
+    def enqueue_directory(
+        self, directory: str, pattern: str = "*.wav", analysis_types: list[str] | None = None
+    ) -> int:
+        """
+        Queue every recording in a directory that is not already queued
+
+        Args:
+            directory: Directory containing recordings
+            pattern: Glob pattern for recording files
+            analysis_types: Types of analysis to perform
+
+        Returns:
+            int: Number of recordings queued
+        """
+        return sum(
+            1
+            for path in sorted(Path(directory).glob(pattern))
+            if self.enqueue(path.stem, str(path), analysis_types)
+        )
+
+    def get_pending(self) -> list[dict]:
+        """Get jobs that still need to run"""
+        return [job for job in self.jobs.values() if job["status"] == "pending"]
+
+    def run(self, max_workers: int | None = None, limit: int | None = None) -> dict:
+        """
+        Run all pending jobs on a process pool
+
+        Args:
+            max_workers: Worker process count (defaults to the configured value)
+            limit: Optional maximum number of jobs to run in this invocation
+
+        Returns:
+            dict: Run summary including recordings/hour throughput
+        """
+        pending = self.get_pending()
+        if limit is not None:
+            pending = pending[:limit]
+
+        workers = max(1, max_workers or self.max_workers)
+        completed = 0
+        failed = 0
+        started = time.monotonic()
+
+        if pending:
+            self.logger.info(
+                f"Starting recording analytics batch: {len(pending)} recordings, {workers} workers"
+            )
+            # spawn: forking the multi-threaded PBX process is not safe
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.config,),
+            ) as pool:
+                # Keep a bounded number of jobs in flight so huge backlogs don't
+                # pile up as pickled futures in memory
+                queue = iter(pending)
+                in_flight: dict[Future, dict] = {}
+
+                def submit_next() -> None:
+                    job = next(queue, None)
+                    if job is None:
+                        return
+                    self._record({"event": "started", "job_id": job["job_id"]})
+                    in_flight[pool.submit(_analyze_job, job)] = job
+
+                for _ in range(workers * 2):
+                    submit_next()
+
+                while in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job = in_flight.pop(future)
+                        try:
+                            result = future.result()["result"]
+                            # Analyzed but undecodable: a retry won't decode it either
+                            final = True
+                        except Exception as e:
+                            result = {"error": str(e) or type(e).__name__}
+                            final = False
+                        if "error" in result:
+                            failed += 1
+                            self.logger.error(
+                                f"Analytics job {job['job_id']} failed: {result['error']}"
+                            )
+                            self._record(
+                                {
+                                    "event": "failed",
+                                    "job_id": job["job_id"],
+                                    "error": result["error"],
+                                    "final": final,
+                                }
+                            )
+                        else:
+                            completed += 1
+                            self._record(
+                                {"event": "done", "job_id": job["job_id"], "result": result}
+                            )
+                            if self.analytics is not None:
+                                self.analytics.analyses[job["recording_id"]] = result
+                                self.analytics.total_analyses += 1
+                        submit_next()
+
+        elapsed = time.monotonic() - started
+        self.last_run = {
+            "completed": completed,
+            "failed": failed,
+            "remaining": len(self.get_pending()),
+            "workers": workers,
+            "elapsed_seconds": round(elapsed, 2),
+            "recordings_per_hour": round(completed / elapsed * 3600, 1) if elapsed > 0 else 0.0,
+        }
+        if pending:
+            self.logger.info(
+                f"Recording analytics batch finished: {completed} done, {failed} failed, "
+                f"{self.last_run['recordings_per_hour']} recordings/hour"
+            )
+        return self.last_run
+
+    def compact(self) -> None:
+        """Rewrite the journal with one event per job's current state"""
+        with self.lock:
+            tmp_path = self.journal_path.with_suffix(".tmp")
+            with tmp_path.open("w") as f:
+                for job in self.jobs.values():
+                    queued = {
+                        "event": "queued",
+                        "job_id": job["job_id"],
+                        "recording_id": job["recording_id"],
+                        "audio_path": job["audio_path"],
+                        "analysis_types": job["analysis_types"],
+                    }
+                    f.write(json.dumps(queued) + "\n")
+                    if job["status"] == "done":
+                        f.write(
+                            json.dumps(
+                                {"event": "done", "job_id": job["job_id"], "result": job["result"]}
+                            )
+                            + "\n"
+                        )
+                    elif job["status"] == "failed":
+                        for _ in range(job["attempts"]):
+                            f.write(
+                                json.dumps({"event": "started", "job_id": job["job_id"]}) + "\n"
+                            )
+                        f.write(
+                            json.dumps(
+                                {
+                                    "event": "failed",
+                                    "job_id": job["job_id"],
+                                    "error": job["error"],
+                                    "final": True,
+                                }
+                            )
+                            + "\n"
+                        )
+            tmp_path.replace(self.journal_path)
+
+    def get_statistics(self) -> dict:
+        """Get batch queue statistics"""
+        counts: dict[str, int] = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+        for job in self.jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"jobs": counts, "last_run": self.last_run}
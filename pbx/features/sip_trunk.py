@@ -10,6 +10,7 @@
 from enum import Enum
 from typing import Any
 
+from pbx.utils.dns_resolver import DNSResolver, get_dns_resolver
 from pbx.utils.e911_protection import E911Protection
 from pbx.utils.logger import get_logger
 
@@ -78,6 +79,8 @@ def __init__(
         self.channels_in_use = 0
         self.health_check_interval = health_check_interval
         self.logger = get_logger()
+        # Set by SIPTrunkSystem.add_trunk; None means resolve at send time
+        self.resolver: DNSResolver | None = None
 
         # Health monitoring
         self.health_status = TrunkHealthStatus.DOWN
@@ -132,8 +135,29 @@ def can_make_call(self) -> bool:
             self.status == TrunkStatus.REGISTERED
             and self.health_status in [TrunkHealthStatus.HEALTHY, TrunkHealthStatus.WARNING]
             and self.channels_in_use < self.channels_available
+            and not self.dns_unresolvable()
         )
 
+    def resolve_address(self, wait: float = 0.0) -> str | None:
+        """
+        Get an address for the trunk host from the DNS cache
+
+        Args:
+            wait: Seconds to wait if the host hasn't been resolved yet
+
+        Returns:
+            str | None: IP address, the host itself if no resolver is attached,
+                or None if it isn't resolved (yet)
+        """
+        if self.resolver is None:
+            return self.host
+        addresses = self.resolver.resolve_host(self.host, wait=wait)
+        return addresses[0] if addresses else None
+
+    def dns_unresolvable(self) -> bool:
+        """Whether the trunk host is known not to resolve (cached answers only)"""
+        return self.resolver is not None and self.resolver.is_unresolvable(self.host)
+
     def allocate_channel(self) -> bool:
         """Allocate channel for outbound call"""
         if self.can_make_call():
@@ -227,11 +251,15 @@ def check_health(self) -> TrunkHealthStatus:
             if time_since_success > 3600:  # 1 hour
                 self.health_status = TrunkHealthStatus.CRITICAL
 
+        # Check DNS resolution (cached; refreshed in the background)
+        if self.dns_unresolvable():
+            self.logger.warning(f"Trunk {self.name}: host {self.host} does not resolve")
+            self.health_status = TrunkHealthStatus.DOWN
+
         # In a real implementation, would:
         # 1. Send OPTIONS ping to trunk
         # 2. Measure response time
         # 3. Check registration status
-        # 4. Verify DNS resolution
 
         self.logger.debug(f"Health check for {self.name}: {self.health_status.value}")
         return self.health_status
@@ -357,6 +385,9 @@ def __init__(self, config: Any | None = None) -> None:
         self.outbound_rules = []
         self.logger = get_logger()
         self.e911_protection = E911Protection(config)
+        # Trunk hosts are kept resolved in the background so call setup
+        # never waits on DNS
+        self.resolver = get_dns_resolver(config) if config is not None else None
 
         # Health monitoring
         self.health_check_enabled = True
@@ -426,6 +457,9 @@ def add_trunk(self, trunk: Any) -> None:
             trunk: SIPTrunk object
         """
         self.trunks[trunk.trunk_id] = trunk
+        if self.resolver is not None and isinstance(trunk, SIPTrunk):
+            trunk.resolver = self.resolver
+            self.resolver.watch_host(trunk.host)
         self.logger.info(f"Added SIP trunk: {trunk.name}")
 
     def remove_trunk(self, trunk_id: str) -> None:
@@ -434,6 +468,10 @@ def remove_trunk(self, trunk_id: str) -> None:
             trunk = self.trunks[trunk_id]
             trunk.unregister()
             del self.trunks[trunk_id]
+            if self.resolver is not None and all(
+                other.host != trunk.host for other in self.trunks.values()
+            ):
+                self.resolver.unwatch(trunk.host)
             self.logger.info(f"Removed SIP trunk: {trunk_id}")
 
     def get_trunk(self, trunk_id: str) -> Any | None:
@@ -510,7 +548,11 @@ def make_outbound_call(self, from_extension: str, to_number: str) -> bool:
             return False
 
         if trunk.allocate_channel():
-            self.logger.info(f"Making outbound call from {from_extension} to {transformed_number}")
+            address = trunk.resolve_address() or trunk.host
+            self.logger.info(
+                f"Making outbound call from {from_extension} to {transformed_number} "
+                f"via {trunk.name} ({address})"
+            )
 
             # In a real implementation:
             # 1. Build SIP INVITE to trunk
@@ -578,6 +620,7 @@ def _get_available_trunks_by_priority(self) -> list[SIPTrunk]:
             for trunk in self.trunks.values()
             if trunk.status == TrunkStatus.REGISTERED
             and trunk.health_status in [TrunkHealthStatus.HEALTHY, TrunkHealthStatus.WARNING]
+            and not trunk.dns_unresolvable()
         ]
 
         # Sort by priority (lower is better)
@@ -3,11 +3,82 @@
 Provides live transcription, sentiment analysis, and call summarization
 """
 
+import threading
+from collections.abc import Callable
 from datetime import UTC, datetime
 from typing import Any
 
+from pbx.utils.keyword_matcher import KeywordMatcher, get_keyword_matcher
 from pbx.utils.logger import get_logger
 
+# Rule-based sentiment lexicons, matched from the start of a word so
+# inflections count too ("thank" also matches "thankful")
+POSITIVE_WORDS = (
+    "great",
+    "excellent",
+    "good",
+    "happy",
+    "satisfied",
+    "wonderful",
+    "fantastic",
+    "amazing",
+    "perfect",
+    "love",
+    "best",
+    "helpful",
+    "thank",
+    "thanks",
+    "appreciate",
+    "pleased",
+    "glad",
+    "delighted",
+)
+
+NEGATIVE_WORDS = (
+    "bad",
+    "terrible",
+    "awful",
+    "horrible",
+    "poor",
+    "worst",
+    "hate",
+    "angry",
+    "frustrated",
+    "disappointed",
+    "upset",
+    "annoyed",
+    "useless",
+    "broken",
+    "problem",
+    "issue",
+    "complaint",
+    "refund",
+    "cancel",
+    "wrong",
+    "error",
+    "failed",
+    "unhappy",
+    "dissatisfied",
+)
+
+# Words that make a sentence worth keeping in an extractive summary
+SUMMARY_KEYWORDS = (
+    "problem",
+    "issue",
+    "help",
+    "need",
+    "want",
+    "order",
+    "account",
+    "payment",
+    "service",
+    "question",
+    "urgent",
+    "important",
+)
+
+DEFAULT_KEYWORDS = ("urgent", "complaint", "cancel", "refund", "problem")
+
 
 class SpeechAnalyticsEngine:
     """
@@ -28,6 +99,25 @@ def __init__(self, db_backend: Any | None, config: dict) -> None:
         self.config = config
         self.enabled = config.get("speech_analytics.enabled", False)
 
+        # Recognition: one shared model, one recognizer per active call
+        self.model_path = config.get(
+            "speech_analytics.vosk_model_path",
+            "/var/pbx/vosk-models/vosk-model-small-en-us-0.15",
+        )
+        self.model_sample_rate = config.get("speech_analytics.model_sample_rate", 16000)
+        self.max_streams = config.get("speech_analytics.max_concurrent_calls", 50)
+        self.recognition_workers = config.get("speech_analytics.recognition_workers", 4)
+        self.max_queued_frames = config.get("speech_analytics.max_queued_frames", 50)
+        self._recognizer_pool = None
+        self._recognizer_locks: dict[str, threading.Lock] = {}
+        self._streaming = None
+        self._init_lock = threading.Lock()
+        # Calls tapped from the RTP relay; each leg is its own stream
+        self._live_calls: set[str] = set()
+
+        # Compiled keyword matchers per extension: extension -> (keywords, matcher)
+        self._keyword_matchers: dict[str, tuple[str, KeywordMatcher]] = {}
+
         self.logger.info("Speech Analytics Framework initialized")
 
     def get_config(self, extension: str) -> dict | None:
@@ -114,6 +204,7 @@ def update_config(self, extension: str, config: dict) -> bool:
                     ),
                 )
 
+            self._keyword_matchers.pop(extension, None)
             self.logger.info(f"Updated speech analytics config for {extension}")
             return True
 
@@ -136,6 +227,7 @@ def delete_config(self, extension: str) -> bool:
                 "DELETE FROM speech_analytics_configs WHERE extension = %s",
                 (extension,),
             )
+            self._keyword_matchers.pop(extension, None)
             self.logger.info(f"Deleted speech analytics config for {extension}")
             return True
 
@@ -143,14 +235,17 @@ def delete_config(self, extension: str) -> bool:
             self.logger.error(f"Failed to delete speech analytics config: {e}")
             return False
 
-    def analyze_audio_stream(self, call_id: str, audio_chunk: bytes) -> dict:
+    def analyze_audio_stream(
+        self, call_id: str, audio_chunk: bytes, sample_rate: int = 16000
+    ) -> dict:
         """
         Analyze audio stream in real-time
         Uses Vosk for offline speech recognition
 
         Args:
             call_id: Call identifier
-            audio_chunk: Audio data chunk (16kHz, 16-bit PCM)
+            audio_chunk: Audio data chunk (16-bit PCM)
+            sample_rate: Sample rate of audio_chunk; resampled to the model rate
 
         Returns:
             Analysis results dictionary
@@ -161,6 +256,7 @@ def analyze_audio_stream(self, call_id: str, audio_chunk: bytes) -> dict:
             "sentiment": "neutral",
             "sentiment_score": 0.0,
             "keywords_detected": [],
+            "keyword_matches": [],
             "timestamp": datetime.now(UTC).isoformat(),
         }
 
@@ -168,7 +264,7 @@ def analyze_audio_stream(self, call_id: str, audio_chunk: bytes) -> dict:
         # Would need to map call_id to extension in real implementation
         try:
             # Transcribe audio using Vosk (offline)
-            transcription = self._transcribe_audio_vosk(audio_chunk)
+            transcription = self._transcribe_audio_vosk(audio_chunk, call_id, sample_rate)
             result["transcription"] = transcription
 
             if transcription:
@@ -177,76 +273,253 @@ def analyze_audio_stream(self, call_id: str, audio_chunk: bytes) -> dict:
                 result["sentiment"] = sentiment_result["sentiment"]
                 result["sentiment_score"] = sentiment_result["score"]
 
-                # Build keyword list from stored call-extension mapping or defaults
-                default_keywords = ["urgent", "complaint", "cancel", "refund", "problem"]
-                keywords = list(default_keywords)
+                matcher = get_keyword_matcher(DEFAULT_KEYWORDS)
                 try:
-                    # Try to get custom keywords from the extension config
+                    # Use the custom keywords from the extension config if mapped
                     # call_id format may contain extension info (e.g., "ext-100-...")
                     extension = getattr(self, "_call_extensions", {}).get(call_id)
                     if extension:
-                        ext_config = self.get_config(extension)
-                        if ext_config and ext_config.get("keywords"):
-                            custom_kw = ext_config["keywords"]
-                            if isinstance(custom_kw, str) and custom_kw.strip():
-                                keywords = [k.strip() for k in custom_kw.split(",") if k.strip()]
+                        matcher = self._get_extension_matcher(extension) or matcher
                 except (KeyError, TypeError, ValueError):
                     pass  # Use default keywords
-                result["keywords_detected"] = self.detect_keywords(transcription, keywords)
+                matches = matcher.find_all(transcription)
+                result["keywords_detected"] = matcher.find_unique(transcription)
+                result["keyword_matches"] = [match._asdict() for match in matches]
 
         except (KeyError, TypeError, ValueError) as e:
             self.logger.error(f"Error analyzing audio stream: {e}")
 
         return result
 
-    def _transcribe_audio_vosk(self, audio_chunk: bytes) -> str:
+    def _get_recognizer_pool(self) -> Any | None:
+        """Get the recognizer pool, loading the shared model on first use"""
+        if self._recognizer_pool is None:
+            with self._init_lock:
+                if self._recognizer_pool is None:
+                    from pbx.features.speech_recognizer_pool import (
+                        RecognizerPool,
+                        load_shared_model,
+                    )
+
+                    model = load_shared_model(self.model_path)
+                    if model is None:
+                        return None
+                    self._recognizer_pool = RecognizerPool(
+                        model, self.model_sample_rate, self.max_streams
+                    )
+        return self._recognizer_pool
+
+    def _transcribe_audio_vosk(
+        self, audio_chunk: bytes, call_id: str = "default", sample_rate: int = 16000
+    ) -> str:
         """
         Transcribe audio using Vosk offline speech recognition
 
+        Each call uses its own recognizer from the pool, so concurrent calls
+        neither interleave audio nor serialize on a shared recognizer.
+
         Args:
-            audio_chunk: Audio data (16kHz, 16-bit PCM)
+            audio_chunk: Audio data (16-bit PCM)
+            call_id: Call identifier that owns the recognizer
+            sample_rate: Sample rate of audio_chunk
 
         Returns:
             Transcribed text
         """
         try:
-            # Import vosk only when needed
             import json
 
-            import vosk
+            pool = self._get_recognizer_pool()
+            if pool is None:
+                return ""
 
-            # Check if we have a Vosk model initialized
-            if not hasattr(self, "_vosk_model"):
-                # Initialize Vosk model (requires model to be downloaded)
-                # Default path: /var/pbx/vosk-models/
-                model_path = self.config.get(
-                    "speech_analytics.vosk_model_path",
-                    "/var/pbx/vosk-models/vosk-model-small-en-us-0.15",
-                )
+            recognizer = pool.acquire(call_id)
+            if recognizer is None:
+                self.logger.warning(f"Speech recognizer pool exhausted, skipping {call_id}")
+                return ""
 
-                try:
-                    self._vosk_model = vosk.Model(model_path)
-                    self._vosk_recognizer = vosk.KaldiRecognizer(self._vosk_model, 16000)
-                    self.logger.info(f"Vosk model loaded from {model_path}")
-                except Exception as e:
-                    self.logger.warning(f"Vosk model not available: {e}")
-                    return ""
-
-            # Process audio chunk
-            if self._vosk_recognizer.AcceptWaveform(audio_chunk):
-                result = json.loads(self._vosk_recognizer.Result())
-                return result.get("text", "")
-            # Partial result
-            result = json.loads(self._vosk_recognizer.PartialResult())
-            return result.get("partial", "")
+            if sample_rate != self.model_sample_rate:
+                from pbx.features.speech_recognizer_pool import resample_pcm16
+
+                audio_chunk = resample_pcm16(audio_chunk, sample_rate, self.model_sample_rate)
+
+            lock = self._recognizer_locks.setdefault(call_id, threading.Lock())
+            with lock:
+                if recognizer.AcceptWaveform(audio_chunk):
+                    result = json.loads(recognizer.Result())
+                    return result.get("text", "")
+                # Partial result
+                result = json.loads(recognizer.PartialResult())
+                return result.get("partial", "")
 
-        except ImportError:
-            self.logger.warning("Vosk library not available, transcription disabled")
-            return ""
         except (KeyError, TypeError, ValueError, json.JSONDecodeError) as e:
             self.logger.error(f"Error in Vosk transcription: {e}")
             return ""
 
+    def end_call(self, call_id: str) -> str:
+        """
+        Finish transcription for a call and return its recognizer to the pool
+
+        Args:
+            call_id: Call identifier
+
+        Returns:
+            Final transcript (streaming mode) or remaining recognized text
+        """
+        if call_id in self._live_calls:
+            self._live_calls.discard(call_id)
+            transcripts = [
+                self._streaming.end_stream(self._leg_stream(call_id, leg)) for leg in ("a", "b")
+            ]
+            return "\n".join(text for text in transcripts if text)
+
+        if self._streaming is not None and call_id in self._streaming.streams:
+            return self._streaming.end_stream(call_id)
+
+        self._recognizer_locks.pop(call_id, None)
+        pool = self._recognizer_pool
+        if pool is None:
+            return ""
+        recognizer = pool.get(call_id)
+        text = ""
+        if recognizer is not None:
+            import json
+
+            try:
+                text = json.loads(recognizer.FinalResult()).get("text", "")
+            except (KeyError, TypeError, ValueError) as e:
+                self.logger.error(f"Error flushing Vosk recognizer: {e}")
+        pool.release(call_id)
+        return text
+
+    def has_call(self, call_id: str) -> bool:
+        """Whether a call holds a recognizer or a live stream that end_call() releases"""
+        if call_id in self._live_calls:
+            return True
+        if self._streaming is not None and call_id in self._streaming.streams:
+            return True
+        if call_id in self._recognizer_locks:
+            return True
+        pool = self._recognizer_pool
+        return pool is not None and pool.get(call_id) is not None
+
+    def get_streaming_service(self) -> Any | None:
+        """
+        Get the asynchronous recognition service for live calls
+
+        Frames submitted through it are queued per call (bounded, so a slow
+        box sheds audio instead of growing memory) and recognized on a fixed
+        worker pool.
+
+        Returns:
+            StreamingRecognitionService or None if Vosk is unavailable
+        """
+        if self._streaming is None:
+            with self._init_lock:
+                if self._streaming is None:
+                    from pbx.features.speech_recognizer_pool import (
+                        StreamingRecognitionService,
+                        load_shared_model,
+                    )
+
+                    model = load_shared_model(self.model_path)
+                    if model is None:
+                        return None
+                    self._streaming = StreamingRecognitionService(
+                        model,
+                        model_sample_rate=self.model_sample_rate,
+                        max_streams=self.max_streams,
+                        workers=self.recognition_workers,
+                        max_queued_frames=self.max_queued_frames,
+                        on_result=self._on_stream_result,
+                    )
+        return self._streaming
+
+    def submit_audio(self, call_id: str, audio_chunk: bytes, sample_rate: int = 8000) -> bool:
+        """
+        Queue live call audio for asynchronous recognition
+
+        Args:
+            call_id: Call identifier
+            audio_chunk: Audio data (16-bit PCM)
+            sample_rate: Sample rate of audio_chunk (8 kHz call audio is resampled)
+
+        Returns:
+            bool: True if queued, False if dropped
+        """
+        service = self.get_streaming_service()
+        if service is None:
+            return False
+        return service.submit(call_id, audio_chunk, sample_rate)
+
+    @staticmethod
+    def _leg_stream(call_id: str, leg: str) -> str:
+        return f"{call_id}:{leg}"
+
+    def wants_transcription(self, *extensions: str | None) -> bool:
+        """
+        Whether any of the extensions on a call has live transcription enabled
+
+        Args:
+            extensions: Extension numbers on the call (None entries are skipped)
+
+        Returns:
+            bool: True if the call should be transcribed
+        """
+        if not self.enabled or self.db is None:
+            return False
+        for extension in extensions:
+            config = self.get_config(extension) if extension else None
+            if config and config["enabled"] and config["transcription_enabled"]:
+                return True
+        return False
+
+    def tap_call(self, call_id: str) -> Callable[[str, bytes], None] | None:
+        """
+        Build an RTP relay audio tap that transcribes a live call
+
+        The caller and callee legs are recognized as separate streams so the
+        two voices never interleave in one recognizer. end_call() finishes
+        both and returns their transcripts.
+
+        Args:
+            call_id: Call identifier
+
+        Returns:
+            Tap for RTPRelay.add_audio_tap(), or None if Vosk is unavailable
+        """
+        if self.get_streaming_service() is None:
+            return None
+
+        from pbx.features.conference_mixer import (
+            PAYLOAD_TYPE_CODECS,
+            SAMPLE_RATE,
+            decode_frame,
+            split_rtp_packet,
+        )
+
+        self._live_calls.add(call_id)
+
+        def tap(leg: str, packet: bytes) -> None:
+            # A packet still in flight after end_call() must not open a new stream
+            if call_id not in self._live_calls:
+                return
+            split = split_rtp_packet(packet)
+            if split is None or split[0] not in PAYLOAD_TYPE_CODECS or not split[1]:
+                return
+            pcm = decode_frame(split[1], PAYLOAD_TYPE_CODECS[split[0]]).tobytes()
+            self.submit_audio(self._leg_stream(call_id, leg), pcm, SAMPLE_RATE)
+
+        return tap
+
+    def _on_stream_result(self, call_id: str, text: str, is_final: bool) -> None:
+        """Run keyword detection on finalized streaming results"""
+        if not is_final:
+            return
+        detected = self.detect_keywords(text, ["urgent", "complaint", "cancel", "refund"])
+        if detected:
+            self.logger.info(f"Keywords detected on call {call_id}: {', '.join(detected)}")
+
     def analyze_sentiment(self, text: str) -> dict:
         """
         Analyze sentiment of text using rule-based approach
@@ -261,60 +534,10 @@ def analyze_sentiment(self, text: str) -> dict:
         if not text:
             return {"sentiment": "neutral", "score": 0.0, "confidence": 0.0}
 
-        text_lower = text.lower()
-
-        # Positive and negative word lists
-        positive_words = [
-            "great",
-            "excellent",
-            "good",
-            "happy",
-            "satisfied",
-            "wonderful",
-            "fantastic",
-            "amazing",
-            "perfect",
-            "love",
-            "best",
-            "helpful",
-            "thank",
-            "thanks",
-            "appreciate",
-            "pleased",
-            "glad",
-            "delighted",
-        ]
-
-        negative_words = [
-            "bad",
-            "terrible",
-            "awful",
-            "horrible",
-            "poor",
-            "worst",
-            "hate",
-            "angry",
-            "frustrated",
-            "disappointed",
-            "upset",
-            "annoyed",
-            "useless",
-            "broken",
-            "problem",
-            "issue",
-            "complaint",
-            "refund",
-            "cancel",
-            "wrong",
-            "error",
-            "failed",
-            "unhappy",
-            "dissatisfied",
-        ]
-
-        # Count positive and negative words
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        # One pass over the text finds words from both lexicons
+        found = set(get_keyword_matcher(POSITIVE_WORDS + NEGATIVE_WORDS).find_unique(text))
+        positive_count = sum(1 for word in POSITIVE_WORDS if word in found)
+        negative_count = sum(1 for word in NEGATIVE_WORDS if word in found)
 
         # Calculate sentiment score (-1.0 to 1.0)
         total_words = len(text.split())
@@ -376,25 +599,11 @@ def generate_summary(self, call_id: str, transcript: str) -> str:
 
             # Simple extractive summarization
             # Score sentences by: length, keyword presence, position
-            keywords = [
-                "problem",
-                "issue",
-                "help",
-                "need",
-                "want",
-                "order",
-                "account",
-                "payment",
-                "service",
-                "question",
-                "urgent",
-                "important",
-            ]
+            matcher = get_keyword_matcher(SUMMARY_KEYWORDS)
 
             scored_sentences = []
             for i, sentence in enumerate(sentences):
                 score = 0
-                sentence_lower = sentence.lower()
 
                 # Length score (prefer moderate length)
                 word_count = len(sentence.split())
@@ -404,7 +613,7 @@ def generate_summary(self, call_id: str, transcript: str) -> str:
                     score += 1
 
                 # Keyword score
-                keyword_count = sum(1 for kw in keywords if kw in sentence_lower)
+                keyword_count = len(matcher.find_unique(sentence))
                 score += keyword_count * 2
 
                 # Position score (beginning and end are more important)
@@ -470,9 +679,43 @@ def detect_keywords(self, text: str, keywords: list[str]) -> list[str]:
         Returns:
             list of detected keywords
         """
-        detected = [keyword for keyword in keywords if keyword.lower() in text.lower()]
+        return get_keyword_matcher(keywords).find_unique(text)
+
+    def highlight_keywords(self, text: str, keywords: list[str]) -> list[dict]:
+        """
+        Locate keyword occurrences in text for highlighting
+
+        Args:
+            text: Text to search
+            keywords: Keywords to locate
+
+        Returns:
+            list of {"keyword", "start", "end"} dicts ordered by position
+        """
+        return [match._asdict() for match in get_keyword_matcher(keywords).find_all(text)]
+
+    def _get_extension_matcher(self, extension: str) -> KeywordMatcher | None:
+        """
+        Get the compiled keyword matcher for an extension's configured keywords
 
-        return detected
+        Args:
+            extension: Extension number
+
+        Returns:
+            KeywordMatcher or None if the extension has no custom keywords
+        """
+        ext_config = self.get_config(extension)
+        custom_kw = ext_config.get("keywords") if ext_config else None
+        if not isinstance(custom_kw, str) or not custom_kw.strip():
+            return None
+
+        cached = self._keyword_matchers.get(extension)
+        if cached and cached[0] == custom_kw:
+            return cached[1]
+
+        matcher = KeywordMatcher(k.strip() for k in custom_kw.split(",") if k.strip())
+        self._keyword_matchers[extension] = (custom_kw, matcher)
+        return matcher
 
     def get_all_configs(self) -> list[dict]:
         """
@@ -482,7 +725,9 @@ def get_all_configs(self) -> list[dict]:
             list of configuration dictionaries
         """
         try:
-            result = self.db.execute("SELECT id, extension, enabled, transcription_enabled, sentiment_enabled, summarization_enabled, keywords, alert_threshold, created_at, updated_at FROM speech_analytics_configs ORDER BY extension")
+            result = self.db.execute(
+                "SELECT id, extension, enabled, transcription_enabled, sentiment_enabled, summarization_enabled, keywords, alert_threshold, created_at, updated_at FROM speech_analytics_configs ORDER BY extension"
+            )
 
             configs = [
                 {
@@ -567,7 +812,9 @@ def analyze_call_recording(self, call_id: str, audio_file_path: str) -> dict:
                             break
 
                         # 3. Transcribe each chunk
-                        chunk_text = self._transcribe_audio_vosk(audio_chunk)
+                        chunk_text = self._transcribe_audio_vosk(
+                            audio_chunk, f"recording-{call_id}", sample_rate
+                        )
                         if chunk_text:
                             chunk_results.append(chunk_text)
 
@@ -575,6 +822,11 @@ def analyze_call_recording(self, call_id: str, audio_file_path: str) -> dict:
                 self.logger.error(f"Could not open audio file {audio_file_path}: {e}")
                 return {"call_id": call_id, "status": "error", "error": str(e)}
 
+            # Flush and release the recording's recognizer
+            final_text = self.end_call(f"recording-{call_id}")
+            if final_text:
+                chunk_results.append(final_text)
+
             # 4. Generate full transcript from all chunks
             full_transcript = " ".join(chunk_results).strip()
 
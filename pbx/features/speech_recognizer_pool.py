@@ -0,0 +1,432 @@
+"""
+Pooled Speech Recognizers
+Shared Vosk model, per-call recognizers and a worker pool for live call transcription
+"""
+
+import json
+import queue
+import threading
+from collections.abc import Callable
+from typing import Any
+
+from pbx.utils.logger import get_logger
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+# Process-wide model cache: a Vosk model is large and read-only once loaded,
+# so every engine/pool in the process shares one instance per path
+_model_cache: dict[str, Any] = {}
+_model_lock = threading.Lock()
+
+
+def load_shared_model(model_path: str) -> Any | None:
+    """
+    Load a Vosk model once per process and return the shared instance
+
+    Args:
+        model_path: Path to the Vosk model directory
+
+    Returns:
+        vosk.Model or None if Vosk or the model is unavailable
+    """
+    with _model_lock:
+        if model_path in _model_cache:
+            return _model_cache[model_path]
+
+        logger = get_logger()
+        try:
+            import vosk
+
+            model = vosk.Model(model_path)
+            logger.info(f"Vosk model loaded from {model_path}")
+        except ImportError:
+            logger.warning("Vosk library not available, transcription disabled")
+            model = None
+        except Exception as e:
+            logger.warning(f"Vosk model not available: {e}")
+            model = None
+
+        # Failures are cached too so a missing model is not retried per chunk
+        _model_cache[model_path] = model
+        return model
+
+
+def resample_pcm16(pcm: bytes, from_rate: int, to_rate: int) -> bytes:
+    """
+    Resample 16-bit mono PCM with linear interpolation
+
+    Args:
+        pcm: Signed 16-bit little-endian PCM
+        from_rate: Source sample rate
+        to_rate: Target sample rate
+
+    Returns:
+        Resampled PCM
+    """
+    if from_rate == to_rate or not pcm:
+        return pcm
+
+    samples = np.frombuffer(pcm[: len(pcm) - len(pcm) % 2], dtype="<i2")
+    if not len(samples):
+        return b""
+
+    out_len = max(1, round(len(samples) * to_rate / from_rate))
+    positions = np.arange(out_len) * (from_rate / to_rate)
+    resampled = np.interp(positions, np.arange(len(samples)), samples)
+    return resampled.astype("<i2").tobytes()
+
+
+class RecognizerPool:
+    """Bounded pool of Vosk recognizers, one checked out per active call"""
+
+    def __init__(self, model: Any, sample_rate: int = 16000, max_recognizers: int = 50) -> None:
+        """
+        Initialize recognizer pool
+
+        Args:
+            model: Shared vosk.Model
+            sample_rate: Sample rate the recognizers are created for
+            max_recognizers: Maximum recognizers alive at once
+        """
+        self.model = model
+        self.sample_rate = sample_rate
+        self.max_recognizers = max_recognizers
+
+        self._idle: list[Any] = []
+        self._in_use: dict[str, Any] = {}
+        self._created = 0
+        self._available = threading.Condition()
+
+    def _create(self) -> Any:
+        """Create a new recognizer bound to the shared model"""
+        import vosk
+
+        recognizer = vosk.KaldiRecognizer(self.model, self.sample_rate)
+        self._created += 1
+        return recognizer
+
+    def acquire(self, call_id: str, timeout: float | None = 0.0) -> Any | None:
+        """
+        Check out the recognizer for a call, creating or waiting as needed
+
+        Args:
+            call_id: Call identifier
+            timeout: Seconds to wait when the pool is exhausted (None waits forever)
+
+        Returns:
+            Recognizer or None if the pool stayed exhausted
+        """
+        with self._available:
+            if call_id in self._in_use:
+                return self._in_use[call_id]
+
+            def can_checkout() -> bool:
+                return bool(self._idle) or self._created < self.max_recognizers
+
+            if not can_checkout() and not self._available.wait_for(can_checkout, timeout):
+                return None
+
+            recognizer = self._idle.pop() if self._idle else self._create()
+            self._in_use[call_id] = recognizer
+            return recognizer
+
+    def get(self, call_id: str) -> Any | None:
+        """Get the recognizer currently checked out by a call"""
+        return self._in_use.get(call_id)
+
+    def release(self, call_id: str) -> None:
+        """Return a call's recognizer to the pool, resetting its state"""
+        with self._available:
+            recognizer = self._in_use.pop(call_id, None)
+            if recognizer is None:
+                return
+            try:
+                recognizer.Reset()
+            except AttributeError:
+                # Older Vosk builds lack Reset(); drop the recognizer instead
+                self._created -= 1
+            else:
+                self._idle.append(recognizer)
+            self._available.notify()
+
+    def get_statistics(self) -> dict:
+        """Get pool statistics"""
+        return {
+            "max_recognizers": self.max_recognizers,
+            "created": self._created,
+            "in_use": len(self._in_use),
+            "idle": len(self._idle),
+        }
+
+
+class _CallStream:
+    """Per-call frame queue and recognition state"""
+
+    def __init__(self, call_id: str, max_frames: int) -> None:
+        self.call_id = call_id
+        self.frames: queue.Queue = queue.Queue(maxsize=max_frames)
+        self.lock = threading.Lock()
+        self.scheduled = False
+        self.ending = False
+        self.finished = threading.Event()
+        self.finals: list[str] = []
+        self.partial = ""
+        self.frames_processed = 0
+        self.frames_dropped = 0
+
+
+class StreamingRecognitionService:
+    """
+    Real-time transcription for many concurrent calls
+
+    Each call gets its own recognizer from a RecognizerPool and a bounded
+    frame queue. A fixed set of worker threads drains the queues; a call is
+    only ever scheduled on one worker at a time, so its audio is recognized
+    in order and recognizer state is never shared between calls. Ending a
+    call is handled by the same worker, which flushes the recognizer and
+    returns it to the pool once the last queued frame has been fed.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        model_sample_rate: int = 16000,
+        max_streams: int = 50,
+        workers: int = 4,
+        max_queued_frames: int = 50,
+        frames_per_turn: int = 10,
+        on_result: Callable[[str, str, bool], None] | None = None,
+    ) -> None:
+        """
+        Initialize streaming recognition
+
+        Args:
+            model: Shared vosk.Model
+            model_sample_rate: Sample rate the model expects
+            max_streams: Maximum concurrent calls (recognizer pool size)
+            workers: Number of recognition worker threads
+            max_queued_frames: Per-call queue bound before frames are rejected
+            frames_per_turn: Frames a worker processes for one call before yielding
+            on_result: Callback(call_id, text, is_final) for recognition results
+        """
+        self.logger = get_logger()
+        self.model_sample_rate = model_sample_rate
+        self.pool = RecognizerPool(model, model_sample_rate, max_streams)
+        self.max_queued_frames = max_queued_frames
+        self.frames_per_turn = frames_per_turn
+        self.on_result = on_result
+
+        self.streams: dict[str, _CallStream] = {}
+        self.streams_lock = threading.Lock()
+        self.ready: queue.Queue = queue.Queue()
+        self.running = True
+
+        self.workers = [
+            threading.Thread(target=self._worker_loop, daemon=True, name=f"speech-worker-{i}")
+            for i in range(workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def start_stream(self, call_id: str) -> bool:
+        """
+        Start recognizing a call
+
+        Args:
+            call_id: Call identifier
+
+        Returns:
+            True if a recognizer was available for the call
+        """
+        with self.streams_lock:
+            if call_id in self.streams:
+                return True
+            if self.pool.acquire(call_id) is None:
+                self.logger.warning(f"Speech recognizer pool exhausted, not transcribing {call_id}")
+                return False
+            self.streams[call_id] = _CallStream(call_id, self.max_queued_frames)
+            return True
+
+    def submit(
+        self,
+        call_id: str,
+        pcm: bytes,
+        sample_rate: int = 8000,
+        timeout: float | None = 0.0,
+    ) -> bool:
+        """
+        Queue call audio for recognition
+
+        Args:
+            call_id: Call identifier
+            pcm: 16-bit mono PCM
+            sample_rate: Sample rate of pcm; resampled to the model rate if needed
+            timeout: Seconds to block when the call's queue is full (0 drops immediately)
+
+        Returns:
+            True if queued, False if dropped because of backpressure or no recognizer
+        """
+        stream = self.streams.get(call_id)
+        if stream is None:
+            if not self.start_stream(call_id):
+                return False
+            stream = self.streams[call_id]
+
+        if sample_rate != self.model_sample_rate:
+            pcm = resample_pcm16(pcm, sample_rate, self.model_sample_rate)
+
+        try:
+            if timeout == 0.0:
+                stream.frames.put_nowait(pcm)
+            else:
+                stream.frames.put(pcm, timeout=timeout)
+        except queue.Full:
+            stream.frames_dropped += 1
+            return False
+
+        self._schedule(stream)
+        return True
+
+    def _schedule(self, stream: _CallStream) -> None:
+        """Put a stream on the ready queue unless a worker already owns it"""
+        with stream.lock:
+            if stream.scheduled:
+                return
+            stream.scheduled = True
+        self.ready.put(stream)
+
+    def _worker_loop(self) -> None:
+        """Take a ready call, feed a bounded number of its frames, then yield"""
+        while self.running:
+            try:
+                stream = self.ready.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if stream is None:
+                break
+
+            recognizer = self.pool.get(stream.call_id)
+            for _ in range(self.frames_per_turn):
+                try:
+                    pcm = stream.frames.get_nowait()
+                except queue.Empty:
+                    break
+                if recognizer is not None:
+                    self._feed(stream, recognizer, pcm)
+
+            with stream.lock:
+                more = not stream.frames.empty()
+                finish = stream.ending and not more
+                # A finishing stream stays scheduled so nothing queues it again
+                if not finish:
+                    stream.scheduled = False
+            if finish:
+                self._finish(stream, recognizer)
+            elif more:
+                self._schedule(stream)
+
+    def _feed(self, stream: _CallStream, recognizer: Any, pcm: bytes) -> None:
+        """Feed one frame to a call's recognizer and publish results"""
+        try:
+            if recognizer.AcceptWaveform(pcm):
+                text = json.loads(recognizer.Result()).get("text", "")
+                if text:
+                    stream.finals.append(text)
+                    stream.partial = ""
+                    self._publish(stream.call_id, text, True)
+            else:
+                stream.partial = json.loads(recognizer.PartialResult()).get("partial", "")
+            stream.frames_processed += 1
+        except (KeyError, TypeError, ValueError) as e:
+            self.logger.error(f"Speech recognition error for {stream.call_id}: {e}")
+
+    def _finish(self, stream: _CallStream, recognizer: Any) -> None:
+        """Flush an ended call's recognizer and return it to the pool"""
+        if recognizer is not None:
+            try:
+                text = json.loads(recognizer.FinalResult()).get("text", "")
+                if text:
+                    stream.finals.append(text)
+                    self._publish(stream.call_id, text, True)
+            except (KeyError, TypeError, ValueError) as e:
+                self.logger.error(f"Speech recognition flush failed for {stream.call_id}: {e}")
+        self.pool.release(stream.call_id)
+        stream.finished.set()
+
+    def _publish(self, call_id: str, text: str, is_final: bool) -> None:
+        """Deliver a recognition result to the callback"""
+        if self.on_result:
+            try:
+                self.on_result(call_id, text, is_final)
+            except Exception as e:
+                self.logger.error(f"Speech result callback failed for {call_id}: {e}")
+
+    def get_transcript(self, call_id: str) -> str:
+        """Get the finalized transcript so far plus the current partial"""
+        stream = self.streams.get(call_id)
+        if not stream:
+            return ""
+        return " ".join([*stream.finals, stream.partial]).strip()
+
+    def end_stream(self, call_id: str, timeout: float = 5.0) -> str:
+        """
+        Finish a call: drain its queue, flush the recognizer and release it
+
+        The flush runs on the worker that owns the call, after its queued
+        frames. If that takes longer than timeout, the transcript so far is
+        returned and the worker still releases the recognizer when it is done
+        with it.
+
+        Args:
+            call_id: Call identifier
+            timeout: Seconds to wait for queued frames to be recognized
+
+        Returns:
+            Final transcript for the call
+        """
+        with self.streams_lock:
+            stream = self.streams.pop(call_id, None)
+        if stream is None:
+            return ""
+
+        with stream.lock:
+            stream.ending = True
+            idle = not stream.scheduled
+            stream.scheduled = True
+        if idle:
+            self.ready.put(stream)
+
+        if not stream.finished.wait(timeout):
+            self.logger.warning(
+                f"Speech recognition for {call_id} still finishing after {timeout}s"
+            )
+        return " ".join(list(stream.finals)).strip()
+
+    def stop(self) -> None:
+        """Stop the worker threads and release all recognizers"""
+        self.running = False
+        for _ in self.workers:
+            self.ready.put(None)
+        for worker in self.workers:
+            worker.join(timeout=1.0)
+        for call_id in list(self.streams):
+            self.pool.release(call_id)
+        self.streams.clear()
+
+    def get_statistics(self) -> dict:
+        """Get recognition statistics"""
+        streams = list(self.streams.values())
+        return {
+            "active_streams": len(streams),
+            "queued_frames": sum(s.frames.qsize() for s in streams),
+            "frames_processed": sum(s.frames_processed for s in streams),
+            "frames_dropped": sum(s.frames_dropped for s in streams),
+            "workers": len(self.workers),
+            "pool": self.pool.get_statistics(),
+        }
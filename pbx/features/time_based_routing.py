@@ -3,27 +3,107 @@
 Route calls based on business hours and schedules
 """
 
-from datetime import UTC, datetime, time
+import itertools
+import threading
+from datetime import UTC, date, datetime, time, timedelta, tzinfo
 from typing import Any
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from pbx.utils.logger import get_logger
 
+_DAY = timedelta(days=1)
+# time_range ends are inclusive of the HH:MM:00 instant itself
+_RANGE_END = timedelta(microseconds=1)
+# Longest range the what-if preview will evaluate
+MAX_PREVIEW_DAYS = 366
+
+
+class _CompiledRule:
+    """A rule's time conditions parsed once, for evaluation per day"""
+
+    __slots__ = (
+        "date_range",
+        "days_of_week",
+        "exclude_holidays",
+        "intervals",
+        "priority",
+        "rule",
+    )
+
+    def __init__(self, rule: dict, parse_time: Any) -> None:
+        conditions = rule["time_conditions"]
+        self.rule = rule
+        self.priority = rule["priority"]
+        self.days_of_week = (
+            frozenset(conditions["days_of_week"]) if "days_of_week" in conditions else None
+        )
+        self.exclude_holidays = bool(conditions.get("exclude_holidays"))
+
+        self.date_range = None
+        if "date_range" in conditions:
+            date_range = conditions["date_range"]
+            self.date_range = (
+                datetime.fromisoformat(date_range["start"]).date(),
+                datetime.fromisoformat(date_range["end"]).date(),
+            )
+
+        # Active intervals within a day as [start, end) offsets from midnight
+        if "time_range" in conditions:
+            start = self._offset(parse_time(conditions["time_range"]["start"]))
+            end = self._offset(parse_time(conditions["time_range"]["end"])) + _RANGE_END
+            if start < end:
+                self.intervals = ((start, end),)
+            else:
+                # Range spans midnight
+                self.intervals = ((timedelta(0), end), (start, _DAY))
+        else:
+            self.intervals = ((timedelta(0), _DAY),)
+
+    @staticmethod
+    def _offset(value: time) -> timedelta:
+        return timedelta(hours=value.hour, minutes=value.minute)
+
+    def applies_on(self, day: date, is_holiday: Any) -> bool:
+        """Whether the day-level conditions (weekday, dates, holidays) hold on day"""
+        if self.days_of_week is not None and day.weekday() not in self.days_of_week:
+            return False
+        if self.date_range and not (self.date_range[0] <= day <= self.date_range[1]):
+            return False
+        return not (self.exclude_holidays and is_holiday(day))
+
 
 class TimeBasedRouting:
-    """Time-based call routing system"""
+    """
+    Time-based call routing system
+
+    Rules are compiled when added. For each destination, a day's rules turn
+    into a list of intervals with the winning rule for each, in the configured
+    timezone. The decision for "now" is cached until the next interval
+    boundary, so repeated lookups skip rule evaluation entirely until the
+    routing actually changes.
+    """
 
     def __init__(self, config: Any | None = None) -> None:
         """Initialize time-based routing"""
         self.logger = get_logger()
         self.config = config or {}
-        self.enabled = (
-            self.config.get("features", {}).get("time_based_routing", {}).get("enabled", False)
-        )
+        tbr_config = self.config.get("features", {}).get("time_based_routing", {})
+        self.enabled = tbr_config.get("enabled", False)
+        self.timezone = self._load_timezone(tbr_config.get("timezone", "UTC"))
 
         # Routing rules
         self.routing_rules = {}  # rule_id -> rule
         self.destination_rules = {}  # destination -> list of rule_ids
 
+        # Compiled schedules
+        self.lock = threading.Lock()
+        self._compiled: dict[str, _CompiledRule] = {}  # rule_id -> compiled rule
+        self._holidays = self._compile_holidays(tbr_config.get("holidays", []))
+        # destination -> (valid_from, valid_until, decision), local wall time
+        self._decisions: dict[str, tuple[datetime, datetime, dict]] = {}
+        self.decision_cache_hits = 0
+        self.schedule_builds = 0
+
         if self.enabled:
             self.logger.info("Time-based routing initialized")
             self._load_rules()
@@ -57,17 +137,48 @@ def add_rule(self, rule: dict) -> str:
         rule["enabled"] = rule.get("enabled", True)
         rule["priority"] = rule.get("priority", 100)
 
+        # Compile first so a malformed rule is rejected, not hit at call time
+        compiled = _CompiledRule(rule, self._parse_time)
+
         self.routing_rules[rule_id] = rule
+        self._compiled[rule_id] = compiled
 
         # Index by destination
         destination = rule["destination"]
         if destination not in self.destination_rules:
             self.destination_rules[destination] = []
         self.destination_rules[destination].append(rule_id)
+        self._invalidate(destination)
 
         self.logger.info(f"Added time-based routing rule: {rule['name']} (ID: {rule_id})")
         return rule_id
 
+    @staticmethod
+    def _load_timezone(name: str) -> tzinfo:
+        if not name or name.upper() == "UTC":
+            return UTC
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            get_logger().warning(f"Unknown time-based routing timezone {name!r}, using UTC")
+            return UTC
+
+    def _local_time(self, call_time: datetime | None) -> datetime:
+        """Wall-clock time in the routing timezone (naive times are taken as local)"""
+        if call_time is None:
+            return datetime.now(self.timezone).replace(tzinfo=None)
+        if call_time.tzinfo is None:
+            return call_time
+        return call_time.astimezone(self.timezone).replace(tzinfo=None)
+
+    def _invalidate(self, destination: str | None = None) -> None:
+        """Drop cached decisions after the rules changed"""
+        with self.lock:
+            if destination is None:
+                self._decisions.clear()
+            else:
+                self._decisions.pop(destination, None)
+
     def get_routing_destination(self, destination: str, call_time: datetime | None = None) -> dict:
         """
         Get routing destination based on time rules
@@ -82,39 +193,125 @@ def get_routing_destination(self, destination: str, call_time: datetime | None =
         if not self.enabled:
             return {"destination": destination, "rule": None}
 
-        if call_time is None:
-            call_time = datetime.now(UTC)
-
         # Get rules for this destination
-        rule_ids = self.destination_rules.get(destination, [])
-        if not rule_ids:
+        if not self.destination_rules.get(destination):
             return {"destination": destination, "rule": None}
 
-        # Evaluate rules by priority
-        applicable_rules = []
-        for rule_id in rule_ids:
-            rule = self.routing_rules[rule_id]
-            if not rule.get("enabled", True):
-                continue
+        local_time = self._local_time(call_time)
+        with self.lock:
+            cached = self._decisions.get(destination)
+            if cached and cached[0] <= local_time < cached[1]:
+                self.decision_cache_hits += 1
+                return dict(cached[2])
+
+        for start, end, decision in self._day_schedule(destination, local_time.date()):
+            if start <= local_time < end:
+                if call_time is None or start <= self._local_time(None) < end:
+                    # Only the decision for the present is worth keeping
+                    with self.lock:
+                        self._decisions[destination] = (start, end, decision)
+                return dict(decision)
+        return {"destination": destination, "rule": None}
+
+    def _day_schedule(self, destination: str, day: date) -> list[tuple[datetime, datetime, dict]]:
+        """
+        Build a destination's routing for one day
+
+        Args:
+            destination: Original destination
+            day: Local date
 
-            if self._evaluate_time_conditions(rule["time_conditions"], call_time):
-                applicable_rules.append(rule)
+        Returns:
+            list of (start, end, decision) covering the whole day, with
+            adjacent intervals that route the same way merged
+        """
+        self.schedule_builds += 1
+        rules = [
+            self._compiled[rule_id]
+            for rule_id in self.destination_rules.get(destination, [])
+            if rule_id in self._compiled and self.routing_rules[rule_id].get("enabled", True)
+        ]
+        # Lower number = higher priority; ties keep insertion order
+        rules.sort(key=lambda r: r.priority)
+        rules = [r for r in rules if r.applies_on(day, self._is_holiday)]
+
+        boundaries = {timedelta(0), _DAY}
+        for rule in rules:
+            for start, end in rule.intervals:
+                boundaries.update((start, end))
+        edges = sorted(b for b in boundaries if timedelta(0) <= b <= _DAY)
+
+        midnight = datetime.combine(day, time())
+        schedule: list[tuple[datetime, datetime, dict]] = []
+        for start, end in itertools.pairwise(edges):
+            selected = next(
+                (rule.rule for rule in rules if any(lo <= start < hi for lo, hi in rule.intervals)),
+                None,
+            )
+            if selected is None:
+                decision = {"destination": destination, "rule": None}
+            else:
+                decision = {
+                    "destination": selected.get("route_to", destination),
+                    "rule": selected["rule_id"],
+                    "rule_name": selected["name"],
+                    "original_destination": destination,
+                }
+            if schedule and schedule[-1][2] == decision:
+                schedule[-1] = (schedule[-1][0], midnight + end, decision)
+            else:
+                schedule.append((midnight + start, midnight + end, decision))
+        return schedule
+
+    def preview_routing(self, destination: str, start_date: date, end_date: date) -> list[dict]:
+        """
+        Show how a destination will be routed over a range of dates
 
-        if not applicable_rules:
-            return {"destination": destination, "rule": None}
+        Lets an administrator check a holiday calendar or a new rule before
+        it takes effect without evaluating the rules minute by minute.
 
-        # Sort by priority (lower number = higher priority)
-        applicable_rules.sort(key=lambda r: r["priority"])
+        Args:
+            destination: Original destination
+            start_date: First local date (inclusive)
+            end_date: Last local date (inclusive)
 
-        # Use first matching rule
-        selected_rule = applicable_rules[0]
+        Returns:
+            list[dict]: Consecutive periods with start, end (ISO local times),
+                destination, rule and rule_name
 
-        return {
-            "destination": selected_rule.get("route_to", destination),
-            "rule": selected_rule["rule_id"],
-            "rule_name": selected_rule["name"],
-            "original_destination": destination,
-        }
+        Raises:
+            ValueError: If the range is reversed or longer than MAX_PREVIEW_DAYS
+        """
+        days = (end_date - start_date).days + 1
+        if days < 1:
+            raise ValueError("end_date is before start_date")
+        if days > MAX_PREVIEW_DAYS:
+            raise ValueError(f"Preview is limited to {MAX_PREVIEW_DAYS} days")
+
+        periods: list[list] = []
+        for offset in range(days):
+            day = start_date + timedelta(days=offset)
+            if self.enabled:
+                schedule = self._day_schedule(destination, day)
+            else:
+                midnight = datetime.combine(day, time())
+                schedule = [(midnight, midnight + _DAY, {"destination": destination, "rule": None})]
+            for start, end, decision in schedule:
+                if periods and periods[-1][2] == decision and periods[-1][1] == start:
+                    periods[-1][1] = end
+                else:
+                    periods.append([start, end, decision])
+
+        return [
+            {
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "destination": decision["destination"],
+                "rule": decision["rule"],
+                "rule_name": decision.get("rule_name"),
+            }
+            for start, end, decision in periods
+        ]
 
     def _evaluate_time_conditions(self, conditions: dict, check_time: datetime) -> bool:
         """Evaluate if time conditions match"""
@@ -162,7 +359,7 @@ def _is_time_in_range(self, check_time: time, start_time: time, end_time: time)
     def _is_holiday(self, check_date: datetime) -> bool:
         """Check if a date falls on a configured holiday.
 
-        The holiday calendar is read from
+        The holiday calendar is read (once, at startup) from
         ``config.features.time_based_routing.holidays``.  The value can be
         a simple list of date strings **or** a list of dicts with richer
         matching capabilities.
@@ -187,22 +384,35 @@ def _is_holiday(self, check_date: datetime) -> bool:
         Returns:
             ``True`` if the date is a configured holiday.
         """
-        holidays = self.config.get("features", {}).get("time_based_routing", {}).get("holidays", [])
-
-        if not holidays:
+        holidays = self._holidays
+        if not any(holidays.values()):
             return False
 
-        check_date_str = check_date.strftime("%Y-%m-%d")
-        check_mmdd = check_date.strftime("%m-%d")
+        if holidays["dates"] and check_date.strftime("%Y-%m-%d") in holidays["dates"]:
+            return True
+        if holidays["annual"] and check_date.strftime("%m-%d") in holidays["annual"]:
+            return True
+        for weekday, month in holidays["weekdays"]:
+            if check_date.weekday() == weekday and (month is None or check_date.month == month):
+                return True
+        return any(
+            self._matches_nth_weekday(check_date, month, weekday, n)
+            for month, weekday, n in holidays["nth_weekdays"]
+        )
 
-        for entry in holidays:
+    @staticmethod
+    def _compile_holidays(holidays: list) -> dict:
+        """Sort the holiday calendar entries into sets by how they match"""
+        compiled: dict[str, Any] = {
+            "dates": set(),  # YYYY-MM-DD
+            "annual": set(),  # MM-DD
+            "weekdays": [],  # (weekday, month or None)
+            "nth_weekdays": [],  # (month, weekday, n)
+        }
+        for entry in holidays or []:
             # Simple string entry (exact date or recurring MM-DD)
             if isinstance(entry, str):
-                if entry == check_date_str:
-                    return True
-                # Recurring annual holiday (MM-DD format)
-                if len(entry) == 5 and entry == check_mmdd:
-                    return True
+                compiled["annual" if len(entry) == 5 else "dates"].add(entry)
                 continue
 
             # Dict entry — richer matching
@@ -214,34 +424,19 @@ def _is_holiday(self, check_date: datetime) -> bool:
                 month = entry.get("month")
                 weekday = entry.get("weekday")
                 n = entry.get("n") or entry.get("nth_weekday")
-                if (
-                    month is not None
-                    and weekday is not None
-                    and n is not None
-                    and self._matches_nth_weekday(check_date, int(month), int(weekday), int(n))
-                ):
-                    return True
+                if month is not None and weekday is not None and n is not None:
+                    compiled["nth_weekdays"].append((int(month), int(weekday), int(n)))
                 continue
 
             # Recurring weekday (optionally in a specific month)
-            if (
-                "weekday" in entry
-                and "date" not in entry
-                and check_date.weekday() == entry["weekday"]
-                and ("month" not in entry or check_date.month == entry["month"])
-            ):
-                return True
             if "weekday" in entry and "date" not in entry:
+                compiled["weekdays"].append((entry["weekday"], entry.get("month")))
                 continue
 
             # Date string inside a dict (with optional name)
             date_val = entry.get("date", "")
-            if date_val == check_date_str:
-                return True
-            if len(date_val) == 5 and date_val == check_mmdd:
-                return True
-
-        return False
+            compiled["annual" if len(date_val) == 5 else "dates"].add(date_val)
+        return compiled
 
     @staticmethod
     def _matches_nth_weekday(check_date: datetime, month: int, weekday: int, n: int) -> bool:
@@ -319,6 +514,7 @@ def enable_rule(self, rule_id: str) -> bool:
         """Enable a routing rule"""
         if rule_id in self.routing_rules:
             self.routing_rules[rule_id]["enabled"] = True
+            self._invalidate(self.routing_rules[rule_id]["destination"])
             self.logger.info(f"Enabled routing rule {rule_id}")
             return True
         return False
@@ -327,6 +523,7 @@ def disable_rule(self, rule_id: str) -> bool:
         """Disable a routing rule"""
         if rule_id in self.routing_rules:
             self.routing_rules[rule_id]["enabled"] = False
+            self._invalidate(self.routing_rules[rule_id]["destination"])
             self.logger.info(f"Disabled routing rule {rule_id}")
             return True
         return False
@@ -342,6 +539,8 @@ def delete_rule(self, rule_id: str) -> bool:
                 self.destination_rules[destination].remove(rule_id)
 
             del self.routing_rules[rule_id]
+            self._compiled.pop(rule_id, None)
+            self._invalidate(destination)
             self.logger.info(f"Deleted routing rule {rule_id}")
             return True
         return False
@@ -363,4 +562,7 @@ def get_statistics(self) -> dict:
             "total_rules": len(self.routing_rules),
             "enabled_rules": enabled_rules,
             "destinations_with_rules": len(self.destination_rules),
+            "timezone": str(self.timezone),
+            "decision_cache_hits": self.decision_cache_hits,
+            "schedule_builds": self.schedule_builds,
         }
@@ -17,6 +17,7 @@
 from datetime import UTC, datetime
 from typing import TYPE_CHECKING, Any
 
+from pbx.rtp.jitter_buffer import STAGE_TRANSCODING, JitterBuffer, create_stage_buffer
 from pbx.utils.logger import get_logger
 
 if TYPE_CHECKING:
@@ -482,6 +483,17 @@ def _get_config(self, key: str, default: Any | None = None) -> Any:
             return self.config.get(key, default)
         return default
 
+    @staticmethod
+    def _bridge_frames(
+        jitter_buffer: JitterBuffer | None, packet: bytes, payload: bytes, payload_type: int
+    ) -> list[bytes]:
+        """Pass a bridged payload through the jitter buffer, if there is one"""
+        if not jitter_buffer:
+            return [payload]
+        sequence, timestamp = struct.unpack("!HI", packet[2:8])
+        jitter_buffer.put(payload, sequence, timestamp, payload_type)
+        return list(iter(jitter_buffer.pop_ready, None))
+
     def _start_cleanup_thread(self) -> None:
         """Start session cleanup thread"""
         self.running = True
@@ -992,6 +1004,10 @@ def start_media_bridge(
 
             relay_addr = ("127.0.0.1", relay_port)
 
+            jitter_buffer = create_stage_buffer(
+                self._get_config("rtp.jitter_buffer", {}), STAGE_TRANSCODING
+            )
+
             # --- Thread: RTP relay → aiortc (phone audio → browser) ---
             def _relay_to_browser() -> None:
                 try:
@@ -1022,13 +1038,14 @@ def _relay_to_browser() -> None:
                         # Decode G.711 to 8 kHz PCM then upsample to 48 kHz
                         # so the AudioBridgeTrack delivers Opus-native frames
                         # to the browser via aiortc.
-                        if pt == 8:
-                            pcm_8k = _alaw_to_pcm(payload)
-                        else:
-                            pcm_8k = _ulaw_to_pcm(payload)
-                        pcm_48k = _upsample_8k_to_48k(pcm_8k)
-                        if session.bridge_track:
-                            session.bridge_track.push_pcm(pcm_48k)
+                        for frame in self._bridge_frames(jitter_buffer, data, payload, pt):
+                            if pt == 8:
+                                pcm_8k = _alaw_to_pcm(frame)
+                            else:
+                                pcm_8k = _ulaw_to_pcm(frame)
+                            pcm_48k = _upsample_8k_to_48k(pcm_8k)
+                            if session.bridge_track:
+                                session.bridge_track.push_pcm(pcm_48k)
                 except Exception:
                     self.logger.exception(
                         f"relay_to_browser crashed for session {session.session_id}"
@@ -1812,9 +1829,8 @@ def initiate_call(
                 self.pbx_core.rtp_relay.release_relay(call_id)
 
                 # Allocate a plain RTP port for the virtual service
-                try:
-                    service_port = self.pbx_core.rtp_relay.port_pool.pop(0)
-                except IndexError:
+                service_port = self.pbx_core.rtp_relay.acquire_port(call_id)
+                if service_port is None:
                     self.logger.error(
                         f"No available RTP ports for virtual extension {target_extension}"
                     )
@@ -1836,8 +1852,7 @@ def initiate_call(
                     self.logger.error(
                         f"Failed to start media bridge for virtual extension {target_extension}"
                     )
-                    self.pbx_core.rtp_relay.port_pool.append(service_port)
-                    self.pbx_core.rtp_relay.port_pool.sort()
+                    self.pbx_core.rtp_relay.release_port(service_port)
                     return None
 
                 # The bridge socket is now open - tell the service to send
@@ -1864,13 +1879,7 @@ def initiate_call(
                     voicemail_ivr = VoicemailIVR(self.pbx_core.voicemail_system, vm_ext)
                     call.voicemail_ivr = voicemail_ivr
 
-                    vm_thread = threading.Thread(
-                        target=self.pbx_core._voicemail_ivr_session,
-                        args=(call_id, call, mailbox, voicemail_ivr),
-                        daemon=True,
-                        name=f"WebRTC-VM-{call_id[:8]}",
-                    )
-                    vm_thread.start()
+                    self.pbx_core._voicemail_ivr_session(call_id, call, mailbox, voicemail_ivr)
                     self.logger.info(
                         f"Voicemail IVR started for WebRTC call {call_id} (mailbox {vm_ext})"
                     )
@@ -1885,8 +1894,7 @@ def initiate_call(
                     )
                     if not page_id:
                         self.logger.error(f"Failed to initiate page for {target_extension}")
-                        self.pbx_core.rtp_relay.port_pool.append(service_port)
-                        self.pbx_core.rtp_relay.port_pool.sort()
+                        self.pbx_core.rtp_relay.release_port(service_port)
                         return None
 
                     page_info = self.pbx_core.paging_system.get_page_info(page_id)
@@ -1925,13 +1933,9 @@ def initiate_call(
                         aa_session = aa.start_session(call_id, from_extension)
                         call.aa_session = aa_session
 
-                        aa_thread = threading.Thread(
-                            target=self.pbx_core._auto_attendant_handler._auto_attendant_session,
-                            args=(call_id, call, aa_session),
-                            daemon=True,
-                            name=f"WebRTC-AA-{call_id[:8]}",
+                        self.pbx_core._auto_attendant_handler._auto_attendant_session(
+                            call_id, call, aa_session
                         )
-                        aa_thread.start()
                         self.logger.info(f"Auto attendant started for WebRTC call {call_id}")
                     else:
                         self.logger.warning(
@@ -3,13 +3,20 @@
 Provides SSO, user provisioning, and group-based permissions
 """
 
+import hashlib
+import json
 import re
 import secrets
+import threading
+import time
+from collections.abc import Callable, Iterator
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
 
 from pbx.utils.logger import get_logger
 
 try:
-    from ldap3 import ALL, SUBTREE, Connection, Server
+    from ldap3 import ALL, BASE, SUBTREE, Connection, Server
     from ldap3.core.exceptions import LDAPException
 
     LDAP3_AVAILABLE = True
@@ -17,6 +24,15 @@
     LDAP3_AVAILABLE = False
     LDAPException = Exception  # Fallback so type references don't break
 
+# Simple paged results control (RFC 2696)
+PAGED_RESULTS_OID = "1.2.840.113556.1.4.319"
+# userAccountControl ACCOUNTDISABLE flag
+ACCOUNT_DISABLED = 0x2
+# whenChanged has one-second resolution and DC clocks drift, so incremental
+# syncs without a USN look back a little further than the last sync
+WHEN_CHANGED_OVERLAP = 300
+SYNC_STATE_CONFIG_KEY = "ad_sync.state"
+
 
 class ActiveDirectoryIntegration:
     """Active Directory / LDAP integration handler"""
@@ -40,8 +56,20 @@ def __init__(self, config: dict) -> None:
         self.bind_password = config.get("integrations.active_directory.bind_password")
         self.use_ssl = config.get("integrations.active_directory.use_ssl", True)
         self.auto_provision = config.get("integrations.active_directory.auto_provision", False)
+        self.sync_mode = config.get("integrations.active_directory.sync_mode") or "incremental"
+        self.page_size = int(config.get("integrations.active_directory.page_size") or 500)
+        self.full_sync_interval_hours = float(
+            config.get("integrations.active_directory.full_sync_interval_hours") or 0
+        )
+        self.sync_state_file = (
+            config.get("integrations.active_directory.sync_state_file") or "data/ad_sync_state.json"
+        )
+        self.last_sync_summary: dict | None = None
         self.connection: object | None = None
         self.server: object | None = None
+        self._sync_lock = threading.Lock()
+        self._background_thread: threading.Thread | None = None
+        self._background_stop = threading.Event()
 
         if self.enabled:
             if not LDAP3_AVAILABLE:
@@ -197,24 +225,47 @@ def sync_users(
         extension_registry: object | None = None,
         extension_db: object | None = None,
         phone_provisioning: object | None = None,
+        full: bool = False,
     ) -> dict | int:
         """
         Synchronize users from Active Directory
 
+        Incremental syncs only fetch users whose uSNChanged (or whenChanged,
+        on servers that don't report a USN) is past the high-water mark saved
+        by the previous sync. A full sync runs instead when there is no saved
+        state, the server or search base changed, full_sync_interval_hours
+        has passed, or it is requested; only full syncs notice users that
+        were deleted outright.
+
         Args:
             extension_registry: Optional ExtensionRegistry instance for live updates
             extension_db: Optional ExtensionDB instance for database storage
             phone_provisioning: Optional PhoneProvisioning instance to trigger phone reboots
+            full: Force a full resync of every user
 
         Returns:
-            int: Number of users synchronized
+            dict: synced_count (extensions created or updated),
+                extensions_to_reboot and a diff summary
         """
         if not self.enabled or not self.auto_provision or not LDAP3_AVAILABLE:
             return {"synced_count": 0, "extensions_to_reboot": []}
 
-        if not self.connect():
-            return {"synced_count": 0, "extensions_to_reboot": []}
+        # Startup, periodic and manual syncs share the connection and state
+        with self._sync_lock:
+            if not self.connect():
+                return {"synced_count": 0, "extensions_to_reboot": []}
+            return self._sync_users(extension_registry, extension_db, phone_provisioning, full)
 
+    def _sync_users(
+        self,
+        extension_registry: object | None,
+        extension_db: object | None,
+        phone_provisioning: object | None,
+        full: bool,
+    ) -> dict:
+        """Run one sync; the caller holds the sync lock and is connected"""
+        started = time.monotonic()
+        started_at = datetime.now(UTC)
         try:
             # Get user search base
             user_search_base = self.config.get(
@@ -226,358 +277,210 @@ def sync_users(
                 "integrations.active_directory.extension_attribute", "telephoneNumber"
             )
 
-            # Search for enabled users that have the extension attribute set
-            # Also search for ipPhone as a fallback if using telephoneNumber
-            if extension_attr == "telephoneNumber":
-                phone_filter = "(|(telephoneNumber=*)(ipPhone=*))"
-            else:
-                phone_filter = f"({extension_attr}=*)"
-            search_filter = f"(&(objectClass=user){phone_filter}(!(userAccountControl:1.2.840.113556.1.4.803:=2)))"
+            # Use database if available, otherwise fall back to config.yml
+            use_database = extension_db is not None
+            if not use_database:
+                # Get PBX config for updating extensions
+                from pbx.utils.config import Config
+
+                pbx_config = Config(self.config.get("config_file", "config.yml"))
+
+            # Read the high-water mark before searching, so anything changed
+            # while the search runs is fetched again next time
+            highest_usn, invocation_id = self._read_highest_usn()
+
+            state = self._load_sync_state(extension_db)
+            mode, reason = self._choose_sync_mode(state, user_search_base, full, invocation_id)
+            self.logger.info(
+                f"Starting {mode} Active Directory sync ({reason}) to "
+                f"{'database' if use_database else 'config.yml (database not available)'}"
+            )
 
             search_attrs = [
-                "sAMAccountName", "displayName", "mail",
-                "telephoneNumber", "ipPhone", "memberOf",
+                "sAMAccountName",
+                "displayName",
+                "mail",
+                "telephoneNumber",
+                "ipPhone",
+                "memberOf",
+                "userAccountControl",
             ]
             # Include the configured attribute if it's custom
             if extension_attr not in search_attrs:
                 search_attrs.append(extension_attr)
 
-            self.connection.search(
-                search_base=user_search_base,
-                search_filter=search_filter,
-                search_scope=SUBTREE,
-                attributes=search_attrs,
-            )
-            if not self.connection.entries:
-                return {"synced_count": 0, "extensions_to_reboot": []}
+            stats = {"pages": 0}
+            fetched: dict[str, dict] = {}
+            # Users that were disabled or lost their extension number
+            gone_usernames: set[str] = set()
+            fetched_count = 0
+            skipped_count = 0
+            for entry in self._paged_search(
+                user_search_base,
+                self._build_user_filter(extension_attr, mode, state),
+                search_attrs,
+                stats,
+            ):
+                fetched_count += 1
+                user = self._parse_user_entry(entry, extension_attr)
+                if user is None:
+                    skipped_count += 1
+                    continue
+                if user["disabled"] or not user["extension"]:
+                    skipped_count += 1
+                    gone_usernames.add(user["username"])
+                    continue
+                fetched[user["extension"]] = user
 
-            self.logger.info(f"Found {len(self.connection.entries)} users in Active Directory")
+            if mode == "full" and not fetched_count:
+                # An empty full result is far more likely a bad search base
+                # or filter than an empty directory; don't deactivate everyone
+                self.logger.warning("Active Directory search returned no users")
+                return {"synced_count": 0, "extensions_to_reboot": []}
 
-            # Use database if available, otherwise fall back to config.yml
-            use_database = extension_db is not None
+            self.logger.info(
+                f"Fetched {fetched_count} users from Active Directory in {stats['pages']} page(s)"
+            )
 
+            # Load the current extensions once instead of once per user
             if use_database:
-                self.logger.info("Syncing to database")
+                existing = {row["number"]: row for row in extension_db.get_all()}
             else:
-                self.logger.info("Syncing to config.yml (database not available)")
-                # Get PBX config for updating extensions
-                from pbx.utils.config import Config
-
-                pbx_config = Config(self.config.get("config_file", "config.yml"))
-
-            synced_count = 0
-            created_count = 0
-            updated_count = 0
-            skipped_count = 0
+                existing = {
+                    str(ext["number"]): ext
+                    for ext in pbx_config.get_extensions()
+                    if ext.get("number")
+                }
 
-            # Track extension numbers for deactivation check
-            ad_extension_numbers = set()
+            digests = dict(state.get("users", {})) if state else {}
+            creates: list[dict] = []
+            updates: list[dict] = []
+            renamed: list[str] = []
+            unchanged_count = 0
+            for number, user in fetched.items():
+                user["permissions"] = self._map_groups_to_permissions(user["groups"])
+                user["digest"] = self._user_digest(user)
+                row = existing.get(number)
+                if row is None:
+                    creates.append(user)
+                elif (
+                    row.get("ad_synced")
+                    and row.get("name") == user["name"]
+                    and digests.get(number) == user["digest"]
+                ):
+                    unchanged_count += 1
+                else:
+                    updates.append(user)
+                    if row.get("name") != user["name"]:
+                        renamed.append(number)
 
-            for entry in self.connection.entries:
-                try:
-                    username = (
-                        str(entry.sAMAccountName) if hasattr(entry, "sAMAccountName") else None
-                    )
-                    display_name = (
-                        str(entry.displayName) if hasattr(entry, "displayName") else username
-                    )
-                    email = str(entry.mail) if hasattr(entry, "mail") else None
-
-                    # Get extension number: try configured attribute, then
-                    # ipPhone, then telephoneNumber
-                    phone_number = None
-                    has_ext_attr = hasattr(entry, extension_attr)
-                    has_ipphone = hasattr(entry, "ipPhone")
-                    has_telephone = hasattr(entry, "telephoneNumber")
-                    ext_val = entry[extension_attr].value if has_ext_attr else None
-                    ip_val = entry.ipPhone.value if has_ipphone else None
-                    tel_val = entry.telephoneNumber.value if has_telephone else None
-                    if has_ext_attr and ext_val:
-                        phone_number = str(entry[extension_attr])
-                    elif has_ipphone and ip_val:
-                        phone_number = str(entry.ipPhone)
-                    elif has_telephone and tel_val:
-                        phone_number = str(entry.telephoneNumber)
-
-                    # Skip if no username or phone number
-                    if not username or not phone_number:
-                        skipped_count += 1
+            deactivate = []
+            if self.config.get("integrations.active_directory.deactivate_removed_users", True):
+                fetched_usernames = {user["username"] for user in fetched.values()}
+                for number, row in existing.items():
+                    if (
+                        number in fetched
+                        or not row.get("ad_synced")
+                        or row.get("allow_external") is False
+                        # Only numbers that could be AD-synced
+                        or not (number.isdigit() and len(number) >= 3)
+                    ):
                         continue
+                    # Incremental syncs only see users that changed: those
+                    # disabled, stripped of their number, or moved to another
+                    if (
+                        mode == "full"
+                        or row.get("ad_username") in gone_usernames
+                        or row.get("ad_username") in fetched_usernames
+                    ):
+                        deactivate.append(number)
 
-                    # Clean phone number to get just digits (remove spaces,
-                    # dashes, etc.)
-                    extension_number = re.sub(r"[^0-9]", "", phone_number)
-
-                    # Validate extension number
-                    if not extension_number or len(extension_number) < 3:
-                        self.logger.warning(
-                            f"Skipping user {username}: invalid extension number from phone {phone_number}"
-                        )
-                        skipped_count += 1
-                        continue
+            if use_database:
+                created, updated, deactivated, failed = self._write_database(
+                    extension_db, creates, updates, deactivate
+                )
+            else:
+                created, updated, deactivated, failed = self._write_config(
+                    pbx_config, creates, updates, deactivate
+                )
 
-                    ad_extension_numbers.add(extension_number)
+            if extension_registry:
+                self._apply_to_registry(extension_registry, created, updated, deactivated)
 
-                    # Get user's AD groups and map to PBX permissions
-                    user_groups = (
-                        [str(g) for g in entry.memberOf] if hasattr(entry, "memberOf") else []
+            for user in created + updated:
+                digests[user["extension"]] = user["digest"]
+                if user["permissions"]:
+                    perm_list = ", ".join([k for k, v in user["permissions"].items() if v])
+                    self.logger.info(
+                        f"Applied permissions to extension {user['extension']}: {perm_list}"
                     )
-                    permissions = self._map_groups_to_permissions(user_groups)
-
-                    # Check if extension exists (database or config depending
-                    # on mode)
-                    if use_database:
-                        existing_ext = extension_db.get(extension_number)
-                    else:
-                        existing_ext = pbx_config.get_extension(extension_number)
-
-                    if existing_ext:
-                        # Update existing extension
-                        self.logger.debug(
-                            f"Updating extension {extension_number} for user {username}"
-                        )
-
-                        if use_database:
-                            # Update in database with explicit parameters
-                            # Note: Only update known fields; database will
-                            # ignore unknown permission fields
-                            success = extension_db.update(
-                                number=extension_number,
-                                name=display_name,
-                                email=email,
-                                ad_synced=True,
-                                ad_username=username,
-                                # Don't update password - keep existing
-                            )
-
-                            # Store permissions in extension config if update succeeded
-                            # Database may not have columns for all permissions, so we store them
-                            # in the system_config table keyed by extension number
-                            if success and permissions and hasattr(extension_db, "set_config"):
-                                config_key = f"ext.{extension_number}.ad_permissions"
-                                try:
-                                    extension_db.set_config(
-                                        config_key,
-                                        permissions,
-                                        config_type="json",
-                                        updated_by="ad_sync",
-                                    )
-                                except (OSError, TypeError, ValueError) as perm_err:
-                                    self.logger.warning(
-                                        f"Could not persist AD permissions for "
-                                        f"extension {extension_number}: {perm_err}"
-                                    )
-                        else:
-                            # Update in config.yml
-                            success = pbx_config.update_extension(
-                                number=extension_number,
-                                name=display_name,
-                                email=email,
-                                # Don't update password - keep existing
-                            )
-                            if success:
-                                # Mark as AD-synced and apply permissions in
-                                # config
-                                existing_ext["ad_synced"] = True
-                                for perm_key, perm_value in permissions.items():
-                                    existing_ext[perm_key] = perm_value
-
-                        if success:
-                            updated_count += 1
-                            synced_count += 1
-
-                            # Update in live registry if provided
-                            if extension_registry:
-                                ext = extension_registry.get(extension_number)
-                                if ext:
-                                    ext.name = display_name
-                                    if email:
-                                        ext.config["email"] = email
-                                    ext.config["ad_synced"] = True
-                                    # Apply permissions to live registry
-                                    for perm_key, perm_value in permissions.items():
-                                        ext.config[perm_key] = perm_value
-
-                            # Log permissions if any were applied
-                            if permissions:
-                                perm_list = ", ".join([k for k, v in permissions.items() if v])
-                                self.logger.info(
-                                    f"Applied permissions to extension {extension_number}: {perm_list}"
-                                )
-                        else:
-                            self.logger.warning(f"Failed to update extension {extension_number}")
-                    else:
-                        # Create new extension with random 4-digit password
-                        # Note: 4-digit passwords meet user requirement but provide limited security
-                        # Consider using longer passwords for production
-                        # environments
-                        random_password = "".join([str(secrets.randbelow(10)) for _ in range(4)])
-
-                        # Log extension creation without exposing password
-                        self.logger.info(
-                            f"Creating extension {extension_number} for user {username}"
-                        )
-                        # Password can be retrieved from database or reset via
-                        # admin interface
-
-                        # Build extension data with permissions
-                        ext_data = {
-                            "number": extension_number,
-                            "name": display_name,
-                            "email": email or None,
-                            "password_hash": random_password,
-                            "allow_external": True,
-                            "voicemail_pin": None,
-                            "ad_synced": True,
-                            "ad_username": username,
-                        }
-
-                        if use_database:
-                            # Only pass parameters that extension_db.add() accepts
-                            db_fields = {
-                                "number", "name", "password_hash", "email",
-                                "allow_external", "voicemail_pin", "ad_synced",
-                                "ad_username", "is_admin",
-                            }
-                            db_data = {k: v for k, v in ext_data.items() if k in db_fields}
-                            success = extension_db.add(**db_data)
-                        else:
-                            # Add to config.yml
-                            success = pbx_config.add_extension(
-                                number=extension_number,
-                                name=display_name,
-                                email=email or "",
-                                password=random_password,
-                                allow_external=True,
-                            )
-                            if success:
-                                # Mark newly created extension as AD-synced and
-                                # apply permissions
-                                new_ext_config = pbx_config.get_extension(extension_number)
-                                if new_ext_config:
-                                    new_ext_config["ad_synced"] = True
-                                    for perm_key, perm_value in permissions.items():
-                                        new_ext_config[perm_key] = perm_value
-
-                        if success:
-                            created_count += 1
-                            synced_count += 1
-
-                            # Add to live registry if provided
-                            if extension_registry:
-                                from pbx.features.extensions import Extension
-
-                                ext_config = {
-                                    "number": extension_number,
-                                    "name": display_name,
-                                    "email": email or "",
-                                    "password": random_password,
-                                    "allow_external": True,
-                                    "ad_synced": True,
-                                }
-                                # Apply permissions to config
-                                ext_config.update(permissions)
-
-                                new_ext = Extension(extension_number, display_name, ext_config)
-                                extension_registry.extensions[extension_number] = new_ext
-
-                            # Log permissions if any were applied
-                            if permissions:
-                                perm_list = ", ".join([k for k, v in permissions.items() if v])
-                                self.logger.info(
-                                    f"Applied permissions to new extension {extension_number}: {perm_list}"
-                                )
-                        else:
-                            self.logger.warning(f"Failed to create extension {extension_number}")
-
-                except (KeyError, TypeError, ValueError) as e:
-                    user_desc = username or "unknown"
-                    self.logger.warning(f"Error syncing user {user_desc}: {e}")
-                    continue
 
-            # Deactivate extensions for users removed from AD
-            deactivated_count = 0
-            if self.config.get("integrations.active_directory.deactivate_removed_users", True):
-                self.logger.info("Checking for removed users to deactivate...")
-
-                if use_database:
-                    # Get all AD-synced extensions from database
-                    all_extensions = extension_db.get_ad_synced()
-                else:
-                    # Get all extensions from config
-                    all_extensions = pbx_config.get_extensions()
-
-                for ext in all_extensions:
-                    ext_number = ext.get("number")
-                    # Only check extensions that could be AD-synced (numeric,
-                    # reasonable length)
-                    if (
-                        ext_number
-                        and ext_number.isdigit()
-                        and len(ext_number) >= 3
-                        and ext_number not in ad_extension_numbers
-                        and ext.get("ad_synced", False)
-                    ):
-                        self.logger.info(
-                            f"Deactivating extension {ext_number} (user removed from AD)"
-                        )
-                        # Mark as inactive instead of deleting
-                        # Keep ad_synced=True so we know it was
-                        # previously managed by AD
-
-                        if use_database:
-                            extension_db.update(number=ext_number, allow_external=False)
-                        else:
-                            pbx_config.update_extension(number=ext_number, allow_external=False)
-
-                        if extension_registry:
-                            registry_ext = extension_registry.get(ext_number)
-                            if registry_ext:
-                                registry_ext.config["allow_external"] = False
-                                # Keep ad_synced=True to maintain
-                                # history
-                        deactivated_count += 1
-
-            # Save all changes (only needed for config.yml mode)
-            if not use_database:
-                pbx_config.save()
+            # A failed write leaves the high-water mark where it was so the
+            # same changes are fetched again
+            if not failed:
+                self._save_sync_state(
+                    extension_db,
+                    {
+                        "server": self.ldap_server,
+                        "search_base": user_search_base,
+                        "usn": highest_usn,
+                        "invocation_id": invocation_id,
+                        "when_changed": (
+                            started_at - timedelta(seconds=WHEN_CHANGED_OVERLAP)
+                        ).strftime("%Y%m%d%H%M%S.0Z"),
+                        "last_full_sync": started_at.isoformat()
+                        if mode == "full"
+                        else state.get("last_full_sync"),
+                        "last_sync": started_at.isoformat(),
+                        "users": digests,
+                    },
+                )
 
+            updated_numbers = {user["extension"] for user in updated}
+            changed_names = {user["extension"] for user in created} | {
+                number for number in renamed if number in updated_numbers
+            }
+            self.last_sync_summary = {
+                "mode": mode,
+                "reason": reason,
+                "started_at": started_at.isoformat(),
+                "duration": round(time.monotonic() - started, 3),
+                "pages": stats["pages"],
+                "fetched": fetched_count,
+                "created": sorted(user["extension"] for user in created),
+                "updated": sorted(updated_numbers),
+                "renamed": sorted(changed_names),
+                "deactivated": sorted(deactivated),
+                "unchanged": unchanged_count,
+                "skipped": skipped_count,
+                "failed": failed,
+            }
+            synced_count = len(created) + len(updated)
             self.logger.info(
-                "User synchronization complete: "
-                f"{synced_count} total, {created_count} created, {updated_count} updated, "
-                f"{deactivated_count} deactivated, {skipped_count} skipped"
+                f"User synchronization complete ({mode}): {len(created)} created, "
+                f"{len(updated)} updated, {unchanged_count} unchanged, "
+                f"{len(deactivated)} deactivated, {skipped_count} skipped"
             )
 
-            # Automatically trigger phone reboots if provisioning is available and users were updated
-            # This ensures phones fetch fresh config with updated display names
-            # from AD
-            if phone_provisioning and (updated_count > 0 or created_count > 0):
-                self.logger.info(
-                    "Auto-provisioning: Automatically triggering phone reboots to update display names from AD sync..."
-                )
-
-                # Find extensions that have provisioned devices and were updated
-                # Use set for O(1) lookup performance with many devices
-                ad_extension_set = set(ad_extension_numbers)
-                devices_to_reboot = [
+            # Reboot phones whose display name changed, so they fetch fresh
+            # config; permission-only changes don't affect the phone
+            extensions_to_reboot = []
+            if phone_provisioning and changed_names:
+                extensions_to_reboot = [
                     device.extension_number
                     for device in phone_provisioning.get_all_devices()
-                    if device.extension_number in ad_extension_set
+                    if device.extension_number in changed_names
                 ]
-
-                if devices_to_reboot:
+                if extensions_to_reboot:
                     self.logger.info(
-                        f"Auto-provisioning: Will reboot {len(devices_to_reboot)} phones to apply AD name changes"
+                        f"Auto-provisioning: Will reboot {len(extensions_to_reboot)} phones to apply AD name changes"
                     )
-                    # Store the extensions to reboot for later trigger
-                    # This will be picked up by the sync caller to trigger
-                    # actual reboots
-                    return {"synced_count": synced_count, "extensions_to_reboot": devices_to_reboot}
-                self.logger.info(
-                    "Auto-provisioning: No provisioned devices found for updated extensions"
-                )
 
-            return {"synced_count": synced_count, "extensions_to_reboot": []}
+            return {
+                "synced_count": synced_count,
+                "extensions_to_reboot": extensions_to_reboot,
+                "summary": self.last_sync_summary,
+            }
 
         except (KeyError, LDAPException, TypeError, ValueError) as e:
             self.logger.error(f"Error synchronizing users from Active Directory: {e}")
@@ -586,6 +489,391 @@ def sync_users(
             traceback.print_exc()
             return {"synced_count": 0, "extensions_to_reboot": []}
 
+    def _choose_sync_mode(
+        self,
+        state: dict | None,
+        search_base: str | None,
+        full: bool,
+        invocation_id: str | None = None,
+    ) -> tuple[str, str]:
+        """Pick full or incremental sync; returns (mode, reason)"""
+        if full:
+            return "full", "requested"
+        if self.sync_mode == "full":
+            return "full", "sync_mode is full"
+        if not state or not (state.get("usn") or state.get("when_changed")):
+            return "full", "no previous sync"
+        if state.get("server") != self.ldap_server or state.get("search_base") != search_base:
+            return "full", "server or search base changed"
+        # USNs are local to one domain controller: after a failover behind
+        # the same server name the saved USN means nothing
+        if state.get("usn") and state.get("invocation_id") != invocation_id:
+            return "full", "domain controller changed"
+        if self.full_sync_interval_hours > 0:
+            try:
+                last_full = datetime.fromisoformat(state["last_full_sync"])
+            except (KeyError, TypeError, ValueError):
+                return "full", "no previous full sync"
+            if datetime.now(UTC) - last_full >= timedelta(hours=self.full_sync_interval_hours):
+                return "full", "full sync interval elapsed"
+        return "incremental", "changes since last sync"
+
+    @staticmethod
+    def _build_user_filter(extension_attr: str, mode: str, state: dict | None) -> str:
+        """Build the LDAP filter for a full or incremental user search"""
+        # Search for users that have the extension attribute set, with
+        # ipPhone as a fallback if using telephoneNumber
+        if extension_attr == "telephoneNumber":
+            phone_filter = "(|(telephoneNumber=*)(ipPhone=*))"
+        else:
+            phone_filter = f"({extension_attr}=*)"
+
+        if mode == "full":
+            return f"(&(objectClass=user){phone_filter}(!(userAccountControl:1.2.840.113556.1.4.803:=2)))"
+
+        # Incremental searches also return users that were disabled or lost
+        # their number since the last sync, so their extensions can be
+        # deactivated
+        if state.get("usn"):
+            changed = f"(uSNChanged>={int(state['usn']) + 1})"
+        else:
+            changed = f"(whenChanged>={state['when_changed']})"
+        return f"(&(objectClass=user){changed})"
+
+    def _read_highest_usn(self) -> tuple[int | None, str | None]:
+        """
+        Read highestCommittedUSN and the domain controller's invocationId
+
+        Returns:
+            (usn, invocation_id); either is None if the server doesn't report it
+        """
+        usn = invocation_id = None
+        try:
+            self.connection.search(
+                search_base="",
+                search_filter="(objectClass=*)",
+                search_scope=BASE,
+                attributes=["highestCommittedUSN", "dsServiceName"],
+            )
+            if not self.connection.entries:
+                return None, None
+            root = self.connection.entries[0]
+            usn = int(str(root.highestCommittedUSN))
+            # invocationId lives on the DC's NTDS Settings object
+            self.connection.search(
+                search_base=str(root.dsServiceName),
+                search_filter="(objectClass=*)",
+                search_scope=BASE,
+                attributes=["invocationId"],
+            )
+            if self.connection.entries:
+                invocation_id = str(self.connection.entries[0].invocationId)
+        except (AttributeError, IndexError, KeyError, LDAPException, TypeError, ValueError) as e:
+            self.logger.debug(f"Could not read highestCommittedUSN/invocationId: {e}")
+        return usn, invocation_id
+
+    def _paged_search(
+        self, search_base: str | None, search_filter: str, attributes: list[str], stats: dict
+    ) -> Iterator:
+        """Yield search entries one server page at a time"""
+        cookie = None
+        while True:
+            self.connection.search(
+                search_base=search_base,
+                search_filter=search_filter,
+                search_scope=SUBTREE,
+                attributes=attributes,
+                paged_size=self.page_size,
+                paged_cookie=cookie,
+            )
+            stats["pages"] += 1
+            # The next search replaces connection.entries
+            yield from list(self.connection.entries)
+
+            result = self.connection.result
+            try:
+                cookie = result["controls"][PAGED_RESULTS_OID]["value"]["cookie"]
+            except (KeyError, TypeError):
+                cookie = None
+            if not cookie or not isinstance(cookie, bytes):
+                return
+
+    def _parse_user_entry(self, entry: object, extension_attr: str) -> dict | None:
+        """Extract the synced fields from a user entry; None if it has no username"""
+        username = str(entry.sAMAccountName) if hasattr(entry, "sAMAccountName") else None
+        if not username:
+            return None
+        display_name = str(entry.displayName) if hasattr(entry, "displayName") else username
+        email = str(entry.mail) if hasattr(entry, "mail") else None
+
+        disabled = False
+        if hasattr(entry, "userAccountControl"):
+            try:
+                disabled = bool(int(str(entry.userAccountControl)) & ACCOUNT_DISABLED)
+            except ValueError:
+                disabled = False
+
+        # Get extension number: try configured attribute, then ipPhone,
+        # then telephoneNumber
+        phone_number = None
+        has_ext_attr = hasattr(entry, extension_attr)
+        has_ipphone = hasattr(entry, "ipPhone")
+        has_telephone = hasattr(entry, "telephoneNumber")
+        ext_val = entry[extension_attr].value if has_ext_attr else None
+        ip_val = entry.ipPhone.value if has_ipphone else None
+        tel_val = entry.telephoneNumber.value if has_telephone else None
+        if has_ext_attr and ext_val:
+            phone_number = str(entry[extension_attr])
+        elif has_ipphone and ip_val:
+            phone_number = str(entry.ipPhone)
+        elif has_telephone and tel_val:
+            phone_number = str(entry.telephoneNumber)
+
+        # Clean phone number to get just digits (remove spaces, dashes, etc.)
+        extension_number = re.sub(r"[^0-9]", "", phone_number) if phone_number else ""
+        if phone_number and len(extension_number) < 3:
+            self.logger.warning(
+                f"Skipping user {username}: invalid extension number from phone {phone_number}"
+            )
+            extension_number = ""
+
+        return {
+            "username": username,
+            "name": display_name,
+            "email": email,
+            "extension": extension_number or None,
+            "groups": [str(g) for g in entry.memberOf] if hasattr(entry, "memberOf") else [],
+            "disabled": disabled,
+        }
+
+    @staticmethod
+    def _user_digest(user: dict) -> str:
+        """Fingerprint of the fields a sync writes, to skip unchanged users"""
+        data = [user["name"], user["email"], user["username"], sorted(user["permissions"].items())]
+        return hashlib.sha256(json.dumps(data).encode()).hexdigest()[:16]
+
+    def _write_database(
+        self, extension_db: object, creates: list[dict], updates: list[dict], deactivate: list[str]
+    ) -> tuple[list[dict], list[dict], list[str], bool]:
+        """Write sync changes in batches; returns what was written and whether anything failed"""
+        failed = False
+        if creates:
+            # Random 4-digit password; can be reset via the admin interface
+            rows = [
+                {
+                    "number": user["extension"],
+                    "name": user["name"],
+                    "email": user["email"] or None,
+                    "password_hash": "".join([str(secrets.randbelow(10)) for _ in range(4)]),
+                    "allow_external": True,
+                    "ad_synced": True,
+                    "ad_username": user["username"],
+                }
+                for user in creates
+            ]
+            for user, row in zip(creates, rows, strict=True):
+                user["password"] = row["password_hash"]
+            if not extension_db.add_many(rows):
+                self.logger.warning(f"Failed to create {len(creates)} extensions from AD")
+                creates, failed = [], True
+
+        if updates:
+            rows = [
+                {
+                    "number": user["extension"],
+                    "name": user["name"],
+                    "email": user["email"],
+                    "ad_username": user["username"],
+                }
+                for user in updates
+            ]
+            if not extension_db.update_ad_fields_many(rows):
+                self.logger.warning(f"Failed to update {len(updates)} extensions from AD")
+                updates, failed = [], True
+
+        # Permissions don't all have columns, so they are stored in
+        # system_config keyed by extension number
+        permissions = {
+            f"ext.{user['extension']}.ad_permissions": user["permissions"]
+            for user in creates + updates
+            if user["permissions"]
+        }
+        if permissions and not extension_db.set_config_many(
+            permissions, config_type="json", updated_by="ad_sync"
+        ):
+            self.logger.warning("Could not persist AD permissions")
+            failed = True
+
+        if deactivate:
+            self.logger.info(f"Deactivating extensions removed from AD: {', '.join(deactivate)}")
+            # Mark as inactive instead of deleting; keep ad_synced=True so we
+            # know it was previously managed by AD
+            if not extension_db.set_allow_external_many(deactivate, False):
+                self.logger.warning("Failed to deactivate extensions removed from AD")
+                deactivate, failed = [], True
+
+        return creates, updates, deactivate, failed
+
+    def _write_config(
+        self, pbx_config: object, creates: list[dict], updates: list[dict], deactivate: list[str]
+    ) -> tuple[list[dict], list[dict], list[str], bool]:
+        """Apply sync changes to config.yml and save it once"""
+        created, updated = [], []
+        for user in updates:
+            number = user["extension"]
+            if pbx_config.update_extension(number=number, name=user["name"], email=user["email"]):
+                ext = pbx_config.get_extension(number)
+                if ext is not None:
+                    # Mark as AD-synced and apply permissions in config
+                    ext["ad_synced"] = True
+                    ext["ad_username"] = user["username"]
+                    ext.update(user["permissions"])
+                updated.append(user)
+            else:
+                self.logger.warning(f"Failed to update extension {number}")
+
+        for user in creates:
+            number = user["extension"]
+            user["password"] = "".join([str(secrets.randbelow(10)) for _ in range(4)])
+            if pbx_config.add_extension(
+                number=number,
+                name=user["name"],
+                email=user["email"] or "",
+                password=user["password"],
+                allow_external=True,
+            ):
+                ext = pbx_config.get_extension(number)
+                if ext is not None:
+                    ext["ad_synced"] = True
+                    ext["ad_username"] = user["username"]
+                    ext.update(user["permissions"])
+                created.append(user)
+            else:
+                self.logger.warning(f"Failed to create extension {number}")
+
+        for number in deactivate:
+            self.logger.info(f"Deactivating extension {number} (user removed from AD)")
+            pbx_config.update_extension(number=number, allow_external=False)
+
+        pbx_config.save()
+        failed = len(created) < len(creates) or len(updated) < len(updates)
+        return created, updated, deactivate, failed
+
+    @staticmethod
+    def _apply_to_registry(
+        extension_registry: object, created: list[dict], updated: list[dict], deactivated: list[str]
+    ) -> None:
+        """Apply written sync changes to the live extension registry"""
+        from pbx.features.extensions import Extension
+
+        for user in updated:
+            ext = extension_registry.get(user["extension"])
+            if ext:
+                ext.name = user["name"]
+                if user["email"]:
+                    ext.config["email"] = user["email"]
+                ext.config["ad_synced"] = True
+                ext.config.update(user["permissions"])
+
+        for user in created:
+            ext_config = {
+                "number": user["extension"],
+                "name": user["name"],
+                "email": user["email"] or "",
+                "password": user.get("password"),
+                "allow_external": True,
+                "ad_synced": True,
+            }
+            ext_config.update(user["permissions"])
+            extension_registry.extensions[user["extension"]] = Extension(
+                user["extension"], user["name"], ext_config
+            )
+
+        for number in deactivated:
+            ext = extension_registry.get(number)
+            if ext:
+                # Keep ad_synced=True to maintain history
+                ext.config["allow_external"] = False
+
+    def _load_sync_state(self, extension_db: object | None) -> dict | None:
+        """Load the previous sync's high-water mark and user fingerprints"""
+        try:
+            if extension_db is not None:
+                state = extension_db.get_config(SYNC_STATE_CONFIG_KEY)
+            else:
+                with open(self.sync_state_file, encoding="utf-8") as f:
+                    state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.warning(f"Could not load AD sync state: {e}")
+            return None
+        return state if isinstance(state, dict) else None
+
+    def _save_sync_state(self, extension_db: object | None, state: dict) -> None:
+        """Persist sync state next to the extensions it describes"""
+        try:
+            if extension_db is not None:
+                extension_db.set_config(
+                    SYNC_STATE_CONFIG_KEY, state, config_type="json", updated_by="ad_sync"
+                )
+                return
+            path = Path(self.sync_state_file)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            tmp_path.replace(path)
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.warning(f"Could not save AD sync state: {e}")
+
+    def start_background_sync(
+        self,
+        periodic_sync: Callable[[], object],
+        interval: float = 0,
+        initial_sync: Callable[[], object] | None = None,
+    ) -> None:
+        """
+        Run syncs on a background thread so startup doesn't wait for them
+
+        Args:
+            periodic_sync: Callable run every interval seconds
+            interval: Seconds between syncs (0 disables periodic syncs)
+            initial_sync: Optional callable run once right away
+        """
+        if self._background_thread and self._background_thread.is_alive():
+            return
+        self._background_stop.clear()
+        self._background_thread = threading.Thread(
+            target=self._background_loop,
+            args=(periodic_sync, interval, initial_sync),
+            name="ad-sync",
+            daemon=True,
+        )
+        self._background_thread.start()
+
+    def stop_background_sync(self) -> None:
+        """Stop scheduling background syncs"""
+        self._background_stop.set()
+
+    def _background_loop(
+        self,
+        periodic_sync: Callable[[], object],
+        interval: float,
+        initial_sync: Callable[[], object] | None,
+    ) -> None:
+        """Background sync worker: run the initial sync, then repeat on the interval"""
+        run = initial_sync
+        while not self._background_stop.is_set():
+            if run is not None:
+                try:
+                    run()
+                except Exception as e:
+                    self.logger.error(f"Background Active Directory sync failed: {e}")
+            if interval <= 0 or self._background_stop.wait(interval):
+                return
+            run = periodic_sync
+
     def _map_groups_to_permissions(self, user_groups: list[str]) -> dict[str, bool]:
         """
         Map AD groups to PBX permissions based on configuration
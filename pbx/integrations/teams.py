@@ -219,17 +219,27 @@ def route_call_to_teams(
         # If PBX core provided, use trunk system to route the call
         if pbx_core and hasattr(pbx_core, "trunk_system"):
             try:
-                # Look for a Teams-specific trunk or use default
+                # Look for a Teams trunk that is up and has a cached address;
+                # call setup never waits on DNS
                 trunk = None
+                address = None
                 for trunk_obj in pbx_core.trunk_system.trunks.values():
                     if (
                         "teams" in trunk_obj.name.lower()
                         or self.direct_routing_domain in trunk_obj.host
                     ):
-                        trunk = trunk_obj
-                        break
+                        if not trunk_obj.can_make_call():
+                            continue
+                        address = trunk_obj.resolve_address()
+                        if address:
+                            trunk = trunk_obj
+                            break
+                        self.logger.warning(
+                            f"Teams trunk {trunk_obj.name}: {trunk_obj.host} "
+                            "is not resolved yet, trying the next trunk"
+                        )
 
-                if trunk and trunk.can_make_call():
+                if trunk:
                     self.logger.info(f"Using SIP trunk '{trunk.name}' for Teams call")
 
                     # Allocate channel
@@ -279,7 +289,7 @@ def route_call_to_teams(
                         )
 
                         # Send INVITE to the Teams SBC endpoint
-                        dest_addr = (trunk.host, trunk.port)
+                        dest_addr = (address, trunk.port)
                         pbx_core.sip_server._send_message(invite_msg.build(), dest_addr)
 
                         # Create call record for tracking
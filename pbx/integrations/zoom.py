@@ -229,14 +229,24 @@ def route_to_zoom_phone(
         # If PBX core provided, use trunk system to route the call
         if pbx_core and hasattr(pbx_core, "trunk_system"):
             try:
-                # Look for a Zoom Phone trunk
+                # Look for a Zoom Phone trunk that is up and has a cached
+                # address; call setup never waits on DNS
                 trunk = None
+                address = None
                 for trunk_obj in pbx_core.trunk_system.trunks.values():
                     if "zoom" in trunk_obj.name.lower() or zoom_phone_domain in trunk_obj.host:
-                        trunk = trunk_obj
-                        break
+                        if not trunk_obj.can_make_call():
+                            continue
+                        address = trunk_obj.resolve_address()
+                        if address:
+                            trunk = trunk_obj
+                            break
+                        self.logger.warning(
+                            f"Zoom Phone trunk {trunk_obj.name}: {trunk_obj.host} "
+                            "is not resolved yet, trying the next trunk"
+                        )
 
-                if trunk and trunk.can_make_call():
+                if trunk:
                     self.logger.info(f"Using SIP trunk '{trunk.name}' for Zoom Phone call")
 
                     # Allocate channel
@@ -281,7 +291,7 @@ def route_to_zoom_phone(
                         )
 
                         # Send INVITE to the Zoom Phone SIP endpoint
-                        dest_addr = (trunk.host, trunk.port)
+                        dest_addr = (address, trunk.port)
                         pbx_core.sip_server._send_message(invite_msg.build(), dest_addr)
 
                         # Create call record for tracking
@@ -6,24 +6,30 @@
 from __future__ import annotations
 
 import contextlib
+import io
 import random
 import socket
 import struct
 import threading
 import time
 from pathlib import Path
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, BinaryIO
 
+from pbx.rtp.port_pool import RTPPortPool
 from pbx.utils.audio import (
     WAV_FORMAT_ALAW,
     WAV_FORMAT_G722,
     WAV_FORMAT_PCM,
     WAV_FORMAT_ULAW,
 )
-from pbx.utils.logger import get_logger
+from pbx.utils.logger import get_logger, get_rate_limited_logger
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from pbx.core.call import CallManager
     from pbx.features.qos_monitoring import QoSMetrics, QoSMonitor
+    from pbx.rtp.jitter_buffer import JitterBuffer
     from pbx.rtp.rfc2833 import RFC2833Receiver
 
 # Type alias for network address tuples
@@ -205,6 +211,10 @@ def __init__(
         port_range_start: int = 10000,
         port_range_end: int = 20000,
         qos_monitor: QoSMonitor | None = None,
+        call_manager: CallManager | None = None,
+        prebind: int = 0,
+        quarantine_seconds: float = 2.0,
+        leak_check_interval: float = 60.0,
     ) -> None:
         """
         Initialize RTP relay.
@@ -213,25 +223,68 @@ def __init__(
             port_range_start: Start of port range for RTP.
             port_range_end: End of port range for RTP.
             qos_monitor: Optional QoS monitor for tracking call quality.
+            call_manager: Optional call manager, checked for leaked ports.
+            prebind: Number of port pairs to keep bound ahead of demand.
+            quarantine_seconds: Time a released port rests before reuse.
+            leak_check_interval: Seconds between leaked port checks.
         """
         self.port_range_start: int = port_range_start
         self.port_range_end: int = port_range_end
         self.active_relays: dict[str, dict[str, Any]] = {}
         self.logger = get_logger()
-        self.port_pool: list[int] = list(
-            range(port_range_start, port_range_end, 2)
-        )  # Even ports for RTP
+        self.port_pool: RTPPortPool = RTPPortPool(
+            port_range_start,
+            port_range_end,
+            prebind=prebind,
+            quarantine_seconds=quarantine_seconds,
+        )
         self.qos_monitor: QoSMonitor | None = qos_monitor
-        # Lock for thread-safe port allocation/release.  Multiple SIP threads
-        # can call allocate_relay/release_relay concurrently for different calls.
-        self._pool_lock: threading.Lock = threading.Lock()
+        self.call_manager: CallManager | None = call_manager
+        self.leak_check_interval: float = leak_check_interval
+        # Lock for active_relays.  Multiple SIP threads can call
+        # allocate_relay/release_relay concurrently for different calls.
+        self._relay_lock: threading.Lock = threading.Lock()
+        self._maintaining: bool = False
+        self._maintenance_thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Start the port pool maintenance thread (pre-binding and leak checks)."""
+        if self._maintenance_thread:
+            return
+        self._maintaining = True
+        self._maintenance_thread = threading.Thread(
+            target=self._maintenance_loop, daemon=True, name="rtp-port-pool"
+        )
+        self._maintenance_thread.start()
+
+    def stop(self) -> None:
+        """Stop the maintenance thread and close the pre-bound sockets."""
+        self._maintaining = False
+        self.port_pool.demand.set()
+        if self._maintenance_thread:
+            self._maintenance_thread.join(timeout=2.0)
+            self._maintenance_thread = None
+        self.port_pool.close()
+
+    def _maintenance_loop(self) -> None:
+        """Refill pre-bound sockets on demand and look for leaked ports periodically."""
+        next_leak_check = time.monotonic() + self.leak_check_interval
+        while self._maintaining:
+            try:
+                self.port_pool.maintain()
+                if time.monotonic() >= next_leak_check:
+                    next_leak_check = time.monotonic() + self.leak_check_interval
+                    self.reclaim_leaks()
+            except Exception as e:
+                self.logger.error(f"RTP port pool maintenance error: {e}")
+            self.port_pool.demand.wait(1.0)
 
     def allocate_relay(self, call_id: str) -> tuple[int, int] | None:
         """
         Allocate RTP relay for a call.
 
-        Thread-safe: uses an internal lock so concurrent call setups
-        from different SIP threads cannot allocate the same port.
+        Thread-safe: the port pool hands each port pair to one caller only,
+        with its sockets already bound.
 
         Args:
             call_id: Unique call identifier.
@@ -239,18 +292,23 @@ def allocate_relay(self, call_id: str) -> tuple[int, int] | None:
         Returns:
             Tuple of (rtp_port, rtcp_port) or None if allocation failed.
         """
-        with self._pool_lock:
-            if not self.port_pool:
-                self.logger.error("No available ports for RTP relay")
-                return None
-
-            rtp_port = self.port_pool.pop(0)
-
-        rtcp_port = rtp_port + 1
-
-        handler = RTPRelayHandler(rtp_port, call_id, qos_monitor=self.qos_monitor)
+        lease = self.port_pool.acquire(call_id, bind=True)
+        if lease is None:
+            self.logger.error("No available ports for RTP relay")
+            return None
+
+        rtp_port = lease.rtp_port
+        rtcp_port = lease.rtcp_port
+
+        handler = RTPRelayHandler(
+            rtp_port,
+            call_id,
+            qos_monitor=self.qos_monitor,
+            sock=lease.rtp_socket,
+            rtcp_socket=lease.rtcp_socket,
+        )
         if handler.start():
-            with self._pool_lock:
+            with self._relay_lock:
                 self.active_relays[call_id] = {
                     "rtp_port": rtp_port,
                     "rtcp_port": rtcp_port,
@@ -260,10 +318,33 @@ def allocate_relay(self, call_id: str) -> tuple[int, int] | None:
                 f"Allocated RTP relay for call {call_id}: ports {rtp_port}/{rtcp_port}"
             )
             return (rtp_port, rtcp_port)
-        with self._pool_lock:
-            self.port_pool.insert(0, rtp_port)
+        self.port_pool.release(rtp_port)
         return None
 
+    def acquire_port(self, call_id: str) -> int | None:
+        """
+        Take an RTP port without a relay, for media the PBX terminates itself.
+
+        The port is left unbound for the caller's player or bridge to bind.
+
+        Args:
+            call_id: Call the port belongs to.
+
+        Returns:
+            RTP port (RTCP is the next port up), or None if none are free.
+        """
+        lease = self.port_pool.acquire(call_id)
+        return lease.rtp_port if lease else None
+
+    def release_port(self, rtp_port: int) -> None:
+        """
+        Return a port taken with acquire_port().
+
+        Args:
+            rtp_port: RTP port to return.
+        """
+        self.port_pool.release(rtp_port)
+
     def set_endpoints(self, call_id: str, endpoint_a: AddrTuple, endpoint_b: AddrTuple) -> None:
         """
         Set both endpoints for RTP relay.
@@ -278,24 +359,125 @@ def set_endpoints(self, call_id: str, endpoint_a: AddrTuple, endpoint_b: AddrTup
             handler.set_endpoints(endpoint_a, endpoint_b)
             self.logger.info(f"RTP relay {call_id}: {endpoint_a} <-> {endpoint_b}")
 
+    def add_audio_tap(self, call_id: str, tap: Callable[[str, bytes], None]) -> bool:
+        """
+        Feed a call's relayed RTP packets to a listener.
+
+        Args:
+            call_id: Call identifier.
+            tap: Callable(leg, packet) invoked on the relay thread for every
+                packet relayed; leg is "a" (caller side) or "b" (callee side).
+
+        Returns:
+            True if the call has a relay to tap.
+        """
+        with self._relay_lock:
+            relay = self.active_relays.get(call_id)
+        if relay is None:
+            return False
+        relay["handler"].add_audio_tap(tap)
+        return True
+
+    def remove_audio_tap(self, call_id: str, tap: Callable[[str, bytes], None]) -> None:
+        """
+        Stop feeding a call's RTP packets to a listener.
+
+        Args:
+            call_id: Call identifier.
+            tap: Callable previously passed to add_audio_tap().
+        """
+        with self._relay_lock:
+            relay = self.active_relays.get(call_id)
+        if relay is not None:
+            relay["handler"].remove_audio_tap(tap)
+
+    def send_to_leg(self, call_id: str, leg: str, packet: bytes) -> bool:
+        """
+        Send a locally generated RTP packet to one side of a call.
+
+        Args:
+            call_id: Call identifier.
+            leg: "a" (caller side) or "b" (callee side).
+            packet: Complete RTP packet.
+
+        Returns:
+            True if the packet was sent.
+        """
+        with self._relay_lock:
+            relay = self.active_relays.get(call_id)
+        if relay is None:
+            return False
+        return relay["handler"].send_to_leg(leg, packet)
+
+    def transfer_relay(self, call_id: str, new_call_id: str) -> bool:
+        """
+        Move a relay and its ports to another call (blind transfer).
+
+        Args:
+            call_id: Call that owns the relay now.
+            new_call_id: Call that takes it over.
+
+        Returns:
+            True if the call had a relay to move.
+        """
+        with self._relay_lock:
+            relay = self.active_relays.pop(call_id, None)
+            if relay is None:
+                return False
+            self.active_relays[new_call_id] = relay
+        self.port_pool.transfer(relay["rtp_port"], new_call_id)
+        return True
+
     def release_relay(self, call_id: str) -> None:
         """
         Release RTP relay for a call.
 
-        Thread-safe: uses an internal lock for port pool access.
+        Thread-safe: uses an internal lock for relay bookkeeping.
 
         Args:
             call_id: Call identifier.
         """
-        with self._pool_lock:
-            if call_id not in self.active_relays:
-                return
-            relay = self.active_relays[call_id]
-            relay["handler"].stop()
-            self.port_pool.append(relay["rtp_port"])
-            self.port_pool.sort()
-            del self.active_relays[call_id]
-            self.logger.info(f"Released RTP relay for call {call_id}")
+        with self._relay_lock:
+            relay = self.active_relays.pop(call_id, None)
+        if relay is None:
+            return
+        relay["handler"].stop()
+        self.port_pool.release(relay["rtp_port"])
+        self.logger.info(f"Released RTP relay for call {call_id}")
+
+    def reclaim_leaks(self, min_age: float = 60.0) -> list[int]:
+        """
+        Release ports still held by calls the call manager no longer knows.
+
+        A port leaks when a call ends on a path that never releases its
+        media; without this the pool drains one port at a time.
+
+        Args:
+            min_age: Leave ports younger than this alone, so calls still
+                being set up (allocated but not yet created) are skipped.
+
+        Returns:
+            RTP ports that were reclaimed.
+        """
+        if self.call_manager is None:
+            return []
+        reclaimed: list[int] = []
+        for lease in self.port_pool.find_leaks(self.call_manager.active_calls, min_age):
+            with self._relay_lock:
+                relay = self.active_relays.get(lease.owner)
+                if relay and relay["rtp_port"] == lease.rtp_port:
+                    del self.active_relays[lease.owner]
+                else:
+                    relay = None
+            if relay is not None:
+                relay["handler"].stop()
+            # Skipped if the call released the port since find_leaks() ran
+            if self.port_pool.reclaim(lease):
+                self.logger.warning(
+                    f"Reclaimed RTP port {lease.rtp_port} leaked by ended call {lease.owner}"
+                )
+                reclaimed.append(lease.rtp_port)
+        return reclaimed
 
 
 class RTPRelayHandler:
@@ -306,6 +488,8 @@ def __init__(
         local_port: int,
         call_id: str,
         qos_monitor: QoSMonitor | None = None,
+        sock: socket.socket | None = None,
+        rtcp_socket: socket.socket | None = None,
     ) -> None:
         """
         Initialize RTP relay handler.
@@ -314,11 +498,17 @@ def __init__(
             local_port: Local port to bind to.
             call_id: Call identifier for logging.
             qos_monitor: Optional QoS monitor for tracking call quality.
+            sock: Socket already bound to local_port (from the port pool).
+            rtcp_socket: Socket bound to the RTCP port, held until stop().
         """
         self.local_port: int = local_port
         self.call_id: str = call_id
         self.logger = get_logger()
-        self.socket: socket.socket | None = None
+        # Per-packet debug output, shared by all relays and capped so a flood
+        # can't swamp the log; warnings and errors still go to self.logger
+        self.packet_logger = get_rate_limited_logger("RTP.relay", rate=20)
+        self.socket: socket.socket | None = sock
+        self.rtcp_socket: socket.socket | None = rtcp_socket
         self.running: bool = False
         self.endpoint_a: AddrTuple | None = None  # (host, port) - Expected endpoint from SDP
         self.endpoint_b: AddrTuple | None = None  # (host, port) - Expected endpoint from SDP
@@ -332,6 +522,9 @@ def __init__(
         # numbers
         self.qos_metrics_a_to_b: QoSMetrics | None = None  # Metrics for packets from A to B
         self.qos_metrics_b_to_a: QoSMetrics | None = None  # Metrics for packets from B to A
+        # Listeners fed every relayed packet as (leg, packet), e.g. live
+        # transcription or a conference mixer
+        self.audio_taps: list[Callable[[str, bytes], None]] = []
         self._learning_timeout: float = 10.0  # Seconds to allow endpoint learning
         self._start_time: float | None = None  # Track when relay started for timeout
 
@@ -362,6 +555,65 @@ def set_endpoints(self, endpoint_a: AddrTuple | None, endpoint_b: AddrTuple | No
             if endpoint_b is not None:
                 self.endpoint_b = endpoint_b
 
+    def add_audio_tap(self, tap: Callable[[str, bytes], None]) -> None:
+        """
+        Feed relayed packets to a listener.
+
+        Args:
+            tap: Callable(leg, packet), leg "a" or "b". Runs on the relay
+                thread, so it must not block.
+        """
+        with self.lock:
+            if tap not in self.audio_taps:
+                self.audio_taps = [*self.audio_taps, tap]
+
+    def remove_audio_tap(self, tap: Callable[[str, bytes], None]) -> None:
+        """
+        Stop feeding relayed packets to a listener.
+
+        Args:
+            tap: Callable previously passed to add_audio_tap().
+        """
+        with self.lock:
+            self.audio_taps = [t for t in self.audio_taps if t != tap]
+
+    def send_to_leg(self, leg: str, packet: bytes) -> bool:
+        """
+        Send a packet from the relay port to one endpoint.
+
+        The learned source address is preferred over the SDP address, as for
+        relayed packets, so the packet gets through NAT.
+
+        Args:
+            leg: "a" or "b".
+            packet: Complete RTP packet.
+
+        Returns:
+            True if the endpoint is known and the packet was sent.
+        """
+        with self.lock:
+            if leg == "a":
+                target = self.learned_a or self.endpoint_a
+            else:
+                target = self.learned_b or self.endpoint_b
+        if not self.socket or target is None:
+            return False
+        try:
+            self.socket.sendto(packet, target)
+        except OSError as e:
+            self.packet_logger.debug("Could not send RTP to leg %s: %s", leg, e)
+            return False
+        return True
+
+    def _feed_taps(self, taps: list[Callable[[str, bytes], None]], leg: str, data: bytes) -> None:
+        """Hand a relayed packet to the audio taps; a failing tap is dropped."""
+        for tap in taps:
+            try:
+                tap(leg, data)
+            except Exception as e:
+                self.logger.error(f"Audio tap failed on call {self.call_id}, removing it: {e}")
+                self.remove_audio_tap(tap)
+
     def start(self) -> bool:
         """
         Start RTP relay handler.
@@ -370,12 +622,13 @@ def start(self) -> bool:
             True if the handler started successfully, False otherwise.
         """
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.socket.settimeout(1.0)
-            self.socket.bind(
-                ("0.0.0.0", self.local_port)  # nosec B104 - RTP needs to bind all interfaces
-            )
+            if self.socket is None:
+                self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                self.socket.settimeout(1.0)
+                self.socket.bind(
+                    ("0.0.0.0", self.local_port)  # nosec B104 - RTP needs to bind all interfaces
+                )
             self.running = True
             self._start_time = time.time()  # Track start time for learning timeout
 
@@ -398,6 +651,8 @@ def stop(self) -> None:
         self.running = False
         if self.socket:
             self.socket.close()
+        if self.rtcp_socket:
+            self.rtcp_socket.close()
 
         # Stop QoS monitoring if active (both directions)
         if self.qos_monitor:
@@ -413,6 +668,7 @@ def _relay_loop(self) -> None:
         while self.running:
             try:
                 data, addr = self.socket.recvfrom(2048)
+                tapped_leg: str | None = None
 
                 # Symmetric RTP: Learn actual source addresses from first packets
                 # This handles NAT traversal where actual source differs from
@@ -467,7 +723,7 @@ def _relay_loop(self) -> None:
                         # Validate this looks like a real RTP packet (at least
                         # 12 bytes header)
                         if len(data) < 12:
-                            self.logger.debug(f"Rejecting too-short packet from {addr}")
+                            self.packet_logger.debug("Rejecting too-short packet from %s", addr)
                             continue
 
                         # First packet from unknown source - assume it's
@@ -493,7 +749,7 @@ def _relay_loop(self) -> None:
 
                         # Validate this looks like a real RTP packet
                         if len(data) < 12:
-                            self.logger.debug(f"Rejecting too-short packet from {addr}")
+                            self.packet_logger.debug("Rejecting too-short packet from %s", addr)
                             continue
 
                         # Second packet from different source - assume it's
@@ -510,8 +766,11 @@ def _relay_loop(self) -> None:
                         )
                     else:
                         # Packet from unknown third source or duplicate
-                        self.logger.debug(
-                            f"RTP packet from unknown source: {addr} (learned A:{self.learned_a}, B:{self.learned_b})"
+                        self.packet_logger.debug(
+                            "RTP packet from unknown source: %s (learned A:%s, B:%s)",
+                            addr,
+                            self.learned_a,
+                            self.learned_b,
                         )
                         continue
 
@@ -528,7 +787,12 @@ def _relay_loop(self) -> None:
                             timestamp = header[3]
                             payload_size = len(data) - 12
                         except (KeyError, TypeError, ValueError, struct.error) as parse_error:
-                            self.logger.debug(f"Error parsing RTP header for QoS: {parse_error}")
+                            self.packet_logger.debug(
+                                "Error parsing RTP header for QoS: %s", parse_error
+                            )
+                    if seq_num is not None and self.audio_taps:
+                        tapped_leg = "a" if is_from_a else "b"
+                        taps = self.audio_taps
 
                     if is_from_a and self.learned_b:
                         # Packet from A, send to B (using learned address)
@@ -539,7 +803,7 @@ def _relay_loop(self) -> None:
                                 seq_num, timestamp, payload_size
                             )
                             self.qos_metrics_a_to_b.update_packet_sent()
-                        self.logger.debug(f"Relayed {len(data)} bytes: A->B")
+                        self.packet_logger.debug("Relayed %d bytes: A->B", len(data))
                     elif is_from_b and self.learned_a:
                         # Packet from B, send to A (using learned address)
                         self.socket.sendto(data, self.learned_a)
@@ -549,7 +813,7 @@ def _relay_loop(self) -> None:
                                 seq_num, timestamp, payload_size
                             )
                             self.qos_metrics_b_to_a.update_packet_sent()
-                        self.logger.debug(f"Relayed {len(data)} bytes: B->A")
+                        self.packet_logger.debug("Relayed %d bytes: B->A", len(data))
                     elif is_from_a and self.endpoint_b:
                         # From A but B not learned yet - try sending to
                         # expected B (if known)
@@ -560,8 +824,8 @@ def _relay_loop(self) -> None:
                                 seq_num, timestamp, payload_size
                             )
                             self.qos_metrics_a_to_b.update_packet_sent()
-                        self.logger.debug(
-                            f"Relayed {len(data)} bytes: A->B (B not learned, using SDP)"
+                        self.packet_logger.debug(
+                            "Relayed %d bytes: A->B (B not learned, using SDP)", len(data)
                         )
                     elif is_from_b and self.endpoint_a:
                         # From B but A not learned yet - try sending to
@@ -573,18 +837,23 @@ def _relay_loop(self) -> None:
                                 seq_num, timestamp, payload_size
                             )
                             self.qos_metrics_b_to_a.update_packet_sent()
-                        self.logger.debug(
-                            f"Relayed {len(data)} bytes: B->A (A not learned, using SDP)"
+                        self.packet_logger.debug(
+                            "Relayed %d bytes: B->A (A not learned, using SDP)", len(data)
                         )
                     elif is_from_a:
                         # From A but B not known at all yet - must drop packet
                         # This is rare since endpoint_b is usually set soon
                         # after endpoint_a
-                        self.logger.debug("Packet from A dropped - waiting for B endpoint")
+                        self.packet_logger.debug("Packet from A dropped - waiting for B endpoint")
                     elif is_from_b:
                         # From B but A not known at all yet - must drop packet
                         # This is rare since endpoint_a is usually set first
-                        self.logger.debug("Packet from B dropped - waiting for A endpoint")
+                        self.packet_logger.debug("Packet from B dropped - waiting for A endpoint")
+
+                # Taps run after the lock is released so a slow listener
+                # never holds up set_endpoints()
+                if tapped_leg:
+                    self._feed_taps(taps, tapped_leg, data)
 
             except TimeoutError:
                 continue
@@ -607,6 +876,7 @@ def __init__(
         call_id: str,
         rfc2833_handler: RFC2833Receiver | None = None,
         dtmf_payload_type: int = 101,
+        jitter_buffer: JitterBuffer | None = None,
     ) -> None:
         """
         Initialize RTP recorder.
@@ -616,6 +886,7 @@ def __init__(
             call_id: Call identifier for logging.
             rfc2833_handler: Optional RFC 2833 receiver for DTMF event handling.
             dtmf_payload_type: Payload type for RFC 2833 DTMF events (default 101).
+            jitter_buffer: Optional jitter buffer to reorder payloads and conceal losses.
         """
         self.local_port: int = local_port
         self.call_id: str = call_id
@@ -629,6 +900,7 @@ def __init__(
         self.dtmf_payload_type: int = dtmf_payload_type
         # Track the audio codec payload type from the first audio packet
         self.detected_codec: int | None = None
+        self.jitter_buffer: JitterBuffer | None = jitter_buffer
 
     def start(self) -> bool:
         """
@@ -668,6 +940,10 @@ def stop(self) -> None:
                 self.socket.close()
             except OSError as e:
                 self.logger.debug(f"Error closing socket: {e}")
+        if self.jitter_buffer:
+            # Keep whatever was still waiting for reordering
+            with self.lock:
+                self.recorded_data.extend(self.jitter_buffer.flush())
         self.logger.info(f"RTP recorder stopped on port {self.local_port}")
 
     def _record_loop(self) -> None:
@@ -722,8 +998,14 @@ def _record_loop(self) -> None:
                         )
 
                     # Store only audio payloads (not telephone-events)
-                    with self.lock:
-                        self.recorded_data.append(payload)
+                    if self.jitter_buffer:
+                        self.jitter_buffer.put(payload, header[2], header[3], payload_type)
+                        with self.lock:
+                            while (frame := self.jitter_buffer.pop_ready()) is not None:
+                                self.recorded_data.append(frame)
+                    else:
+                        with self.lock:
+                            self.recorded_data.append(payload)
 
                     self.logger.debug(
                         f"Recorded {len(payload)} bytes (PT {payload_type}) from call {self.call_id}"
@@ -870,25 +1152,9 @@ def send_audio(
             return False
 
         try:
-            # Determine bytes per sample if not explicitly provided
-            if bytes_per_sample is None:
-                # G.711 formats (PCMU, PCMA) are 8-bit = 1 byte per sample
-                # G.722 is also 8-bit encoded = 1 byte per sample
-                # PCM formats are typically 16-bit = 2 bytes per sample
-                if payload_type in [0, 8, 9]:  # PCMU, PCMA, or G.722
-                    bytes_per_sample = 1
-                else:  # PCM or other formats
-                    bytes_per_sample = 2
-
-            # Split audio into packets
-            bytes_per_packet = samples_per_packet * bytes_per_sample
-            num_packets = (len(audio_data) + bytes_per_packet - 1) // bytes_per_packet
-
-            for i in range(num_packets):
-                start = i * bytes_per_packet
-                end = min(start + bytes_per_packet, len(audio_data))
-                payload = audio_data[start:end]
+            packets = self.packetize(audio_data, payload_type, samples_per_packet, bytes_per_sample)
 
+            for payload in packets:
                 # Build RTP packet
                 rtp_packet = self._build_rtp_packet(payload, payload_type)
 
@@ -903,13 +1169,81 @@ def send_audio(
                 # Small delay to pace packets (20ms for 160 samples at 8kHz)
                 time.sleep(0.020)
 
-            self.logger.info(f"Sent {num_packets} RTP packets for call {self.call_id}")
+            self.logger.info(f"Sent {len(packets)} RTP packets for call {self.call_id}")
             return True
 
         except (KeyError, OSError, TypeError, ValueError) as e:
             self.logger.error(f"Error sending audio: {e}")
             return False
 
+    def send_frame(
+        self, payload: bytes, payload_type: int = 0, samples_per_packet: int = 160
+    ) -> bool:
+        """
+        Send one RTP packet without pacing.
+
+        For callers that keep their own media clock, such as the IVR
+        runtime, which paces every active prompt from a single thread.
+
+        Args:
+            payload: Encoded audio for one packet.
+            payload_type: RTP payload type.
+            samples_per_packet: Timestamp increment for the packet.
+
+        Returns:
+            True if the packet was sent.
+        """
+        if not self.running or not self.socket:
+            return False
+
+        try:
+            self.socket.sendto(
+                self._build_rtp_packet(payload, payload_type), (self.remote_host, self.remote_port)
+            )
+        except OSError as e:
+            self.logger.error(f"Error sending audio frame: {e}")
+            return False
+
+        with self.lock:
+            self.sequence_number = (self.sequence_number + 1) & 0xFFFF
+            self.timestamp = (self.timestamp + samples_per_packet) & 0xFFFFFFFF
+        return True
+
+    @staticmethod
+    def packetize(
+        audio_data: bytes,
+        payload_type: int = 0,
+        samples_per_packet: int = 160,
+        bytes_per_sample: int | None = None,
+    ) -> list[bytes]:
+        """
+        Split audio into RTP payloads of one packet each.
+
+        Args:
+            audio_data: Encoded audio.
+            payload_type: RTP payload type, used to infer the sample width.
+            samples_per_packet: Number of samples per packet.
+            bytes_per_sample: Bytes per sample (None=auto-detect).
+
+        Returns:
+            List of payloads; the last one may be short.
+        """
+        # Determine bytes per sample if not explicitly provided
+        if bytes_per_sample is None:
+            # G.711 formats (PCMU, PCMA) are 8-bit = 1 byte per sample
+            # G.722 is also 8-bit encoded = 1 byte per sample
+            # PCM formats are typically 16-bit = 2 bytes per sample
+            if payload_type in [0, 8, 9]:  # PCMU, PCMA, or G.722
+                bytes_per_sample = 1
+            else:  # PCM or other formats
+                bytes_per_sample = 2
+
+        bytes_per_packet = samples_per_packet * bytes_per_sample
+        return [
+            audio_data[start : start + bytes_per_packet]
+            for start in range(0, len(audio_data), bytes_per_packet)
+        ]
+
     def _build_rtp_packet(self, payload: bytes, payload_type: int = 0) -> bytes:
         """
         Build an RTP packet.
@@ -968,7 +1302,7 @@ def play_file(self, file_path: str | Path) -> bool:
         Supports WAV files with:
         - G.711 u-law (8-bit, 8kHz) - legacy format
         - G.711 A-law (8-bit, 8kHz) - legacy format
-        - PCM (16-bit, 8kHz/16kHz) - converted to G.722 for HD audio
+        - PCM (16-bit, 8kHz/16kHz) - converted to G.711 u-law
 
         Args:
             file_path: Path to WAV file.
@@ -976,224 +1310,273 @@ def play_file(self, file_path: str | Path) -> bool:
         Returns:
             True if successful.
         """
-        import struct
-
-        if not Path(file_path).exists():
-            self.logger.error(f"Audio file not found: {file_path}")
+        loaded = self.load_wav(file_path)
+        if loaded is None:
             return False
 
+        audio_data, payload_type, samples_per_packet = loaded
+        self.logger.info(f"Playing audio file: {file_path} ({len(audio_data)} bytes)")
+        return self.send_audio(audio_data, payload_type, samples_per_packet)
+
+    def load_prompt(self, source: str | Path | bytes) -> tuple[list[bytes], int, int] | None:
+        """
+        Decode a WAV prompt into RTP payloads for externally paced playback.
+
+        Args:
+            source: Path to a WAV file, or the WAV file contents.
+
+        Returns:
+            Tuple of (payloads, payload_type, samples_per_packet), or None
+            if the audio could not be loaded.
+        """
+        loaded = self.load_wav(source)
+        if loaded is None:
+            return None
+        audio_data, payload_type, samples_per_packet = loaded
+        return (
+            self.packetize(audio_data, payload_type, samples_per_packet),
+            payload_type,
+            samples_per_packet,
+        )
+
+    def load_wav(self, source: str | Path | bytes) -> tuple[bytes, int, int] | None:
+        """
+        Decode a WAV file into audio ready to be sent over RTP.
+
+        Args:
+            source: Path to a WAV file, or the WAV file contents.
+
+        Returns:
+            Tuple of (audio_data, payload_type, samples_per_packet), or None
+            if the audio could not be loaded.
+        """
+        if isinstance(source, bytes):
+            return self._read_wav(io.BytesIO(source), "<prompt audio>")
+
+        if not Path(source).exists():
+            self.logger.error(f"Audio file not found: {source}")
+            return None
+
         try:
-            with Path(file_path).open("rb") as f:
-                # Read WAV header
-                riff = f.read(4)
-                if riff != b"RIFF" or len(riff) < 4:
-                    self.logger.error(f"Invalid WAV file (bad RIFF header): {file_path}")
-                    return False
+            with Path(source).open("rb") as f:
+                return self._read_wav(f, source)
+        except OSError as e:
+            self.logger.error(f"Error reading audio file {source}: {e}")
+            return None
 
-                size_bytes = f.read(4)
-                if len(size_bytes) < 4:
-                    self.logger.error(f"Truncated WAV file (no file size): {file_path}")
-                    return False
-                struct.unpack("<I", size_bytes)[0]
-
-                wave = f.read(4)
-                if wave != b"WAVE" or len(wave) < 4:
-                    self.logger.error(f"Invalid WAV file (bad WAVE marker): {file_path}")
-                    return False
-
-                # Find fmt chunk
-                audio_format: int = 0
-                num_channels: int = 0
-                sample_rate: int = 0
-                payload_type: int = 0
-                convert_to_pcmu: bool = False
-
-                while True:
-                    chunk_id = f.read(4)
-                    if not chunk_id or len(chunk_id) < 4:
-                        self.logger.error(f"No format chunk found in WAV file: {file_path}")
-                        return False
-
-                    size_bytes = f.read(4)
-                    if not size_bytes or len(size_bytes) < 4:
-                        self.logger.error(f"Truncated chunk size in WAV file: {file_path}")
-                        return False
-                    chunk_size = struct.unpack("<I", size_bytes)[0]
-
-                    if chunk_id == b"fmt ":
-                        # Validate fmt chunk size (minimum 16 bytes for basic
-                        # format)
-                        if chunk_size < 16:
-                            self.logger.error(f"Invalid fmt chunk size in WAV file: {file_path}")
-                            return False
-
-                        # Parse format
-                        fmt_data = f.read(16)
-                        if len(fmt_data) < 16:
-                            self.logger.error(f"Truncated fmt chunk in WAV file: {file_path}")
-                            return False
-
-                        audio_format = struct.unpack("<H", fmt_data[0:2])[0]
-                        num_channels = struct.unpack("<H", fmt_data[2:4])[0]
-                        sample_rate = struct.unpack("<I", fmt_data[4:8])[0]
-                        # Skip byte_rate and block_align - not needed for playback
-                        struct.unpack("<H", fmt_data[14:16])[0]
-
-                        # Skip any extra format bytes
-                        if chunk_size > 16:
-                            f.read(chunk_size - 16)
-
-                        # Determine payload type based on format
-                        convert_to_pcmu = False
-                        if audio_format == WAV_FORMAT_ULAW:
-                            payload_type = 0  # PCMU (u-law)
-                        elif audio_format == WAV_FORMAT_ALAW:
-                            payload_type = 8  # PCMA (A-law)
-                        elif audio_format == WAV_FORMAT_G722:
-                            # G.722 format - already encoded, no conversion
-                            # needed
-                            payload_type = 9  # G.722
-                            self.logger.info("G.722 format detected - already encoded for VoIP.")
-                        elif audio_format == WAV_FORMAT_PCM:
-                            # PCM format - convert to PCMU (G.711 u-law) for maximum compatibility
-                            # Note: Previously converted to G.722, but G.722
-                            # has implementation issues
-                            payload_type = 0  # PCMU
-                            convert_to_pcmu = True
-                            self.logger.info(
-                                "PCM format detected - will convert to PCMU (G.711 u-law) "
-                                "for maximum compatibility."
-                            )
-                        else:
-                            self.logger.error(f"Unsupported audio format: {audio_format}")
-                            return False
+    def _read_wav(self, f: BinaryIO, source: str | Path) -> tuple[bytes, int, int] | None:
+        """
+        Parse a WAV stream into (audio_data, payload_type, samples_per_packet).
 
-                        self.logger.info(
-                            f"WAV file: format={audio_format}, channels={num_channels}, "
-                            f"rate={sample_rate}Hz, bits={struct.unpack('<H', fmt_data[14:16])[0]}"
-                        )
-                        break
-
-                    if chunk_id == b"data":
-                        # Found data before fmt - invalid
-                        self.logger.error("Invalid WAV structure")
-                        return False
-                    # Skip unknown chunk
-                    f.read(chunk_size)
-
-                # Find data chunk
-                while True:
-                    chunk_id = f.read(4)
-                    if not chunk_id or len(chunk_id) < 4:
-                        self.logger.error(f"No data chunk found in WAV file: {file_path}")
-                        return False
-
-                    size_bytes = f.read(4)
-                    if not size_bytes or len(size_bytes) < 4:
-                        self.logger.error(f"Truncated data chunk size in WAV file: {file_path}")
-                        return False
-                    chunk_size = struct.unpack("<I", size_bytes)[0]
-
-                    if chunk_id == b"data":
-                        # Validate data size is reasonable
-                        if chunk_size == 0:
-                            self.logger.error(f"Empty data chunk in WAV file: {file_path}")
-                            return False
-                        if chunk_size > 100 * 1024 * 1024:  # 100MB limit
-                            self.logger.error(
-                                f"Data chunk too large ({chunk_size} bytes) in WAV file: {file_path}"
-                            )
-                            return False
+        Args:
+            f: Binary stream positioned at the RIFF header.
+            source: File name used in log messages.
 
-                        # Read audio data
-                        audio_data = f.read(chunk_size)
-                        if len(audio_data) < chunk_size:
-                            self.logger.warning(
-                                f"Truncated audio data in WAV file: {file_path} "
-                                f"(expected {chunk_size}, got {len(audio_data)})"
-                            )
-                            # Continue with partial data rather than failing
-                            # completely
+        Returns:
+            Decoded audio tuple, or None if the WAV data is invalid.
+        """
+        try:
+            # Read WAV header
+            riff = f.read(4)
+            if riff != b"RIFF" or len(riff) < 4:
+                self.logger.error(f"Invalid WAV file (bad RIFF header): {source}")
+                return None
 
-                        # For mono files, use data as-is
-                        # For stereo, we'd need to downmix (take left channel)
-                        if num_channels == 2:
-                            self.logger.warning(
-                                "Stereo audio detected, extracting left channel only"
-                            )
-                            # Extract left channel (assuming interleaved
-                            # samples)
-                            if audio_format == WAV_FORMAT_PCM:  # PCM 16-bit
-                                # Extract left channel: take 2 bytes (one 16-bit sample)
-                                # from each 4-byte stereo frame (L-low, L-high, R-low, R-high)
-                                audio_data = b"".join(
-                                    audio_data[i : i + 2] for i in range(0, len(audio_data), 4)
-                                )
-                            else:  # 8-bit formats (G.711, G.722)
-                                audio_data = audio_data[::2]
-
-                        # Convert PCM to PCMU if needed
-                        if convert_to_pcmu:
-                            try:
-                                from pbx.utils.audio import pcm16_to_ulaw
-
-                                original_size = len(audio_data)
-
-                                # First, downsample from 16kHz to 8kHz if
-                                # needed
-                                if sample_rate == 16000:
-                                    # Simple decimation: take every other
-                                    # sample
-                                    downsampled = bytearray()
-                                    for i in range(
-                                        0, len(audio_data), 4
-                                    ):  # Skip every other 16-bit sample
-                                        if i + 1 < len(audio_data):
-                                            downsampled.extend(audio_data[i : i + 2])
-                                    audio_data = bytes(downsampled)
-                                    sample_rate = 8000
-                                    self.logger.info(
-                                        f"Downsampled from 16kHz to 8kHz: {original_size} bytes -> {len(audio_data)} bytes"
-                                    )
-
-                                # Convert to u-law
-                                audio_data = pcm16_to_ulaw(audio_data)
-                                self.logger.info(
-                                    f"Converted PCM to PCMU: {len(audio_data)} bytes (u-law)"
-                                )
-                            except (KeyError, TypeError, ValueError) as e:
-                                self.logger.error(f"Failed to convert PCM to PCMU: {e}")
-                                return False
-                        elif payload_type == 9:
-                            # G.722 format - already encoded, ensure correct sample rate for packets
-                            # G.722 uses 8kHz clock rate but actual 16kHz
-                            # sampling
-                            sample_rate = 16000
-
-                        # Calculate samples per packet based on sample rate
-                        # 20ms packet = sample_rate * 0.02
-                        samples_per_packet = int(sample_rate * 0.02)
-
-                        # Send the audio
+            size_bytes = f.read(4)
+            if len(size_bytes) < 4:
+                self.logger.error(f"Truncated WAV file (no file size): {source}")
+                return None
+            struct.unpack("<I", size_bytes)[0]
+
+            wave = f.read(4)
+            if wave != b"WAVE" or len(wave) < 4:
+                self.logger.error(f"Invalid WAV file (bad WAVE marker): {source}")
+                return None
+
+            # Find fmt chunk
+            audio_format: int = 0
+            num_channels: int = 0
+            sample_rate: int = 0
+            payload_type: int = 0
+            convert_to_pcmu: bool = False
+
+            while True:
+                chunk_id = f.read(4)
+                if not chunk_id or len(chunk_id) < 4:
+                    self.logger.error(f"No format chunk found in WAV file: {source}")
+                    return None
+
+                size_bytes = f.read(4)
+                if not size_bytes or len(size_bytes) < 4:
+                    self.logger.error(f"Truncated chunk size in WAV file: {source}")
+                    return None
+                chunk_size = struct.unpack("<I", size_bytes)[0]
+
+                if chunk_id == b"fmt ":
+                    # Validate fmt chunk size (minimum 16 bytes for basic
+                    # format)
+                    if chunk_size < 16:
+                        self.logger.error(f"Invalid fmt chunk size in WAV file: {source}")
+                        return None
+
+                    # Parse format
+                    fmt_data = f.read(16)
+                    if len(fmt_data) < 16:
+                        self.logger.error(f"Truncated fmt chunk in WAV file: {source}")
+                        return None
+
+                    audio_format = struct.unpack("<H", fmt_data[0:2])[0]
+                    num_channels = struct.unpack("<H", fmt_data[2:4])[0]
+                    sample_rate = struct.unpack("<I", fmt_data[4:8])[0]
+                    # Skip byte_rate and block_align - not needed for playback
+                    struct.unpack("<H", fmt_data[14:16])[0]
+
+                    # Skip any extra format bytes
+                    if chunk_size > 16:
+                        f.read(chunk_size - 16)
+
+                    # Determine payload type based on format
+                    convert_to_pcmu = False
+                    if audio_format == WAV_FORMAT_ULAW:
+                        payload_type = 0  # PCMU (u-law)
+                    elif audio_format == WAV_FORMAT_ALAW:
+                        payload_type = 8  # PCMA (A-law)
+                    elif audio_format == WAV_FORMAT_G722:
+                        # G.722 format - already encoded, no conversion
+                        # needed
+                        payload_type = 9  # G.722
+                        self.logger.info("G.722 format detected - already encoded for VoIP.")
+                    elif audio_format == WAV_FORMAT_PCM:
+                        # PCM format - convert to PCMU (G.711 u-law) for maximum compatibility
+                        # Note: Previously converted to G.722, but G.722
+                        # has implementation issues
+                        payload_type = 0  # PCMU
+                        convert_to_pcmu = True
                         self.logger.info(
-                            f"Playing audio file: {file_path} ({len(audio_data)} bytes)"
+                            "PCM format detected - will convert to PCMU (G.711 u-law) "
+                            "for maximum compatibility."
                         )
-                        return self.send_audio(audio_data, payload_type, samples_per_packet)
+                    else:
+                        self.logger.error(f"Unsupported audio format: {audio_format}")
+                        return None
+
+                    self.logger.info(
+                        f"WAV file: format={audio_format}, channels={num_channels}, "
+                        f"rate={sample_rate}Hz, bits={struct.unpack('<H', fmt_data[14:16])[0]}"
+                    )
+                    break
+
+                if chunk_id == b"data":
+                    # Found data before fmt - invalid
+                    self.logger.error("Invalid WAV structure")
+                    return None
+                # Skip unknown chunk
+                f.read(chunk_size)
+
+            # Find data chunk
+            while True:
+                chunk_id = f.read(4)
+                if not chunk_id or len(chunk_id) < 4:
+                    self.logger.error(f"No data chunk found in WAV file: {source}")
+                    return None
 
-                    # Skip this chunk (with size validation)
+                size_bytes = f.read(4)
+                if not size_bytes or len(size_bytes) < 4:
+                    self.logger.error(f"Truncated data chunk size in WAV file: {source}")
+                    return None
+                chunk_size = struct.unpack("<I", size_bytes)[0]
+
+                if chunk_id == b"data":
+                    # Validate data size is reasonable
+                    if chunk_size == 0:
+                        self.logger.error(f"Empty data chunk in WAV file: {source}")
+                        return None
                     if chunk_size > 100 * 1024 * 1024:  # 100MB limit
                         self.logger.error(
-                            f"Chunk size too large ({chunk_size} bytes) in WAV file: {file_path}"
+                            f"Data chunk too large ({chunk_size} bytes) in WAV file: {source}"
+                        )
+                        return None
+
+                    # Read audio data
+                    audio_data = f.read(chunk_size)
+                    if len(audio_data) < chunk_size:
+                        self.logger.warning(
+                            f"Truncated audio data in WAV file: {source} "
+                            f"(expected {chunk_size}, got {len(audio_data)})"
                         )
-                        return False
-                    f.read(chunk_size)
+                        # Continue with partial data rather than failing
+                        # completely
+
+                    # For mono files, use data as-is
+                    # For stereo, we'd need to downmix (take left channel)
+                    if num_channels == 2:
+                        self.logger.warning("Stereo audio detected, extracting left channel only")
+                        # Extract left channel (assuming interleaved
+                        # samples)
+                        if audio_format == WAV_FORMAT_PCM:  # PCM 16-bit
+                            # Extract left channel: take 2 bytes (one 16-bit sample)
+                            # from each 4-byte stereo frame (L-low, L-high, R-low, R-high)
+                            audio_data = b"".join(
+                                audio_data[i : i + 2] for i in range(0, len(audio_data), 4)
+                            )
+                        else:  # 8-bit formats (G.711, G.722)
+                            audio_data = audio_data[::2]
 
-        except (KeyError, OSError, TypeError, ValueError) as e:
-            self.logger.error(f"Error playing audio file {file_path}: {e}")
-            import traceback
+                    # Convert PCM to PCMU if needed
+                    if convert_to_pcmu:
+                        try:
+                            from pbx.utils.audio import pcm16_to_ulaw
 
-            traceback.print_exc()
-            return False
+                            original_size = len(audio_data)
+
+                            # First, downsample from 16kHz to 8kHz if
+                            # needed
+                            if sample_rate == 16000:
+                                # Simple decimation: take every other
+                                # sample
+                                downsampled = bytearray()
+                                for i in range(
+                                    0, len(audio_data), 4
+                                ):  # Skip every other 16-bit sample
+                                    if i + 1 < len(audio_data):
+                                        downsampled.extend(audio_data[i : i + 2])
+                                audio_data = bytes(downsampled)
+                                sample_rate = 8000
+                                self.logger.info(
+                                    f"Downsampled from 16kHz to 8kHz: {original_size} bytes -> {len(audio_data)} bytes"
+                                )
+
+                            # Convert to u-law
+                            audio_data = pcm16_to_ulaw(audio_data)
+                            self.logger.info(
+                                f"Converted PCM to PCMU: {len(audio_data)} bytes (u-law)"
+                            )
+                        except (KeyError, TypeError, ValueError) as e:
+                            self.logger.error(f"Failed to convert PCM to PCMU: {e}")
+                            return None
+                    elif payload_type == 9:
+                        # G.722 format - already encoded, ensure correct sample rate for packets
+                        # G.722 uses 8kHz clock rate but actual 16kHz
+                        # sampling
+                        sample_rate = 16000
+
+                    # Calculate samples per packet based on sample rate
+                    # 20ms packet = sample_rate * 0.02
+                    samples_per_packet = int(sample_rate * 0.02)
+
+                    return audio_data, payload_type, samples_per_packet
+
+                # Skip this chunk (with size validation)
+                if chunk_size > 100 * 1024 * 1024:  # 100MB limit
+                    self.logger.error(
+                        f"Chunk size too large ({chunk_size} bytes) in WAV file: {source}"
+                    )
+                    return None
+                f.read(chunk_size)
+
+        except (KeyError, OSError, TypeError, ValueError, struct.error) as e:
+            self.logger.error(f"Error loading audio file {source}: {e}")
+            return None
 
 
 class RTPDTMFListener:
@@ -1203,20 +1586,30 @@ class RTPDTMFListener:
     Used for interactive voice response (IVR) and auto attendant systems.
     """
 
-    def __init__(self, local_port: int, call_id: str | None = None) -> None:
+    def __init__(
+        self,
+        local_port: int,
+        call_id: str | None = None,
+        on_digit: Callable[[str], Any] | None = None,
+    ) -> None:
         """
         Initialize RTP DTMF listener.
 
         Args:
             local_port: Local UDP port to receive RTP packets.
             call_id: Optional call identifier for logging.
+            on_digit: Optional callback invoked from the listener thread for
+                each detected digit. Digits handed to the callback are not
+                queued for get_digit().
         """
         self.local_port: int = local_port
         self.call_id: str = call_id or "unknown"
+        self.on_digit: Callable[[str], Any] | None = on_digit
         self.logger = get_logger()
         self.socket: socket.socket | None = None
         self.running: bool = False
         self.detected_digits: list[str] = []
+        self._last_digit: str | None = None
         self.lock: threading.Lock = threading.Lock()
         self.audio_buffer: list[float] = []
         self.sample_rate: int = 8000  # Standard for telephony
@@ -1311,6 +1704,7 @@ def _listen_loop(self) -> None:
                     if payload_type in [0, 8]:
                         # Convert G.711 to linear PCM samples
                         samples = self._decode_g711(payload, payload_type)
+                        new_digit: str | None = None
 
                         with self.lock:
                             self.audio_buffer.extend(samples)
@@ -1322,7 +1716,13 @@ def _listen_loop(self) -> None:
                                     self.audio_buffer[: self.dtmf_buffer_size]
                                 )
 
-                                if digit and (
+                                if self.on_digit is not None:
+                                    # A held key spans several windows; report it once
+                                    if digit and digit != self._last_digit:
+                                        new_digit = digit
+                                        self.logger.info(f"DTMF digit detected: {digit}")
+                                    self._last_digit = digit
+                                elif digit and (
                                     not self.detected_digits or self.detected_digits[-1] != digit
                                 ):
                                     self.detected_digits.append(digit)
@@ -1331,6 +1731,9 @@ def _listen_loop(self) -> None:
                                 # Keep a sliding window of audio
                                 self.audio_buffer = self.audio_buffer[self.dtmf_slide_size :]
 
+                        if new_digit and self.on_digit is not None:
+                            self.on_digit(new_digit)
+
             except TimeoutError:
                 # Timeout is normal, just continue
                 continue
@@ -10,11 +10,214 @@
 
 import threading
 import time
-from collections import deque
 from typing import Any
 
 from pbx.utils.logger import get_logger
 
+# Packets live in a ring indexed by RTP sequence number modulo its size. The
+# size is a power of two, so it divides 65536 and the index survives the
+# 16-bit sequence wraparound.
+DEFAULT_CAPACITY = 256
+MIN_CAPACITY = 16
+MAX_CAPACITY = 32768
+
+# How far a stream may start out of order before playout begins
+MAX_REORDER = 10
+
+DEFAULT_FRAME_MS = 20.0
+
+# Static payload types the concealer can decode (RFC 3551)
+PAYLOAD_TYPE_CODECS = {0: "PCMU", 8: "PCMA"}
+
+# Media paths that can run packets through a jitter buffer
+STAGE_RECORDING = "recording"
+STAGE_CONFERENCE = "conference"
+STAGE_TRANSCODING = "transcoding"
+
+
+def _build_decode_table(codec: str) -> list[int]:
+    """Build the 256-entry G.711 decode table for a codec"""
+    table = []
+    for code in range(256):
+        if codec == "PCMU":
+            val = ~code & 0xFF
+            magnitude = ((((val & 0x0F) << 3) + 0x84) << ((val >> 4) & 0x07)) - 0x84
+        else:
+            val = code ^ 0x55
+            exponent = (val >> 4) & 0x07
+            mantissa = val & 0x0F
+            if exponent == 0:
+                magnitude = (mantissa << 4) + 8
+            else:
+                magnitude = ((mantissa << 4) + 0x108) << (exponent - 1)
+        table.append(-magnitude if val & 0x80 else magnitude)
+    return table
+
+
+def _encode_ulaw(sample: int) -> int:
+    """Encode one 16-bit sample as μ-law"""
+    sign = 0x80 if sample < 0 else 0x00
+    magnitude = min(abs(sample), 32635) + 0x84
+    exponent = max(magnitude.bit_length() - 8, 0)
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    return ~(sign | (exponent << 4) | mantissa) & 0xFF
+
+
+def _encode_alaw(sample: int) -> int:
+    """Encode one 16-bit sample as A-law"""
+    sign = 0x80 if sample < 0 else 0x00
+    magnitude = min(abs(sample), 32767)
+    if magnitude >= 256:
+        exponent = magnitude.bit_length() - 8
+        mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    else:
+        exponent = 0
+        mantissa = (magnitude >> 4) & 0x0F
+    return (sign | (exponent << 4) | mantissa) ^ 0x55
+
+
+_DECODE_TABLES = {codec: _build_decode_table(codec) for codec in ("PCMU", "PCMA")}
+_ENCODERS = {"PCMU": _encode_ulaw, "PCMA": _encode_alaw}
+
+
+class G711Concealer:
+    """
+    Packet loss concealment for G.711, after ITU-T G.711 Appendix I.
+
+    A lost frame is rebuilt by repeating the last pitch period of good audio.
+    Both edges are overlap-added so the join doesn't click. The repeated signal
+    is played at full level for 10 ms, then fades by 20% per 10 ms and is silent
+    after 60 ms. Unlike Appendix I, the repeat window never grows to two or
+    three periods.
+    """
+
+    HISTORY_SAMPLES = 390  # 48.75 ms at 8 kHz
+    PITCH_MIN = 40  # 200 Hz
+    PITCH_MAX = 120  # 66 Hz
+    CORRELATION_WINDOW = 160  # 20 ms
+    FULL_LEVEL_SAMPLES = 80  # 10 ms
+    FADE_SAMPLES = 400  # 50 ms from full level to silence
+
+    def __init__(self, codec: str) -> None:
+        """
+        Initialize the concealer.
+
+        Args:
+            codec: "PCMU" or "PCMA".
+        """
+        self.codec = codec
+        self._decode = _DECODE_TABLES[codec]
+        self._encode = _ENCODERS[codec]
+        self.history: list[int] = []
+        self.erased = 0  # Samples synthesized in the current loss burst
+        self._period: list[int] = []
+        self._position = 0
+
+    def good_frame(self, payload: bytes) -> bytes:
+        """
+        Record a received frame, smoothing the join after concealment.
+
+        Args:
+            payload: Encoded G.711 frame.
+
+        Returns:
+            The frame to play out (re-encoded if it was smoothed).
+        """
+        decode = self._decode
+        samples = [decode[code] for code in payload]
+        if self.erased:
+            # Fade from the synthetic signal into the real one
+            overlap = min(len(samples), len(self._period) // 4 or 1)
+            synthetic = self._synthesize(overlap)
+            for i in range(overlap):
+                weight = (i + 1) / (overlap + 1)
+                samples[i] = int(synthetic[i] * (1 - weight) + samples[i] * weight)
+            encode = self._encode
+            payload = bytes(encode(sample) for sample in samples)
+            self.erased = 0
+
+        self.history.extend(samples)
+        if len(self.history) > self.HISTORY_SAMPLES:
+            del self.history[: -self.HISTORY_SAMPLES]
+        return payload
+
+    def conceal(self, length: int) -> bytes:
+        """
+        Synthesize a replacement for one lost frame.
+
+        Args:
+            length: Frame length in samples.
+
+        Returns:
+            Encoded G.711 frame.
+        """
+        encode = self._encode
+        if len(self.history) < self.CORRELATION_WINDOW + self.PITCH_MAX:
+            # Not enough audio yet to find a pitch period
+            return bytes([encode(0)]) * length
+        if not self.erased:
+            self._start_burst()
+        return bytes(encode(sample) for sample in self._synthesize(length))
+
+    def _start_burst(self) -> None:
+        """Pick the pitch period to repeat for a new loss burst"""
+        history = self.history
+        pitch = self._find_pitch()
+        period = history[-pitch:]
+
+        # Blend the period's tail toward the audio just before it, so the wrap
+        # from the last sample back to the first is continuous
+        quarter = pitch // 4
+        before = history[-pitch - quarter : -pitch]
+        for i in range(quarter):
+            weight = (i + 1) / (quarter + 1)
+            j = pitch - quarter + i
+            period[j] = int(period[j] * (1 - weight) + before[i] * weight)
+
+        self._period = period
+        self._position = 0
+
+    def _find_pitch(self) -> int:
+        """Find the lag that best correlates the last 20 ms with earlier audio"""
+        history = self.history
+        window = self.CORRELATION_WINDOW
+        recent = history[-window:]
+
+        def score(lag: int) -> float:
+            earlier = history[-window - lag : -lag]
+            energy = sum(s * s for s in earlier)
+            if not energy:
+                return 0.0
+            return sum(a * b for a, b in zip(recent, earlier, strict=True)) / energy**0.5
+
+        # Coarse search on even lags, then refine around the best one
+        best = max(range(self.PITCH_MIN, self.PITCH_MAX + 1, 2), key=score)
+        candidates = range(max(self.PITCH_MIN, best - 1), min(self.PITCH_MAX, best + 1) + 1)
+        return max(candidates, key=score)
+
+    def _synthesize(self, length: int) -> list[int]:
+        """Continue the repeated pitch period with the burst's fade applied"""
+        period = self._period
+        if not period:
+            return [0] * length
+
+        out = []
+        pitch = len(period)
+        position = self._position
+        erased = self.erased
+        for _ in range(length):
+            faded = erased - self.FULL_LEVEL_SAMPLES
+            if faded <= 0:
+                gain = 1.0
+            else:
+                gain = max(0.0, 1.0 - faded / self.FADE_SAMPLES)
+            out.append(int(period[position] * gain))
+            position = (position + 1) % pitch
+            erased += 1
+        self._position = position
+        self.erased = erased
+        return out
+
 
 class JitterBufferPacket:
     """Represents a packet in the jitter buffer."""
@@ -45,9 +248,13 @@ class JitterBuffer:
 
     Features:
     - Adaptive buffer sizing
-    - Packet reordering
-    - Packet loss detection
-    - Late packet handling
+    - O(1) packet reordering in a ring indexed by sequence number
+    - Duplicate, late and lost packet detection
+    - G.711 packet loss concealment
+
+    Frames are taken out either by a clocked consumer calling get() once per
+    packet interval, or by a push-driven consumer calling pop_ready() after
+    each put().
     """
 
     def __init__(self, config: dict[str, Any] | None = None) -> None:
@@ -60,6 +267,10 @@ def __init__(self, config: dict[str, Any] | None = None) -> None:
                 - max_length_ms: Maximum buffer length (default: 200ms)
                 - max_drift_ms: Maximum drift tolerance (default: 30ms)
                 - adaptive: Enable adaptive mode (default: True)
+                - max_packets: Ring size, rounded up to a power of two (default: 256)
+                - clock_rate: RTP timestamp clock rate in Hz (default: 8000)
+                - codec: "PCMU" or "PCMA" if known up front (default: from payload type)
+                - plc: Conceal lost G.711 frames (default: True)
         """
         self.logger = get_logger()
         self.config: dict[str, Any] = config or {}
@@ -69,9 +280,22 @@ def __init__(self, config: dict[str, Any] | None = None) -> None:
         self.max_length_ms: int = self.config.get("max_length_ms", 200)
         self.max_drift_ms: int = self.config.get("max_drift_ms", 30)
         self.adaptive: bool = self.config.get("adaptive", True)
-
-        # Buffer state
-        self.buffer: deque[JitterBufferPacket] = deque()
+        self.clock_rate: int = self.config.get("clock_rate", 8000)
+        self.codec: str | None = self.config.get("codec")
+        self.plc_enabled: bool = self.config.get("plc", True)
+
+        # Ring of packets, slot = sequence & mask
+        requested = self.config.get("max_packets", DEFAULT_CAPACITY)
+        capacity = MIN_CAPACITY
+        while capacity < min(requested, MAX_CAPACITY):
+            capacity <<= 1
+        self.capacity: int = capacity
+        self._mask: int = capacity - 1
+        self._slots: list[JitterBufferPacket | None] = [None] * capacity
+        self._count: int = 0
+        self.head: int | None = None  # Next sequence number to play out
+        self._newest: int | None = None  # Highest sequence number buffered
+        self.playing: bool = False
         self.lock: threading.Lock = threading.Lock()
 
         # Packet tracking
@@ -81,15 +305,24 @@ def __init__(self, config: dict[str, Any] | None = None) -> None:
         self.packets_dropped: int = 0
         self.packets_late: int = 0
         self.packets_lost: int = 0
+        self.packets_duplicate: int = 0
+        self.packets_concealed: int = 0
 
         # Timing
         self.start_time: float | None = None
         self.current_length_ms: float = self.initial_length_ms
+        self.frame_ms: float = DEFAULT_FRAME_MS
 
         # Statistics for adaptive behavior
         self.jitter_estimate: float = 0.0
         self.last_arrival_time: float | None = None
         self.transit_time_variance: float = 0.0
+        self._last_arrival_timestamp: int | None = None
+        self._last_arrival_sequence: int | None = None
+
+        # Concealment state, created once the codec is known
+        self._concealer: G711Concealer | None = None
+        self._frame_samples: int = 0
 
         self.logger.info(
             "Jitter buffer initialized: "
@@ -98,7 +331,15 @@ def __init__(self, config: dict[str, Any] | None = None) -> None:
             f"adaptive={self.adaptive}"
         )
 
-    def put(self, data: bytes, sequence: int, timestamp: int) -> bool:
+    @property
+    def buffer(self) -> list[JitterBufferPacket]:
+        """Buffered packets in playout order"""
+        with self.lock:
+            return self._ordered_packets()
+
+    def put(
+        self, data: bytes, sequence: int, timestamp: int, payload_type: int | None = None
+    ) -> bool:
         """
         Add packet to jitter buffer
 
@@ -106,6 +347,7 @@ def put(self, data: bytes, sequence: int, timestamp: int) -> bool:
             data: Packet payload
             sequence: RTP sequence number
             timestamp: RTP timestamp
+            payload_type: RTP payload type, used to pick the concealment codec
 
         Returns:
             bool: True if packet accepted, False if dropped
@@ -117,38 +359,60 @@ def put(self, data: bytes, sequence: int, timestamp: int) -> bool:
             if self.start_time is None:
                 self.start_time = arrival_time
 
-            # Create packet
-            packet = JitterBufferPacket(data, sequence, timestamp, arrival_time)
+            if self.codec is None and payload_type in PAYLOAD_TYPE_CODECS:
+                self.codec = PAYLOAD_TYPE_CODECS[payload_type]
 
-            # Check if packet is too late
-            if self.last_sequence is not None:
-                seq_diff = self._sequence_diff(sequence, self.last_sequence)
+            sequence &= 0xFFFF
+            if self.head is None:
+                self.head = sequence
+                self._newest = sequence
 
-                if seq_diff < -10:  # Very old packet
+            offset = self._sequence_diff(sequence, self.head)
+            if offset < 0:
+                # Behind the playout point. Before playout starts a stream may
+                # begin slightly out of order, so move the head back for it.
+                span = self._sequence_diff(self._newest, sequence)
+                if self.playing or -offset > MAX_REORDER or span >= self.capacity:
                     self.packets_late += 1
-                    self.logger.debug(
-                        f"Dropping late packet: seq={sequence}, last_seq={self.last_sequence}"
-                    )
+                    self.logger.debug(f"Dropping late packet: seq={sequence}, next_seq={self.head}")
                     return False
+                self.head = sequence
+                offset = 0
+            elif offset >= self.capacity:
+                # Too far ahead for the ring: skip the head forward to make room
+                self._advance_head(offset - self.capacity + 1)
+
+            slot = sequence & self._mask
+            if self._slots[slot] is not None:
+                self.packets_duplicate += 1
+                return False
+
+            packet = JitterBufferPacket(data, sequence, timestamp, arrival_time)
 
             # Update statistics
             self._update_statistics(packet)
 
-            # Insert packet in order
-            self._insert_ordered(packet)
+            self._slots[slot] = packet
+            self._count += 1
+            if self._sequence_diff(sequence, self._newest) > 0:
+                self._newest = sequence
 
+            self._limit_depth()
             self.packets_received += 1
             return True
 
     def get(self) -> bytes | None:
         """
-        Get next packet from jitter buffer
+        Get the next frame for playout
+
+        Meant to be called once per packet interval. A frame that has not
+        arrived by its turn is concealed (or skipped if it can't be).
 
         Returns:
             bytes: Packet data, or None if buffer empty or not ready
         """
         with self.lock:
-            if len(self.buffer) == 0:
+            if self._count == 0:
                 return None
 
             # Check if enough time has elapsed to start playback
@@ -159,34 +423,108 @@ def get(self) -> bytes | None:
                     # Not enough buffered yet
                     return None
 
-            # Get oldest packet
-            packet = self.buffer.popleft()
+            if self._slots[self.head & self._mask] is not None:
+                return self._take_head()
+            return self._conceal_head()
 
-            # Update last timestamp for gap detection
-            self.last_timestamp = packet.timestamp
-            self.last_sequence = packet.sequence
-
-            return packet.data
+    def pop_ready(self) -> bytes | None:
+        """
+        Get the next frame once it is safe to stop waiting for reordering
 
-    def _insert_ordered(self, packet: JitterBufferPacket) -> None:
-        """Insert packet in sequence order."""
-        # If buffer empty, just append
-        if len(self.buffer) == 0:
-            self.buffer.append(packet)
-            return
+        For consumers without a playout clock (recording, transcoding): the
+        next frame is returned as soon as it is present, and a gap is only
+        given up on and concealed once the buffer holds current_length_ms
+        worth of newer packets.
 
-        # Find insertion point
-        inserted = False
-        for i, buf_packet in enumerate(self.buffer):
-            if self._sequence_diff(packet.sequence, buf_packet.sequence) < 0:
-                # Insert before this packet
-                self.buffer.insert(i, packet)
-                inserted = True
-                break
+        Returns:
+            bytes: Frame data, or None if the next frame should be waited for
+        """
+        with self.lock:
+            if self._count == 0:
+                return None
+            if self._slots[self.head & self._mask] is not None:
+                return self._take_head()
 
-        if not inserted:
-            # Append at end
-            self.buffer.append(packet)
+            depth = max(1, round(self.current_length_ms / self.frame_ms))
+            if self._sequence_diff(self._newest, self.head) < depth:
+                return None
+            return self._conceal_head()
+
+    def _take_head(self) -> bytes:
+        """Remove and return the packet at the head of the ring"""
+        slot = self.head & self._mask
+        packet = self._slots[slot]
+        self._slots[slot] = None
+        self._count -= 1
+        self.head = (self.head + 1) & 0xFFFF
+        self.playing = True
+
+        # Update last timestamp for gap detection
+        self.last_timestamp = packet.timestamp
+        self.last_sequence = packet.sequence
+
+        data = packet.data
+        if self._concealer is None and self.plc_enabled and self.codec in _DECODE_TABLES:
+            self._concealer = G711Concealer(self.codec)
+        if self._concealer is not None:
+            self._frame_samples = len(data)
+            data = self._concealer.good_frame(data)
+        return data
+
+    def _conceal_head(self) -> bytes:
+        """Play out a replacement for the missing head packet"""
+        self.packets_lost += 1
+        self.head = (self.head + 1) & 0xFFFF
+        self.playing = True
+
+        if self._concealer is not None and self._frame_samples:
+            self.packets_concealed += 1
+            return self._concealer.conceal(self._frame_samples)
+
+        # Nothing to conceal with, so move on to the next packet we have
+        while self._slots[self.head & self._mask] is None:
+            self.packets_lost += 1
+            self.head = (self.head + 1) & 0xFFFF
+        return self._take_head()
+
+    def _advance_head(self, count: int) -> None:
+        """Skip the head forward, dropping anything still buffered in between"""
+        if count >= self.capacity:
+            self.packets_dropped += self._count
+            self._slots = [None] * self.capacity
+            self._count = 0
+        else:
+            for i in range(count):
+                slot = (self.head + i) & self._mask
+                if self._slots[slot] is not None:
+                    self._slots[slot] = None
+                    self._count -= 1
+                    self.packets_dropped += 1
+        self.head = (self.head + count) & 0xFFFF
+        if self._count == 0 or self._sequence_diff(self._newest, self.head) < 0:
+            self._newest = self.head
+
+    def _limit_depth(self) -> None:
+        """Drop the oldest frames once playout falls max_length_ms behind"""
+        if not self.playing:
+            return
+        span = self._sequence_diff(self._newest, self.head) + 1
+        limit = max(1, int(self.max_length_ms // self.frame_ms))
+        if span > limit:
+            self._advance_head(span - limit)
+
+    def _ordered_packets(self) -> list[JitterBufferPacket]:
+        """Buffered packets from the head to the newest (caller holds the lock)"""
+        if not self._count:
+            return []
+        span = self._sequence_diff(self._newest, self.head) + 1
+        slots = self._slots
+        packets = []
+        for i in range(span):
+            packet = slots[(self.head + i) & self._mask]
+            if packet is not None:
+                packets.append(packet)
+        return packets
 
     def _sequence_diff(self, seq1: int, seq2: int) -> int:
         """
@@ -208,30 +546,40 @@ def _update_statistics(self, packet: JitterBufferPacket) -> None:
         """Update jitter and timing statistics."""
         if self.last_arrival_time is None:
             self.last_arrival_time = packet.arrival_time
+            self._last_arrival_timestamp = packet.timestamp
+            self._last_arrival_sequence = packet.sequence
             return
 
-        # Calculate inter-arrival jitter (RFC 3550)
+        # Calculate inter-arrival jitter (RFC 3550) against the previous
+        # packet to arrive, which need not be the previous one played out
         arrival_diff = packet.arrival_time - self.last_arrival_time
 
-        # Expected time based on timestamp (assuming 8kHz sample rate)
-        if self.last_timestamp is not None:
-            # Handle 32-bit unsigned timestamp wraparound
-            raw_diff = (packet.timestamp - self.last_timestamp) & 0xFFFFFFFF
-            timestamp_diff = raw_diff if raw_diff < 0x80000000 else (0x100000000 - raw_diff)
-            expected_time = timestamp_diff / 8000.0  # Convert to seconds
+        # Handle 32-bit unsigned timestamp wraparound
+        raw_diff = (packet.timestamp - self._last_arrival_timestamp) & 0xFFFFFFFF
+        timestamp_diff = raw_diff if raw_diff < 0x80000000 else raw_diff - 0x100000000
+        expected_time = timestamp_diff / self.clock_rate  # Convert to seconds
 
-            # Transit time difference
-            transit_diff = abs(arrival_diff - expected_time)
+        # Transit time difference
+        transit_diff = abs(arrival_diff - expected_time)
 
-            # Update jitter estimate (RFC 3550 algorithm)
-            # J(i) = J(i-1) + (|D(i-1,i)| - J(i-1))/16
-            self.jitter_estimate += (transit_diff - self.jitter_estimate) / 16.0
+        # Update jitter estimate (RFC 3550 algorithm)
+        # J(i) = J(i-1) + (|D(i-1,i)| - J(i-1))/16
+        self.jitter_estimate += (transit_diff - self.jitter_estimate) / 16.0
 
-            # Adapt buffer size if enabled
-            if self.adaptive:
-                self._adapt_buffer_size()
+        # Learn the packet interval from consecutive packets
+        if (
+            self._sequence_diff(packet.sequence, self._last_arrival_sequence) == 1
+            and timestamp_diff > 0
+        ):
+            self.frame_ms = timestamp_diff * 1000 / self.clock_rate
+
+        # Adapt buffer size if enabled
+        if self.adaptive:
+            self._adapt_buffer_size()
 
         self.last_arrival_time = packet.arrival_time
+        self._last_arrival_timestamp = packet.timestamp
+        self._last_arrival_sequence = packet.sequence
 
     def _adapt_buffer_size(self) -> None:
         """Adapt buffer size based on jitter."""
@@ -249,11 +597,6 @@ def _adapt_buffer_size(self) -> None:
         # Smooth transition (move 10% toward target each update)
         self.current_length_ms += (target_ms - self.current_length_ms) * 0.1
 
-        self.logger.debug(
-            f"Adaptive jitter buffer: jitter={self.jitter_estimate * 1000:.1f}ms, "
-            f"buffer={self.current_length_ms:.1f}ms"
-        )
-
     def get_statistics(self) -> dict[str, Any]:
         """
         Get jitter buffer statistics
@@ -267,28 +610,41 @@ def get_statistics(self) -> dict[str, Any]:
                 "packets_dropped": self.packets_dropped,
                 "packets_late": self.packets_late,
                 "packets_lost": self.packets_lost,
-                "packets_buffered": len(self.buffer),
+                "packets_duplicate": self.packets_duplicate,
+                "packets_concealed": self.packets_concealed,
+                "packets_buffered": self._count,
                 "jitter_ms": self.jitter_estimate * 1000,
                 "current_length_ms": self.current_length_ms,
                 "initial_length_ms": self.initial_length_ms,
                 "max_length_ms": self.max_length_ms,
+                "capacity": self.capacity,
                 "adaptive": self.adaptive,
             }
 
     def reset(self) -> None:
         """Reset jitter buffer state."""
         with self.lock:
-            self.buffer.clear()
+            self._slots = [None] * self.capacity
+            self._count = 0
+            self.head = None
+            self._newest = None
+            self.playing = False
             self.last_sequence = None
             self.last_timestamp = None
             self.packets_received = 0
             self.packets_dropped = 0
             self.packets_late = 0
             self.packets_lost = 0
+            self.packets_duplicate = 0
+            self.packets_concealed = 0
             self.start_time = None
             self.current_length_ms = self.initial_length_ms
+            self.frame_ms = DEFAULT_FRAME_MS
             self.jitter_estimate = 0.0
             self.last_arrival_time = None
+            self._last_arrival_timestamp = None
+            self._last_arrival_sequence = None
+            self._concealer = None
 
             self.logger.info("Jitter buffer reset")
 
@@ -300,8 +656,12 @@ def flush(self) -> list[bytes]:
             list: All buffered packets in order
         """
         with self.lock:
-            packets = [p.data for p in self.buffer]
-            self.buffer.clear()
+            packets = [p.data for p in self._ordered_packets()]
+            self._slots = [None] * self.capacity
+            self._count = 0
+            if self.head is not None:
+                self.head = (self._newest + 1) & 0xFFFF
+                self._newest = self.head
             return packets
 
     def set_length(self, length_ms: int) -> None:
@@ -318,6 +678,31 @@ def set_length(self, length_ms: int) -> None:
             self.logger.info(f"Jitter buffer length set to {self.current_length_ms}ms")
 
 
+def create_stage_buffer(
+    rtp_config: dict[str, Any] | None, stage: str, codec: str | None = None
+) -> JitterBuffer | None:
+    """
+    Create a jitter buffer for a media path if the configuration enables it
+
+    Args:
+        rtp_config: The ``rtp.jitter_buffer`` configuration section
+        stage: STAGE_RECORDING, STAGE_CONFERENCE or STAGE_TRANSCODING
+        codec: Codec of the stream, if already negotiated
+
+    Returns:
+        JitterBuffer, or None if the stage runs without one
+    """
+    if not rtp_config or not rtp_config.get("enabled", False):
+        return None
+    if stage not in (rtp_config.get("stages") or []):
+        return None
+
+    config = {key: value for key, value in rtp_config.items() if key not in ("enabled", "stages")}
+    if codec:
+        config["codec"] = codec
+    return JitterBuffer(config)
+
+
 class JitterBufferManager:
     """Manager for multiple jitter buffers (one per call)."""
 
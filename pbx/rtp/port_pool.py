@@ -0,0 +1,362 @@
+"""
+RTP port pool
+Hands out even/odd RTP/RTCP port pairs in constant time and keeps a few
+pairs bound ahead of demand so call setup doesn't wait on socket creation
+"""
+
+import contextlib
+import socket
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Container
+from typing import Any
+
+from pbx.utils.logger import get_logger
+
+# Expedited Forwarding, the DSCP value phones are provisioned to mark RTP with
+DSCP_EF = 46
+
+# Ports tried before giving up when binding on demand fails
+MAX_BIND_ATTEMPTS = 3
+
+
+class PortLease:
+    """An RTP/RTCP port pair handed out to a call"""
+
+    __slots__ = ("acquired_at", "owner", "rtcp_socket", "rtp_port", "rtp_socket")
+
+    def __init__(
+        self,
+        rtp_port: int,
+        owner: str,
+        acquired_at: float,
+        rtp_socket: socket.socket | None = None,
+        rtcp_socket: socket.socket | None = None,
+    ) -> None:
+        self.rtp_port = rtp_port
+        self.owner = owner
+        self.acquired_at = acquired_at
+        self.rtp_socket = rtp_socket
+        self.rtcp_socket = rtcp_socket
+
+    @property
+    def rtcp_port(self) -> int:
+        return self.rtp_port + 1
+
+
+class RTPPortPool:
+    """
+    Pool of RTP/RTCP port pairs
+
+    Free ports wait in a FIFO queue, so allocation and release are O(1) and
+    a released port goes to the back of the line. On top of that a released
+    port is quarantined for a few seconds before it can be handed out again,
+    so late packets from the previous call can't leak into the next one.
+
+    Up to ``prebind`` pairs are kept bound and tuned (DSCP, buffer sizes)
+    ahead of demand; maintain() tops them up off the call setup path.
+    """
+
+    def __init__(
+        self,
+        port_range_start: int = 10000,
+        port_range_end: int = 20000,
+        prebind: int = 0,
+        quarantine_seconds: float = 2.0,
+        dscp: int | None = DSCP_EF,
+        buffer_bytes: int | None = None,
+        clock: Callable[[], float] | None = None,
+    ) -> None:
+        """
+        Initialize RTP port pool
+
+        Args:
+            port_range_start: First RTP port (even ports carry RTP, odd RTCP)
+            port_range_end: End of the port range (exclusive)
+            prebind: Number of port pairs to keep bound ahead of demand
+            quarantine_seconds: Time a released port rests before reuse
+            dscp: DSCP value to mark outgoing media with, or None to leave unset
+            buffer_bytes: Socket send/receive buffer size, or None for the OS default
+            clock: Monotonic time source (for tests)
+        """
+        self.logger = get_logger()
+        self.port_range_start = port_range_start
+        self.port_range_end = port_range_end
+        self.prebind = prebind
+        self.quarantine_seconds = quarantine_seconds
+        self.dscp = dscp
+        self.buffer_bytes = buffer_bytes
+        self.clock = clock or time.monotonic
+
+        self.total: int = len(range(port_range_start, port_range_end, 2))
+        self._free: deque[int] = deque(range(port_range_start, port_range_end, 2))
+        self._bound: deque[tuple[int, socket.socket, socket.socket]] = deque()
+        self._quarantine: deque[tuple[float, int]] = deque()
+        self.leases: dict[int, PortLease] = {}
+        self._binding: int = 0  # Ports taken out of the queue by maintain()
+        self._lock = threading.Lock()
+        # Set when the bound reserve runs low so the maintenance thread refills it
+        self.demand = threading.Event()
+
+        # Statistics
+        self.allocations: int = 0
+        self.releases: int = 0
+        self.exhaustions: int = 0
+        self.bind_failures: int = 0
+        self.leaks_reclaimed: int = 0
+        self.peak_in_use: int = 0
+        self.last_exhausted: float | None = None
+
+    def __len__(self) -> int:
+        """Number of ports available to allocate right now"""
+        with self._lock:
+            self._expire_quarantine(self.clock())
+            return len(self._free) + len(self._bound)
+
+    def __contains__(self, port: object) -> bool:
+        """Whether a port is free or resting in quarantine"""
+        with self._lock:
+            return (
+                port in self._free
+                or any(port == bound[0] for bound in self._bound)
+                or any(port == rested for _, rested in self._quarantine)
+            )
+
+    def acquire(self, owner: str, bind: bool = False) -> PortLease | None:
+        """
+        Take a port pair from the pool
+
+        Args:
+            owner: Call ID the ports belong to (checked by find_leaks())
+            bind: Hand out bound sockets with the lease; otherwise the
+                ports are left unbound for the caller to bind itself
+
+        Returns:
+            PortLease, or None if the pool is exhausted or binding failed
+        """
+        for _ in range(MAX_BIND_ATTEMPTS):
+            lease, stale = self._take(owner, bind)
+            for sock in stale:
+                sock.close()
+            if lease is None:
+                return None
+            if not bind:
+                return lease
+            if lease.rtp_socket is not None:
+                self._drain(lease.rtp_socket)
+                return lease
+
+            # No bound pair in reserve: bind one now
+            try:
+                lease.rtp_socket, lease.rtcp_socket = self._bind_pair(lease.rtp_port)
+                return lease
+            except OSError as e:
+                self.logger.warning(f"Failed to bind RTP port {lease.rtp_port}: {e}")
+                with self._lock:
+                    self.bind_failures += 1
+                self.release(lease.rtp_port)
+        return None
+
+    def _take(self, owner: str, bind: bool) -> tuple[PortLease | None, list[socket.socket]]:
+        """Pop a port pair and record its lease; returns sockets to close outside the lock"""
+        stale: list[socket.socket] = []
+        with self._lock:
+            now = self.clock()
+            self._expire_quarantine(now)
+            rtp_sock = rtcp_sock = None
+            if self._bound and (bind or not self._free):
+                port, rtp_sock, rtcp_sock = self._bound.popleft()
+                if not bind:
+                    stale = [rtp_sock, rtcp_sock]
+                    rtp_sock = rtcp_sock = None
+            elif self._free:
+                port = self._free.popleft()
+            else:
+                self.exhaustions += 1
+                self.last_exhausted = now
+                self.logger.error(
+                    f"RTP port pool exhausted: {len(self.leases)} in use, "
+                    f"{len(self._quarantine)} in quarantine"
+                )
+                return None, stale
+
+            lease = PortLease(port, owner, now, rtp_sock, rtcp_sock)
+            self.leases[port] = lease
+            self.allocations += 1
+            self.peak_in_use = max(self.peak_in_use, len(self.leases))
+            if len(self._bound) < self.prebind // 2 + 1 and self._free:
+                self.demand.set()
+        return lease, stale
+
+    def release(self, port: int) -> bool:
+        """
+        Return a port pair to the pool
+
+        The port rests in quarantine before it can be allocated again. Any
+        sockets still attached to the lease are closed.
+
+        Returns:
+            True if the port was leased, False for an unknown or repeated release
+        """
+        return self._release(port)
+
+    def reclaim(self, lease: PortLease) -> bool:
+        """
+        Release a leaked lease found by find_leaks() and count it
+
+        Returns:
+            False if the lease was released, or its port leased again, since
+            it was found
+        """
+        return self._release(lease.rtp_port, lease)
+
+    def _release(self, port: int, leaked: PortLease | None = None) -> bool:
+        """Quarantine a leased port and close its sockets"""
+        with self._lock:
+            lease = self.leases.get(port)
+            if lease is None or (leaked is not None and lease is not leaked):
+                return False
+            del self.leases[port]
+            self._quarantine.append((self.clock() + self.quarantine_seconds, port))
+            self.releases += 1
+            if leaked is not None:
+                self.leaks_reclaimed += 1
+        for sock in (lease.rtp_socket, lease.rtcp_socket):
+            if sock is not None:
+                sock.close()
+        return True
+
+    def transfer(self, port: int, owner: str) -> None:
+        """Hand a leased port pair to another call"""
+        with self._lock:
+            lease = self.leases.get(port)
+            if lease:
+                lease.owner = owner
+
+    def find_leaks(self, active_owners: Container[str], min_age: float = 60.0) -> list[PortLease]:
+        """
+        Find leases whose owner is gone
+
+        Args:
+            active_owners: Call IDs that are still live
+            min_age: Ignore leases younger than this, so calls still being
+                set up aren't reported
+
+        Returns:
+            Leases held by owners not in active_owners
+        """
+        cutoff = self.clock() - min_age
+        with self._lock:
+            leases = list(self.leases.values())
+        return [
+            lease
+            for lease in leases
+            if lease.acquired_at <= cutoff and lease.owner not in active_owners
+        ]
+
+    def maintain(self) -> int:
+        """
+        Move rested ports out of quarantine and top up the bound reserve
+
+        Sockets are bound outside the lock, so allocation carries on meanwhile.
+
+        Returns:
+            Number of port pairs bound
+        """
+        self.demand.clear()
+        with self._lock:
+            self._expire_quarantine(self.clock())
+            wanted = max(0, self.prebind - len(self._bound) - self._binding)
+            ports = [self._free.popleft() for _ in range(min(wanted, len(self._free)))]
+            self._binding += len(ports)
+
+        bound = 0
+        for port in ports:
+            try:
+                rtp_sock, rtcp_sock = self._bind_pair(port)
+            except OSError as e:
+                self.logger.debug(f"Could not pre-bind RTP port {port}: {e}")
+                with self._lock:
+                    self._binding -= 1
+                    self.bind_failures += 1
+                    self._quarantine.append((self.clock() + self.quarantine_seconds, port))
+                continue
+            with self._lock:
+                self._binding -= 1
+                self._bound.append((port, rtp_sock, rtcp_sock))
+            bound += 1
+        return bound
+
+    def close(self) -> None:
+        """Close the bound reserve, returning its ports to the free queue"""
+        with self._lock:
+            bound = list(self._bound)
+            self._bound.clear()
+            self._free.extendleft(port for port, _, _ in reversed(bound))
+        for _, rtp_sock, rtcp_sock in bound:
+            rtp_sock.close()
+            rtcp_sock.close()
+
+    def get_statistics(self) -> dict[str, Any]:
+        """Get pool occupancy and exhaustion statistics"""
+        with self._lock:
+            self._expire_quarantine(self.clock())
+            available = len(self._free) + len(self._bound)
+            return {
+                "total": self.total,
+                "available": available,
+                "prebound": len(self._bound),
+                "in_use": len(self.leases),
+                "quarantined": len(self._quarantine),
+                "peak_in_use": self.peak_in_use,
+                "utilization": round(len(self.leases) / self.total, 3) if self.total else 0.0,
+                "allocations": self.allocations,
+                "releases": self.releases,
+                "exhaustions": self.exhaustions,
+                "last_exhausted": self.last_exhausted,
+                "bind_failures": self.bind_failures,
+                "leaks_reclaimed": self.leaks_reclaimed,
+            }
+
+    def _expire_quarantine(self, now: float) -> None:
+        """Free ports whose quarantine has run out (caller holds the lock)"""
+        while self._quarantine and self._quarantine[0][0] <= now:
+            self._free.append(self._quarantine.popleft()[1])
+
+    def _bind_pair(self, port: int) -> tuple[socket.socket, socket.socket]:
+        """Bind and tune sockets for an RTP port and its RTCP neighbour"""
+        sockets: list[socket.socket] = []
+        try:
+            for local_port in (port, port + 1):
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                sockets.append(sock)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                if self.dscp is not None:
+                    with contextlib.suppress(OSError):
+                        sock.setsockopt(socket.IPPROTO_IP, socket.IP_TOS, self.dscp << 2)
+                if self.buffer_bytes:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.buffer_bytes)
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.buffer_bytes)
+                sock.settimeout(1.0)
+                sock.bind(
+                    ("0.0.0.0", local_port)  # nosec B104 - RTP needs to bind all interfaces
+                )
+        except OSError:
+            for sock in sockets:
+                sock.close()
+            raise
+        return sockets[0], sockets[1]
+
+    @staticmethod
+    def _drain(sock: socket.socket) -> None:
+        """Discard packets that reached a reserve socket before it was handed out"""
+        timeout = sock.gettimeout()
+        sock.setblocking(False)
+        try:
+            while True:
+                sock.recv(2048)
+        except OSError:
+            pass
+        finally:
+            sock.settimeout(timeout)
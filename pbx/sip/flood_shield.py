@@ -0,0 +1,359 @@
+"""
+SIP flood shield
+Cheap admission checks on raw datagrams, so floods and scanners are shed
+before the SIP server parses them or spawns a handler thread
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from pbx.utils.logger import get_logger, get_rate_limited_logger
+
+# User-Agent fragments of SIP scanners and war-dialers
+SCANNER_SIGNATURES: tuple[bytes, ...] = (
+    b"friendly-scanner",
+    b"sipvicious",
+    b"sipcli",
+    b"sip-scan",
+    b"sundayddr",
+    b"iwar",
+    b"vaxsipuseragent",
+    b"pplsip",
+)
+
+# Default (rate per second, burst) for each source and method. Methods not
+# listed share the "*" bucket; responses are only counted per source.
+DEFAULT_METHOD_LIMITS: dict[str, tuple[float, int]] = {
+    "REGISTER": (5, 20),
+    "INVITE": (10, 30),
+    "OPTIONS": (5, 20),
+    "SUBSCRIBE": (5, 20),
+    "MESSAGE": (10, 30),
+    "*": (50, 100),
+}
+
+# Bytes searched for the User-Agent header; it sits well inside the first
+# datagram of any real client
+HEADER_SCAN_BYTES = 2048
+
+# Heavy hitters remembered for statistics
+MAX_HEAVY_HITTERS = 1000
+
+# Seconds between lookups of trunk and SBC peer addresses
+PEER_REFRESH_SECONDS = 30.0
+
+DROP_BLOCKED = "blocked"
+DROP_SCANNER = "scanner"
+DROP_HEAVY_HITTER = "heavy_hitter"
+DROP_SOURCE_RATE = "source_rate"
+DROP_METHOD_RATE = "method_rate"
+
+
+class _TokenBucket:
+    """Token bucket refilled lazily on each take"""
+
+    __slots__ = ("burst", "rate", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: int, now: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class CountMinSketch:
+    """
+    Fixed-size frequency sketch for spotting heavy hitters
+
+    Estimates never undercount; with ``width`` counters per row the
+    overcount is at most total/width with high probability. Memory stays
+    at width * depth counters however many sources send.
+    """
+
+    def __init__(self, width: int = 1024, depth: int = 4) -> None:
+        self.width = width
+        self.depth = depth
+        self.rows: list[list[int]] = [[0] * width for _ in range(depth)]
+        self.total: int = 0
+
+    def add(self, key: str) -> int:
+        """Count one occurrence of key and return its new estimate"""
+        estimate = None
+        for seed, row in enumerate(self.rows):
+            index = hash((seed, key)) % self.width
+            row[index] += 1
+            if estimate is None or row[index] < estimate:
+                estimate = row[index]
+        self.total += 1
+        return estimate or 0
+
+    def estimate(self, key: str) -> int:
+        """Estimated count for key"""
+        return min(row[hash((seed, key)) % self.width] for seed, row in enumerate(self.rows))
+
+    def clear(self) -> None:
+        for row in self.rows:
+            row[:] = [0] * self.width
+        self.total = 0
+
+
+class SIPFloodShield:
+    """
+    Admission control for raw SIP datagrams
+
+    Checks run cheapest first: the temporary drop list, the heavy-hitter
+    sketch, a User-Agent scan for known scanners, then per-source and
+    per-source-per-method token buckets. Only the request line and the
+    User-Agent header are looked at; nothing is parsed.
+
+    Addresses listed under ``trusted`` are never checked, and neither are
+    the current addresses of trunks and SBC peers named by ``peer_hosts``;
+    those are looked up in the DNS cache every PEER_REFRESH_SECONDS and
+    after each reload.
+
+    admit() runs on the SIP listener thread, while configure() and peer
+    refreshes can come from config reload subscribers and unblock() and
+    get_statistics() from API threads, so every entry point holds _lock.
+    """
+
+    def __init__(
+        self,
+        config: dict | None = None,
+        clock: Callable[[], float] | None = None,
+    ) -> None:
+        """
+        Initialize SIP flood shield
+
+        Args:
+            config: The ``sip.flood_shield`` configuration section
+            clock: Monotonic time source (for tests)
+        """
+        self.logger = get_logger()
+        self.drop_logger = get_rate_limited_logger("SIP.shield", rate=1, burst=5)
+        self.clock = clock or time.monotonic
+
+        # Consulted for blocks made elsewhere (API, failed auth); set by PBXCore
+        self.threat_detector: Any = None
+        # Host names or addresses of trunks and SBC peers, and the DNS
+        # resolver that looks them up; set by PBXCore
+        self.peer_hosts: Callable[[], Iterable[str]] | None = None
+        self.resolver: Any = None
+        self.peer_addresses: set[str] = set()
+        self._peers_due: float = 0.0
+        self._lock = threading.Lock()
+
+        self.drop_list: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._sources: OrderedDict[str, _TokenBucket] = OrderedDict()
+        self._methods: OrderedDict[tuple[str, bytes], _TokenBucket] = OrderedDict()
+        self.heavy_hitters: dict[str, int] = {}
+        self.sketch: CountMinSketch | None = None
+        self.configure(config or {})
+
+        # Statistics
+        self.admitted: int = 0
+        self.dropped: dict[str, int] = dict.fromkeys(
+            (DROP_BLOCKED, DROP_SCANNER, DROP_HEAVY_HITTER, DROP_SOURCE_RATE, DROP_METHOD_RATE), 0
+        )
+
+    def configure(self, config: dict) -> None:
+        """
+        Apply limits from the ``sip.flood_shield`` configuration section
+
+        Safe to call again on a config reload: rate buckets restart with the
+        new limits, while the drop list is kept. Peer addresses are looked
+        up again on the next datagram.
+        """
+        with self._lock:
+            self._configure(config)
+
+    def _configure(self, config: dict) -> None:
+        self.source_rate: float = config.get("source_rate", 50)
+        self.source_burst: int = config.get("source_burst", 200)
+        method_limits = {method.encode(): limit for method, limit in DEFAULT_METHOD_LIMITS.items()}
+        for method, limit in config.get("methods", {}).items():
+            method_limits[method.upper().encode()] = (limit["rate"], limit["burst"])
+        self.method_limits: dict[bytes, tuple[float, int]] = method_limits
+        self.max_sources: int = config.get("max_sources", 65536)
+        self.configured_trusted: set[str] = set(config.get("trusted", ["127.0.0.1"]))
+        self.trusted: set[str] = self.configured_trusted | self.peer_addresses
+        self._peers_due = 0.0
+
+        self.scanner_block_seconds: float = config.get("scanner_block_seconds", 3600)
+        self.heavy_hitter_threshold: int = config.get("heavy_hitter_threshold", 2000)
+        self.heavy_hitter_window: float = config.get("heavy_hitter_window", 10.0)
+        self.heavy_hitter_block_seconds: float = config.get("heavy_hitter_block_seconds", 60)
+
+        width = config.get("sketch_width", 1024)
+        if self.sketch is None or self.sketch.width != width:
+            self.sketch = CountMinSketch(width)
+        else:
+            self.sketch.clear()
+        self._window_end: float = self.clock() + self.heavy_hitter_window
+        self._sources.clear()
+        self._methods.clear()
+
+    def admit(self, data: bytes, ip: str) -> bool:
+        """
+        Decide whether a datagram goes on to the SIP parser
+
+        Args:
+            data: Raw datagram
+            ip: Source IP address
+
+        Returns:
+            True to process the datagram, False to drop it
+        """
+        with self._lock:
+            return self._admit(data, ip)
+
+    def _admit(self, data: bytes, ip: str) -> bool:
+        now = self.clock()
+        if now >= self._peers_due and self.peer_hosts is not None:
+            self._refresh_peers(now)
+        if ip in self.trusted:
+            self.admitted += 1
+            return True
+
+        entry = self.drop_list.get(ip)
+        if entry is not None:
+            if now < entry[0]:
+                self.dropped[DROP_BLOCKED] += 1
+                return False
+            del self.drop_list[ip]
+        if self.threat_detector and self.threat_detector.is_ip_blocked(ip)[0]:
+            self.dropped[DROP_BLOCKED] += 1
+            return False
+
+        if now >= self._window_end:
+            self.sketch.clear()
+            self._window_end = now + self.heavy_hitter_window
+        count = self.sketch.add(ip)
+        if count > self.heavy_hitter_threshold:
+            self.heavy_hitters[ip] = count
+            if len(self.heavy_hitters) > MAX_HEAVY_HITTERS:
+                del self.heavy_hitters[next(iter(self.heavy_hitters))]
+            self._drop(ip, now, self.heavy_hitter_block_seconds, DROP_HEAVY_HITTER)
+            return False
+
+        if self._is_scanner(data):
+            self._drop(ip, now, self.scanner_block_seconds, DROP_SCANNER)
+            return False
+
+        if not self._take(self._sources, ip, now, self.source_rate, self.source_burst):
+            self._shed(ip, DROP_SOURCE_RATE)
+            return False
+
+        space = data.find(b" ", 0, 16)
+        method = data[:space] if space > 0 else b""
+        if method and method != b"SIP/2.0":
+            if method not in self.method_limits:
+                method = b"*"
+            rate, burst = self.method_limits[method]
+            if not self._take(self._methods, (ip, method), now, rate, burst):
+                self._shed(ip, DROP_METHOD_RATE)
+                return False
+
+        self.admitted += 1
+        return True
+
+    def refresh_peers(self, now: float | None = None) -> None:
+        """
+        Trust the current addresses of trunks and SBC peers
+
+        Only cached DNS answers are used; a host that isn't resolved yet is
+        queried in the background and picked up on a later refresh.
+        """
+        with self._lock:
+            self._refresh_peers(now)
+
+    def _refresh_peers(self, now: float | None) -> None:
+        addresses: set[str] = set()
+        try:
+            for host in self.peer_hosts() if self.peer_hosts else ():
+                if self.resolver is not None:
+                    addresses.update(self.resolver.resolve_host(host))
+                elif host:
+                    addresses.add(host)
+        except Exception as e:
+            self.logger.warning(f"SIP flood shield: could not look up trunk addresses: {e}")
+            addresses = self.peer_addresses
+        if addresses != self.peer_addresses:
+            self.logger.info(
+                f"SIP flood shield: trusting peers {', '.join(sorted(addresses)) or 'none'}"
+            )
+        self.peer_addresses = addresses
+        self.trusted = self.configured_trusted | addresses
+        self._peers_due = (self.clock() if now is None else now) + PEER_REFRESH_SECONDS
+
+    def unblock(self, ip: str) -> bool:
+        """Take an address off the drop list"""
+        with self._lock:
+            self.heavy_hitters.pop(ip, None)
+            return self.drop_list.pop(ip, None) is not None
+
+    def get_statistics(self) -> dict[str, Any]:
+        """Get admission counters, drop list size and the top heavy hitters"""
+        with self._lock:
+            top = sorted(self.heavy_hitters.items(), key=lambda item: item[1], reverse=True)[:10]
+            return {
+                "admitted": self.admitted,
+                "dropped": dict(self.dropped),
+                "dropped_total": sum(self.dropped.values()),
+                "drop_list_size": len(self.drop_list),
+                "tracked_sources": len(self._sources),
+                "trusted_peers": sorted(self.peer_addresses),
+                "heavy_hitters": [{"ip": ip, "packets": count} for ip, count in top],
+            }
+
+    def _is_scanner(self, data: bytes) -> bool:
+        """Whether the User-Agent header names a known scanner"""
+        head = data[:HEADER_SCAN_BYTES].lower()
+        start = head.find(b"\nuser-agent:")
+        if start < 0:
+            return False
+        end = head.find(b"\n", start + 1)
+        user_agent = head[start:end] if end > 0 else head[start:]
+        return any(signature in user_agent for signature in SCANNER_SIGNATURES)
+
+    def _take(
+        self,
+        buckets: OrderedDict,
+        key: Any,
+        now: float,
+        rate: float,
+        burst: int,
+    ) -> bool:
+        """Take a token from key's bucket, creating it and evicting the stalest if full"""
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = _TokenBucket(rate, burst, now)
+            if len(buckets) > self.max_sources:
+                buckets.popitem(last=False)
+        else:
+            buckets.move_to_end(key)
+        return bucket.take(now)
+
+    def _drop(self, ip: str, now: float, seconds: float, reason: str) -> None:
+        """Put a source on the temporary drop list"""
+        self.dropped[reason] += 1
+        self.drop_list[ip] = (now + seconds, reason)
+        self.drop_list.move_to_end(ip)
+        if len(self.drop_list) > self.max_sources:
+            self.drop_list.popitem(last=False)
+        self._sources.pop(ip, None)
+        self.logger.warning(f"SIP flood shield: dropping {ip} for {seconds:.0f}s ({reason})")
+
+    def _shed(self, ip: str, reason: str) -> None:
+        self.dropped[reason] += 1
+        self.drop_logger.debug("SIP flood shield: shed datagram from %s (%s)", ip, reason)
@@ -13,6 +13,7 @@
 
 if TYPE_CHECKING:
     from pbx.core.pbx import PBXCore
+    from pbx.sip.flood_shield import SIPFloodShield
 
 # Type alias for network address tuples
 type AddrTuple = tuple[str, int]
@@ -67,6 +68,7 @@ def __init__(
         host: str = "0.0.0.0",
         port: int = 5060,
         pbx_core: PBXCore | None = None,  # nosec B104 - SIP server needs to bind all interfaces
+        flood_shield: SIPFloodShield | None = None,
     ) -> None:
         """
         Initialize SIP server.
@@ -75,10 +77,12 @@ def __init__(
             host: Host to bind to.
             port: Port to bind to.
             pbx_core: Reference to PBX core.
+            flood_shield: Optional admission check run on each datagram before parsing.
         """
         self.host: str = host
         self.port: int = port
         self.pbx_core: PBXCore | None = pbx_core
+        self.flood_shield: SIPFloodShield | None = flood_shield
         self.logger = get_logger()
         self.socket: socket.socket | None = None
         self.running: bool = False
@@ -139,6 +143,10 @@ def _listen(self) -> None:
             try:
                 data, addr = self.socket.recvfrom(65535)
 
+                # Shed floods and scanners before parsing or starting a thread
+                if self.flood_shield and not self.flood_shield.admit(data, addr[0]):
+                    continue
+
                 try:
                     message_text = data.decode("utf-8")
                 except UnicodeDecodeError:
@@ -172,7 +180,7 @@ def _handle_message(self, raw_message: str, addr: AddrTuple) -> None:
         try:
             message = SIPMessage(raw_message)
 
-            self.logger.debug(f"Received {message.method or message.status_code} from {addr}")
+            self.logger.debug("Received %s from %s", message.method or message.status_code, addr)
 
             if message.is_request():
                 self._handle_request(message, addr)
@@ -261,7 +269,12 @@ def _handle_register(self, message: SIPMessage, addr: AddrTuple) -> None:
                 except (ValueError, TypeError):
                     expires_value = 3600
                 success = self.pbx_core.register_extension(
-                    from_header, addr, user_agent, contact, expires=expires_value
+                    from_header,
+                    addr,
+                    user_agent,
+                    contact,
+                    expires=expires_value,
+                    call_id=message.get_header("Call-ID"),
                 )
                 if success:
                     response = SIPMessageBuilder.build_response(200, "OK", message)
@@ -296,6 +309,7 @@ def _handle_register(self, message: SIPMessage, addr: AddrTuple) -> None:
                     user_agent,
                     contact,
                     expires=expires_value,
+                    call_id=message.get_header("Call-ID"),
                 )
                 if success:
                     self._send_response(200, "OK", message, addr)
@@ -680,7 +694,7 @@ def _handle_ack(self, message: SIPMessage, addr: AddrTuple) -> None:
             message: SIPMessage object.
             addr: Source address tuple.
         """
-        self.logger.debug(f"ACK request from {addr}")
+        self.logger.debug("ACK request from %s", addr)
 
         # Forward ACK to complete the three-way handshake
         if self.pbx_core:
@@ -690,7 +704,7 @@ def _handle_ack(self, message: SIPMessage, addr: AddrTuple) -> None:
                 if call and call.callee_addr:
                     # Forward ACK to callee
                     self._send_message(message.build(), call.callee_addr)
-                    self.logger.debug(f"Forwarded ACK to callee for call {call_id}")
+                    self.logger.debug("Forwarded ACK to callee for call %s", call_id)
 
         # ACK is not responded to
 
@@ -803,7 +817,7 @@ def _handle_options(self, message: SIPMessage, addr: AddrTuple) -> None:
             message: SIPMessage object.
             addr: Source address tuple.
         """
-        self.logger.debug(f"OPTIONS request from {addr}")
+        self.logger.debug("OPTIONS request from %s", addr)
         response = SIPMessageBuilder.build_response(200, "OK", message)
         response.set_header(
             "Allow",
@@ -825,7 +839,7 @@ def _handle_subscribe(self, message: SIPMessage, addr: AddrTuple) -> None:
         import re
         import time
 
-        self.logger.debug(f"SUBSCRIBE request from {addr}")
+        self.logger.debug("SUBSCRIBE request from %s", addr)
 
         event = message.get_header("Event")
         expires_str = message.get_header("Expires") or "3600"
@@ -979,7 +993,7 @@ def _send_event_notify(
             notify_msg.set_header("Content-Length", str(len(body.encode("utf-8"))))
 
         self._send_message(notify_msg.build(), addr)
-        self.logger.debug(f"Sent NOTIFY for event {event} to {addr}")
+        self.logger.debug("Sent NOTIFY for event %s to %s", event, addr)
 
     def _get_event_state(self, event: str, to_header: str) -> str:
         """
@@ -1084,7 +1098,7 @@ def _handle_notify(self, message: SIPMessage, addr: AddrTuple) -> None:
             message: SIPMessage object.
             addr: Source address tuple.
         """
-        self.logger.debug(f"NOTIFY request from {addr}")
+        self.logger.debug("NOTIFY request from %s", addr)
         # Acknowledge the notification
         self._send_response(200, "OK", message, addr)
 
@@ -1210,9 +1224,7 @@ def _handle_refer(self, message: SIPMessage, addr: AddrTuple) -> None:
                     new_call.rtp_ports = call.rtp_ports
 
                     # Transfer RTP relay ownership before ending old call
-                    relay_info = self.pbx_core.rtp_relay.active_relays.pop(call_id, None)
-                    if relay_info:
-                        self.pbx_core.rtp_relay.active_relays[new_call_id] = relay_info
+                    self.pbx_core.rtp_relay.transfer_relay(call_id, new_call_id)
 
                     # Send success NOTIFY
                     self._send_transfer_notify(message, addr, "SIP/2.0 200 OK", call_id)
@@ -1294,7 +1306,7 @@ def _handle_info(self, message: SIPMessage, addr: AddrTuple) -> None:
             message: SIPMessage object.
             addr: Source address tuple.
         """
-        self.logger.debug(f"INFO request from {addr}")
+        self.logger.debug("INFO request from %s", addr)
 
         # Get call context
         call_id = message.get_header("Call-ID")
@@ -1444,7 +1456,7 @@ def _handle_prack(self, message: SIPMessage, addr: AddrTuple) -> None:
             message: SIPMessage object.
             addr: Source address tuple.
         """
-        self.logger.debug(f"PRACK request from {addr}")
+        self.logger.debug("PRACK request from %s", addr)
 
         rack_header = message.get_header("RAck")
         call_id = message.get_header("Call-ID")
@@ -1482,7 +1494,7 @@ def _handle_prack(self, message: SIPMessage, addr: AddrTuple) -> None:
             call = self.pbx_core.call_manager.get_call(call_id)
             if call and call.callee_addr and call.callee_addr != addr:
                 self._send_message(message.build(), call.callee_addr)
-                self.logger.debug(f"Forwarded PRACK to callee for call {call_id}")
+                self.logger.debug("Forwarded PRACK to callee for call %s", call_id)
 
         self._send_response(200, "OK", message, addr)
 
@@ -1731,7 +1743,7 @@ def _handle_response(self, message: SIPMessage, addr: AddrTuple) -> None:
             message: SIPMessage object.
             addr: Source address tuple.
         """
-        self.logger.debug(f"Received response {message.status_code} from {addr}")
+        self.logger.debug("Received response %s from %s", message.status_code, addr)
 
         # Handle responses from callee
         if self.pbx_core and message.status_code:
@@ -1898,6 +1910,6 @@ def _send_message(self, message: str, addr: AddrTuple) -> None:
                 self.logger.warning("Cannot send message: socket is closed")
                 return
             self.socket.sendto(message.encode("utf-8"), addr)
-            self.logger.debug(f"Sent message to {addr}")
+            self.logger.debug("Sent message to %s", addr)
         except OSError as e:
             self.logger.error(f"Error sending message: {e}")
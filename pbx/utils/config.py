@@ -1,7 +1,10 @@
 """Configuration management for PBX system."""
 
+import copy
 import logging
 import re
+import threading
+from collections.abc import Callable
 from pathlib import Path
 
 import yaml
@@ -10,6 +13,131 @@
 
 logger = logging.getLogger(__name__)
 
+_TRUE_STRINGS = frozenset({"1", "true", "yes", "on"})
+_FALSE_STRINGS = frozenset({"0", "false", "no", "off", ""})
+
+
+class ConfigSnapshot:
+    """
+    Flattened, read-only view of a configuration tree
+
+    Every dotted path that Config.get() can resolve, sections as well as
+    leaves, is precomputed into one dict, so a lookup is a single hash
+    probe. A snapshot is never modified; reloading builds a new one and
+    swaps it in. Sections and lists are handed out as copies, so a caller
+    changing what it got back can't change the snapshot.
+    """
+
+    __slots__ = ("_values", "version")
+
+    def __init__(self, tree: dict, version: int = 0) -> None:
+        """
+        Compile a configuration tree
+
+        Args:
+            tree: Parsed configuration; copied, so later changes to it
+                don't show through
+            version: Reload counter, for diagnostics
+        """
+        self._values: dict[str, object] = {}
+        self.version = version
+        self._flatten(copy.deepcopy(tree), "")
+
+    def _flatten(self, tree: dict, prefix: str) -> None:
+        for key, value in tree.items():
+            # Dotted lookups split on "." and only ever match string keys
+            if not isinstance(key, str) or "." in key:
+                continue
+            path = prefix + key
+            self._values[path] = value
+            if isinstance(value, dict):
+                self._flatten(value, path + ".")
+
+    def __contains__(self, key: object) -> bool:
+        return self._values.get(key) is not None
+
+    def get(self, key: str, default: object = None) -> object:
+        """Get a value by dotted key; missing and null values give default"""
+        value = self._values.get(key)
+        if value is None:
+            return default
+        if isinstance(value, (dict, list)):
+            return copy.deepcopy(value)
+        return value
+
+    def get_int(self, key: str, default: int = 0) -> int:
+        """Get a value as int, falling back to default if it doesn't convert"""
+        value = self._values.get(key)
+        if value is None or isinstance(value, bool):
+            return default
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            logger.warning("Config %s: expected an integer, got %r", key, value)
+            return default
+
+    def get_float(self, key: str, default: float = 0.0) -> float:
+        """Get a value as float, falling back to default if it doesn't convert"""
+        value = self._values.get(key)
+        if value is None or isinstance(value, bool):
+            return default
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            logger.warning("Config %s: expected a number, got %r", key, value)
+            return default
+
+    def get_bool(self, key: str, default: bool = False) -> bool:
+        """Get a value as bool; accepts true/false, yes/no, on/off and 1/0 strings"""
+        value = self._values.get(key)
+        if value is None:
+            return default
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, int):
+            return value != 0
+        if isinstance(value, str):
+            lowered = value.strip().lower()
+            if lowered in _TRUE_STRINGS:
+                return True
+            if lowered in _FALSE_STRINGS:
+                return False
+        logger.warning("Config %s: expected a boolean, got %r", key, value)
+        return default
+
+    def get_str(self, key: str, default: str = "") -> str:
+        """Get a scalar value as str"""
+        value = self._values.get(key)
+        if value is None or isinstance(value, (dict, list)):
+            return default
+        return str(value)
+
+    def get_list(self, key: str, default: list | None = None) -> list:
+        """Get a list value"""
+        value = self._values.get(key)
+        if isinstance(value, list):
+            return copy.deepcopy(value)
+        return [] if default is None else default
+
+    def get_dict(self, key: str, default: dict | None = None) -> dict:
+        """Get a section"""
+        value = self._values.get(key)
+        if isinstance(value, dict):
+            return copy.deepcopy(value)
+        return {} if default is None else default
+
+    def diff(self, other: "ConfigSnapshot") -> set[str]:
+        """Dotted keys of leaf values that differ between two snapshots"""
+        changed = set()
+        for key in self._values.keys() | other._values.keys():
+            old = self._values.get(key)
+            new = other._values.get(key)
+            if isinstance(old, dict) and isinstance(new, dict):
+                continue
+            if old != new:
+                changed.add(key)
+        return changed
+
 
 class Config:
     """Configuration manager for PBX"""
@@ -26,10 +154,19 @@ def __init__(self, config_file: str = "config.yml", load_env: bool = True) -> No
             load_env: Whether to load .env file and resolve environment variables
         """
         self.config_file = config_file
-        self.config = {}
+        self._data: dict = {}
+        self._snapshot: ConfigSnapshot | None = None
+        self._version = 0
         self.env_loader = None
         self.env_enabled = load_env
 
+        # Hot reload
+        self._subscribers: list[tuple[Callable[[set[str], ConfigSnapshot], None], str]] = []
+        self._reload_lock = threading.Lock()
+        self._file_signature: tuple[int, int] | None = None
+        self._watch_stop = threading.Event()
+        self._watch_thread: threading.Thread | None = None
+
         # Load .env file if it exists
         if load_env:
             env_file = str(Path(config_file).parent / ".env")
@@ -53,17 +190,172 @@ def validate_email(email: str) -> bool:
             return False
         return bool(Config.EMAIL_PATTERN.match(email))
 
+    @property
+    def config(self) -> dict:
+        """
+        The raw configuration tree
+
+        Callers that change it in place must follow up with save() or
+        invalidate() before get() sees the change.
+        """
+        return self._data
+
+    @config.setter
+    def config(self, value: dict) -> None:
+        self._data = value
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Recompile the snapshot on the next get() after an in-place change"""
+        self._snapshot = None
+
+    def set_value(self, key: str, value: object) -> None:
+        """
+        Set a configuration value in memory
+
+        Args:
+            key: Dotted key; missing sections are created
+            value: New value
+        """
+        *sections, leaf = key.split(".")
+        node = self._data
+        for section in sections:
+            child = node.get(section)
+            if not isinstance(child, dict):
+                child = node[section] = {}
+            node = child
+        node[leaf] = value
+        self.invalidate()
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """The current compiled snapshot"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self._snapshot = ConfigSnapshot(self._data, self._version)
+        return snapshot
+
+    def _read(self) -> dict:
+        """Parse the configuration file and resolve environment variables"""
+        path = Path(self.config_file)
+        if not path.exists():
+            raise FileNotFoundError(f"Configuration file not found: {self.config_file}")
+        signature = self._stat_signature()
+        with path.open() as f:
+            tree = yaml.safe_load(f) or {}
+
+        # Resolve environment variables in configuration
+        if self.env_enabled and self.env_loader:
+            tree = self.env_loader.resolve_config(tree)
+        self._file_signature = signature
+        return tree
+
+    def _stat_signature(self) -> tuple[int, int] | None:
+        try:
+            stat = Path(self.config_file).stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
     def load(self) -> None:
         """Load configuration from YAML file and resolve environment variables"""
-        if Path(self.config_file).exists():
-            with Path(self.config_file).open() as f:
-                self.config = yaml.safe_load(f) or {}
-
-            # Resolve environment variables in configuration
-            if self.env_enabled and self.env_loader:
-                self.config = self.env_loader.resolve_config(self.config)
-        else:
-            raise FileNotFoundError(f"Configuration file not found: {self.config_file}")
+        self.config = self._read()
+
+    def reload(self) -> set[str]:
+        """
+        Re-read the configuration file and swap in a new snapshot
+
+        The new tree is compiled before it replaces the old one, so readers
+        see either the old configuration or the new one, never a mix. A file
+        that fails to parse leaves the running configuration in place.
+
+        Returns:
+            Dotted keys whose values changed
+        """
+        with self._reload_lock:
+            try:
+                tree = self._read()
+            except (OSError, yaml.YAMLError) as e:
+                logger.error("Config reload failed, keeping current configuration: %s", e)
+                return set()
+            if not tree:
+                logger.error(
+                    "Config file %s is empty, keeping current configuration", self.config_file
+                )
+                return set()
+
+            old = self.snapshot
+            self._version += 1
+            new = ConfigSnapshot(tree, self._version)
+            self._data = tree
+            self._snapshot = new
+
+            changed = old.diff(new)
+            if changed:
+                logger.info("Config reloaded (%d keys changed)", len(changed))
+            subscribers = list(self._subscribers)
+
+        for callback, prefix in subscribers:
+            if prefix and not any(k == prefix or k.startswith(prefix + ".") for k in changed):
+                continue
+            try:
+                callback(changed, new)
+            except Exception as e:
+                logger.error("Config subscriber %r failed: %s", callback, e)
+        return changed
+
+    def subscribe(
+        self, callback: Callable[[set[str], ConfigSnapshot], None], prefix: str = ""
+    ) -> None:
+        """
+        Call back after a reload changes configuration
+
+        Args:
+            callback: Called with the changed dotted keys and the new snapshot
+            prefix: Only call back for changes under this dotted key
+        """
+        self._subscribers.append((callback, prefix))
+
+    def unsubscribe(self, callback: Callable[[set[str], ConfigSnapshot], None]) -> None:
+        """Stop calling back a subscriber"""
+        self._subscribers = [(cb, p) for cb, p in self._subscribers if cb != callback]
+
+    def watch(self, interval: float = 2.0) -> None:
+        """
+        Reload automatically when the configuration file changes
+
+        Args:
+            interval: Seconds between checks of the file's mtime and size
+        """
+        if self._watch_thread and self._watch_thread.is_alive():
+            return
+        self._watch_stop.clear()
+        self._watch_thread = threading.Thread(
+            target=self._watch_loop, args=(interval,), name="config-watcher", daemon=True
+        )
+        self._watch_thread.start()
+
+    def stop_watching(self) -> None:
+        """Stop the file watcher"""
+        self._watch_stop.set()
+        if self._watch_thread:
+            self._watch_thread.join(timeout=5)
+            self._watch_thread = None
+
+    def _watch_loop(self, interval: float) -> None:
+        pending = None
+        while not self._watch_stop.wait(interval):
+            signature = self._stat_signature()
+            if signature is None or signature == self._file_signature:
+                pending = None
+                continue
+            # Wait for the file to stay unchanged for one interval, so an
+            # editor's write isn't read halfway through
+            if signature == pending:
+                self.reload()
+                pending = None
+            else:
+                pending = signature
 
     def get(self, key: str, default: object = None) -> object:
         """
@@ -76,22 +368,35 @@ def get(self, key: str, default: object = None) -> object:
         Returns:
             Configuration value
         """
-        keys = key.split(".")
-        value = self.config
+        return self.snapshot.get(key, default)
 
-        for k in keys:
-            if isinstance(value, dict):
-                value = value.get(k)
-                if value is None:
-                    return default
-            else:
-                return default
+    def get_int(self, key: str, default: int = 0) -> int:
+        """Get configuration value as int"""
+        return self.snapshot.get_int(key, default)
 
-        return value
+    def get_float(self, key: str, default: float = 0.0) -> float:
+        """Get configuration value as float"""
+        return self.snapshot.get_float(key, default)
+
+    def get_bool(self, key: str, default: bool = False) -> bool:
+        """Get configuration value as bool"""
+        return self.snapshot.get_bool(key, default)
+
+    def get_str(self, key: str, default: str = "") -> str:
+        """Get configuration value as str"""
+        return self.snapshot.get_str(key, default)
+
+    def get_list(self, key: str, default: list | None = None) -> list:
+        """Get configuration list"""
+        return self.snapshot.get_list(key, default)
+
+    def get_dict(self, key: str, default: dict | None = None) -> dict:
+        """Get configuration section"""
+        return self.snapshot.get_dict(key, default)
 
     def get_extensions(self) -> list[dict]:
         """Get all configured extensions"""
-        return self.config.get("extensions", [])
+        return self._data.get("extensions", [])
 
     def get_extension(self, number: str | int) -> dict | None:
         """
@@ -111,9 +416,13 @@ def get_extension(self, number: str | int) -> dict | None:
 
     def save(self) -> bool:
         """Save current configuration to YAML file"""
+        # Everything that changes the tree in place ends up here
+        self.invalidate()
         try:
             with Path(self.config_file).open("w") as f:
-                yaml.dump(self.config, f, default_flow_style=False, sort_keys=False)
+                yaml.dump(self._data, f, default_flow_style=False, sort_keys=False)
+            # Our own write is not a change for the watcher to reload
+            self._file_signature = self._stat_signature()
             return True
         except PermissionError as e:
             logger.error("Error saving config: Permission denied - %s", e)
@@ -3,7 +3,9 @@
 Provides PostgreSQL storage for VIP callers, CDR, and other data
 """
 
+import contextlib
 import json
+import threading
 import traceback
 from datetime import UTC, datetime
 
@@ -12,12 +14,13 @@
 
 try:
     import psycopg2
-    from psycopg2.extras import RealDictCursor
+    from psycopg2.extras import RealDictCursor, execute_batch
 
     POSTGRES_AVAILABLE = True
 except ImportError:
     psycopg2 = None
     RealDictCursor = None
+    execute_batch = None
     POSTGRES_AVAILABLE = False
 
 
@@ -41,6 +44,10 @@ def __init__(self, config: dict) -> None:
         self.enabled = False
         self._autocommit = False
         self._was_connected = False
+        # Batches run in their own transaction on a separate connection, one
+        # at a time, so they never share the autocommit connection's state
+        self._batch_connection = None
+        self._batch_lock = threading.Lock()
 
         if not POSTGRES_AVAILABLE:
             self.logger.error(
@@ -117,6 +124,8 @@ def _connect_postgresql(self) -> bool:
 
     def disconnect(self) -> None:
         """Disconnect from database"""
+        with self._batch_lock:
+            self._close_batch_connection()
         if self.connection:
             try:
                 self.connection.close()
@@ -126,6 +135,31 @@ def disconnect(self) -> None:
             self.enabled = False
             self.logger.info("Database disconnected")
 
+    def open_dedicated_connection(self) -> object | None:
+        """
+        Open a separate connection for long-running reads and batch writes
+
+        The shared connection stays free for call-path queries. The caller
+        owns the returned connection and must close it.
+
+        Returns:
+            New psycopg2 connection (not autocommit) or None on failure
+        """
+        if not POSTGRES_AVAILABLE:
+            return None
+
+        try:
+            return psycopg2.connect(
+                host=self.config.get("database.host", "localhost"),
+                port=self.config.get("database.port", 5432),
+                database=self.config.get("database.name", "pbx_system"),
+                user=self.config.get("database.user", "pbx_user"),
+                password=self.config.get("database.password", ""),
+            )
+        except Exception as e:
+            self.logger.error(f"Could not open dedicated database connection: {e}")
+            return None
+
     def _safe_rollback(self) -> None:
         """Safely attempt a rollback, handling dead/closed connections.
 
@@ -270,6 +304,63 @@ def execute(self, query: str, params: tuple | None = None) -> bool:
                 return False
         return self._execute_with_context(query, "query execution", params, critical=True)
 
+    def execute_many(
+        self, query: str, params_list: list[tuple], context: str = "batch execution"
+    ) -> bool:
+        """
+        Execute one statement for many parameter sets in a single transaction
+
+        Rows are sent to the server in pages rather than one round trip per
+        row, and either all of them are committed or none are. Batches run on
+        a dedicated connection, so statements other threads issue on the
+        shared autocommit connection never join or roll back with them.
+
+        Args:
+            query: SQL query
+            params_list: One parameter tuple per row
+            context: Description of the operation for error logs
+
+        Returns:
+            bool: True if successful
+        """
+        if not params_list:
+            return True
+        if (not self.enabled or not self.connection) and not self._check_connection():
+            return False
+
+        with self._batch_lock:
+            connection = self._batch_connection
+            if connection is None or connection.closed:
+                connection = self._batch_connection = self.open_dedicated_connection()
+                if connection is None:
+                    return False
+
+            try:
+                cursor = connection.cursor()
+                execute_batch(cursor, query, params_list, page_size=500)
+                connection.commit()
+                cursor.close()
+                return True
+            except Exception as e:
+                self.logger.error(f"Error during {context}: {e}")
+                self.logger.error(f"  Query: {query}")
+                self.logger.error(f"  Rows: {len(params_list)}")
+                self.logger.error(f"  Database type: {self.db_type}")
+                self.logger.error(f"  Traceback: {traceback.format_exc()}")
+                try:
+                    connection.rollback()
+                except Exception:
+                    # Dead connection: open a fresh one for the next batch
+                    self._close_batch_connection()
+                return False
+
+    def _close_batch_connection(self) -> None:
+        """Close the batch connection; the caller holds the batch lock"""
+        if self._batch_connection is not None:
+            with contextlib.suppress(Exception):
+                self._batch_connection.close()
+            self._batch_connection = None
+
     def execute_script(self, script: str) -> bool:
         """
         Execute a multi-statement SQL script
@@ -1421,6 +1512,76 @@ def update(
 
         return self.db.execute(query, tuple(params))
 
+    def add_many(self, extensions: list[dict]) -> bool:
+        """
+        Add several extensions in one batch
+
+        Args:
+            extensions: Dicts with number, name and password_hash, and
+                optionally email, allow_external, ad_synced, ad_username
+                and is_admin. Voicemail PINs are not supported here.
+
+        Returns:
+            bool: True if every extension was added
+        """
+        query = """
+        INSERT INTO extensions (number, name, email, password_hash, allow_external, ad_synced, ad_username, is_admin)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """
+        rows = [
+            (
+                ext["number"],
+                ext["name"],
+                ext.get("email"),
+                ext["password_hash"],
+                ext.get("allow_external", True),
+                ext.get("ad_synced", False),
+                ext.get("ad_username"),
+                ext.get("is_admin", False),
+            )
+            for ext in extensions
+        ]
+        return self.db.execute_many(query, rows, "extension batch insert")
+
+    def update_ad_fields_many(self, extensions: list[dict]) -> bool:
+        """
+        Update the directory-managed fields of several extensions in one batch
+
+        Args:
+            extensions: Dicts with number, name, email (None keeps the stored
+                email) and ad_username
+
+        Returns:
+            bool: True if successful
+        """
+        query = """
+        UPDATE extensions
+        SET name = %s, email = COALESCE(%s, email), ad_synced = %s, ad_username = %s, updated_at = CURRENT_TIMESTAMP
+        WHERE number = %s
+        """
+        rows = [
+            (ext["name"], ext.get("email"), True, ext.get("ad_username"), ext["number"])
+            for ext in extensions
+        ]
+        return self.db.execute_many(query, rows, "extension batch update")
+
+    def set_allow_external_many(self, numbers: list[str], allow_external: bool) -> bool:
+        """
+        Set allow_external on several extensions in one batch
+
+        Args:
+            numbers: Extension numbers
+            allow_external: Value to store
+
+        Returns:
+            bool: True if successful
+        """
+        query = """
+        UPDATE extensions SET allow_external = %s, updated_at = CURRENT_TIMESTAMP WHERE number = %s
+        """
+        rows = [(allow_external, number) for number in numbers]
+        return self.db.execute_many(query, rows, "extension batch update")
+
     def delete(self, number: str) -> bool:
         """
         Delete an extension
@@ -1538,6 +1699,44 @@ def set_config(
             """
         return self.db.execute(query, (key, str_value, config_type, datetime.now(UTC), updated_by))
 
+    def set_config_many(
+        self, values: dict[str, object], config_type: str = "string", updated_by: str | None = None
+    ) -> bool:
+        """
+        Set several configuration values of the same type in one batch
+
+        Args:
+            values: Configuration values keyed by configuration key
+            config_type: type of the values (string, int, bool, json)
+            updated_by: User who updated the config
+
+        Returns:
+            bool: True if successful
+        """
+        rows = []
+        now = datetime.now(UTC)
+        for key, value in values.items():
+            try:
+                if config_type == "json":
+                    str_value = json.dumps(value)
+                elif config_type == "bool":
+                    str_value = "true" if value else "false"
+                else:
+                    str_value = str(value)
+            except (TypeError, ValueError) as e:
+                self.logger.error(f"Error serializing config value for key '{key}': {e}")
+                return False
+            rows.append((key, str_value, config_type, now, updated_by))
+
+        query = """
+            INSERT INTO system_config (config_key, config_value, config_type, updated_at, updated_by)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (config_key) DO UPDATE
+            SET config_value = EXCLUDED.config_value, config_type = EXCLUDED.config_type,
+                updated_at = EXCLUDED.updated_at, updated_by = EXCLUDED.updated_by
+            """
+        return self.db.execute_many(query, rows, "config batch update")
+
 
 class ProvisionedDevicesDB:
     """Provisioned devices database operations"""
@@ -0,0 +1,484 @@
+"""
+TTL-aware DNS resolver cache
+Caches A/AAAA/SRV/NAPTR answers for as long as their TTL allows, remembers
+missing names and failed lookups for a short while, refreshes answers in the background before
+they expire and never makes a caller wait longer than it asked to
+"""
+
+import ipaddress
+import socket
+import threading
+import time
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+    TimeoutError as FutureTimeoutError,
+    wait as wait_futures,
+)
+from typing import Any
+
+from pbx.utils.logger import get_logger
+
+SUPPORTED_TYPES = ("A", "AAAA", "SRV", "NAPTR")
+
+# dnspython exceptions that mean the name (or this record type) does not exist
+_NEGATIVE_ERRORS = ("NXDOMAIN", "NoAnswer")
+
+
+class _CacheEntry:
+    """
+    One cached answer
+
+    negative means DNS said the name (or record type) doesn't exist; failed
+    means the query itself didn't get an answer (timeout, SERVFAIL, ...), so
+    nothing is known about the name yet. Both have an empty records list.
+    """
+
+    __slots__ = ("expires", "failed", "negative", "records", "refresh_at", "stale_until")
+
+    def __init__(
+        self,
+        records: list,
+        expires: float,
+        refresh_at: float,
+        stale_until: float,
+        negative: bool,
+        failed: bool = False,
+    ) -> None:
+        self.records = records
+        self.expires = expires
+        self.refresh_at = refresh_at
+        self.stale_until = stale_until
+        self.negative = negative
+        self.failed = failed
+
+
+class DNSResolver:
+    """
+    Caching, non-blocking DNS resolver
+
+    Lookups are answered from cache whenever possible. A miss starts the query
+    on a worker thread and the caller waits at most `wait` seconds for it, so
+    a slow or unreachable DNS server costs the call path a bounded delay the
+    first time and nothing afterwards:
+    - answers are kept for their TTL (clamped to min_ttl..max_ttl)
+    - NXDOMAIN/NODATA answers are kept for negative_ttl
+    - failed queries (timeout, SERVFAIL) are retried after negative_ttl but
+      never make a name count as unresolvable
+    - a name looked up after prefetch_ratio of its TTL has passed is refreshed
+      in the background, and watched names are refreshed even when idle
+    - if a refresh fails, the previous answer keeps being served for up to
+      stale_ttl seconds past its expiry
+
+    Uses dnspython when it is installed; otherwise A/AAAA lookups go through
+    the system resolver (without TTLs) and SRV/NAPTR are unavailable.
+    """
+
+    def __init__(self, config: Any | None = None) -> None:
+        """
+        Initialize DNS resolver
+
+        Args:
+            config: Configuration dict (reads features.dns_resolver)
+        """
+        self.logger = get_logger()
+        config = config or {}
+        resolver_config = config.get("features", {}).get("dns_resolver", {}) or {}
+        self.timeout = float(resolver_config.get("timeout", 2.0))
+        self.min_ttl = float(resolver_config.get("min_ttl", 5))
+        self.max_ttl = float(resolver_config.get("max_ttl", 3600))
+        # System resolver answers carry no TTL
+        self.default_ttl = float(resolver_config.get("default_ttl", 60))
+        self.negative_ttl = float(resolver_config.get("negative_ttl", 30))
+        self.stale_ttl = float(resolver_config.get("stale_ttl", 300))
+        self.prefetch_ratio = float(resolver_config.get("prefetch_ratio", 0.8))
+        self.workers = max(int(resolver_config.get("workers", 4)), 1)
+
+        self.lock = threading.Lock()
+        self.cache: dict[tuple[str, str], _CacheEntry] = {}
+        self._inflight: dict[tuple[str, str], Future] = {}
+        self._watched: set[tuple[str, str]] = set()
+        self._executor: ThreadPoolExecutor | None = None
+        self._prefetch_thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+        # Statistics
+        self.lookups = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.queries = 0
+        self.errors = 0
+        self.prefetches = 0
+
+    @staticmethod
+    def _key(name: str, rtype: str) -> tuple[str, str]:
+        return name.lower().rstrip("."), rtype.upper()
+
+    @staticmethod
+    def is_ip_address(host: str) -> bool:
+        """Whether host is an IPv4/IPv6 literal that needs no lookup"""
+        try:
+            ipaddress.ip_address(host)
+            return True
+        except ValueError:
+            return False
+
+    def lookup(self, name: str, rtype: str = "A", wait: float = 0.0) -> list:
+        """
+        Look up a record set without blocking longer than wait
+
+        Args:
+            name: DNS name
+            rtype: Record type (A, AAAA, SRV or NAPTR)
+            wait: Seconds to wait for a query when nothing is cached
+
+        Returns:
+            list: Addresses for A/AAAA, dicts for SRV/NAPTR; empty if the name
+                doesn't exist or the answer isn't available yet
+        """
+        key = self._key(name, rtype)
+        now = time.monotonic()
+        with self.lock:
+            self.lookups += 1
+            entry = self.cache.get(key)
+            if entry and now < entry.expires:
+                if entry.negative or entry.failed:
+                    self.negative_hits += 1
+                else:
+                    self.hits += 1
+                if now >= entry.refresh_at and key not in self._inflight:
+                    self.prefetches += 1
+                    self._submit_locked(key)
+                return entry.records
+            if entry and entry.records and now < entry.stale_until:
+                # Serve the expired answer while a fresh one is fetched
+                self.stale_hits += 1
+                if now >= entry.refresh_at and key not in self._inflight:
+                    self._submit_locked(key)
+                return entry.records
+            self.misses += 1
+            future = self._inflight.get(key) or self._submit_locked(key)
+
+        if wait <= 0:
+            return []
+        try:
+            future.result(timeout=wait)
+        except FutureTimeoutError:
+            return []
+        with self.lock:
+            entry = self.cache.get(key)
+            return entry.records if entry else []
+
+    def resolve(self, name: str, rtype: str = "A", timeout: float | None = None) -> list:
+        """
+        Look up a record set, waiting up to timeout for a cache miss
+
+        Args:
+            name: DNS name
+            rtype: Record type
+            timeout: Maximum seconds to wait (defaults to the query timeout)
+
+        Returns:
+            list: Records, or empty if unresolved
+        """
+        return self.lookup(name, rtype, self.timeout if timeout is None else timeout)
+
+    def resolve_many(
+        self, queries: list[tuple[str, str]], wait: float = 0.0
+    ) -> dict[tuple[str, str], list]:
+        """
+        Look up several record sets in parallel
+
+        Args:
+            queries: (name, rtype) pairs
+            wait: Seconds to wait in total for the uncached ones
+
+        Returns:
+            dict: Records keyed by (name, rtype) as given
+        """
+        pending = [self.prefetch(name, rtype) for name, rtype in queries]
+        if wait > 0:
+            wait_futures([f for f in pending if f is not None], timeout=wait)
+        return {(name, rtype): self.lookup(name, rtype) for name, rtype in queries}
+
+    def resolve_host(self, host: str, wait: float = 0.0) -> list[str]:
+        """
+        Resolve a host name to addresses, querying A and AAAA in parallel
+
+        Args:
+            host: Host name or IP address
+            wait: Seconds to wait when nothing is cached
+
+        Returns:
+            list[str]: IPv4 addresses followed by IPv6 addresses
+        """
+        if self.is_ip_address(host):
+            return [host]
+        answers = self.resolve_many([(host, "A"), (host, "AAAA")], wait)
+        return answers[(host, "A")] + answers[(host, "AAAA")]
+
+    def is_unresolvable(self, host: str) -> bool:
+        """
+        Whether host is known not to exist, from cached answers only
+
+        Args:
+            host: Host name or IP address
+
+        Returns:
+            bool: True if DNS answered both A and AAAA with NXDOMAIN/NODATA;
+                lookups that failed or timed out don't count
+        """
+        if self.is_ip_address(host):
+            return False
+        now = time.monotonic()
+        with self.lock:
+            entries = [self.cache.get(self._key(host, rtype)) for rtype in ("A", "AAAA")]
+        return all(entry and entry.negative and now < entry.expires for entry in entries)
+
+    def expires_in(self, name: str, rtype: str) -> float | None:
+        """Seconds until the cached answer expires, or None if not cached"""
+        with self.lock:
+            entry = self.cache.get(self._key(name, rtype))
+        return entry.expires - time.monotonic() if entry else None
+
+    def prefetch(self, name: str, rtype: str = "A") -> Future | None:
+        """
+        Start resolving a record set in the background if it isn't fresh
+
+        Returns:
+            Future of the query, or None if the cached answer is fresh
+        """
+        key = self._key(name, rtype)
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry and time.monotonic() < entry.refresh_at:
+                return None
+            return self._inflight.get(key) or self._submit_locked(key)
+
+    def watch(self, name: str, rtype: str = "A") -> None:
+        """
+        Keep a record set resolved and refreshed before it expires, even if
+        nothing looks it up in between
+
+        Args:
+            name: DNS name
+            rtype: Record type
+        """
+        with self.lock:
+            self._watched.add(self._key(name, rtype))
+            if self._prefetch_thread is None or not self._prefetch_thread.is_alive():
+                self._stop.clear()
+                self._prefetch_thread = threading.Thread(
+                    target=self._prefetch_loop, name="dns-prefetch", daemon=True
+                )
+                self._prefetch_thread.start()
+        self.prefetch(name, rtype)
+
+    def watch_host(self, host: str) -> None:
+        """Keep a host's A and AAAA records resolved"""
+        if not self.is_ip_address(host):
+            self.watch(host, "A")
+            self.watch(host, "AAAA")
+
+    def unwatch(self, name: str, rtype: str | None = None) -> None:
+        """Stop refreshing a name (all record types if rtype is None)"""
+        name = name.lower().rstrip(".")
+        with self.lock:
+            self._watched = {
+                key
+                for key in self._watched
+                if key[0] != name or (rtype is not None and key[1] != rtype.upper())
+            }
+
+    def invalidate(self, name: str | None = None) -> None:
+        """Drop cached answers for a name, or the whole cache"""
+        with self.lock:
+            if name is None:
+                self.cache.clear()
+            else:
+                name = name.lower().rstrip(".")
+                for key in [key for key in self.cache if key[0] == name]:
+                    del self.cache[key]
+
+    def stop(self) -> None:
+        """Stop background refreshing and the worker threads"""
+        self._stop.set()
+        with self.lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_statistics(self) -> dict:
+        """Get cache statistics"""
+        with self.lock:
+            negative = sum(1 for entry in self.cache.values() if entry.negative)
+            failed = sum(1 for entry in self.cache.values() if entry.failed)
+            return {
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.stale_hits + self.negative_hits)
+                / max(1, self.lookups),
+                "queries": self.queries,
+                "errors": self.errors,
+                "prefetches": self.prefetches,
+                "cached_entries": len(self.cache),
+                "negative_entries": negative,
+                "failed_entries": failed,
+                "watched": len(self._watched),
+                "in_flight": len(self._inflight),
+            }
+
+    def _submit_locked(self, key: tuple[str, str]) -> Future:
+        """Start a query for key; the caller holds the lock"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="dns-resolver"
+            )
+        future = self._executor.submit(self._refresh, key)
+        self._inflight[key] = future
+        return future
+
+    def _refresh(self, key: tuple[str, str]) -> None:
+        """Run one query and store the answer (worker thread)"""
+        name, rtype = key
+        try:
+            records, ttl, negative = self._query(name, rtype)
+            failed = False
+        except Exception as e:
+            self.logger.debug(f"DNS lookup of {rtype} {name} failed: {e}")
+            records, ttl, negative, failed = [], self.negative_ttl, False, True
+
+        now = time.monotonic()
+        with self.lock:
+            self.queries += 1
+            previous = self.cache.get(key)
+            if failed:
+                self.errors += 1
+            if failed and previous and previous.records and now < previous.stale_until:
+                # Keep serving the old answer; try again after negative_ttl
+                previous.refresh_at = now + min(self.negative_ttl, previous.stale_until - now)
+            else:
+                if negative or failed:
+                    ttl = min(ttl, self.negative_ttl)
+                ttl = min(max(ttl, self.min_ttl), self.max_ttl)
+                self.cache[key] = _CacheEntry(
+                    records=records,
+                    expires=now + ttl,
+                    refresh_at=now + ttl * self.prefetch_ratio,
+                    stale_until=now + ttl + self.stale_ttl,
+                    negative=negative,
+                    failed=failed,
+                )
+            self._inflight.pop(key, None)
+
+    def _query(self, name: str, rtype: str) -> tuple[list, float, bool]:
+        """
+        Query DNS for one record set
+
+        Returns:
+            tuple: (records, ttl, negative)
+        """
+        if rtype not in SUPPORTED_TYPES:
+            raise ValueError(f"Unsupported record type: {rtype}")
+        try:
+            import dns.resolver
+        except ImportError:
+            return self._query_system(name, rtype)
+
+        try:
+            answer = dns.resolver.resolve(name, rtype, lifetime=self.timeout)
+        except Exception as e:
+            if type(e).__name__ in _NEGATIVE_ERRORS:
+                return [], self.negative_ttl, True
+            raise
+
+        ttl = getattr(getattr(answer, "rrset", None), "ttl", None)
+        if not isinstance(ttl, int):
+            ttl = self.default_ttl
+        records = [self._convert(rtype, rdata) for rdata in answer]
+        if rtype == "SRV":
+            # Lower priority first, then higher weight
+            records.sort(key=lambda r: (r["priority"], -r["weight"]))
+        elif rtype == "NAPTR":
+            records.sort(key=lambda r: (r["order"], r["preference"]))
+        return records, ttl, not records
+
+    def _query_system(self, name: str, rtype: str) -> tuple[list, float, bool]:
+        """Resolve A/AAAA through the system resolver when dnspython is missing"""
+        if rtype not in ("A", "AAAA"):
+            self.logger.debug(f"dnspython not installed; cannot look up {rtype} records")
+            return [], self.negative_ttl, True
+        family = socket.AF_INET if rtype == "A" else socket.AF_INET6
+        try:
+            infos = socket.getaddrinfo(name, None, family, socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            if e.errno in (socket.EAI_NONAME, getattr(socket, "EAI_NODATA", socket.EAI_NONAME)):
+                return [], self.negative_ttl, True
+            raise
+        records = list(dict.fromkeys(info[4][0] for info in infos))
+        return records, self.default_ttl, not records
+
+    @staticmethod
+    def _convert(rtype: str, rdata: Any) -> Any:
+        """Convert a dnspython rdata to a plain value"""
+        if rtype in ("A", "AAAA"):
+            return str(getattr(rdata, "address", rdata))
+        if rtype == "SRV":
+            return {
+                "priority": rdata.priority,
+                "weight": rdata.weight,
+                "port": rdata.port,
+                "target": str(rdata.target).rstrip("."),
+            }
+
+        def text(value: Any) -> str:
+            return value.decode() if isinstance(value, bytes) else str(value)
+
+        return {
+            "order": rdata.order,
+            "preference": rdata.preference,
+            "flags": text(rdata.flags),
+            "service": text(rdata.service),
+            "regexp": text(rdata.regexp),
+            "replacement": str(rdata.replacement).rstrip("."),
+        }
+
+    def _prefetch_loop(self) -> None:
+        """Refresh watched names before they expire"""
+        while not self._stop.is_set():
+            now = time.monotonic()
+            next_due = now + 1.0
+            with self.lock:
+                watched = list(self._watched)
+                due = []
+                for key in watched:
+                    entry = self.cache.get(key)
+                    if key in self._inflight:
+                        continue
+                    if entry is None or now >= entry.refresh_at:
+                        due.append(key)
+                    else:
+                        next_due = min(next_due, entry.refresh_at)
+                for key in due:
+                    self.prefetches += 1
+                    self._submit_locked(key)
+            if not watched:
+                return
+            self._stop.wait(max(next_due - now, 0.05))
+
+
+# Global instance
+_dns_resolver = None
+
+
+def get_dns_resolver(config: Any | None = None) -> DNSResolver:
+    """Get or create the shared DNS resolver"""
+    global _dns_resolver
+    if _dns_resolver is None:
+        _dns_resolver = DNSResolver(config)
+    return _dns_resolver
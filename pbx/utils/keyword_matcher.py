@@ -0,0 +1,208 @@
+"""
+Keyword Matching
+Aho-Corasick multi-pattern matcher for transcript keyword and phrase spotting
+"""
+
+from collections import deque
+from collections.abc import Iterable
+from functools import lru_cache
+from typing import NamedTuple
+
+
+class KeywordMatch(NamedTuple):
+    """A keyword occurrence in the original (un-lowercased) text"""
+
+    keyword: str
+    start: int
+    end: int
+
+
+class KeywordMatcher:
+    """
+    Compiled matcher for a fixed set of keywords and phrases
+
+    All keywords are found in a single pass over the text, so matching cost
+    grows with the transcript length rather than with the number of
+    keywords. Matching is case-insensitive and a match must start on a word
+    boundary ("bill" matches "billing" but not "rebill"); with whole_words
+    it must also end on one.
+    """
+
+    def __init__(self, keywords: Iterable[str], whole_words: bool = False) -> None:
+        """
+        Compile the automaton
+
+        Args:
+            keywords: Keywords or phrases to find
+            whole_words: Require matches to end on a word boundary too
+        """
+        self.whole_words = whole_words
+        self.keywords: list[str] = []
+
+        # Trie: goto[node] maps a character to the child node
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[list[int]] = [[]]
+        # Per pattern: lowered length and the original keywords it stands for
+        self._pattern_lengths: list[int] = []
+        self._pattern_keywords: list[list[int]] = []
+        pattern_ids: dict[str, int] = {}
+
+        for keyword in keywords:
+            pattern = keyword.strip().lower()
+            if not pattern:
+                continue
+            keyword_index = len(self.keywords)
+            self.keywords.append(keyword)
+
+            if pattern in pattern_ids:
+                self._pattern_keywords[pattern_ids[pattern]].append(keyword_index)
+                continue
+
+            node = 0
+            for char in pattern:
+                child = self._goto[node].get(char)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][char] = child
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = child
+
+            pattern_id = len(self._pattern_lengths)
+            pattern_ids[pattern] = pattern_id
+            self._pattern_lengths.append(len(pattern))
+            self._pattern_keywords.append([keyword_index])
+            self._output[node].append(pattern_id)
+
+        self._build_failure_links()
+
+    def _build_failure_links(self) -> None:
+        """Breadth-first pass linking each node to its longest proper suffix"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child].extend(self._output[self._fail[child]])
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def _scan(self, text: str) -> Iterable[tuple[int, int, int]]:
+        """Yield (pattern_id, start, end) for every boundary-respecting match"""
+        if not text or not self._pattern_lengths:
+            return
+
+        lowered = text.lower()
+        # lower() can change length for a few Unicode characters; map lowered
+        # offsets back to the original text so positions stay highlightable
+        offsets = None
+        if len(lowered) != len(text):
+            offsets = [i for i, char in enumerate(text) for _ in char.lower()]
+
+        goto, fail, output = self._goto, self._fail, self._output
+        lengths = self._pattern_lengths
+        text_length = len(text)
+        node = 0
+
+        for pos, char in enumerate(lowered):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not output[node]:
+                continue
+
+            for pattern_id in output[node]:
+                first = pos - lengths[pattern_id] + 1
+                if offsets is None:
+                    start, end = first, pos + 1
+                else:
+                    start, end = offsets[first], offsets[pos] + 1
+
+                if start > 0 and text[start - 1].isalnum() and text[start].isalnum():
+                    continue
+                if (
+                    self.whole_words
+                    and end < text_length
+                    and text[end].isalnum()
+                    and text[end - 1].isalnum()
+                ):
+                    continue
+                yield pattern_id, start, end
+
+    def find_all(self, text: str) -> list[KeywordMatch]:
+        """
+        Find every keyword occurrence, e.g. for highlighting
+
+        Args:
+            text: Text to search
+
+        Returns:
+            Matches ordered by start position (longest first on ties)
+        """
+        matches = [
+            KeywordMatch(self.keywords[self._pattern_keywords[pattern_id][0]], start, end)
+            for pattern_id, start, end in self._scan(text)
+        ]
+        matches.sort(key=lambda match: (match.start, -match.end))
+        return matches
+
+    def find_unique(self, text: str) -> list[str]:
+        """
+        Find which keywords occur in the text
+
+        Args:
+            text: Text to search
+
+        Returns:
+            Keywords found, in the order they were given to the matcher
+        """
+        found = {
+            keyword_index
+            for pattern_id, _, _ in self._scan(text)
+            for keyword_index in self._pattern_keywords[pattern_id]
+        }
+        return [self.keywords[i] for i in sorted(found)]
+
+    def count(self, text: str) -> dict[str, int]:
+        """
+        Count occurrences of each keyword found in the text
+
+        Args:
+            text: Text to search
+
+        Returns:
+            Mapping of keyword to number of occurrences
+        """
+        counts: dict[str, int] = {}
+        for pattern_id, _, _ in self._scan(text):
+            for keyword_index in self._pattern_keywords[pattern_id]:
+                keyword = self.keywords[keyword_index]
+                counts[keyword] = counts.get(keyword, 0) + 1
+        return counts
+
+
+@lru_cache(maxsize=256)
+def _compile(keywords: tuple[str, ...], whole_words: bool) -> KeywordMatcher:
+    return KeywordMatcher(keywords, whole_words)
+
+
+def get_keyword_matcher(keywords: Iterable[str], whole_words: bool = False) -> KeywordMatcher:
+    """
+    Get a compiled matcher for a keyword set, building it only once
+
+    Args:
+        keywords: Keywords or phrases to find
+        whole_words: Require matches to end on a word boundary too
+
+    Returns:
+        Shared KeywordMatcher for this keyword set
+    """
+    return _compile(tuple(keywords), whole_words)
@@ -2,16 +2,143 @@
 Logging configuration for PBX system
 """
 
+import atexit
 import logging
+import queue
+import threading
+import time
 from pathlib import Path
 from typing import ClassVar
 
+# Records waiting for the writer thread before new ones are dropped
+DEFAULT_QUEUE_SIZE = 10000
+
+
+class _LogWriter:
+    """
+    Single background thread that formats and writes log records
+
+    Logging threads only put the record and its destination handlers on a
+    bounded queue. Line formatting and I/O happen here, so a slow disk or
+    console never blocks media or signaling threads. When the queue is full the
+    record is dropped and counted rather than waiting for space.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_QUEUE_SIZE) -> None:
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.enqueued = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, handlers: list[logging.Handler], record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait((handlers, record))
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                handlers, record = item
+                for handler in handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            finally:
+                self.queue.task_done()
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait until every queued record has been written"""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write out the queued records, then stop the thread"""
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self.thread.join(timeout)
+
+
+class _AsyncHandler(logging.Handler):
+    """
+    Hands records to the log writer instead of writing them
+
+    The message is merged with its arguments here, as QueueHandler.prepare
+    does, because the arguments may change once the caller moves on; the
+    writer thread only formats the line. Exception info is rendered up front
+    because the traceback must be captured on the raising thread.
+    """
+
+    def __init__(self, writer: _LogWriter, handlers: list[logging.Handler]) -> None:
+        super().__init__()
+        self.writer = writer
+        self.handlers = handlers
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info and not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+        except Exception:
+            self.handleError(record)
+            return
+        self.writer.submit(self.handlers, record)
+
+    def close(self) -> None:
+        for handler in self.handlers:
+            handler.close()
+        super().close()
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket limiting how many records a logger emits per second
+
+    Meant for per-packet and per-message events: the first ``burst`` records
+    pass, then at most ``rate`` per second. Suppressed records are counted,
+    and the count is appended to the next record let through.
+    """
+
+    def __init__(self, rate: float, burst: int | None = None) -> None:
+        super().__init__()
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.suppressed = 0
+        self.total_suppressed = 0
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                self.suppressed += 1
+                self.total_suppressed += 1
+                return False
+            self.tokens -= 1
+            suppressed, self.suppressed = self.suppressed, 0
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        return True
+
 
 class PBXLogger:
     """Centralized logging for PBX system"""
 
     _instance: "PBXLogger | None" = None
     _sub_loggers: ClassVar[dict[str, logging.Logger]] = {}
+    _rate_limits: ClassVar[dict[str, RateLimitFilter]] = {}
 
     def __new__(cls) -> "PBXLogger":
         if cls._instance is None:
@@ -24,12 +151,16 @@ def __init__(self) -> None:
             return
         self._initialized = True
         self.logger: logging.Logger | None = None
+        self.writer: _LogWriter | None = None
+        self._atexit_registered = False
 
     def setup(
         self,
         log_level: str = "INFO",
         log_file: str | None = None,
         console: bool = True,
+        async_logging: bool = False,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
     ) -> None:
         """
         Setup logging configuration
@@ -38,12 +169,24 @@ def setup(
             log_level: Logging level (DEBUG, INFO, WARNING, ERROR)
             log_file: Path to log file
             console: Whether to log to console
+            async_logging: Write records from a background thread through a
+                bounded queue instead of on the calling thread
+            queue_size: Records the queue holds before new ones are dropped
         """
         self.logger = logging.getLogger("PBX")
         self.logger.setLevel(getattr(logging, log_level))
 
-        # Clear existing handlers
+        # Clear existing handlers, once anything they have queued is written
+        self.shutdown()
         self.logger.handlers.clear()
+        if async_logging:
+            self.writer = _LogWriter(queue_size)
+            if not self._atexit_registered:
+                atexit.register(self.shutdown)
+                self._atexit_registered = True
+            # Cached sub-loggers were handed out already; move them over too
+            for sub_logger in self._sub_loggers.values():
+                self._make_async(sub_logger)
 
         # Format for log messages
         formatter = logging.Formatter(
@@ -66,6 +209,85 @@ def setup(
             file_handler.setFormatter(formatter)
             self.logger.addHandler(file_handler)
 
+        self._make_async(self.logger)
+
+    def _make_async(self, logger: logging.Logger) -> None:
+        """Route a logger's handlers through the log writer, if it is running"""
+        if self.writer is None or not logger.handlers:
+            return
+        handlers = list(logger.handlers)
+        logger.handlers.clear()
+        logger.addHandler(_AsyncHandler(self.writer, handlers))
+
+    @staticmethod
+    def _make_sync(logger: logging.Logger) -> None:
+        """Give a logger back the handlers its _AsyncHandler wrapped"""
+        handlers = []
+        for handler in logger.handlers:
+            handlers.extend(handler.handlers if isinstance(handler, _AsyncHandler) else [handler])
+        logger.handlers.clear()
+        for handler in handlers:
+            logger.addHandler(handler)
+
+    def shutdown(self) -> None:
+        """Write out any queued records and stop the log writer"""
+        writer, self.writer = self.writer, None
+        if writer is not None:
+            # Loggers write on the calling thread again from here on, rather
+            # than into a queue nobody reads
+            for logger in (self.logger, *self._sub_loggers.values()):
+                if logger is not None:
+                    self._make_sync(logger)
+            writer.stop()
+
+    def flush(self) -> None:
+        """Wait until queued records have been written"""
+        if self.writer is not None:
+            self.writer.flush()
+
+    def get_stats(self) -> dict:
+        """
+        Logging pipeline counters
+
+        Returns:
+            dict with records enqueued and dropped by the writer, the current
+            queue depth and capacity, and records suppressed by rate limits
+        """
+        writer = self.writer
+        return {
+            "async": writer is not None,
+            "enqueued": writer.enqueued if writer else 0,
+            "dropped": writer.dropped if writer else 0,
+            "queue_depth": writer.queue.qsize() if writer else 0,
+            "queue_capacity": writer.queue.maxsize if writer else 0,
+            "rate_limited": {
+                name: limit.total_suppressed for name, limit in self._rate_limits.items()
+            },
+        }
+
+    def get_rate_limited_logger(
+        self, name: str, rate: float, burst: int | None = None
+    ) -> logging.Logger:
+        """
+        Get a child of the PBX logger that emits at most rate records per second
+
+        Use it for events that can fire per packet or per message; everything
+        else should keep using the main logger.
+
+        Args:
+            name: Child logger name (e.g., 'RTP.relay')
+            rate: Records per second allowed through
+            burst: Records allowed through at once (defaults to rate)
+
+        Returns:
+            Logger instance
+        """
+        logger = self.get_logger().getChild(name)
+        if name not in self._rate_limits:
+            self._rate_limits[name] = RateLimitFilter(rate, burst)
+            logger.addFilter(self._rate_limits[name])
+        return logger
+
     def get_logger(self) -> logging.Logger:
         """Get the logger instance"""
         if self.logger is None:
@@ -129,6 +351,8 @@ def get_sub_logger(
             file_handler.setFormatter(formatter)
             logger.addHandler(file_handler)
 
+        self._make_async(logger)
+
         # Cache the logger
         self._sub_loggers[name] = logger
 
@@ -140,6 +364,11 @@ def get_logger() -> logging.Logger:
     return PBXLogger().get_logger()
 
 
+def get_rate_limited_logger(name: str, rate: float, burst: int | None = None) -> logging.Logger:
+    """Get a rate-limited PBX child logger for per-packet or per-message events"""
+    return PBXLogger().get_rate_limited_logger(name, rate, burst)
+
+
 def get_vm_ivr_logger() -> logging.Logger:
     """Get VM IVR logger instance with dedicated log file"""
     return PBXLogger().get_sub_logger(
@@ -115,8 +115,23 @@ def get_detailed_status(self) -> dict[str, Any]:
             "metrics": self._get_metrics(),
             "version": self.config.get("server", {}).get("version", "unknown"),
             "server_name": self.config.get("server", {}).get("server_name", "Warden Voip"),
+            "startup": self.get_startup_profile(),
         }
 
+    def get_startup_profile(self) -> dict[str, Any] | None:
+        """
+        Get per-feature startup timings from the PBX feature registry.
+
+        Returns:
+            Startup profile, or None if the PBX core has no feature registry
+        """
+        from pbx.core.feature_registry import FeatureRegistry
+
+        registry = getattr(self.pbx_core, "feature_registry", None)
+        if not isinstance(registry, FeatureRegistry):
+            return None
+        return registry.get_profile()
+
     def _check_pbx_core(self) -> tuple[bool, dict[str, Any]]:
         """Check PBX core status."""
         try:
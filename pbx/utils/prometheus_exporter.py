@@ -252,6 +252,20 @@ def __init__(self, registry: CollectorRegistry | None = None) -> None:
             registry=self.registry,
         )
 
+        # Logging pipeline metrics
+        self.log_queue_depth = Gauge(
+            "pbx_log_queue_depth",
+            "Log records waiting for the writer thread",
+            registry=self.registry,
+        )
+
+        self.log_records_dropped = Gauge(
+            "pbx_log_records_dropped",
+            "Log records discarded since startup",
+            ["reason", "logger"],
+            registry=self.registry,
+        )
+
         # Certificate metrics
         self.certificate_expiry_days = Gauge(
             "pbx_certificate_expiry_days",
@@ -443,6 +457,20 @@ def record_auth_attempt(self, status: str, method: str = "password") -> None:
         """
         self.authentication_attempts.labels(status=status, method=method).inc()
 
+    def update_logging_metrics(self, stats: dict) -> None:
+        """
+        Update logging pipeline metrics.
+
+        Args:
+            stats: Counters from PBXLogger.get_stats()
+        """
+        self.log_queue_depth.set(stats.get("queue_depth", 0))
+        self.log_records_dropped.labels(reason="queue_full", logger="PBX").set(
+            stats.get("dropped", 0)
+        )
+        for name, count in stats.get("rate_limited", {}).items():
+            self.log_records_dropped.labels(reason="rate_limited", logger=f"PBX.{name}").set(count)
+
     def update_certificate_expiry(self, cert_name: str, days_until_expiry: int) -> None:
         """
         Update certificate expiry metric.
@@ -3,8 +3,11 @@
 Provides password management, rate limiting, and security validation
 """
 
+import heapq
+import ipaddress
 import re
 import secrets
+import threading
 import time
 from datetime import UTC, datetime
 from typing import ClassVar
@@ -481,6 +484,70 @@ def get_password_manager(config: dict | None = None) -> SecurePasswordManager:
     return SecurePasswordManager(config)
 
 
+class _NetworkTrie:
+    """Binary radix tree of blocked networks, one per address family"""
+
+    def __init__(self) -> None:
+        # node: [zero_child, one_child, key of the network ending here]
+        self.roots = {4: [None, None, None], 6: [None, None, None]}
+        self.size = 0
+
+    @staticmethod
+    def _bits(value: int, max_bits: int, prefix_len: int) -> list[int]:
+        return [(value >> (max_bits - 1 - i)) & 1 for i in range(prefix_len)]
+
+    def add(self, network: ipaddress.IPv4Network | ipaddress.IPv6Network, key: str) -> None:
+        node = self.roots[network.version]
+        for bit in self._bits(
+            int(network.network_address), network.max_prefixlen, network.prefixlen
+        ):
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+        if node[2] is None:
+            self.size += 1
+        node[2] = key
+
+    def remove(self, network: ipaddress.IPv4Network | ipaddress.IPv6Network) -> None:
+        node = self.roots[network.version]
+        for bit in self._bits(
+            int(network.network_address), network.max_prefixlen, network.prefixlen
+        ):
+            node = node[bit]
+            if node is None:
+                return
+        if node[2] is not None:
+            self.size -= 1
+            node[2] = None
+
+    def match(self, address: ipaddress.IPv4Address | ipaddress.IPv6Address) -> list[str]:
+        """Keys of every blocked network containing address, most specific first"""
+        node = self.roots[address.version]
+        value = int(address)
+        max_bits = address.max_prefixlen
+        keys = []
+        for i in range(max_bits + 1):
+            if node[2] is not None:
+                keys.append(node[2])
+            if i == max_bits:
+                break
+            node = node[(value >> (max_bits - 1 - i)) & 1]
+            if node is None:
+                break
+        keys.reverse()
+        return keys
+
+
+def _parse_network(value: str) -> ipaddress.IPv4Network | ipaddress.IPv6Network | None:
+    """CIDR range for a block key, or None for single addresses and non-IP keys"""
+    if "/" not in value:
+        return None
+    try:
+        return ipaddress.ip_network(value, strict=False)
+    except ValueError:
+        return None
+
+
 class ThreatDetector:
     """
     Enhanced threat detection system
@@ -499,7 +566,31 @@ def __init__(self, database: object = None, config: dict | None = None) -> None:
         self.database = database
         self.config = config or {}
 
-        # Threat detection configuration
+        self.reload_settings()
+
+        # In-memory storage for threat tracking. blocked_ips mirrors every
+        # active block in the database, so lookups never query it.
+        self.blocked_ips = {}  # {ip or CIDR: {"until": timestamp, "reason": str}}
+        self.failed_attempts = {}  # {ip: [(timestamp, reason), ...]}
+        self.suspicious_patterns = {}  # {ip: {pattern: count}}
+
+        # CIDR blocks indexed by prefix, and block expiry times
+        self.lock = threading.RLock()
+        self._networks = _NetworkTrie()
+        self._expiry_heap: list[tuple[float, str]] = []  # (until, key)
+
+        # Background blocklist refresh (picks up other nodes' blocks)
+        self._blocklist_watermark = None
+        self._sync_stop = threading.Event()
+        self._sync_thread = None
+
+        # Initialize database schema if available
+        if self.database and self.database.enabled:
+            self._initialize_schema()
+            self._load_blocked_ips_from_database()
+
+    def reload_settings(self) -> None:
+        """Read thresholds and durations from config (again, after a config reload)"""
         # Support both nested dict and dot notation
         self.enabled = self._get_config("security.threat_detection.enabled", True)
         self.ip_block_duration = self._get_config(
@@ -511,16 +602,9 @@ def __init__(self, database: object = None, config: dict | None = None) -> None:
         self.suspicious_pattern_threshold = self._get_config(
             "security.threat_detection.suspicious_pattern_threshold", 5
         )
-
-        # In-memory storage for threat tracking
-        self.blocked_ips = {}  # {ip: block_until_timestamp}
-        self.failed_attempts = {}  # {ip: [(timestamp, reason), ...]}
-        self.suspicious_patterns = {}  # {ip: {pattern: count}}
-
-        # Initialize database schema if available
-        if self.database and self.database.enabled:
-            self._initialize_schema()
-            self._load_blocked_ips_from_database()
+        self.blocklist_refresh_interval = self._get_config(
+            "security.threat_detection.blocklist_refresh_interval", 30
+        )  # seconds
 
     def _get_config(self, key: str, default: object = None) -> object:
         """
@@ -603,28 +687,137 @@ def _load_blocked_ips_from_database(self) -> None:
             query = self._get_active_blocks_query()
             results = self.database.fetch_all(query)
 
+            blocks = {}
+            for row in results or []:
+                ip_address = row["ip_address"]
+                reason = row.get("reason", "IP blocked")
+                blocked_until = row["blocked_until"]
+
+                # Convert timestamp string to unix time
+                if isinstance(blocked_until, str):
+                    blocked_until = datetime.fromisoformat(blocked_until)
+                if isinstance(blocked_until, datetime):
+                    if blocked_until.tzinfo is None:
+                        blocked_until = blocked_until.replace(tzinfo=UTC)
+                    blocked_until_ts = blocked_until.timestamp()
+                else:
+                    blocked_until_ts = blocked_until
+
+                # Several rows can cover one address; the latest block wins
+                previous = blocks.get(ip_address)
+                if previous is None or blocked_until_ts > previous["until"]:
+                    blocks[ip_address] = {"until": blocked_until_ts, "reason": reason}
+
+            self._replace_blocks(blocks)
             if results:
-                for row in results:
-                    ip_address = row["ip_address"]
-                    reason = row.get("reason", "IP blocked")
-                    blocked_until = row["blocked_until"]
-
-                    # Convert timestamp string to unix time
-                    if isinstance(blocked_until, str):
-                        dt = datetime.fromisoformat(blocked_until)
-                        if dt.tzinfo is None:
-                            dt = dt.replace(tzinfo=UTC)
-                        blocked_until_ts = dt.timestamp()
-                    else:
-                        blocked_until_ts = blocked_until
-
-                    # Add to in-memory cache
-                    self.blocked_ips[ip_address] = {"until": blocked_until_ts, "reason": reason}
-
                 self.logger.info(f"Loaded {len(results)} blocked IPs from database")
         except (KeyError, TypeError, ValueError) as e:
             self.logger.error(f"Failed to load blocked IPs from database: {e}")
 
+    def _replace_blocks(self, blocks: dict) -> None:
+        """Swap in a new blocklist and rebuild its indexes"""
+        networks = _NetworkTrie()
+        expiry_heap = []
+        for key, entry in blocks.items():
+            network = _parse_network(key)
+            if network is not None:
+                networks.add(network, key)
+            expiry_heap.append((entry["until"], key))
+        heapq.heapify(expiry_heap)
+
+        with self.lock:
+            self.blocked_ips = blocks
+            self._networks = networks
+            self._expiry_heap = expiry_heap
+
+    def _add_block(self, key: str, block_until: float, reason: str) -> None:
+        with self.lock:
+            self.blocked_ips[key] = {"until": block_until, "reason": reason}
+            network = _parse_network(key)
+            if network is not None:
+                self._networks.add(network, key)
+            heapq.heappush(self._expiry_heap, (block_until, key))
+
+    def _remove_block(self, key: str) -> None:
+        with self.lock:
+            self.blocked_ips.pop(key, None)
+            network = _parse_network(key)
+            if network is not None:
+                self._networks.remove(network)
+
+    def _expire_blocks(self, now: float) -> None:
+        """Drop blocks whose time is up, earliest first"""
+        expired = []
+        with self.lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                until, key = heapq.heappop(self._expiry_heap)
+                entry = self.blocked_ips.get(key)
+                # Skip heap entries for blocks since extended or removed
+                if entry is not None and entry["until"] == until:
+                    self._remove_block(key)
+                    expired.append(key)
+        for key in expired:
+            self._auto_unblock_ip(key)
+
+    def _get_blocklist_watermark(self) -> tuple | None:
+        """Cheap fingerprint of the blocklist table that changes on every block or unblock"""
+        row = self.database.fetch_one(
+            """
+            SELECT MAX(id) AS last_id, COUNT(unblocked_at) AS unblocked
+            FROM security_blocked_ips
+            """
+        )
+        if not row:
+            return None
+        return row.get("last_id"), row.get("unblocked")
+
+    def refresh_blocklist(self) -> bool:
+        """
+        Reload the blocklist if the database changed since the last check
+
+        Blocks and unblocks made by other nodes sharing the database reach
+        this node this way.
+
+        Returns:
+            True if the blocklist was reloaded
+        """
+        if not self.database or not self.database.enabled:
+            return False
+        try:
+            watermark = self._get_blocklist_watermark()
+        except Exception as e:
+            self.logger.warning(f"Failed to check blocklist for changes: {e}")
+            return False
+        if watermark is not None and watermark == self._blocklist_watermark:
+            return False
+        self._load_blocked_ips_from_database()
+        self._blocklist_watermark = watermark
+        return True
+
+    def start_blocklist_sync(self) -> None:
+        """Start refreshing the blocklist from the database in the background"""
+        if not self.database or not self.database.enabled or self._sync_thread is not None:
+            return
+        if not self.blocklist_refresh_interval or self.blocklist_refresh_interval <= 0:
+            return
+
+        def sync_loop() -> None:
+            while not self._sync_stop.wait(self.blocklist_refresh_interval):
+                self.refresh_blocklist()
+                self._expire_blocks(time.time())
+
+        self._sync_stop.clear()
+        self._sync_thread = threading.Thread(target=sync_loop, name="blocklist-sync", daemon=True)
+        self._sync_thread.start()
+        self.logger.info(f"Blocklist sync started (every {self.blocklist_refresh_interval}s)")
+
+    def stop_blocklist_sync(self) -> None:
+        """Stop the background blocklist refresh"""
+        self._sync_stop.set()
+        if self._sync_thread is not None:
+            self._sync_thread.join(timeout=5)
+            self._sync_thread = None
+
     def is_ip_blocked(self, ip_address: str) -> tuple[bool, str | None]:
         """
         Check if IP address is blocked
@@ -639,28 +832,28 @@ def is_ip_blocked(self, ip_address: str) -> tuple[bool, str | None]:
             return False, None
 
         now = time.time()
-
-        # Check in-memory cache
-        if ip_address in self.blocked_ips:
-            block_until = self.blocked_ips[ip_address]["until"]
-            if now < block_until:
-                return True, self.blocked_ips[ip_address].get("reason", "IP blocked")
+        if self._expiry_heap and self._expiry_heap[0][0] <= now:
+            self._expire_blocks(now)
+
+        # Exact address
+        entry = self.blocked_ips.get(ip_address)
+        if entry is not None:
+            if now < entry["until"]:
+                return True, entry.get("reason", "IP blocked")
             # Block expired
-            del self.blocked_ips[ip_address]
+            self._remove_block(ip_address)
             self._auto_unblock_ip(ip_address)
 
-        # Check database for persistent blocks
-        if self.database and self.database.enabled:
-            query = """
-            SELECT reason, blocked_until
-            FROM security_blocked_ips
-            WHERE ip_address = %s AND blocked_until > CURRENT_TIMESTAMP AND unblocked_at IS NULL
-            ORDER BY blocked_at DESC LIMIT 1
-            """
-            result = self.database.fetch_one(query, (ip_address,))
-
-            if result:
-                return True, result.get("reason", "IP blocked")
+        # Blocked ranges containing the address
+        if self._networks.size:
+            try:
+                address = ipaddress.ip_address(ip_address)
+            except ValueError:
+                return False, None
+            for key in self._networks.match(address):
+                entry = self.blocked_ips.get(key)
+                if entry is not None and now < entry["until"]:
+                    return True, entry.get("reason", "IP blocked")
 
         return False, None
 
@@ -669,7 +862,7 @@ def block_ip(self, ip_address: str, reason: str, duration: int | None = None) ->
         Block an IP address
 
         Args:
-            ip_address: IP address to block
+            ip_address: IP address or CIDR range (e.g. 203.0.113.0/24) to block
             reason: Reason for blocking
             duration: Block duration in seconds (uses default if not provided)
         """
@@ -679,11 +872,15 @@ def block_ip(self, ip_address: str, reason: str, duration: int | None = None) ->
         if duration is None:
             duration = self.ip_block_duration
 
+        network = _parse_network(ip_address)
+        if network is not None:
+            ip_address = str(network)
+
         now = time.time()
         block_until = now + duration
 
         # Add to in-memory cache
-        self.blocked_ips[ip_address] = {"until": block_until, "reason": reason}
+        self._add_block(ip_address, block_until, reason)
 
         # Store in database
         if self.database and self.database.enabled:
@@ -705,11 +902,14 @@ def unblock_ip(self, ip_address: str) -> None:
         Manually unblock an IP address
 
         Args:
-            ip_address: IP address to unblock
+            ip_address: IP address or CIDR range to unblock
         """
+        network = _parse_network(ip_address)
+        if network is not None:
+            ip_address = str(network)
+
         # Remove from cache
-        if ip_address in self.blocked_ips:
-            del self.blocked_ips[ip_address]
+        self._remove_block(ip_address)
 
         # Update database
         if self.database and self.database.enabled:
@@ -5,6 +5,7 @@
 
 import threading
 import time
+from collections import OrderedDict
 from typing import ClassVar
 
 
@@ -60,8 +61,39 @@ def add_headers(handler: object, is_https: bool = False) -> None:
             )
 
 
+# Tokens charged by expensive endpoints, keyed by Flask URL rule. Every
+# other route costs one token.
+DEFAULT_ROUTE_COSTS: dict[str, float] = {
+    "/api/analytics/export": 10,
+    "/api/statistics": 5,
+    "/api/analytics/advanced": 5,
+    "/api/analytics/call-center": 5,
+    "/api/qos/statistics": 3,
+}
+
+
+class _Shard:
+    """One independently locked slice of the rate limiter's buckets."""
+
+    __slots__ = ("allowed", "buckets", "denied", "evictions", "lock")
+
+    def __init__(self) -> None:
+        # Least recently seen client first
+        self.buckets: OrderedDict[str, dict] = OrderedDict()
+        self.lock = threading.Lock()
+        self.allowed = 0
+        self.denied = 0
+        self.evictions = 0
+
+
 class RateLimiter:
-    """Token bucket rate limiter with thread safety and memory limits."""
+    """Token bucket rate limiter with thread safety and memory limits.
+
+    Clients are hashed across independently locked shards, so requests
+    from different clients rarely wait on each other. Each shard keeps its
+    buckets in least-recently-seen order: when it is full the coldest client
+    is evicted in O(1), and idle clients are trimmed from the cold end.
+    """
 
     def __init__(
         self,
@@ -69,6 +101,8 @@ def __init__(
         burst_size: int = 10,
         cleanup_interval: int = 300,
         max_tracked_ips: int = 10000,
+        shards: int = 16,
+        route_costs: dict[str, float] | None = None,
     ) -> None:
         """Initialize rate limiter.
 
@@ -77,18 +111,33 @@ def __init__(
             burst_size: Maximum burst of requests
             cleanup_interval: How often to clean up old entries (seconds)
             max_tracked_ips: Maximum number of IP addresses to track (prevents memory exhaustion)
+            shards: Number of independently locked shards
+            route_costs: Tokens charged per route (defaults to DEFAULT_ROUTE_COSTS)
         """
         self.requests_per_minute = requests_per_minute
         self.burst_size = burst_size
         self.cleanup_interval = cleanup_interval
         self.max_tracked_ips = max_tracked_ips
-
-        # Store buckets per client IP
-        self.buckets: dict[str, dict] = {}
+        self.route_costs = dict(DEFAULT_ROUTE_COSTS if route_costs is None else route_costs)
         self.last_cleanup = time.time()
 
-        # Thread lock for concurrent access
-        self._lock = threading.Lock()
+        # Never more shards than tracked IPs, so the shard capacities add up
+        # to at most max_tracked_ips
+        self.shard_count = max(1, min(shards, max_tracked_ips))
+        self._shard_capacity = max(1, max_tracked_ips // self.shard_count)
+        self._shards = [_Shard() for _ in range(self.shard_count)]
+
+    @property
+    def buckets(self) -> dict[str, dict]:
+        """Snapshot of all client buckets, keyed by client IP."""
+        buckets: dict[str, dict] = {}
+        for shard in self._shards:
+            with shard.lock:
+                buckets.update(shard.buckets)
+        return buckets
+
+    def _shard_for(self, client_ip: str) -> _Shard:
+        return self._shards[hash(client_ip) % self.shard_count]
 
     def _refill_tokens(self, bucket: dict) -> None:
         """Refill tokens based on time elapsed."""
@@ -100,66 +149,81 @@ def _refill_tokens(self, bucket: dict) -> None:
         bucket["tokens"] = min(self.burst_size, bucket["tokens"] + tokens_to_add)
         bucket["last_update"] = now
 
+    @staticmethod
+    def _trim(shard: _Shard, cutoff: float) -> None:
+        """Drop idle buckets from the cold end of a shard (caller holds its lock)."""
+        buckets = shard.buckets
+        while buckets:
+            ip, bucket = next(iter(buckets.items()))
+            if bucket["last_update"] > cutoff:
+                break
+            del buckets[ip]
+
     def _cleanup_old_entries(self) -> None:
         """Clean up old bucket entries."""
         now = time.time()
         if now - self.last_cleanup < self.cleanup_interval:
             return
+        self.last_cleanup = now
 
         # Remove buckets not used in last hour
         cutoff = now - 3600
-        old_buckets = self.buckets
-        self.buckets = {
-            ip: bucket for ip, bucket in old_buckets.items() if bucket["last_update"] > cutoff
-        }
-        self.last_cleanup = now
+        for shard in self._shards:
+            with shard.lock:
+                self._trim(shard, cutoff)
+
+    def cost_for(self, route: str | None) -> float:
+        """Tokens a request to route costs, capped at the burst size."""
+        if route is None:
+            return 1
+        return min(self.route_costs.get(route, 1), self.burst_size)
 
-    def is_allowed(self, client_ip: str) -> tuple[bool, int | None]:
+    def is_allowed(self, client_ip: str, route: str | None = None) -> tuple[bool, int | None]:
         """Check if request is allowed.
 
         Args:
             client_ip: Client IP address
+            route: Route being requested, for per-route costs
 
         Returns:
             tuple of (allowed, retry_after_seconds)
         """
-        with self._lock:
-            # Check if we've hit the maximum tracked IPs
-            if client_ip not in self.buckets and len(self.buckets) >= self.max_tracked_ips:
-                # Force cleanup before rejecting
-                self._cleanup_old_entries()
-
-                # If still at max after cleanup, reject oldest entry
-                if len(self.buckets) >= self.max_tracked_ips:
-                    oldest_ip = min(
-                        self.buckets.keys(),
-                        key=lambda ip: self.buckets[ip]["last_update"],
-                    )
-                    del self.buckets[oldest_ip]
-
-            # Get or create bucket for this IP
-            if client_ip not in self.buckets:
-                self.buckets[client_ip] = {
+        cost = self.cost_for(route)
+        retry_after = None
+        shard = self._shard_for(client_ip)
+        with shard.lock:
+            bucket = shard.buckets.get(client_ip)
+            if bucket is None:
+                if len(shard.buckets) >= self._shard_capacity:
+                    self._trim(shard, time.time() - 3600)
+                    # Still full: evict the least recently seen client
+                    if len(shard.buckets) >= self._shard_capacity:
+                        shard.buckets.popitem(last=False)
+                        shard.evictions += 1
+                bucket = shard.buckets[client_ip] = {
                     "tokens": self.burst_size,
                     "last_update": time.time(),
                     "request_count": 0,
                 }
-
-            bucket = self.buckets[client_ip]
-            self._refill_tokens(bucket)
+            else:
+                shard.buckets.move_to_end(client_ip)
+                self._refill_tokens(bucket)
 
             # Check if we have tokens available
-            if bucket["tokens"] >= 1:
-                bucket["tokens"] -= 1
+            if bucket["tokens"] >= cost:
+                bucket["tokens"] -= cost
                 bucket["request_count"] += 1
-                self._cleanup_old_entries()
-                return True, None
+                shard.allowed += 1
+            else:
+                shard.denied += 1
+                # Calculate retry after
+                tokens_needed = cost - bucket["tokens"]
+                retry_after = int(tokens_needed / (self.requests_per_minute / 60.0))
 
-            # Calculate retry after
-            tokens_needed = 1 - bucket["tokens"]
-            retry_after = int(tokens_needed / (self.requests_per_minute / 60.0))
+        if time.time() - self.last_cleanup >= self.cleanup_interval:
+            self._cleanup_old_entries()
 
-            return False, retry_after
+        return retry_after is None, retry_after
 
     def get_stats(self, client_ip: str) -> dict[str, int]:
         """Get rate limit stats for client.
@@ -170,8 +234,9 @@ def get_stats(self, client_ip: str) -> dict[str, int]:
         Returns:
             Dictionary with stats
         """
-        with self._lock:
-            bucket = self.buckets.get(client_ip)
+        shard = self._shard_for(client_ip)
+        with shard.lock:
+            bucket = shard.buckets.get(client_ip)
             if not bucket:
                 return {
                     "requests_remaining": self.burst_size,
@@ -184,6 +249,22 @@ def get_stats(self, client_ip: str) -> dict[str, int]:
                 "total_requests": bucket["request_count"],
             }
 
+    def get_statistics(self) -> dict[str, int]:
+        """Get allowed/denied counters across all clients.
+
+        Returns:
+            Dictionary with counters
+        """
+        stats = {"allowed": 0, "denied": 0, "evictions": 0, "tracked_clients": 0}
+        for shard in self._shards:
+            with shard.lock:
+                stats["allowed"] += shard.allowed
+                stats["denied"] += shard.denied
+                stats["evictions"] += shard.evictions
+                stats["tracked_clients"] += len(shard.buckets)
+        stats["shards"] = self.shard_count
+        return stats
+
 
 class RequestValidator:
     """Validate incoming requests for security issues."""
@@ -331,15 +412,21 @@ def get_rate_limiter() -> RateLimiter:
     return _rate_limiter
 
 
-def configure_rate_limiter(requests_per_minute: int = 60, burst_size: int = 10) -> None:
+def configure_rate_limiter(
+    requests_per_minute: int = 60,
+    burst_size: int = 10,
+    route_costs: dict[str, float] | None = None,
+) -> None:
     """Configure global rate limiter.
 
     Args:
         requests_per_minute: Number of requests allowed per minute
         burst_size: Maximum burst of requests
+        route_costs: Tokens charged per route (defaults to DEFAULT_ROUTE_COSTS)
     """
     global _rate_limiter
     _rate_limiter = RateLimiter(
         requests_per_minute=requests_per_minute,
         burst_size=burst_size,
+        route_costs=route_costs,
     )
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Conference mixer benchmark for Warden VoIP PBX.
+
+Drives many rooms' mixers from one thread with synthetic G.711 traffic and
+reports how much of a single core the mixing consumes.
+
+Usage:
+    python scripts/benchmark_conference_mixer.py
+    python scripts/benchmark_conference_mixer.py --rooms 30 --participants 10 --seconds 10
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pbx.features.conference_mixer import ConferenceMixer, encode_frame
+
+
+def build_frames(count: int, samples: int, codec: str, seed: int) -> list[bytes]:
+    """Pre-encode a cycle of speech-like frames (noise bursts with varying level)."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(count):
+        level = 3000 if (i // 25) % 2 == 0 else 50
+        pcm = np.clip(rng.normal(0, level, samples), -32768, 32767).astype(np.int16)
+        frames.append(encode_frame(pcm, codec))
+    return frames
+
+
+def run(rooms: int, participants: int, seconds: float, speakers: int) -> dict:
+    """Run the benchmark and return the results."""
+    ptime_ms = 20
+    ticks = int(seconds * 1000 / ptime_ms)
+    sink_count = [0]
+
+    def sink(_packet: bytes) -> None:
+        sink_count[0] += 1
+
+    mixers = []
+    frame_sets = {}
+    for r in range(rooms):
+        mixer = ConferenceMixer(f"bench-{r}", ptime_ms=ptime_ms, max_active_speakers=speakers)
+        for p in range(participants):
+            codec = "PCMU" if p % 3 else "PCMA"
+            mixer.add_participant(f"{r}-{p}", codec, sink)
+            frame_sets[(r, p)] = build_frames(100, mixer.samples_per_frame, codec, r * 1000 + p)
+        mixers.append(mixer)
+
+    start = time.perf_counter()
+    for tick in range(ticks):
+        for r, mixer in enumerate(mixers):
+            for p in range(participants):
+                frames = frame_sets[(r, p)]
+                mixer.push_frame(f"{r}-{p}", frames[(tick + p * 7) % len(frames)])
+            mixer.tick()
+    elapsed = time.perf_counter() - start
+
+    audio_seconds = ticks * ptime_ms / 1000
+    return {
+        "rooms": rooms,
+        "participants_per_room": participants,
+        "max_active_speakers": speakers,
+        "audio_seconds": audio_seconds,
+        "cpu_seconds": round(elapsed, 3),
+        "core_utilization_pct": round(elapsed / audio_seconds * 100, 1),
+        "per_tick_ms": round(elapsed / ticks * 1000, 3),
+        "packets_sent": sink_count[0],
+        "encodes_per_tick": round(sum(m.encodes for m in mixers) / ticks, 1),
+        "realtime": elapsed < audio_seconds,
+    }
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the conference audio mixer")
+    parser.add_argument("--rooms", type=int, default=30)
+    parser.add_argument("--participants", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--speakers", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Output JSON")
+    args = parser.parse_args()
+
+    results = run(args.rooms, args.participants, args.seconds, args.speakers)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print("Conference Mixer Benchmark")
+        print("=" * 40)
+        for key, value in results.items():
+            print(f"{key:>24}: {value}")
+
+    return 0 if results["realtime"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Phone provisioning benchmark for Warden VoIP PBX.
+
+Simulates a fleet reboot: every registered phone fetches its config, then
+polls again with the ETag it was given. Reports configs/sec for the first
+(rendering) pass and for the re-poll pass served from cache as 304s.
+
+Usage:
+    python scripts/benchmark_provisioning.py
+    python scripts/benchmark_provisioning.py --phones 2000 --json
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pbx.api.app import create_app
+from pbx.features.phone_provisioning import PhoneProvisioning
+from pbx.utils.logger import get_logger
+
+MODELS = [
+    ("yealink", "t46s"),
+    ("polycom", "vvx450"),
+    ("grandstream", "gxp2170"),
+    ("zultys", "zip37g"),
+]
+
+
+class BenchmarkConfig:
+    """Minimal dotted-key config"""
+
+    def __init__(self, values: dict) -> None:
+        self.values = values
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value: Any = self.values
+        for part in key.split("."):
+            if not isinstance(value, dict) or part not in value:
+                return default
+            value = value[part]
+        return value
+
+
+class BenchmarkRegistry:
+    """Extension registry stand-in holding one extension per phone"""
+
+    def __init__(self, count: int) -> None:
+        self.extensions = {
+            str(1000 + i): SimpleNamespace(
+                number=str(1000 + i), name=f"User {i}", config={"password": f"secret{i}"}
+            )
+            for i in range(count)
+        }
+
+    def get(self, number: str) -> Any:
+        return self.extensions.get(number)
+
+    def get_all(self) -> list:
+        return list(self.extensions.values())
+
+
+def fleet_pass(client: Any, macs: list[str], etags: dict[str, str]) -> tuple[float, int]:
+    """Fetch every phone's config; returns (elapsed, number of 304s)"""
+    not_modified = 0
+    start = time.perf_counter()
+    for mac in macs:
+        headers = {"If-None-Match": etags[mac]} if mac in etags else {}
+        response = client.get(f"/provision/{mac}.cfg", headers=headers)
+        if response.status_code == 304:
+            not_modified += 1
+        else:
+            etags[mac] = response.headers["ETag"]
+    return time.perf_counter() - start, not_modified
+
+
+def render_pass(provisioning: PhoneProvisioning, registry: Any, macs: list[str]) -> float:
+    """Generate every phone's config directly, without HTTP"""
+    start = time.perf_counter()
+    for mac in macs:
+        provisioning.generate_config(mac, registry)
+    return time.perf_counter() - start
+
+
+def run(phones: int) -> dict:
+    """Run the benchmark and return the results."""
+    get_logger().setLevel(logging.WARNING)
+    config = BenchmarkConfig(
+        {
+            "server": {"external_ip": "192.0.2.10"},
+            "api": {"port": 9000},
+            "provisioning": {"ldap_phonebook": {"enable": 1, "server": "ldap.example.com"}},
+        }
+    )
+    provisioning = PhoneProvisioning(config)
+    registry = BenchmarkRegistry(phones)
+
+    macs = []
+    for i in range(phones):
+        mac = f"0015{i:08x}"
+        vendor, model = MODELS[i % len(MODELS)]
+        provisioning.register_device(mac, str(1000 + i), vendor, model)
+        macs.append(mac)
+
+    pbx_core = SimpleNamespace(
+        config=config,
+        phone_provisioning=provisioning,
+        extension_registry=registry,
+        registered_phones_db=None,
+        metrics_exporter=None,
+    )
+    client = create_app(pbx_core).test_client()
+
+    render_elapsed = render_pass(provisioning, registry, macs)
+    cached_elapsed = render_pass(provisioning, registry, macs)
+    provisioning.invalidate_config_cache()
+
+    etags: dict[str, str] = {}
+    cold_elapsed, _ = fleet_pass(client, macs, etags)
+    warm_elapsed, not_modified = fleet_pass(client, macs, etags)
+
+    return {
+        "phones": phones,
+        "render_configs_per_sec": round(phones / render_elapsed),
+        "cached_configs_per_sec": round(phones / cached_elapsed),
+        "first_fetch_seconds": round(cold_elapsed, 3),
+        "first_fetch_configs_per_sec": round(phones / cold_elapsed),
+        "repoll_seconds": round(warm_elapsed, 3),
+        "repoll_configs_per_sec": round(phones / warm_elapsed),
+        "repoll_not_modified": not_modified,
+    }
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark phone config provisioning")
+    parser.add_argument("--phones", type=int, default=2000)
+    parser.add_argument("--json", action="store_true", help="Output JSON")
+    args = parser.parse_args()
+
+    results = run(args.phones)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print("Phone Provisioning Benchmark")
+        print("=" * 40)
+        for key, value in results.items():
+            print(f"{key:>28}: {value}")
+
+    return 0 if results["repoll_not_modified"] == args.phones else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
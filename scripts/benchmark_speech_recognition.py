@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Live speech recognition benchmark for Warden VoIP PBX.
+
+Feeds N simulated calls of 8 kHz audio through the pooled recognizers at
+real-time pace and reports whether recognition keeps up (queue depth and
+dropped frames stay at zero).
+
+Requires Vosk and a downloaded model.
+
+Usage:
+    python scripts/benchmark_speech_recognition.py --model /var/pbx/vosk-models/vosk-model-small-en-us-0.15
+    python scripts/benchmark_speech_recognition.py --model ... --calls 50 --workers 4 --audio call.wav
+"""
+
+import argparse
+import json
+import sys
+import time
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pbx.features.speech_recognizer_pool import (
+    StreamingRecognitionService,
+    load_shared_model,
+    resample_pcm16,
+)
+
+
+def load_audio(path: str | None, seconds: float) -> bytes:
+    """Load 8 kHz mono PCM from a WAV file, or synthesize noise if none given."""
+    if path:
+        with wave.open(path, "rb") as wf:
+            pcm = wf.readframes(wf.getnframes())
+            return resample_pcm16(pcm, wf.getframerate(), 8000)
+
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    return rng.normal(0, 2000, int(seconds * 8000)).astype("<i2").tobytes()
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark pooled live speech recognition")
+    parser.add_argument("--model", required=True, help="Path to Vosk model")
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--audio", help="Optional WAV file to replay on every call")
+    args = parser.parse_args()
+
+    model = load_shared_model(args.model)
+    if model is None:
+        print("Could not load Vosk model", file=sys.stderr)
+        return 2
+
+    audio = load_audio(args.audio, args.seconds)
+    frame_bytes = 8000 * 2 // 50  # 20 ms at 8 kHz
+    frames = [audio[i : i + frame_bytes] for i in range(0, len(audio), frame_bytes)]
+    total_frames = int(args.seconds * 50)
+
+    service = StreamingRecognitionService(
+        model, max_streams=args.calls, workers=args.workers, max_queued_frames=100
+    )
+    for call in range(args.calls):
+        service.start_stream(f"call-{call}")
+
+    max_queue = 0
+    start = time.monotonic()
+    for n in range(total_frames):
+        frame = frames[n % len(frames)]
+        for call in range(args.calls):
+            service.submit(f"call-{call}", frame, sample_rate=8000)
+        max_queue = max(max_queue, service.get_statistics()["queued_frames"])
+        delay = start + (n + 1) / 50 - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    drain_start = time.monotonic()
+    stats = service.get_statistics()
+    for call in range(args.calls):
+        service.end_stream(f"call-{call}", timeout=60)
+    drain_seconds = time.monotonic() - drain_start
+    service.stop()
+
+    results = {
+        "calls": args.calls,
+        "workers": args.workers,
+        "audio_seconds_per_call": args.seconds,
+        "max_queued_frames": max_queue,
+        "frames_dropped": stats["frames_dropped"],
+        "drain_seconds_after_audio": round(drain_seconds, 2),
+        "realtime": stats["frames_dropped"] == 0 and drain_seconds < 2.0,
+    }
+    print(json.dumps(results, indent=2))
+    return 0 if results["realtime"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
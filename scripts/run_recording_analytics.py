@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Batch Recording Analytics
+
+Queues new call recordings and analyzes the backlog on a process pool.
+Progress is journaled next to the recordings, so a run that is interrupted
+picks up where it stopped the next time. Meant to run overnight from cron:
+
+    0 1 * * * cd /opt/pbx && python scripts/run_recording_analytics.py
+
+Usage:
+    python scripts/run_recording_analytics.py [--config config.yml] [--workers N]
+        [--limit N] [--analysis sentiment --analysis keywords] [--no-scan] [--compact]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from pbx.features.recording_analytics_batch import RecordingAnalyticsBatch
+from pbx.utils.config import Config
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Analyze the call recording backlog")
+    parser.add_argument("--config", default="config.yml", help="PBX configuration file")
+    parser.add_argument(
+        "--directory", help="Recordings directory (default: recording.storage_path)"
+    )
+    parser.add_argument("--pattern", default="*.wav", help="Recording file pattern")
+    parser.add_argument(
+        "--analysis",
+        action="append",
+        dest="analysis_types",
+        help="Analysis type to run on newly queued recordings (repeatable; default: all)",
+    )
+    parser.add_argument("--workers", type=int, help="Worker processes")
+    parser.add_argument("--limit", type=int, help="Analyze at most this many recordings")
+    parser.add_argument(
+        "--no-scan", action="store_true", help="Only run jobs that are already queued"
+    )
+    parser.add_argument(
+        "--compact", action="store_true", help="Rewrite the job journal after the run"
+    )
+    args = parser.parse_args()
+
+    config = Config(args.config)
+    directory = Path(args.directory or config.get("recording.storage_path", "recordings"))
+    batch = RecordingAnalyticsBatch(config, journal_path=str(directory / "analytics_jobs.jsonl"))
+
+    if not args.no_scan:
+        queued = batch.enqueue_directory(str(directory), args.pattern, args.analysis_types)
+        print(f"Queued {queued} new recording(s) from {directory}")
+
+    summary = batch.run(max_workers=args.workers, limit=args.limit)
+    if args.compact:
+        batch.compact()
+
+    print(json.dumps({**summary, "jobs": batch.get_statistics()["jobs"]}, indent=2))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
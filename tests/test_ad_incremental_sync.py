@@ -0,0 +1,344 @@
+"""Tests for incremental, paged Active Directory user synchronization."""
+
+import threading
+from collections.abc import Iterator
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask.testing import FlaskClient
+
+from pbx.integrations.active_directory import PAGED_RESULTS_OID, ActiveDirectoryIntegration
+
+MOD = "pbx.integrations.active_directory"
+
+
+class _Attr:
+    """ldap3-style attribute: str() gives the value, .value the raw value"""
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __str__(self) -> str:
+        return str(self.value)
+
+    def __iter__(self) -> Iterator:
+        return iter(self.value if isinstance(self.value, list) else [self.value])
+
+
+class _Entry:
+    def __init__(self, sam: str, name: str, phone: str | None, disabled: bool = False) -> None:
+        self.sAMAccountName = _Attr(sam)
+        self.displayName = _Attr(name)
+        self.mail = _Attr(f"{sam}@example.com")
+        if phone:
+            self.telephoneNumber = _Attr(phone)
+        self.userAccountControl = _Attr(514 if disabled else 512)
+
+    def __getitem__(self, key: str) -> _Attr:
+        return getattr(self, key)
+
+
+class _Connection:
+    """Fake ldap3 connection serving users in pages"""
+
+    def __init__(self, page_size: int = 2) -> None:
+        self.bound = True
+        self.users: list[_Entry] = []
+        self.usn = 1000
+        self.invocation_id = "5d2c7f5e-0000-4000-8000-00000000dc01"
+        self.filters: list[str] = []
+        self.page_size = page_size
+        self.entries: list = []
+        self.result: dict = {}
+
+    def search(self, search_base: str, search_filter: str, **kwargs: Any) -> None:
+        if search_base == "":
+            self.entries = [
+                MagicMock(
+                    highestCommittedUSN=_Attr(self.usn),
+                    dsServiceName=_Attr("CN=NTDS Settings,CN=DC1"),
+                )
+            ]
+            return
+        if search_base.startswith("CN=NTDS Settings"):
+            self.entries = [MagicMock(invocationId=_Attr(self.invocation_id))]
+            return
+        self.filters.append(search_filter)
+        start = int(kwargs.get("paged_cookie") or b"0")
+        end = start + self.page_size
+        self.entries = self.users[start:end]
+        cookie = str(end).encode() if end < len(self.users) else b""
+        self.result = {"controls": {PAGED_RESULTS_OID: {"value": {"cookie": cookie}}}}
+
+
+class _ExtensionDB:
+    """In-memory ExtensionDB with the batch methods the sync uses"""
+
+    def __init__(self) -> None:
+        self.rows: dict[str, dict] = {}
+        self.config: dict[str, Any] = {}
+        self.batches: list[tuple[str, int]] = []
+
+    def get_all(self) -> list[dict]:
+        return [dict(row) for row in self.rows.values()]
+
+    def add_many(self, extensions: list[dict]) -> bool:
+        self.batches.append(("add", len(extensions)))
+        for ext in extensions:
+            self.rows[ext["number"]] = dict(ext)
+        return True
+
+    def update_ad_fields_many(self, extensions: list[dict]) -> bool:
+        self.batches.append(("update", len(extensions)))
+        for ext in extensions:
+            row = self.rows[ext["number"]]
+            row.update(name=ext["name"], ad_synced=True, ad_username=ext["ad_username"])
+            if ext["email"] is not None:
+                row["email"] = ext["email"]
+        return True
+
+    def set_allow_external_many(self, numbers: list[str], allow_external: bool) -> bool:
+        self.batches.append(("deactivate", len(numbers)))
+        for number in numbers:
+            self.rows[number]["allow_external"] = allow_external
+        return True
+
+    def set_config_many(self, values: dict, config_type: str = "string", updated_by=None) -> bool:
+        self.config.update(values)
+        return True
+
+    def get_config(self, key: str, default: Any = None) -> Any:
+        return self.config.get(key, default)
+
+    def set_config(
+        self, key: str, value: Any, config_type: str = "string", updated_by=None
+    ) -> bool:
+        self.config[key] = value
+        return True
+
+
+@pytest.fixture
+def ad() -> Iterator[ActiveDirectoryIntegration]:
+    config = {
+        "integrations.active_directory.enabled": True,
+        "integrations.active_directory.server": "ldaps://dc.example.com",
+        "integrations.active_directory.base_dn": "DC=example,DC=com",
+        "integrations.active_directory.bind_dn": "CN=admin",
+        "integrations.active_directory.bind_password": "secret",
+        "integrations.active_directory.auto_provision": True,
+        "integrations.active_directory.user_search_base": "OU=Users,DC=example,DC=com",
+        "integrations.active_directory.full_sync_interval_hours": 24,
+    }
+    with (
+        patch(f"{MOD}.LDAP3_AVAILABLE", True),
+        patch(f"{MOD}.SUBTREE", "SUBTREE", create=True),
+        patch(f"{MOD}.BASE", "BASE", create=True),
+        patch(f"{MOD}.get_logger", return_value=MagicMock()),
+    ):
+        integration = ActiveDirectoryIntegration(config)
+        integration.connection = _Connection()
+        yield integration
+
+
+@pytest.mark.unit
+class TestIncrementalSync:
+    """Tests for ActiveDirectoryIntegration.sync_users sync modes."""
+
+    def test_first_sync_is_full_and_paged(self, ad: ActiveDirectoryIntegration) -> None:
+        conn = ad.connection
+        conn.users = [_Entry(f"user{i}", f"User {i}", str(1001 + i)) for i in range(5)]
+        db = _ExtensionDB()
+
+        result = ad.sync_users(extension_db=db)
+
+        summary = result["summary"]
+        assert summary["mode"] == "full"
+        assert summary["pages"] == 3
+        assert summary["created"] == ["1001", "1002", "1003", "1004", "1005"]
+        assert result["synced_count"] == 5
+        assert db.batches == [("add", 5)]
+        assert "userAccountControl:1.2.840.113556.1.4.803:=2" in conn.filters[0]
+        assert db.config["ad_sync.state"]["usn"] == 1000
+
+    def test_incremental_sync_fetches_only_changes(self, ad: ActiveDirectoryIntegration) -> None:
+        conn = ad.connection
+        conn.users = [
+            _Entry("alice", "Alice", "1001"),
+            _Entry("bob", "Bob", "1002"),
+            _Entry("carol", "Carol", "1003"),
+        ]
+        db = _ExtensionDB()
+        ad.sync_users(extension_db=db)
+        db.batches.clear()
+
+        # Bob was renamed, Carol was disabled, Alice came back unchanged
+        conn.usn = 1200
+        conn.users = [
+            _Entry("alice", "Alice", "1001"),
+            _Entry("bob", "Robert", "1002"),
+            _Entry("carol", "Carol", "1003", disabled=True),
+        ]
+        provisioning = MagicMock()
+        provisioning.get_all_devices.return_value = [
+            MagicMock(extension_number="1001"),
+            MagicMock(extension_number="1002"),
+        ]
+
+        result = ad.sync_users(extension_db=db, phone_provisioning=provisioning)
+
+        summary = result["summary"]
+        assert summary["mode"] == "incremental"
+        assert "(uSNChanged>=1001)" in conn.filters[-1]
+        assert summary["unchanged"] == 1
+        assert summary["updated"] == ["1002"]
+        assert summary["deactivated"] == ["1003"]
+        assert db.rows["1002"]["name"] == "Robert"
+        assert db.rows["1003"]["allow_external"] is False
+        assert db.batches == [("update", 1), ("deactivate", 1)]
+        assert result["extensions_to_reboot"] == ["1002"]
+        assert db.config["ad_sync.state"]["usn"] == 1200
+
+    def test_incremental_sync_with_no_changes_writes_nothing(
+        self, ad: ActiveDirectoryIntegration
+    ) -> None:
+        ad.connection.users = [_Entry("alice", "Alice", "1001")]
+        db = _ExtensionDB()
+        ad.sync_users(extension_db=db)
+        db.batches.clear()
+
+        result = ad.sync_users(extension_db=db)
+
+        assert result["synced_count"] == 0
+        assert result["summary"]["unchanged"] == 1
+        assert db.batches == []
+
+    def test_failover_to_another_dc_forces_full_sync(self, ad: ActiveDirectoryIntegration) -> None:
+        conn = ad.connection
+        conn.users = [_Entry("alice", "Alice", "1001")]
+        db = _ExtensionDB()
+        ad.sync_users(extension_db=db)
+        assert db.config["ad_sync.state"]["invocation_id"] == conn.invocation_id
+
+        # Same server name, different DC with its own (lower) USN counter
+        conn.invocation_id = "5d2c7f5e-0000-4000-8000-00000000dc02"
+        conn.usn = 400
+        summary = ad.sync_users(extension_db=db)["summary"]
+
+        assert summary["mode"] == "full"
+        assert summary["reason"] == "domain controller changed"
+        assert db.config["ad_sync.state"]["usn"] == 400
+        assert ad.sync_users(extension_db=db)["summary"]["mode"] == "incremental"
+
+    def test_full_resync_on_demand_deactivates_deleted_users(
+        self, ad: ActiveDirectoryIntegration
+    ) -> None:
+        conn = ad.connection
+        conn.users = [_Entry("alice", "Alice", "1001"), _Entry("bob", "Bob", "1002")]
+        db = _ExtensionDB()
+        ad.sync_users(extension_db=db)
+
+        # Deleted objects don't show up in an incremental search
+        conn.users = [_Entry("alice", "Alice", "1001")]
+        assert ad.sync_users(extension_db=db)["summary"]["deactivated"] == []
+
+        summary = ad.sync_users(extension_db=db, full=True)["summary"]
+        assert summary["mode"] == "full"
+        assert summary["reason"] == "requested"
+        assert summary["deactivated"] == ["1002"]
+
+    def test_empty_full_result_deactivates_nothing(self, ad: ActiveDirectoryIntegration) -> None:
+        ad.connection.users = [_Entry("alice", "Alice", "1001")]
+        db = _ExtensionDB()
+        ad.sync_users(extension_db=db)
+
+        ad.connection.users = []
+        result = ad.sync_users(extension_db=db, full=True)
+
+        assert result["synced_count"] == 0
+        assert db.rows["1001"].get("allow_external") is True
+
+    def test_background_sync_runs_initial_then_periodic(
+        self, ad: ActiveDirectoryIntegration
+    ) -> None:
+        runs: list[str] = []
+        done = threading.Event()
+
+        def periodic() -> None:
+            runs.append("periodic")
+            ad.stop_background_sync()
+            done.set()
+
+        ad.start_background_sync(periodic, 0.01, initial_sync=lambda: runs.append("initial"))
+
+        assert done.wait(5)
+        ad._background_thread.join(5)
+        assert runs == ["initial", "periodic"]
+
+
+@pytest.mark.unit
+class TestDatabaseExecuteMany:
+    """Tests for DatabaseBackend.execute_many."""
+
+    def test_batch_runs_in_one_transaction(self) -> None:
+        from pbx.utils.database import DatabaseBackend
+
+        with patch("pbx.utils.database.get_logger", return_value=MagicMock()):
+            backend = DatabaseBackend({})
+        backend.enabled = True
+        backend.connection = MagicMock()
+        batch_connection = MagicMock(closed=0)
+        cursor = batch_connection.cursor.return_value
+
+        with (
+            patch.object(backend, "open_dedicated_connection", return_value=batch_connection),
+            patch("pbx.utils.database.execute_batch") as mock_batch,
+        ):
+            assert backend.execute_many("UPDATE t SET a = %s", [(1,), (2,)]) is True
+            assert backend.execute_many("UPDATE t SET a = %s", [(3,)]) is True
+            backend.open_dedicated_connection.assert_called_once()
+
+        mock_batch.assert_any_call(cursor, "UPDATE t SET a = %s", [(1,), (2,)], page_size=500)
+        assert batch_connection.commit.call_count == 2
+        # The shared autocommit connection is never put in a transaction
+        backend.connection.cursor.assert_not_called()
+
+    def test_failed_batch_rolls_back_its_own_connection(self) -> None:
+        from pbx.utils.database import DatabaseBackend
+
+        with patch("pbx.utils.database.get_logger", return_value=MagicMock()):
+            backend = DatabaseBackend({})
+        backend.enabled = True
+        backend.connection = MagicMock()
+        broken = MagicMock(closed=0)
+        broken.rollback.side_effect = OSError("server closed the connection")
+        fresh = MagicMock(closed=0)
+
+        with (
+            patch.object(backend, "open_dedicated_connection", side_effect=[broken, fresh]),
+            patch("pbx.utils.database.execute_batch", side_effect=[OSError("lost"), None]),
+        ):
+            assert backend.execute_many("UPDATE t SET a = %s", [(1,)]) is False
+            assert backend.execute_many("UPDATE t SET a = %s", [(1,)]) is True
+
+        broken.close.assert_called_once()
+        fresh.commit.assert_called_once()
+        assert backend.enabled is True
+
+
+@pytest.mark.unit
+class TestAdSyncRoute:
+    """Tests for the AD sync API route."""
+
+    def test_full_resync_requested(self, api_client: FlaskClient, mock_pbx_core: MagicMock) -> None:
+        mock_pbx_core.sync_ad_users.return_value = {
+            "success": True,
+            "synced_count": 3,
+            "summary": {"mode": "full"},
+        }
+        with patch("pbx.api.utils.verify_authentication", return_value=(True, {"is_admin": True})):
+            response = api_client.post("/api/integrations/ad/sync", json={"full": True})
+
+        assert response.status_code == 200
+        assert response.get_json()["summary"] == {"mode": "full"}
+        mock_pbx_core.sync_ad_users.assert_called_once_with(full=True)
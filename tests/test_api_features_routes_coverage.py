@@ -1647,8 +1647,8 @@ def test_get_fraud_statistics_success(
             "blocked_patterns": 2,
             "total_extensions_tracked": 5,
             "alerts_24h": 3,
+            "high_risk_alerts": 1,
         }
-        fd.alerts = [{"fraud_score": 0.8}, {"fraud_score": 0.3}]
         fd.blocked_patterns = ["^900"]
         mock_pbx_core.fraud_detection = fd
 
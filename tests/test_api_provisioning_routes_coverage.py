@@ -617,6 +617,24 @@ def test_mac_placeholder_unknown_user_agent(
         resp = api_client.get("/provision/{mac}.cfg", headers={"User-Agent": "UnknownPhoneBrand"})
         assert resp.status_code == 400
 
+    def test_unchanged_config_returns_304(
+        self, api_client: FlaskClient, mock_pbx_core: MagicMock
+    ) -> None:
+        prov = MagicMock()
+        prov.generate_config.return_value = ("<config/>", "text/xml")
+        mock_pbx_core.phone_provisioning = prov
+        mock_pbx_core.registered_phones_db = None
+
+        first = api_client.get("/provision/AABBCCDDEEFF.cfg")
+        etag = first.headers["ETag"]
+        second = api_client.get("/provision/AABBCCDDEEFF.cfg", headers={"If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.data == b""
+
+        prov.generate_config.return_value = ("<config v2/>", "text/xml")
+        changed = api_client.get("/provision/AABBCCDDEEFF.cfg", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+
     def test_device_not_found(self, api_client: FlaskClient, mock_pbx_core: MagicMock) -> None:
         mock_pbx_core.phone_provisioning = MagicMock()
         mock_pbx_core.phone_provisioning.generate_config.return_value = (None, None)
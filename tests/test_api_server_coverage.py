@@ -367,3 +367,326 @@ def test_run_with_debug(self) -> None:
         call_kwargs = mock_run.call_args
         assert call_kwargs[1]["debug"] is True
         assert call_kwargs[1]["use_reloader"] is True
+
+
+def _wsgi_app(environ, start_response):
+    body = environ["PATH_INFO"].encode()
+    start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", str(len(body)))])
+    return [body]
+
+
+def _self_signed_context(tmp_path: Path) -> ssl.SSLContext:
+    """Build a server TLS context around a throwaway self-signed certificate."""
+    from datetime import UTC, datetime, timedelta
+
+    pytest.importorskip("cryptography")
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.now(UTC)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(minutes=1))
+        .not_valid_after(now + timedelta(hours=1))
+        .sign(key, hashes.SHA256())
+    )
+    cert_file = tmp_path / "cert.pem"
+    key_file = tmp_path / "key.pem"
+    cert_file.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_file.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_file, key_file)
+    return context
+
+
+@pytest.mark.unit
+class TestPooledWSGIServer:
+    """Tests for the production pooled listener."""
+
+    def _serve(self, server):
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def test_serves_keepalive_requests(self) -> None:
+        import http.client
+
+        from pbx.api.wsgi_server import PooledWSGIServer
+
+        server = PooledWSGIServer("127.0.0.1", 0, _wsgi_app, workers=2)
+        self._serve(server)
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+            for path in ("/a", "/b"):
+                conn.request("GET", path)
+                response = conn.getresponse()
+                assert response.status == 200
+                assert response.read() == path.encode()
+            conn.close()
+            assert server.get_statistics()["accepted"] == 1
+        finally:
+            server.close()
+
+    def test_idle_keepalive_connection_frees_its_worker(self) -> None:
+        import http.client
+
+        from pbx.api.wsgi_server import PooledWSGIServer
+
+        # One worker and a long keep-alive: a parked connection must not hold it
+        server = PooledWSGIServer("127.0.0.1", 0, _wsgi_app, workers=1, keepalive_timeout=30)
+        self._serve(server)
+        try:
+            idle = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+            idle.request("GET", "/first")
+            assert idle.getresponse().read() == b"/first"
+
+            other = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+            other.request("GET", "/other")
+            assert other.getresponse().read() == b"/other"
+            other.close()
+
+            # The parked connection is picked up again when it sends
+            idle.request("GET", "/again")
+            assert idle.getresponse().read() == b"/again"
+            assert server.get_statistics()["accepted"] == 2
+            idle.close()
+        finally:
+            server.close()
+
+    def test_idle_connection_closed_after_keepalive_timeout(self) -> None:
+        import socket
+
+        from pbx.api.wsgi_server import PooledWSGIServer
+
+        server = PooledWSGIServer("127.0.0.1", 0, _wsgi_app, workers=1, keepalive_timeout=0.2)
+        self._serve(server)
+        try:
+            client = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+            client.sendall(b"GET /a HTTP/1.1\r\nHost: x\r\n\r\n")
+            received = b""
+            while True:
+                chunk = client.recv(4096)
+                if not chunk:
+                    break
+                received += chunk
+            assert received.startswith(b"HTTP/1.1 200")
+            assert server.get_statistics()["idle"] == 0
+            client.close()
+        finally:
+            server.close()
+
+    def test_pipelined_requests_are_served(self) -> None:
+        import socket
+
+        from pbx.api.wsgi_server import PooledWSGIServer
+
+        server = PooledWSGIServer("127.0.0.1", 0, _wsgi_app, workers=1)
+        self._serve(server)
+        try:
+            client = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+            client.sendall(
+                b"GET /a HTTP/1.1\r\nHost: x\r\n\r\n"
+                b"GET /b HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n"
+            )
+            received = b""
+            while True:
+                chunk = client.recv(4096)
+                if not chunk:
+                    break
+                received += chunk
+            assert received.count(b"HTTP/1.1 200") == 2
+            assert received.endswith(b"/b")
+            client.close()
+        finally:
+            server.close()
+
+    def test_tls_sessions_are_resumed(self, tmp_path: Path) -> None:
+        import socket
+
+        from pbx.api.wsgi_server import PooledWSGIServer
+
+        context = _self_signed_context(tmp_path)
+        server = PooledWSGIServer("127.0.0.1", 0, _wsgi_app, ssl_context=context, workers=2)
+        self._serve(server)
+        client_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        client_context.check_hostname = False
+        client_context.verify_mode = ssl.CERT_NONE
+        session = None
+        try:
+            for _ in range(2):
+                raw = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+                with client_context.wrap_socket(raw, session=session) as tls:
+                    tls.sendall(b"GET /a HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n")
+                    while tls.recv(4096):
+                        pass
+                    reused = tls.session_reused
+                    session = tls.session
+            assert reused is True
+            assert server.get_statistics()["tls_sessions_reused"] >= 1
+        finally:
+            server.close()
+
+    def test_sheds_load_when_queue_full(self) -> None:
+        from pbx.api.wsgi_server import PooledWSGIServer
+
+        server = PooledWSGIServer("127.0.0.1", 0, _wsgi_app, workers=1, max_queue=1)
+        # Fill the queue without a worker draining it
+        server._pending.put((MagicMock(), ("127.0.0.1", 1)))
+        request = MagicMock()
+        with patch.object(server, "shutdown_request") as mock_shutdown:
+            server.process_request(request, ("127.0.0.1", 2))
+
+        sent = request.sendall.call_args[0][0]
+        assert sent.startswith(b"HTTP/1.1 503 Service Unavailable")
+        mock_shutdown.assert_called_once_with(request)
+        assert server.get_statistics()["rejected"] == 1
+        server._pending.get_nowait()
+        server.close()
+
+    def test_event_streams_capped_below_worker_count(self) -> None:
+        import http.client
+
+        from pbx.api.wsgi_server import PooledWSGIServer
+
+        release = threading.Event()
+
+        def stream():
+            yield b"retry: 3000\n\n"
+            release.wait(5)
+
+        def app(environ, start_response):
+            if environ["PATH_INFO"] == "/api/events/stream":
+                start_response("200 OK", [("Content-Type", "text/event-stream")])
+                return stream()
+            return _wsgi_app(environ, start_response)
+
+        server = PooledWSGIServer("127.0.0.1", 0, app, workers=4, max_streams=1)
+        self._serve(server)
+        stream_headers = {"Accept": "text/event-stream"}
+        try:
+            first = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+            first.request("GET", "/api/events/stream", headers=stream_headers)
+            assert first.getresponse().status == 200
+
+            second = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+            second.request("GET", "/api/events/stream", headers=stream_headers)
+            refused = second.getresponse()
+            assert refused.status == 503
+            assert refused.getheader("Retry-After") == "1"
+
+            # Ordinary requests still find a worker
+            other = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+            other.request("GET", "/api/status")
+            assert other.getresponse().status == 200
+
+            stats = server.get_statistics()
+            assert stats["streams"] == 1
+            assert stats["streams_rejected"] == 1
+            for conn in (first, second, other):
+                conn.close()
+        finally:
+            release.set()
+            server.close()
+
+    def test_stream_cap_leaves_a_worker_free(self) -> None:
+        from pbx.api.wsgi_server import PooledWSGIServer
+
+        server = PooledWSGIServer("127.0.0.1", 0, _wsgi_app, workers=2, max_streams=8)
+        assert server.max_streams == 1
+        assert server.acquire_stream()
+        assert not server.acquire_stream()
+        server.release_stream()
+        server.close()
+        assert PooledWSGIServer("127.0.0.1", 0, _wsgi_app, workers=16).max_streams == 4
+
+    def test_restrict_paths(self) -> None:
+        from werkzeug.test import Client
+
+        from pbx.api.wsgi_server import restrict_paths
+
+        client = Client(restrict_paths(_wsgi_app, ("/provision/",)))
+        assert client.get("/provision/0011.cfg").status_code == 200
+        assert client.get("/api/extensions").status_code == 404
+
+
+@pytest.mark.unit
+class TestProductionMode:
+    """Tests for PBXFlaskServer in production mode."""
+
+    def test_run_production_starts_both_listeners(self) -> None:
+        pbx_core = _make_pbx_core()
+        server_config = {"mode": "production", "provisioning": {"port": 9001}}
+        get = pbx_core.config.get.side_effect
+        pbx_core.config.get.side_effect = lambda key, default=None: (
+            server_config if key == "api.server" else get(key, default)
+        )
+        server = PBXFlaskServer(pbx_core, host="127.0.0.1", port=9000)
+        assert server.mode == "production"
+
+        with patch("pbx.api.wsgi_server.PooledWSGIServer") as MockServer:
+            server._run()
+
+        names = [c.kwargs["name"] for c in MockServer.call_args_list]
+        ports = [c.args[1] for c in MockServer.call_args_list]
+        assert names == ["provisioning", "api"]
+        assert ports == [9001, 9000]
+        assert len(server.listeners) == 2
+
+        server.stop()
+        assert MockServer.return_value.close.call_count == 2
+        assert server.listeners == []
+
+    def test_provisioning_listener_tls_is_opt_in(self) -> None:
+        pbx_core = _make_pbx_core()
+        server_config = {"mode": "production", "provisioning": {"port": 9001, "ssl": True}}
+        get = pbx_core.config.get.side_effect
+        pbx_core.config.get.side_effect = lambda key, default=None: (
+            server_config if key == "api.server" else get(key, default)
+        )
+        server = PBXFlaskServer(pbx_core, host="127.0.0.1", port=9000)
+        server.ssl_enabled = True
+        server.ssl_context = MagicMock()
+
+        with patch("pbx.api.wsgi_server.PooledWSGIServer") as MockServer:
+            server._run()
+        assert MockServer.call_args_list[0].kwargs["ssl_context"] is server.ssl_context
+
+        server_config["provisioning"]["ssl"] = False
+        with patch("pbx.api.wsgi_server.PooledWSGIServer") as MockServer:
+            server._run()
+        assert MockServer.call_args_list[0].kwargs["ssl_context"] is None
+        server.stop()
+
+    def test_gzip_large_json(self) -> None:
+        import gzip
+        import json
+
+        pbx_core = _make_pbx_core()
+        server = PBXFlaskServer(pbx_core)
+
+        @server.app.route("/test-large")
+        def large():
+            return {"items": list(range(1000))}
+
+        client = server.app.test_client()
+        response = client.get("/test-large", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert json.loads(gzip.decompress(response.data))["items"][-1] == 999
+
+        plain = client.get("/test-large")
+        assert "Content-Encoding" not in plain.headers
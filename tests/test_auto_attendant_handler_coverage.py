@@ -29,6 +29,7 @@
 sys.modules.setdefault("pbx.sip.sdp", _mock_sip_sdp)
 
 from pbx.core.auto_attendant_handler import AutoAttendantHandler
+from pbx.core.ivr_runtime import IVRRuntime
 
 
 def _make_pbx_core() -> MagicMock:
@@ -42,7 +43,7 @@ def _make_pbx_core() -> MagicMock:
     pbx._get_codecs_for_phone_model.return_value = ["0", "8"]
     pbx._get_dtmf_payload_type.return_value = 101
     pbx._get_ilbc_mode.return_value = 30
-    pbx.rtp_relay.port_pool = [30000, 30002, 30004]
+    pbx.rtp_relay.acquire_port.return_value = 30000
     pbx.auto_attendant.timeout = 30
     return pbx
 
@@ -142,7 +143,7 @@ def test_no_sdp_body(
     def test_no_rtp_ports_returns_false(self) -> None:
         """When RTP port pool is empty, should return False."""
         pbx = _make_pbx_core()
-        pbx.rtp_relay.port_pool = []  # Empty pool
+        pbx.rtp_relay.acquire_port.return_value = None  # Empty pool
         handler = AutoAttendantHandler(pbx)
         message = _make_message()
 
@@ -218,9 +219,9 @@ def test_no_phone_model_uses_default_codecs(
     def test_rtp_port_allocated_from_pool(
         self, mock_sip, mock_sdp_builder, mock_sdp_session, mock_thread_cls
     ) -> None:
-        """The first port from the pool should be allocated for the call."""
+        """A port from the pool should be allocated for the call."""
         pbx = _make_pbx_core()
-        pbx.rtp_relay.port_pool = [40000, 40002]
+        pbx.rtp_relay.acquire_port.return_value = 40000
         handler = AutoAttendantHandler(pbx)
         message = _make_message()
 
@@ -228,8 +229,8 @@ def test_rtp_port_allocated_from_pool(
         pbx.auto_attendant.start_session.return_value = session_data
 
         handler.handle_auto_attendant("1001", "0", "call-1", message, ("192.168.1.10", 5060))
-        # 40000 should have been popped
-        assert 40000 not in pbx.rtp_relay.port_pool
+        pbx.rtp_relay.acquire_port.assert_called_once_with("call-1")
+        assert pbx.call_manager.create_call.return_value.rtp_ports == (40000, 40001)
 
 
 # ---------------------------------------------------------------------------
@@ -237,12 +238,65 @@ def test_rtp_port_allocated_from_pool(
 # ---------------------------------------------------------------------------
 
 
+class _Clock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _make_runtime(pbx: MagicMock) -> IVRRuntime:
+    """Attach an IVR runtime driven by a fake clock to the mock PBXCore."""
+    runtime = IVRRuntime(clock=_Clock(), threaded=False)
+    pbx.ivr_runtime = runtime
+    return runtime
+
+
+def _drive(runtime: IVRRuntime, session: Any, limit: float = 120.0) -> None:
+    """Run the session, jumping the clock to each deadline, until it finishes."""
+    end = runtime.clock() + limit
+    runtime.run_pending()
+    while not session.finished:
+        deadline = runtime.next_deadline()
+        if deadline is None or deadline > end:
+            return
+        runtime.clock.now = max(runtime.clock.now, deadline)
+        runtime.run_pending()
+
+
+def _make_player(frames: int = 2) -> MagicMock:
+    """Create a mock RTPPlayer whose prompts load as `frames` packets."""
+    player = MagicMock()
+    player.start.return_value = True
+    player.load_prompt.return_value = ([b"\xff" * 160] * frames, 0, 160)
+    player.send_frame.return_value = True
+    return player
+
+
+def _make_listener() -> MagicMock:
+    listener = MagicMock()
+    listener.start.return_value = True
+    return listener
+
+
+def _run_session(
+    handler: AutoAttendantHandler, call_obj: MagicMock, session: dict, limit: float = 120.0
+) -> Any:
+    """Start an auto attendant session on a fake-clock runtime and drive it."""
+    runtime = _make_runtime(handler.pbx_core)
+    aa_session = handler._auto_attendant_session("call-1", call_obj, session)
+    _drive(runtime, aa_session, limit)
+    return aa_session
+
+
 @pytest.mark.unit
 class TestAutoAttendantSession:
     """Tests for _auto_attendant_session."""
 
-    @patch("pbx.core.auto_attendant_handler.time")
-    def test_no_caller_rtp_returns_early(self, mock_time) -> None:
+    def test_no_caller_rtp_returns_early(self) -> None:
         """If no caller RTP, should log warning and eventually end call."""
         pbx = _make_pbx_core()
         handler = AutoAttendantHandler(pbx)
@@ -250,90 +304,76 @@ def test_no_caller_rtp_returns_early(self, mock_time) -> None:
         call_obj.caller_rtp = None
         session = {"session": {"state": "MAIN_MENU"}, "file": None}
 
-        handler._auto_attendant_session("call-1", call_obj, session)
+        aa_session = _run_session(handler, call_obj, session)
         pbx.logger.warning.assert_called()
         pbx.end_call.assert_called_with("call-1")
+        assert aa_session.finished
 
-    @patch("pbx.core.auto_attendant_handler.time")
     @patch("pbx.rtp.handler.RTPPlayer")
-    def test_player_start_failure(self, mock_player_cls, mock_time) -> None:
+    def test_player_start_failure(self, mock_player_cls) -> None:
         """If RTP player fails to start, should return and end call."""
         pbx = _make_pbx_core()
         handler = AutoAttendantHandler(pbx)
         call_obj = _make_call()
         session = {"session": {"state": "MAIN_MENU"}, "file": None}
 
-        mock_player = MagicMock()
+        mock_player = _make_player()
         mock_player.start.return_value = False
         mock_player_cls.return_value = mock_player
 
-        handler._auto_attendant_session("call-1", call_obj, session)
+        _run_session(handler, call_obj, session)
         pbx.end_call.assert_called_with("call-1")
 
-    @patch("pbx.core.auto_attendant_handler.time")
     @patch("pbx.rtp.handler.RTPDTMFListener")
     @patch("pbx.rtp.handler.RTPPlayer")
-    def test_dtmf_listener_start_failure(self, mock_player_cls, mock_dtmf_cls, mock_time) -> None:
+    def test_dtmf_listener_start_failure(self, mock_player_cls, mock_dtmf_cls) -> None:
         """If DTMF listener fails to start, should stop player and end call."""
         pbx = _make_pbx_core()
         handler = AutoAttendantHandler(pbx)
         call_obj = _make_call()
         session = {"session": {"state": "MAIN_MENU"}, "file": None}
 
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
+        mock_player = _make_player()
         mock_player_cls.return_value = mock_player
 
         mock_dtmf = MagicMock()
         mock_dtmf.start.return_value = False
         mock_dtmf_cls.return_value = mock_dtmf
 
-        handler._auto_attendant_session("call-1", call_obj, session)
+        _run_session(handler, call_obj, session)
         mock_player.stop.assert_called()
         pbx.end_call.assert_called_with("call-1")
 
-    @patch("pbx.core.auto_attendant_handler.time")
     @patch("pbx.utils.audio.get_prompt_audio")
     @patch("pbx.rtp.handler.RTPDTMFListener")
     @patch("pbx.rtp.handler.RTPPlayer")
-    def test_welcome_audio_from_file(
-        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt, mock_time
-    ) -> None:
+    def test_welcome_audio_from_file(self, mock_player_cls, mock_dtmf_cls, mock_get_prompt) -> None:
         """When welcome audio file exists, should play it directly."""
         pbx = _make_pbx_core()
         pbx.auto_attendant._get_audio_file.return_value = None
-        pbx.auto_attendant.timeout = 0  # Immediate timeout to exit loop
+        pbx.auto_attendant.timeout = 0  # Immediate timeout to exit
         pbx.auto_attendant.handle_timeout.return_value = {"action": "hangup"}
         handler = AutoAttendantHandler(pbx)
         call_obj = _make_call()
 
         session = {"session": {"state": "MAIN_MENU"}, "file": "/audio/welcome.wav"}
 
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player.play_file.return_value = True
+        mock_player = _make_player()
         mock_player_cls.return_value = mock_player
-
-        mock_dtmf = MagicMock()
-        mock_dtmf.start.return_value = True
-        mock_dtmf.get_digit.return_value = None
-        mock_dtmf_cls.return_value = mock_dtmf
-
+        mock_dtmf_cls.return_value = _make_listener()
         mock_get_prompt.return_value = b"PROMPT_AUDIO"
 
         with patch.object(Path, "exists", return_value=True):
-            handler._auto_attendant_session("call-1", call_obj, session)
+            _run_session(handler, call_obj, session)
 
-        # play_file should have been called for the welcome file
-        assert mock_player.play_file.called
+        # The welcome file should have been loaded for playback
+        mock_player.load_prompt.assert_any_call("/audio/welcome.wav")
+        assert mock_player.send_frame.called
 
-    @patch("pbx.core.auto_attendant_handler.time")
     @patch("pbx.utils.audio.get_prompt_audio")
     @patch("pbx.rtp.handler.RTPDTMFListener")
     @patch("pbx.rtp.handler.RTPPlayer")
-    def test_welcome_audio_generated(
-        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt, mock_time
-    ) -> None:
+    def test_welcome_audio_generated(self, mock_player_cls, mock_dtmf_cls, mock_get_prompt) -> None:
         """When no welcome file exists, should generate prompt audio."""
         pbx = _make_pbx_core()
         pbx.auto_attendant._get_audio_file.return_value = None
@@ -344,31 +384,21 @@ def test_welcome_audio_generated(
 
         session = {"session": {"state": "MAIN_MENU"}, "file": None}
 
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player.play_file.return_value = True
+        mock_player = _make_player()
         mock_player_cls.return_value = mock_player
-
-        mock_dtmf = MagicMock()
-        mock_dtmf.start.return_value = True
-        mock_dtmf.get_digit.return_value = None
-        mock_dtmf_cls.return_value = mock_dtmf
-
+        mock_dtmf_cls.return_value = _make_listener()
         mock_get_prompt.return_value = b"GENERATED_WELCOME"
 
-        handler._auto_attendant_session("call-1", call_obj, session)
+        _run_session(handler, call_obj, session)
 
         mock_get_prompt.assert_any_call("welcome", prompt_dir="auto_attendant")
+        mock_player.load_prompt.assert_any_call(b"GENERATED_WELCOME")
 
-    @patch("pbx.core.auto_attendant_handler.time")
     @patch("pbx.utils.audio.get_prompt_audio")
     @patch("pbx.rtp.handler.RTPDTMFListener")
     @patch("pbx.rtp.handler.RTPPlayer")
-    def test_dtmf_transfer_action(
-        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt, mock_time
-    ) -> None:
+    def test_dtmf_transfer_action(self, mock_player_cls, mock_dtmf_cls, mock_get_prompt) -> None:
         """On DTMF resulting in transfer, should call transfer_call."""
-        mock_time.time.return_value = 100.0
         pbx = _make_pbx_core()
         pbx.auto_attendant._get_audio_file.return_value = None
         pbx.auto_attendant.timeout = 60
@@ -384,31 +414,25 @@ def test_dtmf_transfer_action(
 
         session = {"session": {"state": "MAIN_MENU"}, "file": None}
 
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player.play_file.return_value = True
-        mock_player_cls.return_value = mock_player
-
-        mock_dtmf = MagicMock()
-        mock_dtmf.start.return_value = True
-        mock_dtmf.get_digit.return_value = None
-        mock_dtmf_cls.return_value = mock_dtmf
-
+        mock_player_cls.return_value = _make_player()
+        mock_dtmf_cls.return_value = _make_listener()
         mock_get_prompt.return_value = b"TRANSFER_AUDIO"
 
-        handler._auto_attendant_session("call-1", call_obj, session)
+        aa_session = _run_session(handler, call_obj, session)
 
         pbx.transfer_call.assert_called_with("call-1", "8001")
+        # A transferred call is not hung up
+        pbx.end_call.assert_not_called()
+        assert aa_session.finished
+        assert call_obj.dtmf_info_queue == []
 
-    @patch("pbx.core.auto_attendant_handler.time")
     @patch("pbx.utils.audio.get_prompt_audio")
     @patch("pbx.rtp.handler.RTPDTMFListener")
     @patch("pbx.rtp.handler.RTPPlayer")
     def test_dtmf_transfer_failure_logged(
-        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt, mock_time
+        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt
     ) -> None:
         """If transfer_call returns False, a warning should be logged."""
-        mock_time.time.return_value = 100.0
         pbx = _make_pbx_core()
         pbx.auto_attendant._get_audio_file.return_value = None
         pbx.auto_attendant.timeout = 60
@@ -424,29 +448,21 @@ def test_dtmf_transfer_failure_logged(
 
         session = {"session": {"state": "MAIN_MENU"}, "file": None}
 
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player.play_file.return_value = True
-        mock_player_cls.return_value = mock_player
-
-        mock_dtmf = MagicMock()
-        mock_dtmf.start.return_value = True
-        mock_dtmf_cls.return_value = mock_dtmf
-
+        mock_player_cls.return_value = _make_player()
+        mock_dtmf_cls.return_value = _make_listener()
         mock_get_prompt.return_value = b"AUDIO"
 
-        handler._auto_attendant_session("call-1", call_obj, session)
+        _run_session(handler, call_obj, session)
         pbx.logger.warning.assert_called()
+        pbx.end_call.assert_called_with("call-1")
 
-    @patch("pbx.core.auto_attendant_handler.time")
     @patch("pbx.utils.audio.get_prompt_audio")
     @patch("pbx.rtp.handler.RTPDTMFListener")
     @patch("pbx.rtp.handler.RTPPlayer")
     def test_dtmf_play_action_resets_timeout(
-        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt, mock_time
+        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt
     ) -> None:
         """On DTMF play action, timeout should be reset."""
-        mock_time.time.return_value = 100.0
         pbx = _make_pbx_core()
         pbx.auto_attendant._get_audio_file.return_value = None
         pbx.auto_attendant.timeout = 60
@@ -475,31 +491,23 @@ def mock_handle_dtmf(session, digit):
 
         session = {"session": {"state": "MAIN_MENU"}, "file": None}
 
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player.play_file.return_value = True
-        mock_player_cls.return_value = mock_player
-
-        mock_dtmf = MagicMock()
-        mock_dtmf.start.return_value = True
-        mock_dtmf.get_digit.return_value = None
-        mock_dtmf_cls.return_value = mock_dtmf
-
+        mock_player_cls.return_value = _make_player()
+        mock_dtmf_cls.return_value = _make_listener()
         mock_get_prompt.return_value = b"AUDIO"
 
-        handler._auto_attendant_session("call-1", call_obj, session)
+        _run_session(handler, call_obj, session)
         # Two DTMF digits processed
         assert pbx.auto_attendant.handle_dtmf.call_count == 2
+        assert session["session"] == {"state": "TRANSFERRING"}
+        pbx.auto_attendant.handle_timeout.assert_not_called()
 
-    @patch("pbx.core.auto_attendant_handler.time")
     @patch("pbx.utils.audio.get_prompt_audio")
     @patch("pbx.rtp.handler.RTPDTMFListener")
     @patch("pbx.rtp.handler.RTPPlayer")
     def test_timeout_triggers_transfer(
-        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt, mock_time
+        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt
     ) -> None:
         """When session times out, should handle timeout and potentially transfer."""
-        mock_time.time.return_value = 100.0
         pbx = _make_pbx_core()
         pbx.auto_attendant._get_audio_file.return_value = None
         pbx.auto_attendant.timeout = 0  # Immediate timeout
@@ -513,32 +521,22 @@ def test_timeout_triggers_transfer(
 
         session = {"session": {"state": "MAIN_MENU"}, "file": None}
 
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player.play_file.return_value = True
-        mock_player_cls.return_value = mock_player
-
-        mock_dtmf = MagicMock()
-        mock_dtmf.start.return_value = True
-        mock_dtmf.get_digit.return_value = None
-        mock_dtmf_cls.return_value = mock_dtmf
-
+        mock_player_cls.return_value = _make_player()
+        mock_dtmf_cls.return_value = _make_listener()
         mock_get_prompt.return_value = b"AUDIO"
 
-        handler._auto_attendant_session("call-1", call_obj, session)
+        _run_session(handler, call_obj, session)
 
         pbx.auto_attendant.handle_timeout.assert_called()
         pbx.transfer_call.assert_called()
 
-    @patch("pbx.core.auto_attendant_handler.time")
     @patch("pbx.utils.audio.get_prompt_audio")
     @patch("pbx.rtp.handler.RTPDTMFListener")
     @patch("pbx.rtp.handler.RTPPlayer")
     def test_timeout_transfer_failure_logged(
-        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt, mock_time
+        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt
     ) -> None:
         """When timeout transfer fails, a warning should be logged."""
-        mock_time.time.return_value = 100.0
         pbx = _make_pbx_core()
         pbx.auto_attendant._get_audio_file.return_value = None
         pbx.auto_attendant.timeout = 0
@@ -552,27 +550,49 @@ def test_timeout_transfer_failure_logged(
 
         session = {"session": {"state": "MAIN_MENU"}, "file": None}
 
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player.play_file.return_value = True
-        mock_player_cls.return_value = mock_player
+        mock_player_cls.return_value = _make_player()
+        mock_dtmf_cls.return_value = _make_listener()
+        mock_get_prompt.return_value = b"AUDIO"
 
-        mock_dtmf = MagicMock()
-        mock_dtmf.start.return_value = True
-        mock_dtmf.get_digit.return_value = None
-        mock_dtmf_cls.return_value = mock_dtmf
+        _run_session(handler, call_obj, session)
+        pbx.logger.warning.assert_called()
 
+    @patch("pbx.utils.audio.get_prompt_audio")
+    @patch("pbx.rtp.handler.RTPDTMFListener")
+    @patch("pbx.rtp.handler.RTPPlayer")
+    def test_timeout_play_replays_menu(
+        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt
+    ) -> None:
+        """A timeout that asks for a retry plays the main menu again."""
+        pbx = _make_pbx_core()
+        pbx.auto_attendant._get_audio_file.return_value = None
+        pbx.auto_attendant.timeout = 10
+        pbx.auto_attendant.handle_timeout.side_effect = [
+            {"action": "play", "file": None},
+            {"action": "hangup"},
+        ]
+        handler = AutoAttendantHandler(pbx)
+        call_obj = _make_call()
+
+        session = {"session": {"state": "MAIN_MENU"}, "file": None}
+
+        mock_player_cls.return_value = _make_player()
+        mock_dtmf_cls.return_value = _make_listener()
         mock_get_prompt.return_value = b"AUDIO"
 
-        handler._auto_attendant_session("call-1", call_obj, session)
-        pbx.logger.warning.assert_called()
+        aa_session = _run_session(handler, call_obj, session)
+
+        menus = [c for c in mock_get_prompt.call_args_list if c.args[0] == "main_menu"]
+        assert len(menus) == 2
+        assert pbx.auto_attendant.handle_timeout.call_count == 2
+        pbx.end_call.assert_called_with("call-1")
+        assert aa_session.finished
 
-    @patch("pbx.core.auto_attendant_handler.time")
     @patch("pbx.utils.audio.get_prompt_audio")
     @patch("pbx.rtp.handler.RTPDTMFListener")
     @patch("pbx.rtp.handler.RTPPlayer")
     def test_port_returned_on_success(
-        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt, mock_time
+        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt
     ) -> None:
         """RTP port should be returned to pool after session ends."""
         pbx = _make_pbx_core()
@@ -585,32 +605,22 @@ def test_port_returned_on_success(
 
         session = {"session": {"state": "MAIN_MENU"}, "file": None}
 
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player.play_file.return_value = True
-        mock_player_cls.return_value = mock_player
-
-        mock_dtmf = MagicMock()
-        mock_dtmf.start.return_value = True
-        mock_dtmf.get_digit.return_value = None
-        mock_dtmf_cls.return_value = mock_dtmf
-
+        mock_player_cls.return_value = _make_player()
+        mock_dtmf_cls.return_value = _make_listener()
         mock_get_prompt.return_value = b"AUDIO"
 
-        handler._auto_attendant_session("call-1", call_obj, session)
+        _run_session(handler, call_obj, session)
 
-        assert 30000 in pbx.rtp_relay.port_pool
+        pbx.rtp_relay.release_port.assert_called_once_with(30000)
 
-    @patch("pbx.core.auto_attendant_handler.time")
     @patch("pbx.utils.audio.get_prompt_audio")
     @patch("pbx.rtp.handler.RTPDTMFListener")
     @patch("pbx.rtp.handler.RTPPlayer")
     def test_error_in_session_returns_port(
-        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt, mock_time
+        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt
     ) -> None:
         """On error, RTP port should still be returned to the pool."""
         pbx = _make_pbx_core()
-        pbx.rtp_relay.port_pool = [30002]
         pbx.auto_attendant._get_audio_file.return_value = None
         handler = AutoAttendantHandler(pbx)
         call_obj = _make_call()
@@ -618,30 +628,25 @@ def test_error_in_session_returns_port(
 
         session = {"session": {"state": "MAIN_MENU"}, "file": None}
 
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player.play_file.side_effect = TypeError("bad type")
+        mock_player = _make_player()
+        mock_player.load_prompt.side_effect = TypeError("bad type")
         mock_player_cls.return_value = mock_player
-
-        mock_dtmf = MagicMock()
-        mock_dtmf.start.return_value = True
+        mock_dtmf = _make_listener()
         mock_dtmf_cls.return_value = mock_dtmf
-
         mock_get_prompt.return_value = b"AUDIO"
 
-        handler._auto_attendant_session("call-1", call_obj, session)
-        assert 30000 in pbx.rtp_relay.port_pool
+        aa_session = _run_session(handler, call_obj, session)
+        pbx.rtp_relay.release_port.assert_called_once_with(30000)
         pbx.end_call.assert_called_with("call-1")
+        mock_player.stop.assert_called_once()
+        mock_dtmf.stop.assert_called_once()
+        assert aa_session.finished
 
-    @patch("pbx.core.auto_attendant_handler.time")
     @patch("pbx.utils.audio.get_prompt_audio")
     @patch("pbx.rtp.handler.RTPDTMFListener")
     @patch("pbx.rtp.handler.RTPPlayer")
-    def test_inband_dtmf_processed(
-        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt, mock_time
-    ) -> None:
-        """In-band DTMF detection should be used when SIP INFO queue is empty."""
-        mock_time.time.return_value = 100.0
+    def test_inband_dtmf_processed(self, mock_player_cls, mock_dtmf_cls, mock_get_prompt) -> None:
+        """In-band digits from the RTP listener reach the session without polling."""
         pbx = _make_pbx_core()
         pbx.auto_attendant._get_audio_file.return_value = None
         pbx.auto_attendant.timeout = 60
@@ -657,30 +662,103 @@ def test_inband_dtmf_processed(
 
         session = {"session": {"state": "MAIN_MENU"}, "file": None}
 
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player.play_file.return_value = True
+        mock_player_cls.return_value = _make_player(frames=50)
+        mock_dtmf_cls.return_value = _make_listener()
+        mock_get_prompt.return_value = b"AUDIO"
+
+        runtime = _make_runtime(pbx)
+        aa_session = handler._auto_attendant_session("call-1", call_obj, session)
+        _drive(runtime, aa_session, limit=0.6)
+        assert aa_session.playing == "welcome"
+
+        # The listener reports digits through its callback
+        on_digit = mock_dtmf_cls.call_args.kwargs["on_digit"]
+        on_digit("1")
+        _drive(runtime, aa_session)
+
+        pbx.auto_attendant.handle_dtmf.assert_called_with({"state": "MAIN_MENU"}, "1")
+        pbx.transfer_call.assert_called_with("call-1", "8001")
+
+    @patch("pbx.utils.audio.get_prompt_audio")
+    @patch("pbx.rtp.handler.RTPDTMFListener")
+    @patch("pbx.rtp.handler.RTPPlayer")
+    def test_digit_barges_in_on_prompt(
+        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt
+    ) -> None:
+        """A digit stops the welcome greeting instead of waiting for it to finish."""
+        pbx = _make_pbx_core()
+        pbx.auto_attendant._get_audio_file.return_value = None
+        pbx.auto_attendant.timeout = 60
+        pbx.auto_attendant.handle_dtmf.return_value = {
+            "action": "play",
+            "file": None,
+            "session": {"state": "SUB_MENU"},
+        }
+        handler = AutoAttendantHandler(pbx)
+        call_obj = _make_call()
+
+        session = {"session": {"state": "MAIN_MENU"}, "file": None}
+
+        mock_player = _make_player(frames=500)  # 10 s greeting
         mock_player_cls.return_value = mock_player
+        mock_dtmf_cls.return_value = _make_listener()
+        mock_get_prompt.return_value = b"AUDIO"
 
-        mock_dtmf = MagicMock()
-        mock_dtmf.start.return_value = True
-        mock_dtmf.get_digit.return_value = "1"  # In-band digit
-        mock_dtmf_cls.return_value = mock_dtmf
+        runtime = _make_runtime(pbx)
+        aa_session = handler._auto_attendant_session("call-1", call_obj, session)
+        _drive(runtime, aa_session, limit=1.0)
+        assert aa_session.playing == "welcome"
+
+        assert runtime.deliver_digit("call-1", "2")
+        runtime.run_pending()
+
+        assert aa_session.playing is None
+        sent = mock_player.send_frame.call_count
+        assert sent < 50
+        # The menu is not played after an interrupted greeting
+        _drive(runtime, aa_session, limit=30)
+        assert mock_player.send_frame.call_count == sent
+        assert all(c.args[0] != "main_menu" for c in mock_get_prompt.call_args_list)
+        assert aa_session.has_timer("input_timeout")
+
+    @patch("pbx.utils.audio.get_prompt_audio")
+    @patch("pbx.rtp.handler.RTPDTMFListener")
+    @patch("pbx.rtp.handler.RTPPlayer")
+    def test_prompt_paced_on_media_clock(
+        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt
+    ) -> None:
+        """Prompt frames go out one per 20 ms tick, without sleeping."""
+        pbx = _make_pbx_core()
+        pbx.auto_attendant._get_audio_file.return_value = None
+        pbx.auto_attendant.timeout = 60
+        handler = AutoAttendantHandler(pbx)
+        call_obj = _make_call()
+
+        session = {"session": {"state": "MAIN_MENU"}, "file": None}
 
+        mock_player = _make_player(frames=100)
+        mock_player_cls.return_value = mock_player
+        mock_dtmf_cls.return_value = _make_listener()
         mock_get_prompt.return_value = b"AUDIO"
 
-        handler._auto_attendant_session("call-1", call_obj, session)
-        pbx.auto_attendant.handle_dtmf.assert_called()
+        runtime = _make_runtime(pbx)
+        aa_session = handler._auto_attendant_session("call-1", call_obj, session)
+        _drive(runtime, aa_session, limit=0.5)  # RTP settle delay
+        # The first frame goes out as soon as the greeting is queued
+        assert mock_player.send_frame.call_count == 1
+
+        started = runtime.clock()
+        _drive(runtime, aa_session, limit=1.0)
+        assert mock_player.send_frame.call_count == 51
+        assert runtime.clock() - started == pytest.approx(1.0)
 
-    @patch("pbx.core.auto_attendant_handler.time")
     @patch("pbx.utils.audio.get_prompt_audio")
     @patch("pbx.rtp.handler.RTPDTMFListener")
     @patch("pbx.rtp.handler.RTPPlayer")
     def test_transfer_audio_from_file(
-        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt, mock_time
+        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt
     ) -> None:
         """When transferring audio file exists, should play it directly."""
-        mock_time.time.return_value = 100.0
         pbx = _make_pbx_core()
         pbx.auto_attendant._get_audio_file.side_effect = lambda name: (
             "/audio/transferring.wav" if name == "transferring" else None
@@ -698,29 +776,23 @@ def test_transfer_audio_from_file(
 
         session = {"session": {"state": "MAIN_MENU"}, "file": None}
 
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player.play_file.return_value = True
+        mock_player = _make_player()
         mock_player_cls.return_value = mock_player
-
-        mock_dtmf = MagicMock()
-        mock_dtmf.start.return_value = True
-        mock_dtmf_cls.return_value = mock_dtmf
-
+        mock_dtmf_cls.return_value = _make_listener()
         mock_get_prompt.return_value = b"AUDIO"
 
         with patch.object(Path, "exists", return_value=True):
-            handler._auto_attendant_session("call-1", call_obj, session)
+            _run_session(handler, call_obj, session)
 
+        mock_player.load_prompt.assert_any_call("/audio/transferring.wav")
         # transfer should still happen
         pbx.transfer_call.assert_called()
 
-    @patch("pbx.core.auto_attendant_handler.time")
     @patch("pbx.utils.audio.get_prompt_audio")
     @patch("pbx.rtp.handler.RTPDTMFListener")
     @patch("pbx.rtp.handler.RTPPlayer")
     def test_main_menu_audio_from_file(
-        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt, mock_time
+        self, mock_player_cls, mock_dtmf_cls, mock_get_prompt
     ) -> None:
         """When main_menu audio file exists, should play it directly."""
         pbx = _make_pbx_core()
@@ -732,19 +804,12 @@ def test_main_menu_audio_from_file(
 
         session = {"session": {"state": "MAIN_MENU"}, "file": None}
 
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player.play_file.return_value = True
+        mock_player = _make_player()
         mock_player_cls.return_value = mock_player
-
-        mock_dtmf = MagicMock()
-        mock_dtmf.start.return_value = True
-        mock_dtmf.get_digit.return_value = None
-        mock_dtmf_cls.return_value = mock_dtmf
-
+        mock_dtmf_cls.return_value = _make_listener()
         mock_get_prompt.return_value = b"AUDIO"
 
         with patch.object(Path, "exists", return_value=True):
-            handler._auto_attendant_session("call-1", call_obj, session)
+            _run_session(handler, call_obj, session)
 
-        assert mock_player.play_file.called
+        mock_player.load_prompt.assert_any_call("/audio/main_menu.wav")
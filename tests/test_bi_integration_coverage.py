@@ -7,6 +7,7 @@
 
 import csv
 import json
+import threading
 from datetime import UTC, datetime, timedelta
 from io import StringIO
 from pathlib import Path
@@ -68,6 +69,9 @@ def test_csv_value(self) -> None:
     def test_json_value(self) -> None:
         assert ExportFormat.JSON.value == "json"
 
+    def test_json_lines_value(self) -> None:
+        assert ExportFormat.JSON_LINES.value == "jsonl"
+
     def test_parquet_value(self) -> None:
         assert ExportFormat.PARQUET.value == "parquet"
 
@@ -78,7 +82,7 @@ def test_sql_value(self) -> None:
         assert ExportFormat.SQL.value == "sql"
 
     def test_member_count(self) -> None:
-        assert len(ExportFormat) == 5
+        assert len(ExportFormat) == 6
 
 
 # ---------------------------------------------------------------------------
@@ -323,11 +327,10 @@ def test_query_parameter_substitution(self) -> None:
                 end,
             )
 
-        executed_query = mock_cursor.execute.call_args[0][0]
-        assert start.isoformat() in executed_query
-        assert end.isoformat() in executed_query
-        assert ":start_date" not in executed_query
-        assert ":end_date" not in executed_query
+        executed_query, params = mock_cursor.execute.call_args[0]
+        assert executed_query == "SELECT * FROM t WHERE d >= %(start_date)s AND d <= %(end_date)s"
+        assert params == {"start_date": start, "end_date": end}
+        assert start.isoformat() not in executed_query
 
 
 # ---------------------------------------------------------------------------
@@ -1590,3 +1593,182 @@ def test_statistics_reflect_exports(self, tmp_path: Path) -> None:
         cdr = next(d for d in datasets if d["name"] == "cdr")
         assert cdr["export_count"] == 2
         assert cdr["last_exported"] is not None
+
+
+# ---------------------------------------------------------------------------
+# Streaming exports and background export jobs
+# ---------------------------------------------------------------------------
+
+
+def _streaming_db(batches: list[list[dict]]) -> tuple[MagicMock, MagicMock]:
+    """Build a database whose dedicated connection serves rows in batches."""
+    cursor = MagicMock()
+    cursor.fetchmany.side_effect = [*batches, []]
+    connection = MagicMock()
+    connection.cursor.return_value = cursor
+    db = MagicMock()
+    db.enabled = True
+    db.open_dedicated_connection.return_value = connection
+    return db, cursor
+
+
+@pytest.mark.unit
+class TestStreamingExport:
+    """Tests for export_dataset_streaming and the background job API."""
+
+    @patch("pbx.features.bi_integration.get_logger")
+    def _make_bi(self, mock_get_logger: MagicMock) -> BIIntegration:
+        mock_get_logger.return_value = MagicMock()
+        return BIIntegration()
+
+    def test_iter_query_uses_named_cursor_and_batches(self) -> None:
+        bi = self._make_bi()
+        db, cursor = _streaming_db([[{"id": 1}, {"id": 2}], [{"id": 3}]])
+
+        with patch("pbx.utils.database.get_database", return_value=db):
+            batches = list(
+                bi._iter_query(
+                    "SELECT * FROM t WHERE d >= :start_date AND note LIKE '%x' AND d::date IS NOT NULL",
+                    datetime(2024, 1, 1, tzinfo=UTC),
+                    datetime(2024, 2, 1, tzinfo=UTC),
+                    batch_size=2,
+                )
+            )
+
+        assert batches == [[{"id": 1}, {"id": 2}], [{"id": 3}]]
+        connection = db.open_dedicated_connection.return_value
+        assert connection.cursor.call_args.kwargs["name"].startswith("bi_export_")
+        query, params = cursor.execute.call_args[0]
+        assert query == (
+            "SELECT * FROM t WHERE d >= %(start_date)s AND note LIKE '%%x' AND d::date IS NOT NULL"
+        )
+        assert params["start_date"] == datetime(2024, 1, 1, tzinfo=UTC)
+        cursor.fetchmany.assert_called_with(2)
+        cursor.close.assert_called_once()
+        connection.close.assert_called_once()
+
+    def test_csv_written_batch_by_batch(self, tmp_path: Path) -> None:
+        bi = self._make_bi()
+        bi.export_path = str(tmp_path)
+        db, _ = _streaming_db([[{"id": 1, "ext": "1001"}], [{"id": 2, "ext": "1002"}]])
+        progress: list[int] = []
+
+        with patch("pbx.utils.database.get_database", return_value=db):
+            result = bi.export_dataset_streaming(
+                "cdr", ExportFormat.CSV, progress_callback=progress.append
+            )
+
+        assert result["success"] is True
+        assert result["record_count"] == 2
+        assert progress == [1, 2]
+        with Path(result["file_path"]).open() as f:
+            rows = list(csv.DictReader(f))
+        assert rows == [{"id": "1", "ext": "1001"}, {"id": "2", "ext": "1002"}]
+        assert bi.total_exports == 1
+
+    def test_json_streamed_as_array(self, tmp_path: Path) -> None:
+        bi = self._make_bi()
+        bi.export_path = str(tmp_path)
+        stamp = datetime(2024, 3, 1, tzinfo=UTC)
+        db, _ = _streaming_db([[{"id": 1, "at": stamp}], [{"id": 2, "at": None}]])
+
+        with patch("pbx.utils.database.get_database", return_value=db):
+            result = bi.export_dataset_streaming("cdr", ExportFormat.JSON)
+
+        assert result["file_path"].endswith(".json")
+        assert json.loads(Path(result["file_path"]).read_text()) == [
+            {"id": 1, "at": stamp.isoformat()},
+            {"id": 2, "at": None},
+        ]
+
+    def test_empty_json_export_is_valid_array(self, tmp_path: Path) -> None:
+        bi = self._make_bi()
+        bi.export_path = str(tmp_path)
+        db, _ = _streaming_db([])
+
+        with patch("pbx.utils.database.get_database", return_value=db):
+            result = bi.export_dataset_streaming("cdr", ExportFormat.JSON)
+
+        assert json.loads(Path(result["file_path"]).read_text()) == []
+
+    def test_json_lines_format(self, tmp_path: Path) -> None:
+        bi = self._make_bi()
+        bi.export_path = str(tmp_path)
+        db, _ = _streaming_db([[{"id": 1}], [{"id": 2}]])
+
+        with patch("pbx.utils.database.get_database", return_value=db):
+            result = bi.export_dataset_streaming("cdr", ExportFormat.JSON_LINES)
+
+        assert result["file_path"].endswith(".jsonl")
+        lines = Path(result["file_path"]).read_text().splitlines()
+        assert [json.loads(line) for line in lines] == [{"id": 1}, {"id": 2}]
+
+    def test_database_unavailable_fails(self, tmp_path: Path) -> None:
+        bi = self._make_bi()
+        bi.export_path = str(tmp_path)
+        db = MagicMock()
+        db.enabled = False
+
+        with patch("pbx.utils.database.get_database", return_value=db):
+            result = bi.export_dataset_streaming("cdr")
+
+        assert result["success"] is False
+        assert "not available" in result["error"]
+        assert list(tmp_path.iterdir()) == []
+        assert bi.total_exports == 0
+
+    def test_finished_jobs_are_pruned(self) -> None:
+        bi = self._make_bi()
+        bi.max_finished_jobs = 2
+        old = (datetime.now(UTC) - timedelta(hours=bi.job_retention_hours + 1)).isoformat()
+        for n, finished in enumerate([old, "9999-01-03", "9999-01-02", "9999-01-01", None]):
+            bi.export_jobs[f"job{n}"] = {
+                "job_id": f"job{n}",
+                "created_at": f"2024-01-0{n + 1}",
+                "finished_at": finished,
+            }
+
+        with patch.object(threading.Thread, "start"):
+            job = bi.start_export_job("cdr")
+
+        assert set(bi.export_jobs) == {"job1", "job2", "job4", job["job_id"]}
+
+    def test_cancel_event_stops_and_removes_partial_file(self, tmp_path: Path) -> None:
+        import threading
+
+        bi = self._make_bi()
+        bi.export_path = str(tmp_path)
+        db, _ = _streaming_db([[{"id": 1}], [{"id": 2}]])
+        cancel = threading.Event()
+        cancel.set()
+
+        with patch("pbx.utils.database.get_database", return_value=db):
+            result = bi.export_dataset_streaming("cdr", cancel_event=cancel)
+
+        assert result["success"] is False
+        assert list(tmp_path.iterdir()) == []
+
+    def test_export_job_reports_progress_and_completion(self, tmp_path: Path) -> None:
+        bi = self._make_bi()
+        bi.export_path = str(tmp_path)
+        db, _ = _streaming_db([[{"id": 1}], [{"id": 2}], [{"id": 3}]])
+
+        with patch("pbx.utils.database.get_database", return_value=db):
+            job = bi.start_export_job("cdr", ExportFormat.CSV)
+            assert job["success"] is True
+            for _ in range(200):
+                status = bi.get_export_job(job["job_id"])
+                if status["status"] == "completed":
+                    break
+                __import__("time").sleep(0.01)
+
+        assert status["status"] == "completed"
+        assert status["rows_exported"] == 3
+        assert Path(status["file_path"]).exists()
+        assert bi.list_export_jobs()[0]["job_id"] == job["job_id"]
+        assert bi.cancel_export_job(job["job_id"]) is False
+
+    def test_export_job_unknown_dataset(self) -> None:
+        bi = self._make_bi()
+        assert bi.start_export_job("missing")["success"] is False
+        assert bi.get_export_job("nope") is None
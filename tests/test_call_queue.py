@@ -148,3 +148,145 @@ def test_queue_system_create_enqueue(self, _mock_logger):
 
         assert system.enqueue_call("100", "call1", "2001") is True
         assert system.enqueue_call("999", "call2", "2002") is False
+
+
+@pytest.mark.unit
+@patch("pbx.features.call_queue.get_logger", return_value=MagicMock())
+class TestCallQueueIndexes:
+    """Tests for priority lanes, derived positions and the agent index."""
+
+    def test_priority_lanes_and_positions(self, _mock_logger):
+        """Higher priority calls are answered first; positions follow without renumbering."""
+        from pbx.features.call_queue import CallQueue
+
+        q = CallQueue("100", "Support", max_queue_size=10)
+        normal = [q.enqueue(f"call{i}", "2001") for i in range(3)]
+        vip = q.enqueue("vip", "2002", priority=5)
+
+        assert vip.position == 1
+        assert [c.position for c in normal] == [2, 3, 4]
+        assert [c.call_id for c in q.queue] == ["vip", "call0", "call1", "call2"]
+
+        assert q.dequeue() is vip
+        assert q.dequeue() is normal[0]
+        assert [c.position for c in normal[1:]] == [1, 2]
+        assert q.calls_waiting == 2
+        # A call that left the queue keeps the position it was answered from
+        assert normal[0].position == 1
+
+    def test_index_follows_agent_status(self, _mock_logger):
+        """Status changes on an agent update every queue it belongs to."""
+        from pbx.features.call_queue import Agent, CallQueue
+
+        sales = CallQueue("100", "Sales")
+        support = CallQueue("200", "Support")
+        agent = Agent("1001")
+        sales.add_agent(agent)
+        support.add_agent(agent)
+        assert sales.get_next_agent() is None
+
+        agent.set_available()
+        assert "1001" in sales.available
+        assert support.get_next_agent() is agent
+
+        agent.set_busy("call1")
+        assert len(sales.available) == 0
+        assert len(support.available) == 0
+
+        sales.remove_agent("1001")
+        agent.complete_call()
+        assert len(sales.available) == 0
+        assert support.get_next_agent() is agent
+
+    def test_least_recent_after_complete_call(self, _mock_logger):
+        """An agent who just finished a call goes behind the others."""
+        from pbx.features.call_queue import Agent, CallQueue, QueueStrategy
+
+        q = CallQueue("100", "Support", strategy=QueueStrategy.LEAST_RECENT)
+        agents = [Agent(f"100{i}") for i in range(3)]
+        for agent in agents:
+            agent.set_available()
+            q.add_agent(agent)
+
+        for agent in agents:
+            agent.set_busy("call")
+            agent.complete_call()
+
+        assert q.get_next_agent() is agents[0]
+        agents[0].set_busy("call")
+        agents[0].complete_call()
+        assert q.get_next_agent() is agents[1]
+
+    def test_random_picks_only_available(self, _mock_logger):
+        """RANDOM never returns an agent that is not available."""
+        from pbx.features.call_queue import Agent, CallQueue, QueueStrategy
+
+        q = CallQueue("100", "Support", strategy=QueueStrategy.RANDOM)
+        agents = [Agent(f"100{i}") for i in range(5)]
+        for agent in agents:
+            agent.set_available()
+            q.add_agent(agent)
+        agents[1].set_break()
+        agents[3].set_offline()
+
+        picked = {q.get_next_agent().extension for _ in range(200)}
+
+        assert picked <= {"1000", "1002", "1004"}
+
+    def test_simulation_thousands_of_callers(self, _mock_logger):
+        """5000 callers and 300 agents: everyone is answered exactly once."""
+        import random
+
+        from pbx.features.call_queue import Agent, CallQueue, QueueStrategy
+
+        rng = random.Random(7)
+        q = CallQueue("100", "Support", strategy=QueueStrategy.FEWEST_CALLS, max_queue_size=10000)
+        agents = [Agent(f"{5000 + i}") for i in range(300)]
+        for agent in agents:
+            agent.set_available()
+            q.add_agent(agent)
+
+        for i in range(5000):
+            q.enqueue(f"call{i}", "2001", priority=rng.choice((0, 0, 0, 1)))
+        answered = []
+        on_call: list = []
+        while q.calls_waiting:
+            # The index agrees with a full scan of the agents
+            fewest = min(a.calls_taken for a in agents if a.is_available())
+            assert q.get_next_agent().calls_taken == fewest
+            assignments = q.process_queue()
+            answered.extend(call.call_id for call, _ in assignments)
+            on_call.extend(agent for _, agent in assignments)
+            # A random half of the agents on calls hang up each round
+            rng.shuffle(on_call)
+            for agent in on_call[: len(on_call) // 2 + 1]:
+                agent.complete_call()
+            del on_call[: len(on_call) // 2 + 1]
+            # Stale heap entries are compacted away instead of piling up
+            assert len(q.available._by_calls) <= 2 * len(agents) + 65
+
+        assert len(answered) == len(set(answered)) == 5000
+        assert sum(agent.calls_taken for agent in agents) + len(on_call) == 5000
+
+    @pytest.mark.slow
+    def test_dequeue_cost_is_flat(self, _mock_logger):
+        """Answering the head doesn't touch the rest of the queue."""
+        import math
+        import time
+
+        from pbx.features.call_queue import CallQueue
+
+        def cost(waiting: int) -> float:
+            best = math.inf
+            for _ in range(3):
+                q = CallQueue("100", "Support", max_queue_size=waiting + 500)
+                for i in range(waiting):
+                    q.enqueue(f"call{i}", "2001")
+                start = time.perf_counter()
+                for i in range(500):
+                    q.enqueue(f"extra{i}", "2001")
+                    q.dequeue()
+                best = min(best, (time.perf_counter() - start) / 500)
+            return best
+
+        assert cost(5000) < cost(100) * 4
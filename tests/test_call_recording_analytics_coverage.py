@@ -1746,3 +1746,103 @@ def test_quality_scores_clamped(self) -> None:
             "professionalism",
         ]:
             assert 0.0 <= result[key] <= 100.0
+
+
+# ---------------------------------------------------------------------------
+# Single-decode analysis pipeline
+# ---------------------------------------------------------------------------
+
+
+def _write_wav(path, seconds: float = 1.0, sample_rate: int = 8000, channels: int = 1) -> str:
+    """Write a 16-bit WAV with a loud first half and a silent second half."""
+    import struct
+    import wave
+
+    frames = int(seconds * sample_rate)
+    samples = [8000 if (i // 4) % 2 else -8000 for i in range(frames // 2)] + [0] * (
+        frames - frames // 2
+    )
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(b"".join(struct.pack("<h", s) * channels for s in samples))
+    return str(path)
+
+
+@pytest.mark.unit
+class TestSingleDecodePipeline:
+    """analyze_recording decodes and transcribes once for all analyzers."""
+
+    def test_decode_and_transcribe_once_for_all_types(self, tmp_path) -> None:
+        analytics = _build_analytics()
+        audio_path = _write_wav(tmp_path / "call.wav")
+        transcript = {
+            "transcript": "this call may be recorded thank you the issue is resolved",
+            "confidence": 0.9,
+            "duration": 1.0,
+            "words": [],
+        }
+        all_types = ["transcript", "sentiment", "keywords", "compliance", "quality", "summary"]
+
+        with (
+            patch.object(analytics, "_decode_audio", wraps=analytics._decode_audio) as decode,
+            patch.object(analytics, "_transcribe_pcm", return_value=transcript) as transcribe,
+            patch.object(analytics, "_transcribe") as legacy_transcribe,
+        ):
+            result = analytics.analyze_recording("rec-1", audio_path, all_types)
+
+        decode.assert_called_once_with(audio_path)
+        transcribe.assert_called_once()
+        legacy_transcribe.assert_not_called()
+        assert result["analyses"]["transcript"] == transcript
+        assert (
+            "this call may be recorded"
+            in result["analyses"]["compliance"]["required_phrases_found"]
+        )
+        assert "issue" in result["analyses"]["keywords"]["issue_keywords"]
+
+    def test_quality_includes_audio_metrics_from_pcm(self, tmp_path) -> None:
+        analytics = _build_analytics()
+        audio_path = _write_wav(tmp_path / "call.wav")
+
+        with patch.object(analytics, "_transcribe_pcm", return_value={"transcript": ""}):
+            result = analytics.analyze_recording("rec-1", audio_path, ["quality"])
+
+        metrics = result["analyses"]["quality"]["audio_metrics"]
+        assert metrics["silence_ratio"] == pytest.approx(0.5, abs=0.05)
+        assert metrics["clipping_ratio"] == 0.0
+        assert metrics["rms_level"] > 0
+
+    def test_decode_stereo_keeps_first_channel(self, tmp_path) -> None:
+        analytics = _build_analytics()
+        audio_path = _write_wav(tmp_path / "stereo.wav", channels=2)
+
+        audio = analytics._decode_audio(audio_path)
+
+        assert audio["sample_rate"] == 8000
+        assert len(audio["pcm"]) == 8000 * 2
+        assert audio["duration"] == pytest.approx(1.0)
+
+    def test_decode_error_reported_in_transcript(self) -> None:
+        analytics = _build_analytics()
+        result = analytics.analyze_recording("rec-1", "/missing.wav", ["transcript", "sentiment"])
+        assert result["analyses"]["transcript"]["error"]
+        assert result["analyses"]["sentiment"]["overall_sentiment"] == "neutral"
+
+    def test_vosk_model_loaded_once(self) -> None:
+        analytics = _build_analytics()
+        mock_vosk_module = MagicMock()
+        mock_vosk_module.KaldiRecognizer.return_value.AcceptWaveform.return_value = False
+        mock_vosk_module.KaldiRecognizer.return_value.FinalResult.return_value = '{"text": "hello"}'
+
+        with (
+            patch.dict("sys.modules", {"vosk": mock_vosk_module}),
+            patch.object(analytics, "_load_vosk_model", return_value=MagicMock()) as load,
+        ):
+            first = analytics._transcribe_pcm(b"\x00\x00" * 8000, 8000)
+            analytics._transcribe_pcm(b"\x00\x00" * 8000, 8000)
+
+        load.assert_called_once()
+        assert first["transcript"] == "hello"
+        assert first["duration"] == pytest.approx(1.0)
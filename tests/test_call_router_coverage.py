@@ -70,6 +70,10 @@ def config_get(key: str, default: Any = None) -> Any:
     pbx.paging_system = MagicMock()
     pbx.paging_system.is_paging_extension.return_value = False
 
+    # Conference rooms are bridged externally unless mixing is enabled
+    pbx.conference_system = MagicMock()
+    pbx.conference_system.mixing_enabled = False
+
     # Call manager
     mock_call = MagicMock()
     mock_call.start_time = MagicMock()
@@ -125,6 +129,7 @@ def config_get(key: str, default: Any = None) -> Any:
     pbx._emergency_handler = MagicMock()
     pbx._auto_attendant_handler = MagicMock()
     pbx._paging_handler = MagicMock()
+    pbx._conference_handler = MagicMock()
     pbx.voicemail_system = MagicMock()
 
     return pbx
@@ -459,6 +464,43 @@ def test_paging_call_routed(self) -> None:
         pbx._paging_handler.handle_paging.assert_called_once()
 
 
+@pytest.mark.unit
+class TestRouteCallConference:
+    """Tests for routing into mixed conference rooms."""
+
+    def test_conference_call_routed_when_mixing(self) -> None:
+        pbx = _make_pbx_core()
+        pbx.conference_system.mixing_enabled = True
+        pbx._conference_handler.handle_conference.return_value = True
+
+        router = CallRouter(pbx)
+        result = router.route_call(
+            "<sip:1001@pbx.local>",
+            "<sip:2000@pbx.local>",
+            "call-conf",
+            _make_invite_message(to_ext="2000"),
+            CALLER_ADDR,
+        )
+
+        assert result is True
+        pbx._conference_handler.handle_conference.assert_called_once()
+        pbx.call_manager.create_call.assert_not_called()
+
+    def test_conference_number_not_intercepted_without_mixing(self) -> None:
+        pbx = _make_pbx_core()
+
+        router = CallRouter(pbx)
+        router.route_call(
+            "<sip:1001@pbx.local>",
+            "<sip:2000@pbx.local>",
+            "call-conf",
+            _make_invite_message(to_ext="2000"),
+            CALLER_ADDR,
+        )
+
+        pbx._conference_handler.handle_conference.assert_not_called()
+
+
 # ===========================================================================
 # CallRouter.route_call - extension not registered
 # ===========================================================================
@@ -1371,39 +1413,23 @@ def test_no_answer_routes_to_voicemail(
         mock_call.to_extension = "1002"
         pbx.call_manager.get_call.return_value = mock_call
 
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_rtp_player_cls.return_value = mock_player
-
-        mock_recorder = MagicMock()
-        mock_recorder.start.return_value = True
-        mock_rtp_recorder_cls.return_value = mock_recorder
-
-        mock_get_prompt.return_value = b"\x00\x01\x02"
-
-        mailbox = MagicMock()
-        mailbox.get_greeting_path.return_value = None
-        pbx.voicemail_system.get_mailbox.return_value = mailbox
-
         router = CallRouter(pbx)
         router._answer_call_for_voicemail = MagicMock(return_value=True)
         router._send_cancel_to_callee = MagicMock()
 
-        with (
-            patch("threading.Timer") as mock_timer_cls,
-            patch("threading.Thread") as mock_thread_cls,
-            patch("time.sleep"),
-        ):
-            mock_timer = MagicMock()
-            mock_timer_cls.return_value = mock_timer
-            mock_thread = MagicMock()
-            mock_thread_cls.return_value = mock_thread
-
+        with patch("threading.Thread") as mock_thread_cls:
             router._handle_no_answer("call-1")
 
         assert mock_call.routed_to_voicemail is True
         router._send_cancel_to_callee.assert_called_once()
         router._answer_call_for_voicemail.assert_called_once()
+        # Greeting, recording and # detection run on the IVR runtime
+        pbx._voicemail_handler._voicemail_recording_session.assert_called_once_with(
+            "call-1", mock_call, 180
+        )
+        mock_thread_cls.assert_not_called()
+        mock_rtp_player_cls.assert_not_called()
+        mock_rtp_recorder_cls.assert_not_called()
 
     @patch("pbx.utils.audio.get_prompt_audio")
     @patch("pbx.rtp.handler.RTPRecorder")
@@ -1461,264 +1487,6 @@ def test_no_answer_no_caller_rtp_ends_call(
 
         pbx.end_call.assert_called_once_with("call-1")
 
-    @patch("pbx.utils.audio.get_prompt_audio")
-    @patch("pbx.rtp.handler.RTPRecorder")
-    @patch("pbx.rtp.handler.RTPPlayer")
-    @patch("pbx.core.call.CallState")
-    def test_no_answer_player_start_fails(
-        self,
-        mock_call_state: MagicMock,
-        mock_rtp_player_cls: MagicMock,
-        mock_rtp_recorder_cls: MagicMock,
-        mock_get_prompt: MagicMock,
-    ) -> None:
-        pbx = _make_pbx_core()
-        mock_call = MagicMock()
-        mock_call.state = "RINGING"
-        mock_call.routed_to_voicemail = False
-        mock_call.caller_rtp = {"address": "192.168.1.100", "port": 30000}
-        mock_call.rtp_ports = (20000, 20001)
-        mock_call.caller_addr = CALLER_ADDR
-        mock_call.original_invite = MagicMock()
-        mock_call.from_extension = "1001"
-        mock_call.to_extension = "1002"
-        pbx.call_manager.get_call.return_value = mock_call
-
-        mock_player = MagicMock()
-        mock_player.start.return_value = False
-        mock_rtp_player_cls.return_value = mock_player
-
-        mock_recorder = MagicMock()
-        mock_recorder.start.return_value = True
-        mock_rtp_recorder_cls.return_value = mock_recorder
-
-        mailbox = MagicMock()
-        mailbox.get_greeting_path.return_value = None
-        pbx.voicemail_system.get_mailbox.return_value = mailbox
-
-        router = CallRouter(pbx)
-        router._answer_call_for_voicemail = MagicMock(return_value=True)
-        router._send_cancel_to_callee = MagicMock()
-
-        with (
-            patch("threading.Timer") as mock_timer_cls,
-            patch("threading.Thread") as mock_thread_cls,
-        ):
-            mock_timer_cls.return_value = MagicMock()
-            mock_thread_cls.return_value = MagicMock()
-
-            router._handle_no_answer("call-1")
-
-        pbx.logger.warning.assert_called()
-
-    @patch("pbx.utils.audio.get_prompt_audio")
-    @patch("pbx.rtp.handler.RTPRecorder")
-    @patch("pbx.rtp.handler.RTPPlayer")
-    @patch("pbx.core.call.CallState")
-    def test_no_answer_recorder_start_fails(
-        self,
-        mock_call_state: MagicMock,
-        mock_rtp_player_cls: MagicMock,
-        mock_rtp_recorder_cls: MagicMock,
-        mock_get_prompt: MagicMock,
-    ) -> None:
-        pbx = _make_pbx_core()
-        mock_call = MagicMock()
-        mock_call.state = "RINGING"
-        mock_call.routed_to_voicemail = False
-        mock_call.caller_rtp = {"address": "192.168.1.100", "port": 30000}
-        mock_call.rtp_ports = (20000, 20001)
-        mock_call.caller_addr = CALLER_ADDR
-        mock_call.original_invite = MagicMock()
-        mock_call.from_extension = "1001"
-        mock_call.to_extension = "1002"
-        pbx.call_manager.get_call.return_value = mock_call
-
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_rtp_player_cls.return_value = mock_player
-
-        mock_recorder = MagicMock()
-        mock_recorder.start.return_value = False
-        mock_rtp_recorder_cls.return_value = mock_recorder
-
-        mock_get_prompt.return_value = b"\x00\x01\x02"
-
-        mailbox = MagicMock()
-        mailbox.get_greeting_path.return_value = None
-        pbx.voicemail_system.get_mailbox.return_value = mailbox
-
-        router = CallRouter(pbx)
-        router._answer_call_for_voicemail = MagicMock(return_value=True)
-        router._send_cancel_to_callee = MagicMock()
-
-        with patch("time.sleep"):
-            router._handle_no_answer("call-1")
-
-        pbx.end_call.assert_called_once_with("call-1")
-
-    @patch("pbx.utils.audio.get_prompt_audio")
-    @patch("pbx.rtp.handler.RTPRecorder")
-    @patch("pbx.rtp.handler.RTPPlayer")
-    @patch("pbx.core.call.CallState")
-    def test_no_answer_with_custom_greeting(
-        self,
-        mock_call_state: MagicMock,
-        mock_rtp_player_cls: MagicMock,
-        mock_rtp_recorder_cls: MagicMock,
-        mock_get_prompt: MagicMock,
-    ) -> None:
-        pbx = _make_pbx_core()
-        mock_call = MagicMock()
-        mock_call.state = "RINGING"
-        mock_call.routed_to_voicemail = False
-        mock_call.caller_rtp = {"address": "192.168.1.100", "port": 30000}
-        mock_call.rtp_ports = (20000, 20001)
-        mock_call.caller_addr = CALLER_ADDR
-        mock_call.original_invite = MagicMock()
-        mock_call.from_extension = "1001"
-        mock_call.to_extension = "1002"
-        pbx.call_manager.get_call.return_value = mock_call
-
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_rtp_player_cls.return_value = mock_player
-
-        mock_recorder = MagicMock()
-        mock_recorder.start.return_value = True
-        mock_rtp_recorder_cls.return_value = mock_recorder
-
-        mailbox = MagicMock()
-        mailbox.get_greeting_path.return_value = "/tmp/custom_greeting.wav"
-        pbx.voicemail_system.get_mailbox.return_value = mailbox
-
-        router = CallRouter(pbx)
-        router._answer_call_for_voicemail = MagicMock(return_value=True)
-        router._send_cancel_to_callee = MagicMock()
-
-        with (
-            patch("threading.Timer") as mock_timer_cls,
-            patch("threading.Thread") as mock_thread_cls,
-            patch("time.sleep"),
-            patch("pbx.core.call_router.Path") as mock_path,
-        ):
-            mock_timer_cls.return_value = MagicMock()
-            mock_thread_cls.return_value = MagicMock()
-            mock_path_instance = MagicMock()
-            mock_path_instance.exists.return_value = True
-            mock_path_instance.stat.return_value = MagicMock(st_size=1024)
-            mock_path.return_value = mock_path_instance
-
-            router._handle_no_answer("call-1")
-
-        mock_player.play_file.assert_called_once_with("/tmp/custom_greeting.wav")
-        mock_player.play_beep.assert_called_once_with(frequency=1000, duration_ms=500)
-
-    @patch("pbx.utils.audio.get_prompt_audio")
-    @patch("pbx.rtp.handler.RTPRecorder")
-    @patch("pbx.rtp.handler.RTPPlayer")
-    @patch("pbx.core.call.CallState")
-    def test_no_answer_custom_greeting_file_not_found_falls_back(
-        self,
-        mock_call_state: MagicMock,
-        mock_rtp_player_cls: MagicMock,
-        mock_rtp_recorder_cls: MagicMock,
-        mock_get_prompt: MagicMock,
-    ) -> None:
-        pbx = _make_pbx_core()
-        mock_call = MagicMock()
-        mock_call.state = "RINGING"
-        mock_call.routed_to_voicemail = False
-        mock_call.caller_rtp = {"address": "192.168.1.100", "port": 30000}
-        mock_call.rtp_ports = (20000, 20001)
-        mock_call.caller_addr = CALLER_ADDR
-        mock_call.original_invite = MagicMock()
-        mock_call.from_extension = "1001"
-        mock_call.to_extension = "1002"
-        pbx.call_manager.get_call.return_value = mock_call
-
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_rtp_player_cls.return_value = mock_player
-
-        mock_recorder = MagicMock()
-        mock_recorder.start.return_value = True
-        mock_rtp_recorder_cls.return_value = mock_recorder
-
-        mock_get_prompt.return_value = b"\x00\x01\x02"
-
-        mailbox = MagicMock()
-        mailbox.get_greeting_path.return_value = "/tmp/nonexistent.wav"
-        pbx.voicemail_system.get_mailbox.return_value = mailbox
-
-        router = CallRouter(pbx)
-        router._answer_call_for_voicemail = MagicMock(return_value=True)
-        router._send_cancel_to_callee = MagicMock()
-
-        with (
-            patch("threading.Timer") as mock_timer_cls,
-            patch("threading.Thread") as mock_thread_cls,
-            patch("time.sleep"),
-            patch("pbx.core.call_router.Path") as mock_path,
-        ):
-            mock_timer_cls.return_value = MagicMock()
-            mock_thread_cls.return_value = MagicMock()
-            mock_path_instance = MagicMock()
-            mock_path_instance.exists.return_value = False
-            mock_path.return_value = mock_path_instance
-
-            router._handle_no_answer("call-1")
-
-        mock_get_prompt.assert_called_once_with("leave_message")
-
-    @patch("pbx.utils.audio.get_prompt_audio")
-    @patch("pbx.rtp.handler.RTPRecorder")
-    @patch("pbx.rtp.handler.RTPPlayer")
-    @patch("pbx.core.call.CallState")
-    def test_no_answer_greeting_oserror(
-        self,
-        mock_call_state: MagicMock,
-        mock_rtp_player_cls: MagicMock,
-        mock_rtp_recorder_cls: MagicMock,
-        mock_get_prompt: MagicMock,
-    ) -> None:
-        pbx = _make_pbx_core()
-        mock_call = MagicMock()
-        mock_call.state = "RINGING"
-        mock_call.routed_to_voicemail = False
-        mock_call.caller_rtp = {"address": "192.168.1.100", "port": 30000}
-        mock_call.rtp_ports = (20000, 20001)
-        mock_call.caller_addr = CALLER_ADDR
-        mock_call.original_invite = MagicMock()
-        mock_call.from_extension = "1001"
-        mock_call.to_extension = "1002"
-        pbx.call_manager.get_call.return_value = mock_call
-
-        mock_rtp_player_cls.side_effect = OSError("port in use")
-
-        mock_recorder = MagicMock()
-        mock_recorder.start.return_value = True
-        mock_rtp_recorder_cls.return_value = mock_recorder
-
-        mailbox = MagicMock()
-        mailbox.get_greeting_path.return_value = None
-        pbx.voicemail_system.get_mailbox.return_value = mailbox
-
-        router = CallRouter(pbx)
-        router._answer_call_for_voicemail = MagicMock(return_value=True)
-        router._send_cancel_to_callee = MagicMock()
-
-        with (
-            patch("threading.Timer") as mock_timer_cls,
-            patch("threading.Thread") as mock_thread_cls,
-        ):
-            mock_timer_cls.return_value = MagicMock()
-            mock_thread_cls.return_value = MagicMock()
-
-            router._handle_no_answer("call-1")
-
-        pbx.logger.error.assert_called()
-
 
 # ===========================================================================
 # CallRouter.route_call - phone model codec selection
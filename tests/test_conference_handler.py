@@ -0,0 +1,130 @@
+"""Tests for ConferenceHandler (pbx.core.conference_handler)."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pbx.core.conference_handler import ConferenceHandler
+
+
+def _make_pbx_core() -> MagicMock:
+    """Create a MagicMock acting as PBXCore."""
+    pbx = MagicMock()
+    pbx.config.get.return_value = 5060
+    pbx._get_server_ip.return_value = "10.0.0.1"
+    pbx._get_dtmf_payload_type.return_value = 101
+    pbx._should_skip_static_rtpmap.return_value = False
+    pbx.rtp_relay.allocate_relay.return_value = (20000, 20001)
+    pbx.conference_system.join_conference.return_value = True
+    return pbx
+
+
+def _make_message(formats: list[str]) -> MagicMock:
+    """Create a mock INVITE offering the given payload types."""
+    message = MagicMock()
+    message.body = (
+        "v=0\r\n"
+        "o=- 1 1 IN IP4 192.168.1.10\r\n"
+        "s=-\r\n"
+        "c=IN IP4 192.168.1.10\r\n"
+        "t=0 0\r\n"
+        f"m=audio 30000 RTP/AVP {' '.join(formats)}\r\n"
+    )
+    return message
+
+
+@pytest.mark.unit
+@patch("pbx.sip.message.SIPMessageBuilder")
+class TestHandleConference:
+    """Tests for handle_conference."""
+
+    def test_caller_joins_mixer_through_relay(self, mock_sip: MagicMock) -> None:
+        pbx = _make_pbx_core()
+        handler = ConferenceHandler(pbx)
+
+        result = handler.handle_conference(
+            "1001", "2000", "call-1", _make_message(["0", "8", "101"]), ("192.168.1.10", 5060)
+        )
+
+        assert result is True
+        pbx.rtp_relay.set_endpoints.assert_called_once_with("call-1", ("192.168.1.10", 30000), None)
+        room, extension, call_id, codec, send_mix = (
+            pbx.conference_system.join_conference.call_args.args
+        )
+        assert (room, extension, call_id, codec) == ("2000", "1001", "call-1", "PCMU")
+
+        # The mix for this caller goes out of the caller's side of the relay
+        send_mix(b"mixed")
+        pbx.rtp_relay.send_to_leg.assert_called_once_with("call-1", "a", b"mixed")
+
+        # Only the caller's inbound audio feeds the mixer
+        tap_call_id, tap = pbx.rtp_relay.add_audio_tap.call_args.args
+        assert tap_call_id == "call-1"
+        tap("a", b"speech")
+        tap("b", b"ignored")
+        pbx.conference_system.push_audio.assert_called_once_with("2000", "call-1", b"speech")
+
+        call = pbx.call_manager.create_call.return_value
+        assert call.conference_room == "2000"
+        assert call.conference_tap is tap
+        call.connect.assert_called_once()
+        pbx.sip_server._send_message.assert_called_once()
+
+    def test_only_g711_is_answered(self, mock_sip: MagicMock) -> None:
+        pbx = _make_pbx_core()
+        handler = ConferenceHandler(pbx)
+
+        with patch("pbx.sip.sdp.SDPBuilder.build_audio_sdp", return_value="sdp") as build_sdp:
+            handler.handle_conference(
+                "1001", "2000", "call-1", _make_message(["18", "8", "101"]), ("192.168.1.10", 5060)
+            )
+
+        assert pbx.conference_system.join_conference.call_args.args[3] == "PCMA"
+        assert build_sdp.call_args.kwargs["codecs"] == ["8"]
+
+    def test_no_g711_rejected(self, mock_sip: MagicMock) -> None:
+        pbx = _make_pbx_core()
+        handler = ConferenceHandler(pbx)
+
+        result = handler.handle_conference(
+            "1001", "2000", "call-1", _make_message(["9", "18"]), ("192.168.1.10", 5060)
+        )
+
+        assert result is False
+        pbx.call_manager.create_call.assert_not_called()
+        pbx.rtp_relay.allocate_relay.assert_not_called()
+
+    def test_full_room_releases_relay(self, mock_sip: MagicMock) -> None:
+        pbx = _make_pbx_core()
+        pbx.conference_system.join_conference.return_value = False
+        handler = ConferenceHandler(pbx)
+
+        result = handler.handle_conference(
+            "1001", "2000", "call-1", _make_message(["0"]), ("192.168.1.10", 5060)
+        )
+
+        assert result is False
+        pbx.rtp_relay.release_relay.assert_called_once_with("call-1")
+        pbx.call_manager.end_call.assert_called_once_with("call-1")
+        pbx.rtp_relay.add_audio_tap.assert_not_called()
+        pbx.sip_server._send_message.assert_not_called()
+
+
+@pytest.mark.unit
+class TestLeaveConference:
+    """Tests for leave_conference."""
+
+    def test_tap_removed_and_room_left(self) -> None:
+        pbx = _make_pbx_core()
+        handler = ConferenceHandler(pbx)
+        tap = MagicMock()
+        call = MagicMock(
+            call_id="call-1", from_extension="1001", conference_room="2000", conference_tap=tap
+        )
+
+        handler.leave_conference(call)
+
+        pbx.rtp_relay.remove_audio_tap.assert_called_once_with("call-1", tap)
+        pbx.conference_system.leave_conference.assert_called_once_with("2000", "1001")
+        assert call.conference_room is None
+        assert call.conference_tap is None
@@ -0,0 +1,213 @@
+"""Tests for pbx.features.conference_mixer and mixer-enabled conference rooms."""
+
+import struct
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+
+def _tone(level: int, samples: int = 160) -> np.ndarray:
+    """Square wave at the given amplitude."""
+    frame = np.full(samples, level, dtype=np.int16)
+    frame[::2] = -level
+    return frame
+
+
+def _rtp(payload: bytes, payload_type: int = 0, sequence: int = 1) -> bytes:
+    return struct.pack("!BBHII", 0x80, payload_type, sequence, 160 * sequence, 1234) + payload
+
+
+@pytest.mark.unit
+@patch("pbx.features.conference_mixer.get_logger", return_value=MagicMock())
+class TestConferenceMixer:
+    """Tests for ConferenceMixer."""
+
+    def test_g711_round_trip(self, _mock_logger):
+        """Encoding then decoding stays within G.711 quantization error."""
+        from pbx.features.conference_mixer import decode_frame, encode_frame
+
+        pcm = np.linspace(-20000, 20000, 160).astype(np.int16)
+        for codec in ("PCMU", "PCMA"):
+            decoded = decode_frame(encode_frame(pcm, codec), codec).astype(np.int32)
+            assert np.max(np.abs(decoded - pcm)) < 1100
+
+    def test_listeners_share_one_encode_per_codec(self, _mock_logger):
+        """Silent legs get the same payload object and only one encode per codec."""
+        from pbx.features.conference_mixer import ConferenceMixer, encode_frame
+
+        mixer = ConferenceMixer("2000", max_active_speakers=2)
+        for i in range(6):
+            mixer.add_participant(f"c{i}", "PCMA" if i >= 4 else "PCMU")
+
+        mixer.push_frame("c0", encode_frame(_tone(4000), "PCMU"))
+        outputs = mixer.mix()
+
+        assert mixer.get_active_speakers() == ["c0"]
+        assert outputs["c1"] is outputs["c2"] is outputs["c3"]
+        assert outputs["c4"] is outputs["c5"]
+        # One encode for the speaker, one per listener codec
+        assert mixer.encodes == 3
+
+    def test_speaker_does_not_hear_self(self, _mock_logger):
+        """An active speaker's output excludes their own audio."""
+        from pbx.features.conference_mixer import ConferenceMixer, decode_frame, encode_frame
+
+        mixer = ConferenceMixer("2000", agc_enabled=False)
+        mixer.add_participant("a")
+        mixer.add_participant("b")
+        mixer.add_participant("c")
+
+        mixer.push_frame("a", encode_frame(_tone(3000), "PCMU"))
+        mixer.push_frame("b", encode_frame(_tone(1000), "PCMU"))
+        outputs = mixer.mix()
+
+        heard_by_a = decode_frame(outputs["a"], "PCMU")
+        heard_by_b = decode_frame(outputs["b"], "PCMU")
+        heard_by_c = decode_frame(outputs["c"], "PCMU")
+        assert abs(int(heard_by_a[1]) - 1000) < 100
+        assert abs(int(heard_by_b[1]) - 3000) < 200
+        assert abs(int(heard_by_c[1]) - 4000) < 200
+
+    def test_top_n_speaker_selection(self, _mock_logger):
+        """Only the loudest max_active_speakers legs are mixed."""
+        from pbx.features.conference_mixer import ConferenceMixer, encode_frame
+
+        mixer = ConferenceMixer("2000", max_active_speakers=2)
+        levels = {"a": 500, "b": 4000, "c": 2000, "d": 1000}
+        for pid, level in levels.items():
+            mixer.add_participant(pid)
+            mixer.push_frame(pid, encode_frame(_tone(level), "PCMU"))
+
+        mixer.mix()
+        assert sorted(mixer.get_active_speakers()) == ["b", "c"]
+
+    def test_muted_and_quiet_legs_are_not_mixed(self, _mock_logger):
+        """Muted legs and legs below the speech threshold produce silence."""
+        from pbx.features.conference_mixer import ConferenceMixer, encode_frame
+
+        mixer = ConferenceMixer("2000", speech_threshold=200)
+        mixer.add_participant("a")
+        mixer.add_participant("b")
+        mixer.set_muted("a", True)
+
+        mixer.push_frame("a", encode_frame(_tone(5000), "PCMU"))
+        mixer.push_frame("b", encode_frame(_tone(50), "PCMU"))
+        outputs = mixer.mix()
+
+        assert mixer.get_active_speakers() == []
+        assert outputs["a"] == outputs["b"] == mixer._silence_payloads["PCMU"]
+
+    def test_agc_prevents_clipping(self, _mock_logger):
+        """Summing loud speakers is scaled below full scale instead of clipping."""
+        from pbx.features.conference_mixer import ConferenceMixer, decode_frame, encode_frame
+
+        mixer = ConferenceMixer("2000", max_active_speakers=3, agc_target_peak=29000)
+        for pid in ("a", "b", "c", "listener"):
+            mixer.add_participant(pid)
+        for pid in ("a", "b", "c"):
+            mixer.push_frame(pid, encode_frame(_tone(20000), "PCMU"))
+
+        outputs = mixer.mix()
+
+        assert mixer.gain < 1.0
+        heard = decode_frame(outputs["listener"], "PCMU").astype(np.int32)
+        assert np.max(np.abs(heard)) <= 30000
+
+    def test_rtp_packets_and_tick(self, _mock_logger):
+        """RTP headers are stripped on input and added per leg on output."""
+        from pbx.features.conference_mixer import ConferenceMixer, encode_frame
+
+        sent = {"a": [], "b": []}
+        mixer = ConferenceMixer("2000")
+        mixer.add_participant("a", "PCMU", sent["a"].append)
+        mixer.add_participant("b", "PCMA", sent["b"].append)
+
+        assert mixer.push_rtp_packet("a", _rtp(encode_frame(_tone(3000), "PCMU")))
+        assert not mixer.push_rtp_packet("a", _rtp(b"\x01\x02\x03\x04", payload_type=101))
+
+        assert mixer.tick() == 2
+        assert len(sent["b"][0]) == 12 + 160
+        assert sent["b"][0][1] & 0x7F == 8
+        assert sent["a"][0][1] & 0x7F == 0
+
+        mixer.tick()
+        first_seq = struct.unpack("!H", sent["b"][0][2:4])[0]
+        second_seq = struct.unpack("!H", sent["b"][1][2:4])[0]
+        assert second_seq == (first_seq + 1) & 0xFFFF
+
+    def test_jitter_buffer_reorders_leg(self, _mock_logger):
+        """With the conference stage enabled, each tick pulls the next frame in sequence."""
+        from pbx.features.conference_mixer import ConferenceMixer, decode_frame, encode_frame
+
+        sent = []
+        mixer = ConferenceMixer(
+            "2000",
+            jitter_buffer_config={
+                "enabled": True,
+                "stages": ["conference"],
+                "initial_length_ms": 0,
+                "adaptive": False,
+            },
+        )
+        mixer.add_participant("a")
+        mixer.add_participant("b", "PCMA", sent.append)
+        assert mixer.participants["a"].jitter_buffer is not None
+
+        # Frame 2 overtakes frame 1 on the network
+        mixer.push_rtp_packet("a", _rtp(encode_frame(_tone(6000), "PCMU"), sequence=2))
+        mixer.push_rtp_packet("a", _rtp(encode_frame(_tone(3000), "PCMU"), sequence=1))
+
+        mixer.tick()
+        mixer.tick()
+        levels = [int(np.max(np.abs(decode_frame(p[12:], "PCMA")))) for p in sent]
+        assert levels[0] == pytest.approx(3000, rel=0.05)
+        assert levels[1] == pytest.approx(6000, rel=0.05)
+
+    def test_unsupported_codec_rejected(self, _mock_logger):
+        """Codecs the mixer cannot share-encode are refused."""
+        from pbx.features.conference_mixer import ConferenceMixer
+
+        mixer = ConferenceMixer("2000")
+        assert not mixer.add_participant("a", "G729")
+        assert not mixer.push_frame("missing", b"\xff" * 160)
+
+
+@pytest.mark.unit
+@patch("pbx.features.conference.get_logger", return_value=MagicMock())
+@patch("pbx.features.conference_mixer.get_logger", return_value=MagicMock())
+class TestConferenceSystemMixing:
+    """Tests for ConferenceSystem with in-process mixing enabled."""
+
+    def test_mixing_disabled_by_default(self, _mock_mixer_logger, _mock_logger):
+        """Without config, rooms have no mixer."""
+        from pbx.features.conference import ConferenceSystem
+
+        system = ConferenceSystem()
+        assert system.join_conference("2000", "1001", "call-1")
+        assert system.get_room("2000").mixer is None
+        assert not system.push_audio("2000", "call-1", _rtp(b"\xff" * 160))
+
+    def test_room_lifecycle_drives_mixer(self, _mock_mixer_logger, _mock_logger):
+        """Joining, muting and leaving are mirrored into the room's mixer."""
+        from pbx.features.conference import ConferenceSystem
+
+        config = MagicMock()
+        config.get.return_value = {"enabled": True, "max_active_speakers": 2}
+        system = ConferenceSystem(config=config)
+        system.mixer_scheduler.start = MagicMock()
+
+        assert system.join_conference("2000", "1001", "call-1")
+        assert system.join_conference("2000", "1002", "call-2", codec="PCMA")
+        room = system.get_room("2000")
+        assert set(room.mixer.participants) == {"call-1", "call-2"}
+        assert "2000" in system.mixer_scheduler.mixers
+
+        room.mute_participant("1001")
+        assert room.mixer.participants["call-1"].muted
+        assert system.push_audio("2000", "call-2", _rtp(b"\x55" * 160, payload_type=8))
+
+        system.leave_conference("2000", "1001")
+        system.leave_conference("2000", "1002")
+        assert system.get_room("2000") is None
+        assert "2000" not in system.mixer_scheduler.mixers
@@ -687,3 +687,194 @@ def test_update_dtmf_with_nested_key(self) -> None:
             result = config.update_dtmf_config({"dtmf": {"mode": "Inband"}})
         assert result is True
         assert config.config["features"]["webrtc"]["dtmf"]["mode"] == "Inband"
+
+
+@pytest.mark.unit
+class TestConfigSnapshot:
+    """Tests for the compiled snapshot and typed accessors."""
+
+    def test_snapshot_matches_dotted_walk(self) -> None:
+        """The snapshot resolves exactly what walking the tree would."""
+        config = _make_config(
+            {
+                "server": {"sip_port": 5060, "name": None, "flag": False},
+                "dotted.key": 1,
+                "list": [1, 2],
+            }
+        )
+
+        assert config.get("server") == {"sip_port": 5060, "name": None, "flag": False}
+        assert config.get("server.sip_port") == 5060
+        assert config.get("server.flag") is False
+        assert config.get("server.name", "pbx") == "pbx"
+        # Keys containing a dot can't be addressed with dotted notation
+        assert config.get("dotted.key", "missing") == "missing"
+        assert config.get("list.0", "missing") == "missing"
+
+    def test_typed_accessors(self) -> None:
+        """Typed accessors convert values and fall back on bad ones."""
+        config = _make_config(
+            {
+                "rtp": {"port": "10000", "ratio": "0.5", "bad": "abc"},
+                "flags": {"a": "yes", "b": "off", "c": 1, "d": "maybe"},
+                "codecs": {"order": ["PCMU", "PCMA"]},
+            }
+        )
+
+        assert config.get_int("rtp.port") == 10000
+        assert config.get_int("rtp.bad", 7) == 7
+        assert config.get_int("flags.a", 3) == 3
+        assert config.get_float("rtp.ratio") == 0.5
+        assert config.get_bool("flags.a") is True
+        assert config.get_bool("flags.b", True) is False
+        assert config.get_bool("flags.c") is True
+        assert config.get_bool("flags.d", True) is True
+        assert config.get_str("rtp.port") == "10000"
+        assert config.get_list("codecs.order") == ["PCMU", "PCMA"]
+        assert config.get_list("codecs") == []
+        assert config.get_dict("codecs") == {"order": ["PCMU", "PCMA"]}
+        assert config.get_dict("codecs.order") == {}
+
+    def test_raw_tree_changes_seen_after_invalidate(self) -> None:
+        """In-place changes to .config show up once the snapshot is invalidated."""
+        config = _make_config({"dialplan": {"internal_pattern": "^1[0-9]{3}$"}})
+        assert config.get("dialplan.internal_pattern") == "^1[0-9]{3}$"
+
+        config.config["dialplan"]["internal_pattern"] = "^[1-2][0-9]{3}$"
+        assert config.get("dialplan.internal_pattern") == "^1[0-9]{3}$"
+        config.invalidate()
+
+        assert config.get("dialplan.internal_pattern") == "^[1-2][0-9]{3}$"
+        assert config.add_extension("1001", "Alice", "", "pw")
+        assert config.get("extensions")[0]["number"] == "1001"
+
+    def test_set_creates_sections(self) -> None:
+        """set_value() writes a dotted key and recompiles the snapshot."""
+        config = _make_config({"server": {"sip_port": 5060}})
+        assert config.get("server.sip_port") == 5060
+
+        config.set_value("server.sip_port", 5070)
+        config.set_value("api.rate_limit.enabled", True)
+
+        assert config.get("server.sip_port") == 5070
+        assert config.get_bool("api.rate_limit.enabled") is True
+        assert config.config["api"] == {"rate_limit": {"enabled": True}}
+
+    def test_extension_lookup_keeps_snapshot(self) -> None:
+        """Reading extensions on each REGISTER doesn't throw the snapshot away."""
+        config = _make_config({"extensions": [{"number": "1001"}], "server": {"sip_port": 5060}})
+        snapshot = config.snapshot
+
+        assert config.get_extension("1001") == {"number": "1001"}
+        assert config.config["server"]["sip_port"] == 5060
+
+        assert config.snapshot is snapshot
+
+    def test_sections_handed_out_as_copies(self) -> None:
+        """Changing a returned section doesn't change the configuration."""
+        config = _make_config({"api": {"ssl": {"enabled": False}}, "codecs": {"order": ["PCMU"]}})
+
+        config.get("api.ssl")["enabled"] = True
+        config.get_dict("api")["ssl"] = None
+        config.get_list("codecs.order").append("PCMA")
+
+        assert config.get("api.ssl.enabled") is False
+        assert config.get("codecs.order") == ["PCMU"]
+        assert config.config["api"]["ssl"] == {"enabled": False}
+
+
+@pytest.mark.unit
+class TestConfigReload:
+    """Tests for reload, subscribers and the file watcher."""
+
+    def _write(self, path: str, data: dict) -> None:
+        with Path(path).open("w") as f:
+            yaml.dump(data, f)
+
+    def test_reload_swaps_snapshot_and_notifies(self) -> None:
+        """Subscribers hear about changes under their prefix only."""
+        config = _make_config({"codecs": {"opus": {"enabled": False}}, "security": {"x": 1}})
+        codec_changes: list[set[str]] = []
+        all_changes: list[set[str]] = []
+        config.subscribe(lambda changed, snap: codec_changes.append(changed), prefix="codecs")
+        config.subscribe(lambda changed, snap: all_changes.append(changed))
+        before = config.snapshot
+
+        self._write(
+            config.config_file, {"codecs": {"opus": {"enabled": True}}, "security": {"x": 1}}
+        )
+        changed = config.reload()
+
+        assert changed == {"codecs.opus.enabled"}
+        assert codec_changes == all_changes == [{"codecs.opus.enabled"}]
+        assert config.get("codecs.opus.enabled") is True
+        # The old snapshot is untouched
+        assert before.get("codecs.opus.enabled") is False
+        assert config.snapshot.version == before.version + 1
+
+        self._write(
+            config.config_file, {"codecs": {"opus": {"enabled": True}}, "security": {"x": 2}}
+        )
+        config.reload()
+        assert len(codec_changes) == 1
+        assert len(all_changes) == 2
+
+    def test_reload_keeps_config_on_parse_error(self) -> None:
+        """A broken file leaves the running configuration in place."""
+        config = _make_config({"server": {"sip_port": 5060}})
+        Path(config.config_file).write_text("server: [unclosed\n")
+
+        assert config.reload() == set()
+        assert config.get("server.sip_port") == 5060
+
+    def test_failing_subscriber_does_not_block_others(self) -> None:
+        """An exception in one subscriber is logged and the rest still run."""
+        config = _make_config({"a": 1})
+        seen: list[int] = []
+
+        def broken(changed: set[str], snap: object) -> None:
+            raise ValueError("boom")
+
+        config.subscribe(broken)
+        config.subscribe(lambda changed, snap: seen.append(snap.get("a")))
+        self._write(config.config_file, {"a": 2})
+
+        config.reload()
+
+        assert seen == [2]
+        config.unsubscribe(broken)
+        assert len(config._subscribers) == 1
+
+    def test_watcher_reloads_on_file_change(self) -> None:
+        """Editing the file is picked up without calling reload()."""
+        import time
+
+        config = _make_config({"dialplan": {"queue_pattern": "^8[0-9]{3}$"}})
+        changes: list[set[str]] = []
+        config.subscribe(lambda changed, snap: changes.append(changed))
+        config.watch(interval=0.05)
+        try:
+            # Saving our own changes is not a reload
+            config.save()
+            time.sleep(0.2)
+            assert changes == []
+
+            self._write(config.config_file, {"dialplan": {"queue_pattern": "^9[0-9]{3}$"}})
+            deadline = time.monotonic() + 5
+            while not changes and time.monotonic() < deadline:
+                time.sleep(0.02)
+        finally:
+            config.stop_watching()
+
+        assert changes == [{"dialplan.queue_pattern"}]
+        assert config.get("dialplan.queue_pattern") == "^9[0-9]{3}$"
+
+    def test_lookup_cost_is_independent_of_depth(self) -> None:
+        """A deep key costs no more than a shallow one."""
+        import timeit
+
+        config = _make_config({"a": {"b": {"c": {"d": {"e": {"f": {"g": 1}}}}}}, "top": 1})
+        deep = min(timeit.repeat(lambda: config.get("a.b.c.d.e.f.g"), number=20000, repeat=5))
+        shallow = min(timeit.repeat(lambda: config.get("top"), number=20000, repeat=5))
+
+        assert deep < shallow * 2
@@ -0,0 +1,202 @@
+"""Tests for the TTL-aware DNS resolver cache and its users."""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pbx.utils.dns_resolver import DNSResolver
+
+
+def _resolver(**settings: float) -> DNSResolver:
+    return DNSResolver({"features": {"dns_resolver": settings}})
+
+
+@pytest.mark.unit
+class TestDNSResolver:
+    """Tests for DNSResolver."""
+
+    def test_answers_are_cached_for_their_ttl(self) -> None:
+        resolver = _resolver()
+        resolver._query = MagicMock(return_value=(["192.0.2.10"], 60, False))
+
+        assert resolver.resolve("sip.example.com") == ["192.0.2.10"]
+        assert resolver.lookup("SIP.example.com.") == ["192.0.2.10"]
+
+        resolver._query.assert_called_once_with("sip.example.com", "A")
+        assert 55 < resolver.expires_in("sip.example.com", "A") <= 60
+        stats = resolver.get_statistics()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_miss_does_not_block(self) -> None:
+        resolver = _resolver()
+        release = threading.Event()
+
+        def slow_query(name: str, rtype: str) -> tuple:
+            release.wait(5)
+            return ["192.0.2.10"], 60, False
+
+        resolver._query = slow_query
+
+        started = time.monotonic()
+        assert resolver.lookup("slow.example.com") == []
+        assert resolver.lookup("slow.example.com", wait=0.05) == []
+        assert time.monotonic() - started < 1
+
+        release.set()
+        assert resolver.resolve("slow.example.com") == ["192.0.2.10"]
+
+    def test_negative_answers_are_cached(self) -> None:
+        resolver = _resolver(negative_ttl=30)
+        resolver._query = MagicMock(return_value=([], 3600, True))
+
+        assert resolver.resolve_host("gone.example.com", wait=2) == []
+        assert resolver.is_unresolvable("gone.example.com")
+        assert not resolver.is_unresolvable("192.0.2.1")
+        assert resolver.expires_in("gone.example.com", "A") <= 30
+
+        assert resolver.lookup("gone.example.com") == []
+        assert resolver._query.call_count == 2  # A and AAAA, once each
+
+    def test_stale_answer_served_when_refresh_fails(self) -> None:
+        resolver = _resolver()
+        resolver._query = MagicMock(return_value=(["192.0.2.10"], 60, False))
+        resolver.resolve("sip.example.com")
+
+        entry = resolver.cache[("sip.example.com", "A")]
+        entry.expires = entry.refresh_at = time.monotonic() - 1
+        resolver._query.side_effect = OSError("server unreachable")
+
+        assert resolver.lookup("sip.example.com") == ["192.0.2.10"]
+        resolver._inflight[("sip.example.com", "A")].result(timeout=5)
+        assert resolver.lookup("sip.example.com") == ["192.0.2.10"]
+        stats = resolver.get_statistics()
+        assert stats["stale_hits"] == 2
+        assert stats["errors"] == 1
+
+    def test_failed_lookup_is_not_unresolvable(self) -> None:
+        resolver = _resolver(negative_ttl=30)
+        resolver._query = MagicMock(side_effect=TimeoutError("lifetime expired"))
+
+        assert resolver.resolve_host("sip.example.com", wait=2) == []
+        assert not resolver.is_unresolvable("sip.example.com")
+        assert resolver.expires_in("sip.example.com", "A") <= 30
+        stats = resolver.get_statistics()
+        assert stats["failed_entries"] == 2
+        assert stats["negative_entries"] == 0
+
+        # Retried once the short failure TTL has run out
+        resolver._query.side_effect = None
+        resolver._query.return_value = (["192.0.2.10"], 60, False)
+        resolver.cache[("sip.example.com", "A")].expires = time.monotonic() - 1
+        assert resolver.resolve("sip.example.com") == ["192.0.2.10"]
+
+    def test_stale_answer_refreshed_once_per_retry_interval(self) -> None:
+        resolver = _resolver(negative_ttl=30)
+        resolver._query = MagicMock(return_value=(["192.0.2.10"], 60, False))
+        resolver.resolve("sip.example.com")
+
+        entry = resolver.cache[("sip.example.com", "A")]
+        entry.expires = entry.refresh_at = time.monotonic() - 1
+        resolver._query.side_effect = OSError("server unreachable")
+        resolver.lookup("sip.example.com")
+        resolver._inflight[("sip.example.com", "A")].result(timeout=5)
+
+        for _ in range(20):
+            assert resolver.lookup("sip.example.com") == ["192.0.2.10"]
+        assert resolver._query.call_count == 2
+        assert ("sip.example.com", "A") not in resolver._inflight
+
+    def test_answer_near_expiry_is_prefetched(self) -> None:
+        resolver = _resolver()
+        resolver._query = MagicMock(return_value=(["192.0.2.10"], 60, False))
+        resolver.resolve("sip.example.com")
+        resolver._query.return_value = (["192.0.2.20"], 60, False)
+
+        resolver.cache[("sip.example.com", "A")].refresh_at = time.monotonic() - 1
+        # Still answered from cache while the refresh runs
+        assert resolver.lookup("sip.example.com") == ["192.0.2.10"]
+        resolver._inflight[("sip.example.com", "A")].result(timeout=5)
+
+        assert resolver.lookup("sip.example.com") == ["192.0.2.20"]
+        assert resolver.get_statistics()["prefetches"] == 1
+
+    def test_dnspython_answers_and_nxdomain(self) -> None:
+        class NXDOMAIN(Exception):  # noqa: N818 - named like dnspython's
+            pass
+
+        srv = MagicMock(priority=20, weight=10, port=5061, target="b.example.com.")
+        srv_best = MagicMock(priority=10, weight=10, port=5060, target="a.example.com.")
+        answer = MagicMock()
+        answer.__iter__.return_value = iter([srv, srv_best])
+        answer.rrset.ttl = 120
+
+        def resolve(name: str, rtype: str, lifetime: float) -> MagicMock:
+            if name == "missing.example.com":
+                raise NXDOMAIN
+            return answer
+
+        mock_resolver = MagicMock()
+        mock_resolver.resolve.side_effect = resolve
+        mock_dns = MagicMock(resolver=mock_resolver)
+        resolver = _resolver()
+
+        with patch.dict("sys.modules", {"dns": mock_dns, "dns.resolver": mock_resolver}):
+            records, ttl, negative = resolver._query("_sip._tcp.example.com", "SRV")
+            assert resolver._query("missing.example.com", "A") == ([], 30, True)
+
+        assert [r["target"] for r in records] == ["a.example.com", "b.example.com"]
+        assert ttl == 120
+        assert negative is False
+
+
+@pytest.mark.unit
+class TestTrunkResolution:
+    """Tests for DNS-aware trunk selection."""
+
+    @patch("pbx.features.sip_trunk.E911Protection")
+    def test_unresolvable_trunk_is_skipped(self, _mock_e911: MagicMock) -> None:
+        from pbx.features.sip_trunk import SIPTrunk, SIPTrunkSystem
+
+        system = SIPTrunkSystem()
+        system.resolver = _resolver()
+        system.resolver._query = MagicMock(
+            side_effect=lambda name, rtype: (
+                ([], 30, True)
+                if name == "dead.example.com"
+                else (["192.0.2.10"] if rtype == "A" else [], 60, rtype != "A")
+            )
+        )
+        primary = SIPTrunk("primary", "Primary", "dead.example.com", "u", "p", priority=10)
+        backup = SIPTrunk("backup", "Backup", "sip.example.com", "u", "p", priority=20)
+        for trunk in (primary, backup):
+            system.add_trunk(trunk)
+            trunk.register()
+        system.resolver.resolve_host("dead.example.com", wait=2)
+        system.resolver.resolve_host("sip.example.com", wait=2)
+
+        assert not primary.can_make_call()
+        assert backup.resolve_address() == "192.0.2.10"
+        assert system._get_available_trunks_by_priority() == [backup]
+        assert primary.check_health().value == "down"
+
+        system.remove_trunk("primary")
+        assert ("dead.example.com", "A") not in system.resolver._watched
+        system.resolver.stop()
+
+    @patch("pbx.features.geographic_redundancy.get_logger")
+    @patch("pbx.features.geographic_redundancy.socket.socket")
+    def test_latency_check_skips_unresolved_host(
+        self, mock_socket_cls: MagicMock, _mock_logger: MagicMock
+    ) -> None:
+        from pbx.features.geographic_redundancy import GeographicRedundancy
+
+        resolver = _resolver()
+        resolver._query = MagicMock(return_value=([], 30, True))
+        with patch("pbx.features.geographic_redundancy.get_dns_resolver", return_value=resolver):
+            latency = GeographicRedundancy()._check_network_latency("dr.example.com")
+
+        assert latency == 9999.0
+        mock_socket_cls.assert_not_called()
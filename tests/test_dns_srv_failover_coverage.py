@@ -239,11 +239,13 @@ def test_lookup_srv_cache_miss_then_hit(self) -> None:
         assert self.failover.cache_hits == 2
         assert self.failover.total_lookups == 2
 
-    @patch("pbx.features.dns_srv_failover.socket")
-    def test_perform_srv_lookup_fallback_no_dnspython(self, mock_socket: MagicMock) -> None:
+    def test_perform_srv_lookup_fallback_no_dnspython(self) -> None:
         """Test fallback to basic DNS when dnspython is not installed."""
-        mock_socket.gethostbyname.return_value = "192.168.1.100"
-        mock_socket.gaierror = OSError
+
+        def mock_getaddrinfo(host, port, family, *args):
+            if family == socket.AF_INET:
+                return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("192.168.1.100", 0))]
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
 
         # Simulate ImportError for dns.resolver
         import builtins
@@ -255,8 +257,11 @@ def mock_import(name, *args, **kwargs):
                 raise ImportError("No module named 'dns.resolver'")
             return original_import(name, *args, **kwargs)
 
-        with patch("builtins.__import__", side_effect=mock_import):
-            records = self.failover._perform_srv_lookup("_sip._tcp.example.com")
+        with (
+            patch("builtins.__import__", side_effect=mock_import),
+            patch("pbx.utils.dns_resolver.socket.getaddrinfo", side_effect=mock_getaddrinfo),
+        ):
+            records = self.failover._perform_srv_lookup("_sip._tcp.example.com", wait=2.0)
 
         assert len(records) == 1
         assert records[0].target == "192.168.1.100"
@@ -264,12 +269,8 @@ def mock_import(name, *args, **kwargs):
         assert records[0].priority == 0
         assert records[0].weight == 0
 
-    @patch("pbx.features.dns_srv_failover.socket")
-    def test_perform_srv_lookup_fallback_dns_failure(self, mock_socket: MagicMock) -> None:
+    def test_perform_srv_lookup_fallback_dns_failure(self) -> None:
         """Test fallback with DNS resolution failure (gaierror)."""
-        mock_socket.gaierror = OSError
-        mock_socket.gethostbyname.side_effect = OSError("DNS resolution failed")
-
         import builtins
 
         original_import = builtins.__import__
@@ -279,8 +280,14 @@ def mock_import(name, *args, **kwargs):
                 raise ImportError("No module named 'dns.resolver'")
             return original_import(name, *args, **kwargs)
 
-        with patch("builtins.__import__", side_effect=mock_import):
-            records = self.failover._perform_srv_lookup("_sip._tcp.example.com")
+        with (
+            patch("builtins.__import__", side_effect=mock_import),
+            patch(
+                "pbx.utils.dns_resolver.socket.getaddrinfo",
+                side_effect=socket.gaierror(socket.EAI_AGAIN, "DNS resolution failed"),
+            ),
+        ):
+            records = self.failover._perform_srv_lookup("_sip._tcp.example.com", wait=2.0)
 
         assert len(records) == 0
 
@@ -0,0 +1,195 @@
+"""Tests for the live event bus and the SSE stream route."""
+
+import json
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask.testing import FlaskClient
+
+TOKEN_PATCH = "pbx.utils.session_token.get_session_token_manager"
+
+
+def _token_manager(payload: dict | None) -> MagicMock:
+    manager = MagicMock()
+    manager.verify_token.return_value = (payload is not None, payload)
+    return manager
+
+
+@pytest.mark.unit
+@patch("pbx.core.event_bus.get_logger", return_value=MagicMock())
+class TestLiveEventBus:
+    """Tests for LiveEventBus."""
+
+    def test_publish_and_resume(self, _mock_logger):
+        """Events after a sequence number are replayed in order."""
+        from pbx.core.event_bus import LiveEventBus
+
+        bus = LiveEventBus()
+        assert bus.publish("call.started", {"call_id": "a"}) == 1
+        bus.publish("call.ended", {"call_id": "a"})
+        bus.publish("call.started", {"call_id": "b"})
+
+        assert [e.seq for e in bus.events_since(1)] == [2, 3]
+        assert bus.events_since(3) == []
+        assert bus.events_since(0)[0].encode().startswith("id: 1\nevent: call.started\ndata: ")
+
+    def test_fell_behind_history(self, _mock_logger):
+        """A reader older than the retained history must resynchronize."""
+        from pbx.core.event_bus import LiveEventBus
+
+        bus = LiveEventBus(history_size=2)
+        for i in range(5):
+            bus.publish("queue.updated", {"i": i})
+
+        assert bus.events_since(2) is None
+        assert [e.seq for e in bus.events_since(3)] == [4, 5]
+
+    def test_wait_wakes_on_publish_and_close(self, _mock_logger):
+        """Waiting readers wake for new events and on shutdown."""
+        from pbx.core.event_bus import LiveEventBus
+
+        bus = LiveEventBus()
+        timer = threading.Timer(0.05, bus.publish, args=("call.started", {}))
+        timer.start()
+        assert [e.seq for e in bus.wait_for_events(0, 5.0)] == [1]
+        timer.join()
+
+        assert bus.wait_for_events(1, 0.01) == []
+        bus.close()
+        assert bus.wait_for_events(1, 5.0) == []
+
+    def test_snapshot_isolates_failing_providers(self, _mock_logger):
+        """Snapshots carry the current sequence and survive provider errors."""
+        from pbx.core.event_bus import LiveEventBus
+
+        bus = LiveEventBus()
+        bus.publish("call.started", {})
+        bus.register_snapshot_provider("calls", lambda: [{"call_id": "a"}])
+        bus.register_snapshot_provider("queues", MagicMock(side_effect=RuntimeError))
+
+        assert bus.snapshot() == {"seq": 1, "state": {"calls": [{"call_id": "a"}], "queues": None}}
+
+
+@pytest.mark.unit
+class TestLiveStatePublishers:
+    """Tests for state changes published by core components."""
+
+    def test_call_manager_publishes_lifecycle(self):
+        from pbx.core.call import CallManager
+        from pbx.core.event_bus import LiveEventBus
+
+        bus = LiveEventBus()
+        manager = CallManager(event_bus=bus)
+        manager.create_call("c1", "1001", "1002")
+        manager.end_call("c1")
+
+        events = bus.events_since(0)
+        assert [e.event_type for e in events] == ["call.started", "call.ended"]
+        assert events[0].data["call_id"] == "c1"
+        assert events[0].data["from_extension"] == "1001"
+
+    @patch("pbx.features.extensions.get_logger", return_value=MagicMock())
+    def test_registry_publishes_registration_changes(self, _mock_logger, mock_config):
+        from pbx.core.event_bus import LiveEventBus
+        from pbx.features.extensions import Extension, ExtensionRegistry
+
+        registry = ExtensionRegistry(mock_config)
+        registry.extensions["1001"] = Extension("1001", "Alice", {})
+        registry.event_bus = LiveEventBus()
+
+        registry.register("1001", ("10.0.0.5", 5060))
+        # A refresh from the same address is not a state change
+        registry.register("1001", ("10.0.0.5", 5060))
+        registry.unregister("1001")
+
+        assert [e.event_type for e in registry.event_bus.events_since(0)] == [
+            "extension.registered",
+            "extension.unregistered",
+        ]
+
+
+@pytest.mark.unit
+class TestEventStreamRoute:
+    """Tests for /api/events/stream."""
+
+    def _bus(self):
+        from pbx.core.event_bus import LiveEventBus
+
+        bus = LiveEventBus()
+        bus.register_snapshot_provider("calls", list)
+        return bus
+
+    def test_requires_admin(self, api_client: FlaskClient, mock_pbx_core: MagicMock) -> None:
+        mock_pbx_core.event_bus = self._bus()
+        assert api_client.get("/api/events/stream").status_code == 401
+
+        with patch(TOKEN_PATCH, return_value=_token_manager({"is_admin": False})):
+            response = api_client.get("/api/events/stream", headers={"Authorization": "Bearer t"})
+            assert response.status_code == 403
+
+    def test_stream_ticket_is_single_use(
+        self, api_client: FlaskClient, mock_pbx_core: MagicMock
+    ) -> None:
+        bus = self._bus()
+        bus.close()
+        mock_pbx_core.event_bus = bus
+
+        with patch(TOKEN_PATCH, return_value=_token_manager({"is_admin": True})):
+            # The session token itself is not accepted in the URL
+            assert api_client.get("/api/events/stream?token=t").status_code == 401
+            response = api_client.post("/api/events/ticket", headers={"Authorization": "Bearer t"})
+        assert response.status_code == 200
+        ticket = response.get_json()["ticket"]
+
+        assert api_client.get(f"/api/events/stream?ticket={ticket}").status_code == 200
+        assert api_client.get(f"/api/events/stream?ticket={ticket}").status_code == 401
+
+    def test_stream_ticket_expires(self, api_client: FlaskClient, mock_pbx_core: MagicMock) -> None:
+        from pbx.api.routes import events
+
+        mock_pbx_core.event_bus = self._bus()
+        with patch.object(events._tickets, "ttl", -1.0):
+            ticket = events._tickets.issue({"is_admin": True})
+        assert api_client.get(f"/api/events/stream?ticket={ticket}").status_code == 401
+
+    def test_stream_starts_with_snapshot(
+        self, api_client: FlaskClient, mock_pbx_core: MagicMock
+    ) -> None:
+        bus = self._bus()
+        bus.publish("call.started", {"call_id": "a"})
+        bus.close()
+        mock_pbx_core.event_bus = bus
+
+        with patch(TOKEN_PATCH, return_value=_token_manager({"is_admin": True})):
+            response = api_client.get("/api/events/stream", headers={"Authorization": "Bearer t"})
+
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+        assert response.headers["Cache-Control"] == "no-cache"
+        body = response.get_data(as_text=True)
+        assert body.startswith("retry: 3000\n\nid: 1\nevent: snapshot\n")
+        snapshot = json.loads(body.split("data: ", 1)[1].split("\n", 1)[0])
+        assert snapshot == {"seq": 1, "state": {"calls": []}}
+
+    def test_stream_resumes_from_last_event_id(
+        self, api_client: FlaskClient, mock_pbx_core: MagicMock
+    ) -> None:
+        bus = self._bus()
+        for call_id in ("a", "b", "c"):
+            bus.publish("call.started", {"call_id": call_id})
+        bus.close()
+        mock_pbx_core.event_bus = bus
+
+        with patch(TOKEN_PATCH, return_value=_token_manager({"is_admin": True})):
+            response = api_client.get(
+                "/api/events/stream", headers={"Authorization": "Bearer t", "Last-Event-ID": "1"}
+            )
+
+        body = response.get_data(as_text=True)
+        assert "event: snapshot" not in body
+        assert [line for line in body.splitlines() if line.startswith("id: ")] == [
+            "id: 2",
+            "id: 3",
+        ]
+        assert bus.subscribers == 0
@@ -42,6 +42,26 @@ def test_extension_register_unregister(self):
         assert ext.address is None
         assert ext.registration_time is None
 
+    def test_binding_time_changes_only_on_new_binding(self):
+        """Refresh REGISTERs keep binding_time; a new Call-ID resets it."""
+        from pbx.features.extensions import Extension
+
+        ext = Extension("1001", "John", {})
+        ext.register(("192.168.1.1", 5060), call_id="boot-1")
+        first = ext.binding_time
+
+        ext.register(("192.168.1.1", 5060), call_id="boot-1")
+        assert ext.binding_time is first
+        assert ext.registration_time >= first
+
+        ext.register(("192.168.1.1", 5060), call_id="boot-2")
+        assert ext.binding_time is not first
+        assert ext.call_id == "boot-2"
+
+        ext.unregister()
+        assert ext.binding_time is None
+        assert ext.call_id is None
+
     def test_extension_str(self):
         """__str__ shows registration status."""
         from pbx.features.extensions import Extension
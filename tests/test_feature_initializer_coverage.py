@@ -604,6 +604,30 @@ def test_skills_routing_disabled(self) -> None:
         _run_initialize_with_all_patches(pbx_core)
         assert pbx_core.skills_router is None
 
+    # ------------------------------------------------------------------ #
+    # Optional features: speech analytics
+    # ------------------------------------------------------------------ #
+    def test_speech_analytics_enabled(self) -> None:
+        """Speech analytics engine is shared on the core when enabled."""
+        mock_engine = MagicMock()
+        pbx_core = _make_pbx_core(config_overrides={"speech_analytics.enabled": True})
+
+        _run_initialize_with_all_patches(
+            pbx_core,
+            extra_patches={
+                "pbx.features.speech_analytics.SpeechAnalyticsEngine": mock_engine,
+            },
+        )
+
+        mock_engine.assert_called_once_with(pbx_core.database, pbx_core.config)
+        assert pbx_core.speech_analytics == mock_engine.return_value
+
+    def test_speech_analytics_disabled(self) -> None:
+        """Speech analytics engine is None when disabled."""
+        pbx_core = _make_pbx_core()
+        _run_initialize_with_all_patches(pbx_core)
+        assert pbx_core.speech_analytics is None
+
     # ------------------------------------------------------------------ #
     # Always-initialized lazy subsystems
     # ------------------------------------------------------------------ #
@@ -710,6 +734,7 @@ def _make_pbx_core(self, ad_config: dict[str, Any] | None = None) -> MagicMock:
             "integrations.active_directory.auto_provision": False,
             "integrations.active_directory.user_search_base": "ou=users",
             "integrations.active_directory.deactivate_removed_users": True,
+            "integrations.active_directory.startup_sync": "blocking",
         }
         if ad_config:
             defaults.update(ad_config)
@@ -886,6 +911,41 @@ def test_ad_config_file_fallback(self, mock_ad_cls: MagicMock) -> None:
         call_args = mock_ad_cls.call_args[0][0]
         assert call_args["config_file"] == "config.yml"
 
+    @patch("pbx.integrations.active_directory.ActiveDirectoryIntegration")
+    def test_ad_auto_provision_background_startup_sync(self, mock_ad_cls: MagicMock) -> None:
+        """Background startup sync waits for SIP, then runs on the AD integration's thread."""
+        from pbx.core.feature_initializer import FeatureInitializer
+
+        mock_ad = MagicMock()
+        mock_ad.enabled = True
+        mock_ad.auto_provision = True
+        mock_ad.sync_users.return_value = {"synced_count": 2}
+        mock_ad_cls.return_value = mock_ad
+
+        pbx_core = self._make_pbx_core(
+            {
+                "integrations.active_directory.startup_sync": "background",
+                "integrations.active_directory.sync_interval_minutes": 15,
+            }
+        )
+        FeatureInitializer._init_active_directory(pbx_core, pbx_core.config)
+
+        mock_ad.sync_users.assert_not_called()
+        mock_ad.start_background_sync.assert_not_called()
+        name, start_sync = pbx_core.feature_registry.defer.call_args[0]
+        assert name == "active_directory_sync"
+
+        # Started once the SIP server is up
+        start_sync()
+        periodic_sync, interval = mock_ad.start_background_sync.call_args[0]
+        assert periodic_sync == pbx_core.sync_ad_users
+        assert interval == 900
+
+        # The initial sync runs on the background thread
+        mock_ad.start_background_sync.call_args[1]["initial_sync"]()
+        mock_ad.sync_users.assert_called_once()
+        pbx_core.extension_registry.reload.assert_called_once()
+
     @patch("pbx.integrations.active_directory.ActiveDirectoryIntegration")
     def test_ad_config_builds_correct_dict(self, mock_ad_cls: MagicMock) -> None:
         """Verify all AD config keys are passed to ActiveDirectoryIntegration."""
@@ -909,6 +969,10 @@ def test_ad_config_builds_correct_dict(self, mock_ad_cls: MagicMock) -> None:
             "integrations.active_directory.auto_provision",
             "integrations.active_directory.user_search_base",
             "integrations.active_directory.deactivate_removed_users",
+            "integrations.active_directory.sync_mode",
+            "integrations.active_directory.page_size",
+            "integrations.active_directory.full_sync_interval_hours",
+            "integrations.active_directory.sync_state_file",
             "config_file",
         }
         assert set(call_args.keys()) == expected_keys
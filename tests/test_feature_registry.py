@@ -0,0 +1,286 @@
+"""Tests for the startup feature registry in pbx/core/feature_registry.py."""
+
+import contextlib
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pbx.core.feature_registry import FeatureRegistry
+
+
+class _Clock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _registry(workers: int = 4, **kwargs: object) -> FeatureRegistry:
+    with patch("pbx.core.feature_registry.get_logger", return_value=MagicMock()):
+        return FeatureRegistry(workers=workers, **kwargs)
+
+
+@pytest.mark.unit
+class TestFeatureRegistry:
+    """Tests for dependency order, concurrency, laziness and deferral."""
+
+    def test_requirements_built_first(self) -> None:
+        registry = _registry(workers=4)
+        built: list[str] = []
+        lock = threading.Lock()
+
+        def step(name: str, delay: float = 0.0):
+            def init() -> None:
+                time.sleep(delay)
+                with lock:
+                    built.append(name)
+
+            return init
+
+        registry.register("monitor", step("monitor"), requires=("webhooks", "cdr"))
+        registry.register("webhooks", step("webhooks", 0.05))
+        registry.register("cdr", step("cdr", 0.02))
+        registry.register("stats", step("stats"), requires=("cdr",))
+
+        registry.initialize()
+
+        assert sorted(built) == ["cdr", "monitor", "stats", "webhooks"]
+        assert built.index("monitor") > max(built.index("webhooks"), built.index("cdr"))
+        assert built.index("stats") > built.index("cdr")
+
+    def test_independent_features_built_concurrently_within_bound(self) -> None:
+        registry = _registry(workers=3)
+        running = 0
+        peak = 0
+        lock = threading.Lock()
+        # Passes only if three initializers are in flight at the same time
+        barrier = threading.Barrier(3, timeout=2)
+
+        def init() -> None:
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            with contextlib.suppress(threading.BrokenBarrierError):
+                barrier.wait()
+            time.sleep(0.01)
+            with lock:
+                running -= 1
+
+        for i in range(9):
+            registry.register(f"feature-{i}", init)
+
+        registry.initialize()
+
+        assert peak == 3
+        threads = {entry["thread"] for entry in registry.get_profile()["features"]}
+        assert all(name.startswith("feature-init") for name in threads)
+
+    def test_serial_mode_keeps_registration_order(self) -> None:
+        registry = _registry(workers=1)
+        built: list[str] = []
+        for name in ("voicemail", "conference", "queues"):
+            registry.register(name, lambda name=name: built.append(name))
+
+        registry.initialize()
+
+        assert built == ["voicemail", "conference", "queues"]
+
+    def test_lazy_feature_built_once_on_first_use(self) -> None:
+        registry = _registry()
+        owner = MagicMock()
+        calls = []
+
+        def init() -> None:
+            calls.append(threading.current_thread().name)
+            time.sleep(0.05)
+            owner.statistics_engine = "engine"
+
+        registry.register("cdr", lambda: None)
+        registry.register("statistics", init, provides=("statistics_engine",), lazy=True)
+        registry.initialize()
+        assert calls == []
+        assert registry.get_profile()["lazy_pending"] == ["statistics"]
+
+        threads = [threading.Thread(target=registry.resolve, args=("statistics_engine",))]
+        threads.append(threading.Thread(target=registry.resolve, args=("statistics_engine",)))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert not registry.resolve("no_such_attribute")
+        assert registry.get_profile()["lazy_pending"] == []
+
+    def test_eager_feature_requiring_lazy_one_builds_it(self) -> None:
+        registry = _registry()
+        built: list[str] = []
+        registry.register("phone_book", lambda: built.append("phone_book"), lazy=True)
+        registry.register("crm", lambda: built.append("crm"), requires=("phone_book",))
+
+        registry.initialize()
+
+        assert built == ["phone_book", "crm"]
+
+    def test_failure_raised_after_other_features_finish(self) -> None:
+        registry = _registry(workers=2)
+        finished = threading.Event()
+
+        def broken() -> None:
+            raise OSError("no such device")
+
+        def slow() -> None:
+            time.sleep(0.05)
+            finished.set()
+
+        registry.register("broken", broken)
+        registry.register("slow", slow)
+        registry.register("dependent", lambda: None, requires=("broken",))
+
+        with pytest.raises(OSError, match="no such device"):
+            registry.initialize()
+
+        assert finished.is_set()
+        profile = registry.get_profile()
+        assert profile["failed"] == ["broken", "dependent"]
+        by_name = {entry["name"]: entry for entry in profile["features"]}
+        assert by_name["broken"]["error"] == "no such device"
+
+    def test_bad_requirements_rejected(self) -> None:
+        registry = _registry()
+        registry.register("a", lambda: None, requires=("b",))
+        registry.register("b", lambda: None, requires=("a",))
+        with pytest.raises(ValueError, match="loop"):
+            registry.initialize()
+
+        registry = _registry()
+        registry.register("a", lambda: None, requires=("missing",))
+        with pytest.raises(ValueError, match="unknown feature"):
+            registry.initialize()
+
+        with pytest.raises(ValueError, match="already registered"):
+            registry.register("a", lambda: None)
+
+    def test_deferred_tasks_wait_for_run_deferred(self) -> None:
+        registry = _registry()
+        ran = threading.Event()
+        late = threading.Event()
+        registry.defer("directory_sync", ran.set)
+
+        registry.initialize()
+        assert not ran.wait(0.05)
+        assert registry.get_profile()["deferred_pending"] == 1
+
+        registry.run_deferred()
+        assert ran.wait(2)
+        # Deferred once startup is over: runs straight away
+        registry.defer("model_load", late.set)
+        assert late.wait(2)
+        registry.shutdown()
+
+        registry.defer("after_shutdown", MagicMock(side_effect=AssertionError))
+        deadline = time.monotonic() + 2
+        while registry.get_profile()["deferred_pending"] > 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        profile = registry.get_profile()
+        modes = {entry["name"]: entry["mode"] for entry in profile["features"]}
+        assert modes["directory_sync"] == modes["model_load"] == "deferred"
+        assert profile["deferred_pending"] == 1
+
+    def test_deferred_failure_logged_not_raised(self) -> None:
+        registry = _registry()
+        done = threading.Event()
+
+        def broken() -> None:
+            done.set()
+            raise RuntimeError("directory unreachable")
+
+        registry.defer("directory_sync", broken)
+        registry.run_deferred()
+        assert done.wait(2)
+        registry.shutdown()
+
+        deadline = time.monotonic() + 2
+        while not registry.get_profile()["failed"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert registry.get_profile()["failed"] == ["directory_sync"]
+        registry.logger.error.assert_called_once()
+
+    def test_profile_lists_slowest_first(self) -> None:
+        clock = _Clock()
+        registry = _registry(workers=1, clock=clock)
+
+        def step(seconds: float):
+            def init() -> None:
+                clock.now += seconds
+
+            return init
+
+        registry.register("cdr", step(0.01))
+        registry.register("voicemail", step(0.4))
+        registry.register("trunks", step(0.1))
+        registry.register("statistics", step(1.0), lazy=True)
+        registry.initialize()
+        registry.record("api_routes", 0.25)
+
+        profile = registry.get_profile()
+
+        assert [entry["name"] for entry in profile["features"]] == [
+            "voicemail",
+            "trunks",
+            "cdr",
+            "statistics",
+        ]
+        assert profile["features"][0]["seconds"] == 0.4
+        assert profile["features"][1]["started"] == pytest.approx(0.41)
+        assert profile["initialize_seconds"] == pytest.approx(0.51)
+        assert profile["phases"] == [
+            {"name": "api_routes", "mode": "phase", "status": "ready", "seconds": 0.25}
+        ]
+
+
+@pytest.mark.unit
+class TestPBXCoreLazyFeatures:
+    """PBXCore builds lazy features when an attribute is first looked up."""
+
+    def test_getattr_builds_lazy_feature(self) -> None:
+        from pbx.core.pbx import PBXCore
+
+        pbx_core = PBXCore.__new__(PBXCore)
+        registry = _registry()
+        engine = MagicMock()
+
+        def init() -> None:
+            pbx_core.statistics_engine = engine
+
+        registry.register("statistics", init, provides=("statistics_engine",), lazy=True)
+        registry.initialize()
+        pbx_core.feature_registry = registry
+
+        assert pbx_core.statistics_engine is engine
+        assert getattr(pbx_core, "not_a_feature", None) is None
+        with pytest.raises(AttributeError):
+            _ = pbx_core.not_a_feature
+
+    def test_feature_reading_its_own_attribute_does_not_hang(self) -> None:
+        from pbx.core.pbx import PBXCore
+
+        pbx_core = PBXCore.__new__(PBXCore)
+        registry = _registry()
+        seen = []
+
+        def init() -> None:
+            seen.append(hasattr(pbx_core, "phone_book"))
+            pbx_core.phone_book = None
+
+        registry.register("phone_book", init, provides=("phone_book",), lazy=True)
+        pbx_core.feature_registry = registry
+
+        assert pbx_core.phone_book is None
+        assert seen == [False]
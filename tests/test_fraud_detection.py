@@ -0,0 +1,169 @@
+"""Tests for the bounded, indexed fraud detection state."""
+
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pbx.features.fraud_detection import FraudDetectionSystem, _SlidingWindow
+
+
+def _fraud(tmp_path: Path, **settings: object) -> FraudDetectionSystem:
+    config = {
+        "features": {
+            "fraud_detection": {
+                "enabled": True,
+                "state_file": str(tmp_path / "fraud_state.json"),
+                **settings,
+            }
+        }
+    }
+    with patch("pbx.features.fraud_detection.get_logger", return_value=MagicMock()):
+        return FraudDetectionSystem(config)
+
+
+def _call(extension: str, to: str, minutes_ago: float = 0, cost: float = 0.0) -> dict:
+    return {
+        "from": extension,
+        "to": to,
+        "duration": 60,
+        "cost": cost,
+        "timestamp": datetime.now(UTC) - timedelta(minutes=minutes_ago),
+    }
+
+
+@pytest.mark.unit
+class TestSlidingWindow:
+    """Tests for the time-bucketed ring buffer."""
+
+    def test_values_expire_with_their_bucket(self) -> None:
+        window = _SlidingWindow(60, 6, 2)
+        window.add(1000, 1, 5.0)
+        window.add(1025, 1, 2.5)
+
+        assert window.total(1030) == 2
+        assert window.total(1030, 1) == 7.5
+        # Each value falls out once its 10s bucket leaves the window
+        assert window.total(1065) == 1
+        assert window.total(1085) == 0
+        assert window.is_empty(5000)
+
+    def test_values_older_than_window_are_ignored(self) -> None:
+        window = _SlidingWindow(60, 6, 1)
+        window.add(1000, 1)
+        window.add(900, 1)
+        assert window.total(1000) == 1
+
+
+@pytest.mark.unit
+class TestFraudDetectionState:
+    """Tests for FraudDetectionSystem counters, blocking and persistence."""
+
+    def test_window_thresholds(self, tmp_path: Path) -> None:
+        fraud = _fraud(
+            tmp_path, max_calls_per_hour=3, max_international_calls=1, max_cost_per_day=10.0
+        )
+        # Calls older than an hour count toward the day but not the hour
+        for _ in range(5):
+            fraud.analyze_call(_call("1001", "+441234567", minutes_ago=120, cost=3.0))
+
+        result = fraud.analyze_call(_call("1001", "2000"))
+        assert not any("frequency" in a for a in result["alerts"])
+        assert any("High daily cost: $15.00" in a for a in result["alerts"])
+
+        result = fraud.analyze_call(_call("1001", "011441234567"))
+        assert any("6 in last 24 hours" in a for a in result["alerts"])
+
+        for _ in range(2):
+            result = fraud.analyze_call(_call("1001", "2000"))
+        assert any("4 calls in last hour" in a for a in result["alerts"])
+
+        stats = fraud.get_extension_statistics("1001")
+        assert stats["total_calls"] == 9
+        assert stats["calls_24h"] == 9
+        assert stats["international_calls"] == 6
+        assert stats["total_cost"] == 15.0
+
+    def test_history_and_alerts_are_bounded(self, tmp_path: Path) -> None:
+        fraud = _fraud(tmp_path, max_history_per_extension=5, max_alerts=3)
+        for _ in range(20):
+            fraud.analyze_call({**_call("1001", "+15551234"), "duration": 99999})
+
+        assert len(fraud.call_history["1001"]) == 5
+        assert len(fraud.alerts) <= 3
+        assert fraud.get_extension_statistics("1001")["total_calls"] == 20
+
+    def test_compaction_forgets_idle_extensions(self, tmp_path: Path) -> None:
+        fraud = _fraud(tmp_path)
+        fraud.analyze_call(_call("1001", "2000", minutes_ago=60 * 24 * 40))
+        fraud.analyze_call(_call("1002", "2000"))
+
+        fraud.cleanup_old_data(days=30)
+
+        assert "1001" not in fraud.call_history
+        assert fraud.get_extension_statistics("1001") == {"total_calls": 0}
+        assert fraud.get_extension_statistics("1002")["total_calls"] == 1
+        assert fraud.get_statistics()["total_extensions_tracked"] == 1
+
+    def test_blocked_prefixes(self, tmp_path: Path) -> None:
+        fraud = _fraud(tmp_path)
+        fraud.add_blocked_pattern("1900", "Premium rate")
+        fraud.add_blocked_pattern("19", "Broad")
+        fraud.add_blocked_pattern("011882", "Satellite")
+
+        assert fraud.is_number_blocked("19005551234") == (True, "Premium rate")
+        assert fraud.is_number_blocked("1955") == (True, "Broad")
+        assert fraud.is_number_blocked("0118821234") == (True, "Satellite")
+        assert fraud.is_number_blocked("01144") == (False, None)
+
+        assert fraud.remove_blocked_pattern(0)
+        assert fraud.is_number_blocked("19005551234") == (True, "Broad")
+        assert not fraud.remove_blocked_pattern(5)
+
+    def test_state_survives_restart(self, tmp_path: Path) -> None:
+        fraud = _fraud(tmp_path, max_calls_per_hour=2)
+        for _ in range(3):
+            fraud.analyze_call(_call("1001", "+15551234", cost=1.5))
+        fraud.add_blocked_pattern("1900", "Premium rate")
+        fraud.save_state()
+
+        restored = _fraud(tmp_path, max_calls_per_hour=2)
+
+        assert restored.get_extension_statistics("1001") == fraud.get_extension_statistics("1001")
+        assert restored.is_number_blocked("19001234") == (True, "Premium rate")
+        result = restored.analyze_call(_call("1001", "2000"))
+        assert any("4 calls in last hour" in a for a in result["alerts"])
+
+    def test_corrupt_state_is_ignored(self, tmp_path: Path) -> None:
+        (tmp_path / "fraud_state.json").write_text("{not json")
+        fraud = _fraud(tmp_path)
+        assert fraud.get_statistics()["total_extensions_tracked"] == 0
+
+    def test_call_path_does_no_file_io(self, tmp_path: Path) -> None:
+        fraud = _fraud(tmp_path, compaction_interval=3600)
+        with patch.object(fraud, "save_state") as save_state:
+            for _ in range(5):
+                fraud.analyze_call({**_call("1001", "+15551234"), "duration": 99999})
+        save_state.assert_not_called()
+        assert not (tmp_path / "fraud_state.json").exists()
+
+        fraud.stop()
+        assert (tmp_path / "fraud_state.json").exists()
+        assert fraud.get_statistics()["high_risk_alerts"] == len(fraud.get_alerts())
+
+    def test_maintenance_compacts_and_saves(self, tmp_path: Path) -> None:
+        fraud = _fraud(tmp_path)
+        fraud.stop()
+        fraud.analyze_call(_call("1001", "2000", minutes_ago=60 * 24 * 40))
+        fraud.analyze_call(_call("1002", "2000"))
+
+        # One maintenance pass, then stop
+        fraud._stop_event = MagicMock()
+        fraud._stop_event.wait.side_effect = [False, True]
+        fraud._maintenance_loop()
+
+        assert "1001" not in fraud.call_history
+        restored = _fraud(tmp_path)
+        restored.stop()
+        assert restored.get_statistics()["total_extensions_tracked"] == 1
@@ -0,0 +1,426 @@
+"""Tests for the event-driven IVR runtime in pbx/core/ivr_runtime.py."""
+
+import sys
+import threading
+import time
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pbx.core.ivr_runtime import IVRRuntime, IVRSession
+
+
+class _Clock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _player(frames: int = 3) -> MagicMock:
+    player = MagicMock()
+    player.load_prompt.return_value = ([b"\xff" * 160] * frames, 0, 160)
+    player.send_frame.return_value = True
+    return player
+
+
+class _RecordingSession(IVRSession):
+    """Session that records every hook call"""
+
+    def __init__(self, call_id: str, call: Any = None) -> None:
+        super().__init__(call_id, call)
+        self.events: list[tuple] = []
+
+    def on_start(self) -> None:
+        self.events.append(("start",))
+
+    def on_digit(self, digit: str) -> None:
+        self.events.append(("digit", digit))
+
+    def on_timer(self, name: str) -> None:
+        self.events.append(("timer", name))
+
+    def on_prompt_done(self, name: str, played: bool) -> None:
+        self.events.append(("prompt", name, played))
+
+    def on_work_done(self, name: str, result: Any, error: Exception | None) -> None:
+        self.events.append(("work", name, result, threading.current_thread().name))
+
+    def on_work_discarded(self, name: str, result: Any, error: Exception | None) -> None:
+        self.events.append(("discarded", name, result))
+
+    def on_error(self, error: Exception) -> None:
+        self.events.append(("error", str(error)))
+
+    def on_finish(self) -> None:
+        self.events.append(("finish",))
+
+
+class _BrokenSession(_RecordingSession):
+    """Session whose timer hook raises"""
+
+    def __init__(self, call_id: str) -> None:
+        super().__init__(call_id)
+        self.errors: list[str] = []
+
+    def on_timer(self, name: str) -> None:
+        raise ValueError("boom")
+
+    def on_error(self, error: Exception) -> None:
+        self.errors.append(str(error))
+
+
+def _runtime() -> IVRRuntime:
+    with patch("pbx.core.ivr_runtime.get_logger", return_value=MagicMock()):
+        return IVRRuntime(clock=_Clock(), threaded=False)
+
+
+def _advance(runtime: IVRRuntime, seconds: float) -> None:
+    """Move the fake clock forward, running everything that falls due on the way"""
+    end = runtime.clock.now + seconds
+    runtime.run_pending()
+    while (deadline := runtime.next_deadline()) is not None and deadline <= end:
+        runtime.clock.now = max(runtime.clock.now, deadline)
+        runtime.run_pending()
+    runtime.clock.now = end
+    runtime.run_pending()
+
+
+@pytest.mark.unit
+class TestIVRRuntime:
+    """Tests for session scheduling on a fake clock."""
+
+    def test_timers_fire_in_deadline_order(self) -> None:
+        runtime = _runtime()
+        session = runtime.add(_RecordingSession("call-1"))
+        runtime.run_pending()
+
+        session.set_timer("late", 2.0)
+        session.set_timer("early", 1.0)
+        session.set_timer("cancelled", 0.5)
+        session.cancel_timer("cancelled")
+        # Restarting a timer replaces the pending one
+        session.set_timer("late", 1.5)
+        _advance(runtime, 5.0)
+
+        assert session.events == [("start",), ("timer", "early"), ("timer", "late")]
+        assert not session.has_timer("late")
+        assert runtime.next_deadline() is None
+
+    def test_digits_held_until_accepted(self) -> None:
+        runtime = _runtime()
+        call = MagicMock()
+        call.dtmf_info_queue = ["1", "2"]
+        session = runtime.add(_RecordingSession("call-1", call))
+
+        assert runtime.deliver_digit("call-1", "3")
+        runtime.run_pending()
+        assert session.events == [("start",)]
+
+        session.accept_digits()
+        runtime.run_pending()
+
+        # Digits queued before the session existed come first
+        assert session.events[1:] == [("digit", "1"), ("digit", "2"), ("digit", "3")]
+        assert call.dtmf_info_queue == []
+        assert not runtime.deliver_digit("call-2", "4")
+
+    def test_prompts_play_in_order_on_media_clock(self) -> None:
+        runtime = _runtime()
+        session = runtime.add(_RecordingSession("call-1"))
+        runtime.run_pending()
+        player = _player(frames=3)
+
+        session.play("first", player, b"RIFF")
+        session.play("second", player, b"RIFF")
+        assert session.playing == "first"
+        _advance(runtime, 0.2)
+
+        assert player.send_frame.call_count == 6
+        assert session.events[1:] == [("prompt", "first", True), ("prompt", "second", True)]
+        assert session.playing is None
+        assert runtime.get_statistics()["frames_sent"] == 6
+        assert runtime.next_deadline() is None
+
+    def test_prompt_that_fails_to_load_still_completes(self) -> None:
+        runtime = _runtime()
+        session = runtime.add(_RecordingSession("call-1"))
+        player = _player()
+        player.load_prompt.return_value = None
+
+        assert not session.play("missing", player, "/nonexistent.wav")
+        runtime.run_pending()
+
+        assert ("prompt", "missing", False) in session.events
+        player.send_frame.assert_not_called()
+
+    def test_send_failure_ends_prompt(self) -> None:
+        runtime = _runtime()
+        session = runtime.add(_RecordingSession("call-1"))
+        player = _player(frames=10)
+        player.send_frame.return_value = False
+
+        session.play("menu", player, b"RIFF")
+        _advance(runtime, 1.0)
+
+        assert player.send_frame.call_count == 1
+        assert ("prompt", "menu", False) in session.events
+
+    def test_media_clock_resyncs_after_stall(self) -> None:
+        runtime = _runtime()
+        session = runtime.add(_RecordingSession("call-1"))
+        player = _player(frames=100)
+        session.play("menu", player, b"RIFF")
+        runtime.run_pending()
+
+        # A 1 s stall is not made up with a 50-frame burst
+        runtime.clock.now += 1.0
+        runtime.run_pending()
+
+        assert player.send_frame.call_count < 10
+
+    def test_stop_prompts_barges_in(self) -> None:
+        runtime = _runtime()
+        session = runtime.add(_RecordingSession("call-1"))
+        player = _player(frames=50)
+        session.play("menu", player, b"RIFF")
+        _advance(runtime, 0.1)
+
+        session.stop_prompts()
+        sent = player.send_frame.call_count
+        _advance(runtime, 1.0)
+
+        assert player.send_frame.call_count == sent
+        assert not any(event[0] == "prompt" for event in session.events)
+
+    def test_hangup_finishes_session(self) -> None:
+        runtime = _runtime()
+        session = runtime.add(_RecordingSession("call-1"))
+        session.set_timer("menu", 1.0)
+
+        assert runtime.hangup("call-1")
+        runtime.run_pending()
+
+        assert session.finished
+        assert session.wait(0)
+        assert session.events == [("start",), ("finish",)]
+        assert runtime.get_session("call-1") is None
+        assert not runtime.hangup("call-1")
+        assert runtime.next_deadline() is None
+
+    def test_failing_hook_finishes_only_its_session(self) -> None:
+        runtime = _runtime()
+        broken = runtime.add(_BrokenSession("call-1"))
+        healthy = runtime.add(_RecordingSession("call-2"))
+        broken.set_timer("menu", 0.1)
+        healthy.set_timer("menu", 0.2)
+
+        _advance(runtime, 1.0)
+
+        assert broken.finished
+        assert broken.errors == ["boom"]
+        assert not healthy.finished
+        assert ("timer", "menu") in healthy.events
+
+    def test_play_later_keeps_queue_order(self) -> None:
+        runtime = _runtime()
+        session = runtime.add(_RecordingSession("call-1"))
+        runtime.run_pending()
+        player = _player(frames=2)
+        loaded: list[str] = []
+
+        def audio() -> bytes:
+            loaded.append("menu")
+            return b"RIFF"
+
+        session.play_later("menu", player, audio)
+        session.play("beep", player, b"RIFF")
+        _advance(runtime, 0.2)
+
+        assert loaded == ["menu"]
+        assert session.events[1:] == [("prompt", "menu", True), ("prompt", "beep", True)]
+
+    def test_play_later_failures(self) -> None:
+        runtime = _runtime()
+        session = runtime.add(_RecordingSession("call-1"))
+        player = _player()
+        player.load_prompt.return_value = None
+
+        # Undecodable audio: the flow carries on
+        session.play_later("missing", player, "/nonexistent.wav")
+        runtime.run_pending()
+        assert ("prompt", "missing", False) in session.events
+        assert not session.finished
+
+        # An exception while producing the audio fails the session
+        session.play_later("generated", player, MagicMock(side_effect=ValueError("no tone")))
+        runtime.run_pending()
+        assert ("error", "no tone") in session.events
+        assert session.finished
+
+    def test_work_result_delivered_as_event(self) -> None:
+        runtime = _runtime()
+        session = runtime.add(_RecordingSession("call-1"))
+        runtime.run_pending()
+
+        session.run_in_worker("lookup", lambda a, b: a + b, 2, 3)
+        runtime.run_pending()
+        assert session.events[-1][:3] == ("work", "lookup", 5)
+
+        # Finished before the work came back: the result is handed over for cleanup
+        session.finish()
+        session.run_in_worker("open_media", lambda: "player")
+        runtime.run_pending()
+        assert session.events[-1] == ("discarded", "open_media", "player")
+
+    def test_worker_pool_keeps_blocking_work_off_scheduler(self) -> None:
+        with patch("pbx.core.ivr_runtime.get_logger", return_value=MagicMock()):
+            runtime = IVRRuntime(workers=2)
+        release = threading.Event()
+        session = _RecordingSession("call-1")
+        other = _RecordingSession("call-2")
+        try:
+            runtime.add(session)
+            runtime.add(other)
+            session.run_in_worker("end_call", release.wait, 5)
+            # The scheduler thread still serves other sessions meanwhile
+            assert runtime.hangup("call-2")
+            assert other.wait(5)
+            assert not any(event[0] == "work" for event in session.events)
+
+            deadline = time.monotonic() + 5
+
+            release.set()
+            while not any(e[0] == "work" for e in session.events) and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            runtime.stop()
+
+        work = next(event for event in session.events if event[0] == "work")
+        assert work[2] is True
+        assert work[3] == "ivr-runtime"
+
+    def test_stop_finishes_all_sessions(self) -> None:
+        runtime = _runtime()
+        sessions = [runtime.add(_RecordingSession(f"call-{i}")) for i in range(3)]
+
+        runtime.stop()
+
+        assert all(session.finished for session in sessions)
+        assert runtime.get_statistics()["active_sessions"] == 0
+
+
+class _MenuSession(IVRSession):
+    """Wait for one digit or a timeout"""
+
+    def __init__(self, call_id: str) -> None:
+        super().__init__(call_id)
+        self.digit: str | None = None
+        self.digit_thread: threading.Thread | None = None
+        self.timed_out = False
+
+    def on_start(self) -> None:
+        self.accept_digits()
+        self.set_timer("input_timeout", 30.0)
+
+    def on_digit(self, digit: str) -> None:
+        self.digit = digit
+        self.digit_thread = threading.current_thread()
+        self.finish()
+
+    def on_timer(self, name: str) -> None:
+        self.timed_out = True
+        self.finish()
+
+
+@pytest.mark.unit
+class TestIVRRuntimeConcurrency:
+    """Many simultaneous sessions share one scheduler thread."""
+
+    SESSIONS = 2000
+
+    def test_concurrent_sessions_on_one_thread(self) -> None:
+        clock = _Clock()
+        with patch("pbx.core.ivr_runtime.get_logger", return_value=MagicMock()):
+            runtime = IVRRuntime(clock=clock)
+        waits: list[float | None] = []
+        condition_wait = runtime._lock.wait
+
+        def recording_wait(timeout: float | None = None) -> bool:
+            waits.append(timeout)
+            return condition_wait(timeout)
+
+        runtime._lock.wait = recording_wait
+        sessions = [_MenuSession(f"call-{i}") for i in range(self.SESSIONS)]
+        try:
+            for session in sessions:
+                runtime.add(session)
+            scheduler = runtime._thread
+
+            for session in sessions:
+                assert runtime.deliver_digit(session.call_id, "1")
+
+            assert all(session.wait(10) for session in sessions)
+        finally:
+            runtime.stop()
+
+        assert all(session.digit == "1" for session in sessions)
+        assert {session.digit_thread for session in sessions} == {scheduler}
+        assert not any(session.timed_out for session in sessions)
+        # The clock never moved, so the scheduler only ever slept until the
+        # 30 s input timeouts: the digits themselves had to wake it
+        assert all(timeout is None or timeout >= 30 for timeout in waits)
+        stats = runtime.get_statistics()
+        assert stats["active_sessions"] == 0
+        assert stats["pending_timers"] == 0
+
+    def test_auto_attendant_sessions_share_media_clock(self) -> None:
+        """Auto attendant menus for many calls run off a single fake clock."""
+        from pbx.core.auto_attendant_handler import AutoAttendantHandler
+
+        pbx = MagicMock()
+        pbx.auto_attendant._get_audio_file.return_value = None
+        pbx.auto_attendant.timeout = 10
+        pbx.auto_attendant.handle_dtmf.return_value = {
+            "action": "transfer",
+            "destination": "8001",
+            "session": {"state": "TRANSFERRING"},
+        }
+        pbx.transfer_call.return_value = True
+        pbx.ivr_runtime = runtime = _runtime()
+        handler = AutoAttendantHandler(pbx)
+        player = _player(frames=50)  # 1 s prompts
+
+        rtp_handler = MagicMock()
+        rtp_handler.RTPPlayer.return_value = player
+        rtp_handler.RTPDTMFListener.return_value.start.return_value = True
+        with patch.dict(sys.modules, {"pbx.rtp.handler": rtp_handler}):
+            sessions = []
+            for i in range(500):
+                call = MagicMock()
+                call.dtmf_info_queue = []
+                call.aa_rtp_port = 30000 + 2 * i
+                sessions.append(
+                    handler._auto_attendant_session(
+                        f"call-{i}", call, {"session": {"state": "MAIN_MENU"}, "file": None}
+                    )
+                )
+
+            # 0.5 s to settle plus 0.1 s of greeting: one frame per call per tick
+            _advance(runtime, 0.6)
+            assert player.send_frame.call_count == 500 * 6
+            assert all(session.playing == "welcome" for session in sessions)
+
+            for session in sessions:
+                runtime.deliver_digit(session.call_id, "1")
+            _advance(runtime, 5.0)
+
+        assert all(session.finished and session.transferred for session in sessions)
+        assert pbx.transfer_call.call_count == 500
+        returned = sorted(args[0] for args, _ in pbx.rtp_relay.release_port.call_args_list)
+        assert returned == [30000 + 2 * i for i in range(500)]
+        assert runtime.get_statistics()["active_sessions"] == 0
@@ -440,59 +440,53 @@ def test_set_length_clamps_to_max(self, mock_get_logger: MagicMock) -> None:
         assert buf.current_length_ms == 200
 
     @patch("pbx.rtp.jitter_buffer.get_logger")
-    def test_insert_ordered_empty_buffer(self, mock_get_logger: MagicMock) -> None:
+    def test_insert_into_empty_buffer(self, mock_get_logger: MagicMock) -> None:
         """Test inserting into an empty buffer."""
         buf = JitterBuffer()
-        packet = JitterBufferPacket(b"\x01", 1, 160, 1000.0)
 
-        buf._insert_ordered(packet)
+        buf.put(b"\x01", sequence=1, timestamp=160)
 
         assert len(buf.buffer) == 1
         assert buf.buffer[0].sequence == 1
+        assert buf.head == 1
 
     @patch("pbx.rtp.jitter_buffer.get_logger")
-    def test_insert_ordered_at_beginning(self, mock_get_logger: MagicMock) -> None:
-        """Test inserting a packet that should go at the beginning."""
+    def test_insert_at_beginning_moves_head_back(self, mock_get_logger: MagicMock) -> None:
+        """Test that a packet ahead of the first one becomes the head before playout."""
         buf = JitterBuffer()
-        buf.buffer.append(JitterBufferPacket(b"\x02", 5, 800, 1000.0))
-        buf.buffer.append(JitterBufferPacket(b"\x03", 10, 1600, 1000.1))
+        buf.put(b"\x02", sequence=5, timestamp=800)
+        buf.put(b"\x03", sequence=10, timestamp=1600)
 
-        new_packet = JitterBufferPacket(b"\x01", 1, 160, 999.9)
-        buf._insert_ordered(new_packet)
+        buf.put(b"\x01", sequence=1, timestamp=160)
 
-        assert buf.buffer[0].sequence == 1
-        assert buf.buffer[1].sequence == 5
-        assert buf.buffer[2].sequence == 10
+        assert [p.sequence for p in buf.buffer] == [1, 5, 10]
+        assert buf.head == 1
 
     @patch("pbx.rtp.jitter_buffer.get_logger")
-    def test_insert_ordered_in_middle(self, mock_get_logger: MagicMock) -> None:
-        """Test inserting a packet in the middle of the buffer."""
+    def test_insert_in_middle(self, mock_get_logger: MagicMock) -> None:
+        """Test inserting a packet into a gap."""
         buf = JitterBuffer()
-        buf.buffer.append(JitterBufferPacket(b"\x01", 1, 160, 1000.0))
-        buf.buffer.append(JitterBufferPacket(b"\x03", 10, 1600, 1000.2))
+        buf.put(b"\x01", sequence=1, timestamp=160)
+        buf.put(b"\x03", sequence=10, timestamp=1600)
 
-        new_packet = JitterBufferPacket(b"\x02", 5, 800, 1000.1)
-        buf._insert_ordered(new_packet)
+        buf.put(b"\x02", sequence=5, timestamp=800)
 
-        assert buf.buffer[0].sequence == 1
-        assert buf.buffer[1].sequence == 5
-        assert buf.buffer[2].sequence == 10
+        assert [p.sequence for p in buf.buffer] == [1, 5, 10]
 
     @patch("pbx.rtp.jitter_buffer.get_logger")
-    def test_insert_ordered_at_end(self, mock_get_logger: MagicMock) -> None:
-        """Test inserting a packet at the end."""
+    def test_insert_across_sequence_wrap(self, mock_get_logger: MagicMock) -> None:
+        """Test ordering across the 16-bit sequence wrap."""
         buf = JitterBuffer()
-        buf.buffer.append(JitterBufferPacket(b"\x01", 1, 160, 1000.0))
-        buf.buffer.append(JitterBufferPacket(b"\x02", 5, 800, 1000.1))
+        buf.put(b"\x01", sequence=65534, timestamp=160)
+        buf.put(b"\x03", sequence=1, timestamp=640)
+        buf.put(b"\x02", sequence=65535, timestamp=320)
+        buf.put(b"\x04", sequence=0, timestamp=480)
 
-        new_packet = JitterBufferPacket(b"\x03", 20, 3200, 1000.2)
-        buf._insert_ordered(new_packet)
-
-        assert buf.buffer[2].sequence == 20
+        assert [p.sequence for p in buf.buffer] == [65534, 65535, 0, 1]
 
     @patch("pbx.rtp.jitter_buffer.get_logger")
     @patch("pbx.rtp.jitter_buffer.time")
-    def test_update_statistics_without_last_timestamp(
+    def test_update_statistics_before_playout(
         self, mock_time: MagicMock, mock_get_logger: MagicMock
     ) -> None:
         """Test _update_statistics when last_timestamp is None (no jitter update)."""
@@ -502,12 +496,12 @@ def test_update_statistics_without_last_timestamp(
         mock_time.time.return_value = 1000.0
         buf.put(b"\x01" * 160, sequence=1, timestamp=8000)
 
-        # Second packet: last_timestamp is None so no timestamp_diff computed
+        # Second packet arrives exactly one packet interval later
         mock_time.time.return_value = 1000.02
         buf.put(b"\x02" * 160, sequence=2, timestamp=8160)
 
-        # Jitter should still be 0 because last_timestamp is None
-        assert buf.jitter_estimate == 0.0
+        # Jitter is measured between arrivals, without waiting for playout
+        assert buf.jitter_estimate == pytest.approx(0.0, abs=1e-9)
 
     @patch("pbx.rtp.jitter_buffer.get_logger")
     def test_non_adaptive_mode_does_not_change_buffer(self, mock_get_logger: MagicMock) -> None:
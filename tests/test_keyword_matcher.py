@@ -0,0 +1,128 @@
+"""Tests for pbx.utils.keyword_matcher and its use in speech analytics and call tagging."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+@pytest.mark.unit
+class TestKeywordMatcher:
+    """Tests for KeywordMatcher."""
+
+    def test_finds_overlapping_keywords_in_one_pass(self):
+        """Keywords sharing prefixes and suffixes are all reported."""
+        from pbx.utils.keyword_matcher import KeywordMatcher
+
+        matcher = KeywordMatcher(["he", "she", "hers", "his"])
+        assert matcher.find_unique("she said hers was his") == ["he", "she", "hers", "his"]
+
+    def test_case_insensitive_with_original_positions(self):
+        """Matches report offsets into the original text."""
+        from pbx.utils.keyword_matcher import KeywordMatch, KeywordMatcher
+
+        matcher = KeywordMatcher(["Urgent", "do you agree"])
+        text = "URGENT: Do You Agree?"
+        assert matcher.find_all(text) == [
+            KeywordMatch("Urgent", 0, 6),
+            KeywordMatch("do you agree", 8, 20),
+        ]
+        assert text[8:20] == "Do You Agree"
+
+    def test_word_boundaries(self):
+        """Matches start on a word boundary; whole_words also checks the end."""
+        from pbx.utils.keyword_matcher import KeywordMatcher
+
+        stems = KeywordMatcher(["bill", "cancel"])
+        assert stems.find_unique("billing was cancelled") == ["bill", "cancel"]
+        assert stems.find_unique("they rebill and uncancel") == []
+
+        words = KeywordMatcher(["bill"], whole_words=True)
+        assert words.find_unique("billing") == []
+        assert words.find_unique("my bill, please") == ["bill"]
+
+    def test_length_changing_lowercase(self):
+        """Positions stay correct when lower() expands a character."""
+        from pbx.utils.keyword_matcher import KeywordMatcher
+
+        text = "İstanbul refund"
+        match = KeywordMatcher(["refund"]).find_all(text)[0]
+        assert text[match.start : match.end] == "refund"
+
+    def test_count_and_duplicates(self):
+        """Duplicate keywords share a pattern; counts cover every occurrence."""
+        from pbx.utils.keyword_matcher import KeywordMatcher
+
+        matcher = KeywordMatcher(["refund", "Refund", " ", "cancel"])
+        assert len(matcher) == 3
+        assert matcher.find_unique("refund") == ["refund", "Refund"]
+        assert matcher.count("refund then refund") == {"refund": 2, "Refund": 2}
+
+    def test_get_keyword_matcher_caches(self):
+        """The same keyword set compiles once."""
+        from pbx.utils.keyword_matcher import get_keyword_matcher
+
+        assert get_keyword_matcher(["a", "b"]) is get_keyword_matcher(("a", "b"))
+        assert get_keyword_matcher(["a", "b"]) is not get_keyword_matcher(["a", "b"], True)
+
+
+@pytest.mark.unit
+@patch("pbx.features.speech_analytics.get_logger", return_value=MagicMock())
+class TestSpeechAnalyticsKeywords:
+    """Tests for compiled keyword matching in SpeechAnalyticsEngine."""
+
+    def _engine(self, keywords: str = ""):
+        from pbx.features.speech_analytics import SpeechAnalyticsEngine
+
+        db = MagicMock()
+        db.execute.return_value = [(1, "1001", 1, 1, 1, 1, keywords, 0.7, None, None)]
+        return SpeechAnalyticsEngine(db, {})
+
+    def test_highlight_keywords(self, _mock_logger):
+        """Highlighting returns keyword spans."""
+        engine = self._engine()
+        assert engine.highlight_keywords("Need a REFUND now", ["refund"]) == [
+            {"keyword": "refund", "start": 7, "end": 13}
+        ]
+
+    def test_extension_matcher_cached_until_config_changes(self, _mock_logger):
+        """An extension's matcher is reused until its keywords change."""
+        engine = self._engine("escalate, supervisor")
+
+        first = engine._get_extension_matcher("1001")
+        assert first.find_unique("let me talk to a supervisor") == ["supervisor"]
+        assert engine._get_extension_matcher("1001") is first
+
+        engine.db.execute.return_value = [(1, "1001", 1, 1, 1, 1, "lawyer", 0.7, None, None)]
+        assert engine._get_extension_matcher("1001") is not first
+
+        engine.delete_config("1001")
+        assert "1001" not in engine._keyword_matchers
+
+
+@pytest.mark.unit
+class TestCallTaggingRulesMatcher:
+    """Tests for the compiled rule matcher in CallTagging."""
+
+    @patch("pbx.features.call_tagging.SKLEARN_AVAILABLE", False)
+    @patch("pbx.features.call_tagging.SPACY_AVAILABLE", False)
+    @patch("pbx.features.call_tagging.get_logger")
+    def _make_tagging(self, mock_get_logger):
+        from pbx.features.call_tagging import CallTagging
+
+        return CallTagging({"features": {"call_tagging": {"enabled": True}}})
+
+    def test_new_rule_recompiles_matcher(self):
+        """Adding a rule invalidates the compiled matcher."""
+        ct = self._make_tagging()
+        before = ct._get_rules_matcher()
+        assert ct._get_rules_matcher() is before
+
+        ct.add_tagging_rule("Retention", ["Cancel My Account"], "retention")
+        assert ct._get_rules_matcher() is not before
+        assert "retention" in ct._apply_rules("call-1", "please cancel my account today")
+
+    def test_rules_without_keywords_are_skipped(self):
+        """Condition-based rules don't break keyword matching."""
+        ct = self._make_tagging()
+        ct.create_rule("Long calls", [{"type": "duration"}], "long")
+        assert ct._apply_rules("call-1", "I want to buy") == ["sales"]
@@ -0,0 +1,160 @@
+"""Tests for the asynchronous logging pipeline in pbx/utils/logger.py."""
+
+import logging
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from pbx.utils.logger import PBXLogger, RateLimitFilter, _LogWriter
+
+
+class _BlockingHandler(logging.Handler):
+    """Handler that waits for a signal before writing, like a stalled disk"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.release = threading.Event()
+        self.messages: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.release.wait(5)
+        self.messages.append(self.format(record))
+
+
+@pytest.fixture
+def pbx_logger() -> Iterator[PBXLogger]:
+    instance = PBXLogger()
+    yield instance
+    instance.setup()
+    for name, limit in PBXLogger._rate_limits.items():
+        logging.getLogger(f"PBX.{name}").removeFilter(limit)
+    PBXLogger._rate_limits.clear()
+
+
+@pytest.mark.unit
+class TestAsyncLogging:
+    """Tests for the queue-backed log writer."""
+
+    def test_records_written_by_writer_thread(self, pbx_logger: PBXLogger, tmp_path: Path) -> None:
+        log_file = tmp_path / "pbx.log"
+        pbx_logger.setup(log_file=str(log_file), console=False, async_logging=True)
+
+        pbx_logger.get_logger().info("Call %s answered", "abc123")
+        pbx_logger.flush()
+
+        assert "Call abc123 answered" in log_file.read_text()
+        stats = pbx_logger.get_stats()
+        assert stats["async"] is True
+        assert stats["enqueued"] == 1
+        assert stats["dropped"] == 0
+
+    def test_full_queue_drops_instead_of_blocking(self) -> None:
+        writer = _LogWriter(maxsize=2)
+        handler = _BlockingHandler()
+        logger = logging.getLogger("PBX.test_blocking")
+        logger.propagate = False
+        record = logger.makeRecord(logger.name, logging.INFO, __file__, 0, "msg %d", (1,), None)
+
+        # The writer takes the first record and stalls in the handler
+        for _ in range(10):
+            writer.submit([handler], record)
+
+        assert writer.dropped >= 7
+        handler.release.set()
+        writer.stop()
+        assert len(handler.messages) == writer.enqueued
+        assert handler.messages[0] == "msg 1"
+
+    def test_sync_mode_by_default(self, pbx_logger: PBXLogger) -> None:
+        pbx_logger.setup(console=False)
+        assert pbx_logger.writer is None
+        assert pbx_logger.get_stats()["enqueued"] == 0
+
+    def test_exception_traceback_captured_on_caller(
+        self, pbx_logger: PBXLogger, tmp_path: Path
+    ) -> None:
+        log_file = tmp_path / "pbx.log"
+        pbx_logger.setup(log_file=str(log_file), console=False, async_logging=True)
+
+        try:
+            raise ValueError("bad SDP")
+        except ValueError:
+            pbx_logger.get_logger().exception("Parse failed")
+        pbx_logger.flush()
+
+        text = log_file.read_text()
+        assert "Parse failed" in text
+        assert "ValueError: bad SDP" in text
+
+    def test_sub_logger_moves_to_new_writer_on_setup(
+        self, pbx_logger: PBXLogger, tmp_path: Path
+    ) -> None:
+        pbx_logger.setup(console=False, async_logging=True)
+        vm_file = tmp_path / "vm.log"
+        sub_logger = pbx_logger.get_sub_logger("TEST_REBIND", str(vm_file), console=False)
+        try:
+            # Reconfiguring replaces the writer the sub-logger was built on
+            pbx_logger.setup(console=False, async_logging=True)
+            sub_logger.info("Mailbox %s opened", "1001")
+            pbx_logger.flush()
+            assert "Mailbox 1001 opened" in vm_file.read_text()
+            assert pbx_logger.get_stats()["enqueued"] == 1
+
+            # Back to synchronous logging: written on the calling thread
+            pbx_logger.setup(console=False)
+            sub_logger.info("Mailbox %s closed", "1001")
+            assert "Mailbox 1001 closed" in vm_file.read_text()
+        finally:
+            PBXLogger._sub_loggers.pop("TEST_REBIND")
+            for handler in sub_logger.handlers:
+                handler.close()
+            sub_logger.handlers.clear()
+
+    def test_message_formatted_on_calling_thread(
+        self, pbx_logger: PBXLogger, tmp_path: Path
+    ) -> None:
+        log_file = tmp_path / "pbx.log"
+        pbx_logger.setup(log_file=str(log_file), console=False, async_logging=True)
+        handler = pbx_logger.get_logger().handlers[0]
+        handler.writer.submit = lambda handlers, record: submitted.append(record)
+        submitted: list[logging.LogRecord] = []
+        codecs = ["PCMU"]
+
+        pbx_logger.get_logger().info("Offer codecs %s", codecs)
+        codecs.append("G722")
+
+        assert submitted[0].msg == "Offer codecs ['PCMU']"
+        assert submitted[0].args is None
+
+
+@pytest.mark.unit
+class TestRateLimitedLogging:
+    """Tests for per-logger rate limiting."""
+
+    def test_burst_then_rate(self) -> None:
+        limit = RateLimitFilter(rate=1, burst=3)
+        record = logging.LogRecord("PBX.x", logging.DEBUG, __file__, 0, "packet", None, None)
+
+        with patch("pbx.utils.logger.time.monotonic", return_value=limit.updated):
+            results = [limit.filter(record) for _ in range(5)]
+        assert results == [True, True, True, False, False]
+        assert limit.total_suppressed == 2
+
+        # One second later one token is back, and the suppressed count is reported
+        with patch("pbx.utils.logger.time.monotonic", return_value=limit.updated + 1):
+            assert limit.filter(record)
+        assert record.msg == "packet (2 similar messages suppressed)"
+
+    def test_rate_limited_logger_stats(self, pbx_logger: PBXLogger) -> None:
+        pbx_logger.setup(log_level="DEBUG", console=False)
+        logger = pbx_logger.get_rate_limited_logger("RTP.test", rate=1, burst=1)
+
+        assert logger.name == "PBX.RTP.test"
+        assert pbx_logger.get_rate_limited_logger("RTP.test", rate=1) is logger
+        for _ in range(4):
+            logger.debug("Relayed %d bytes", 160)
+
+        assert pbx_logger.get_stats()["rate_limited"]["RTP.test"] == 3
@@ -125,6 +125,7 @@ def test_all_expected_paths_present(self) -> None:
         expected_paths = [
             "/health",
             "/api/health/detailed",
+            "/api/health/startup",
             "/api/status",
             "/api/auth/login",
             "/api/auth/logout",
@@ -141,7 +142,7 @@ def test_all_expected_paths_present(self) -> None:
     def test_total_path_count(self) -> None:
         """Verify the total number of paths."""
         paths = get_openapi_spec()["paths"]
-        assert len(paths) == 11
+        assert len(paths) == 12
 
 
 @pytest.mark.unit
@@ -196,6 +197,12 @@ def test_detailed_health_components_property(self) -> None:
         ]["application/json"]["schema"]
         assert "components" in schema["properties"]
 
+    def test_startup_profile_operation_id(self) -> None:
+        """GET /api/health/startup operationId must be 'startupProfile'."""
+        op = get_openapi_spec()["paths"]["/api/health/startup"]["get"]
+        assert op["operationId"] == "startupProfile"
+        assert "Health" in op["tags"]
+
     def test_status_endpoint_operation_id(self) -> None:
         """GET /api/status operationId must be 'getStatus'."""
         op = get_openapi_spec()["paths"]["/api/status"]["get"]
@@ -729,6 +736,7 @@ def test_expected_operation_ids(self) -> None:
         expected = {
             "healthCheck",
             "detailedHealth",
+            "startupProfile",
             "getStatus",
             "login",
             "logout",
@@ -5,6 +5,7 @@
 """
 
 import struct
+import threading
 from datetime import UTC, datetime
 from typing import Any
 from unittest.mock import MagicMock, PropertyMock, call, patch
@@ -68,6 +69,7 @@ def _make_pbx_core_shell() -> Any:
     obj._auto_attendant_handler = MagicMock()
     obj._emergency_handler = MagicMock()
     obj._paging_handler = MagicMock()
+    obj._conference_handler = MagicMock()
 
     # Security
     obj.security_monitor = MagicMock()
@@ -1120,6 +1122,61 @@ def test_end_call_basic(self) -> None:
         pbx.rtp_relay.release_relay.assert_called_once_with("call-1")
         pbx.cdr_system.end_record.assert_called_once_with("call-1", hangup_cause="normal_clearing")
 
+    def test_end_call_releases_speech_recognizer(self) -> None:
+        """Live transcription is flushed off the calling thread."""
+        pbx = _make_pbx_core_shell()
+        pbx.call_manager.get_call.return_value = MagicMock(routed_to_voicemail=False)
+        pbx.metrics_exporter = None
+        pbx.speech_analytics = MagicMock()
+        pbx.speech_analytics.has_call.side_effect = lambda call_id: call_id == "call-1"
+        flushed = threading.Event()
+        pbx.speech_analytics.end_call.side_effect = lambda call_id: flushed.set()
+
+        pbx.end_call("call-2")
+        pbx.end_call("call-1")
+
+        assert flushed.wait(2)
+        pbx.speech_analytics.end_call.assert_called_once_with("call-1")
+
+    def test_end_call_leaves_conference_before_releasing_relay(self) -> None:
+        pbx = _make_pbx_core_shell()
+        pbx.metrics_exporter = None
+        call = MagicMock(routed_to_voicemail=False, conference_room="2000")
+        pbx.call_manager.get_call.return_value = call
+        order = MagicMock()
+        order.attach_mock(pbx._conference_handler.leave_conference, "leave")
+        order.attach_mock(pbx.rtp_relay.release_relay, "release")
+
+        pbx.end_call("call-1")
+
+        assert [c[0] for c in order.mock_calls] == ["leave", "release"]
+        pbx._conference_handler.leave_conference.assert_called_once_with(call)
+
+    def test_connected_call_is_tapped_for_transcription(self) -> None:
+        """Relayed audio goes to speech analytics when an extension asks for it."""
+        pbx = _make_pbx_core_shell()
+        pbx.speech_analytics = MagicMock()
+        pbx.speech_analytics.wants_transcription.return_value = True
+        call = MagicMock(call_id="call-1", from_extension="1001", to_extension="1002")
+
+        pbx._start_live_transcription(call)
+
+        pbx.speech_analytics.wants_transcription.assert_called_once_with("1001", "1002")
+        pbx.rtp_relay.add_audio_tap.assert_called_once_with(
+            "call-1", pbx.speech_analytics.tap_call.return_value
+        )
+
+    def test_call_without_transcription_is_not_tapped(self) -> None:
+        """No tap is added when neither extension has transcription enabled."""
+        pbx = _make_pbx_core_shell()
+        pbx.speech_analytics = MagicMock()
+        pbx.speech_analytics.wants_transcription.return_value = False
+
+        pbx._start_live_transcription(MagicMock(call_id="call-1"))
+
+        pbx.speech_analytics.tap_call.assert_not_called()
+        pbx.rtp_relay.add_audio_tap.assert_not_called()
+
     def test_end_call_not_found(self) -> None:
         """end_call does nothing if call not found."""
         pbx = _make_pbx_core_shell()
@@ -1417,15 +1474,6 @@ def test_handle_no_answer(self) -> None:
         pbx._handle_no_answer("c1")
         pbx._call_router._handle_no_answer.assert_called_once_with("c1")
 
-    def test_monitor_voicemail_dtmf(self) -> None:
-        pbx = _make_pbx_core_shell()
-        mock_call = MagicMock()
-        mock_rec = MagicMock()
-        pbx._monitor_voicemail_dtmf("c1", mock_call, mock_rec)
-        pbx._voicemail_handler.monitor_voicemail_dtmf.assert_called_once_with(
-            "c1", mock_call, mock_rec
-        )
-
     def test_complete_voicemail_recording(self) -> None:
         pbx = _make_pbx_core_shell()
         pbx._complete_voicemail_recording("c1")
@@ -1571,7 +1619,7 @@ def test_get_status_structure(self) -> None:
         pbx.parking_system.get_parked_calls.return_value = []
 
         q = MagicMock()
-        q.queue = [1, 2, 3]
+        q.calls_waiting = 3
         pbx.queue_system.queues = {"sales": q}
 
         status = pbx.get_status()
@@ -1714,14 +1762,22 @@ def test_sync_ad_success_dict_result(self) -> None:
             "synced_count": 3,
             "extensions_to_reboot": ["1001", "1002"],
         }
-        pbx.phone_provisioning.reboot_phone.return_value = True
+        pbx.phone_provisioning.schedule_reboots.return_value = {
+            "rollout_id": "rollout-1",
+            "counts": {"queued": 2},
+        }
         pbx.phone_book = None
 
         result = pbx.sync_ad_users()
 
         assert result["success"] is True
         assert result["synced_count"] == 3
-        assert result["rebooted_count"] == 2
+        assert result["rebooted_count"] == 0
+        assert result["reboot_scheduled_count"] == 2
+        assert result["reboot_rollout_id"] == "rollout-1"
+        pbx.phone_provisioning.schedule_reboots.assert_called_once_with(
+            pbx.sip_server, ["1001", "1002"], reason="ad_sync"
+        )
 
     def test_sync_ad_with_phone_book_sync(self) -> None:
         """Phone book is auto-synced from AD if enabled."""
@@ -1750,14 +1806,14 @@ def test_sync_ad_exception(self) -> None:
         assert result["synced_count"] == 0
 
     def test_sync_ad_reboot_failure(self) -> None:
-        """Failed phone reboots are logged but don't break sync."""
+        """Failed reboot scheduling is logged but doesn't break sync."""
         pbx = _make_pbx_core_shell()
         pbx.ad_integration.enabled = True
         pbx.ad_integration.sync_users.return_value = {
             "synced_count": 1,
             "extensions_to_reboot": ["1001"],
         }
-        pbx.phone_provisioning.reboot_phone.side_effect = RuntimeError("reboot failed")
+        pbx.phone_provisioning.schedule_reboots.side_effect = RuntimeError("reboot failed")
         pbx.phone_book = None
 
         result = pbx.sync_ad_users()
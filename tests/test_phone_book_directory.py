@@ -0,0 +1,134 @@
+"""Tests for the phone book directory index and cached exports."""
+
+import gzip
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask.testing import FlaskClient
+
+from pbx.features.phone_book import DirectoryIndex, PhoneBook
+
+AUTH_PATCH = "pbx.api.utils.verify_authentication"
+CONFIG = {"features.phone_book.enabled": True, "features.phone_book.auto_sync_from_ad": False}
+
+
+def _phone_book() -> PhoneBook:
+    with patch("pbx.features.phone_book.get_logger", return_value=MagicMock()):
+        phone_book = PhoneBook(CONFIG, database=None)
+    phone_book.add_entry("1001", "John Doe", department="Sales")
+    phone_book.add_entry("1002", "Joanna Smith", department="Support")
+    phone_book.add_entry("1100", "Bob Johnson", department="Engineering")
+    return phone_book
+
+
+@pytest.mark.unit
+class TestDirectoryIndex:
+    """Tests for DirectoryIndex."""
+
+    def test_matches_substrings_in_any_field(self) -> None:
+        index = DirectoryIndex()
+        index.add({"extension": "1001", "name": "John Doe", "department": "Sales"})
+        index.add({"extension": "1002", "name": "Alice Moe", "department": None})
+
+        assert index.search("oe")[1] == ["1002", "1001"]
+        assert index.search("SALES")[1] == ["1001"]
+        assert index.search("n do")[1] == ["1001"]
+        # Equally good matches come back in name order
+        assert index.search("100")[1] == ["1002", "1001"]
+        assert index.search("xyz")[1] == []
+        assert index.search("")[1] == []
+
+    def test_ranks_exact_extension_then_word_prefix(self) -> None:
+        index = DirectoryIndex()
+        index.add({"extension": "1002", "name": "Bob Johnson"})
+        index.add({"extension": "1001", "name": "John Doe"})
+        index.add({"extension": "john", "name": "Zed"})
+
+        assert index.search("john") == (3, ["john", "1002", "1001"])
+        assert index.search("john", offset=1, limit=1) == (3, ["1002"])
+
+    def test_remove_and_replace(self) -> None:
+        index = DirectoryIndex()
+        index.add({"extension": "1001", "name": "John Doe"})
+        index.add({"extension": "1001", "name": "Jane Roe"})
+
+        assert index.search("john")[1] == []
+        assert index.search("jane")[1] == ["1001"]
+
+        index.remove("1001")
+        assert index.search("jane")[1] == []
+        assert index.postings == {}
+        assert index.prefixes == {}
+
+
+@pytest.mark.unit
+class TestPhoneBookExports:
+    """Tests for versioned phone book exports and paged search."""
+
+    def test_paged_search(self) -> None:
+        phone_book = _phone_book()
+
+        page = phone_book.search_page("jo", offset=1, limit=1)
+        assert page["total"] == 3
+        assert [e["extension"] for e in page["entries"]] == ["1002"]
+        assert [e["name"] for e in phone_book.search("jo", max_results=2)] == [
+            "Bob Johnson",
+            "Joanna Smith",
+        ]
+
+    def test_export_is_rendered_once_per_version(self) -> None:
+        phone_book = _phone_book()
+
+        first = phone_book.get_export("xml")
+        assert phone_book.get_export("xml") is first
+        assert gzip.decompress(first["gzip"]).decode() == phone_book.export_xml()
+
+        # Re-adding an unchanged entry (as AD sync does) keeps the version
+        phone_book.add_entry("1001", "John Doe", department="Sales")
+        assert phone_book.get_export("xml") is first
+
+        phone_book.add_entry("1003", "Carol White")
+        second = phone_book.get_export("xml")
+        assert second["version"] > first["version"]
+        assert second["etag"] != first["etag"]
+        assert "Carol White" in second["content"]
+
+        phone_book.remove_entry("1003")
+        assert "Carol White" not in phone_book.export_xml()
+        assert phone_book.search("carol") == []
+
+    def test_export_route_revalidates_with_etag(
+        self, api_client: FlaskClient, mock_pbx_core: MagicMock
+    ) -> None:
+        mock_pbx_core.phone_book = _phone_book()
+
+        with patch(AUTH_PATCH, return_value=(True, {"is_admin": False})):
+            response = api_client.get(
+                "/api/phone-book/export/xml", headers={"Accept-Encoding": "gzip"}
+            )
+            assert response.status_code == 200
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert b"John Doe" in gzip.decompress(response.data)
+
+            repeat = api_client.get(
+                "/api/phone-book/export/xml",
+                headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]},
+            )
+            assert repeat.status_code == 304
+
+            lookup = api_client.get("/api/phone-book/export/xml?q=sup")
+            assert lookup.status_code == 200
+            assert b"Joanna Smith" in lookup.data
+            assert b"John Doe" not in lookup.data
+
+    def test_search_route_reports_total(
+        self, api_client: FlaskClient, mock_pbx_core: MagicMock
+    ) -> None:
+        mock_pbx_core.phone_book = _phone_book()
+
+        with patch(AUTH_PATCH, return_value=(True, {"is_admin": False})):
+            response = api_client.get("/api/phone-book/search?q=jo&limit=2")
+
+        assert response.status_code == 200
+        assert response.headers["X-Total-Count"] == "3"
+        assert len(response.get_json()) == 2
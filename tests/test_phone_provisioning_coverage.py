@@ -948,6 +948,84 @@ def test_similar_macs_hint(self) -> None:
         assert result == (None, None)
 
 
+@pytest.mark.unit
+class TestRenderedConfigCache:
+    """Tests for compiled templates and the rendered-config cache."""
+
+    def test_unknown_placeholders_left_in_place(self) -> None:
+        tpl = _lazy_import().PhoneTemplate("v", "m", "a={{EXTENSION_NUMBER}} b={{CUSTOM}}{{")
+        assert tpl.generate_config({"number": "7"}, {}) == "a=7 b={{CUSTOM}}{{"
+
+    def test_replacing_template_content_recompiles(self) -> None:
+        tpl = _lazy_import().PhoneTemplate("v", "m", "{{EXTENSION_NUMBER}}")
+        version = tpl.version
+        tpl.template_content = "x{{EXTENSION_NAME}}"
+        assert tpl.version != version
+        assert tpl.generate_config({"name": "Bob"}, {}) == "xBob"
+
+    def test_unchanged_poll_reuses_render(self) -> None:
+        prov = _make_provisioning()
+        registry = TestGenerateConfig()._setup_for_generate(prov)
+        template = prov.get_template("yealink", "t46s")
+
+        with (
+            patch.object(template, "generate_config", wraps=template.generate_config) as render,
+            patch.object(
+                prov, "_build_ldap_phonebook_config", wraps=prov._build_ldap_phonebook_config
+            ) as build_ldap,
+        ):
+            first, _ = prov.generate_config("AA:BB:CC:DD:EE:FF", registry)
+            second, _ = prov.generate_config("AA:BB:CC:DD:EE:FF", registry)
+
+        assert first == second
+        assert render.call_count == 1
+        assert build_ldap.call_count == 1
+        assert prov.get_device("AA:BB:CC:DD:EE:FF").last_provisioned is not None
+
+    def test_extension_and_template_changes_rerender(self) -> None:
+        prov = _make_provisioning()
+        registry = TestGenerateConfig()._setup_for_generate(prov)
+        prov.generate_config("AA:BB:CC:DD:EE:FF", registry)
+
+        registry.get.return_value.name = "Renamed User"
+        config, _ = prov.generate_config("AA:BB:CC:DD:EE:FF", registry)
+        assert "Renamed User" in config
+
+        prov.add_template("yealink", "t46s", "name={{EXTENSION_NAME}}")
+        config, _ = prov.generate_config("AA:BB:CC:DD:EE:FF", registry)
+        assert config == "name=Renamed User"
+
+    def test_invalidate_rebuilds_server_config(self) -> None:
+        prov = _make_provisioning()
+        registry = TestGenerateConfig()._setup_for_generate(prov)
+        prov.generate_config("AA:BB:CC:DD:EE:FF", registry)
+        server_config = prov._get_server_config()
+
+        prov.invalidate_config_cache("aa-bb-cc-dd-ee-ff")
+        assert "aabbccddeeff" not in prov._rendered_configs
+        assert prov._get_server_config() is server_config
+
+        prov.invalidate_config_cache()
+        assert prov._get_server_config() is not server_config
+
+    def test_config_reload_rebuilds_server_settings(self) -> None:
+        prov = _make_provisioning()
+        registry = TestGenerateConfig()._setup_for_generate(prov)
+        prov.add_template("yealink", "t46s", "sip={{SIP_SERVER}}")
+        assert prov.generate_config("AA:BB:CC:DD:EE:FF", registry)[0] == "sip=10.0.0.1"
+        (on_reload,), _ = prov.config.subscribe.call_args
+
+        on_reload({"integrations.zoom.enabled"}, MagicMock())
+        assert prov._rendered_configs
+
+        get = prov.config.get.side_effect
+        prov.config.get.side_effect = lambda key, default=None: (
+            "10.0.0.2" if key == "server.external_ip" else get(key, default)
+        )
+        on_reload({"server.external_ip"}, MagicMock())
+        assert prov.generate_config("AA:BB:CC:DD:EE:FF", registry)[0] == "sip=10.0.0.2"
+
+
 # ---------------------------------------------------------------------------
 # Tests for _add_request_log / get_request_history
 # ---------------------------------------------------------------------------
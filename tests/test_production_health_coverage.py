@@ -214,6 +214,28 @@ def test_default_version_and_server_name(
         assert status["version"] == "unknown"
         assert status["server_name"] == "Warden Voip"
 
+    @patch.object(ProductionHealthChecker, "_get_metrics")
+    @patch.object(ProductionHealthChecker, "check_readiness")
+    @patch.object(ProductionHealthChecker, "check_liveness")
+    def test_startup_profile_included(self, mock_liveness, mock_readiness, mock_metrics) -> None:
+        from pbx.core.feature_registry import FeatureRegistry
+
+        mock_liveness.return_value = (True, {"status": "alive"})
+        mock_readiness.return_value = (True, {"status": "ready"})
+        mock_metrics.return_value = {}
+        registry = FeatureRegistry(workers=1)
+        registry.register("cdr", lambda: None)
+        registry.initialize()
+
+        status = ProductionHealthChecker(
+            pbx_core=MagicMock(feature_registry=registry)
+        ).get_detailed_status()
+
+        assert [entry["name"] for entry in status["startup"]["features"]] == ["cdr"]
+        # Without a registry (or with a mock standing in for one) there is nothing to report
+        assert ProductionHealthChecker(pbx_core=MagicMock()).get_startup_profile() is None
+        assert ProductionHealthChecker().get_startup_profile() is None
+
 
 @pytest.mark.unit
 class TestCheckPbxCore:
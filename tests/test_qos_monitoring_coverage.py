@@ -96,6 +96,36 @@ def test_mos_calculated_after_update(self) -> None:
         # MOS should be recalculated (may still be 0 with only 2 packets but _calculate_mos runs)
         assert metrics.mos_score >= 0.0
 
+    def test_running_jitter_estimate(self) -> None:
+        metrics = QoSMetrics("call-001")
+        # 20 ms of RTP time per packet, arriving every 30 ms
+        arrivals = iter([0.0, 0.03, 0.06])
+        with patch("pbx.features.qos_monitoring.time.time", lambda: next(arrivals)):
+            for seq in range(3):
+                metrics.update_packet_received(seq, seq * 160, 160)
+        # J = 10/16, then J += (10 - J) / 16
+        assert metrics.avg_jitter == pytest.approx(10 / 16 + (10 - 10 / 16) / 16)
+        assert list(metrics.jitter_samples) == pytest.approx([10.0, 10.0])
+        assert metrics.max_jitter == pytest.approx(10.0)
+
+    def test_mos_computed_when_read(self) -> None:
+        metrics = QoSMetrics("call-001")
+        metrics.update_packet_received(100, 1000, 160)
+        with patch.object(QoSMetrics, "_calculate_mos", autospec=True) as calculate:
+            for seq in range(101, 151):
+                metrics.update_packet_received(seq, seq * 160, 160)
+            calculate.assert_not_called()
+            _ = metrics.mos_score
+            calculate.assert_called_once()
+
+    def test_clock_rate_scales_timestamps(self) -> None:
+        metrics = QoSMetrics("call-001", clock_rate=16000)
+        arrivals = iter([0.0, 0.02])
+        with patch("pbx.features.qos_monitoring.time.time", lambda: next(arrivals)):
+            metrics.update_packet_received(0, 0, 320)
+            metrics.update_packet_received(1, 320, 320)
+        assert metrics.avg_jitter == pytest.approx(0.0, abs=1e-9)
+
 
 @pytest.mark.unit
 class TestQoSMetricsUpdatePacketSent:
@@ -131,6 +161,13 @@ def test_add_multiple_latency_samples(self) -> None:
         assert metrics.avg_latency == 75.0
         assert metrics.max_latency == 100.0
 
+    def test_latency_average_over_window(self) -> None:
+        metrics = QoSMetrics("call-001")
+        for latency in range(250):
+            metrics.add_latency_sample(float(latency))
+        # Only the last 100 samples (150..249) count
+        assert metrics.avg_latency == pytest.approx(199.5)
+
     def test_latency_max_tracked(self) -> None:
         metrics = QoSMetrics("call-001")
         metrics.add_latency_sample(200.0)
@@ -326,9 +363,9 @@ def test_init(self, mock_get_logger) -> None:
         monitor = QoSMonitor(mock_pbx)
         assert monitor.pbx is mock_pbx
         assert monitor.active_calls == {}
-        assert monitor.historical_data == []
+        assert list(monitor.historical_data) == []
         assert len(monitor.alert_thresholds) == 4
-        assert monitor.alerts == []
+        assert list(monitor.alerts) == []
         assert monitor.max_historical_records == 10000
 
 
@@ -487,7 +524,7 @@ def test_clear_alerts(self, mock_get_logger) -> None:
         monitor.alerts = [{"type": "test"}, {"type": "test"}]
         count = monitor.clear_alerts()
         assert count == 2
-        assert monitor.alerts == []
+        assert len(monitor.alerts) == 0
 
     @patch("pbx.features.qos_monitoring.get_logger")
     def test_check_quality_alerts_low_mos(self, mock_get_logger) -> None:
@@ -626,7 +663,10 @@ def test_store_metrics_with_db(self, mock_get_logger) -> None:
             "quality_rating": "Good",
         }
         monitor._store_metrics(summary)
-        mock_pbx.db.execute.assert_called_once()
+        assert monitor.flush_metrics() == 1
+        mock_pbx.db.execute_many.assert_called_once()
+        assert mock_pbx.db.execute_many.call_args[0][1][0][0] == "call-001"
+        monitor.stop()
 
     @patch("pbx.features.qos_monitoring.get_logger")
     def test_store_metrics_no_db(self, mock_get_logger) -> None:
@@ -641,13 +681,14 @@ def test_store_metrics_db_disabled(self, mock_get_logger) -> None:
         mock_pbx.db.enabled = False
         monitor = QoSMonitor(mock_pbx)
         monitor._store_metrics({"call_id": "call-001"})
-        mock_pbx.db.execute.assert_not_called()
+        monitor.flush_metrics()
+        mock_pbx.db.execute_many.assert_not_called()
 
     @patch("pbx.features.qos_monitoring.get_logger")
     def test_store_metrics_db_error(self, mock_get_logger) -> None:
         mock_pbx = MagicMock()
         mock_pbx.db.enabled = True
-        mock_pbx.db.execute.side_effect = Exception("DB error")
+        mock_pbx.db.execute_many.side_effect = Exception("DB error")
         monitor = QoSMonitor(mock_pbx)
         summary = {
             "call_id": "call-001",
@@ -667,6 +708,103 @@ def test_store_metrics_db_error(self, mock_get_logger) -> None:
         }
         # Should not raise
         monitor._store_metrics(summary)
+        assert monitor.flush_metrics() == 0
+
+        # The failed batch is retried on the next flush
+        mock_pbx.db.execute_many.side_effect = None
+        mock_pbx.db.execute_many.return_value = True
+        assert monitor.flush_metrics() == 1
+        assert mock_pbx.db.execute_many.call_args[0][1][0][0] == "call-001"
+        monitor.stop()
+
+
+@pytest.mark.unit
+class TestQoSMonitorBatchedStorage:
+    """Tests for the background metrics writer."""
+
+    @staticmethod
+    def _summary(call_id: str) -> dict:
+        return {
+            "call_id": call_id,
+            "start_time": "2024-01-01T00:00:00",
+            "end_time": "2024-01-01T00:05:00",
+            "duration_seconds": 300,
+            "packets_sent": 100,
+            "packets_received": 100,
+            "packets_lost": 0,
+            "packet_loss_percentage": 0.0,
+            "jitter_avg_ms": 1.0,
+            "jitter_max_ms": 2.0,
+            "latency_avg_ms": 20.0,
+            "latency_max_ms": 30.0,
+            "mos_score": 4.4,
+            "quality_rating": "Excellent",
+        }
+
+    @patch("pbx.features.qos_monitoring.get_logger")
+    def test_rows_written_in_one_batch(self, mock_get_logger) -> None:
+        mock_pbx = MagicMock()
+        mock_pbx.db.enabled = True
+        monitor = QoSMonitor(mock_pbx)
+        for i in range(5):
+            monitor._store_metrics(self._summary(f"call-{i}"))
+
+        monitor.stop()
+
+        mock_pbx.db.execute_many.assert_called_once()
+        rows = mock_pbx.db.execute_many.call_args[0][1]
+        assert [row[0] for row in rows] == [f"call-{i}" for i in range(5)]
+        mock_pbx.db.execute.assert_not_called()
+
+    @patch("pbx.features.qos_monitoring.METRICS_BATCH_SIZE", 3)
+    @patch("pbx.features.qos_monitoring.get_logger")
+    def test_full_batch_wakes_writer(self, mock_get_logger) -> None:
+        mock_pbx = MagicMock()
+        mock_pbx.db.enabled = True
+        written = threading.Event()
+        mock_pbx.db.execute_many.side_effect = lambda *args: written.set() or True
+        monitor = QoSMonitor(mock_pbx)
+        for i in range(3):
+            monitor._store_metrics(self._summary(f"call-{i}"))
+
+        assert written.wait(2)
+        monitor.stop()
+        assert len(mock_pbx.db.execute_many.call_args_list[0][0][1]) == 3
+
+    @patch("pbx.features.qos_monitoring.METRICS_MAX_PENDING", 4)
+    @patch("pbx.features.qos_monitoring.get_logger")
+    def test_failed_rows_requeued_up_to_bound(self, mock_get_logger) -> None:
+        mock_pbx = MagicMock()
+        mock_pbx.db.enabled = True
+        mock_pbx.db.execute_many.return_value = False
+        monitor = QoSMonitor(mock_pbx)
+        for i in range(3):
+            monitor._store_metrics(self._summary(f"call-{i}"))
+        assert monitor.flush_metrics() == 0
+        for i in range(3, 6):
+            monitor._store_metrics(self._summary(f"call-{i}"))
+        assert monitor.flush_metrics() == 0
+
+        assert monitor.metrics_dropped == 2
+        mock_pbx.db.execute_many.return_value = True
+        assert monitor.flush_metrics() == 4
+        rows = mock_pbx.db.execute_many.call_args[0][1]
+        assert [row[0] for row in rows] == ["call-2", "call-3", "call-4", "call-5"]
+        monitor.stop()
+
+    @patch("pbx.features.qos_monitoring.get_logger")
+    def test_history_is_ring_buffer(self, mock_get_logger) -> None:
+        monitor = QoSMonitor(MagicMock(spec=[]))
+        monitor.max_historical_records = 3
+        for i in range(5):
+            monitor.start_monitoring(f"call-{i}")
+            monitor.stop_monitoring(f"call-{i}")
+
+        assert [r["call_id"] for r in monitor.historical_data] == ["call-2", "call-3", "call-4"]
+        assert [r["call_id"] for r in monitor.get_historical_metrics(limit=2)] == [
+            "call-3",
+            "call-4",
+        ]
 
 
 @pytest.mark.unit
@@ -0,0 +1,198 @@
+"""Tests for the staggered phone reboot rollout."""
+
+import time
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask.testing import FlaskClient
+
+from pbx.features.extensions import Extension
+
+
+class _Config:
+    def __init__(self, values: dict) -> None:
+        self.values = values
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.values.get(key.rsplit(".", 1)[-1], default)
+
+
+def _make_sip_server(numbers: list[str]) -> MagicMock:
+    sip_server = MagicMock()
+    extensions = {}
+    for number in numbers:
+        extension = Extension(number, f"User {number}", {})
+        extension.register(("10.0.0.1", 5060), call_id=f"boot-1-{number}")
+        extensions[number] = extension
+    sip_server.pbx_core.extension_registry.get.side_effect = extensions.get
+    sip_server.pbx_core.call_manager.get_extension_calls.return_value = []
+    return sip_server
+
+
+def _make_rollout(provisioning: MagicMock, **settings: Any) -> Any:
+    from pbx.features.reboot_rollout import RebootRollout
+
+    values = {"wave_interval": 0, "registration_timeout": 1, "poll_interval": 0.01}
+    values.update(settings)
+    return RebootRollout(provisioning, _Config(values))
+
+
+def _reregistering_provisioning(
+    sip_server: MagicMock, dead: tuple = (), refreshing: tuple = ()
+) -> MagicMock:
+    """Provisioning whose reboots make the phone REGISTER again
+
+    Phones in dead stay silent; phones in refreshing ignore the reboot and
+    only send a refresh REGISTER on their existing Call-ID.
+    """
+    provisioning = MagicMock()
+    sent: list[str] = []
+
+    def reboot(number: str, _sip_server: Any) -> bool:
+        sent.append(number)
+        extension = sip_server.pbx_core.extension_registry.get(number)
+        if number in refreshing:
+            extension.register(("10.0.0.1", 5060), call_id=f"boot-1-{number}")
+        elif number not in dead:
+            extension.register(("10.0.0.1", 5060), call_id=f"boot-2-{number}")
+        return True
+
+    provisioning.reboot_phone.side_effect = reboot
+    provisioning.sent = sent
+    return provisioning
+
+
+@pytest.mark.unit
+@patch("pbx.features.reboot_rollout.get_logger", return_value=MagicMock())
+class TestRebootRollout:
+    """Tests for RebootRollout."""
+
+    def test_reboots_in_waves(self, _mock_logger) -> None:
+        numbers = [str(1000 + i) for i in range(5)]
+        sip_server = _make_sip_server(numbers)
+        provisioning = _reregistering_provisioning(sip_server)
+        rollout = _make_rollout(provisioning, wave_size=2)
+
+        rollout.schedule(numbers, sip_server)
+        assert rollout.wait(5)
+
+        progress = rollout.get_progress()
+        assert progress["status"] == "completed"
+        assert [w["size"] for w in progress["waves"]] == [2, 2, 1]
+        assert all(w["reregistered"] == w["sent"] for w in progress["waves"])
+        assert progress["counts"] == {"reregistered": 5}
+        assert progress["percent_complete"] == 100
+        assert provisioning.sent == numbers
+
+    def test_busy_phones_are_deferred_then_skipped(self, _mock_logger) -> None:
+        sip_server = _make_sip_server(["1001", "1002"])
+        sip_server.pbx_core.call_manager.get_extension_calls.side_effect = lambda ext: (
+            [MagicMock()] if ext == "1001" else []
+        )
+        provisioning = _reregistering_provisioning(sip_server)
+        rollout = _make_rollout(provisioning, max_deferrals=2)
+
+        rollout.schedule(["1001", "1002"], sip_server)
+        assert rollout.wait(5)
+
+        progress = rollout.get_progress()
+        assert provisioning.sent == ["1002"]
+        assert progress["skipped_busy"] == ["1001"]
+        assert progress["status"] == "completed"
+
+    def test_pauses_when_wave_does_not_come_back(self, _mock_logger) -> None:
+        numbers = ["1001", "1002", "1003"]
+        sip_server = _make_sip_server(numbers)
+        provisioning = _reregistering_provisioning(sip_server, dead=("1001",))
+        rollout = _make_rollout(
+            provisioning, wave_size=1, registration_timeout=0.05, min_reregistered=1.0
+        )
+
+        rollout.schedule(numbers, sip_server)
+        for _ in range(200):
+            if rollout.get_progress()["status"] == "paused":
+                break
+            time.sleep(0.01)
+
+        progress = rollout.get_progress()
+        assert progress["status"] == "paused"
+        assert progress["timed_out"] == ["1001"]
+        assert "wave 1" in progress["paused_reason"]
+        assert provisioning.sent == ["1001"]
+
+        assert rollout.resume() is True
+        assert rollout.wait(5)
+        assert rollout.get_progress()["status"] == "completed"
+        assert provisioning.sent == numbers
+
+    def test_refresh_register_is_not_a_reboot(self, _mock_logger) -> None:
+        sip_server = _make_sip_server(["1001", "1002"])
+        provisioning = _reregistering_provisioning(sip_server, refreshing=("1001",))
+        rollout = _make_rollout(provisioning, registration_timeout=0.05, min_reregistered=0)
+
+        rollout.schedule(["1001", "1002"], sip_server)
+        assert rollout.wait(5)
+
+        progress = rollout.get_progress()
+        assert progress["timed_out"] == ["1001"]
+        assert progress["counts"] == {"timed_out": 1, "reregistered": 1}
+
+    def test_cancel_paused_rollout(self, _mock_logger) -> None:
+        sip_server = _make_sip_server(["1001", "1002"])
+        provisioning = _reregistering_provisioning(sip_server, dead=("1001",))
+        rollout = _make_rollout(provisioning, wave_size=1, registration_timeout=0.05)
+
+        rollout.schedule(["1001", "1002"], sip_server)
+        for _ in range(200):
+            if rollout.get_progress()["status"] == "paused":
+                break
+            time.sleep(0.01)
+
+        assert rollout.cancel() is True
+        assert rollout.wait(5)
+        assert rollout.get_progress()["status"] == "cancelled"
+        assert provisioning.sent == ["1001"]
+        assert rollout.cancel() is False
+
+    def test_schedule_merges_into_active_rollout(self, _mock_logger) -> None:
+        sip_server = _make_sip_server(["1001", "1002", "1003"])
+        provisioning = _reregistering_provisioning(sip_server, dead=("1001",))
+        rollout = _make_rollout(provisioning, wave_size=1, registration_timeout=0.05)
+
+        first = rollout.schedule(["1001", "1002"], sip_server)
+        merged = rollout.schedule(["1002", "1003"], sip_server, reason="ad_sync")
+
+        assert merged["rollout_id"] == first["rollout_id"]
+        assert merged["total"] == 3
+        rollout.cancel()
+        assert rollout.wait(5)
+
+
+@pytest.mark.unit
+class TestRebootRolloutRoutes:
+    """Tests for the reboot rollout API routes."""
+
+    def test_reboot_all_schedules_rollout(
+        self, api_client: FlaskClient, mock_pbx_core: MagicMock
+    ) -> None:
+        mock_pbx_core.phone_provisioning.schedule_reboots.return_value = {
+            "rollout_id": "rollout-1",
+            "total": 40,
+        }
+        with patch("pbx.api.utils.verify_authentication", return_value=(True, {"is_admin": True})):
+            response = api_client.post("/api/phones/reboot", json={})
+
+        assert response.status_code == 202
+        assert response.get_json()["rollout"]["rollout_id"] == "rollout-1"
+        mock_pbx_core.phone_provisioning.reboot_all_phones.assert_not_called()
+
+    def test_rollout_progress_not_found(
+        self, api_client: FlaskClient, mock_pbx_core: MagicMock
+    ) -> None:
+        rollout = mock_pbx_core.phone_provisioning.get_reboot_rollout.return_value
+        rollout.get_progress.return_value = None
+        with patch("pbx.api.utils.verify_authentication", return_value=(True, {"is_admin": True})):
+            response = api_client.get("/api/phones/reboot/rollout")
+
+        assert response.status_code == 404
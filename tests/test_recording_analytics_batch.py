@@ -0,0 +1,154 @@
+"""Tests for pbx.features.recording_analytics_batch — persisted, resumable batch analytics."""
+
+import json
+import struct
+import wave
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+def _write_wav(path) -> str:
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(8000)
+        wf.writeframes(struct.pack("<h", 1000) * 800)
+    return str(path)
+
+
+@pytest.mark.unit
+@patch("pbx.features.recording_analytics_batch.get_logger", return_value=MagicMock())
+class TestRecordingAnalyticsBatch:
+    """Tests for RecordingAnalyticsBatch."""
+
+    def test_enqueue_is_persisted_and_deduplicated(self, _mock_logger, tmp_path):
+        """Queued jobs survive a restart and are not queued twice."""
+        from pbx.features.recording_analytics_batch import RecordingAnalyticsBatch
+
+        journal = tmp_path / "jobs.jsonl"
+        batch = RecordingAnalyticsBatch(journal_path=str(journal))
+        assert batch.enqueue("rec-1", "/a.wav", ["keywords"])
+        assert not batch.enqueue("rec-1", "/a.wav")
+
+        reloaded = RecordingAnalyticsBatch(journal_path=str(journal))
+        assert [job["job_id"] for job in reloaded.get_pending()] == ["rec-1"]
+        assert reloaded.jobs["rec-1"]["analysis_types"] == ["keywords"]
+
+    def test_resume_after_crash(self, _mock_logger, tmp_path):
+        """Done jobs are skipped; running jobs from a dead process go back to pending."""
+        from pbx.features.recording_analytics_batch import RecordingAnalyticsBatch
+
+        journal = tmp_path / "jobs.jsonl"
+        events = [
+            {"event": "queued", "job_id": "a", "recording_id": "a", "audio_path": "/a.wav"},
+            {"event": "queued", "job_id": "b", "recording_id": "b", "audio_path": "/b.wav"},
+            {"event": "queued", "job_id": "c", "recording_id": "c", "audio_path": "/c.wav"},
+            {"event": "started", "job_id": "a"},
+            {"event": "done", "job_id": "a", "result": {"analyses": {}}},
+            {"event": "started", "job_id": "b"},
+        ]
+        journal.write_text("\n".join(json.dumps(e) for e in events) + '\n{"event": "do')
+
+        batch = RecordingAnalyticsBatch(journal_path=str(journal))
+
+        assert sorted(job["job_id"] for job in batch.get_pending()) == ["b", "c"]
+        assert batch.jobs["a"]["status"] == "done"
+        assert batch.jobs["b"]["attempts"] == 1
+
+    def test_failed_job_retried_until_max_attempts(self, _mock_logger, tmp_path):
+        """A failing job returns to pending until it has used its attempts."""
+        from pbx.features.recording_analytics_batch import RecordingAnalyticsBatch
+
+        config = {"features": {"recording_analytics": {"batch_max_attempts": 2}}}
+        batch = RecordingAnalyticsBatch(config, journal_path=str(tmp_path / "jobs.jsonl"))
+        batch.enqueue("rec-1", "/a.wav")
+
+        batch._record({"event": "started", "job_id": "rec-1"})
+        batch._record({"event": "failed", "job_id": "rec-1", "error": "boom"})
+        assert batch.jobs["rec-1"]["status"] == "pending"
+
+        batch._record({"event": "started", "job_id": "rec-1"})
+        batch._record({"event": "failed", "job_id": "rec-1", "error": "boom"})
+        assert batch.jobs["rec-1"]["status"] == "failed"
+        assert batch.get_statistics()["jobs"]["failed"] == 1
+
+    def test_final_failure_is_not_retried(self, _mock_logger, tmp_path):
+        """An undecodable recording fails on its first attempt, and stays failed after compaction."""
+        from pbx.features.recording_analytics_batch import RecordingAnalyticsBatch
+
+        journal = tmp_path / "jobs.jsonl"
+        batch = RecordingAnalyticsBatch(journal_path=str(journal))
+        batch.enqueue("rec-1", "/a.wav")
+        batch._record({"event": "started", "job_id": "rec-1"})
+        batch._record({"event": "failed", "job_id": "rec-1", "error": "bad", "final": True})
+        assert batch.jobs["rec-1"]["status"] == "failed"
+
+        batch.compact()
+        reloaded = RecordingAnalyticsBatch(journal_path=str(journal))
+        assert reloaded.jobs["rec-1"]["status"] == "failed"
+        assert reloaded.jobs["rec-1"]["error"] == "bad"
+
+    def test_compact_preserves_state(self, _mock_logger, tmp_path):
+        """Compaction rewrites the journal without changing replayed state."""
+        from pbx.features.recording_analytics_batch import RecordingAnalyticsBatch
+
+        journal = tmp_path / "jobs.jsonl"
+        batch = RecordingAnalyticsBatch(journal_path=str(journal))
+        batch.enqueue("a", "/a.wav")
+        batch.enqueue("b", "/b.wav")
+        batch._record({"event": "started", "job_id": "a"})
+        batch._record({"event": "done", "job_id": "a", "result": {"ok": True}})
+        batch.compact()
+
+        reloaded = RecordingAnalyticsBatch(journal_path=str(journal))
+        assert reloaded.jobs["a"]["status"] == "done"
+        assert reloaded.jobs["a"]["result"] == {"ok": True}
+        assert reloaded.jobs["b"]["status"] == "pending"
+
+    @pytest.mark.slow
+    def test_run_process_pool(self, _mock_logger, tmp_path):
+        """Pending jobs run on worker processes and results are journaled."""
+        from pbx.features.recording_analytics_batch import RecordingAnalyticsBatch
+
+        recordings = tmp_path / "recordings"
+        recordings.mkdir()
+        for name in ("one", "two", "three"):
+            _write_wav(recordings / f"{name}.wav")
+
+        analytics = MagicMock()
+        analytics.analyses = {}
+        analytics.total_analyses = 0
+        journal = tmp_path / "jobs.jsonl"
+        batch = RecordingAnalyticsBatch(journal_path=str(journal), analytics=analytics)
+        assert batch.enqueue_directory(str(recordings), analysis_types=["quality"]) == 3
+
+        summary = batch.run(max_workers=2)
+
+        assert summary["completed"] == 3
+        assert summary["remaining"] == 0
+        assert summary["recordings_per_hour"] > 0
+        assert set(analytics.analyses) == {"one", "two", "three"}
+        assert "audio_metrics" in analytics.analyses["one"]["analyses"]["quality"]
+        assert RecordingAnalyticsBatch(journal_path=str(journal)).get_pending() == []
+
+    @pytest.mark.slow
+    def test_undecodable_recording_journaled_as_failed(self, _mock_logger, tmp_path):
+        """A recording that won't decode is a failed job, not a done one."""
+        from pbx.features.recording_analytics_batch import RecordingAnalyticsBatch
+
+        recordings = tmp_path / "recordings"
+        recordings.mkdir()
+        _write_wav(recordings / "good.wav")
+        (recordings / "torn.wav").write_bytes(b"RIFF\x00\x00")
+        journal = tmp_path / "jobs.jsonl"
+        batch = RecordingAnalyticsBatch(journal_path=str(journal))
+        batch.enqueue_directory(str(recordings), analysis_types=["keywords"])
+
+        summary = batch.run(max_workers=1)
+
+        assert (summary["completed"], summary["failed"], summary["remaining"]) == (1, 1, 0)
+        reloaded = RecordingAnalyticsBatch(journal_path=str(journal))
+        assert reloaded.jobs["good"]["status"] == "done"
+        assert reloaded.jobs["torn"]["status"] == "failed"
+        assert reloaded.jobs["torn"]["attempts"] == 1
@@ -298,7 +298,8 @@ def test_init_custom_range(self) -> None:
             from pbx.rtp.handler import RTPRelay
 
             r = RTPRelay(port_range_start=30000, port_range_end=30010)
-        assert r.port_pool == [30000, 30002, 30004, 30006, 30008]
+        assert len(r.port_pool) == 5
+        assert r.port_pool.acquire("call-1").rtp_port == 30000
 
 
 @pytest.mark.unit
@@ -321,6 +322,7 @@ def test_allocate_success(self) -> None:
         assert result == (30000, 30001)
         assert "call-1" in r.active_relays
         assert r.active_relays["call-1"]["rtp_port"] == 30000
+        r.release_relay("call-1")
 
     def test_allocate_no_ports(self) -> None:
         with patch("pbx.rtp.handler.get_logger"):
@@ -328,7 +330,7 @@ def test_allocate_no_ports(self) -> None:
 
             r = RTPRelay(port_range_start=30000, port_range_end=30002)
 
-        r.port_pool = []
+        r.port_pool.acquire("other-call")
         result = r.allocate_relay("call-1")
         assert result is None
 
@@ -338,7 +340,6 @@ def test_allocate_handler_start_fails(self) -> None:
 
             r = RTPRelay(port_range_start=30000, port_range_end=30004)
 
-        _original_pool = r.port_pool.copy()
         with patch("pbx.rtp.handler.RTPRelayHandler") as mock_handler_cls:
             mock_handler = MagicMock()
             mock_handler.start.return_value = False
@@ -349,6 +350,7 @@ def test_allocate_handler_start_fails(self) -> None:
         assert result is None
         # Port should be returned to pool
         assert 30000 in r.port_pool
+        assert r.port_pool.leases == {}
 
 
 @pytest.mark.unit
@@ -379,6 +381,37 @@ def test_set_endpoints_nonexistent_call(self) -> None:
         # Should not raise
         r.set_endpoints("no-such-call", ("10.0.0.1", 5000), ("10.0.0.2", 6000))
 
+    def test_audio_tap_reaches_call_handler(self) -> None:
+        with patch("pbx.rtp.handler.get_logger"):
+            from pbx.rtp.handler import RTPRelay
+
+            r = RTPRelay()
+
+        mock_handler = MagicMock()
+        r.active_relays["call-1"] = {"handler": mock_handler, "rtp_port": 10000, "rtcp_port": 10001}
+        tap = MagicMock()
+
+        assert r.add_audio_tap("call-1", tap) is True
+        assert r.add_audio_tap("no-such-call", tap) is False
+        r.remove_audio_tap("call-1", tap)
+
+        mock_handler.add_audio_tap.assert_called_once_with(tap)
+        mock_handler.remove_audio_tap.assert_called_once_with(tap)
+
+    def test_send_to_leg_reaches_call_handler(self) -> None:
+        with patch("pbx.rtp.handler.get_logger"):
+            from pbx.rtp.handler import RTPRelay
+
+            r = RTPRelay()
+
+        mock_handler = MagicMock()
+        mock_handler.send_to_leg.return_value = True
+        r.active_relays["call-1"] = {"handler": mock_handler, "rtp_port": 10000, "rtcp_port": 10001}
+
+        assert r.send_to_leg("call-1", "a", b"mix") is True
+        assert r.send_to_leg("no-such-call", "a", b"mix") is False
+        mock_handler.send_to_leg.assert_called_once_with("a", b"mix")
+
 
 @pytest.mark.unit
 class TestRTPRelayRelease:
@@ -392,9 +425,7 @@ def test_release_existing(self) -> None:
 
         mock_handler = MagicMock()
         r.active_relays["call-1"] = {"handler": mock_handler, "rtp_port": 30000, "rtcp_port": 30001}
-        # Remove 30000 from pool (as if it was allocated)
-        if 30000 in r.port_pool:
-            r.port_pool.remove(30000)
+        r.port_pool.acquire("call-1")
 
         r.release_relay("call-1")
 
@@ -636,6 +667,62 @@ def recv_side_effect(size):
         h._relay_loop()
         mock_sock.sendto.assert_called_with(packet, ("10.0.0.1", 5000))
 
+    def test_relayed_packets_feed_audio_taps(self) -> None:
+        with patch("pbx.rtp.handler.get_logger"):
+            from pbx.rtp.handler import RTPRelayHandler
+
+            h = RTPRelayHandler(local_port=10000, call_id="c1")
+
+        packets = [
+            (self._make_rtp_packet(seq=1), ("10.0.0.1", 5000)),
+            (self._make_rtp_packet(seq=2), ("10.0.0.2", 6000)),
+            (self._make_rtp_packet(seq=3), ("10.0.0.9", 7000)),
+        ]
+        mock_sock = MagicMock()
+        h.socket = mock_sock
+        h.running = True
+        h._start_time = time.time()
+        h.learned_a = ("10.0.0.1", 5000)
+        h.learned_b = ("10.0.0.2", 6000)
+        tapped = []
+        broken = MagicMock(side_effect=ValueError("bad tap"))
+        h.add_audio_tap(lambda leg, packet: tapped.append((leg, packet)))
+        h.add_audio_tap(broken)
+
+        def recv_side_effect(size):
+            if packets:
+                return packets.pop(0)
+            h.running = False
+            raise OSError("done")
+
+        mock_sock.recvfrom.side_effect = recv_side_effect
+        h._relay_loop()
+
+        # The unknown third source is not tapped; the failing tap is dropped
+        assert [leg for leg, _ in tapped] == ["a", "b"]
+        assert tapped[0][1] == self._make_rtp_packet(seq=1)
+        broken.assert_called_once()
+        assert len(h.audio_taps) == 1
+
+    def test_send_to_leg_prefers_learned_address(self) -> None:
+        with patch("pbx.rtp.handler.get_logger"):
+            from pbx.rtp.handler import RTPRelayHandler
+
+            h = RTPRelayHandler(local_port=10000, call_id="c1")
+
+        h.socket = MagicMock()
+        h.endpoint_a = ("192.168.1.10", 30000)
+        assert h.send_to_leg("a", b"mix") is True
+        h.socket.sendto.assert_called_with(b"mix", ("192.168.1.10", 30000))
+
+        h.learned_a = ("203.0.113.5", 40000)
+        assert h.send_to_leg("a", b"mix") is True
+        h.socket.sendto.assert_called_with(b"mix", ("203.0.113.5", 40000))
+
+        assert h.send_to_leg("b", b"mix") is False
+        h.socket.sendto.side_effect = OSError("unreachable")
+        assert h.send_to_leg("a", b"mix") is False
+
     def test_relay_learns_endpoint_a_from_sdp(self) -> None:
         with patch("pbx.rtp.handler.get_logger"):
             from pbx.rtp.handler import RTPRelayHandler
@@ -780,6 +867,9 @@ def recv_side_effect(size):
         h._relay_loop()
         assert h.learned_a is None
         mock_sock.sendto.assert_not_called()
+        # Warnings bypass the rate-limited per-packet logger
+        h.logger.warning.assert_called_once()
+        assert "learning timeout" in h.logger.warning.call_args.args[0]
 
     def test_relay_learning_timeout_expired_b(self) -> None:
         """Reject packet from unknown source after learning timeout (for B)."""
@@ -1369,6 +1459,33 @@ def recv_side_effect(size):
         r.running = True
         r._record_loop()
 
+    def test_record_through_jitter_buffer(self) -> None:
+        with patch("pbx.rtp.handler.get_logger"), patch("pbx.rtp.jitter_buffer.get_logger"):
+            from pbx.rtp.handler import RTPRecorder
+            from pbx.rtp.jitter_buffer import JitterBuffer
+
+            r = RTPRecorder(local_port=5000, call_id="call-1", jitter_buffer=JitterBuffer())
+
+        # Packets 2 and 3 swap places on the way in
+        packets = [
+            struct.pack("!BBHII", 0x80, 0, seq, seq * 160, 0xDEADBEEF) + bytes([seq]) * 160
+            for seq in (1, 3, 2, 4)
+        ]
+        mock_sock = MagicMock()
+        mock_sock.recvfrom.side_effect = [(p, ("10.0.0.1", 6000)) for p in packets] + [
+            OSError("done")
+        ]
+
+        r.socket = mock_sock
+        r.running = True
+        # The error logged once the packets run out ends the loop
+        with patch.object(r, "logger") as logger:
+            logger.error.side_effect = lambda *a: setattr(r, "running", False)
+            r._record_loop()
+        r.stop()
+
+        assert [chunk[0] for chunk in r.recorded_data] == [1, 2, 3, 4]
+
 
 @pytest.mark.unit
 class TestRTPRecorderGetAudio:
@@ -0,0 +1,248 @@
+"""Tests for the RTP port pool in pbx/rtp/port_pool.py and its use by RTPRelay."""
+
+import importlib
+import socket
+import sys
+import time
+from collections import deque
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pbx.rtp.port_pool import RTPPortPool
+
+BASE_PORT = 47000
+
+
+class _Clock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _EndsOnlyDeque(deque):
+    """Deque that fails the test if anything but its ends is touched"""
+
+    def _scan(self, *args: object) -> None:
+        raise AssertionError("queue scanned")
+
+    __iter__ = __contains__ = __reversed__ = index = remove = count = _scan
+
+    def __getitem__(self, index: int) -> object:
+        if index not in (0, -1):
+            self._scan()
+        return super().__getitem__(index)
+
+
+def _pool(ports: int = 4, **kwargs: object) -> RTPPortPool:
+    kwargs.setdefault("clock", _Clock())
+    with patch("pbx.rtp.port_pool.get_logger", return_value=MagicMock()):
+        return RTPPortPool(BASE_PORT, BASE_PORT + 2 * ports, **kwargs)
+
+
+def _real_handler_module():
+    """The real pbx.rtp.handler, even if another test module put a mock in sys.modules"""
+    with patch.dict(sys.modules):
+        sys.modules.pop("pbx.rtp.handler", None)
+        return importlib.import_module("pbx.rtp.handler")
+
+
+rtp_handler = _real_handler_module()
+
+
+def _relay(**kwargs: object):
+    with patch.object(rtp_handler, "get_logger", return_value=MagicMock()):
+        relay = rtp_handler.RTPRelay(BASE_PORT, BASE_PORT + 8, **kwargs)
+    relay.port_pool.clock = _Clock()
+    return relay
+
+
+@pytest.mark.unit
+class TestRTPPortPool:
+    """Tests for allocation, quarantine and pre-binding."""
+
+    def test_released_port_rests_in_quarantine(self) -> None:
+        pool = _pool(ports=2, quarantine_seconds=2.0)
+
+        first = pool.acquire("call-1")
+        second = pool.acquire("call-2")
+        assert (first.rtp_port, first.rtcp_port) == (BASE_PORT, BASE_PORT + 1)
+        assert second.rtp_port == BASE_PORT + 2
+
+        assert pool.release(first.rtp_port)
+        assert not pool.release(first.rtp_port)
+        assert first.rtp_port in pool
+        # Still resting: the pool is empty for now
+        assert pool.acquire("call-3") is None
+
+        pool.clock.now += 2.0
+        assert pool.acquire("call-3").rtp_port == BASE_PORT
+
+    def test_exhaustion_metrics(self) -> None:
+        pool = _pool(ports=2)
+        pool.acquire("call-1")
+        pool.acquire("call-2")
+
+        assert pool.acquire("call-3") is None
+        assert pool.acquire("call-4") is None
+
+        stats = pool.get_statistics()
+        assert stats["exhaustions"] == 2
+        assert stats["last_exhausted"] == pool.clock.now
+        assert stats["in_use"] == stats["peak_in_use"] == 2
+        assert stats["available"] == 0
+        assert stats["utilization"] == 1.0
+
+    def test_prebound_sockets_handed_out(self) -> None:
+        pool = _pool(ports=4, prebind=2)
+        try:
+            assert pool.maintain() == 2
+            assert pool.get_statistics()["prebound"] == 2
+
+            lease = pool.acquire("call-1", bind=True)
+            assert lease.rtp_socket.getsockname()[1] == lease.rtp_port
+            assert lease.rtcp_socket.getsockname()[1] == lease.rtcp_port
+            # Running low on bound pairs asks the maintenance thread for more
+            assert pool.demand.is_set()
+
+            # A caller binding its own socket gets a plain port
+            plain = pool.acquire("call-2")
+            assert plain.rtp_socket is None
+            assert plain.rtp_port not in (lease.rtp_port, BASE_PORT + 2)
+
+            pool.release(lease.rtp_port)
+            assert lease.rtp_socket.fileno() == -1
+        finally:
+            pool.close()
+
+    def test_stray_packets_drained_before_handout(self) -> None:
+        pool = _pool(ports=1, prebind=1)
+        pool.maintain()
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sender.sendto(b"late packet", ("127.0.0.1", BASE_PORT))
+            time.sleep(0.05)
+
+            lease = pool.acquire("call-1", bind=True)
+
+            lease.rtp_socket.settimeout(0.1)
+            with pytest.raises(TimeoutError):
+                lease.rtp_socket.recv(2048)
+            pool.release(lease.rtp_port)
+        finally:
+            sender.close()
+            pool.close()
+
+    def test_bind_failure_moves_to_next_port(self) -> None:
+        pool = _pool(ports=2)
+        # Another process holds the first port without SO_REUSEADDR
+        squatter = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        squatter.bind(("0.0.0.0", BASE_PORT))  # nosec B104
+        try:
+            lease = pool.acquire("call-1", bind=True)
+        finally:
+            squatter.close()
+
+        assert lease.rtp_port == BASE_PORT + 2
+        assert pool.bind_failures == 1
+        assert BASE_PORT in pool
+        pool.release(lease.rtp_port)
+
+    def test_find_leaks_skips_live_and_young_leases(self) -> None:
+        pool = _pool(ports=3)
+        pool.acquire("ended")
+        pool.acquire("live")
+        pool.clock.now += 120
+        pool.acquire("setting-up")
+
+        leaked = pool.find_leaks({"live"}, min_age=60)
+
+        assert [lease.owner for lease in leaked] == ["ended"]
+
+    def test_cycle_touches_only_queue_ends(self) -> None:
+        pool = _pool(ports=5000, quarantine_seconds=0)
+        for i in range(4999):
+            pool.acquire(f"call-{i}")
+        assert all(isinstance(q, deque) for q in (pool._free, pool._bound, pool._quarantine))
+        # pop(0) from a list or a sort on every release would scan the queues
+        pool._free = _EndsOnlyDeque(pool._free)
+        pool._bound = _EndsOnlyDeque(pool._bound)
+        pool._quarantine = _EndsOnlyDeque(pool._quarantine)
+
+        for _ in range(200):
+            assert pool.release(pool.acquire("cycle").rtp_port)
+
+        assert pool.get_statistics()["allocations"] == 5199
+
+    def test_reclaim_skips_lease_released_since_found(self) -> None:
+        pool = _pool(ports=1)
+        lease = pool.acquire("ended")
+        pool.clock.now += 120
+        (leaked,) = pool.find_leaks(set(), min_age=60)
+
+        pool.release(lease.rtp_port)
+        pool.clock.now += pool.quarantine_seconds
+        pool.acquire("reused")
+
+        assert pool.reclaim(leaked) is False
+        assert pool.get_statistics()["leaks_reclaimed"] == 0
+        assert lease.rtp_port in pool.leases
+
+
+@pytest.mark.unit
+class TestRTPRelayPortPool:
+    """Tests for RTPRelay's use of the pool."""
+
+    def test_reclaim_leaks_against_call_manager(self) -> None:
+        call_manager = MagicMock()
+        call_manager.active_calls = {"live": MagicMock()}
+        relay = _relay(call_manager=call_manager)
+        handler = MagicMock()
+        with patch.object(rtp_handler, "RTPRelayHandler", return_value=handler):
+            relay_ports = relay.allocate_relay("ended-relay")
+            relay.allocate_relay("live")
+        plain_port = relay.acquire_port("ended-plain")
+
+        relay.port_pool.clock.now += 120
+        reclaimed = relay.reclaim_leaks(min_age=60)
+
+        assert sorted(reclaimed) == sorted([relay_ports[0], plain_port])
+        assert "ended-relay" not in relay.active_relays
+        assert "live" in relay.active_relays
+        assert handler.stop.call_count == 1
+        assert relay.port_pool.get_statistics()["leaks_reclaimed"] == 2
+        relay.release_relay("live")
+
+    def test_transfer_keeps_ports_with_new_call(self) -> None:
+        call_manager = MagicMock()
+        call_manager.active_calls = {"new-call": MagicMock()}
+        relay = _relay(call_manager=call_manager)
+        with patch.object(rtp_handler, "RTPRelayHandler"):
+            relay.allocate_relay("old-call")
+
+        assert relay.transfer_relay("old-call", "new-call")
+        assert not relay.transfer_relay("old-call", "new-call")
+
+        relay.port_pool.clock.now += 120
+        assert relay.reclaim_leaks(min_age=60) == []
+        assert relay.port_pool.leases[BASE_PORT].owner == "new-call"
+        relay.release_relay("new-call")
+
+    def test_maintenance_thread_prebinds(self) -> None:
+        relay = _relay(prebind=2)
+        relay.port_pool.clock = time.monotonic
+        relay.start()
+        try:
+            deadline = time.monotonic() + 2.0
+            while relay.port_pool.get_statistics()["prebound"] < 2:
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+        finally:
+            relay.stop()
+
+        assert relay.port_pool.get_statistics()["prebound"] == 0
+        assert len(relay.port_pool) == 4
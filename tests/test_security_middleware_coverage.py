@@ -243,10 +243,9 @@ class TestRateLimiterCleanup:
 
     def test_cleanup_removes_old_entries(self) -> None:
         limiter = RateLimiter(cleanup_interval=0)
-        limiter.buckets = {
-            "old_ip": {"tokens": 5, "last_update": time.time() - 7200, "request_count": 10},
-            "new_ip": {"tokens": 5, "last_update": time.time(), "request_count": 1},
-        }
+        limiter.is_allowed("old_ip")
+        limiter.is_allowed("new_ip")
+        limiter.buckets["old_ip"]["last_update"] = time.time() - 7200
         limiter.last_cleanup = 0
 
         limiter._cleanup_old_entries()
@@ -256,9 +255,8 @@ def test_cleanup_removes_old_entries(self) -> None:
 
     def test_cleanup_respects_interval(self) -> None:
         limiter = RateLimiter(cleanup_interval=300)
-        limiter.buckets = {
-            "old_ip": {"tokens": 5, "last_update": time.time() - 7200, "request_count": 10},
-        }
+        limiter.is_allowed("old_ip")
+        limiter.buckets["old_ip"]["last_update"] = time.time() - 7200
         limiter.last_cleanup = time.time()  # Just cleaned up
 
         limiter._cleanup_old_entries()
@@ -296,6 +294,105 @@ def test_stats_exhausted_tokens(self) -> None:
         assert stats["total_requests"] == 2
 
 
+@pytest.mark.unit
+class TestRateLimiterShards:
+    """Tests for sharding, LRU eviction, route costs and counters."""
+
+    def test_lru_evicts_least_recently_seen(self) -> None:
+        limiter = RateLimiter(max_tracked_ips=3, shards=1, cleanup_interval=99999)
+        for ip in ("10.0.0.1", "10.0.0.2", "10.0.0.3"):
+            limiter.is_allowed(ip)
+        # Touching 10.0.0.1 makes 10.0.0.2 the coldest
+        limiter.is_allowed("10.0.0.1")
+
+        limiter.is_allowed("10.0.0.4")
+
+        assert set(limiter.buckets) == {"10.0.0.1", "10.0.0.3", "10.0.0.4"}
+        assert limiter.get_statistics()["evictions"] == 1
+
+    def test_tracked_ips_bounded_across_shards(self) -> None:
+        limiter = RateLimiter(max_tracked_ips=100, shards=16, cleanup_interval=99999)
+        for i in range(1000):
+            limiter.is_allowed(f"10.0.{i // 256}.{i % 256}")
+
+        assert len(limiter.buckets) <= 100
+        assert limiter.get_statistics()["tracked_clients"] == len(limiter.buckets)
+
+    def test_route_costs(self) -> None:
+        limiter = RateLimiter(requests_per_minute=60, burst_size=10)
+
+        assert limiter.is_allowed("192.168.1.1", "/api/analytics/export") == (True, None)
+        allowed, retry_after = limiter.is_allowed("192.168.1.1", "/api/statistics")
+        # The export took all ten tokens; statistics needs five
+        assert allowed is False
+        assert retry_after >= 4
+        assert limiter.cost_for("/api/extensions") == 1
+        assert limiter.cost_for(None) == 1
+
+    def test_route_cost_capped_at_burst(self) -> None:
+        limiter = RateLimiter(burst_size=5, route_costs={"/api/expensive": 50})
+
+        assert limiter.cost_for("/api/expensive") == 5
+        assert limiter.is_allowed("192.168.1.1", "/api/expensive")[0] is True
+
+    def test_allowed_and_denied_counters(self) -> None:
+        limiter = RateLimiter(requests_per_minute=60, burst_size=2)
+        for _ in range(5):
+            limiter.is_allowed("192.168.1.1")
+        limiter.is_allowed("192.168.1.2")
+
+        stats = limiter.get_statistics()
+        assert stats["allowed"] == 3
+        assert stats["denied"] == 3
+        assert stats["tracked_clients"] == 2
+
+    def test_concurrent_clients(self) -> None:
+        """Threads hammering thousands of client keys keep exact per-client accounting."""
+        import threading
+
+        limiter = RateLimiter(requests_per_minute=1, burst_size=5, max_tracked_ips=100000)
+        clients = [f"10.{i // 65536}.{i // 256 % 256}.{i % 256}" for i in range(4000)]
+        barrier = threading.Barrier(8)
+
+        def worker(offset: int) -> None:
+            barrier.wait()
+            for i in range(len(clients)):
+                limiter.is_allowed(clients[(i + offset * 500) % len(clients)])
+                limiter.is_allowed(clients[(i + offset * 500) % len(clients)])
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = limiter.get_statistics()
+        # Each client was asked 16 times and has a burst of 5
+        assert stats["allowed"] == 5 * len(clients)
+        assert stats["denied"] == 11 * len(clients)
+        assert stats["tracked_clients"] == len(clients)
+        assert stats["evictions"] == 0
+
+    def test_eviction_does_not_scan_buckets(self) -> None:
+        limiter = RateLimiter(max_tracked_ips=20000, shards=1, cleanup_interval=99999)
+        for i in range(20000):
+            limiter.is_allowed(f"fill-{i}")
+
+        def scalar_min(*args: object, **kwargs: object) -> object:
+            # A min() over every bucket would be a single iterable argument
+            assert len(args) > 1, "eviction scanned every bucket"
+            return min(*args, **kwargs)
+
+        with patch("pbx.utils.security_middleware.min", side_effect=scalar_min, create=True):
+            for i in range(500):
+                limiter.is_allowed(f"new-{i}")
+
+        assert limiter.get_statistics()["evictions"] == 500
+        assert len(limiter.buckets) == 20000
+        assert "fill-499" not in limiter.buckets
+        assert "fill-500" in limiter.buckets
+
+
 @pytest.mark.unit
 class TestRequestValidatorValidatePath:
     """Tests for RequestValidator.validate_path method."""
@@ -906,16 +906,19 @@ def test_is_ip_blocked_check_database(self, mock_get_logger: MagicMock) -> None:
         db = MagicMock()
         db.enabled = True
         db.db_type = "sqlite"
-        db.fetch_all.return_value = []
-        db.fetch_one.return_value = {"reason": "DB block", "blocked_until": "2099-01-01"}
+        db.fetch_all.return_value = [
+            {"ip_address": "5.6.7.8", "reason": "DB block", "blocked_until": "2099-01-01"}
+        ]
 
         detector = ThreatDetector(database=db, config={})
         blocked, reason = detector.is_ip_blocked("5.6.7.8")
         assert blocked is True
         assert reason == "DB block"
+        # Served from the in-memory mirror
+        db.fetch_one.assert_not_called()
 
     @patch("pbx.utils.security.get_logger")
-    def test_is_ip_blocked_database_postgresql_query(self, mock_get_logger: MagicMock) -> None:
+    def test_is_ip_blocked_does_not_query_database(self, mock_get_logger: MagicMock) -> None:
         from pbx.utils.security import ThreatDetector
 
         db = MagicMock()
@@ -925,11 +928,12 @@ def test_is_ip_blocked_database_postgresql_query(self, mock_get_logger: MagicMoc
         db.fetch_one.return_value = None
 
         detector = ThreatDetector(database=db, config={})
-        blocked, _reason = detector.is_ip_blocked("5.6.7.8")
-        assert blocked is False
-        # Verify the PostgreSQL query variant was used
-        call_args = db.fetch_one.call_args[0][0]
-        assert "%s" in call_args
+        db.execute.reset_mock()
+        for _ in range(10):
+            blocked, _reason = detector.is_ip_blocked("5.6.7.8")
+            assert blocked is False
+        db.fetch_one.assert_not_called()
+        db.execute.assert_not_called()
 
     @patch("pbx.utils.security.get_logger")
     def test_is_ip_blocked_not_in_db(self, mock_get_logger: MagicMock) -> None:
@@ -1546,3 +1550,106 @@ def test_password_policy_common_passwords_class_variable(
             valid, msg = policy.validate(pw)
             assert valid is False, f"Common password '{pw}' was not blocked"
             assert "common" in msg.lower()
+
+
+# ---------------------------------------------------------------------------
+# ThreatDetector blocklist mirror tests
+# ---------------------------------------------------------------------------
+@pytest.mark.unit
+class TestThreatDetectorBlocklist:
+    """Tests for the in-memory blocklist: CIDR ranges, expiry and refresh"""
+
+    @patch("pbx.utils.security.get_logger")
+    def test_cidr_block(self, mock_get_logger: MagicMock) -> None:
+        from pbx.utils.security import ThreatDetector
+
+        detector = ThreatDetector()
+        detector.block_ip("203.0.113.77/24", "Scanner subnet")
+        detector.block_ip("203.0.113.128/25", "Narrower")
+        detector.block_ip("2001:db8::/32", "IPv6 range")
+
+        assert "203.0.113.0/24" in detector.blocked_ips
+        # The most specific range's reason is reported
+        assert detector.is_ip_blocked("203.0.113.200") == (True, "Narrower")
+        assert detector.is_ip_blocked("203.0.113.5") == (True, "Scanner subnet")
+        assert detector.is_ip_blocked("203.0.114.5") == (False, None)
+        assert detector.is_ip_blocked("2001:db8:1::1") == (True, "IPv6 range")
+        assert detector.is_ip_blocked("not-an-ip") == (False, None)
+
+        detector.unblock_ip("203.0.113.128/25")
+        assert detector.is_ip_blocked("203.0.113.200") == (True, "Scanner subnet")
+        detector.unblock_ip("203.0.113.0/24")
+        assert detector.is_ip_blocked("203.0.113.200") == (False, None)
+
+    @patch("pbx.utils.security.get_logger")
+    def test_expired_blocks_leave_in_order(self, mock_get_logger: MagicMock) -> None:
+        from pbx.utils.security import ThreatDetector
+
+        db = MagicMock()
+        db.enabled = True
+        db.db_type = "sqlite"
+        db.fetch_all.return_value = []
+        detector = ThreatDetector(database=db, config={})
+        detector.block_ip("10.0.0.1", "short", duration=1)
+        detector.block_ip("10.1.0.0/16", "short range", duration=1)
+        detector.block_ip("10.0.0.2", "long", duration=3600)
+        db.execute.reset_mock()
+
+        with patch("pbx.utils.security.time.time", return_value=time.time() + 10):
+            assert detector.is_ip_blocked("10.1.2.3") == (False, None)
+            assert detector.is_ip_blocked("10.0.0.2") == (True, "long")
+
+        assert set(detector.blocked_ips) == {"10.0.0.2"}
+        # Both expired blocks were marked auto-unblocked, once each
+        assert db.execute.call_count == 2
+
+    @patch("pbx.utils.security.get_logger")
+    def test_refresh_reloads_only_on_change(self, mock_get_logger: MagicMock) -> None:
+        from pbx.utils.security import ThreatDetector
+
+        db = MagicMock()
+        db.enabled = True
+        db.db_type = "sqlite"
+        db.fetch_all.return_value = []
+        db.fetch_one.return_value = {"last_id": 1, "unblocked": 0}
+        detector = ThreatDetector(database=db, config={})
+
+        assert detector.refresh_blocklist() is True
+        assert detector.refresh_blocklist() is False
+        assert db.fetch_all.call_count == 2
+
+        # Another node blocked a range
+        db.fetch_one.return_value = {"last_id": 2, "unblocked": 0}
+        db.fetch_all.return_value = [
+            {"ip_address": "198.51.100.0/24", "reason": "Peer block", "blocked_until": "2099-01-01"}
+        ]
+        assert detector.refresh_blocklist() is True
+        assert detector.is_ip_blocked("198.51.100.9") == (True, "Peer block")
+
+        # ...and then lifted it
+        db.fetch_one.return_value = {"last_id": 2, "unblocked": 1}
+        db.fetch_all.return_value = []
+        assert detector.refresh_blocklist() is True
+        assert detector.is_ip_blocked("198.51.100.9") == (False, None)
+
+    @patch("pbx.utils.security.get_logger")
+    def test_blocklist_sync_thread(self, mock_get_logger: MagicMock) -> None:
+        from pbx.utils.security import ThreatDetector
+
+        db = MagicMock()
+        db.enabled = True
+        db.db_type = "sqlite"
+        db.fetch_all.return_value = []
+        db.fetch_one.return_value = {"last_id": 1, "unblocked": 0}
+        detector = ThreatDetector(
+            database=db, config={"security.threat_detection.blocklist_refresh_interval": 0.01}
+        )
+
+        detector.start_blocklist_sync()
+        deadline = time.time() + 5
+        while db.fetch_one.call_count < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        detector.stop_blocklist_sync()
+
+        assert db.fetch_one.call_count >= 2
+        assert detector._sync_thread is None
@@ -0,0 +1,276 @@
+"""Tests for the SIP flood shield in pbx/sip/flood_shield.py."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pbx.sip.flood_shield import PEER_REFRESH_SECONDS, CountMinSketch, SIPFloodShield
+
+
+class _Clock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _shield(**config: object) -> SIPFloodShield:
+    with (
+        patch("pbx.sip.flood_shield.get_logger", return_value=MagicMock()),
+        patch("pbx.sip.flood_shield.get_rate_limited_logger", return_value=MagicMock()),
+    ):
+        return SIPFloodShield(config, clock=_Clock())
+
+
+def _request(method: str = "REGISTER", user_agent: str = "Yealink SIP-T46S", seq: int = 1) -> bytes:
+    return (
+        f"{method} sip:pbx.local SIP/2.0\r\n"
+        f"Via: SIP/2.0/UDP 10.0.0.5:5060;branch=z9hG4bK{seq}\r\n"
+        f"From: <sip:1001@pbx.local>;tag={seq}\r\n"
+        "To: <sip:1001@pbx.local>\r\n"
+        f"Call-ID: call-{seq}\r\n"
+        f"CSeq: {seq} {method}\r\n"
+        f"User-Agent: {user_agent}\r\n"
+        "Content-Length: 0\r\n\r\n"
+    ).encode()
+
+
+@pytest.mark.unit
+class TestSIPFloodShield:
+    """Tests for admission decisions on a fake clock."""
+
+    def test_method_bucket_limits_register_burst(self) -> None:
+        shield = _shield(methods={"REGISTER": {"rate": 1, "burst": 3}})
+        ip = "203.0.113.5"
+
+        admitted = [shield.admit(_request(seq=i), ip) for i in range(5)]
+        # Another method from the same source has its own bucket
+        assert shield.admit(_request("INVITE"), ip)
+
+        assert admitted == [True, True, True, False, False]
+        assert shield.dropped["method_rate"] == 2
+        shield.clock.now += 1.0
+        assert shield.admit(_request(), ip)
+
+    def test_responses_only_count_against_source(self) -> None:
+        shield = _shield(
+            source_rate=1, source_burst=5, methods={"REGISTER": {"rate": 1, "burst": 1}}
+        )
+        ip = "203.0.113.5"
+        response = b"SIP/2.0 200 OK\r\nCSeq: 1 INVITE\r\n\r\n"
+
+        assert all(shield.admit(response, ip) for _ in range(5))
+        assert not shield.admit(response, ip)
+        assert shield.dropped["source_rate"] == 1
+
+    def test_scanner_dropped_for_block_period(self) -> None:
+        shield = _shield(scanner_block_seconds=600)
+        ip = "198.51.100.7"
+
+        assert not shield.admit(_request("OPTIONS", user_agent="friendly-scanner"), ip)
+        # Everything from the source is dropped, whatever it claims to be now
+        assert not shield.admit(_request(), ip)
+        assert shield.dropped == {**shield.dropped, "scanner": 1, "blocked": 1}
+
+        shield.clock.now += 601
+        assert shield.admit(_request(), ip)
+        assert ip not in shield.drop_list
+
+    def test_scanner_signature_only_matched_in_user_agent(self) -> None:
+        shield = _shield()
+        data = _request().replace(b"To: <sip:1001", b"To: <sip:sipvicious")
+
+        assert shield.admit(data, "203.0.113.5")
+
+    def test_heavy_hitter_dropped(self) -> None:
+        shield = _shield(
+            source_rate=1,
+            source_burst=1,
+            heavy_hitter_threshold=100,
+            heavy_hitter_block_seconds=30,
+        )
+        ip = "192.0.2.66"
+
+        results = [shield.admit(b"\x00garbage", ip) for _ in range(101)]
+
+        assert results[0] and not any(results[1:])
+        assert shield.dropped["heavy_hitter"] == 1
+        assert shield.drop_list[ip][1] == "heavy_hitter"
+        assert shield.get_statistics()["heavy_hitters"] == [{"ip": ip, "packets": 101}]
+        # A quiet source sharing the window is unaffected
+        assert shield.admit(_request(), "192.0.2.1")
+
+        assert shield.unblock(ip)
+        assert not shield.unblock(ip)
+
+    def test_heavy_hitter_window_resets(self) -> None:
+        shield = _shield(heavy_hitter_threshold=10, heavy_hitter_window=1.0)
+        ip = "192.0.2.66"
+
+        for _ in range(3):
+            assert all(shield.admit(_request("OPTIONS"), ip) for _ in range(5))
+            shield.clock.now += 1.0
+
+        assert shield.dropped["heavy_hitter"] == 0
+
+    def test_trusted_sources_bypass_checks(self) -> None:
+        shield = _shield(trusted=["10.0.0.1"], source_rate=1, source_burst=1)
+
+        assert all(shield.admit(_request(user_agent="sipvicious"), "10.0.0.1") for _ in range(50))
+
+    def test_trunk_and_sbc_peers_trusted_at_resolved_address(self) -> None:
+        shield = _shield(source_rate=1, source_burst=1)
+        hosts = ["trunk.example.net", "192.0.2.10"]
+        answers = {"trunk.example.net": ["198.51.100.20"], "192.0.2.10": ["192.0.2.10"]}
+        shield.peer_hosts = lambda: hosts
+        shield.resolver = MagicMock()
+        shield.resolver.resolve_host.side_effect = lambda host: answers[host]
+
+        assert all(shield.admit(_request(), "198.51.100.20") for _ in range(10))
+        assert all(shield.admit(_request(), "192.0.2.10") for _ in range(10))
+        assert "127.0.0.1" in shield.trusted
+        assert shield.get_statistics()["trusted_peers"] == ["192.0.2.10", "198.51.100.20"]
+
+        # The trunk moves; its old address is rate limited after the next lookup
+        answers["trunk.example.net"] = ["198.51.100.21"]
+        shield.clock.now += PEER_REFRESH_SECONDS
+        assert shield.admit(_request(), "198.51.100.20")
+        assert not shield.admit(_request(), "198.51.100.20")
+        assert shield.admit(_request(), "198.51.100.21")
+
+        # A reload looks peers up again straight away
+        hosts.remove("192.0.2.10")
+        shield.configure({"trusted": []})
+        shield.admit(_request(), "203.0.113.5")
+        assert shield.trusted == {"198.51.100.21"}
+
+    def test_peer_lookup_failure_keeps_previous_addresses(self) -> None:
+        shield = _shield(trusted=[])
+        shield.peer_hosts = lambda: ["trunk.example.net"]
+        shield.resolver = MagicMock()
+        shield.resolver.resolve_host.return_value = ["198.51.100.20"]
+        shield.refresh_peers()
+
+        shield.resolver.resolve_host.side_effect = RuntimeError("resolver stopped")
+        shield.refresh_peers()
+
+        assert shield.trusted == {"198.51.100.20"}
+        shield.logger.warning.assert_called_once()
+
+    def test_threat_detector_blocks_enforced(self) -> None:
+        shield = _shield()
+        shield.threat_detector = MagicMock()
+        shield.threat_detector.is_ip_blocked.side_effect = lambda ip: (ip == "203.0.113.9", None)
+
+        assert not shield.admit(_request(), "203.0.113.9")
+        assert shield.admit(_request(), "203.0.113.10")
+        assert shield.dropped["blocked"] == 1
+
+    def test_source_table_is_bounded(self) -> None:
+        shield = _shield(max_sources=100)
+
+        for i in range(1000):
+            shield.admit(_request(), f"10.1.{i // 256}.{i % 256}")
+
+        assert shield.get_statistics()["tracked_sources"] == 100
+        assert len(shield._methods) == 100
+
+    def test_configure_applies_new_limits(self) -> None:
+        shield = _shield(methods={"REGISTER": {"rate": 1, "burst": 1}}, scanner_block_seconds=600)
+        ip = "203.0.113.5"
+        assert shield.admit(_request(), ip)
+        assert not shield.admit(_request(), ip)
+        shield.admit(_request(user_agent="sipvicious"), "198.51.100.7")
+
+        shield.configure({"methods": {"REGISTER": {"rate": 1, "burst": 5}}})
+
+        assert all(shield.admit(_request(), ip) for _ in range(5))
+        # Sources already dropped stay dropped
+        assert "198.51.100.7" in shield.drop_list
+
+    def test_count_min_sketch_never_undercounts(self) -> None:
+        sketch = CountMinSketch(width=64, depth=4)
+        for i in range(500):
+            sketch.add(f"10.0.0.{i % 50}")
+        for _ in range(200):
+            sketch.add("heavy")
+
+        assert sketch.estimate("heavy") >= 200
+        assert all(sketch.estimate(f"10.0.0.{i}") >= 10 for i in range(50))
+        sketch.clear()
+        assert sketch.estimate("heavy") == 0
+
+
+@pytest.mark.unit
+class TestSIPServerUnderFlood:
+    """A REGISTER flood and a scanner do not crowd out a legitimate phone."""
+
+    def test_legitimate_registrations_survive_flood(self) -> None:
+        shield = _shield(trusted=[])
+        flooders = ["203.0.113.1", "203.0.113.2", "203.0.113.3"]
+        scanner = "198.51.100.7"
+        phone = "10.0.0.5"
+        admitted: dict[str, int] = {}
+
+        def send(data: bytes, ip: str) -> None:
+            if shield.admit(data, ip):
+                admitted[ip] = admitted.get(ip, 0) + 1
+
+        # A thousand datagrams a second from each flooder for half a second
+        flood = _request()
+        for n in range(500):
+            for ip in flooders:
+                send(flood, ip)
+            send(_request("OPTIONS", user_agent="sipvicious", seq=n), scanner)
+            if n % 50 == 0:
+                send(_request(seq=n), phone)
+            shield.clock.now += 0.001
+
+        assert admitted[phone] == 10
+        assert scanner not in admitted
+        # Each flooder gets its REGISTER burst plus half a second of refill
+        assert all(admitted[ip] <= 23 for ip in flooders)
+        stats = shield.get_statistics()
+        assert stats["dropped"]["scanner"] == 1
+        assert stats["dropped_total"] > 1000
+
+    def test_shed_datagrams_never_reach_handler(self) -> None:
+        from pbx.sip.server import SIPServer
+
+        shield = _shield(trusted=[], source_burst=5, source_rate=0)
+        phone = ("10.0.0.5", 5060)
+        datagrams = [(_request(seq=n), ("203.0.113.1", 5060)) for n in range(20)]
+        datagrams.append(
+            (_request("OPTIONS", user_agent="friendly-scanner"), ("198.51.100.7", 5060))
+        )
+        datagrams.append((_request(seq=99), phone))
+
+        with patch("pbx.sip.server.get_logger", return_value=MagicMock()):
+            server = SIPServer(flood_shield=shield)
+        server.running = True
+        server._handle_message = MagicMock()
+
+        def recvfrom(size: int) -> tuple[bytes, tuple[str, int]]:
+            if not datagrams:
+                server.running = False
+                raise TimeoutError
+            return datagrams.pop(0)
+
+        server.socket = MagicMock()
+        server.socket.recvfrom.side_effect = recvfrom
+
+        def run_inline(target: object, args: tuple) -> MagicMock:
+            thread = MagicMock()
+            thread.start.side_effect = lambda: target(*args)
+            return thread
+
+        with patch("pbx.sip.server.threading.Thread", side_effect=run_inline) as thread_cls:
+            server._listen()
+
+        sources = [call.args[1] for call in server._handle_message.call_args_list]
+        assert sources == [("203.0.113.1", 5060)] * 5 + [phone]
+        assert thread_cls.call_count == 6
+        assert shield.get_statistics()["dropped_total"] == 16
@@ -0,0 +1,277 @@
+"""Tests for pbx.features.speech_recognizer_pool — pooled per-call Vosk recognizers."""
+
+import json
+import struct
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+
+class FakeRecognizer:
+    """Stand-in for vosk.KaldiRecognizer that records the audio it was fed."""
+
+    def __init__(self, model, sample_rate) -> None:
+        self.sample_rate = sample_rate
+        self.chunks: list[bytes] = []
+        self.owner_threads: set[int] = set()
+
+    def AcceptWaveform(self, data: bytes) -> bool:  # noqa: N802
+        self.chunks.append(data)
+        self.owner_threads.add(threading.get_ident())
+        return len(self.chunks) % 3 == 0
+
+    def Result(self) -> str:  # noqa: N802
+        return json.dumps({"text": f"chunk{len(self.chunks)}"})
+
+    def PartialResult(self) -> str:  # noqa: N802
+        return json.dumps({"partial": "part"})
+
+    def FinalResult(self) -> str:  # noqa: N802
+        return json.dumps({"text": "final"})
+
+    def Reset(self) -> None:  # noqa: N802
+        self.chunks = []
+
+
+@pytest.fixture
+def fake_vosk():
+    """Install a fake vosk module and clear the process-wide model cache."""
+    from pbx.features import speech_recognizer_pool
+
+    vosk = MagicMock()
+    vosk.KaldiRecognizer.side_effect = FakeRecognizer
+    speech_recognizer_pool._model_cache.clear()
+    with (
+        patch.dict("sys.modules", {"vosk": vosk}),
+        patch("pbx.features.speech_recognizer_pool.get_logger", return_value=MagicMock()),
+    ):
+        yield vosk
+    speech_recognizer_pool._model_cache.clear()
+
+
+@pytest.mark.unit
+class TestSharedModelAndResampling:
+    """Tests for the model cache and resampler."""
+
+    def test_model_loaded_once_per_path(self, fake_vosk):
+        from pbx.features.speech_recognizer_pool import load_shared_model
+
+        first = load_shared_model("/models/en")
+        second = load_shared_model("/models/en")
+
+        assert first is second
+        fake_vosk.Model.assert_called_once_with("/models/en")
+
+    def test_failed_model_load_is_cached(self, fake_vosk):
+        from pbx.features.speech_recognizer_pool import load_shared_model
+
+        fake_vosk.Model.side_effect = RuntimeError("missing")
+        assert load_shared_model("/missing") is None
+        assert load_shared_model("/missing") is None
+        fake_vosk.Model.assert_called_once()
+
+    def test_resample_8k_to_16k(self):
+        from pbx.features.speech_recognizer_pool import resample_pcm16
+
+        pcm = struct.pack("<160h", *range(0, 1600, 10))
+        out = resample_pcm16(pcm, 8000, 16000)
+
+        samples = struct.unpack(f"<{len(out) // 2}h", out)
+        assert len(samples) == 320
+        assert samples[0] == 0
+        assert samples[2] == 10
+        assert samples[1] == 5
+        assert resample_pcm16(pcm, 16000, 16000) is pcm
+
+
+@pytest.mark.unit
+class TestRecognizerPool:
+    """Tests for RecognizerPool."""
+
+    def test_one_recognizer_per_call_and_reuse(self, fake_vosk):
+        from pbx.features.speech_recognizer_pool import RecognizerPool
+
+        pool = RecognizerPool(MagicMock(), max_recognizers=2)
+        a = pool.acquire("call-a")
+        b = pool.acquire("call-b")
+
+        assert a is not b
+        assert pool.acquire("call-a") is a
+        assert pool.acquire("call-c") is None
+
+        a.AcceptWaveform(b"x")
+        pool.release("call-a")
+        c = pool.acquire("call-c")
+        assert c is a
+        assert c.chunks == []
+        assert pool.get_statistics()["created"] == 2
+
+    def test_acquire_waits_for_release(self, fake_vosk):
+        from pbx.features.speech_recognizer_pool import RecognizerPool
+
+        pool = RecognizerPool(MagicMock(), max_recognizers=1)
+        pool.acquire("call-a")
+        threading.Timer(0.05, pool.release, args=("call-a",)).start()
+
+        assert pool.acquire("call-b", timeout=2.0) is not None
+
+
+@pytest.mark.unit
+class TestStreamingRecognitionService:
+    """Tests for StreamingRecognitionService."""
+
+    def test_calls_do_not_share_recognizers(self, fake_vosk):
+        from pbx.features.speech_recognizer_pool import StreamingRecognitionService
+
+        results = []
+        service = StreamingRecognitionService(
+            MagicMock(),
+            workers=4,
+            on_result=lambda call_id, text, final: results.append((call_id, text)),
+        )
+        try:
+            for i in range(6):
+                for call_id in ("a", "b", "c"):
+                    payload = f"{call_id}{i}".encode().ljust(640, b"\x00")
+                    assert service.submit(call_id, payload, sample_rate=16000, timeout=1.0)
+
+            transcripts = {call_id: service.end_stream(call_id) for call_id in ("a", "b", "c")}
+        finally:
+            service.stop()
+
+        # Each call's audio arrives in order on its own recognizer
+        for call_id in ("a", "b", "c"):
+            assert transcripts[call_id] == "chunk3 chunk6 final"
+        assert ("a", "chunk3") in results
+        assert service.pool.get_statistics()["in_use"] == 0
+
+    def test_end_stream_timeout_leaves_recognizer_with_worker(self, fake_vosk):
+        from pbx.features.speech_recognizer_pool import StreamingRecognitionService
+
+        service = StreamingRecognitionService(MagicMock(), workers=1)
+        feeding = threading.Event()
+        release = threading.Event()
+        try:
+            assert service.start_stream("a")
+            recognizer = service.pool.get("a")
+            accept = recognizer.AcceptWaveform
+
+            def slow_accept(data: bytes) -> bool:
+                feeding.set()
+                release.wait(5)
+                return accept(data)
+
+            recognizer.AcceptWaveform = slow_accept
+            recognizer.FinalResult = MagicMock(return_value=json.dumps({"text": "final"}))
+            service.submit("a", b"\x00" * 640, sample_rate=16000)
+            assert feeding.wait(2)
+
+            assert service.end_stream("a", timeout=0.05) == ""
+            # Still mid-AcceptWaveform: not flushed, not back in the pool
+            recognizer.FinalResult.assert_not_called()
+            assert service.pool.get("a") is recognizer
+
+            release.set()
+            deadline = time.monotonic() + 2
+            while service.pool.get("a") is not None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            recognizer.FinalResult.assert_called_once()
+            assert service.pool.get_statistics()["in_use"] == 0
+        finally:
+            release.set()
+            service.stop()
+
+    def test_backpressure_drops_when_queue_full(self, fake_vosk):
+        from pbx.features.speech_recognizer_pool import StreamingRecognitionService
+
+        service = StreamingRecognitionService(MagicMock(), workers=1, max_queued_frames=2)
+        service.running = False
+        service.ready.put(None)
+        for worker in service.workers:
+            worker.join(timeout=1.0)
+
+        assert service.submit("a", b"\x00" * 640, sample_rate=16000)
+        assert service.submit("a", b"\x00" * 640, sample_rate=16000)
+        assert not service.submit("a", b"\x00" * 640, sample_rate=16000)
+        assert service.get_statistics()["frames_dropped"] == 1
+
+    def test_call_audio_resampled_to_model_rate(self, fake_vosk):
+        from pbx.features.speech_recognizer_pool import StreamingRecognitionService
+
+        service = StreamingRecognitionService(MagicMock(), model_sample_rate=16000, workers=1)
+        try:
+            service.submit("a", b"\x00\x01" * 160, sample_rate=8000, timeout=1.0)
+            deadline = time.monotonic() + 2
+            recognizer = service.pool.get("a")
+            while not recognizer.chunks and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert len(recognizer.chunks[0]) == 640
+        finally:
+            service.stop()
+
+    def test_pool_exhaustion_rejects_new_calls(self, fake_vosk):
+        from pbx.features.speech_recognizer_pool import StreamingRecognitionService
+
+        service = StreamingRecognitionService(MagicMock(), max_streams=1, workers=1)
+        try:
+            assert service.start_stream("a")
+            assert not service.start_stream("b")
+            assert not service.submit("b", b"\x00" * 640)
+        finally:
+            service.stop()
+
+
+@pytest.mark.unit
+class TestEngineIntegration:
+    """SpeechAnalyticsEngine uses pooled per-call recognizers."""
+
+    def test_concurrent_calls_use_separate_recognizers(self, fake_vosk):
+        from pbx.features.speech_analytics import SpeechAnalyticsEngine
+
+        config = {"speech_analytics.vosk_model_path": "/models/en"}
+        with patch("pbx.features.speech_analytics.get_logger", return_value=MagicMock()):
+            engine = SpeechAnalyticsEngine(MagicMock(), config)
+
+        engine._transcribe_audio_vosk(b"a" * 640, "call-a")
+        engine._transcribe_audio_vosk(b"b" * 640, "call-b")
+        engine._transcribe_audio_vosk(b"\x00\x00" * 160, "call-a", sample_rate=8000)
+
+        pool = engine._recognizer_pool
+        assert pool.get("call-a").chunks[0] == b"a" * 640
+        assert len(pool.get("call-a").chunks[1]) == 640
+        assert pool.get("call-b").chunks == [b"b" * 640]
+
+        assert engine.has_call("call-a")
+        assert engine.end_call("call-a") == "final"
+        assert pool.get("call-a") is None
+        assert not engine.has_call("call-a")
+        assert engine.has_call("call-b")
+        fake_vosk.Model.assert_called_once()
+
+    def test_live_call_legs_are_transcribed_separately(self, fake_vosk):
+        from pbx.features.speech_analytics import SpeechAnalyticsEngine
+
+        config = {"speech_analytics.vosk_model_path": "/models/en"}
+        with patch("pbx.features.speech_analytics.get_logger", return_value=MagicMock()):
+            engine = SpeechAnalyticsEngine(MagicMock(), config)
+        engine.submit_audio = MagicMock(return_value=True)
+
+        tap = engine.tap_call("call-a")
+        header = struct.pack("!BBHII", 0x80, 0, 1, 160, 1)
+        tap("a", header + b"\xff" * 160)
+        tap("b", header + b"\xff" * 160)
+        tap("a", struct.pack("!BBHII", 0x80, 101, 2, 160, 1) + b"\x01\x00\x00\xa0")
+
+        streams = [c.args[0] for c in engine.submit_audio.call_args_list]
+        assert streams == ["call-a:a", "call-a:b"]
+        # u-law 0xff is silence: 160 samples of 16-bit PCM at 8 kHz
+        assert engine.submit_audio.call_args.args[1:] == (b"\x00\x00" * 160, 8000)
+        assert engine.has_call("call-a")
+
+        engine.end_call("call-a")
+        assert not engine.has_call("call-a")
+        tap("a", header + b"\xff" * 160)
+        assert engine.submit_audio.call_count == 2
+        engine.get_streaming_service().stop()
@@ -469,6 +469,63 @@ def test_route_call_with_pbx_core_trunk_found(self, mock_get_logger: MagicMock)
 
         assert result is True
 
+    @patch("pbx.integrations.teams.get_logger")
+    def test_route_sends_invite_to_resolved_address(self, mock_get_logger: MagicMock) -> None:
+        """Test the INVITE goes to the cached address, skipping unresolved trunks."""
+        from pbx.integrations.teams import TeamsIntegration
+
+        config = MagicMock()
+        config.get.return_value = None
+        integration = TeamsIntegration(config)
+        integration.enabled = True
+        integration.direct_routing_domain = "sip.contoso.com"
+        unresolved = MagicMock()
+        unresolved.name = "Teams Primary"
+        unresolved.host = "sip.contoso.com"
+        unresolved.can_make_call.return_value = True
+        unresolved.resolve_address.return_value = None
+        trunk = MagicMock()
+        trunk.name = "Teams Backup"
+        trunk.host = "sip.contoso.com"
+        trunk.port = 5061
+        trunk.can_make_call.return_value = True
+        trunk.allocate_channel.return_value = True
+        trunk.resolve_address.return_value = "198.51.100.20"
+
+        pbx_core = MagicMock()
+        pbx_core.trunk_system.trunks = {"primary": unresolved, "backup": trunk}
+
+        assert integration.route_call_to_teams("1001", "user@contoso.com", pbx_core) is True
+
+        unresolved.allocate_channel.assert_not_called()
+        trunk.resolve_address.assert_called_once_with()
+        _, dest_addr = pbx_core.sip_server._send_message.call_args[0]
+        assert dest_addr == ("198.51.100.20", 5061)
+
+    @patch("pbx.integrations.teams.get_logger")
+    def test_route_fails_when_no_trunk_resolved(self, mock_get_logger: MagicMock) -> None:
+        """Test no INVITE is sent while the trunk host is not resolved."""
+        from pbx.integrations.teams import TeamsIntegration
+
+        config = MagicMock()
+        config.get.return_value = None
+        integration = TeamsIntegration(config)
+        integration.enabled = True
+        integration.direct_routing_domain = "sip.contoso.com"
+        trunk = MagicMock()
+        trunk.name = "Teams Trunk"
+        trunk.host = "sip.contoso.com"
+        trunk.can_make_call.return_value = True
+        trunk.resolve_address.return_value = None
+
+        pbx_core = MagicMock()
+        pbx_core.trunk_system.trunks = {"teams": trunk}
+
+        assert integration.route_call_to_teams("1001", "user@contoso.com", pbx_core) is False
+
+        trunk.allocate_channel.assert_not_called()
+        pbx_core.sip_server._send_message.assert_not_called()
+
     @patch("pbx.integrations.teams.get_logger")
     def test_route_call_trunk_cannot_make_call(self, mock_get_logger: MagicMock) -> None:
         """Test routing when trunk cannot make call."""
@@ -22,6 +22,20 @@ def test_threat_detector_initialization() -> bool:
     return True
 
 
+def test_reload_settings_picks_up_new_thresholds() -> None:
+    """Thresholds changed in config apply after reload_settings()"""
+
+    config = {"security": {"threat_detection": {"failed_login_threshold": 10}}}
+    detector = ThreatDetector(database=None, config=config)
+    assert detector.failed_login_threshold == 10
+
+    config["security"]["threat_detection"]["failed_login_threshold"] = 3
+    detector.reload_settings()
+
+    assert detector.failed_login_threshold == 3
+    assert detector.ip_block_duration == 3600
+
+
 def test_ip_blocking() -> bool:
     """Test IP blocking"""
 
@@ -0,0 +1,172 @@
+"""Tests for compiled time-based routing schedules."""
+
+from datetime import UTC, date, datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask.testing import FlaskClient
+
+from pbx.features.time_based_routing import TimeBasedRouting
+
+HOLIDAYS = ["2026-01-01", "12-25", {"month": 11, "weekday": 3, "n": 4}]
+
+
+def _routing(**settings: object) -> TimeBasedRouting:
+    config = {"features": {"time_based_routing": {"enabled": True, "holidays": HOLIDAYS}}}
+    config["features"]["time_based_routing"].update(settings)
+    with patch("pbx.features.time_based_routing.get_logger", return_value=MagicMock()):
+        routing = TimeBasedRouting(config)
+    routing.create_business_hours_rule("2000", "queue-day")
+    routing.create_after_hours_rule("2000", "voicemail")
+    return routing
+
+
+def _reference(routing: TimeBasedRouting, destination: str, when: datetime) -> str | None:
+    """Rule the uncompiled per-call evaluation would pick"""
+    rules = [
+        routing.routing_rules[rule_id]
+        for rule_id in routing.destination_rules[destination]
+        if routing.routing_rules[rule_id]["enabled"]
+        and routing._evaluate_time_conditions(
+            routing.routing_rules[rule_id]["time_conditions"], when
+        )
+    ]
+    return min(rules, key=lambda r: r["priority"])["rule_id"] if rules else None
+
+
+@pytest.mark.unit
+class TestCompiledSchedules:
+    """Tests for TimeBasedRouting schedule compilation and caching."""
+
+    def test_matches_per_call_evaluation(self) -> None:
+        routing = _routing()
+        routing.add_rule(
+            {
+                "name": "Stocktake",
+                "destination": "2000",
+                "route_to": "warehouse",
+                "priority": 50,
+                "time_conditions": {
+                    "date_range": {"start": "2025-12-29", "end": "2025-12-30"},
+                    "time_range": {"start": "12:00", "end": "13:30"},
+                },
+            }
+        )
+
+        start = datetime(2025, 12, 24, tzinfo=UTC)
+        # Every 15 minutes plus the exact range edges, across Christmas and New Year
+        for step in range(10 * 24 * 4):
+            for edge in (timedelta(0), timedelta(microseconds=1)):
+                when = start + timedelta(minutes=15 * step) + edge
+                result = routing.get_routing_destination("2000", when)
+                assert result["rule"] == _reference(routing, "2000", when), when
+
+    def test_business_hours_and_holidays(self) -> None:
+        routing = _routing()
+
+        def route(*when: int) -> str:
+            return routing.get_routing_destination("2000", datetime(*when, tzinfo=UTC))[
+                "destination"
+            ]
+
+        assert route(2026, 3, 3, 10, 0) == "queue-day"
+        assert route(2026, 3, 3, 16, 59) == "queue-day"
+        # Both range ends are inclusive, and after hours has the higher priority
+        assert route(2026, 3, 3, 17, 0) == "voicemail"
+        assert route(2026, 3, 3, 9, 0) == "voicemail"
+        # Thanksgiving (4th Thursday in November) and Christmas
+        thanksgiving = datetime(2026, 11, 26, 10, 0, tzinfo=UTC)
+        assert routing.get_routing_destination("2000", thanksgiving)["rule"] is None
+        assert routing._is_holiday(date(2027, 12, 25))
+        assert routing.get_routing_destination("3000")["rule"] is None
+
+    def test_current_decision_cached_until_transition(self) -> None:
+        routing = _routing()
+
+        first = routing.get_routing_destination("2000")
+        builds = routing.schedule_builds
+        for _ in range(50):
+            assert routing.get_routing_destination("2000") == first
+        assert routing.schedule_builds == builds
+        assert routing.decision_cache_hits == 50
+
+        valid_from, valid_until, _ = routing._decisions["2000"]
+        now = datetime.now(UTC).replace(tzinfo=None)
+        assert valid_from <= now < valid_until
+        assert valid_until - valid_from <= timedelta(days=1)
+
+        # Changing the rules drops the cached decision
+        routing.disable_rule(first["rule"] or next(iter(routing.routing_rules)))
+        assert "2000" not in routing._decisions
+
+    def test_timezone_applies_to_aware_times(self) -> None:
+        routing = _routing(timezone="America/New_York")
+
+        # 14:30 UTC is 09:30 in New York in winter
+        result = routing.get_routing_destination("2000", datetime(2026, 1, 6, 14, 30, tzinfo=UTC))
+        assert result["destination"] == "queue-day"
+        result = routing.get_routing_destination("2000", datetime(2026, 1, 6, 13, 30, tzinfo=UTC))
+        assert result["destination"] == "voicemail"
+
+    def test_invalid_rule_rejected_when_added(self) -> None:
+        routing = _routing()
+        with pytest.raises(ValueError):
+            routing.add_rule(
+                {
+                    "name": "Broken",
+                    "destination": "2000",
+                    "time_conditions": {"time_range": {"start": "9am", "end": "5pm"}},
+                }
+            )
+        assert len(routing.routing_rules) == 2
+
+
+@pytest.mark.unit
+class TestRoutingPreview:
+    """Tests for the what-if routing preview."""
+
+    def test_preview_merges_periods_across_days(self) -> None:
+        routing = _routing()
+
+        periods = routing.preview_routing("2000", date(2025, 12, 24), date(2025, 12, 26))
+
+        assert [(p["start"], p["destination"]) for p in periods] == [
+            ("2025-12-24T00:00:00", "voicemail"),
+            ("2025-12-24T09:00:00.000001", "queue-day"),
+            ("2025-12-24T17:00:00", "voicemail"),
+            # Christmas is a holiday, so business hours don't apply
+            ("2025-12-25T09:00:00.000001", "2000"),
+            ("2025-12-25T17:00:00", "voicemail"),
+            ("2025-12-26T09:00:00.000001", "queue-day"),
+            ("2025-12-26T17:00:00", "voicemail"),
+        ]
+        assert periods[-1]["end"] == "2025-12-27T00:00:00"
+
+    def test_preview_rejects_bad_ranges(self) -> None:
+        routing = _routing()
+        with pytest.raises(ValueError):
+            routing.preview_routing("2000", date(2026, 1, 2), date(2026, 1, 1))
+        with pytest.raises(ValueError):
+            routing.preview_routing("2000", date(2026, 1, 1), date(2027, 6, 1))
+
+    def test_preview_route(self, api_client: FlaskClient, mock_pbx_core: MagicMock) -> None:
+        mock_pbx_core.time_based_routing = _routing()
+
+        with patch("pbx.api.utils.verify_authentication", return_value=(True, {"is_admin": True})):
+            response = api_client.get(
+                "/api/time-routing/preview?destination=2000&start=2026-01-01&end=2026-01-02"
+            )
+            bad = api_client.get("/api/time-routing/preview?destination=2000&start=tomorrow")
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["timezone"] == "UTC"
+        # New Year's Day is a holiday: after-hours only, then Friday business hours
+        assert [p["destination"] for p in data["periods"]] == [
+            "voicemail",
+            "2000",
+            "voicemail",
+            "queue-day",
+            "voicemail",
+        ]
+        assert bad.status_code == 400
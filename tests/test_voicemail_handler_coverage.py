@@ -5,10 +5,12 @@
   - __init__
   - handle_voicemail_access (happy path, extension not found, no SDP, RTP allocation failure)
   - _playback_voicemails (no caller RTP, player start failure, empty messages, multiple messages,
-                          play_file failure, error paths)
+                          undecodable message, hangup, error paths)
   - _voicemail_ivr_session (call ended early, no caller RTP, player start failure,
-                            recorder start failure, IVR actions, DTMF handling, timeout)
-  - monitor_voicemail_dtmf (hash detected, loop exit, error path)
+                            recorder start failure, IVR actions, DTMF handling, timeout,
+                            in-band debounce)
+  - _voicemail_recording_session (greeting selection, player/recorder failures, SIP INFO and
+                                  in-band #, maximum duration, hangup)
   - complete_voicemail_recording (call not found, no recorder, audio present, no audio)
 """
 
@@ -38,6 +40,7 @@
 sys.modules.setdefault("pbx.sip.sdp", _mock_sip_sdp)
 sys.modules.setdefault("pbx.features.voicemail", _mock_features_voicemail)
 
+from pbx.core.ivr_runtime import IVRRuntime
 from pbx.core.voicemail_handler import VoicemailHandler
 
 
@@ -115,8 +118,7 @@ def _build_deps(self) -> tuple[MagicMock, MagicMock, VoicemailHandler]:
         handler = VoicemailHandler(pbx)
         return pbx, message, handler
 
-    @patch("pbx.core.voicemail_handler.threading")
-    def test_happy_path_returns_true(self, mock_threading) -> None:
+    def test_happy_path_returns_true(self) -> None:
         """Successful voicemail access should return True."""
         pbx, message, handler = self._build_deps()
         pbx.extension_registry.get.return_value = {"number": "1001"}
@@ -142,8 +144,7 @@ def test_extension_not_found_returns_false(self) -> None:
         )
         assert result is False
 
-    @patch("pbx.core.voicemail_handler.threading")
-    def test_extension_found_in_config_fallback(self, mock_threading) -> None:
+    def test_extension_found_in_config_fallback(self) -> None:
         """Extension found via config fallback should still succeed."""
         pbx, message, handler = self._build_deps()
         pbx.extension_registry.get.return_value = None
@@ -159,8 +160,7 @@ def test_extension_found_in_config_fallback(self, mock_threading) -> None:
         )
         assert result is True
 
-    @patch("pbx.core.voicemail_handler.threading")
-    def test_no_sdp_body_proceeds(self, mock_threading) -> None:
+    def test_no_sdp_body_proceeds(self) -> None:
         """When INVITE has no SDP body, should still proceed (caller_sdp=None)."""
         pbx, message, handler = self._build_deps()
         message.body = None
@@ -192,229 +192,140 @@ def test_rtp_allocation_failure_returns_false(self) -> None:
 
 
 # ---------------------------------------------------------------------------
-# _playback_voicemails
+# _voicemail_ivr_session
 # ---------------------------------------------------------------------------
 
 
-@pytest.mark.unit
-class TestPlaybackVoicemails:
-    """Tests for _playback_voicemails."""
-
-    @patch("pbx.core.voicemail_handler.time")
-    def test_no_caller_rtp_ends_call(self, mock_time) -> None:
-        """If no caller RTP info, should end the call after a delay."""
-        pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
-        call_obj = _make_call()
-        call_obj.caller_rtp = None
-
-        handler._playback_voicemails("call-1", call_obj, MagicMock(), [])
-        pbx.end_call.assert_called_with("call-1")
-
-    @patch("pbx.core.voicemail_handler.time")
-    def test_player_start_failure_ends_call(self, mock_time) -> None:
-        """If RTP player fails to start, should end the call."""
-        mock_player_cls, _, _, _ = _setup_rtp_mocks()
-        mock_player = MagicMock()
-        mock_player.start.return_value = False
-        mock_player_cls.return_value = mock_player
-
-        pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
-        call_obj = _make_call()
-
-        handler._playback_voicemails("call-1", call_obj, MagicMock(), [])
-        pbx.end_call.assert_called_with("call-1")
-
-    @patch("pbx.core.voicemail_handler.time")
-    def test_no_messages_plays_beep(self, mock_time) -> None:
-        """If message list is empty, should play a beep then end the call."""
-        mock_player_cls, _, _, _ = _setup_rtp_mocks()
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player_cls.return_value = mock_player
-
-        pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
-        call_obj = _make_call()
-
-        handler._playback_voicemails("call-1", call_obj, MagicMock(), [])
-        mock_player.play_beep.assert_called_once_with(frequency=400, duration_ms=500)
-        mock_player.stop.assert_called_once()
-        pbx.end_call.assert_called_with("call-1")
-
-    @patch("pbx.core.voicemail_handler.time")
-    def test_multiple_messages_played_and_marked(self, mock_time) -> None:
-        """Multiple messages should be played in order and marked as listened."""
-        mock_player_cls, _, _, _ = _setup_rtp_mocks()
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player.play_file.return_value = True
-        mock_player_cls.return_value = mock_player
-
-        pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
-        call_obj = _make_call()
-        mailbox = MagicMock()
-
-        messages = [
-            {"id": "m1", "file_path": "/audio/vm1.wav"},
-            {"id": "m2", "file_path": "/audio/vm2.wav"},
-        ]
-
-        handler._playback_voicemails("call-1", call_obj, mailbox, messages)
-
-        assert mock_player.play_file.call_count == 2
-        assert mailbox.mark_listened.call_count == 2
-        mailbox.mark_listened.assert_any_call("m1")
-        mailbox.mark_listened.assert_any_call("m2")
-        mock_player.stop.assert_called_once()
-
-    @patch("pbx.core.voicemail_handler.time")
-    def test_play_file_failure_skips_mark(self, mock_time) -> None:
-        """If play_file returns False, the message should not be marked listened."""
-        mock_player_cls, _, _, _ = _setup_rtp_mocks()
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player.play_file.return_value = False
-        mock_player_cls.return_value = mock_player
-
-        pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
-        call_obj = _make_call()
-        mailbox = MagicMock()
-
-        messages = [{"id": "m1", "file_path": "/audio/vm1.wav"}]
-
-        handler._playback_voicemails("call-1", call_obj, mailbox, messages)
-        mailbox.mark_listened.assert_not_called()
-
-    @patch("pbx.core.voicemail_handler.time")
-    def test_error_during_playback_ends_call(self, mock_time) -> None:
-        """On KeyError/TypeError/ValueError during playback, call should still be ended."""
-        mock_player_cls, _, _, _ = _setup_rtp_mocks()
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player.play_file.side_effect = KeyError("bad key")
-        mock_player_cls.return_value = mock_player
-
-        pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
-        call_obj = _make_call()
-
-        messages = [{"id": "m1", "file_path": "/audio/vm1.wav"}]
-        handler._playback_voicemails("call-1", call_obj, MagicMock(), messages)
-        pbx.end_call.assert_called()
-
-    @patch("pbx.core.voicemail_handler.time")
-    def test_error_ending_call_during_cleanup(self, mock_time) -> None:
-        """If end_call raises during cleanup, the error should be logged."""
-        pbx = _make_pbx_core()
-        pbx.end_call.side_effect = RuntimeError("cannot end")
-        handler = VoicemailHandler(pbx)
-        call_obj = _make_call()
-        call_obj.caller_rtp = None
-
-        handler._playback_voicemails("call-1", call_obj, MagicMock(), [])
-        pbx.logger.error.assert_called()
-
-
-# ---------------------------------------------------------------------------
-# _voicemail_ivr_session
-# ---------------------------------------------------------------------------
+class _Clock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _drive(runtime: IVRRuntime, session: Any, limit: float = 300.0) -> None:
+    """Run the session, jumping the clock to each deadline, until it finishes."""
+    end = runtime.clock() + limit
+    runtime.run_pending()
+    while not session.finished:
+        deadline = runtime.next_deadline()
+        if deadline is None or deadline > end:
+            return
+        runtime.clock.now = max(runtime.clock.now, deadline)
+        runtime.run_pending()
+
+
+def _run_session(
+    pbx: MagicMock, call_obj: MagicMock, voicemail_ivr: Any, limit: float = 300.0
+) -> Any:
+    """Start a voicemail IVR session on a fake-clock runtime and drive it."""
+    runtime = IVRRuntime(clock=_Clock(), threaded=False)
+    pbx.ivr_runtime = runtime
+    handler = VoicemailHandler(pbx)
+    # Hooks import RTP and DTMF classes as they run; resolve them against the
+    # mocks even if another test module already imported the real ones
+    mocks = {
+        "pbx.rtp.handler": _mock_rtp_handler,
+        "pbx.utils.audio": _mock_utils_audio,
+        "pbx.utils.dtmf": _mock_utils_dtmf,
+    }
+    with patch.dict(sys.modules, mocks):
+        session = handler._voicemail_ivr_session("call-1", call_obj, MagicMock(), voicemail_ivr)
+        _drive(runtime, session, limit)
+    return session
+
+
+def _make_ivr_player(mock_player_cls: MagicMock) -> MagicMock:
+    """Create a started mock RTPPlayer whose prompts load as two packets."""
+    mock_player = MagicMock()
+    mock_player.start.return_value = True
+    mock_player.load_prompt.return_value = ([b"\xff" * 160] * 2, 0, 160)
+    mock_player.send_frame.return_value = True
+    mock_player_cls.return_value = mock_player
+    return mock_player
+
+
+def _make_ivr_recorder(mock_recorder_cls: MagicMock) -> MagicMock:
+    mock_recorder = MagicMock()
+    mock_recorder.start.return_value = True
+    mock_recorder.recorded_data = []
+    mock_recorder_cls.return_value = mock_recorder
+    return mock_recorder
 
 
 @pytest.mark.unit
 class TestVoicemailIVRSession:
     """Tests for _voicemail_ivr_session."""
 
-    @patch("pbx.core.voicemail_handler.time")
-    def test_call_ended_before_ivr_starts(self, mock_time) -> None:
+    def test_call_ended_before_ivr_starts(self) -> None:
         """If call state is ENDED before IVR starts, should return early."""
         from pbx.core.call import CallState
 
         pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
         call_obj = _make_call()
         call_obj.state = CallState.ENDED
 
-        handler._voicemail_ivr_session("call-1", call_obj, MagicMock(), MagicMock())
+        session = _run_session(pbx, call_obj, MagicMock())
         pbx.end_call.assert_not_called()
+        assert session.finished
 
-    @patch("pbx.core.voicemail_handler.time")
-    def test_no_caller_rtp_ends_call(self, mock_time) -> None:
+    def test_no_caller_rtp_ends_call(self) -> None:
         """If caller RTP is None, should end the call."""
         from pbx.core.call import CallState
 
         pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
         call_obj = _make_call()
         call_obj.state = CallState.CONNECTED
         call_obj.caller_rtp = None
 
-        handler._voicemail_ivr_session("call-1", call_obj, MagicMock(), MagicMock())
+        _run_session(pbx, call_obj, MagicMock())
         pbx.end_call.assert_called_with("call-1")
 
-    @patch("pbx.core.voicemail_handler.time")
-    def test_player_start_failure_ends_call(self, mock_time) -> None:
+    def test_player_start_failure_ends_call(self) -> None:
         """If RTP player fails to start, should end the call."""
         from pbx.core.call import CallState
 
         mock_player_cls, _mock_recorder_cls, _mock_dtmf_cls, _ = _setup_rtp_mocks()
-        mock_player = MagicMock()
+        mock_player = _make_ivr_player(mock_player_cls)
         mock_player.start.return_value = False
-        mock_player_cls.return_value = mock_player
 
         pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
         call_obj = _make_call()
         call_obj.state = CallState.CONNECTED
 
-        handler._voicemail_ivr_session("call-1", call_obj, MagicMock(), MagicMock())
+        _run_session(pbx, call_obj, MagicMock())
         pbx.end_call.assert_called_with("call-1")
 
-    @patch("pbx.core.voicemail_handler.time")
-    def test_recorder_start_failure_ends_call(self, mock_time) -> None:
+    def test_recorder_start_failure_ends_call(self) -> None:
         """If RTP recorder fails to start, should stop player and end call."""
         from pbx.core.call import CallState
 
         mock_player_cls, mock_recorder_cls, _mock_dtmf_cls, _ = _setup_rtp_mocks()
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player_cls.return_value = mock_player
-
-        mock_recorder = MagicMock()
+        mock_player = _make_ivr_player(mock_player_cls)
+        mock_recorder = _make_ivr_recorder(mock_recorder_cls)
         mock_recorder.start.return_value = False
-        mock_recorder_cls.return_value = mock_recorder
 
         pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
         call_obj = _make_call()
         call_obj.state = CallState.CONNECTED
 
-        handler._voicemail_ivr_session("call-1", call_obj, MagicMock(), MagicMock())
+        _run_session(pbx, call_obj, MagicMock())
         mock_player.stop.assert_called()
         pbx.end_call.assert_called_with("call-1")
 
-    @patch("pbx.core.voicemail_handler.time")
-    def test_ivr_hangup_action(self, mock_time) -> None:
-        """When IVR returns hangup action, should play goodbye and exit loop."""
+    def test_ivr_hangup_action(self) -> None:
+        """When IVR returns hangup action, should play goodbye and end the call."""
         from pbx.core.call import CallState
 
         mock_player_cls, mock_recorder_cls, _, mock_get_prompt = _setup_rtp_mocks()
         mock_get_prompt.return_value = b"WAV_AUDIO_DATA"
-
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player_cls.return_value = mock_player
-
-        mock_recorder = MagicMock()
-        mock_recorder.start.return_value = True
-        mock_recorder.recorded_data = []
-        mock_recorder_cls.return_value = mock_recorder
+        mock_player = _make_ivr_player(mock_player_cls)
+        mock_recorder = _make_ivr_recorder(mock_recorder_cls)
 
         pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
         call_obj = _make_call()
         call_obj.state = CallState.CONNECTED
         call_obj.dtmf_info_queue = ["#"]
@@ -425,31 +336,24 @@ def test_ivr_hangup_action(self, mock_time) -> None:
             {"action": "hangup"},
         ]
 
-        handler._voicemail_ivr_session("call-1", call_obj, MagicMock(), voicemail_ivr)
+        session = _run_session(pbx, call_obj, voicemail_ivr)
 
+        mock_get_prompt.assert_called_with("goodbye")
         mock_player.stop.assert_called()
         mock_recorder.stop.assert_called()
         pbx.end_call.assert_called_with("call-1")
+        assert session.finished
 
-    @patch("pbx.core.voicemail_handler.time")
-    def test_ivr_play_prompt_action(self, mock_time) -> None:
+    def test_ivr_play_prompt_action(self) -> None:
         """When IVR returns play_prompt action, should play the prompt audio."""
         from pbx.core.call import CallState
 
         mock_player_cls, mock_recorder_cls, _, mock_get_prompt = _setup_rtp_mocks()
         mock_get_prompt.return_value = b"WAV_PROMPT"
-
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player_cls.return_value = mock_player
-
-        mock_recorder = MagicMock()
-        mock_recorder.start.return_value = True
-        mock_recorder.recorded_data = []
-        mock_recorder_cls.return_value = mock_recorder
+        mock_player = _make_ivr_player(mock_player_cls)
+        _make_ivr_recorder(mock_recorder_cls)
 
         pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
         call_obj = _make_call()
         call_obj.state = CallState.CONNECTED
         call_obj.dtmf_info_queue = ["1"]
@@ -470,56 +374,42 @@ def handle_dtmf_side_effect(digit):
 
         voicemail_ivr.handle_dtmf.side_effect = handle_dtmf_side_effect
 
-        handler._voicemail_ivr_session("call-1", call_obj, MagicMock(), voicemail_ivr)
+        _run_session(pbx, call_obj, voicemail_ivr)
+        mock_player.load_prompt.assert_called_with(b"WAV_PROMPT")
         pbx.end_call.assert_called()
 
-    @patch("pbx.core.voicemail_handler.time")
-    def test_ivr_exception_logged_and_call_ended(self, mock_time) -> None:
+    def test_ivr_exception_logged_and_call_ended(self) -> None:
         """On ValueError in IVR session, error should be logged and call ended."""
         from pbx.core.call import CallState
 
         mock_player_cls, mock_recorder_cls, _, mock_get_prompt = _setup_rtp_mocks()
         mock_get_prompt.side_effect = ValueError("bad prompt")
-
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player_cls.return_value = mock_player
-
-        mock_recorder = MagicMock()
-        mock_recorder.start.return_value = True
-        mock_recorder_cls.return_value = mock_recorder
+        mock_player = _make_ivr_player(mock_player_cls)
+        _make_ivr_recorder(mock_recorder_cls)
 
         pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
         call_obj = _make_call()
         call_obj.state = CallState.CONNECTED
 
         voicemail_ivr = MagicMock()
         voicemail_ivr.handle_dtmf.return_value = {"action": "play_prompt", "prompt": "enter_pin"}
 
-        handler._voicemail_ivr_session("call-1", call_obj, MagicMock(), voicemail_ivr)
+        session = _run_session(pbx, call_obj, voicemail_ivr)
         pbx.logger.error.assert_called()
         pbx.end_call.assert_called()
+        mock_player.stop.assert_called_once()
+        assert session.finished
 
-    @patch("pbx.core.voicemail_handler.time")
-    def test_ivr_collect_digit_action(self, mock_time) -> None:
-        """When IVR returns collect_digit, loop should continue without extra action."""
+    def test_ivr_collect_digit_action(self) -> None:
+        """When IVR returns collect_digit, the session waits for more input."""
         from pbx.core.call import CallState
 
         mock_player_cls, mock_recorder_cls, _, mock_get_prompt = _setup_rtp_mocks()
         mock_get_prompt.return_value = b"WAV_DATA"
-
-        mock_player = MagicMock()
-        mock_player.start.return_value = True
-        mock_player_cls.return_value = mock_player
-
-        mock_recorder = MagicMock()
-        mock_recorder.start.return_value = True
-        mock_recorder.recorded_data = []
-        mock_recorder_cls.return_value = mock_recorder
+        _make_ivr_player(mock_player_cls)
+        _make_ivr_recorder(mock_recorder_cls)
 
         pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
         call_obj = _make_call()
         call_obj.state = CallState.CONNECTED
         call_obj.dtmf_info_queue = ["5"]
@@ -540,133 +430,447 @@ def handle_dtmf_side_effect(digit):
 
         voicemail_ivr.handle_dtmf.side_effect = handle_dtmf_side_effect
 
-        handler._voicemail_ivr_session("call-1", call_obj, MagicMock(), voicemail_ivr)
+        _run_session(pbx, call_obj, voicemail_ivr)
+        assert voicemail_ivr.handle_dtmf.call_count == 2
         pbx.end_call.assert_called()
 
+    def test_inactivity_timeout_ends_call(self) -> None:
+        """With no input the session ends the call after the inactivity timeout."""
+        from pbx.core.call import CallState
+        from pbx.core.voicemail_handler import INACTIVITY_TIMEOUT
 
-# ---------------------------------------------------------------------------
-# monitor_voicemail_dtmf
-# ---------------------------------------------------------------------------
+        mock_player_cls, mock_recorder_cls, _, _ = _setup_rtp_mocks()
+        _make_ivr_player(mock_player_cls)
+        _make_ivr_recorder(mock_recorder_cls)
+
+        pbx = _make_pbx_core()
+        call_obj = _make_call()
+        call_obj.state = CallState.CONNECTED
 
+        voicemail_ivr = MagicMock()
+        voicemail_ivr.handle_dtmf.return_value = {"action": "play_prompt", "prompt": "enter_pin"}
 
-@pytest.mark.unit
-class TestMonitorVoicemailDTMF:
-    """Tests for monitor_voicemail_dtmf."""
+        session = _run_session(pbx, call_obj, voicemail_ivr, limit=INACTIVITY_TIMEOUT - 1)
+        assert not session.finished
+        pbx.end_call.assert_not_called()
 
-    @patch("pbx.core.voicemail_handler.time")
-    def test_hash_detected_completes_recording(self, mock_time) -> None:
-        """When # is detected, should call complete_voicemail_recording."""
-        _, _, mock_dtmf_cls, _ = _setup_rtp_mocks()
-        mock_detector = MagicMock()
-        mock_detector.detect_tone.return_value = "#"
-        mock_dtmf_cls.return_value = mock_detector
+        _drive(pbx.ivr_runtime, session, limit=5)
+        assert session.finished
+        pbx.end_call.assert_called_once_with("call-1")
+
+    def test_inband_digit_debounced(self) -> None:
+        """A tone still present on the next scan is not reported twice."""
+        from pbx.core.call import CallState
+
+        mock_player_cls, mock_recorder_cls, mock_dtmf_cls, _ = _setup_rtp_mocks()
+        _make_ivr_player(mock_player_cls)
+        mock_recorder = _make_ivr_recorder(mock_recorder_cls)
+        mock_dtmf_cls.return_value.detect.return_value = "7"
 
         pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
         call_obj = _make_call()
+        call_obj.state = CallState.CONNECTED
 
-        recorder = MagicMock()
-        recorder.running = True
-        recorder.recorded_data = [b"\x80" * 2000]
+        voicemail_ivr = MagicMock()
+        voicemail_ivr.handle_dtmf.side_effect = lambda digit: (
+            {"action": "play_prompt", "prompt": "enter_pin"}
+            if digit == "*"
+            else {"action": "collect_digit"}
+        )
 
-        with patch.object(handler, "complete_voicemail_recording") as mock_complete:
-            handler.monitor_voicemail_dtmf("call-1", call_obj, recorder)
-            mock_complete.assert_called_once_with("call-1")
+        session = _run_session(pbx, call_obj, voicemail_ivr, limit=1.2)
+        runtime = pbx.ivr_runtime
+        for _ in range(3):
+            mock_recorder.recorded_data = [b"\x00" * 160] * 20
+            runtime.clock.now += 0.1
+            runtime.run_pending()
 
-    @patch("pbx.core.voicemail_handler.time")
-    def test_non_hash_digit_does_not_complete(self, mock_time) -> None:
-        """Non-# digit should not trigger completion."""
-        _, _, mock_dtmf_cls, _ = _setup_rtp_mocks()
-        mock_detector = MagicMock()
-        mock_detector.detect_tone.return_value = "5"
-        mock_dtmf_cls.return_value = mock_detector
+        digits = [c.args[0] for c in voicemail_ivr.handle_dtmf.call_args_list]
+        assert digits == ["*", "7"]
+        assert not session.finished
+
+    def test_greeting_encoded_before_review_menu(self) -> None:
+        """# ends the greeting; it is saved as WAV before the review menu plays."""
+        from pbx.core.call import CallState
+
+        mock_player_cls, mock_recorder_cls, _, mock_get_prompt = _setup_rtp_mocks()
+        _make_ivr_player(mock_player_cls)
+        mock_recorder = _make_ivr_recorder(mock_recorder_cls)
+        mock_recorder.detected_codec = 8
 
         pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
         call_obj = _make_call()
-        call_obj.state.value = "ended"
+        call_obj.state = CallState.CONNECTED
+
+        actions = {
+            "*": {"action": "play_prompt", "prompt": "enter_pin"},
+            "1": {"action": "start_recording"},
+            "#": {"action": "play_prompt", "prompt": "greeting_review_menu"},
+        }
+        voicemail_ivr = MagicMock()
+        voicemail_ivr.handle_dtmf.side_effect = actions.__getitem__
+        voicemail_ivr.save_recorded_greeting.side_effect = lambda wav: order.append("saved")
+        mock_get_prompt.side_effect = lambda prompt: order.append(prompt) or b"WAV"
+        order: list[str] = []
+
+        session = _run_session(pbx, call_obj, voicemail_ivr, limit=1.2)
+        runtime = pbx.ivr_runtime
+        with patch.dict(sys.modules, {"pbx.utils.audio": _mock_utils_audio}):
+            runtime.deliver_digit("call-1", "1")
+            _drive(runtime, session, limit=1.0)
+            assert session.recording
+            mock_recorder.recorded_data = [b"\xd5" * 160] * 3
+            runtime.deliver_digit("call-1", "#")
+            runtime.run_pending()
+
+        pbx._build_wav_file.assert_called_once_with(b"\xd5" * 480, codec_payload_type=8)
+        voicemail_ivr.save_recorded_greeting.assert_called_once_with(b"RIFF_WAV_DATA")
+        assert order[-2:] == ["saved", "greeting_review_menu"]
+        assert session.playing == "review"
+        assert mock_recorder.recorded_data == []
+
+
+# ---------------------------------------------------------------------------
+# _playback_voicemails
+# ---------------------------------------------------------------------------
 
-        recorder = MagicMock()
-        recorder.running = True
-        recorder.recorded_data = [b"\x80" * 2000]
 
-        with patch.object(handler, "complete_voicemail_recording") as mock_complete:
-            handler.monitor_voicemail_dtmf("call-1", call_obj, recorder)
-            mock_complete.assert_not_called()
+def _run_playback(
+    pbx: MagicMock,
+    call_obj: MagicMock,
+    mailbox: Any,
+    messages: list[dict[str, Any]],
+    limit: float = 300.0,
+) -> Any:
+    """Start voicemail playback on a fake-clock runtime and drive it."""
+    runtime = IVRRuntime(clock=_Clock(), threaded=False)
+    pbx.ivr_runtime = runtime
+    handler = VoicemailHandler(pbx)
+    mocks = {
+        "pbx.rtp.handler": _mock_rtp_handler,
+        "pbx.utils.audio": _mock_utils_audio,
+    }
+    with patch.dict(sys.modules, mocks):
+        session = handler._playback_voicemails("call-1", call_obj, mailbox, messages)
+        _drive(runtime, session, limit)
+    return session
 
-    @patch("pbx.core.voicemail_handler.time")
-    def test_recorder_not_running_exits(self, mock_time) -> None:
-        """When recorder.running is False, monitoring loop should exit."""
-        _setup_rtp_mocks()
 
+@pytest.mark.unit
+class TestPlaybackVoicemails:
+    """Tests for _playback_voicemails."""
+
+    def test_no_caller_rtp_ends_call(self) -> None:
+        """If no caller RTP info, should end the call after a delay."""
         pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
         call_obj = _make_call()
+        call_obj.caller_rtp = None
 
-        recorder = MagicMock()
-        recorder.running = False
-        recorder.recorded_data = []
+        session = _run_playback(pbx, call_obj, MagicMock(), [])
+        pbx.end_call.assert_called_once_with("call-1")
+        assert session.finished
 
-        with patch.object(handler, "complete_voicemail_recording") as mock_complete:
-            handler.monitor_voicemail_dtmf("call-1", call_obj, recorder)
-            mock_complete.assert_not_called()
+    def test_player_start_failure_ends_call(self) -> None:
+        """If RTP player fails to start, should end the call."""
+        mock_player_cls, _, _, _ = _setup_rtp_mocks()
+        mock_player = _make_ivr_player(mock_player_cls)
+        mock_player.start.return_value = False
 
-    @patch("pbx.core.voicemail_handler.time")
-    def test_error_in_monitoring_logged(self, mock_time) -> None:
-        """Errors during monitoring should be logged without raising."""
-        _, _, mock_dtmf_cls, _ = _setup_rtp_mocks()
-        mock_dtmf_cls.side_effect = ValueError("detector init failed")
+        pbx = _make_pbx_core()
+        _run_playback(pbx, _make_call(), MagicMock(), [])
+        pbx.end_call.assert_called_once_with("call-1")
+        mock_player.load_prompt.assert_not_called()
+
+    def test_no_messages_plays_beep(self) -> None:
+        """If message list is empty, should play a beep then end the call."""
+        mock_player_cls, _, _, _ = _setup_rtp_mocks()
+        mock_player = _make_ivr_player(mock_player_cls)
 
         pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
-        call_obj = _make_call()
+        _run_playback(pbx, _make_call(), MagicMock(), [])
+        _mock_utils_audio.generate_beep_tone.assert_called_with(400, 500, sample_rate=8000)
+        assert mock_player.send_frame.call_count == 2
+        mock_player.stop.assert_called_once()
+        pbx.end_call.assert_called_once_with("call-1")
 
-        recorder = MagicMock()
-        recorder.running = True
-        recorder.recorded_data = [b"\x80" * 2000]
+    def test_multiple_messages_played_and_marked(self) -> None:
+        """Messages play in order on the media clock and are marked as listened."""
+        mock_player_cls, _, _, _ = _setup_rtp_mocks()
+        mock_player = _make_ivr_player(mock_player_cls)
 
-        handler.monitor_voicemail_dtmf("call-1", call_obj, recorder)
-        pbx.logger.error.assert_called()
+        pbx = _make_pbx_core()
+        mailbox = MagicMock()
+        messages = [
+            {"id": "m1", "file_path": "/audio/vm1.wav"},
+            {"id": "m2", "file_path": "/audio/vm2.wav"},
+        ]
+
+        session = _run_playback(pbx, _make_call(), mailbox, messages)
 
-    @patch("pbx.core.voicemail_handler.time")
-    def test_no_recorded_data_continues(self, mock_time) -> None:
-        """When recorded_data is empty, loop should continue without crash."""
-        _, _, mock_dtmf_cls, _ = _setup_rtp_mocks()
-        mock_detector = MagicMock()
-        mock_dtmf_cls.return_value = mock_detector
+        loaded = [c.args[0] for c in mock_player.load_prompt.call_args_list]
+        assert loaded[0] == "/audio/vm1.wav"
+        assert loaded[-1] == "/audio/vm2.wav"
+        assert len(loaded) == 3  # the beep between the two messages
+        assert [c.args[0] for c in mailbox.mark_listened.call_args_list] == ["m1", "m2"]
+        mock_player.play_file.assert_not_called()
+        mock_player.stop.assert_called_once()
+        pbx.end_call.assert_called_once_with("call-1")
+        assert session.finished
+
+    def test_unplayable_message_not_marked(self) -> None:
+        """A message that can't be decoded is not marked listened."""
+        mock_player_cls, _, _, _ = _setup_rtp_mocks()
+        mock_player = _make_ivr_player(mock_player_cls)
+        mock_player.load_prompt.return_value = None
 
         pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
+        mailbox = MagicMock()
+        messages = [{"id": "m1", "file_path": "/audio/vm1.wav"}]
+
+        _run_playback(pbx, _make_call(), mailbox, messages)
+        mailbox.mark_listened.assert_not_called()
+        pbx.logger.warning.assert_called()
+        pbx.end_call.assert_called_once_with("call-1")
+
+    def test_hangup_stops_playback(self) -> None:
+        """A BYE mid-message stops the player without ending the call again."""
+        mock_player_cls, _, _, _ = _setup_rtp_mocks()
+        mock_player = _make_ivr_player(mock_player_cls)
+        mock_player.load_prompt.return_value = ([b"\xff" * 160] * 500, 0, 160)
+
+        pbx = _make_pbx_core()
+        mailbox = MagicMock()
+        messages = [{"id": "m1", "file_path": "/audio/vm1.wav"}]
+
+        session = _run_playback(pbx, _make_call(), mailbox, messages, limit=1.0)
+        assert session.playing == "message"
+        pbx.ivr_runtime.hangup("call-1")
+        pbx.ivr_runtime.run_pending()
+
+        assert session.finished
+        mock_player.stop.assert_called_once()
+        mailbox.mark_listened.assert_not_called()
+        pbx.end_call.assert_not_called()
+
+    def test_error_during_playback_ends_call(self) -> None:
+        """A malformed message fails the session and the call is still ended."""
+        mock_player_cls, _, _, _ = _setup_rtp_mocks()
+        _make_ivr_player(mock_player_cls)
+
+        pbx = _make_pbx_core()
+        session = _run_playback(pbx, _make_call(), MagicMock(), [{"id": "m1"}])
+        assert session.finished
+        pbx.end_call.assert_called_once_with("call-1")
+
+    def test_error_ending_call_during_cleanup(self) -> None:
+        """If end_call raises during cleanup, the error should be logged."""
+        pbx = _make_pbx_core()
+        pbx.end_call.side_effect = RuntimeError("cannot end")
         call_obj = _make_call()
-        call_obj.state.value = "ended"
+        call_obj.caller_rtp = None
 
-        recorder = MagicMock()
-        recorder.running = True
-        recorder.recorded_data = []
+        _run_playback(pbx, call_obj, MagicMock(), [])
+        pbx.logger.error.assert_called()
+
+
+# ---------------------------------------------------------------------------
+# _voicemail_recording_session
+# ---------------------------------------------------------------------------
 
-        with patch.object(handler, "complete_voicemail_recording") as mock_complete:
-            handler.monitor_voicemail_dtmf("call-1", call_obj, recorder)
-            mock_complete.assert_not_called()
 
-    @patch("pbx.core.voicemail_handler.time")
-    def test_insufficient_audio_data_skips_detection(self, mock_time) -> None:
-        """When audio data is below the threshold, DTMF detection should be skipped."""
-        _, _, mock_dtmf_cls, _ = _setup_rtp_mocks()
-        mock_detector = MagicMock()
-        mock_dtmf_cls.return_value = mock_detector
+def _run_recording(
+    pbx: MagicMock, call_obj: MagicMock, max_duration: float = 180, limit: float = 1.5
+) -> Any:
+    """Start leaving a message on a fake-clock runtime and drive it."""
+    runtime = IVRRuntime(clock=_Clock(), threaded=False)
+    pbx.ivr_runtime = runtime
+    handler = VoicemailHandler(pbx)
+    mocks = {
+        "pbx.rtp.handler": _mock_rtp_handler,
+        "pbx.rtp.jitter_buffer": MagicMock(),
+        "pbx.utils.audio": _mock_utils_audio,
+        "pbx.utils.dtmf": _mock_utils_dtmf,
+    }
+    with patch.dict(sys.modules, mocks):
+        session = handler._voicemail_recording_session("call-1", call_obj, max_duration)
+        _drive(runtime, session, limit)
+    return session
+
+
+def _advance(runtime: IVRRuntime, seconds: float) -> None:
+    """Move the fake clock forward in scan-sized steps."""
+    end = runtime.clock.now + seconds
+    while runtime.clock.now < end:
+        runtime.clock.now += 0.05
+        runtime.run_pending()
 
+
+@pytest.mark.unit
+class TestVoicemailRecordingSession:
+    """Tests for _voicemail_recording_session."""
+
+    def _setup(self, greeting_path: str | None = None) -> tuple[MagicMock, ...]:
+        mock_player_cls, mock_recorder_cls, mock_dtmf_cls, mock_get_prompt = _setup_rtp_mocks()
+        mock_player = _make_ivr_player(mock_player_cls)
+        mock_recorder = _make_ivr_recorder(mock_recorder_cls)
+        mock_recorder.running = True
+        mock_dtmf_cls.return_value.detect_tone.return_value = None
         pbx = _make_pbx_core()
-        handler = VoicemailHandler(pbx)
+        pbx.voicemail_system.get_mailbox.return_value.get_greeting_path.return_value = greeting_path
+        return pbx, mock_player, mock_recorder, mock_dtmf_cls.return_value, mock_get_prompt
+
+    def test_greeting_and_beep_then_records(self) -> None:
+        """The default greeting and the beep play before the recorder takes the port."""
+        pbx, mock_player, mock_recorder, _, mock_get_prompt = self._setup()
+        mock_get_prompt.return_value = b"LEAVE_MESSAGE_WAV"
         call_obj = _make_call()
-        call_obj.state.value = "ended"
 
-        recorder = MagicMock()
-        recorder.running = True
-        recorder.recorded_data = [b"\x80" * 100]
+        session = _run_recording(pbx, call_obj)
+
+        mock_get_prompt.assert_called_once_with("leave_message")
+        assert mock_player.load_prompt.call_args_list[0].args[0] == b"LEAVE_MESSAGE_WAV"
+        assert mock_player.load_prompt.call_count == 2  # greeting, beep
+        mock_player.stop.assert_called_once()
+        assert call_obj.voicemail_recorder is mock_recorder
+        assert session.has_timer("max_duration")
+        assert not session.finished
+        pbx._complete_voicemail_recording.assert_not_called()
+
+    def test_custom_greeting_used(self, tmp_path: Any) -> None:
+        """A mailbox's own greeting file is played instead of the default."""
+        greeting = tmp_path / "greeting.wav"
+        greeting.write_bytes(b"RIFF")
+        pbx, mock_player, _, _, mock_get_prompt = self._setup(str(greeting))
+
+        _run_recording(pbx, _make_call())
+        assert mock_player.load_prompt.call_args_list[0].args[0] == str(greeting)
+        mock_get_prompt.assert_not_called()
+
+    def test_missing_custom_greeting_falls_back(self) -> None:
+        """A configured greeting that no longer exists falls back to the default."""
+        pbx, _, _, _, mock_get_prompt = self._setup("/tmp/nonexistent-greeting.wav")
+
+        _run_recording(pbx, _make_call())
+        mock_get_prompt.assert_called_once_with("leave_message")
+
+    def test_player_start_failure_still_records(self) -> None:
+        """Without a greeting player the message is still recorded."""
+        pbx, mock_player, mock_recorder, _, _ = self._setup()
+        mock_player.start.return_value = False
+        call_obj = _make_call()
+
+        _run_recording(pbx, call_obj)
+        pbx.logger.warning.assert_called()
+        mock_player.load_prompt.assert_not_called()
+        assert call_obj.voicemail_recorder is mock_recorder
+
+    def test_player_oserror_still_records(self) -> None:
+        """A socket error opening the greeting player is logged and recording goes on."""
+        pbx, _, mock_recorder, _, _ = self._setup()
+        _mock_rtp_handler.RTPPlayer.side_effect = OSError("port in use")
+        call_obj = _make_call()
+
+        _run_recording(pbx, call_obj)
+        pbx.logger.error.assert_called()
+        assert call_obj.voicemail_recorder is mock_recorder
+
+    def test_recorder_start_failure_ends_call(self) -> None:
+        """If the recorder can't start, the call is ended."""
+        pbx, _, mock_recorder, _, _ = self._setup()
+        mock_recorder.start.return_value = False
+
+        session = _run_recording(pbx, _make_call())
+        assert session.finished
+        pbx.end_call.assert_called_once_with("call-1")
+
+    def test_sip_info_hash_completes_recording(self) -> None:
+        """# delivered as SIP INFO wakes the session and completes the message."""
+        pbx, _, _, _, _ = self._setup()
+        session = _run_recording(pbx, _make_call())
+
+        assert pbx.ivr_runtime.deliver_digit("call-1", "#")
+        pbx.ivr_runtime.run_pending()
+
+        pbx._complete_voicemail_recording.assert_called_once_with("call-1")
+        assert session.finished
+
+    def test_digits_before_beep_ignored(self) -> None:
+        """Digits pressed before recording starts don't end the message."""
+        pbx, _, _, _, _ = self._setup()
+        call_obj = _make_call()
+        call_obj.dtmf_info_queue = ["#"]
+
+        session = _run_recording(pbx, call_obj)
+        pbx._complete_voicemail_recording.assert_not_called()
+        assert not session.finished
+
+    def test_inband_hash_completes_recording(self) -> None:
+        """An in-band # found by the periodic scan completes the message."""
+        pbx, _, mock_recorder, detector, _ = self._setup()
+        session = _run_recording(pbx, _make_call())
+
+        mock_recorder.recorded_data = [b"\x80" * 2000]
+        detector.detect_tone.return_value = "#"
+        _advance(pbx.ivr_runtime, 0.2)
+
+        pbx._complete_voicemail_recording.assert_called_once_with("call-1")
+        assert session.finished
+
+    def test_other_inband_digits_ignored(self) -> None:
+        """Only # ends the recording."""
+        pbx, _, mock_recorder, detector, _ = self._setup()
+        session = _run_recording(pbx, _make_call())
+
+        mock_recorder.recorded_data = [b"\x80" * 2000]
+        detector.detect_tone.return_value = "5"
+        _advance(pbx.ivr_runtime, 0.5)
+
+        assert detector.detect_tone.called
+        pbx._complete_voicemail_recording.assert_not_called()
+        assert not session.finished
+
+    def test_short_audio_not_scanned(self) -> None:
+        """Too little audio for reliable detection is not scanned."""
+        pbx, _, mock_recorder, detector, _ = self._setup()
+        _run_recording(pbx, _make_call())
+
+        mock_recorder.recorded_data = [b"\x80" * 100]
+        _advance(pbx.ivr_runtime, 0.5)
+        detector.detect_tone.assert_not_called()
+
+    def test_max_duration_completes_recording(self) -> None:
+        """The message is completed once the maximum duration is reached."""
+        pbx, _, _, _, _ = self._setup()
+        session = _run_recording(pbx, _make_call(), max_duration=5)
+        pbx._complete_voicemail_recording.assert_not_called()
+
+        _drive(pbx.ivr_runtime, session, limit=5)
+        pbx._complete_voicemail_recording.assert_called_once_with("call-1")
+        assert session.finished
+
+    def test_hangup_leaves_saving_to_end_call(self) -> None:
+        """On BYE the session just finishes; end_call() saves the recording."""
+        pbx, _, mock_recorder, _, _ = self._setup()
+        session = _run_recording(pbx, _make_call())
+
+        pbx.ivr_runtime.hangup("call-1")
+        pbx.ivr_runtime.run_pending()
+
+        assert session.finished
+        assert not session.has_timer("max_duration")
+        mock_recorder.stop.assert_not_called()
+        pbx._complete_voicemail_recording.assert_not_called()
+        pbx.end_call.assert_not_called()
+
+    def test_recorder_stopped_elsewhere_ends_session(self) -> None:
+        """The session ends once the recorder was stopped by someone else."""
+        pbx, _, mock_recorder, _, _ = self._setup()
+        session = _run_recording(pbx, _make_call())
 
-        with patch.object(handler, "complete_voicemail_recording") as _mock_complete:
-            handler.monitor_voicemail_dtmf("call-1", call_obj, recorder)
-            mock_detector.detect_tone.assert_not_called()
+        mock_recorder.running = False
+        _advance(pbx.ivr_runtime, 0.2)
+        assert session.finished
+        pbx._complete_voicemail_recording.assert_not_called()
 
 
 # ---------------------------------------------------------------------------
@@ -27,9 +27,9 @@ def test_ivr_detects_call_ended_before_start(self) -> None:
 
         This simulates the race condition where:
         1. Call is answered
-        2. IVR thread starts and sleeps for RTP stabilization
+        2. IVR session starts and waits for RTP stabilization
         3. BYE is received and call is terminated
-        4. IVR wakes up and should detect call is ended before entering main loop
+        4. The stabilization timer fires and the session should detect call is ended before entering main loop
         """
         # Create mock PBX core
         from pbx.core.pbx import PBXCore
@@ -80,7 +80,7 @@ def test_ivr_detects_call_ended_before_start(self) -> None:
                 # Simulate call ending before IVR loop starts
                 def end_call_after_setup() -> None:
                     """End call after a short delay to simulate BYE during setup"""
-                    time.sleep(0.3)  # Less than the 0.5s RTP stabilization sleep
+                    time.sleep(0.3)  # Less than the 0.5s RTP stabilization delay
                     call.end()
 
                 # Start thread to end the call
@@ -89,9 +89,10 @@ def end_call_after_setup() -> None:
                 end_thread.start()
 
                 # Run the IVR session
-                pbx_core._voicemail_ivr_session(
+                session = pbx_core._voicemail_ivr_session(
                     "test-call-early-term", call, mock_mailbox, mock_ivr
                 )
+                assert session.wait(2.0)
 
                 # Wait for end thread to complete
                 end_thread.join(timeout=2.0)
@@ -165,9 +166,10 @@ def test_ivr_session_ended_message_only_after_loop(self) -> None:
 
             with patch.object(pbx_core, "logger") as mock_logger:
                 # Run IVR session
-                pbx_core._voicemail_ivr_session(
+                session = pbx_core._voicemail_ivr_session(
                     "test-call-already-ended", call, mock_mailbox, mock_ivr
                 )
+                assert session.wait(2.0)
 
                 log_calls = [str(call) for call in mock_logger.info.call_args_list]
 
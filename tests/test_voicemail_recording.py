@@ -102,19 +102,16 @@ def test_voicemail_recording_timer() -> None:
     # Verify call is routed to voicemail
     assert call.routed_to_voicemail
 
-    # Verify recorder was created
-    assert hasattr(call, "voicemail_recorder")
-    assert call.voicemail_recorder is not None
-
-    # Verify timer was set
-    assert hasattr(call, "voicemail_timer")
-    assert call.voicemail_timer is not None
+    # Verify the greeting and recording run as an IVR session whose maximum
+    # message length is a session timer
+    session = pbx.ivr_runtime.get_session(call.call_id)
+    assert session is not None
+    assert session.max_duration == pbx.config.get("voicemail.max_message_duration", 180)
 
     # Clean up
-    if hasattr(call, "voicemail_recorder") and call.voicemail_recorder:
+    pbx.ivr_runtime.stop()
+    if getattr(call, "voicemail_recorder", None):
         call.voicemail_recorder.stop()
-    if hasattr(call, "voicemail_timer") and call.voicemail_timer:
-        call.voicemail_timer.cancel()
 
     pbx.call_manager.active_calls.clear()
 
@@ -217,9 +214,8 @@ def test_no_answer_answers_call() -> None:
     assert call.routed_to_voicemail
 
     # Clean up
-    if hasattr(call, "voicemail_recorder") and call.voicemail_recorder:
+    pbx.ivr_runtime.stop()
+    if getattr(call, "voicemail_recorder", None):
         call.voicemail_recorder.stop()
-    if hasattr(call, "voicemail_timer") and call.voicemail_timer:
-        call.voicemail_timer.cancel()
 
     pbx.call_manager.active_calls.clear()
@@ -53,7 +53,7 @@ def _make_gateway_with_mocks(
         # Mock RTP relay with port pool
         mock_pbx_core.rtp_relay = MagicMock()
         mock_pbx_core.rtp_relay.allocate_relay.return_value = (20000, 20001)
-        mock_pbx_core.rtp_relay.port_pool = [30000, 30002, 30004]
+        mock_pbx_core.rtp_relay.acquire_port.return_value = 30000
 
         # Mock voicemail system
         mock_voicemail_system = MagicMock()
@@ -106,9 +106,8 @@ def test_webrtc_voicemail_pattern_detection(self) -> None:
         """Test that WebRTC gateway detects voicemail access pattern"""
         gateway, mock_pbx_core, mock_call, mock_signaling = self._make_gateway_with_mocks()
 
-        # Mock the thread start, service media bridge, and VoicemailIVR
+        # Mock the service media bridge and VoicemailIVR
         with (
-            patch("threading.Thread") as mock_thread,
             patch.object(mock_signaling, "start_service_media_bridge", return_value=40000),
             patch("pbx.features.webrtc.VoicemailIVR", create=True) as mock_ivr_cls,
         ):
@@ -136,16 +135,11 @@ def test_webrtc_voicemail_pattern_detection(self) -> None:
             # Verify CDR was started
             mock_pbx_core.cdr_system.start_record.assert_called_once()
 
-            # Verify IVR session thread was started
-            mock_thread.assert_called_once()
-            thread_call = mock_thread.call_args
-            assert thread_call[1]["daemon"], "Thread should be daemon"
-
-            # Verify thread target is the voicemail IVR session
-            assert thread_call[1]["target"] == mock_pbx_core._voicemail_ivr_session
+            # Verify the voicemail IVR session was started on the IVR runtime
+            mock_pbx_core._voicemail_ivr_session.assert_called_once()
 
-            # Verify thread args include call_id, call, mailbox, and ivr
-            args = thread_call[1]["args"]
+            # Verify args include call_id, call, mailbox, and ivr
+            args = mock_pbx_core._voicemail_ivr_session.call_args[0]
             assert len(args) == 4, "Should have 4 arguments"
             assert args[0] == call_id, "First arg should be call_id"
             assert args[1] == mock_call, "Second arg should be call"
@@ -222,11 +216,9 @@ def test_webrtc_voicemail_relay_released(self) -> None:
             mock_pbx_core.rtp_relay.release_relay.assert_called_once_with(call_id)
 
     def test_webrtc_voicemail_service_port_allocated(self) -> None:
-        """Test that a service port is popped from port pool"""
+        """Test that a service port is taken from the port pool"""
         gateway, mock_pbx_core, _mock_call, mock_signaling = self._make_gateway_with_mocks()
 
-        initial_pool_size = len(mock_pbx_core.rtp_relay.port_pool)
-
         with (
             patch("threading.Thread"),
             patch.object(mock_signaling, "start_service_media_bridge", return_value=40000),
@@ -238,8 +230,9 @@ def test_webrtc_voicemail_service_port_allocated(self) -> None:
                 webrtc_signaling=mock_signaling,
             )
 
-            # Port pool should have one less port
-            assert len(mock_pbx_core.rtp_relay.port_pool) == initial_pool_size - 1
+            # A plain port is taken from the pool for the voicemail service
+            mock_pbx_core.rtp_relay.acquire_port.assert_called_once()
+            mock_pbx_core.rtp_relay.release_port.assert_not_called()
 
 
 class TestWebRTCAutoAttendant:
@@ -262,7 +255,7 @@ def test_webrtc_auto_attendant_routing(self) -> None:
 
         mock_pbx_core.rtp_relay = MagicMock()
         mock_pbx_core.rtp_relay.allocate_relay.return_value = (20000, 20001)
-        mock_pbx_core.rtp_relay.port_pool = [30000, 30002]
+        mock_pbx_core.rtp_relay.acquire_port.return_value = 30000
 
         mock_pbx_core.cdr_system = MagicMock()
 
@@ -285,10 +278,7 @@ def test_webrtc_auto_attendant_routing(self) -> None:
         mock_signaling = MagicMock()
         mock_signaling.get_session.return_value = mock_session
 
-        with (
-            patch("threading.Thread") as mock_thread,
-            patch.object(mock_signaling, "start_service_media_bridge", return_value=40000),
-        ):
+        with patch.object(mock_signaling, "start_service_media_bridge", return_value=40000):
             call_id = gateway.initiate_call(
                 session_id="test-session",
                 target_extension="0",
@@ -310,15 +300,10 @@ def test_webrtc_auto_attendant_routing(self) -> None:
             mock_pbx_core.auto_attendant.start_session.assert_called_once()
             assert mock_call.aa_session == mock_aa_session
 
-            # Verify thread targets AA session handler
-            mock_thread.assert_called_once()
-            thread_call = mock_thread.call_args
-            assert (
-                thread_call[1]["target"]
-                == mock_pbx_core._auto_attendant_handler._auto_attendant_session
-            )
-            assert thread_call[1]["daemon"]
-            args = thread_call[1]["args"]
+            # Verify the AA session was started on the IVR runtime
+            aa_session_start = mock_pbx_core._auto_attendant_handler._auto_attendant_session
+            aa_session_start.assert_called_once()
+            args = aa_session_start.call_args[0]
             assert args[0] == call_id
             assert args[1] == mock_call
             assert args[2] == mock_aa_session
@@ -344,7 +329,7 @@ def test_webrtc_paging_routing(self) -> None:
 
         mock_pbx_core.rtp_relay = MagicMock()
         mock_pbx_core.rtp_relay.allocate_relay.return_value = (20000, 20001)
-        mock_pbx_core.rtp_relay.port_pool = [30000, 30002]
+        mock_pbx_core.rtp_relay.acquire_port.return_value = 30000
 
         mock_pbx_core.cdr_system = MagicMock()
         mock_pbx_core.auto_attendant = None
@@ -418,7 +403,7 @@ def test_webrtc_paging_initiate_fails(self) -> None:
 
         mock_pbx_core.rtp_relay = MagicMock()
         mock_pbx_core.rtp_relay.allocate_relay.return_value = (20000, 20001)
-        mock_pbx_core.rtp_relay.port_pool = [30000, 30002]
+        mock_pbx_core.rtp_relay.acquire_port.return_value = 30000
 
         mock_pbx_core.cdr_system = MagicMock()
         mock_pbx_core.auto_attendant = None
@@ -467,7 +452,7 @@ def test_unsupported_dialplan_pattern(self) -> None:
 
         mock_pbx_core.rtp_relay = MagicMock()
         mock_pbx_core.rtp_relay.allocate_relay.return_value = (20000, 20001)
-        mock_pbx_core.rtp_relay.port_pool = [30000, 30002]
+        mock_pbx_core.rtp_relay.acquire_port.return_value = 30000
 
         mock_pbx_core.cdr_system = MagicMock()
         mock_pbx_core.auto_attendant = None
@@ -513,7 +498,7 @@ def test_bridge_failure_returns_none(self) -> None:
 
         mock_pbx_core.rtp_relay = MagicMock()
         mock_pbx_core.rtp_relay.allocate_relay.return_value = (20000, 20001)
-        mock_pbx_core.rtp_relay.port_pool = [30000, 30002]
+        mock_pbx_core.rtp_relay.acquire_port.return_value = 30000
 
         gateway = WebRTCGateway(mock_pbx_core)
 
@@ -535,4 +520,4 @@ def test_bridge_failure_returns_none(self) -> None:
         assert call_id is None
 
         # Port should be returned to pool
-        assert 30000 in mock_pbx_core.rtp_relay.port_pool
+        mock_pbx_core.rtp_relay.release_port.assert_called_once_with(30000)
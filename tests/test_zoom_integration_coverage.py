@@ -471,6 +471,63 @@ def test_route_with_trunk_success(self, mock_get_logger: MagicMock) -> None:
 
         assert result is True
 
+    @patch("pbx.integrations.zoom.get_logger")
+    def test_route_sends_invite_to_resolved_address(self, mock_get_logger: MagicMock) -> None:
+        """Test the INVITE goes to the cached address, skipping unresolved trunks."""
+        from pbx.integrations.zoom import ZoomIntegration
+
+        config = MagicMock()
+        config.get.return_value = None
+        integration = ZoomIntegration(config)
+        integration.enabled = True
+        integration.phone_enabled = True
+        unresolved = MagicMock()
+        unresolved.name = "Zoom Primary"
+        unresolved.host = "pbx.zoom.us"
+        unresolved.can_make_call.return_value = True
+        unresolved.resolve_address.return_value = None
+        trunk = MagicMock()
+        trunk.name = "Zoom Backup"
+        trunk.host = "pbx.zoom.us"
+        trunk.port = 5061
+        trunk.can_make_call.return_value = True
+        trunk.allocate_channel.return_value = True
+        trunk.resolve_address.return_value = "198.51.100.20"
+
+        pbx_core = MagicMock()
+        pbx_core.trunk_system.trunks = {"primary": unresolved, "backup": trunk}
+
+        assert integration.route_to_zoom_phone("1001", "+15551234567", pbx_core) is True
+
+        unresolved.allocate_channel.assert_not_called()
+        trunk.resolve_address.assert_called_once_with()
+        _, dest_addr = pbx_core.sip_server._send_message.call_args[0]
+        assert dest_addr == ("198.51.100.20", 5061)
+
+    @patch("pbx.integrations.zoom.get_logger")
+    def test_route_fails_when_no_trunk_resolved(self, mock_get_logger: MagicMock) -> None:
+        """Test no INVITE is sent while the trunk host is not resolved."""
+        from pbx.integrations.zoom import ZoomIntegration
+
+        config = MagicMock()
+        config.get.return_value = None
+        integration = ZoomIntegration(config)
+        integration.enabled = True
+        integration.phone_enabled = True
+        trunk = MagicMock()
+        trunk.name = "Zoom Trunk"
+        trunk.host = "pbx.zoom.us"
+        trunk.can_make_call.return_value = True
+        trunk.resolve_address.return_value = None
+
+        pbx_core = MagicMock()
+        pbx_core.trunk_system.trunks = {"zoom": trunk}
+
+        assert integration.route_to_zoom_phone("1001", "+15551234567", pbx_core) is False
+
+        trunk.allocate_channel.assert_not_called()
+        pbx_core.sip_server._send_message.assert_not_called()
+
     @patch("pbx.integrations.zoom.get_logger")
     def test_route_trunk_allocate_fails(self, mock_get_logger: MagicMock) -> None:
         """Test route when trunk allocation fails."""